@@ -1,7 +1,10 @@
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
 from app.core.security import get_current_active_user
@@ -14,6 +17,15 @@ from app.schemas.market_data import (
     MultipleQuotesResponse,
     QuoteResponse,
 )
+from app.services.bar_serialization import (
+    COLUMNAR,
+    ROWS,
+    binary_response,
+    columns_to_lists,
+    downsample_columns,
+    lttb_indices,
+    negotiate_format,
+)
 from app.services.market_data import market_data_service
 
 router = APIRouter()
@@ -112,26 +124,131 @@ def get_assets(
     return [AssetResponse.from_orm(asset) for asset in assets]
 
 
+def _stored_query(db: Session, symbol: str, timeframe: str, limit: int):
+    return (
+        db.query(MarketData)
+        .filter(MarketData.symbol == symbol, MarketData.timeframe == timeframe)
+        .order_by(MarketData.timestamp.desc())
+        .limit(limit)
+    )
+
+
+def _stored_rows(db: Session, symbol: str, timeframe: str, limit: int):
+    """Locally stored bars, newest first."""
+    return _stored_query(db, symbol, timeframe, limit).all()
+
+
+def _stored_columns(db: Session, symbol: str, timeframe: str, limit: int):
+    """Locally stored bars as columns, newest first; None if there are none."""
+    rows = (
+        _stored_query(db, symbol, timeframe, limit)
+        .with_entities(
+            MarketData.timestamp,
+            MarketData.open_price,
+            MarketData.high_price,
+            MarketData.low_price,
+            MarketData.close_price,
+            MarketData.volume,
+        )
+        .all()
+    )
+    if not rows:
+        return None
+    timestamps, opens, highs, lows, closes, volumes = zip(*rows)
+    return {
+        "timestamp": np.array([t.isoformat() for t in timestamps], dtype=object),
+        "open": np.asarray(opens, dtype=float),
+        "high": np.asarray(highs, dtype=float),
+        "low": np.asarray(lows, dtype=float),
+        "close": np.asarray(closes, dtype=float),
+        "volume": np.asarray(volumes, dtype=float),
+    }
+
+
+async def _provider_columns(symbol: str, timeframe: str, limit: int):
+    """Bars from the market data service (or bar warehouse), newest first."""
+    columns = await market_data_service.get_historical_columns(
+        symbol, timeframe, limit=limit
+    )
+    return {field: values[::-1] for field, values in columns.items()}
+
+
 @router.get("/history/{symbol}", response_model=List[MarketDataResponse])
-def get_historical_data(
+async def get_historical_data(
     symbol: str,
     timeframe: str = Query("1day", description="Timeframe: 1min, 5min, 1hour, 1day"),
     limit: int = Query(100, ge=1, le=1000),
+    format: str = Query(
+        ROWS,
+        pattern="^(rows|columnar)$",
+        description="rows: one object per bar; columnar: parallel arrays",
+    ),
+    max_points: Optional[int] = Query(
+        None, ge=3, description="Downsample to at most this many bars (LTTB)"
+    ),
+    accept: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
-    """Get historical market data for a symbol"""
+    """
+    Get historical market data for a symbol.
+
+    Bars are newest first. `format=columnar` (or an Arrow/MessagePack
+    Accept header) returns parallel arrays; `max_points` downsamples.
+    Bars that are not stored locally are served from the market data
+    providers, whatever the format.
+    """
     symbol = symbol.upper()
+    fmt = negotiate_format(format, accept)
 
-    query = (
-        db.query(MarketData)
-        .filter(MarketData.symbol == symbol, MarketData.timeframe == timeframe)
-        .order_by(MarketData.timestamp.desc())
-        .limit(limit)
-    )
+    if fmt == ROWS:
+        historical_data = await run_in_threadpool(
+            _stored_rows, db, symbol, timeframe, limit
+        )
+        if not historical_data:
+            columns = downsample_columns(
+                await _provider_columns(symbol, timeframe, limit), max_points
+            )
+            return [
+                MarketDataResponse(
+                    symbol=symbol,
+                    open_price=columns["open"][i],
+                    high_price=columns["high"][i],
+                    low_price=columns["low"][i],
+                    close_price=columns["close"][i],
+                    volume=columns["volume"][i],
+                    change=None,
+                    change_percentage=None,
+                    timestamp=columns["timestamp"][i],
+                    timeframe=timeframe,
+                    source="provider",
+                )
+                for i in range(len(columns["timestamp"]))
+            ]
+        if max_points and len(historical_data) > max_points:
+            closes = np.array([data.close_price for data in historical_data])
+            keep = lttb_indices(closes, max_points)
+            historical_data = [historical_data[i] for i in keep]
+        return [MarketDataResponse.from_orm(data) for data in historical_data]
+
+    # Columnar: select only the bar columns and transpose once
+    columns = await run_in_threadpool(_stored_columns, db, symbol, timeframe, limit)
+    if columns is None:
+        columns = await _provider_columns(symbol, timeframe, limit)
+    source_bars = len(columns["timestamp"])
+    columns = downsample_columns(columns, max_points)
 
-    historical_data = query.all()
-    return [MarketDataResponse.from_orm(data) for data in historical_data]
+    metadata = {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "total_bars": len(columns["timestamp"]),
+        "source_bars": source_bars,
+    }
+    if fmt != COLUMNAR:
+        return binary_response(fmt, columns, metadata)
+    return JSONResponse(
+        {**metadata, "format": COLUMNAR, "columns": columns_to_lists(columns)}
+    )
 
 
 @router.post("/assets", response_model=AssetResponse)
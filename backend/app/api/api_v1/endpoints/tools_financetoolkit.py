@@ -38,6 +38,7 @@ from app.schemas.tool_schemas import (
     RatioValue,
     ToolResponse,
 )
+from app.services.tool_executor import ToolTimeoutError, get_tool_executor
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +101,15 @@ def _get_toolkit(symbol: str):
         return None
 
 
+def _fetch_statements(toolkit) -> tuple:
+    """Blocking: load income, balance sheet and cash flow statements."""
+    return (
+        toolkit.get_income_statement(),
+        toolkit.get_balance_sheet_statement(),
+        toolkit.get_cash_flow_statement(),
+    )
+
+
 # =============================================================================
 # RATIO FORMULAS (for auditability)
 # =============================================================================
@@ -212,9 +222,9 @@ async def get_financial_statements(
     if toolkit:
         try:
             # Get statements from FinanceToolkit
-            income = toolkit.get_income_statement()
-            balance = toolkit.get_balance_sheet_statement()
-            cashflow = toolkit.get_cash_flow_statement()
+            income, balance, cashflow = await get_tool_executor().run(
+                "financetoolkit", f"statements:{symbol}", _fetch_statements, toolkit
+            )
 
             # Parse into response format
             # (Implementation depends on actual FinanceToolkit API)
@@ -227,6 +237,9 @@ async def get_financial_statements(
                 "currency": "USD",
                 "source": "financetoolkit",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"FinanceToolkit statements timeout for {symbol}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"FinanceToolkit statements error for {symbol}: {e}")
             raise HTTPException(
@@ -867,6 +880,7 @@ async def health_check():
         "status": "healthy",
         "financetoolkit_available": toolkit is not None,
         "cache_entries": len(_cache),
+        "executor": get_tool_executor().stats,
         "supported_ratios": len(RATIO_FORMULAS),
         "timestamp": datetime.utcnow().isoformat(),
     }
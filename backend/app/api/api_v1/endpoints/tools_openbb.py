@@ -18,6 +18,7 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import List, Optional
 
+import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
@@ -39,6 +40,12 @@ from app.schemas.tool_schemas import (
     TimeframeEnum,
     ToolResponse,
 )
+from app.services.tool_executor import (
+    ToolTimeoutError,
+    columns_to_bars,
+    frame_to_bar_columns,
+    get_tool_executor,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +110,61 @@ def _get_openbb():
         return None
 
 
+def _run_tool(key: str, fn, *args, **kwargs):
+    """Run a blocking OpenBB call on the shared tool executor."""
+    return get_tool_executor().run("openbb", key, fn, *args, **kwargs)
+
+
+def _fetch_records(route, **kwargs) -> List[dict]:
+    """Blocking: call an OpenBB route and return its rows as records."""
+    result = route(**kwargs)
+    return result.to_dict("records") if result else []
+
+
+def _fetch_ohlcv_bars(obb, limit: int, **kwargs) -> List[dict]:
+    """Blocking: fetch historical prices and convert them column-wise."""
+    result = obb.equity.price.historical(**kwargs)
+    df = result.to_df() if result else None
+    if df is None or df.empty:
+        return []
+
+    columns = frame_to_bar_columns(
+        df,
+        {
+            "open": "open",
+            "high": "high",
+            "low": "low",
+            "close": "close",
+            "volume": "volume",
+            "vwap": "vwap",
+        },
+        limit=limit,
+        optional=("vwap",),
+    )
+    return columns_to_bars(columns)
+
+
+def _fetch_macro_points(route, **kwargs) -> List[dict]:
+    """Blocking: fetch a macro series and convert its last 100 points."""
+    result = route(**kwargs)
+    if not result:
+        return []
+    df = result.to_df().tail(100)
+    if df.empty:
+        return []
+
+    dates = pd.to_datetime(pd.Index(df.index), errors="coerce")
+    date_strings = dates.strftime("%Y-%m-%d").to_numpy(dtype=object)
+    unparsed = dates.isna()
+    date_strings[unparsed] = pd.Index(df.index)[unparsed].astype(str)
+    values = df.iloc[:, 0].astype(str).to_numpy() if df.shape[1] else ["0"] * len(df)
+
+    return [
+        {"date": day, "value": value, "period": None}
+        for day, value in zip(date_strings.tolist(), list(values))
+    ]
+
+
 # =============================================================================
 # ENDPOINTS
 # =============================================================================
@@ -148,8 +210,14 @@ async def get_quote(
 
     if obb:
         try:
-            result = obb.equity.price.quote(symbol=symbol, provider="yfinance")
-            data = result.to_dict("records")[0] if result else {}
+            records = await _run_tool(
+                cache_key,
+                _fetch_records,
+                obb.equity.price.quote,
+                symbol=symbol,
+                provider="yfinance",
+            )
+            data = records[0] if records else {}
 
             quote_data = {
                 "symbol": symbol,
@@ -189,6 +257,9 @@ async def get_quote(
                 "timestamp": datetime.utcnow().isoformat(),
                 "source": "openbb",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"OpenBB quote timeout for {symbol}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"OpenBB quote error for {symbol}: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to fetch quote: {e}")
@@ -294,32 +365,16 @@ async def get_ohlcv(
 
     if obb:
         try:
-            result = obb.equity.price.historical(
+            bars = await _run_tool(
+                cache_key,
+                _fetch_ohlcv_bars,
+                obb,
+                limit,
                 symbol=symbol,
                 start_date=start_date,
                 end_date=end_date,
                 provider="yfinance",
             )
-            df = result.to_df() if result else None
-
-            bars = []
-            if df is not None and not df.empty:
-                for idx, row in df.tail(limit).iterrows():
-                    bars.append(
-                        {
-                            "timestamp": (
-                                idx.isoformat()
-                                if hasattr(idx, "isoformat")
-                                else str(idx)
-                            ),
-                            "open": str(row.get("open", 0)),
-                            "high": str(row.get("high", 0)),
-                            "low": str(row.get("low", 0)),
-                            "close": str(row.get("close", 0)),
-                            "volume": int(row.get("volume", 0)),
-                            "vwap": str(row.get("vwap")) if row.get("vwap") else None,
-                        }
-                    )
 
             ohlcv_data = {
                 "symbol": symbol,
@@ -330,6 +385,9 @@ async def get_ohlcv(
                 "total_bars": len(bars),
                 "source": "openbb",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"OpenBB OHLCV timeout for {symbol}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"OpenBB OHLCV error for {symbol}: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to fetch OHLCV: {e}")
@@ -420,8 +478,14 @@ async def get_fundamentals(
 
     if obb:
         try:
-            result = obb.equity.fundamental.overview(symbol=symbol, provider="fmp")
-            data = result.to_dict("records")[0] if result else {}
+            records = await _run_tool(
+                cache_key,
+                _fetch_records,
+                obb.equity.fundamental.overview,
+                symbol=symbol,
+                provider="fmp",
+            )
+            data = records[0] if records else {}
 
             fundamentals_data = {
                 "symbol": symbol,
@@ -514,6 +578,9 @@ async def get_fundamentals(
                 "last_updated": datetime.utcnow().isoformat(),
                 "source": "openbb",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"OpenBB fundamentals timeout for {symbol}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"OpenBB fundamentals error for {symbol}: {e}")
             raise HTTPException(
@@ -608,8 +675,14 @@ async def get_news(
 
     if obb:
         try:
-            result = obb.news.company(symbol=symbol, limit=limit, provider="benzinga")
-            data = result.to_dict("records") if result else []
+            data = await _run_tool(
+                cache_key,
+                _fetch_records,
+                obb.news.company,
+                symbol=symbol,
+                limit=limit,
+                provider="benzinga",
+            )
 
             headlines = []
             for item in data[:limit]:
@@ -636,6 +709,9 @@ async def get_news(
                 "total_results": len(headlines),
                 "source": "openbb",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"OpenBB news timeout for {symbol}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"OpenBB news error for {symbol}: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to fetch news: {e}")
@@ -747,59 +823,40 @@ async def get_macro(
     if obb:
         try:
             # Map series to OpenBB economy functions
+            window = {"start_date": start_date, "end_date": end_date}
             if series == MacroSeriesEnum.GDP:
-                result = obb.economy.gdp.nominal(
-                    country=country,
-                    start_date=start_date,
-                    end_date=end_date,
-                    provider="oecd",
-                )
+                route = obb.economy.gdp.nominal
+                kwargs = {"country": country, "provider": "oecd", **window}
             elif series == MacroSeriesEnum.INFLATION:
-                result = obb.economy.cpi(
-                    country=country,
-                    start_date=start_date,
-                    end_date=end_date,
-                    provider="fred",
-                )
+                route = obb.economy.cpi
+                kwargs = {"country": country, "provider": "fred", **window}
             elif series == MacroSeriesEnum.UNEMPLOYMENT:
-                result = obb.economy.unemployment(
-                    country=country,
-                    start_date=start_date,
-                    end_date=end_date,
-                    provider="oecd",
-                )
+                route = obb.economy.unemployment
+                kwargs = {"country": country, "provider": "oecd", **window}
             elif series == MacroSeriesEnum.INTEREST_RATES:
-                result = obb.economy.fred_series(
-                    symbol="FEDFUNDS", start_date=start_date, end_date=end_date
-                )
+                route = obb.economy.fred_series
+                kwargs = {"symbol": "FEDFUNDS", **window}
             else:
-                result = None
+                route = None
 
             data_points = []
-            if result:
-                df = result.to_df()
-                for idx, row in df.iterrows():
-                    data_points.append(
-                        {
-                            "date": (
-                                idx.strftime("%Y-%m-%d")
-                                if hasattr(idx, "strftime")
-                                else str(idx)
-                            ),
-                            "value": str(row.iloc[0]) if len(row) > 0 else "0",
-                            "period": None,
-                        }
-                    )
+            if route is not None:
+                data_points = await _run_tool(
+                    cache_key, _fetch_macro_points, route, **kwargs
+                )
 
             macro_data = {
                 "series": series.value,
                 "country": country,
                 "unit": config["unit"],
                 "frequency": config["frequency"],
-                "data": data_points[-100:],  # Limit to last 100 points
+                "data": data_points,  # Last 100 points
                 "last_updated": datetime.utcnow().isoformat(),
                 "source": "openbb",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"OpenBB macro timeout for {series.value}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"OpenBB macro error for {series.value}: {e}")
             raise HTTPException(
@@ -857,5 +914,6 @@ async def health_check():
         "status": "healthy",
         "openbb_available": obb is not None,
         "cache_entries": len(_cache),
+        "executor": get_tool_executor().stats,
         "timestamp": datetime.utcnow().isoformat(),
     }
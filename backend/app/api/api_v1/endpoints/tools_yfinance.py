@@ -21,9 +21,26 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, Header, HTTPException, Query
 from pydantic import BaseModel, Field
 
+from app.services.bar_serialization import (
+    COLUMNAR,
+    ROWS,
+    binary_response,
+    columns_to_lists,
+    downsample_columns,
+    negotiate_format,
+)
+from app.services.tool_executor import (
+    ToolTimeoutError,
+    columns_to_bars,
+    frame_to_bar_columns,
+    get_tool_executor,
+    stringify_price_columns,
+)
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tools/yfinance", tags=["Tools - yfinance"])
@@ -190,6 +207,85 @@ def _safe_get(data: dict, key: str, default=None):
         return None
 
 
+def _run_tool(key: str, fn, *args):
+    """
+    Run a blocking yfinance call on the shared tool executor.
+
+    Quote, fundamentals and ratios all read `Ticker.info`, so they share the
+    "info:<ticker>" key and concurrent requests for one ticker make one call.
+    """
+    return get_tool_executor().run("yfinance", key, fn, *args)
+
+
+def _fetch_info(yf_ticker) -> dict:
+    """Blocking: load the ticker's info dict."""
+    return yf_ticker.info
+
+
+def _fetch_history_columns(
+    yf_ticker, period: str, interval: str
+) -> Dict[str, np.ndarray]:
+    """Blocking: download history as numeric column arrays."""
+    hist = yf_ticker.history(period=period, interval=interval)
+    return frame_to_bar_columns(
+        hist,
+        {
+            "open": "Open",
+            "high": "High",
+            "low": "Low",
+            "close": "Close",
+            "volume": "Volume",
+        },
+        as_strings=False,
+    )
+
+
+def _mock_history_columns() -> Dict[str, np.ndarray]:
+    """Thirty days of deterministic mock bars."""
+    now = datetime.utcnow()
+    step = np.arange(30)
+    base_price = 150.0 + step * 0.5
+    return {
+        "timestamp": np.array(
+            [(now - timedelta(days=30 - i)).isoformat() for i in range(30)],
+            dtype=object,
+        ),
+        "open": np.round(base_price, 2),
+        "high": np.round(base_price + 2, 2),
+        "low": np.round(base_price - 1, 2),
+        "close": np.round(base_price + 1, 2),
+        "volume": 50000000 + step * 100000,
+    }
+
+
+def _history_payload(
+    entry: dict, params: dict, fmt: str, max_points: Optional[int]
+) -> tuple:
+    """
+    Shape cached history columns into a response payload.
+
+    Returns the payload dict and the (possibly downsampled) columns.
+    """
+    columns = downsample_columns(entry["columns"], max_points)
+    payload = {
+        "symbol": params["ticker"],
+        "period": params["period"],
+        "interval": params["interval"],
+        "total_bars": len(columns["timestamp"]),
+        "timestamp": entry["timestamp"],
+        "source": entry["source"],
+    }
+    if max_points:
+        payload["source_bars"] = len(entry["columns"]["timestamp"])
+
+    if fmt == COLUMNAR:
+        payload["format"] = COLUMNAR
+        payload["columns"] = columns_to_lists(columns)
+    elif fmt == ROWS:
+        payload["bars"] = columns_to_bars(stringify_price_columns(columns))
+    return payload, columns
+
+
 def _to_str(value) -> Optional[str]:
     """Convert value to string, returning None for invalid values"""
     if value is None:
@@ -242,8 +338,7 @@ async def get_quote(ticker: str) -> YFinanceToolResponse:
 
     if yf_ticker:
         try:
-            info = yf_ticker.info
-            fast_info = yf_ticker.fast_info if hasattr(yf_ticker, "fast_info") else {}
+            info = await _run_tool(f"info:{ticker}", _fetch_info, yf_ticker)
 
             quote_data = {
                 "symbol": ticker,
@@ -271,6 +366,9 @@ async def get_quote(ticker: str) -> YFinanceToolResponse:
                 "timestamp": datetime.utcnow().isoformat(),
                 "source": "yfinance",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"yfinance quote timeout for {ticker}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"yfinance quote error for {ticker}: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to fetch quote: {e}")
@@ -314,13 +412,24 @@ async def get_history(
         "1d",
         description="Data interval: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo",
     ),
-) -> YFinanceToolResponse:
+    format: str = Query(
+        ROWS,
+        regex="^(rows|columnar)$",
+        description="rows: one object per bar; columnar: parallel arrays",
+    ),
+    max_points: Optional[int] = Query(
+        None, ge=3, description="Downsample to at most this many bars (LTTB)"
+    ),
+    accept: Optional[str] = Header(None),
+):
     """
     Get historical OHLCV data.
 
     Tool: yfinance_history
 
-    Returns: OHLCV series for the specified period and interval
+    Returns: OHLCV series for the specified period and interval. Long series
+    can be requested as parallel arrays (`format=columnar`), as Arrow IPC or
+    MessagePack via the Accept header, and downsampled with `max_points`.
 
     Use when user asks about:
     - Historical price data
@@ -330,93 +439,58 @@ async def get_history(
     """
     start_time = time.time()
     ticker = ticker.upper()
+    params = {"ticker": ticker, "period": period, "interval": interval}
+    fmt = negotiate_format(format, accept)
 
-    cache_key = _cache_key(
-        "history", {"ticker": ticker, "period": period, "interval": interval}
-    )
-    cached = _get_cached(cache_key)
+    cache_key = _cache_key("history", params)
+    entry = _get_cached(cache_key)
+    cached = entry is not None
 
-    if cached:
-        latency_ms = int((time.time() - start_time) * 1000)
-        return YFinanceToolResponse(
-            tool="yfinance_history",
-            request_params={"ticker": ticker, "period": period, "interval": interval},
-            response=cached,
-            cached=True,
-            latency_ms=latency_ms,
-            timestamp=datetime.utcnow(),
-        )
+    if not cached:
+        yf_ticker = _get_yfinance_ticker(ticker)
 
-    yf_ticker = _get_yfinance_ticker(ticker)
-
-    if yf_ticker:
-        try:
-            hist = yf_ticker.history(period=period, interval=interval)
-
-            bars = []
-            for idx, row in hist.iterrows():
-                bars.append(
-                    {
-                        "timestamp": (
-                            idx.isoformat() if hasattr(idx, "isoformat") else str(idx)
-                        ),
-                        "open": _to_str(row.get("Open")),
-                        "high": _to_str(row.get("High")),
-                        "low": _to_str(row.get("Low")),
-                        "close": _to_str(row.get("Close")),
-                        "volume": int(row.get("Volume", 0)) if row.get("Volume") else 0,
-                    }
+        if yf_ticker:
+            try:
+                columns = await _run_tool(
+                    cache_key, _fetch_history_columns, yf_ticker, period, interval
                 )
-
-            history_data = {
-                "symbol": ticker,
-                "period": period,
-                "interval": interval,
-                "bars": bars,
-                "total_bars": len(bars),
-                "timestamp": datetime.utcnow().isoformat(),
-                "source": "yfinance",
-            }
-        except Exception as e:
-            logger.error(f"yfinance history error for {ticker}: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to fetch history: {e}")
-    else:
-        # Mock data
-        bars = []
-        base_price = 150.0
-        for i in range(30):
-            bars.append(
-                {
-                    "timestamp": (
-                        datetime.utcnow() - timedelta(days=30 - i)
-                    ).isoformat(),
-                    "open": str(round(base_price + i * 0.5, 2)),
-                    "high": str(round(base_price + i * 0.5 + 2, 2)),
-                    "low": str(round(base_price + i * 0.5 - 1, 2)),
-                    "close": str(round(base_price + i * 0.5 + 1, 2)),
-                    "volume": 50000000 + i * 100000,
-                }
-            )
-
-        history_data = {
-            "symbol": ticker,
-            "period": period,
-            "interval": interval,
-            "bars": bars,
-            "total_bars": len(bars),
+                source = "yfinance"
+            except ToolTimeoutError as e:
+                logger.warning(f"yfinance history timeout for {ticker}: {e}")
+                raise HTTPException(status_code=504, detail=str(e))
+            except Exception as e:
+                logger.error(f"yfinance history error for {ticker}: {e}")
+                raise HTTPException(
+                    status_code=500, detail=f"Failed to fetch history: {e}"
+                )
+        else:
+            # Mock data
+            columns = _mock_history_columns()
+            source = "yfinance_mock"
+
+        # Cache raw columns so every format and max_points reuses one fetch
+        entry = {
+            "columns": columns,
             "timestamp": datetime.utcnow().isoformat(),
-            "source": "yfinance_mock",
+            "source": source,
         }
+        _set_cached(cache_key, entry, CACHE_TTL["history"])
 
-    _set_cached(cache_key, history_data, CACHE_TTL["history"])
-
+    history_data, columns = _history_payload(entry, params, fmt, max_points)
     latency_ms = int((time.time() - start_time) * 1000)
 
+    if fmt not in (ROWS, COLUMNAR):
+        metadata = {
+            key: value for key, value in history_data.items() if key != "bars"
+        }
+        metadata.update(tool="yfinance_history", cached=cached, latency_ms=latency_ms)
+        return binary_response(fmt, columns, metadata)
+
     return YFinanceToolResponse(
         tool="yfinance_history",
-        request_params={"ticker": ticker, "period": period, "interval": interval},
+        request_params=params,
         response=history_data,
-        cached=False,
+        cached=cached,
         latency_ms=latency_ms,
         timestamp=datetime.utcnow(),
     )
@@ -457,7 +531,7 @@ async def get_fundamentals(ticker: str) -> YFinanceToolResponse:
 
     if yf_ticker:
         try:
-            info = yf_ticker.info
+            info = await _run_tool(f"info:{ticker}", _fetch_info, yf_ticker)
 
             fundamentals_data = {
                 "symbol": ticker,
@@ -482,6 +556,9 @@ async def get_fundamentals(ticker: str) -> YFinanceToolResponse:
                 "timestamp": datetime.utcnow().isoformat(),
                 "source": "yfinance",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"yfinance fundamentals timeout for {ticker}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"yfinance fundamentals error for {ticker}: {e}")
             raise HTTPException(
@@ -576,7 +653,7 @@ async def compute_ratios(ticker: str) -> YFinanceToolResponse:
 
     if yf_ticker:
         try:
-            info = yf_ticker.info
+            info = await _run_tool(f"info:{ticker}", _fetch_info, yf_ticker)
 
             # Extract ratios - return null for missing
             pe_ratio = _to_str(_safe_get(info, "trailingPE"))
@@ -631,6 +708,9 @@ async def compute_ratios(ticker: str) -> YFinanceToolResponse:
                 "source": "yfinance",
                 "note": "Ratios computed from yfinance data. Null values indicate data unavailable from free data source. For comprehensive data, consider premium providers like Bloomberg or FactSet.",
             }
+        except ToolTimeoutError as e:
+            logger.warning(f"yfinance ratios timeout for {ticker}: {e}")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.error(f"yfinance ratios error for {ticker}: {e}")
             raise HTTPException(
@@ -691,6 +771,7 @@ async def health_check():
         "yfinance_available": yf_available,
         "yfinance_version": yf_version,
         "cache_entries": len(_cache),
+        "executor": get_tool_executor().stats,
         "timestamp": datetime.utcnow().isoformat(),
         "disclaimer": "yfinance provides market data estimates, not authoritative exchange feeds",
     }
@@ -216,6 +216,19 @@ class Settings(BaseSettings):
     MAX_ORDER_AMOUNT: float = 1000000.0
     RISK_FREE_RATE: float = 0.02  # 2% annual risk-free rate
 
+    # Large order execution
+    MAX_ORDER_CHUNK_SIZE: float = 10000.0
+    MIN_TIME_BETWEEN_CHUNKS: int = 5  # seconds
+    MAX_PARTIAL_FILL_ATTEMPTS: int = 5
+    EXECUTION_QUALITY_THRESHOLD: float = 0.001
+    CHILD_ORDER_MAX_IN_FLIGHT: int = int(os.getenv("CHILD_ORDER_MAX_IN_FLIGHT", "8"))
+    CHILD_ORDER_RATE_PER_SECOND: float = float(
+        os.getenv("CHILD_ORDER_RATE_PER_SECOND", "5.0")
+    )
+    CHILD_ORDER_FILL_BATCH_SIZE: int = int(
+        os.getenv("CHILD_ORDER_FILL_BATCH_SIZE", "50")
+    )
+
     # Fractional Share Settings
     FRACTIONAL_SHARE_ENABLED: bool = True
     MIN_FRACTIONAL_AMOUNT: float = 1.0
@@ -266,6 +279,28 @@ class Settings(BaseSettings):
     ML_MODEL_PATH: str = os.getenv("ML_MODEL_PATH", "./ml_models/weights")
     QUANTUM_ENABLED: bool = os.getenv("QUANTUM_ENABLED", "false").lower() == "true"
 
+    # Local OHLCV bar warehouse (memory-mapped per symbol/timeframe)
+    BAR_WAREHOUSE_ENABLED: bool = (
+        os.getenv("BAR_WAREHOUSE_ENABLED", "false").lower() == "true"
+    )
+    BAR_WAREHOUSE_DIR: str = os.getenv("BAR_WAREHOUSE_DIR", "./data/bars")
+    # Days of minute bars kept after the nightly compaction into hourly bars
+    BAR_WAREHOUSE_MINUTE_RETAIN_DAYS: int = int(
+        os.getenv("BAR_WAREHOUSE_MINUTE_RETAIN_DAYS", "90")
+    )
+
+    # Intraday volume profiles for VWAP execution, rebuilt nightly from the
+    # bar warehouse
+    VOLUME_PROFILE_PATH: str = os.getenv(
+        "VOLUME_PROFILE_PATH", "./data/volume_profiles.npz"
+    )
+    VOLUME_PROFILE_BUILD_HOUR_UTC: int = int(
+        os.getenv("VOLUME_PROFILE_BUILD_HOUR_UTC", "6")
+    )
+    VOLUME_PROFILE_LOOKBACK_DAYS: int = int(
+        os.getenv("VOLUME_PROFILE_LOOKBACK_DAYS", "60")
+    )
+
     # Sentiment Analysis Settings
     NEWS_API_KEY: Optional[str] = os.getenv("NEWS_API_KEY")
     SENTIMENT_CACHE_TTL: int = 900  # 15 minutes
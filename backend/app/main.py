@@ -18,6 +18,8 @@ from app.db.init_db import init_db
 # WebSocket route imports
 from app.routes.websocket import market_feed, trading_updates
 from app.services.market_streaming import personal_market_streaming
+from app.services.portfolio_valuation import get_valuation_engine
+from app.services.volume_profiles import get_volume_profile_job
 
 # Configure logging
 configure_logging(
@@ -92,6 +94,13 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Failed to start market streaming service: {str(e)}")
 
+    # Start pushing/flushing live portfolio valuations
+    get_valuation_engine().start()
+
+    # Rebuild intraday volume profiles nightly from the bar warehouse
+    if settings.BAR_WAREHOUSE_ENABLED:
+        get_volume_profile_job().start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -104,6 +113,19 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error stopping market streaming service: {str(e)}")
 
+    # Write back pending portfolio valuations
+    try:
+        await get_valuation_engine().stop()
+    except Exception as e:
+        logger.error(f"Error stopping portfolio valuation engine: {str(e)}")
+
+    # Stop the nightly volume profile job
+    if settings.BAR_WAREHOUSE_ENABLED:
+        try:
+            await get_volume_profile_job().stop()
+        except Exception as e:
+            logger.error(f"Error stopping volume profile job: {str(e)}")
+
 
 @app.get("/health")
 async def health_check():
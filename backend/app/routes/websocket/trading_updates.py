@@ -7,14 +7,10 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional, Set
 
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import sessionmaker
 
-from app.core.auth.trading_auth import TradingPermissionError
 from app.core.security import get_current_user_ws
-from app.db.database import engine
-from app.models.portfolio import Portfolio
-from app.models.trade import Trade, TradeStatus
-from app.services.trading_service import TradingService
+from app.db.database import SessionLocal
+from app.services.portfolio_valuation import get_valuation_engine
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -29,6 +25,10 @@ class TradingWebSocketManager:
         )  # user_id -> set of websockets
         self.user_portfolios: Dict[int, int] = {}  # user_id -> portfolio_id
 
+        # Portfolio updates are pushed from valuation deltas
+        self.valuation_engine = get_valuation_engine()
+        self.valuation_engine.add_listener(self.publish_valuations)
+
     async def connect(self, websocket: WebSocket, user_id: int, portfolio_id: int):
         """Connect a user's WebSocket for trading updates."""
         await websocket.accept()
@@ -53,7 +53,9 @@ class TradingWebSocketManager:
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
                 if user_id in self.user_portfolios:
-                    del self.user_portfolios[user_id]
+                    portfolio_id = self.user_portfolios.pop(user_id)
+                    if portfolio_id not in self.user_portfolios.values():
+                        self.valuation_engine.release(portfolio_id)
 
         logger.info(f"Trading WebSocket disconnected for user {user_id}")
 
@@ -89,62 +91,49 @@ class TradingWebSocketManager:
             return
 
         try:
-            Session = sessionmaker(bind=engine)
-            db = Session()
+            # Loaded from the database once, then kept current by events
+            state = self.valuation_engine.load(self.user_portfolios[user_id])
+            if state is None:
+                return
 
-            try:
-                portfolio = (
-                    db.query(Portfolio)
-                    .filter(Portfolio.id == self.user_portfolios[user_id])
-                    .first()
-                )
+            await self._send_portfolio_data(user_id, state.snapshot())
 
-                if not portfolio:
-                    return
-
-                # Update portfolio performance
-                portfolio.update_performance_metrics()
-
-                portfolio_data = {
-                    "id": portfolio.id,
-                    "total_value": float(portfolio.total_value),
-                    "cash_balance": float(portfolio.cash_balance),
-                    "invested_amount": float(portfolio.invested_amount),
-                    "daily_return": float(portfolio.daily_return),
-                    "total_return": float(portfolio.total_return),
-                    "total_return_percent": float(portfolio.total_return_percent),
-                    "last_updated": (
-                        portfolio.updated_at.isoformat()
-                        if portfolio.updated_at
-                        else None
-                    ),
-                }
-
-                message = {
-                    "type": "portfolio_update",
-                    "data": portfolio_data,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-
-                disconnected = set()
-                for websocket in self.active_connections[user_id]:
-                    try:
-                        await websocket.send_text(json.dumps(message))
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to send portfolio update to user {user_id}: {e}"
-                        )
-                        disconnected.add(websocket)
+        except Exception as e:
+            logger.error(f"Error sending portfolio update to user {user_id}: {e}")
 
-                # Clean up disconnected sockets
-                for ws in disconnected:
-                    self.active_connections[user_id].discard(ws)
+    async def publish_valuations(self, snapshots: List[Dict[str, Any]]):
+        """Push changed portfolio valuations to their connected users."""
+        users_by_portfolio: Dict[int, List[int]] = {}
+        for user_id, portfolio_id in self.user_portfolios.items():
+            users_by_portfolio.setdefault(portfolio_id, []).append(user_id)
 
-            finally:
-                db.close()
+        for snapshot in snapshots:
+            for user_id in users_by_portfolio.get(snapshot["id"], ()):
+                await self._send_portfolio_data(user_id, snapshot)
 
-        except Exception as e:
-            logger.error(f"Error sending portfolio update to user {user_id}: {e}")
+    async def _send_portfolio_data(self, user_id: int, portfolio_data: Dict):
+        if user_id not in self.active_connections:
+            return
+
+        message = {
+            "type": "portfolio_update",
+            "data": portfolio_data,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+        disconnected = set()
+        for websocket in self.active_connections[user_id]:
+            try:
+                await websocket.send_text(json.dumps(message))
+            except Exception as e:
+                logger.warning(
+                    f"Failed to send portfolio update to user {user_id}: {e}"
+                )
+                disconnected.add(websocket)
+
+        # Clean up disconnected sockets
+        for ws in disconnected:
+            self.active_connections[user_id].discard(ws)
 
     async def send_order_status_update(self, user_id: int, order_data: Dict):
         """Send order status update to user's connections."""
@@ -231,7 +220,10 @@ async def trading_updates_feed(websocket: WebSocket, token: Optional[str] = None
             "total_value": 25000.50,
             "cash_balance": 5000.00,
             "daily_return": 125.75,
-            "total_return_percent": 8.25
+            "total_return_percent": 8.25,
+            "realized_pnl": 310.00,
+            "unrealized_pnl": 1840.25,
+            "drawdown": 0.012
         },
         "timestamp": "2023-05-01T12:34:56.789Z"
     }
@@ -269,8 +261,7 @@ async def trading_updates_feed(websocket: WebSocket, token: Optional[str] = None
     user_data = None
     if token:
         try:
-            Session = sessionmaker(bind=engine)
-            db = Session()
+            db = SessionLocal()
 
             try:
                 user_data = await get_current_user_ws(token, db)
@@ -295,19 +286,13 @@ async def trading_updates_feed(websocket: WebSocket, token: Optional[str] = None
 
     user_id = user_data["id"]
 
-    # Get user's portfolio
-    Session = sessionmaker(bind=engine)
-    db = Session()
-
-    try:
-        portfolio = db.query(Portfolio).filter(Portfolio.user_id == user_id).first()
-        if not portfolio:
-            await websocket.close(code=1008, reason="No portfolio found")
-            return
+    # Get user's portfolio (loaded into the valuation engine once)
+    state = trading_ws_manager.valuation_engine.load_for_user(user_id)
+    if state is None:
+        await websocket.close(code=1008, reason="No portfolio found")
+        return
 
-        portfolio_id = portfolio.id
-    finally:
-        db.close()
+    portfolio_id = state.portfolio_id
 
     # Connect to trading manager
     try:
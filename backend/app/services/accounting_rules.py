@@ -216,21 +216,22 @@ ACCOUNTING_RULES: List[AccountingRule] = [
 # =============================================================================
 
 
+TAX_FILING_PATTERNS = [
+    r"file\s+(your|the)\s+(tax|1040|schedule)",
+    r"enter\s+(this|the)\s+amount\s+on\s+(line|form)",
+    r"report\s+(this|it)\s+on\s+(schedule|form)\s+\w+",
+    r"fill\s+out\s+(form|schedule)\s+\d+",
+    r"submit\s+(to|with)\s+the\s+irs",
+    r"mail\s+(your|the)\s+(return|form)\s+to",
+    r"e-file\s+(your|the)",
+]
+
+
 def check_no_tax_filing_instructions(
     response: AccountingResponseContext,
 ) -> tuple[bool, str]:
     """Block responses with specific tax filing instructions"""
-    filing_patterns = [
-        r"file\s+(your|the)\s+(tax|1040|schedule)",
-        r"enter\s+(this|the)\s+amount\s+on\s+(line|form)",
-        r"report\s+(this|it)\s+on\s+(schedule|form)\s+\w+",
-        r"fill\s+out\s+(form|schedule)\s+\d+",
-        r"submit\s+(to|with)\s+the\s+irs",
-        r"mail\s+(your|the)\s+(return|form)\s+to",
-        r"e-file\s+(your|the)",
-    ]
-
-    for pattern in filing_patterns:
+    for pattern in TAX_FILING_PATTERNS:
         if re.search(pattern, response.response_text.lower()):
             return False, (
                 "BLOCKED: Cannot provide specific tax filing instructions. "
@@ -241,19 +242,20 @@ def check_no_tax_filing_instructions(
     return True, ""
 
 
+TAX_CALCULATION_PATTERNS = [
+    r"your\s+tax\s+(liability|owed|due)\s+(is|will be|equals?)\s*\$?\d+",
+    r"you\s+(owe|will owe)\s+\$?\d+\s+(in|to)\s+tax",
+    r"your\s+refund\s+(is|will be)\s+\$?\d+",
+    r"total\s+tax\s*[:=]\s*\$?\d+",
+    r"tax\s+due\s*[:=]\s*\$?\d+",
+]
+
+
 def check_no_specific_tax_calculations(
     response: AccountingResponseContext,
 ) -> tuple[bool, str]:
     """Block specific tax liability calculations"""
-    calculation_patterns = [
-        r"your\s+tax\s+(liability|owed|due)\s+(is|will be|equals?)\s*\$?\d+",
-        r"you\s+(owe|will owe)\s+\$?\d+\s+(in|to)\s+tax",
-        r"your\s+refund\s+(is|will be)\s+\$?\d+",
-        r"total\s+tax\s*[:=]\s*\$?\d+",
-        r"tax\s+due\s*[:=]\s*\$?\d+",
-    ]
-
-    for pattern in calculation_patterns:
+    for pattern in TAX_CALCULATION_PATTERNS:
         if re.search(pattern, response.response_text.lower()):
             return False, (
                 "TAX PROFESSIONAL NEEDED: Specific tax calculations require a "
@@ -265,19 +267,20 @@ def check_no_specific_tax_calculations(
     return True, ""
 
 
+TAX_EVASION_PATTERNS = [
+    r"(hide|conceal)\s+(income|money|assets)",
+    r"(avoid|evade)\s+(reporting|taxes)",
+    r"(don't|do not)\s+report",
+    r"(offshore|foreign)\s+(account|shell)",
+    r"(launder|laundering)",
+    r"(under|mis)report",
+    r"cash\s+(only|basis)\s+(to avoid|so they)",
+]
+
+
 def check_no_tax_evasion(response: AccountingResponseContext) -> tuple[bool, str]:
     """Block any tax evasion assistance"""
-    evasion_patterns = [
-        r"(hide|conceal)\s+(income|money|assets)",
-        r"(avoid|evade)\s+(reporting|taxes)",
-        r"(don't|do not)\s+report",
-        r"(offshore|foreign)\s+(account|shell)",
-        r"(launder|laundering)",
-        r"(under|mis)report",
-        r"cash\s+(only|basis)\s+(to avoid|so they)",
-    ]
-
-    for pattern in evasion_patterns:
+    for pattern in TAX_EVASION_PATTERNS:
         if re.search(pattern, response.response_text.lower()):
             return False, (
                 "BLOCKED: Cannot assist with tax evasion or illegal schemes. "
@@ -288,19 +291,20 @@ def check_no_tax_evasion(response: AccountingResponseContext) -> tuple[bool, str
     return True, ""
 
 
+TAX_YEAR_TERMS = [
+    "tax bracket",
+    "standard deduction",
+    "contribution limit",
+    "tax rate",
+    "exemption",
+    "tax credit",
+    "deduction limit",
+]
+
+
 def check_tax_year_disclaimer(response: AccountingResponseContext) -> tuple[bool, str]:
     """Add disclaimer about tax information currency"""
-    tax_terms = [
-        "tax bracket",
-        "standard deduction",
-        "contribution limit",
-        "tax rate",
-        "exemption",
-        "tax credit",
-        "deduction limit",
-    ]
-
-    if any(term in response.response_text.lower() for term in tax_terms):
+    if any(term in response.response_text.lower() for term in TAX_YEAR_TERMS):
         return True, (
             "Note: Tax rules, rates, and limits change annually. "
             "Verify current figures with IRS publications or a tax professional."
@@ -340,20 +344,21 @@ def check_audit_limitation(request: AccountingRequestContext) -> tuple[bool, str
     return True, ""
 
 
+ENTITY_ADVICE_TERMS = [
+    "should form an llc",
+    "incorporate as",
+    "s-corp election",
+    "convert to",
+    "best entity type",
+    "you should be a",
+]
+
+
 def check_entity_advice_limitation(
     response: AccountingResponseContext,
 ) -> tuple[bool, str]:
     """Warn about business entity advice"""
-    entity_terms = [
-        "should form an llc",
-        "incorporate as",
-        "s-corp election",
-        "convert to",
-        "best entity type",
-        "you should be a",
-    ]
-
-    if any(term in response.response_text.lower() for term in entity_terms):
+    if any(term in response.response_text.lower() for term in ENTITY_ADVICE_TERMS):
         return True, (
             "PROFESSIONAL CONSULTATION ADVISED: Business entity decisions have "
             "significant legal and tax implications. Consult a CPA and/or attorney "
@@ -363,19 +368,20 @@ def check_entity_advice_limitation(
     return True, ""
 
 
+CATEGORIZATION_TERMS = [
+    "categorize",
+    "category",
+    "classify",
+    "should be recorded as",
+    "belongs in",
+]
+
+
 def check_categorization_disclaimer(
     response: AccountingResponseContext,
 ) -> tuple[bool, str]:
     """Add disclaimer for categorization suggestions"""
-    categorization_terms = [
-        "categorize",
-        "category",
-        "classify",
-        "should be recorded as",
-        "belongs in",
-    ]
-
-    if any(term in response.response_text.lower() for term in categorization_terms):
+    if any(term in response.response_text.lower() for term in CATEGORIZATION_TERMS):
         return True, (
             "Note: AI-suggested categories are for organizational purposes. "
             "Verify categorizations before using for tax or financial reporting."
@@ -384,20 +390,21 @@ def check_categorization_disclaimer(
     return True, ""
 
 
+PROJECTION_TERMS = [
+    "forecast",
+    "projection",
+    "estimate",
+    "predict",
+    "expected",
+    "anticipated",
+]
+
+
 def check_projection_disclaimer(
     response: AccountingResponseContext,
 ) -> tuple[bool, str]:
     """Add disclaimer for projections and forecasts"""
-    projection_terms = [
-        "forecast",
-        "projection",
-        "estimate",
-        "predict",
-        "expected",
-        "anticipated",
-    ]
-
-    if any(term in response.response_text.lower() for term in projection_terms):
+    if any(term in response.response_text.lower() for term in PROJECTION_TERMS):
         return True, (
             "Note: Projections are estimates based on current information and "
             "assumptions. Actual results will vary. Review and update regularly."
@@ -406,18 +413,19 @@ def check_projection_disclaimer(
     return True, ""
 
 
+SEPARATION_TERMS = [
+    "personal expense",
+    "business expense",
+    "mixed use",
+    "personal account",
+    "business account",
+]
+
+
 def check_separation_warning(response: AccountingResponseContext) -> tuple[bool, str]:
     """Warn about personal/business separation"""
-    separation_concerns = [
-        "personal expense",
-        "business expense",
-        "mixed use",
-        "personal account",
-        "business account",
-    ]
-
     text_lower = response.response_text.lower()
-    if any(term in text_lower for term in separation_concerns):
+    if any(term in text_lower for term in SEPARATION_TERMS):
         if "separate" not in text_lower:
             return True, (
                 "Reminder: Keep personal and business finances separate. "
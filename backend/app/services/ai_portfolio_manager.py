@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import uuid
@@ -9,7 +10,6 @@ from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 import redis
-from scipy.optimize import minimize
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
@@ -21,6 +21,12 @@ from app.models.user import User
 from app.services.market_data import MarketDataService
 from app.services.market_data_processor import MarketDataProcessor
 from app.services.neural_network import NeuralNetworkService
+from app.services.portfolio_optimization_engine import (
+    MAX_SHARPE,
+    RISK_PARITY,
+    get_optimization_engine,
+)
+from app.services.risk_engine import get_risk_engine
 
 logger = logging.getLogger(__name__)
 
@@ -185,28 +191,36 @@ class AIPortfolioManager:
             if not symbols:
                 raise ValueError("No symbols available for optimization")
 
+            # Price frames are keyed by upper-cased symbol
+            symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
             # Get historical data for optimization
             historical_data = await self._get_historical_data(
                 symbols, self.lookback_days
             )
 
-            # Calculate returns matrix
+            # Calculate returns matrix, with columns in the requested order
             returns_df = self._calculate_returns(historical_data)
+            returns_df = returns_df.reindex(
+                columns=[s for s in symbols if s in returns_df.columns]
+            )
 
             # Choose optimization method
             if method == OptimizationMethod.EFFICIENT_FRONTIER:
                 target_allocation = await self._optimize_efficient_frontier(
-                    returns_df, risk_tolerance
+                    returns_df, risk_tolerance, user_id
                 )
             elif method == OptimizationMethod.BLACK_LITTERMAN:
                 target_allocation = await self._optimize_black_litterman(
-                    returns_df, symbols
+                    returns_df, symbols, user_id
                 )
             elif method == OptimizationMethod.RISK_PARITY:
-                target_allocation = await self._optimize_risk_parity(returns_df)
+                target_allocation = await self._optimize_risk_parity(
+                    returns_df, user_id
+                )
             elif method == OptimizationMethod.ML_ENHANCED:
                 target_allocation = await self._optimize_ml_enhanced(
-                    returns_df, symbols, risk_tolerance
+                    returns_df, symbols, risk_tolerance, user_id
                 )
             else:
                 raise ValueError(f"Unknown optimization method: {method}")
@@ -290,77 +304,76 @@ class AIPortfolioManager:
             raise
 
     async def _optimize_efficient_frontier(
-        self, returns_df: pd.DataFrame, risk_tolerance: float
+        self,
+        returns_df: pd.DataFrame,
+        risk_tolerance: float,
+        user_id: Optional[int] = None,
     ) -> Dict[str, float]:
         """
         Optimize portfolio using efficient frontier (Modern Portfolio Theory).
 
         Maximizes risk-adjusted returns (Sharpe ratio) subject to constraints.
+        The max-Sharpe point is taken from the frontier shared by every user
+        on the same universe.
         """
-        returns = returns_df.mean() * 252  # Annualized returns
-        cov_matrix = returns_df.cov() * 252  # Annualized covariance
-
-        n_assets = len(returns)
-
-        # Objective function: minimize negative Sharpe ratio
-        def objective(weights):
-            portfolio_return = np.sum(returns * weights)
-            portfolio_risk = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            if portfolio_risk == 0:
-                return -np.inf
-            sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_risk
-            return -sharpe_ratio  # Minimize negative Sharpe ratio
-
-        # Constraints
-        constraints = [
-            {"type": "eq", "fun": lambda x: np.sum(x) - 1.0},  # Weights sum to 1
-        ]
-
-        # Bounds for each weight
-        bounds = tuple(
-            (self.min_allocation, self.max_allocation) for _ in range(n_assets)
+        # Building the frontier runs many SLSQP solves; keep it off the loop
+        symbols, weights = await asyncio.to_thread(
+            self._efficient_frontier_weights, returns_df, user_id
         )
-
-        # Initial guess (equal weights)
-        initial_weights = np.array([1.0 / n_assets] * n_assets)
-
-        # Optimize
-        result = minimize(
-            objective,
-            initial_weights,
-            method="SLSQP",
-            bounds=bounds,
-            constraints=constraints,
+        return self._apply_risk_tolerance(symbols, weights, risk_tolerance)
+
+    def _efficient_frontier_weights(
+        self, returns_df: pd.DataFrame, user_id: Optional[int] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Fully invested max-Sharpe weights, before any cash allocation."""
+        engine = get_optimization_engine()
+        universe = engine.model_from_returns(returns_df)
+        n_assets = len(universe.symbols)
+
+        solution = engine.max_sharpe(
+            universe, self.min_allocation, self.max_allocation, key=user_id
         )
 
-        if not result.success:
-            logger.warning(f"Efficient frontier optimization failed: {result.message}")
+        if not solution.success:
+            logger.warning(
+                f"Efficient frontier optimization failed: {solution.message}"
+            )
             # Fall back to equal weights
-            weights = initial_weights
+            weights = np.array([1.0 / n_assets] * n_assets)
         else:
-            weights = result.x
+            weights = solution.weights
+
+        return universe.symbols, weights
 
-        # Adjust for risk tolerance (0.0 = conservative, 1.0 = aggressive)
+    @staticmethod
+    def _apply_risk_tolerance(
+        symbols: List[str], weights: np.ndarray, risk_tolerance: float
+    ) -> Dict[str, float]:
+        """Adjust for risk tolerance (0.0 = conservative, 1.0 = aggressive)."""
         if risk_tolerance < 0.5:
             # Make more conservative by adding cash allocation
             cash_allocation = (0.5 - risk_tolerance) * 0.4  # Up to 20% cash
             weights = weights * (1 - cash_allocation)
             weights = np.append(weights, [cash_allocation])
-            symbols = list(returns_df.columns) + ["CASH"]
+            symbols = list(symbols) + ["CASH"]
         else:
-            symbols = list(returns_df.columns)
+            symbols = list(symbols)
 
         return dict(zip(symbols, weights))
 
     async def _optimize_black_litterman(
-        self, returns_df: pd.DataFrame, symbols: List[str]
+        self,
+        returns_df: pd.DataFrame,
+        symbols: List[str],
+        user_id: Optional[int] = None,
     ) -> Dict[str, float]:
         """
         Optimize portfolio using Black-Litterman model with ML predictions as views.
         """
         # Market equilibrium assumptions (simplified)
-        returns = returns_df.mean() * 252
-        cov_matrix = returns_df.cov() * 252
+        engine = get_optimization_engine()
+        universe = engine.model_from_returns(returns_df)
+        returns = pd.Series(universe.expected_returns, index=universe.symbols)
 
         # Get ML predictions as "views" for Black-Litterman
         ml_predictions = {}
@@ -395,94 +408,76 @@ class AIPortfolioManager:
                         symbol
                     ] + confidence_factor * ml_return * 252  # Annualize ML prediction
 
-            # Optimize with adjusted returns
-            n_assets = len(adjusted_returns)
-
-            def objective(weights):
-                portfolio_return = np.sum(adjusted_returns * weights)
-                portfolio_risk = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-                if portfolio_risk == 0:
-                    return -np.inf
-                return -(portfolio_return - self.risk_free_rate) / portfolio_risk
-
-            constraints = [{"type": "eq", "fun": lambda x: np.sum(x) - 1.0}]
-            bounds = tuple(
-                (self.min_allocation, self.max_allocation) for _ in range(n_assets)
-            )
-            initial_weights = np.array([1.0 / n_assets] * n_assets)
-
-            result = minimize(
-                objective,
-                initial_weights,
-                method="SLSQP",
-                bounds=bounds,
-                constraints=constraints,
+            # Optimize with adjusted returns, warm-started from this user's
+            # last Black-Litterman weights or the shared max-Sharpe point
+            problem = await asyncio.to_thread(
+                engine.build_problem,
+                universe,
+                MAX_SHARPE,
+                self.min_allocation,
+                self.max_allocation,
+                key=("black_litterman", user_id) if user_id is not None else None,
+                expected_returns=adjusted_returns.to_numpy(),
             )
+            solution = await asyncio.to_thread(engine.solve, problem, universe.symbols)
 
-            if result.success:
-                return dict(zip(symbols, result.x))
+            if solution.success:
+                return dict(zip(universe.symbols, solution.weights))
 
         # Fall back to efficient frontier if Black-Litterman fails
         logger.warning(
             "Black-Litterman optimization failed, falling back to efficient frontier"
         )
-        return await self._optimize_efficient_frontier(returns_df, 0.5)
+        return await self._optimize_efficient_frontier(returns_df, 0.5, user_id)
 
-    async def _optimize_risk_parity(self, returns_df: pd.DataFrame) -> Dict[str, float]:
+    async def _optimize_risk_parity(
+        self, returns_df: pd.DataFrame, user_id: Optional[int] = None
+    ) -> Dict[str, float]:
         """
         Optimize portfolio using risk parity (equal risk contribution).
         """
-        cov_matrix = returns_df.cov() * 252  # Annualized covariance
-        n_assets = len(returns_df.columns)
-
-        def objective(weights):
-            # Calculate risk contributions
-            portfolio_vol = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            marginal_contribs = np.dot(cov_matrix, weights) / portfolio_vol
-            contribs = weights * marginal_contribs
-
-            # Minimize difference from equal risk contribution
-            target_contrib = portfolio_vol / n_assets
-            return np.sum((contribs - target_contrib) ** 2)
-
-        constraints = [{"type": "eq", "fun": lambda x: np.sum(x) - 1.0}]
-        bounds = tuple(
-            (self.min_allocation, self.max_allocation) for _ in range(n_assets)
-        )
-
-        # Start with inverse volatility weights
-        vols = np.sqrt(np.diag(cov_matrix))
-        initial_weights = (1 / vols) / np.sum(1 / vols)
-
-        result = minimize(
-            objective,
-            initial_weights,
-            method="SLSQP",
-            bounds=bounds,
-            constraints=constraints,
+        engine = get_optimization_engine()
+        universe = engine.model_from_returns(returns_df)
+
+        # Starts from this user's previous weights, else inverse volatility
+        problem = engine.build_problem(
+            universe,
+            RISK_PARITY,
+            self.min_allocation,
+            self.max_allocation,
+            key=user_id,
         )
+        solution = await asyncio.to_thread(engine.solve, problem, universe.symbols)
 
-        if result.success:
-            weights = result.x
+        if solution.success:
+            weights = solution.weights
         else:
             logger.warning(
                 "Risk parity optimization failed, using inverse volatility weights"
             )
-            weights = initial_weights
+            vols = np.sqrt(np.diag(universe.covariance))
+            weights = (1 / vols) / np.sum(1 / vols)
 
-        return dict(zip(returns_df.columns, weights))
+        return dict(zip(universe.symbols, weights))
 
     async def _optimize_ml_enhanced(
-        self, returns_df: pd.DataFrame, symbols: List[str], risk_tolerance: float
+        self,
+        returns_df: pd.DataFrame,
+        symbols: List[str],
+        risk_tolerance: float,
+        user_id: Optional[int] = None,
     ) -> Dict[str, float]:
         """
         ML-enhanced optimization combining multiple approaches.
         """
-        # Get multiple optimization results
-        efficient_frontier = await self._optimize_efficient_frontier(
-            returns_df, risk_tolerance
+        # Get multiple optimization results. Both are fully invested; the cash
+        # allocation for the risk tolerance is applied once to the blend, as
+        # in the efficient frontier method
+        ef_symbols, ef_weights = await asyncio.to_thread(
+            self._efficient_frontier_weights, returns_df, user_id
         )
-        risk_parity = await self._optimize_risk_parity(returns_df)
+        efficient_frontier = dict(zip(ef_symbols, ef_weights))
+        risk_parity = await self._optimize_risk_parity(returns_df, user_id)
 
         # Get ML confidence scores for each symbol
         ml_scores = {}
@@ -523,7 +518,11 @@ class AIPortfolioManager:
                 k: v / total_weight for k, v in blended_allocation.items()
             }
 
-        return blended_allocation
+        return self._apply_risk_tolerance(
+            list(blended_allocation),
+            np.array(list(blended_allocation.values()), dtype=float),
+            risk_tolerance,
+        )
 
     def _calculate_returns(
         self, historical_data: Dict[str, pd.DataFrame]
@@ -608,9 +607,11 @@ class AIPortfolioManager:
 
         for holding in current_holdings:
             if total_value > 0:
-                current_allocation[holding.symbol] = holding.market_value / total_value
+                current_allocation[holding.symbol.upper()] = (
+                    holding.market_value / total_value
+                )
             else:
-                current_allocation[holding.symbol] = 0
+                current_allocation[holding.symbol.upper()] = 0
 
         # Calculate required trades
         for symbol, target_weight in target_allocation.items():
@@ -684,25 +685,13 @@ class AIPortfolioManager:
         self, symbols: List[str], lookback_days: int
     ) -> Dict[str, pd.DataFrame]:
         """Get historical data for all symbols."""
-        historical_data = {}
-
-        for symbol in symbols:
-            try:
-                data = await self.market_data_service.get_historical_data(
-                    symbol, timeframe="1day", limit=lookback_days
-                )
-
-                if data:
-                    df = pd.DataFrame(data)
-                    if not df.empty and "timestamp" in df.columns:
-                        df["timestamp"] = pd.to_datetime(df["timestamp"])
-                        df.set_index("timestamp", inplace=True)
-                        historical_data[symbol] = df
-
-            except Exception as e:
-                logger.warning(f"Failed to get historical data for {symbol}: {e}")
-
-        return historical_data
+        # Served from the shared risk engine cache, which fetches symbols
+        # concurrently and only refreshes the missing tail once per day
+        try:
+            return await get_risk_engine().get_price_frames(symbols, lookback_days)
+        except Exception as e:
+            logger.warning(f"Failed to get historical data for {symbols}: {e}")
+            return {}
 
     async def get_market_timing_signal(self, symbol: str) -> MarketTimingResult:
         """
@@ -895,7 +884,8 @@ class AIPortfolioManager:
         Schedule recurring portfolio optimization.
 
         This would typically integrate with a task queue system like Celery.
-        For now, we'll just log the scheduling request.
+        For now, we'll just log the scheduling request; the recurring job
+        itself should call run_scheduled_optimizations for all due users.
         """
         try:
             # Check minimum rebalance interval
@@ -930,6 +920,115 @@ class AIPortfolioManager:
             )
             return False
 
+    async def run_scheduled_optimizations(
+        self,
+        user_ids: List[int],
+        method: OptimizationMethod = OptimizationMethod.EFFICIENT_FRONTIER,
+        risk_tolerance: float = 0.5,
+    ) -> Dict[int, Dict[str, float]]:
+        """
+        Re-optimize many users' portfolios in one batch.
+
+        Users are grouped by symbol universe: each universe's returns model
+        and frontier are built once, and the remaining solves run on the
+        optimization engine's process pool, warm-started from the previous
+        run's weights. Only efficient frontier and risk parity are batched;
+        other methods need per-user ML views and go through
+        optimize_portfolio.
+
+        Returns:
+            Mapping of user ID to target allocation
+        """
+        if method not in (
+            OptimizationMethod.EFFICIENT_FRONTIER,
+            OptimizationMethod.RISK_PARITY,
+        ):
+            raise ValueError(f"Batch optimization does not support {method}")
+
+        portfolios = (
+            self.db.query(Portfolio).filter(Portfolio.owner_id.in_(user_ids)).all()
+        )
+        owner_by_portfolio = {p.id: p.owner_id for p in portfolios}
+        holdings = (
+            self.db.query(Holding)
+            .filter(
+                Holding.portfolio_id.in_(list(owner_by_portfolio)),
+                Holding.quantity > 0,
+            )
+            .all()
+            if owner_by_portfolio
+            else []
+        )
+
+        symbols_by_user: Dict[int, set] = {}
+        for holding in holdings:
+            owner = owner_by_portfolio[holding.portfolio_id]
+            symbols_by_user.setdefault(owner, set()).add(holding.symbol.upper())
+
+        users_by_universe: Dict[Tuple[str, ...], List[int]] = {}
+        for user_id, symbols in symbols_by_user.items():
+            users_by_universe.setdefault(tuple(sorted(symbols)), []).append(user_id)
+
+        engine = get_optimization_engine()
+        models = await asyncio.gather(
+            *(
+                engine.get_universe_model(universe, self.lookback_days)
+                for universe in users_by_universe
+            )
+        )
+
+        allocations: Dict[int, Dict[str, float]] = {}
+        problems, groups = [], []
+        for users, universe in zip(users_by_universe.values(), models):
+            if universe is None:
+                logger.warning(f"Insufficient data to optimize users {users}")
+                continue
+            if method == OptimizationMethod.EFFICIENT_FRONTIER:
+                # Frontier construction is CPU-bound: run it in a worker thread
+                solution = await asyncio.to_thread(
+                    engine.max_sharpe,
+                    universe,
+                    self.min_allocation,
+                    self.max_allocation,
+                )
+                if solution.success:
+                    for user_id in users:
+                        allocations[user_id] = self._apply_risk_tolerance(
+                            universe.symbols, solution.weights, risk_tolerance
+                        )
+                continue
+            # Every user on a universe shares the answer: solve once per
+            # universe, warm-started from the first user's last weights
+            problems.append(
+                engine.build_problem(
+                    universe,
+                    RISK_PARITY,
+                    self.min_allocation,
+                    self.max_allocation,
+                    key=users[0],
+                )
+            )
+            groups.append((users, universe))
+
+        if problems:
+            loop = asyncio.get_running_loop()
+            solutions = await loop.run_in_executor(None, engine.solve_many, problems)
+            for (users, universe), solution in zip(groups, solutions):
+                if not solution.success:
+                    logger.warning(f"Risk parity failed for users {users}")
+                    continue
+                for user_id in users:
+                    engine.remember(
+                        user_id, RISK_PARITY, universe.symbols, solution.weights
+                    )
+                    allocations[user_id] = dict(zip(universe.symbols, solution.weights))
+
+        logger.info(
+            f"Batch optimization completed for {len(allocations)} of "
+            f"{len(user_ids)} users across {len(users_by_universe)} universes"
+        )
+        return allocations
+
     async def execute_ai_rebalance(
         self,
         user_id: int,
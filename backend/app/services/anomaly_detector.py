@@ -9,7 +9,7 @@ import json
 import logging
 import time
 from collections import defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
@@ -20,9 +20,23 @@ from app.core.config import settings
 from app.core.exception_handlers import ServiceError, handle_errors
 from app.core.metrics import metrics
 from app.core.redis_service import redis_service
+from app.services.anomaly_streams import (
+    AnomalyHistoryStore,
+    EWMADetector,
+    RobustDetector,
+    ratio_to_previous,
+    rolling_std,
+    row_zscores,
+    simple_returns,
+    stack_series,
+    to_epoch,
+)
 
 logger = logging.getLogger(__name__)
 
+# Redis key prefix for anomaly history buckets
+HISTORY_KEY = "anomaly_detector:history"
+
 
 class AnomalyError(ServiceError):
     """Exception for anomaly detection related errors."""
@@ -93,6 +107,9 @@ class AnomalyDetector:
             "adaptive_thresholds": True,  # Use adaptive thresholds based on history
             "use_seasonal_adjustment": True,  # Adjust for time-of-day patterns
             "anomaly_cooldown_minutes": 30,  # Minimum time between similar anomalies
+            "history_bucket_seconds": 300,  # Width of anomaly history buckets
+            "history_retention_seconds": 86400,  # Anomaly history kept for 1 day
+            "stream_alpha": 0.05,  # EWMA weight for streaming market scans
         }
 
         # Override defaults with provided config
@@ -110,7 +127,20 @@ class AnomalyDetector:
         self.config = self.default_config
 
         # Initialize anomaly history
-        self._recent_anomalies = defaultdict(list)
+        self._history = AnomalyHistoryStore(
+            bucket_seconds=self.config["history_bucket_seconds"],
+            retention_seconds=self.config["history_retention_seconds"],
+        )
+
+        # Streaming state for market-wide scans, one slot per symbol
+        self._stream_symbols: List[str] = []
+        self._stream_index: Dict[str, int] = {}
+        self._stream_last_price = np.zeros(0)
+        self._price_ewma = EWMADetector(
+            alpha=self.config["stream_alpha"],
+            warmup=self.config["min_history_points"],
+        )
+        self._price_robust = RobustDetector(warmup=self.config["min_history_points"])
 
         # Load saved anomaly history from Redis
         self._load_anomaly_history()
@@ -118,38 +148,37 @@ class AnomalyDetector:
         logger.info("Anomaly detector initialized")
 
     def _load_anomaly_history(self):
-        """Load anomaly detection history from Redis."""
+        """Load anomaly detection history buckets from Redis."""
         try:
-            history = redis_service.get("anomaly_detector:history")
-            if history and isinstance(history, dict):
-                for key, anomalies in history.items():
-                    self._recent_anomalies[key] = anomalies
-
-            logger.debug(
-                f"Loaded anomaly history with {sum(len(v) for v in self._recent_anomalies.values())} entries"
-            )
+            # History saved as a single dict by earlier versions
+            legacy = redis_service.get(HISTORY_KEY)
+            if legacy and isinstance(legacy, dict):
+                for anomalies in legacy.values():
+                    self._history.load_bucket(anomalies)
+
+            for bucket in self._history.bucket_ids():
+                records = redis_service.get(f"{HISTORY_KEY}:{bucket}")
+                if records and isinstance(records, list):
+                    self._history.load_bucket(records)
+
+            logger.debug(f"Loaded anomaly history with {len(self._history)} entries")
         except Exception as e:
             logger.warning(f"Failed to load anomaly history: {e}")
 
     def _save_anomaly_history(self):
-        """Save anomaly detection history to Redis."""
+        """Persist changed history buckets to Redis.
+
+        Expired buckets are dropped whole and only buckets that received new
+        anomalies since the last save are written.
+        """
         try:
-            # Clean up old anomalies
-            cutoff_time = datetime.utcnow() - timedelta(days=1)
-            for key in self._recent_anomalies:
-                self._recent_anomalies[key] = [
-                    a
-                    for a in self._recent_anomalies[key]
-                    if a.get("timestamp")
-                    and datetime.fromisoformat(a["timestamp"]) > cutoff_time
-                ]
-
-            # Save to Redis
-            redis_service.set(
-                "anomaly_detector:history",
-                dict(self._recent_anomalies),
-                ttl=86400,  # 1 day
-            )
+            self._history.expire()
+            for bucket, records in self._history.take_dirty().items():
+                redis_service.set(
+                    f"{HISTORY_KEY}:{bucket}",
+                    records,
+                    ttl=self.config["history_retention_seconds"],
+                )
         except Exception as e:
             logger.warning(f"Failed to save anomaly history: {e}")
 
@@ -163,23 +192,18 @@ class AnomalyDetector:
         Returns:
             True if a similar anomaly was recently detected (in cooldown)
         """
-        key = f"{entity_id}:{anomaly_type}"
-        cooldown_minutes = self.config["anomaly_cooldown_minutes"]
+        last_seen = self._history.last_seen(f"{entity_id}:{anomaly_type}")
+        if last_seen is None:
+            return False
+        minutes_since = (time.time() - last_seen) / 60
+        return minutes_since < self.config["anomaly_cooldown_minutes"]
 
-        for anomaly in self._recent_anomalies.get(key, []):
-            if "timestamp" in anomaly:
-                detected_time = datetime.fromisoformat(anomaly["timestamp"])
-                time_since = (datetime.utcnow() - detected_time).total_seconds() / 60
-                if time_since < cooldown_minutes:
-                    return True
-
-        return False
-
-    def _record_anomaly(self, anomaly: Dict[str, Any]):
+    def _record_anomaly(self, anomaly: Dict[str, Any], save: bool = True):
         """Record a detected anomaly in history.
 
         Args:
             anomaly: Anomaly information dictionary
+            save: Persist history now; batch detectors save once at the end
         """
         if "entity_id" not in anomaly or "type" not in anomaly:
             logger.warning("Cannot record anomaly without entity_id and type")
@@ -192,14 +216,146 @@ class AnomalyDetector:
             anomaly["timestamp"] = datetime.utcnow().isoformat()
 
         # Add to history
-        self._recent_anomalies[key].append(anomaly)
-
-        # Limit history size
-        if len(self._recent_anomalies[key]) > 20:
-            self._recent_anomalies[key] = self._recent_anomalies[key][-20:]
+        self._history.append(key, anomaly)
 
         # Save history
-        self._save_anomaly_history()
+        if save:
+            self._save_anomaly_history()
+
+    def _sensitivity_factor(self, sensitivity: Optional[float]) -> float:
+        """Multiplier applied to configured thresholds for a sensitivity."""
+        return 2 - (sensitivity or self.config["detection_sensitivity"])
+
+    @staticmethod
+    def _group_by_length(
+        series: Dict[str, List[float]], min_length: int
+    ) -> Dict[int, List[str]]:
+        """Group symbols whose series have the same length, skipping short ones."""
+        groups: Dict[int, List[str]] = defaultdict(list)
+        for symbol, values in series.items():
+            if len(values) >= min_length:
+                groups[len(values)].append(symbol)
+        return groups
+
+    # =========================================================================
+    # PRICE ANOMALIES
+    # =========================================================================
+
+    @staticmethod
+    def _price_candidates(
+        returns: np.ndarray,
+        zscores: np.ndarray,
+        z_threshold: float,
+        price_threshold: float,
+    ) -> np.ndarray:
+        """Mask of points whose return or z-score exceeds its threshold."""
+        candidates = (np.abs(returns) > price_threshold) | (
+            np.abs(zscores) > z_threshold
+        )
+        candidates[..., 0] = False
+        return candidates
+
+    def _report_price_anomaly(
+        self,
+        symbol: str,
+        price: float,
+        previous_price: float,
+        change: float,
+        zscore: float,
+        timestamp: Union[str, datetime],
+        z_threshold: float,
+        price_threshold: float,
+        save: bool = True,
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """Build, record and alert on one price anomaly."""
+        price_change = abs(change)
+        abs_zscore = abs(zscore)
+        anomaly_type = AnomalyType.PRICE_SPIKE if change > 0 else AnomalyType.PRICE_DROP
+
+        severity = AnomalySeverity.INFO
+        if abs_zscore > z_threshold * 1.5 or price_change > price_threshold * 1.5:
+            severity = AnomalySeverity.WARNING
+        if abs_zscore > z_threshold * 2 or price_change > price_threshold * 2:
+            severity = AnomalySeverity.CRITICAL
+
+        # Create anomaly entry
+        anomaly = {
+            "entity_id": symbol,
+            "type": anomaly_type,
+            "severity": severity,
+            "timestamp": timestamp,
+            "value": price,
+            "previous_value": previous_price,
+            "change": change,
+            "zscore": zscore,
+            "threshold": {
+                "zscore": z_threshold,
+                "price_change": price_threshold,
+            },
+            **extra,
+        }
+
+        # Record this anomaly
+        self._record_anomaly(anomaly, save=save)
+
+        # Send alert for significant anomalies
+        if severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
+            alert_level = (
+                "warning" if severity == AnomalySeverity.WARNING else "critical"
+            )
+            direction = (
+                "increase" if anomaly_type == AnomalyType.PRICE_SPIKE else "decrease"
+            )
+
+            alert_manager.send_alert(
+                f"Abnormal {symbol} price {direction}",
+                f"{symbol} price {direction}d by {price_change*100:.1f}% (Z-score: {abs_zscore:.2f})",
+                level=alert_level,
+                data=anomaly,
+            )
+
+        return anomaly
+
+    def _emit_price_anomalies(
+        self,
+        symbol: str,
+        prices: List[float],
+        returns: np.ndarray,
+        zscores: np.ndarray,
+        candidates: np.ndarray,
+        timestamps: Optional[List[Union[str, datetime]]],
+        z_threshold: float,
+        price_threshold: float,
+        save: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Report the candidate points of one symbol, honouring cooldowns."""
+        anomalies = []
+        for i in np.flatnonzero(candidates):
+            # Skip if in cooldown period
+            if self._check_cooldown(
+                symbol, AnomalyType.PRICE_SPIKE
+            ) or self._check_cooldown(symbol, AnomalyType.PRICE_DROP):
+                continue
+
+            anomalies.append(
+                self._report_price_anomaly(
+                    symbol,
+                    prices[i],
+                    prices[i - 1],
+                    float(returns[i]),
+                    float(zscores[i]),
+                    (
+                        timestamps[i]
+                        if timestamps and i < len(timestamps)
+                        else datetime.utcnow().isoformat()
+                    ),
+                    z_threshold,
+                    price_threshold,
+                    save=save,
+                )
+            )
+        return anomalies
 
     @handle_errors()
     def detect_price_anomalies(
@@ -231,111 +387,290 @@ class AnomalyDetector:
             logger.debug(f"Not enough data points for {symbol} price anomaly detection")
             return []
 
-        # Use provided sensitivity or config default
-        sensitivity = sensitivity or self.config["detection_sensitivity"]
-
         # Adjust thresholds based on sensitivity
-        z_threshold = self.config["zscore_threshold"] * (2 - sensitivity)
-        price_threshold = self.config["price_change_threshold"] * (2 - sensitivity)
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        price_threshold = self.config["price_change_threshold"] * factor
 
-        # Calculate statistics
         try:
-            # Calculate returns
-            returns = [0.0]
-            for i in range(1, len(prices)):
-                if prices[i - 1] > 0:
-                    returns.append((prices[i] - prices[i - 1]) / prices[i - 1])
-                else:
-                    returns.append(0.0)
+            returns = simple_returns(stack_series([prices]))
+            zscores, _ = row_zscores(returns)
+            candidates = self._price_candidates(
+                returns, zscores, z_threshold, price_threshold
+            )
+            return self._emit_price_anomalies(
+                symbol,
+                prices,
+                returns[0],
+                zscores[0],
+                candidates[0],
+                timestamps,
+                z_threshold,
+                price_threshold,
+            )
 
-            # Calculate Z-scores
-            mean_return = np.mean(returns)
-            std_return = np.std(returns) or 0.001  # Avoid division by zero
-            zscores = [(r - mean_return) / std_return for r in returns]
+        except Exception as e:
+            logger.error(f"Error detecting price anomalies for {symbol}: {e}")
+            raise AnomalyError(
+                f"Price anomaly detection failed: {e}", detector_type="price"
+            )
 
-            # Look for anomalies
-            anomalies = []
+    @handle_errors()
+    def detect_price_anomalies_batch(
+        self,
+        prices: Dict[str, List[float]],
+        timestamps: Optional[Dict[str, List[Union[str, datetime]]]] = None,
+        sensitivity: Optional[float] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Detect price anomalies for many symbols at once.
 
-            for i in range(1, len(prices)):
-                price_change = abs(returns[i])
-                zscore = abs(zscores[i])
+        Symbols with series of equal length are stacked into one array so
+        returns and z-scores are computed for all of them together. Results
+        match calling detect_price_anomalies per symbol.
 
-                # Skip if in cooldown period
-                if self._check_cooldown(
-                    symbol, AnomalyType.PRICE_SPIKE
-                ) or self._check_cooldown(symbol, AnomalyType.PRICE_DROP):
-                    continue
+        Args:
+            prices: Price series by symbol
+            timestamps: Optional timestamp lists by symbol
+            sensitivity: Override for detection sensitivity (0.0-1.0)
+
+        Returns:
+            Detected anomalies by symbol (symbols without anomalies omitted)
+
+        Raises:
+            AnomalyError: If detection fails
+        """
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        price_threshold = self.config["price_change_threshold"] * factor
+        timestamps = timestamps or {}
+        results: Dict[str, List[Dict[str, Any]]] = {}
 
-                # Detect significant price changes
-                if price_change > price_threshold or zscore > z_threshold:
-                    # Determine anomaly type and severity
-                    anomaly_type = (
-                        AnomalyType.PRICE_SPIKE
-                        if returns[i] > 0
-                        else AnomalyType.PRICE_DROP
+        try:
+            groups = self._group_by_length(prices, self.config["min_history_points"])
+            for symbols in groups.values():
+                returns = simple_returns(stack_series([prices[s] for s in symbols]))
+                zscores, _ = row_zscores(returns)
+                candidates = self._price_candidates(
+                    returns, zscores, z_threshold, price_threshold
+                )
+                for row in np.flatnonzero(candidates.any(axis=1)):
+                    symbol = symbols[row]
+                    anomalies = self._emit_price_anomalies(
+                        symbol,
+                        prices[symbol],
+                        returns[row],
+                        zscores[row],
+                        candidates[row],
+                        timestamps.get(symbol),
+                        z_threshold,
+                        price_threshold,
+                        save=False,
                     )
+                    if anomalies:
+                        results[symbol] = anomalies
+            return results
 
-                    severity = AnomalySeverity.INFO
-                    if (
-                        zscore > z_threshold * 1.5
-                        or price_change > price_threshold * 1.5
-                    ):
-                        severity = AnomalySeverity.WARNING
-                    if zscore > z_threshold * 2 or price_change > price_threshold * 2:
-                        severity = AnomalySeverity.CRITICAL
+        except Exception as e:
+            logger.error(f"Error detecting batch price anomalies: {e}")
+            raise AnomalyError(
+                f"Batch price anomaly detection failed: {e}", detector_type="price"
+            )
 
-                    # Create anomaly entry
-                    anomaly = {
-                        "entity_id": symbol,
-                        "type": anomaly_type,
-                        "severity": severity,
-                        "timestamp": (
-                            timestamps[i]
-                            if timestamps and i < len(timestamps)
-                            else datetime.utcnow().isoformat()
-                        ),
-                        "value": prices[i],
-                        "previous_value": prices[i - 1],
-                        "change": returns[i],
-                        "zscore": zscores[i],
-                        "threshold": {
-                            "zscore": z_threshold,
-                            "price_change": price_threshold,
-                        },
-                    }
+        finally:
+            self._save_anomaly_history()
 
-                    anomalies.append(anomaly)
+    @handle_errors()
+    def scan_market_tick(
+        self,
+        prices: Dict[str, float],
+        timestamp: Optional[Union[str, datetime]] = None,
+        sensitivity: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Score the latest price of many symbols against streaming statistics.
 
-                    # Record this anomaly
-                    self._record_anomaly(anomaly)
+        Each symbol's return since its previous tick is scored against an
+        EWMA mean/variance and a robust median/MAD of its earlier returns;
+        both update in O(1) per symbol, so no price history is kept. A
+        symbol is flagged when its return exceeds the price-change
+        threshold, or when both the EWMA and robust z-scores exceed the
+        z-score threshold, once it has min_history_points returns.
 
-                    # Send alert for significant anomalies
-                    if severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
-                        alert_level = (
-                            "warning"
-                            if severity == AnomalySeverity.WARNING
-                            else "critical"
-                        )
-                        direction = (
-                            "increase"
-                            if anomaly_type == AnomalyType.PRICE_SPIKE
-                            else "decrease"
-                        )
+        Args:
+            prices: Latest price by symbol
+            timestamp: Time of the tick (defaults to now)
+            sensitivity: Override for detection sensitivity (0.0-1.0)
 
-                        alert_manager.send_alert(
-                            f"Abnormal {symbol} price {direction}",
-                            f"{symbol} price {direction}d by {price_change*100:.1f}% (Z-score: {zscore:.2f})",
-                            level=alert_level,
-                            data=anomaly,
-                        )
+        Returns:
+            Detected anomalies
 
+        Raises:
+            AnomalyError: If detection fails
+        """
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        price_threshold = self.config["price_change_threshold"] * factor
+        timestamp = timestamp or datetime.utcnow().isoformat()
+
+        try:
+            for symbol in prices:
+                if symbol not in self._stream_index:
+                    self._stream_index[symbol] = len(self._stream_symbols)
+                    self._stream_symbols.append(symbol)
+            size = len(self._stream_symbols)
+            if len(self._stream_last_price) < size:
+                extra = size - len(self._stream_last_price)
+                self._stream_last_price = np.concatenate(
+                    [self._stream_last_price, np.full(extra, np.nan)]
+                )
+                self._price_ewma.resize(size)
+                self._price_robust.resize(size)
+
+            current = np.full(size, np.nan)
+            current[[self._stream_index[s] for s in prices]] = list(prices.values())
+            previous = self._stream_last_price
+            ticked = ~np.isnan(current)
+            has_previous = ticked & (np.nan_to_num(previous) > 0)
+
+            returns = np.where(
+                has_previous,
+                (current - previous) / np.where(has_previous, previous, 1.0),
+                0.0,
+            )
+            ewma_z = self._price_ewma.update(returns, has_previous)
+            robust_z = self._price_robust.update(returns, has_previous)
+            self._stream_last_price = np.where(ticked, current, previous)
+
+            scored = ~np.isnan(ewma_z)
+            flagged = scored & (
+                (np.abs(returns) > price_threshold)
+                | (
+                    (np.abs(np.nan_to_num(ewma_z)) > z_threshold)
+                    & (np.abs(np.nan_to_num(robust_z)) > z_threshold)
+                )
+            )
+
+            anomalies = []
+            for i in np.flatnonzero(flagged):
+                symbol = self._stream_symbols[i]
+                if self._check_cooldown(
+                    symbol, AnomalyType.PRICE_SPIKE
+                ) or self._check_cooldown(symbol, AnomalyType.PRICE_DROP):
+                    continue
+                anomalies.append(
+                    self._report_price_anomaly(
+                        symbol,
+                        prices[symbol],
+                        float(previous[i]),
+                        float(returns[i]),
+                        float(ewma_z[i]),
+                        timestamp,
+                        z_threshold,
+                        price_threshold,
+                        save=False,
+                        robust_zscore=float(robust_z[i]),
+                        detector="streaming",
+                    )
+                )
             return anomalies
 
         except Exception as e:
-            logger.error(f"Error detecting price anomalies for {symbol}: {e}")
-            raise AnomalyError(
-                f"Price anomaly detection failed: {e}", detector_type="price"
-            )
+            logger.error(f"Error scanning market tick: {e}")
+            raise AnomalyError(f"Market scan failed: {e}", detector_type="price")
+
+        finally:
+            self._save_anomaly_history()
+
+    # =========================================================================
+    # VOLUME ANOMALIES
+    # =========================================================================
+
+    @staticmethod
+    def _volume_stats(
+        volumes: np.ndarray, z_threshold: float, volume_threshold: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Volume change factors, their log z-scores and the candidate mask."""
+        volume_changes = ratio_to_previous(volumes, first=0.0, fallback=1.0)
+
+        # Log-transform to handle multiplicative changes better
+        log_changes = np.log(np.maximum(volume_changes, 0.1))
+        zscores, _ = row_zscores(log_changes)
+
+        # Focus on increases, skipping points after a zero volume
+        candidates = (volume_changes > volume_threshold) & (
+            np.abs(zscores) > z_threshold
+        )
+        candidates[:, 1:] &= volumes[:, :-1] != 0
+        candidates[:, 0] = False
+        return volume_changes, zscores, candidates
+
+    def _emit_volume_anomalies(
+        self,
+        symbol: str,
+        volumes: List[float],
+        volume_changes: np.ndarray,
+        zscores: np.ndarray,
+        candidates: np.ndarray,
+        timestamps: Optional[List[Union[str, datetime]]],
+        z_threshold: float,
+        volume_threshold: float,
+        save: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Report the candidate points of one symbol, honouring cooldowns."""
+        anomalies = []
+        for i in np.flatnonzero(candidates):
+            # Skip if in cooldown period
+            if self._check_cooldown(symbol, AnomalyType.VOLUME_SPIKE):
+                continue
+
+            volume_change = float(volume_changes[i])
+            zscore = abs(float(zscores[i]))
+
+            # Determine severity
+            severity = AnomalySeverity.INFO
+            if zscore > z_threshold * 1.5 or volume_change > volume_threshold * 1.5:
+                severity = AnomalySeverity.WARNING
+            if zscore > z_threshold * 2 or volume_change > volume_threshold * 2:
+                severity = AnomalySeverity.CRITICAL
+
+            # Create anomaly entry
+            anomaly = {
+                "entity_id": symbol,
+                "type": AnomalyType.VOLUME_SPIKE,
+                "severity": severity,
+                "timestamp": (
+                    timestamps[i]
+                    if timestamps and i < len(timestamps)
+                    else datetime.utcnow().isoformat()
+                ),
+                "value": volumes[i],
+                "previous_value": volumes[i - 1],
+                "change_factor": volume_change,
+                "zscore": float(zscores[i]),
+                "threshold": {
+                    "zscore": z_threshold,
+                    "volume_change": volume_threshold,
+                },
+            }
+
+            anomalies.append(anomaly)
+
+            # Record this anomaly
+            self._record_anomaly(anomaly, save=save)
+
+            # Send alert for significant anomalies
+            if severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
+                alert_level = (
+                    "warning" if severity == AnomalySeverity.WARNING else "critical"
+                )
+
+                alert_manager.send_alert(
+                    f"Abnormal {symbol} volume spike",
+                    f"{symbol} volume increased by {(volume_change-1)*100:.1f}% (Z-score: {zscore:.2f})",
+                    level=alert_level,
+                    data=anomaly,
+                )
+
+        return anomalies
 
     @handle_errors()
     def detect_volume_anomalies(
@@ -369,102 +704,194 @@ class AnomalyDetector:
             )
             return []
 
-        # Use provided sensitivity or config default
-        sensitivity = sensitivity or self.config["detection_sensitivity"]
-
         # Adjust thresholds based on sensitivity
-        z_threshold = self.config["zscore_threshold"] * (2 - sensitivity)
-        volume_threshold = self.config["volume_change_threshold"] * (2 - sensitivity)
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        volume_threshold = self.config["volume_change_threshold"] * factor
 
         try:
-            # Calculate volume changes
-            volume_changes = [0.0]
-            for i in range(1, len(volumes)):
-                if volumes[i - 1] > 0:
-                    volume_changes.append(volumes[i] / volumes[i - 1])
-                else:
-                    volume_changes.append(1.0)
-
-            # Calculate statistics (log-transform to handle multiplicative changes better)
-            log_changes = [np.log(max(vc, 0.1)) for vc in volume_changes]
-            mean_log_change = np.mean(log_changes)
-            std_log_change = np.std(log_changes) or 0.001  # Avoid division by zero
-            zscores = [(lc - mean_log_change) / std_log_change for lc in log_changes]
-
-            # Look for anomalies
-            anomalies = []
-
-            for i in range(1, len(volumes)):
-                if volumes[i - 1] == 0:
-                    continue  # Skip if previous volume was zero
-
-                volume_change = volume_changes[i]
-                zscore = abs(zscores[i])
-
-                # Skip if in cooldown period
-                if self._check_cooldown(symbol, AnomalyType.VOLUME_SPIKE):
-                    continue
-
-                # Detect significant volume changes (focus on increases)
-                if volume_change > volume_threshold and zscore > z_threshold:
-                    # Determine severity
-                    severity = AnomalySeverity.INFO
-                    if (
-                        zscore > z_threshold * 1.5
-                        or volume_change > volume_threshold * 1.5
-                    ):
-                        severity = AnomalySeverity.WARNING
-                    if zscore > z_threshold * 2 or volume_change > volume_threshold * 2:
-                        severity = AnomalySeverity.CRITICAL
+            volume_changes, zscores, candidates = self._volume_stats(
+                stack_series([volumes]), z_threshold, volume_threshold
+            )
+            return self._emit_volume_anomalies(
+                symbol,
+                volumes,
+                volume_changes[0],
+                zscores[0],
+                candidates[0],
+                timestamps,
+                z_threshold,
+                volume_threshold,
+            )
 
-                    # Create anomaly entry
-                    anomaly = {
-                        "entity_id": symbol,
-                        "type": AnomalyType.VOLUME_SPIKE,
-                        "severity": severity,
-                        "timestamp": (
-                            timestamps[i]
-                            if timestamps and i < len(timestamps)
-                            else datetime.utcnow().isoformat()
-                        ),
-                        "value": volumes[i],
-                        "previous_value": volumes[i - 1],
-                        "change_factor": volume_change,
-                        "zscore": zscores[i],
-                        "threshold": {
-                            "zscore": z_threshold,
-                            "volume_change": volume_threshold,
-                        },
-                    }
+        except Exception as e:
+            logger.error(f"Error detecting volume anomalies for {symbol}: {e}")
+            raise AnomalyError(
+                f"Volume anomaly detection failed: {e}", detector_type="volume"
+            )
 
-                    anomalies.append(anomaly)
+    @handle_errors()
+    def detect_volume_anomalies_batch(
+        self,
+        volumes: Dict[str, List[float]],
+        timestamps: Optional[Dict[str, List[Union[str, datetime]]]] = None,
+        sensitivity: Optional[float] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Detect volume anomalies for many symbols at once.
 
-                    # Record this anomaly
-                    self._record_anomaly(anomaly)
+        Args:
+            volumes: Volume series by symbol
+            timestamps: Optional timestamp lists by symbol
+            sensitivity: Override for detection sensitivity (0.0-1.0)
 
-                    # Send alert for significant anomalies
-                    if severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
-                        alert_level = (
-                            "warning"
-                            if severity == AnomalySeverity.WARNING
-                            else "critical"
-                        )
+        Returns:
+            Detected anomalies by symbol (symbols without anomalies omitted)
 
-                        alert_manager.send_alert(
-                            f"Abnormal {symbol} volume spike",
-                            f"{symbol} volume increased by {(volume_change-1)*100:.1f}% (Z-score: {zscore:.2f})",
-                            level=alert_level,
-                            data=anomaly,
-                        )
+        Raises:
+            AnomalyError: If detection fails
+        """
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        volume_threshold = self.config["volume_change_threshold"] * factor
+        timestamps = timestamps or {}
+        results: Dict[str, List[Dict[str, Any]]] = {}
 
-            return anomalies
+        try:
+            groups = self._group_by_length(volumes, self.config["min_history_points"])
+            for symbols in groups.values():
+                volume_changes, zscores, candidates = self._volume_stats(
+                    stack_series([volumes[s] for s in symbols]),
+                    z_threshold,
+                    volume_threshold,
+                )
+                for row in np.flatnonzero(candidates.any(axis=1)):
+                    symbol = symbols[row]
+                    anomalies = self._emit_volume_anomalies(
+                        symbol,
+                        volumes[symbol],
+                        volume_changes[row],
+                        zscores[row],
+                        candidates[row],
+                        timestamps.get(symbol),
+                        z_threshold,
+                        volume_threshold,
+                        save=False,
+                    )
+                    if anomalies:
+                        results[symbol] = anomalies
+            return results
 
         except Exception as e:
-            logger.error(f"Error detecting volume anomalies for {symbol}: {e}")
+            logger.error(f"Error detecting batch volume anomalies: {e}")
             raise AnomalyError(
-                f"Volume anomaly detection failed: {e}", detector_type="volume"
+                f"Batch volume anomaly detection failed: {e}", detector_type="volume"
             )
 
+        finally:
+            self._save_anomaly_history()
+
+    # =========================================================================
+    # VOLATILITY ANOMALIES
+    # =========================================================================
+
+    @staticmethod
+    def _volatility_stats(
+        prices: np.ndarray,
+        window_size: int,
+        z_threshold: float,
+        volatility_threshold: float,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Rolling volatility, its change factors, z-scores and candidate mask."""
+        volatilities = rolling_std(simple_returns(prices), window_size)
+        volatility_changes = ratio_to_previous(volatilities, first=0.0, fallback=1.0)
+
+        log_changes = np.log(np.maximum(volatility_changes, 0.1))
+        zscores, _ = row_zscores(log_changes)
+
+        candidates = (volatility_changes > volatility_threshold) & (
+            np.abs(zscores) > z_threshold
+        )
+        # Skip first values where change calculation isn't meaningful, and
+        # points after a zero volatility
+        candidates[:, : window_size + 1] = False
+        candidates[:, 1:] &= volatilities[:, :-1] != 0
+        return volatilities, volatility_changes, zscores, candidates
+
+    def _emit_volatility_anomalies(
+        self,
+        symbol: str,
+        volatilities: np.ndarray,
+        volatility_changes: np.ndarray,
+        zscores: np.ndarray,
+        candidates: np.ndarray,
+        timestamps: Optional[List[Union[str, datetime]]],
+        window_size: int,
+        z_threshold: float,
+        volatility_threshold: float,
+        save: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Report the candidate points of one symbol, honouring cooldowns."""
+        anomalies = []
+        for i in np.flatnonzero(candidates):
+            # Skip if in cooldown period
+            if self._check_cooldown(symbol, AnomalyType.VOLATILITY_CHANGE):
+                continue
+
+            volatility_change = float(volatility_changes[i])
+            zscore = abs(float(zscores[i]))
+
+            # Determine severity
+            severity = AnomalySeverity.INFO
+            if (
+                zscore > z_threshold * 1.5
+                or volatility_change > volatility_threshold * 1.5
+            ):
+                severity = AnomalySeverity.WARNING
+            if zscore > z_threshold * 2 or volatility_change > volatility_threshold * 2:
+                severity = AnomalySeverity.CRITICAL
+
+            # Create anomaly entry
+            ts_index = i + window_size - 1  # Adjust for the initial window
+            anomaly = {
+                "entity_id": symbol,
+                "type": AnomalyType.VOLATILITY_CHANGE,
+                "severity": severity,
+                "timestamp": (
+                    timestamps[ts_index]
+                    if timestamps and ts_index < len(timestamps)
+                    else datetime.utcnow().isoformat()
+                ),
+                "value": float(volatilities[i]),
+                "previous_value": float(volatilities[i - 1]),
+                "change_factor": volatility_change,
+                "zscore": float(zscores[i]),
+                "window_size": window_size,
+                "threshold": {
+                    "zscore": z_threshold,
+                    "volatility_change": volatility_threshold,
+                },
+            }
+
+            anomalies.append(anomaly)
+
+            # Record this anomaly
+            self._record_anomaly(anomaly, save=save)
+
+            # Send alert for significant anomalies
+            if severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
+                alert_level = (
+                    "warning" if severity == AnomalySeverity.WARNING else "critical"
+                )
+
+                alert_manager.send_alert(
+                    f"Abnormal {symbol} volatility increase",
+                    f"{symbol} volatility increased by {(volatility_change-1)*100:.1f}% (Z-score: {zscore:.2f})",
+                    level=alert_level,
+                    data=anomaly,
+                )
+
+        return anomalies
+
     @handle_errors()
     def detect_volatility_anomalies(
         self,
@@ -500,132 +927,100 @@ class AnomalyDetector:
             )
             return []
 
-        # Use provided sensitivity or config default
-        sensitivity = sensitivity or self.config["detection_sensitivity"]
-
         # Adjust thresholds based on sensitivity
-        z_threshold = self.config["zscore_threshold"] * (2 - sensitivity)
-        volatility_threshold = self.config["volatility_change_threshold"] * (
-            2 - sensitivity
-        )
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        volatility_threshold = self.config["volatility_change_threshold"] * factor
 
         try:
-            # Calculate returns
-            returns = [0.0]
-            for i in range(1, len(prices)):
-                if prices[i - 1] > 0:
-                    returns.append((prices[i] - prices[i - 1]) / prices[i - 1])
-                else:
-                    returns.append(0.0)
-
-            # Calculate rolling volatility
-            volatilities = [0.0] * window_size  # Pad initial values
-
-            for i in range(window_size, len(returns)):
-                window_returns = returns[i - window_size : i]
-                volatilities.append(np.std(window_returns))
-
-            # Need enough volatility points for anomaly detection
-            if len(volatilities) < self.config["min_history_points"]:
-                return []
-
-            # Calculate volatility changes
-            volatility_changes = [0.0]
-            for i in range(1, len(volatilities)):
-                if volatilities[i - 1] > 0:
-                    volatility_changes.append(volatilities[i] / volatilities[i - 1])
-                else:
-                    volatility_changes.append(1.0)
-
-            # Calculate statistics
-            log_changes = [np.log(max(vc, 0.1)) for vc in volatility_changes]
-            mean_log_change = np.mean(log_changes)
-            std_log_change = np.std(log_changes) or 0.001  # Avoid division by zero
-            zscores = [(lc - mean_log_change) / std_log_change for lc in log_changes]
-
-            # Look for anomalies
-            anomalies = []
-
-            for i in range(1, len(volatilities)):
-                # Skip first values where change calculation isn't meaningful
-                if i < window_size + 1:
-                    continue
-
-                if volatilities[i - 1] == 0:
-                    continue  # Skip if previous volatility was zero
-
-                volatility_change = volatility_changes[i]
-                zscore = abs(zscores[i])
-
-                # Skip if in cooldown period
-                if self._check_cooldown(symbol, AnomalyType.VOLATILITY_CHANGE):
-                    continue
-
-                # Detect significant volatility changes
-                if volatility_change > volatility_threshold and zscore > z_threshold:
-                    # Determine severity
-                    severity = AnomalySeverity.INFO
-                    if (
-                        zscore > z_threshold * 1.5
-                        or volatility_change > volatility_threshold * 1.5
-                    ):
-                        severity = AnomalySeverity.WARNING
-                    if (
-                        zscore > z_threshold * 2
-                        or volatility_change > volatility_threshold * 2
-                    ):
-                        severity = AnomalySeverity.CRITICAL
+            volatilities, changes, zscores, candidates = self._volatility_stats(
+                stack_series([prices]), window_size, z_threshold, volatility_threshold
+            )
+            return self._emit_volatility_anomalies(
+                symbol,
+                volatilities[0],
+                changes[0],
+                zscores[0],
+                candidates[0],
+                timestamps,
+                window_size,
+                z_threshold,
+                volatility_threshold,
+            )
 
-                    # Create anomaly entry
-                    ts_index = i + window_size - 1  # Adjust for the initial window
-                    anomaly = {
-                        "entity_id": symbol,
-                        "type": AnomalyType.VOLATILITY_CHANGE,
-                        "severity": severity,
-                        "timestamp": (
-                            timestamps[ts_index]
-                            if timestamps and ts_index < len(timestamps)
-                            else datetime.utcnow().isoformat()
-                        ),
-                        "value": volatilities[i],
-                        "previous_value": volatilities[i - 1],
-                        "change_factor": volatility_change,
-                        "zscore": zscores[i],
-                        "window_size": window_size,
-                        "threshold": {
-                            "zscore": z_threshold,
-                            "volatility_change": volatility_threshold,
-                        },
-                    }
+        except Exception as e:
+            logger.error(f"Error detecting volatility anomalies for {symbol}: {e}")
+            raise AnomalyError(
+                f"Volatility anomaly detection failed: {e}", detector_type="volatility"
+            )
 
-                    anomalies.append(anomaly)
+    @handle_errors()
+    def detect_volatility_anomalies_batch(
+        self,
+        prices: Dict[str, List[float]],
+        timestamps: Optional[Dict[str, List[Union[str, datetime]]]] = None,
+        window_size: int = 14,
+        sensitivity: Optional[float] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Detect volatility anomalies for many symbols at once.
 
-                    # Record this anomaly
-                    self._record_anomaly(anomaly)
+        Args:
+            prices: Price series by symbol
+            timestamps: Optional timestamp lists by symbol
+            window_size: Window size for volatility calculation
+            sensitivity: Override for detection sensitivity (0.0-1.0)
 
-                    # Send alert for significant anomalies
-                    if severity in [AnomalySeverity.WARNING, AnomalySeverity.CRITICAL]:
-                        alert_level = (
-                            "warning"
-                            if severity == AnomalySeverity.WARNING
-                            else "critical"
-                        )
+        Returns:
+            Detected anomalies by symbol (symbols without anomalies omitted)
 
-                        alert_manager.send_alert(
-                            f"Abnormal {symbol} volatility increase",
-                            f"{symbol} volatility increased by {(volatility_change-1)*100:.1f}% (Z-score: {zscore:.2f})",
-                            level=alert_level,
-                            data=anomaly,
-                        )
+        Raises:
+            AnomalyError: If detection fails
+        """
+        factor = self._sensitivity_factor(sensitivity)
+        z_threshold = self.config["zscore_threshold"] * factor
+        volatility_threshold = self.config["volatility_change_threshold"] * factor
+        timestamps = timestamps or {}
+        results: Dict[str, List[Dict[str, Any]]] = {}
 
-            return anomalies
+        try:
+            groups = self._group_by_length(
+                prices, window_size + self.config["min_history_points"]
+            )
+            for symbols in groups.values():
+                volatilities, changes, zscores, candidates = self._volatility_stats(
+                    stack_series([prices[s] for s in symbols]),
+                    window_size,
+                    z_threshold,
+                    volatility_threshold,
+                )
+                for row in np.flatnonzero(candidates.any(axis=1)):
+                    symbol = symbols[row]
+                    anomalies = self._emit_volatility_anomalies(
+                        symbol,
+                        volatilities[row],
+                        changes[row],
+                        zscores[row],
+                        candidates[row],
+                        timestamps.get(symbol),
+                        window_size,
+                        z_threshold,
+                        volatility_threshold,
+                        save=False,
+                    )
+                    if anomalies:
+                        results[symbol] = anomalies
+            return results
 
         except Exception as e:
-            logger.error(f"Error detecting volatility anomalies for {symbol}: {e}")
+            logger.error(f"Error detecting batch volatility anomalies: {e}")
             raise AnomalyError(
-                f"Volatility anomaly detection failed: {e}", detector_type="volatility"
+                f"Batch volatility anomaly detection failed: {e}",
+                detector_type="volatility",
             )
 
+        finally:
+            self._save_anomaly_history()
+
     @handle_errors()
     def detect_system_metric_anomalies(
         self,
@@ -1195,23 +1590,12 @@ class AnomalyDetector:
         Returns:
             List of anomaly records matching the filters
         """
-        # Convert time filters to datetime objects if they're strings
-        if isinstance(start_time, str):
-            start_time = datetime.fromisoformat(start_time)
-        if isinstance(end_time, str):
-            end_time = datetime.fromisoformat(end_time)
-
-        # Collect all anomalies
-        all_anomalies = []
-        for key, anomalies in self._recent_anomalies.items():
-            all_anomalies.extend(anomalies)
-
-        # Sort by timestamp (most recent first)
-        all_anomalies.sort(key=lambda a: a.get("timestamp", ""), reverse=True)
+        start = to_epoch(start_time)
+        end = to_epoch(end_time)
 
-        # Apply filters
+        # Walk buckets newest first, skipping those outside the time range
         filtered_anomalies = []
-        for anomaly in all_anomalies:
+        for _, _, anomaly in self._history.query(start, end):
             # Entity ID filter
             if entity_id and anomaly.get("entity_id") != entity_id:
                 continue
@@ -1224,16 +1608,6 @@ class AnomalyDetector:
             if severity and anomaly.get("severity") != severity:
                 continue
 
-            # Time range filters
-            if "timestamp" in anomaly:
-                anomaly_time = datetime.fromisoformat(anomaly["timestamp"])
-
-                if start_time and anomaly_time < start_time:
-                    continue
-
-                if end_time and anomaly_time > end_time:
-                    continue
-
             filtered_anomalies.append(anomaly)
 
             # Apply limit
@@ -0,0 +1,362 @@
+"""Array and streaming primitives for anomaly detection.
+
+This module holds the numeric building blocks used by the anomaly detector:
+
+- Row-wise statistics over 2-D arrays (one row per symbol), so returns,
+  z-scores and rolling volatility for many symbols are computed in a few
+  NumPy operations instead of per-point Python loops.
+- Streaming detectors (EWMA mean/variance and a robust median/MAD tracker)
+  that update every series in O(1) per new point.
+- An append-only anomaly history partitioned into fixed time buckets, so
+  retention is enforced by dropping whole buckets and only the current
+  bucket needs to be persisted after new detections.
+"""
+
+import calendar
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Substitute for a zero standard deviation (matches the scalar detectors)
+MIN_STD = 0.001
+
+# Rows processed at once by the rolling-window statistics
+ROLLING_CHUNK_ROWS = 512
+
+
+# =============================================================================
+# ROW-WISE STATISTICS
+# =============================================================================
+
+
+def stack_series(series: Sequence[Sequence[float]]) -> np.ndarray:
+    """Stack equal-length series into a float array, one row per series."""
+    return np.asarray(series, dtype=float).reshape(len(series), -1)
+
+
+def ratio_to_previous(values: np.ndarray, first: float, fallback: float) -> np.ndarray:
+    """Ratio of each point to the previous one along each row.
+
+    Args:
+        values: 2-D array of series
+        first: Value for the first column, which has no predecessor
+        fallback: Value where the previous point is not positive
+
+    Returns:
+        Array of the same shape as ``values``
+    """
+    previous = values[:, :-1]
+    positive = previous > 0
+    safe_previous = np.where(positive, previous, 1.0)
+    ratios = np.where(positive, values[:, 1:] / safe_previous, fallback)
+    lead = np.full((values.shape[0], 1), first)
+    return np.concatenate([lead, ratios], axis=1)
+
+
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    """Period returns per row.
+
+    The first column, and any point following a non-positive price, is 0.0.
+    """
+    previous = prices[:, :-1]
+    positive = previous > 0
+    safe_previous = np.where(positive, previous, 1.0)
+    returns = np.zeros(prices.shape)
+    returns[:, 1:] = np.where(
+        positive, (prices[:, 1:] - previous) / safe_previous, 0.0
+    )
+    return returns
+
+
+def row_zscores(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Z-score every point against the mean and deviation of its row.
+
+    Returns:
+        Tuple of (z-scores, row means)
+    """
+    means = values.mean(axis=1, keepdims=True)
+    stds = values.std(axis=1, keepdims=True)
+    stds = np.where(stds > 0, stds, MIN_STD)
+    return (values - means) / stds, means[:, 0]
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing population standard deviation per row.
+
+    Column ``j`` holds the deviation of columns ``j - window`` to ``j - 1``;
+    the first ``window`` columns are zero.
+    """
+    rows, columns = values.shape
+    result = np.zeros((rows, columns))
+    if columns <= window:
+        return result
+    for start in range(0, rows, ROLLING_CHUNK_ROWS):
+        block = values[start : start + ROLLING_CHUNK_ROWS]
+        windows = sliding_window_view(block, window, axis=1)[:, : columns - window]
+        result[start : start + ROLLING_CHUNK_ROWS, window:] = windows.std(axis=2)
+    return result
+
+
+# =============================================================================
+# STREAMING DETECTORS
+# =============================================================================
+
+
+class EWMADetector:
+    """Exponentially weighted mean and variance for many series.
+
+    Each point is scored against the state built from earlier points, then
+    folded in, so an update costs O(1) per series regardless of history.
+    The weight of a new point is ``max(alpha, 1/n)``.
+    """
+
+    def __init__(self, size: int = 0, alpha: float = 0.05, warmup: int = 20):
+        """Initialize the detector.
+
+        Args:
+            size: Number of series tracked
+            alpha: Weight of each new point (0-1)
+            warmup: Points a series needs before its scores are reported
+        """
+        self.alpha = alpha
+        self.warmup = warmup
+        self.mean = np.zeros(size)
+        self.var = np.zeros(size)
+        self.count = np.zeros(size, dtype=np.int64)
+
+    def resize(self, size: int) -> None:
+        """Grow the state to track ``size`` series."""
+        extra = size - len(self.mean)
+        if extra > 0:
+            self.mean = np.concatenate([self.mean, np.zeros(extra)])
+            self.var = np.concatenate([self.var, np.zeros(extra)])
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+
+    def update(
+        self, values: np.ndarray, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Score and absorb one new point per series.
+
+        Args:
+            values: New point for every series
+            mask: Optional boolean array selecting the series that have a point
+
+        Returns:
+            Z-scores, NaN for masked-out series and series still warming up
+        """
+        if mask is None:
+            mask = np.ones(len(values), dtype=bool)
+        std = np.sqrt(self.var)
+        std = np.where(std > 0, std, MIN_STD)
+        scores = np.where(
+            mask & (self.count >= self.warmup), (values - self.mean) / std, np.nan
+        )
+
+        # Equal weights until 1/n drops below alpha, so early points give
+        # the exact running mean and variance rather than a biased start
+        alpha = np.maximum(self.alpha, 1.0 / (self.count + 1))
+        delta = np.where(mask, values - self.mean, 0.0)
+        self.mean = np.where(mask, self.mean + alpha * delta, self.mean)
+        self.var = np.where(
+            mask, (1 - alpha) * (self.var + alpha * delta * delta), self.var
+        )
+        self.count = self.count + mask
+        return scores
+
+
+class RobustDetector:
+    """Streaming median and median absolute deviation for many series.
+
+    Uses sign-based stochastic approximation: each point nudges the median
+    estimate towards itself by a step proportional to the current MAD, and
+    the MAD estimate towards the point's absolute deviation. The step rate
+    is ``max(step, 1/n)`` so the estimates settle quickly from the start. Each update is
+    O(1) per series and outliers move the estimates by at most one step.
+    Scores are ``0.6745 * (x - median) / MAD``, comparable to z-scores.
+    """
+
+    def __init__(self, size: int = 0, step: float = 0.05, warmup: int = 20):
+        """Initialize the detector.
+
+        Args:
+            size: Number of series tracked
+            step: Smallest step rate, relative to the current MAD
+            warmup: Points a series needs before its scores are reported
+        """
+        self.step = step
+        self.warmup = warmup
+        self.median = np.zeros(size)
+        self.mad = np.zeros(size)
+        self.count = np.zeros(size, dtype=np.int64)
+
+    def resize(self, size: int) -> None:
+        """Grow the state to track ``size`` series."""
+        extra = size - len(self.median)
+        if extra > 0:
+            self.median = np.concatenate([self.median, np.zeros(extra)])
+            self.mad = np.concatenate([self.mad, np.zeros(extra)])
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+
+    def update(
+        self, values: np.ndarray, mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Score and absorb one new point per series.
+
+        Args:
+            values: New point for every series
+            mask: Optional boolean array selecting the series that have a point
+
+        Returns:
+            Robust z-scores, NaN for masked-out series and series warming up
+        """
+        if mask is None:
+            mask = np.ones(len(values), dtype=bool)
+        mad = np.where(self.mad > 0, self.mad, MIN_STD)
+        scores = np.where(
+            mask & (self.count >= self.warmup),
+            0.6745 * (values - self.median) / mad,
+            np.nan,
+        )
+
+        first = mask & (self.count == 0)
+        deviation = np.abs(values - self.median)
+        rate = np.maximum(self.step, 1.0 / (self.count + 1))
+        scale = np.where(self.mad > 0, self.mad, np.maximum(deviation, MIN_STD))
+        median = self.median + rate * scale * np.sign(values - self.median)
+        mad = np.maximum(self.mad + rate * scale * np.sign(deviation - self.mad), 0)
+        update = mask & ~first
+        self.median = np.where(first, values, np.where(update, median, self.median))
+        self.mad = np.where(update, mad, self.mad)
+        self.count = self.count + mask
+        return scores
+
+
+# =============================================================================
+# TIME-BUCKETED HISTORY
+# =============================================================================
+
+
+def to_epoch(timestamp: Union[str, datetime, None]) -> Optional[float]:
+    """Convert an ISO string or datetime to UTC epoch seconds.
+
+    Naive values are taken to be UTC, matching ``datetime.utcnow()``.
+    """
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).timestamp()
+    return calendar.timegm(timestamp.timetuple()) + timestamp.microsecond / 1e6
+
+
+class AnomalyHistoryStore:
+    """Append-only anomaly records grouped into fixed time buckets.
+
+    Records are appended to the bucket covering their timestamp. Expiry drops
+    whole buckets, queries skip buckets outside the requested range, and the
+    latest detection time per key is kept so cooldown checks are O(1).
+    """
+
+    def __init__(self, bucket_seconds: int = 300, retention_seconds: int = 86400):
+        """Initialize the store.
+
+        Args:
+            bucket_seconds: Width of each time bucket
+            retention_seconds: Age after which buckets are dropped
+        """
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+        self._buckets: Dict[int, List[Tuple[float, str, Dict[str, Any]]]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._dirty: Set[int] = set()
+
+    def bucket_of(self, epoch: float) -> int:
+        return int(epoch // self.bucket_seconds)
+
+    def bucket_ids(self, now: Optional[float] = None) -> range:
+        """Bucket ids inside the retention window."""
+        now = time.time() if now is None else now
+        return range(
+            self.bucket_of(now - self.retention_seconds), self.bucket_of(now) + 1
+        )
+
+    def append(self, key: str, record: Dict[str, Any], mark_dirty: bool = True) -> None:
+        """Add a record under ``key`` (e.g. ``"AAPL:PRICE_SPIKE"``)."""
+        epoch = to_epoch(record.get("timestamp"))
+        if epoch is None:
+            epoch = time.time()
+        bucket = self.bucket_of(epoch)
+        self._buckets.setdefault(bucket, []).append((epoch, key, record))
+        if epoch > self._last_seen.get(key, float("-inf")):
+            self._last_seen[key] = epoch
+        if mark_dirty:
+            self._dirty.add(bucket)
+
+    def load_bucket(self, records: List[Dict[str, Any]]) -> None:
+        """Restore persisted records without marking them for saving."""
+        for record in records:
+            if "entity_id" in record and "type" in record:
+                key = f"{record['entity_id']}:{record['type']}"
+                self.append(key, record, mark_dirty=False)
+
+    def last_seen(self, key: str) -> Optional[float]:
+        """Most recent detection time recorded under ``key``."""
+        return self._last_seen.get(key)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop buckets older than the retention window.
+
+        Returns:
+            Number of records dropped
+        """
+        now = time.time() if now is None else now
+        oldest = self.bucket_of(now - self.retention_seconds)
+        expired = [bucket for bucket in self._buckets if bucket < oldest]
+        dropped = 0
+        for bucket in expired:
+            dropped += len(self._buckets.pop(bucket))
+            self._dirty.discard(bucket)
+        if expired:
+            cutoff = now - self.retention_seconds
+            self._last_seen = {
+                key: seen for key, seen in self._last_seen.items() if seen >= cutoff
+            }
+        return dropped
+
+    def take_dirty(self) -> Dict[int, List[Dict[str, Any]]]:
+        """Return buckets changed since the last call, in insertion order."""
+        dirty = {
+            bucket: [record for _, _, record in self._buckets.get(bucket, [])]
+            for bucket in sorted(self._dirty)
+        }
+        self._dirty.clear()
+        return dirty
+
+    def query(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Iterator[Tuple[float, str, Dict[str, Any]]]:
+        """Yield ``(epoch, key, record)`` newest first within a time range."""
+        for bucket in sorted(self._buckets, reverse=True):
+            bucket_start = bucket * self.bucket_seconds
+            if start is not None and bucket_start + self.bucket_seconds <= start:
+                break
+            if end is not None and bucket_start > end:
+                continue
+            for entry in sorted(
+                self._buckets[bucket], key=lambda e: e[0], reverse=True
+            ):
+                if start is not None and entry[0] < start:
+                    continue
+                if end is not None and entry[0] > end:
+                    continue
+                yield entry
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._buckets.values())
@@ -3,12 +3,16 @@ Auto Trading Service - Continuously executes trading strategies
 
 This service runs enabled strategies in the background, generating signals
 and executing trades automatically based on user-configured parameters.
+
+All users share one scheduler loop. Equivalent strategies (same class,
+parameters and symbol) compute their signal once per tick, and the result
+is sized and executed separately for each subscribed portfolio.
 """
 
 import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -16,6 +20,7 @@ from app.models.portfolio import Portfolio
 from app.models.trade import Trade
 from app.models.user import User
 from app.services.market_data import MarketDataService
+from app.services.signal_scheduler import SignalScheduler, SignalSubscription
 from app.trading_engine.engine.circuit_breaker import get_circuit_breaker
 from app.trading_engine.engine.trade_executor import TradeExecutor
 from app.trading_engine.strategies.base import TradingStrategy
@@ -31,11 +36,14 @@ class AutoTradingService:
     """
 
     _instance = None
-    _running_tasks: Dict[int, asyncio.Task] = {}  # user_id -> task
     _active_strategies: Dict[int, Dict[str, TradingStrategy]] = (
         {}
     )  # user_id -> {strategy_name: strategy}
+    _user_sessions: Dict[int, Tuple[int, Session]] = {}  # user_id -> (portfolio, db)
     _market_data_service: Optional[MarketDataService] = None
+    _scheduler: Optional[SignalScheduler] = None
+    _scheduler_task: Optional[asyncio.Task] = None
+    tick_interval: int = 30  # Seconds between signal ticks
 
     def __new__(cls):
         """Singleton pattern"""
@@ -47,8 +55,25 @@ class AutoTradingService:
     def initialize(cls, market_data_service: MarketDataService):
         """Initialize the service with required dependencies"""
         cls._market_data_service = market_data_service
+        if cls._scheduler is not None:
+            cls._scheduler.quote_fetcher = market_data_service.get_quote
         logger.info("AutoTradingService initialized")
 
+    @classmethod
+    def _get_scheduler(cls) -> SignalScheduler:
+        """Shared scheduler computing each distinct signal once per tick"""
+        if cls._scheduler is None:
+            cls._scheduler = SignalScheduler(
+                quote_fetcher=cls._market_data_service.get_quote,
+                deliver=cls._deliver_signal,
+            )
+        return cls._scheduler
+
+    @classmethod
+    def _ensure_loop_running(cls) -> None:
+        if cls._scheduler_task is None or cls._scheduler_task.done():
+            cls._scheduler_task = asyncio.create_task(cls._auto_trading_loop())
+
     @classmethod
     async def start_auto_trading(
         cls,
@@ -73,7 +98,7 @@ class AutoTradingService:
         """
         try:
             # Check if already running
-            if user_id in cls._running_tasks:
+            if user_id in cls._user_sessions:
                 logger.warning(f"Auto-trading already running for user {user_id}")
                 return False
 
@@ -109,12 +134,15 @@ class AutoTradingService:
                 return False
 
             cls._active_strategies[user_id] = strategies
+            cls._user_sessions[user_id] = (portfolio_id, db)
 
-            # Start background task
-            task = asyncio.create_task(
-                cls._auto_trading_loop(user_id, portfolio_id, db)
-            )
-            cls._running_tasks[user_id] = task
+            # Subscribe to shared signals and make sure the loop is running
+            scheduler = cls._get_scheduler()
+            for key, strategy in strategies.items():
+                scheduler.subscribe(
+                    SignalSubscription(user_id, portfolio_id, key, strategy, db)
+                )
+            cls._ensure_loop_running()
 
             logger.info(
                 f"Started auto-trading for user {user_id} with {len(strategies)} strategies"
@@ -138,15 +166,20 @@ class AutoTradingService:
             True if stopped successfully
         """
         try:
-            # Cancel background task
-            if user_id in cls._running_tasks:
-                task = cls._running_tasks[user_id]
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-                del cls._running_tasks[user_id]
+            # Unsubscribe from shared signals
+            cls._user_sessions.pop(user_id, None)
+            if cls._scheduler is not None:
+                cls._scheduler.unsubscribe_user(user_id)
+
+                # Stop the shared loop once nobody is subscribed
+                task = cls._scheduler_task
+                if task and not cls._scheduler.has_subscriptions():
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+                    cls._scheduler_task = None
 
             # Clean up strategies
             if user_id in cls._active_strategies:
@@ -169,141 +202,111 @@ class AutoTradingService:
             return False
 
     @classmethod
-    async def _auto_trading_loop(cls, user_id: int, portfolio_id: int, db: Session):
+    async def _auto_trading_loop(cls):
         """
-        Main loop that continuously generates signals and executes trades.
+        Shared loop that generates signals once per tick for all users.
 
-        Args:
-            user_id: User ID
-            portfolio_id: Portfolio to trade
-            db: Database session
+        Each distinct (strategy class, parameters, symbol) signal is computed
+        once and delivered to every subscribed portfolio.
         """
-        logger.info(f"Starting auto-trading loop for user {user_id}")
+        logger.info("Starting shared auto-trading loop")
 
         try:
             while True:
                 # Check if market is open
                 if not cls._is_market_open():
-                    logger.debug(f"Market closed, waiting... (user {user_id})")
+                    logger.debug("Market closed, waiting...")
                     await asyncio.sleep(60)  # Check every minute
                     continue
 
-                # Get active strategies for this user
-                strategies = cls._active_strategies.get(user_id, {})
-                if not strategies:
-                    logger.warning(f"No active strategies for user {user_id}")
-                    break
-
-                # Get portfolio
-                portfolio = (
-                    db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
-                )
-                if not portfolio:
-                    logger.error(f"Portfolio {portfolio_id} not found")
+                scheduler = cls._get_scheduler()
+                if not scheduler.has_subscriptions():
+                    logger.warning("No active strategies, stopping auto-trading loop")
                     break
 
-                # Check circuit breakers
+                # Check system-wide circuit breakers once for all users
                 circuit_breaker = get_circuit_breaker()
-                if not circuit_breaker.check():
+                allowed, status = circuit_breaker.check()
+                if not allowed:
                     logger.warning(
-                        f"Circuit breaker active, pausing auto-trading for user {user_id}"
+                        f"Circuit breaker {status.value}, pausing auto-trading"
                     )
                     await asyncio.sleep(300)  # Wait 5 minutes
                     continue
 
-                # Process each strategy
-                for strategy_key, strategy in strategies.items():
-                    try:
-                        await cls._process_strategy(strategy, portfolio, db, user_id)
-                    except Exception as e:
-                        logger.error(
-                            f"Error processing strategy {strategy_key}: {str(e)}"
-                        )
-                        continue
+                try:
+                    await scheduler.run_tick(
+                        symbol_allowed=lambda symbol: circuit_breaker.check(
+                            scope=symbol
+                        )[0]
+                    )
+                except Exception as e:
+                    logger.error(f"Error running signal tick: {str(e)}")
 
                 # Wait before next iteration (configurable - default 30 seconds)
-                await asyncio.sleep(30)
+                await asyncio.sleep(cls.tick_interval)
 
         except asyncio.CancelledError:
-            logger.info(f"Auto-trading loop cancelled for user {user_id}")
+            logger.info("Auto-trading loop cancelled")
             raise
         except Exception as e:
-            logger.error(f"Error in auto-trading loop for user {user_id}: {str(e)}")
+            logger.error(f"Error in auto-trading loop: {str(e)}")
         finally:
-            logger.info(f"Auto-trading loop ended for user {user_id}")
+            logger.info("Auto-trading loop ended")
 
     @classmethod
-    async def _process_strategy(
+    async def _deliver_signal(
         cls,
-        strategy: TradingStrategy,
-        portfolio: Portfolio,
-        db: Session,
-        user_id: int,
-    ):
+        subscription: SignalSubscription,
+        signal: Dict[str, Any],
+        market_data: Dict[str, Any],
+    ) -> bool:
         """
-        Process a single strategy: generate signal and execute if valid.
+        Size and execute a shared signal for one subscribed portfolio.
 
         Args:
-            strategy: Trading strategy instance
-            portfolio: Portfolio to trade
-            db: Database session
-            user_id: User ID
-        """
-        try:
-            # Get current market data
-            symbol = strategy.symbol
-            market_data = await cls._market_data_service.get_quote(symbol)
-
-            if not market_data:
-                logger.warning(f"No market data for {symbol}")
-                return
-
-            # Generate signal
-            signal = await strategy.generate_signal(market_data)
-
-            if not signal or signal.get("action") == "hold":
-                logger.debug(f"Strategy {strategy.name} for {symbol}: HOLD")
-                return
-
-            # Validate signal
-            is_valid = await strategy.validate_signal(signal, market_data)
-            if not is_valid:
-                logger.debug(
-                    f"Signal from {strategy.name} for {symbol} failed validation"
-                )
-                return
-
-            logger.info(
-                f"Valid signal from {strategy.name} for {symbol}: "
-                f"{signal['action']} (confidence: {signal['confidence']:.2f})"
-            )
+            subscription: The user's subscription (context is the db session)
+            signal: Validated signal computed once for all subscribers
+            market_data: Quote the signal was generated from
 
-            # Create trade executor
-            executor = TradeExecutor(
-                market_data_service=cls._market_data_service,
-                strategy=strategy,
-            )
+        Returns:
+            True if a trade was executed
+        """
+        strategy = subscription.strategy
+        db: Session = subscription.context
+        if not strategy.is_active:
+            return False
 
-            # Execute the trade
-            trade = await executor.execute_strategy_signal(signal, portfolio)
+        portfolio = (
+            db.query(Portfolio)
+            .filter(Portfolio.id == subscription.portfolio_id)
+            .first()
+        )
+        if not portfolio:
+            logger.error(f"Portfolio {subscription.portfolio_id} not found")
+            return False
 
-            if trade:
-                # Save trade to database
-                db.add(trade)
-                db.commit()
+        # Position sizing and risk checks use the user's own portfolio
+        executor = TradeExecutor(
+            market_data_service=cls._market_data_service,
+            strategy=strategy,
+        )
+        trade = await executor.execute_strategy_signal(signal, portfolio)
+        if not trade:
+            return False
 
-                logger.info(
-                    f"Trade executed: {trade.side.value} {trade.quantity} "
-                    f"{trade.symbol} @ ${trade.price}"
-                )
+        # Save trade to database
+        db.add(trade)
+        db.commit()
 
-                # Update strategy performance
-                strategy.last_signal_time = datetime.utcnow()
+        logger.info(
+            f"Trade executed for user {subscription.user_id}: "
+            f"{trade.side.value} {trade.quantity} {trade.symbol} @ ${trade.price}"
+        )
 
-        except Exception as e:
-            logger.error(
-                f"Error processing strategy {strategy.name} for {strategy.symbol}: {str(e)}"
-            )
+        # Update strategy performance
+        strategy.last_signal_time = datetime.utcnow()
+        return True
 
     @classmethod
     def _is_market_open(cls) -> bool:
@@ -353,7 +356,14 @@ class AutoTradingService:
     @classmethod
     def is_auto_trading_active(cls, user_id: int) -> bool:
         """Check if auto-trading is active for a user"""
-        return user_id in cls._running_tasks
+        return user_id in cls._user_sessions
+
+    @classmethod
+    def get_signal_stats(cls, last: int = 10) -> Dict[str, Any]:
+        """Signals computed vs. delivered for recent scheduler ticks"""
+        if cls._scheduler is None:
+            return {"subscriptions": 0, "distinct_signals": 0, "users": 0, "ticks": []}
+        return cls._scheduler.get_stats(last)
 
     @classmethod
     async def add_strategy(
@@ -394,6 +404,11 @@ class AutoTradingService:
             key = f"{strategy_name}_{symbol}"
             cls._active_strategies[user_id][key] = strategy
 
+            portfolio_id, db = cls._user_sessions[user_id]
+            cls._get_scheduler().subscribe(
+                SignalSubscription(user_id, portfolio_id, key, strategy, db)
+            )
+
             logger.info(f"Added strategy {key} for user {user_id}")
             return True
 
@@ -427,6 +442,8 @@ class AutoTradingService:
                 strategy = strategies[key]
                 strategy.deactivate()
                 del strategies[key]
+                if cls._scheduler is not None:
+                    cls._scheduler.unsubscribe(user_id, key)
 
                 logger.info(f"Removed strategy {key} for user {user_id}")
                 return True
@@ -0,0 +1,280 @@
+"""
+Compact encodings for OHLCV history responses.
+
+History endpoints default to one JSON object per bar. Clients can opt in to
+``format=columnar`` (parallel arrays in JSON), or negotiate a binary body
+via ``Accept``: Arrow IPC stream or MessagePack, when the optional pyarrow /
+msgpack packages are installed. ``max_points`` reduces long series on the
+server with Largest-Triangle-Three-Buckets (LTTB) downsampling.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+ROWS = "rows"
+COLUMNAR = "columnar"
+ARROW = "arrow"
+MSGPACK = "msgpack"
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+PRICE_FIELDS = ("open", "high", "low", "close", "vwap")
+
+
+# ----------------------------------------------------------------------
+# Downsampling
+# ----------------------------------------------------------------------
+
+
+def lttb_indices(
+    y: np.ndarray, threshold: int, x: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Indices selected by Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets, the point forming the largest triangle with the previously
+    selected point and the next bucket's average.
+
+    Args:
+        y: Values (e.g. closes); NaNs are treated as the series mean
+        threshold: Number of points to keep
+        x: Positions (defaults to 0..n-1, i.e. evenly spaced bars)
+
+    Returns:
+        Sorted integer indices into the original series
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    missing = np.isnan(y)
+    if missing.any():
+        y = np.where(missing, y[~missing].mean() if (~missing).any() else 0.0, y)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    every = (n - 2) / (threshold - 2)
+    bounds = (np.floor(np.arange(threshold - 1) * every) + 1).astype(int)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        if i + 2 < threshold - 1:
+            next_start, next_end = bounds[i + 1], bounds[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        xs, ys = x[start:end], y[start:end]
+        area = np.abs(
+            (x[anchor] - avg_x) * (ys - y[anchor])
+            - (x[anchor] - xs) * (avg_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def downsample_columns(
+    columns: Dict[str, np.ndarray],
+    max_points: Optional[int],
+    value_field: str = "close",
+) -> Dict[str, np.ndarray]:
+    """Keep the LTTB-selected bars (chosen on `value_field`) from every column."""
+    n_bars = len(columns.get("timestamp", ()))
+    if not max_points or n_bars <= max_points or value_field not in columns:
+        return columns
+    index = lttb_indices(columns[value_field], max_points)
+    return {field: values[index] for field, values in columns.items()}
+
+
+# ----------------------------------------------------------------------
+# Encodings
+# ----------------------------------------------------------------------
+
+
+def bars_to_columns(
+    bars: List[Dict[str, Any]],
+    fields: tuple = ("open", "high", "low", "close", "volume"),
+) -> Dict[str, np.ndarray]:
+    """Per-bar dicts (as returned by market data providers) to column arrays."""
+    columns = {
+        "timestamp": np.array(
+            [
+                b.get("timestamp").isoformat()
+                if hasattr(b.get("timestamp"), "isoformat")
+                else b.get("timestamp")
+                for b in bars
+            ],
+            dtype=object,
+        )
+    }
+    for field in fields:
+        columns[field] = np.array(
+            [np.nan if b.get(field) is None else b[field] for b in bars],
+            dtype=float,
+        )
+    return columns
+
+
+def columns_to_lists(columns: Dict[str, np.ndarray]) -> Dict[str, List[Any]]:
+    """JSON-ready parallel arrays; NaN becomes null."""
+    output = {}
+    for field, values in columns.items():
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            as_list = values.astype(object)
+            as_list[np.isnan(values)] = None
+            output[field] = as_list.tolist()
+        else:
+            output[field] = values.tolist()
+    return output
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str] = None) -> str:
+    """
+    Pick the response format from the `format` parameter and Accept header.
+
+    A binary media type in Accept wins when its encoder is installed;
+    otherwise the `format` parameter (default rows) is used.
+    """
+    accept = (accept or "").lower()
+    if ARROW_MEDIA_TYPE in accept and pa is not None:
+        return ARROW
+    if msgpack is not None and any(m in accept for m in MSGPACK_MEDIA_TYPES):
+        return MSGPACK
+    return COLUMNAR if requested == COLUMNAR else ROWS
+
+
+def encode_arrow(
+    columns: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> bytes:
+    """Arrow IPC stream with one record batch; metadata goes in the schema."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    table = pa.table({field: np.asarray(v) for field, v in columns.items()})
+    table = table.replace_schema_metadata(
+        {"metadata": json.dumps(metadata, default=str)}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(
+    columns: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> bytes:
+    """MessagePack map of metadata plus parallel column arrays."""
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    payload = dict(metadata)
+    payload["columns"] = columns_to_lists(columns)
+    return msgpack.packb(payload, default=str, use_bin_type=True)
+
+
+def binary_response(
+    fmt: str, columns: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> Response:
+    """Encode columns as Arrow IPC or MessagePack."""
+    if fmt == ARROW:
+        return Response(
+            encode_arrow(columns, metadata), media_type=ARROW_MEDIA_TYPE
+        )
+    return Response(
+        encode_msgpack(columns, metadata), media_type=MSGPACK_MEDIA_TYPES[0]
+    )
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+
+def _synthetic_columns(n_bars: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    start = np.datetime64("2015-01-02T09:30:00")
+    timestamps = start + np.arange(n_bars) * np.timedelta64(1, "m")
+    return {
+        "timestamp": np.datetime_as_string(timestamps, unit="s").astype(object),
+        "open": close * (1 + rng.normal(0, 0.0002, n_bars)),
+        "high": close * 1.001,
+        "low": close * 0.999,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, n_bars),
+    }
+
+
+def benchmark_serialization(
+    n_bars: int = 100_000, max_points: int = 2_000, seed: int = 0
+) -> Dict[str, Dict[str, float]]:
+    """
+    Serialization time and payload size for one history response.
+
+    Compares the per-bar JSON rows with stringified prices (the default
+    format) against columnar JSON, MessagePack and Arrow IPC (when
+    installed) and columnar JSON after LTTB downsampling to `max_points`.
+
+    Returns:
+        {format: {"milliseconds": ..., "bytes": ...}}
+    """
+    columns = _synthetic_columns(n_bars, seed)
+    metadata = {"symbol": "BENCH", "interval": "1m", "total_bars": n_bars}
+
+    def rows() -> bytes:
+        fields = list(columns)
+        arrays = [
+            columns[f].astype(str).tolist()
+            if f in PRICE_FIELDS
+            else columns[f].tolist()
+            for f in fields
+        ]
+        bars = [dict(zip(fields, row)) for row in zip(*arrays)]
+        return json.dumps({**metadata, "bars": bars}).encode()
+
+    def columnar() -> bytes:
+        return json.dumps({**metadata, "columns": columns_to_lists(columns)}).encode()
+
+    def downsampled() -> bytes:
+        reduced = downsample_columns(columns, max_points)
+        return json.dumps({**metadata, "columns": columns_to_lists(reduced)}).encode()
+
+    encoders = {"rows_json": rows, "columnar_json": columnar}
+    if msgpack is not None:
+        encoders["msgpack"] = lambda: encode_msgpack(columns, metadata)
+    if pa is not None:
+        encoders["arrow_ipc"] = lambda: encode_arrow(columns, metadata)
+    encoders[f"lttb_{max_points}_columnar_json"] = downsampled
+
+    results = {}
+    for name, encode in encoders.items():
+        start = time.perf_counter()
+        body = encode()
+        results[name] = {
+            "milliseconds": (time.perf_counter() - start) * 1000,
+            "bytes": len(body),
+        }
+    return results
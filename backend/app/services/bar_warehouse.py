@@ -0,0 +1,540 @@
+"""
+Local time-series warehouse for OHLCV bars.
+
+Bars are stored per (symbol, timeframe) as a flat file of fixed-width
+records (int64 nanosecond timestamp plus float64 OHLCV), sorted by time and
+memory-mapped for reads. Range queries binary-search the timestamp column
+and return slices of the mapping, so multi-year loads copy nothing.
+
+Ingestion is append-only: new bars are written to the end of the file and
+re-fetched bars that overlap the tail (e.g. today's unfinished daily bar)
+are overwritten in place. Anything that would reorder existing records
+(backfills, pruning) writes a new file and swaps it in atomically, so
+readers holding an older mapping are never truncated underneath.
+
+Minute bars can be compacted into hourly and daily series, after which the
+compacted minute history can be pruned.
+
+Timestamps are stored as given by the provider; naive timestamps are
+treated as UTC. One writer process per warehouse directory is assumed.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BAR_DTYPE = np.dtype(
+    [
+        ("ts", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+FILE_SUFFIX = ".bars"
+
+_MINUTE_NS = 60 * 1_000_000_000
+TIMEFRAME_NS = {
+    "1min": _MINUTE_NS,
+    "5min": 5 * _MINUTE_NS,
+    "15min": 15 * _MINUTE_NS,
+    "30min": 30 * _MINUTE_NS,
+    "60min": 60 * _MINUTE_NS,
+    "1day": 24 * 60 * _MINUTE_NS,
+}
+
+# (source, target, bucket offset): hourly buckets start on the half hour to
+# line up with a 9:30 session open, as provider hourly bars do
+COMPACTION_CHAIN = (
+    ("1min", "60min", 30 * _MINUTE_NS),
+    ("60min", "1day", 0),
+)
+
+TimeLike = Union[str, datetime, np.datetime64, pd.Timestamp, int]
+
+
+def to_nanoseconds(value: TimeLike) -> int:
+    """Epoch nanoseconds for a timestamp; naive values are taken as UTC."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    return int(stamp.as_unit("ns").value)
+
+
+def to_records(bars: Union[np.ndarray, Sequence[Dict[str, Any]]]) -> np.ndarray:
+    """
+    Normalize bars to sorted, de-duplicated warehouse records.
+
+    Args:
+        bars: Structured array of BAR_DTYPE, or provider bar dicts with
+            timestamp/open/high/low/close/volume (any order, any supported
+            timestamp format)
+
+    Returns:
+        Records sorted by timestamp; for duplicate timestamps the last bar
+        wins, and bars without a timestamp or close are dropped
+    """
+    if isinstance(bars, np.ndarray) and bars.dtype == BAR_DTYPE:
+        records = bars
+    else:
+        bars = list(bars)
+        records = np.empty(len(bars), dtype=BAR_DTYPE)
+        if not bars:
+            return records
+        stamps = pd.to_datetime(
+            [b.get("timestamp") for b in bars],
+            utc=True,
+            format="ISO8601",
+            errors="coerce",
+        )
+        # pandas may infer a coarser unit (e.g. us under pandas 3); the
+        # warehouse always stores epoch nanoseconds
+        records["ts"] = stamps.as_unit("ns").asi8
+        for field in PRICE_FIELDS:
+            records[field] = [
+                np.nan if b.get(field) is None else b[field] for b in bars
+            ]
+        valid = ~np.asarray(stamps.isna()) & ~np.isnan(records["close"])
+        records = records[valid]
+
+    if len(records) == 0:
+        return records
+    order = np.argsort(records["ts"], kind="stable")
+    records = records[order]
+    ts = records["ts"]
+    keep_last = np.append(ts[1:] != ts[:-1], True)
+    return records[keep_last]
+
+
+def aggregate_records(
+    records: np.ndarray, step_ns: int, offset_ns: int = 0
+) -> np.ndarray:
+    """
+    Resample sorted records into buckets of `step_ns`.
+
+    Open is the first bar's open, close the last bar's close, high/low the
+    NaN-ignoring extremes and volume the sum. Buckets are labelled by their
+    start time, shifted by `offset_ns` from the epoch grid.
+    """
+    if len(records) == 0:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    bucket = (records["ts"] - offset_ns) // step_ns * step_ns + offset_ns
+    starts = np.flatnonzero(np.append(True, bucket[1:] != bucket[:-1]))
+    ends = np.append(starts[1:], len(records)) - 1
+
+    output = np.empty(len(starts), dtype=BAR_DTYPE)
+    output["ts"] = bucket[starts]
+    output["open"] = records["open"][starts]
+    output["close"] = records["close"][ends]
+    output["high"] = np.fmax.reduceat(records["high"], starts)
+    output["low"] = np.fmin.reduceat(records["low"], starts)
+    output["volume"] = np.add.reduceat(np.nan_to_num(records["volume"]), starts)
+    return output
+
+
+def records_to_bars(
+    records: np.ndarray, source: str = "warehouse"
+) -> List[Dict[str, Any]]:
+    """Records as the per-bar dicts returned by market data providers."""
+    if len(records) == 0:
+        return []
+    stamps = np.datetime_as_string(records["ts"].astype("datetime64[ns]"), unit="s")
+    stamps = np.char.replace(stamps, "T", " ").tolist()
+    opens, highs, lows, closes = (records[f].tolist() for f in PRICE_FIELDS[:4])
+    volumes = np.nan_to_num(records["volume"]).astype(np.int64).tolist()
+    return [
+        {
+            "timestamp": stamp,
+            "open": o,
+            "high": h,
+            "low": low,
+            "close": c,
+            "volume": v,
+            "source": source,
+        }
+        for stamp, o, h, low, c, v in zip(stamps, opens, highs, lows, closes, volumes)
+    ]
+
+
+def records_to_columns(records: np.ndarray) -> Dict[str, np.ndarray]:
+    """Records as parallel column arrays; price columns are views, not copies."""
+    columns = {
+        "timestamp": np.datetime_as_string(
+            records["ts"].astype("datetime64[ns]"), unit="s"
+        ).astype(object)
+    }
+    for field in PRICE_FIELDS:
+        columns[field] = records[field]
+    return columns
+
+
+class BarWarehouse:
+    """
+    Memory-mapped OHLCV store partitioned by timeframe and symbol.
+
+    Layout: ``<root>/<timeframe>/<SYMBOL>.bars``. The file's modification
+    time records when the series was last synced with a provider.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._maps: Dict[Tuple[str, str], Tuple[tuple, np.ndarray]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        name = symbol.upper().replace(os.sep, "_") + FILE_SUFFIX
+        return os.path.join(self.root_dir, timeframe, name)
+
+    def _lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _open(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Read-only mapping of a series, re-mapped when the file changes."""
+        key = (symbol.upper(), timeframe)
+        path = self._path(symbol, timeframe)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._maps.pop(key, None)
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        # A torn trailing record from an interrupted write is ignored
+        count = stat.st_size // BAR_DTYPE.itemsize
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if count == 0:
+            records = np.empty(0, dtype=BAR_DTYPE)
+        else:
+            records = np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+        self._maps[key] = (signature, records)
+        return records
+
+    def _replace(self, path: str, records: np.ndarray) -> None:
+        """Write a whole series to a new file and swap it in."""
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(np.ascontiguousarray(records).tobytes())
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        symbol: str,
+        timeframe: str,
+        bars: Union[np.ndarray, Sequence[Dict[str, Any]]],
+    ) -> int:
+        """
+        Ingest bars into a series.
+
+        Bars newer than the stored tail are appended; bars that re-cover the
+        tail with the same timestamps overwrite it in place. Anything else
+        (gaps filled inside or before the stored range) rewrites the series.
+
+        Args:
+            symbol: Ticker symbol
+            timeframe: Bar size, e.g. "1min" or "1day"
+            bars: Provider bar dicts or records
+
+        Returns:
+            Number of bars written
+        """
+        new = to_records(bars)
+        if len(new) == 0:
+            return 0
+
+        key = (symbol.upper(), timeframe)
+        path = self._path(symbol, timeframe)
+        with self._lock(key):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existing = self._open(symbol, timeframe)
+            start = (
+                int(np.searchsorted(existing["ts"], new["ts"][0], side="left"))
+                if len(existing)
+                else 0
+            )
+            tail = existing[start:]
+            size = len(existing) * BAR_DTYPE.itemsize
+
+            if len(tail) == 0:
+                self._write_at(path, size, new)
+            elif len(tail) <= len(new) and np.array_equal(
+                tail["ts"], new["ts"][: len(tail)]
+            ):
+                self._write_at(path, start * BAR_DTYPE.itemsize, new)
+            else:
+                merged = to_records(np.concatenate([tail, new]))
+                self._replace(path, np.concatenate([existing[:start], merged]))
+        return len(new)
+
+    @staticmethod
+    def _write_at(path: str, offset: int, records: np.ndarray) -> None:
+        mode = "r+b" if os.path.exists(path) else "wb"
+        with open(path, mode) as fh:
+            fh.seek(offset)
+            fh.write(np.ascontiguousarray(records).tobytes())
+
+    def mark_synced(self, symbol: str, timeframe: str) -> None:
+        """Record a provider sync that brought no new bars."""
+        path = self._path(symbol, timeframe)
+        if os.path.exists(path):
+            os.utime(path)
+
+    def prune(self, symbol: str, timeframe: str, before: TimeLike) -> int:
+        """Drop bars older than `before`; returns the number removed."""
+        key = (symbol.upper(), timeframe)
+        with self._lock(key):
+            existing = self._open(symbol, timeframe)
+            cut = int(
+                np.searchsorted(existing["ts"], to_nanoseconds(before), side="left")
+            )
+            if cut == 0:
+                return 0
+            self._replace(self._path(symbol, timeframe), existing[cut:])
+        return cut
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[TimeLike] = None,
+        end: Optional[TimeLike] = None,
+        limit: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Bars with start <= timestamp <= end, as a view of the mapped file.
+
+        Args:
+            symbol: Ticker symbol
+            timeframe: Bar size
+            start: Inclusive lower bound (None for the beginning)
+            end: Inclusive upper bound (None for the latest bar)
+            limit: Keep only the last `limit` bars of the range
+
+        Returns:
+            Structured array of BAR_DTYPE (empty if nothing is stored)
+        """
+        records = self._open(symbol, timeframe)
+        ts = records["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, to_nanoseconds(start)))
+        hi = (
+            len(records)
+            if end is None
+            else int(np.searchsorted(ts, to_nanoseconds(end), side="right"))
+        )
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return records[lo:hi]
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        return len(self._open(symbol, timeframe))
+
+    def symbols(self, timeframe: str) -> List[str]:
+        """Symbols stored for a timeframe."""
+        directory = os.path.join(self.root_dir, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            name[: -len(FILE_SUFFIX)]
+            for name in os.listdir(directory)
+            if name.endswith(FILE_SUFFIX)
+        )
+
+    def bars_behind(
+        self,
+        symbol: str,
+        timeframe: str,
+        refresh_seconds: float = 60.0,
+        now: Optional[TimeLike] = None,
+    ) -> Optional[int]:
+        """
+        How many bars a provider sync should fetch to bring a series current.
+
+        Returns 0 when the series was synced within `refresh_seconds`, or
+        when its newest bar is complete and no newer period has started. A
+        newest bar last synced before its period ended (e.g. today's daily
+        bar during the session) counts as one bar behind.
+
+        Returns:
+            Bars to fetch, or None if the series is empty
+        """
+        records = self._open(symbol, timeframe)
+        if len(records) == 0:
+            return None
+
+        now_ns = to_nanoseconds(now if now is not None else pd.Timestamp.now(tz="UTC"))
+        synced_ns = os.stat(self._path(symbol, timeframe)).st_mtime_ns
+        if now_ns - synced_ns < refresh_seconds * 1_000_000_000:
+            return 0
+
+        last = int(records["ts"][-1])
+        step = TIMEFRAME_NS.get(timeframe, TIMEFRAME_NS["1day"])
+        if step >= TIMEFRAME_NS["1day"]:
+            last_day = np.datetime64(last, "ns").astype("datetime64[D]")
+            today = np.datetime64(now_ns, "ns").astype("datetime64[D]")
+            behind = int(np.busday_count(last_day + 1, today + 1))
+        else:
+            behind = max(0, (now_ns - last) // step)
+
+        if behind == 0 and synced_ns < last + step:
+            return 1
+        return behind
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def compact(
+        self, symbol: str, source: str, target: str, offset_ns: int = 0
+    ) -> int:
+        """
+        Roll `source` bars up into the `target` timeframe.
+
+        Incremental: only source bars from the start of the target's last
+        (possibly partial) bucket onwards are re-aggregated.
+
+        Returns:
+            Number of target bars written
+        """
+        step = TIMEFRAME_NS[target]
+        existing = self._open(symbol, target)
+        start = int(existing["ts"][-1]) if len(existing) else None
+        records = self.read(symbol, source, start=start)
+        if len(records) == 0:
+            return 0
+        return self.append(symbol, target, aggregate_records(records, step, offset_ns))
+
+    def compact_all(
+        self,
+        chain: Iterable[Tuple[str, str, int]] = COMPACTION_CHAIN,
+        retain_days: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, int]:
+        """
+        Run the compaction chain for every stored symbol.
+
+        Args:
+            chain: (source, target, bucket offset) steps, in order
+            retain_days: Per source timeframe, days of already-compacted
+                history to keep; older source bars are pruned
+
+        Returns:
+            Target bars written per "source->target" step
+        """
+        retain_days = retain_days or {}
+        written = {}
+        for source, target, offset_ns in chain:
+            total = 0
+            for symbol in self.symbols(source):
+                total += self.compact(symbol, source, target, offset_ns)
+                days = retain_days.get(source)
+                if days is None:
+                    continue
+                compacted = self._open(symbol, target)
+                if len(compacted) == 0:
+                    continue
+                # Never prune past the bucket that may still be re-aggregated
+                horizon = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+                cutoff = min(int(compacted["ts"][-1]), to_nanoseconds(horizon))
+                self.prune(symbol, source, cutoff)
+            written[f"{source}->{target}"] = total
+        logger.info(f"Bar warehouse compaction complete: {written}")
+        return written
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+
+def benchmark_warehouse(
+    root_dir: str, n_bars: int = 1_000_000, seed: int = 0
+) -> Dict[str, float]:
+    """
+    Ingest, full-range read and compaction timings for one minute series.
+
+    Returns:
+        {"append_seconds", "read_seconds", "range_seconds", "compact_seconds"}
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, n_bars)))
+    records = np.empty(n_bars, dtype=BAR_DTYPE)
+    records["ts"] = to_nanoseconds("2015-01-02") + np.arange(n_bars) * _MINUTE_NS
+    records["open"] = close
+    records["high"] = close * 1.0005
+    records["low"] = close * 0.9995
+    records["close"] = close
+    records["volume"] = rng.integers(100, 10_000, n_bars)
+
+    warehouse = BarWarehouse(root_dir)
+    timings = {}
+
+    start = time.perf_counter()
+    warehouse.append("BENCH", "1min", records)
+    timings["append_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    float(warehouse.read("BENCH", "1min")["close"].sum())
+    timings["read_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warehouse.read("BENCH", "1min", start="2016-01-01", end="2016-02-01")
+    timings["range_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warehouse.compact("BENCH", "1min", "60min", 30 * _MINUTE_NS)
+    warehouse.compact("BENCH", "60min", "1day")
+    timings["compact_seconds"] = time.perf_counter() - start
+    return timings
+
+
+# Global warehouse instance
+_bar_warehouse_instance = None
+
+
+def get_bar_warehouse() -> BarWarehouse:
+    """Get the global bar warehouse instance."""
+    global _bar_warehouse_instance
+    if _bar_warehouse_instance is None:
+        _bar_warehouse_instance = BarWarehouse(
+            getattr(settings, "BAR_WAREHOUSE_DIR", "./data/bars")
+        )
+    return _bar_warehouse_instance
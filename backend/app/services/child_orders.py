@@ -0,0 +1,441 @@
+"""
+Child-order pipeline for large parent orders.
+
+A chunked parent order is executed from a schedule computed up front. All
+child trades are written in one flush and committed before the first
+broker call, so no transaction stays open while orders are in flight.
+Each child carries the time it is due, taken from the execution
+algorithm's schedule (TWAP spacing, VWAP volume slots). Children are then
+submitted concurrently by a small pool of workers, each waiting until its
+child is due. The pool bounds how many orders are outstanding at once, and
+a token bucket bounds the submission rate. Fills are buffered and written
+back with one bulk update and commit per batch instead of one commit per
+child; each batch is booked into holdings and cash in the same commit and
+then applied to the live portfolio valuation.
+
+Progress for every parent order lives in memory. It can be read back
+through the tracker, and is pushed to the owner's trading WebSocket after
+each batch of fills and when the parent order completes.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.trade import Trade, TradeSource, TradeStatus
+from app.services.fill_booking import Fill, book_fills, publish_fills
+from app.services.portfolio_valuation import PortfolioValuationEngine
+
+logger = logging.getLogger(__name__)
+
+# Submits one child order and returns the broker result dict
+SubmitFn = Callable[["ChildOrder"], Awaitable[Dict[str, Any]]]
+# Receives (user_id, progress payload)
+NotifyFn = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class ChildOrder:
+    """One scheduled slice of a parent order."""
+
+    index: int
+    trade_id: str
+    symbol: str
+    quantity: Decimal
+    due_at: float = 0.0  # seconds after the schedule starts
+
+
+@dataclass
+class ChildOrderProgress:
+    """Live execution state of a parent order's children."""
+
+    parent_id: str
+    user_id: int
+    symbol: str
+    strategy: str
+    total_children: int
+    total_quantity: Decimal
+    portfolio_id: Optional[int] = None
+    side: str = "buy"
+    submitted: int = 0
+    filled: int = 0
+    rejected: int = 0
+    filled_quantity: Decimal = Decimal("0")
+    notional: Decimal = Decimal("0")
+    status: str = "running"
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    @property
+    def completed(self) -> int:
+        """Children with a final result."""
+        return self.filled + self.rejected
+
+    @property
+    def average_price(self) -> Decimal:
+        """Volume-weighted fill price so far."""
+        if self.filled_quantity <= 0:
+            return Decimal("0")
+        return self.notional / self.filled_quantity
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot, used for WebSocket updates."""
+        return {
+            "order_id": self.parent_id,
+            "symbol": self.symbol,
+            "strategy": self.strategy,
+            "status": self.status,
+            "total_children": self.total_children,
+            "submitted": self.submitted,
+            "filled": self.filled,
+            "rejected": self.rejected,
+            "total_quantity": float(self.total_quantity),
+            "filled_quantity": float(self.filled_quantity),
+            "average_price": float(self.average_price),
+            "percent_complete": (
+                100.0 * self.completed / self.total_children
+                if self.total_children
+                else 100.0
+            ),
+            "started_at": self.started_at.isoformat(),
+            "finished_at": (self.finished_at.isoformat() if self.finished_at else None),
+        }
+
+
+class ChildOrderTracker:
+    """In-memory registry of parent order progress."""
+
+    def __init__(self, max_finished: int = 500):
+        """Keep every running order and the latest ``max_finished`` others."""
+        self.max_finished = max_finished
+        self._orders: "OrderedDict[str, ChildOrderProgress]" = OrderedDict()
+
+    def register(self, progress: ChildOrderProgress) -> None:
+        """Start tracking a parent order."""
+        self._orders[progress.parent_id] = progress
+        self._orders.move_to_end(progress.parent_id)
+        self._evict()
+
+    def get(self, parent_id: str) -> Optional[ChildOrderProgress]:
+        """Progress of a parent order, if it is known."""
+        return self._orders.get(str(parent_id))
+
+    def active(self, user_id: Optional[int] = None) -> List[ChildOrderProgress]:
+        """Parent orders still executing, optionally for one user."""
+        return [
+            p
+            for p in self._orders.values()
+            if p.status == "running" and (user_id is None or p.user_id == user_id)
+        ]
+
+    def _evict(self) -> None:
+        finished = [p.parent_id for p in self._orders.values() if p.status != "running"]
+        for parent_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._orders[parent_id]
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+
+class OrderRateLimiter:
+    """Token bucket limiting order submissions per second."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        """Allow ``burst`` orders at once, refilled at ``rate_per_second``."""
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        self.rate = float(rate_per_second)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token. Returns the time spent waiting in seconds."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            wait_time = 0.0
+            if self._tokens < 1.0:
+                wait_time = (1.0 - self._tokens) / self.rate
+                # Holding the lock keeps waiters in FIFO order
+                await asyncio.sleep(wait_time)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+
+            self._tokens -= 1.0
+            return wait_time
+
+
+async def push_progress(user_id: int, payload: Dict[str, Any]) -> None:
+    """Send a progress snapshot to the user's trading WebSocket."""
+    # Imported here: the WebSocket routes import services at module load
+    from app.routes.websocket.trading_updates import get_trading_ws_manager
+
+    await get_trading_ws_manager().send_order_status_update(user_id, payload)
+
+
+class ChildOrderPipeline:
+    """Executes a parent order's children from a precomputed schedule."""
+
+    def __init__(
+        self,
+        db: Session,
+        submit: SubmitFn,
+        max_in_flight: int = 8,
+        rate_limiter: Optional[OrderRateLimiter] = None,
+        fill_batch_size: int = 50,
+        notify: Optional[NotifyFn] = None,
+        tracker: Optional[ChildOrderTracker] = None,
+        valuation: Optional[PortfolioValuationEngine] = None,
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            db: Database session for child trades
+            submit: Coroutine placing one child order with the broker
+            max_in_flight: Maximum number of unanswered broker calls
+            rate_limiter: Optional limit on submissions per second
+            fill_batch_size: Fills buffered before each database write
+            notify: Coroutine receiving progress snapshots, such as
+                push_progress
+            tracker: Registry for progress; defaults to the global one
+            valuation: Live valuation receiving committed fills; defaults
+                to the global engine
+        """
+        self.db = db
+        self.submit = submit
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.rate_limiter = rate_limiter
+        self.fill_batch_size = max(1, int(fill_batch_size))
+        self.notify = notify
+        self.tracker = tracker if tracker is not None else get_child_order_tracker()
+        self.valuation = valuation
+
+    def build_schedule(
+        self,
+        parent: Trade,
+        chunk_sizes: List[Decimal],
+        offsets: Optional[List[float]] = None,
+    ) -> List[ChildOrder]:
+        """Create and commit one pending child trade per chunk.
+
+        ``offsets`` gives each chunk's due time in seconds after the start;
+        without it every chunk is due at once.
+        """
+        total = len(chunk_sizes)
+        if offsets is None:
+            offsets = [0.0] * total
+        elif len(offsets) != total:
+            raise ValueError("offsets must match chunk_sizes")
+        now = datetime.utcnow()
+        children = [
+            Trade(
+                user_id=parent.user_id,
+                portfolio_id=parent.portfolio_id,
+                symbol=parent.symbol,
+                quantity=size,
+                price=parent.price,
+                trade_type=parent.trade_type,
+                order_type=parent.order_type,
+                status=TradeStatus.PENDING,
+                is_fractional=parent.is_fractional,
+                trade_source=parent.trade_source or TradeSource.MANUAL,
+                parent_order_id=parent.id,
+                notes=f"chunk_{i+1}_of_{total}",
+                created_at=now,
+            )
+            for i, size in enumerate(chunk_sizes)
+        ]
+        self.db.add_all(children)
+        self.db.flush()  # To get the IDs
+        schedule = [
+            ChildOrder(i, child.id, parent.symbol, Decimal(str(size)), float(due))
+            for i, (child, size, due) in enumerate(zip(children, chunk_sizes, offsets))
+        ]
+        self.db.commit()
+        return schedule
+
+    async def run(
+        self,
+        parent: Trade,
+        chunk_sizes: List[Decimal],
+        strategy: str = "twap",
+        offsets: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Execute all chunks of ``parent``.
+
+        Args:
+            parent: Parent trade
+            chunk_sizes: Quantity of each child
+            strategy: Execution strategy name, for progress reports
+            offsets: Due time of each child in seconds after the start,
+                in ascending order
+
+        Returns:
+            One dict per filled child, in schedule order
+        """
+        schedule = self.build_schedule(parent, chunk_sizes, offsets)
+        progress = ChildOrderProgress(
+            parent_id=str(parent.id),
+            user_id=parent.user_id,
+            symbol=parent.symbol,
+            strategy=strategy,
+            total_children=len(schedule),
+            total_quantity=sum((c.quantity for c in schedule), Decimal("0")),
+            portfolio_id=parent.portfolio_id,
+            side=str(getattr(parent.trade_type, "value", parent.trade_type)),
+        )
+        self.tracker.register(progress)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for child in schedule:
+            queue.put_nowait(child)
+
+        fills: Dict[int, Dict[str, Any]] = {}
+        pending_rows: List[Dict[str, Any]] = []
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        async def worker():
+            while True:
+                try:
+                    child = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                # Wait for the child's slot before taking a rate-limit token
+                delay = started + child.due_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire()
+                progress.submitted += 1
+                try:
+                    result = await self.submit(child)
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
+
+                pending_rows.append(self._record(child, result, progress, fills))
+                if len(pending_rows) >= self.fill_batch_size:
+                    await self._flush(pending_rows, progress)
+
+        try:
+            workers = min(self.max_in_flight, len(schedule))
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            progress.status = "completed" if progress.filled else "rejected"
+        except Exception:
+            progress.status = "error"
+            raise
+        finally:
+            progress.finished_at = datetime.utcnow()
+            await self._flush(pending_rows, progress, force=True)
+
+        return [fills[i] for i in sorted(fills)]
+
+    def _record(
+        self,
+        child: ChildOrder,
+        result: Dict[str, Any],
+        progress: ChildOrderProgress,
+        fills: Dict[int, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Apply one broker result to progress and return its row update."""
+        if not result.get("success"):
+            progress.rejected += 1
+            logger.error(
+                f"Child {child.index + 1}/{progress.total_children} of "
+                f"{progress.parent_id} failed: {result.get('error')}"
+            )
+            return {
+                "id": child.trade_id,
+                "status": TradeStatus.REJECTED,
+                "notes": f"Failed: {result.get('error', 'Unknown error')}",
+            }
+
+        quantity = Decimal(str(result.get("filled_quantity", child.quantity)))
+        price = Decimal(str(result["average_price"]))
+        progress.filled += 1
+        progress.filled_quantity += quantity
+        progress.notional += quantity * price
+
+        fills[child.index] = {
+            "chunk_id": child.trade_id,
+            "quantity": float(quantity),
+            "price": float(price),
+            "broker_order_id": result.get("order_id"),
+        }
+        executed_at = datetime.utcnow()
+        return {
+            "id": child.trade_id,
+            "status": TradeStatus.FILLED,
+            "filled_quantity": float(quantity),
+            "filled_price": float(price),
+            "total_amount": float(quantity * price),
+            "commission": float(result.get("commission") or 0),
+            "broker_order_id": result.get("order_id"),
+            "executed_at": executed_at,
+            "filled_at": executed_at,
+        }
+
+    async def _flush(
+        self,
+        rows: List[Dict[str, Any]],
+        progress: ChildOrderProgress,
+        force: bool = False,
+    ) -> None:
+        """Write buffered child updates in one commit and report progress.
+
+        Fills in the batch are booked into holdings and cash in the same
+        commit, then applied to the live portfolio valuation.
+        """
+        if rows:
+            batch = list(rows)
+            rows.clear()
+            booked = [
+                Fill.of(
+                    progress.portfolio_id,
+                    progress.symbol,
+                    progress.side,
+                    row["filled_quantity"],
+                    row["filled_price"],
+                    row["commission"],
+                )
+                for row in batch
+                if row["status"] == TradeStatus.FILLED
+            ]
+            self.db.bulk_update_mappings(Trade, batch)
+            book_fills(self.db, booked)
+            self.db.commit()
+            publish_fills(booked, self.valuation)
+        elif not force:
+            return
+
+        if self.notify is None:
+            return
+        try:
+            await self.notify(progress.user_id, progress.to_dict())
+        except Exception as e:
+            logger.warning(f"Failed to push progress for {progress.parent_id}: {e}")
+
+
+# Global instance
+_child_order_tracker_instance = None
+
+
+def get_child_order_tracker() -> ChildOrderTracker:
+    """Get the global child order tracker instance."""
+    global _child_order_tracker_instance
+    if _child_order_tracker_instance is None:
+        _child_order_tracker_instance = ChildOrderTracker()
+    return _child_order_tracker_instance
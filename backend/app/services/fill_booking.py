@@ -0,0 +1,170 @@
+"""
+Booking of executed fills into holdings and portfolio cash.
+
+Execution paths that fill many orders at once, such as the children of a
+chunked parent order or a netted aggregation cycle, book their fills here
+in bulk. The affected holdings and portfolios are read with one query
+each and updated inside the caller's transaction, following the same
+rules as a single trade: buys blend the average cost, sells reduce the
+position and drop it once it is closed, and cash moves by the notional
+and commission.
+
+Quantities and cash in the database are the source of truth for the live
+valuation engine. Callers therefore commit first and then pass the same
+fills to ``publish_fills``, which keeps tracked portfolios in step.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from app.models.holding import Holding
+from app.models.portfolio import Portfolio
+from app.services.portfolio_valuation import (
+    PortfolioValuationEngine,
+    get_valuation_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Fill:
+    """One executed fill against a portfolio."""
+
+    portfolio_id: int
+    symbol: str
+    side: str
+    quantity: float
+    price: float
+    commission: float = 0.0
+
+    @classmethod
+    def of(
+        cls,
+        portfolio_id: int,
+        symbol: str,
+        side,
+        quantity,
+        price,
+        commission=0.0,
+    ) -> "Fill":
+        """Build a fill from ORM values (enums, Decimals)."""
+        return cls(
+            portfolio_id=portfolio_id,
+            symbol=symbol,
+            side=str(getattr(side, "value", side)).lower(),
+            quantity=float(quantity),
+            price=float(price),
+            commission=float(commission or 0.0),
+        )
+
+
+def book_fills(db: Session, fills: Iterable[Fill]) -> int:
+    """
+    Apply fills to holdings and cash without committing.
+
+    Returns:
+        Number of fills booked
+    """
+    fills = [f for f in fills if f.portfolio_id is not None and f.quantity > 0]
+    if not fills:
+        return 0
+
+    portfolio_ids = {f.portfolio_id for f in fills}
+    keys = {(f.portfolio_id, f.symbol) for f in fills}
+    portfolios = {
+        p.id: p
+        for p in db.query(Portfolio).filter(Portfolio.id.in_(portfolio_ids)).all()
+    }
+    holdings: Dict[Tuple[int, str], Holding] = {
+        (h.portfolio_id, h.symbol): h
+        for h in db.query(Holding)
+        .filter(tuple_(Holding.portfolio_id, Holding.symbol).in_(list(keys)))
+        .all()
+    }
+
+    booked = 0
+    for fill in fills:
+        portfolio = portfolios.get(fill.portfolio_id)
+        if portfolio is None:
+            logger.error(
+                f"Portfolio {fill.portfolio_id} not found for {fill.symbol} fill"
+            )
+            continue
+
+        key = (fill.portfolio_id, fill.symbol)
+        holding = holdings.get(key)
+        notional = fill.quantity * fill.price
+        if fill.side == "buy":
+            if holding is None:
+                holding = Holding(
+                    portfolio_id=fill.portfolio_id,
+                    symbol=fill.symbol,
+                    asset_type="stock",
+                    quantity=0.0,
+                    average_cost=fill.price,
+                    current_price=fill.price,
+                    market_value=0.0,
+                )
+                db.add(holding)
+                holdings[key] = holding
+            cost = float(holding.quantity) * float(holding.average_cost) + notional
+            holding.quantity = float(holding.quantity) + fill.quantity
+            holding.average_cost = cost / holding.quantity
+            portfolio.cash_balance = (
+                float(portfolio.cash_balance or 0.0) - notional - fill.commission
+            )
+        else:
+            if holding is None or holding.quantity < fill.quantity:
+                # The broker has already filled it, so record it anyway
+                logger.warning(
+                    f"Sell of {fill.quantity} {fill.symbol} exceeds holding in "
+                    f"portfolio {fill.portfolio_id}"
+                )
+            if holding is not None:
+                holding.quantity = float(holding.quantity) - fill.quantity
+            portfolio.cash_balance = (
+                float(portfolio.cash_balance or 0.0) + notional - fill.commission
+            )
+
+        if holding is not None:
+            if holding.quantity <= 0:
+                if holding in db.new:
+                    db.expunge(holding)
+                else:
+                    db.delete(holding)
+                del holdings[key]
+            else:
+                holding.current_price = fill.price
+                holding.market_value = holding.quantity * fill.price
+        booked += 1
+
+    return booked
+
+
+def publish_fills(
+    fills: Iterable[Fill], engine: Optional[PortfolioValuationEngine] = None
+) -> int:
+    """
+    Pass committed fills to the live valuation engine.
+
+    Returns:
+        Number of fills applied to tracked portfolios
+    """
+    engine = engine if engine is not None else get_valuation_engine()
+    return sum(
+        engine.apply_fill(
+            fill.portfolio_id,
+            fill.symbol,
+            fill.side,
+            fill.quantity,
+            fill.price,
+            fill.commission,
+        )
+        for fill in fills
+        if fill.portfolio_id is not None
+    )
@@ -459,18 +459,19 @@ def check_surrender_charge_warning(
     )
 
 
+GUARANTEED_RETURN_PATTERNS = [
+    r"guarantee[ds]?\s+(a\s+)?return",
+    r"guaranteed\s+\d+%",
+    r"will\s+earn\s+\d+%",
+    r"certain\s+to\s+(earn|grow|increase)",
+    r"risk[- ]free\s+(return|investment|growth)",
+    r"cannot\s+lose\s+(money|value|principal)",
+]
+
+
 def check_no_guaranteed_returns(response: InsuranceResponseContext) -> tuple[bool, str]:
     """Block responses that guarantee returns"""
-    prohibited_patterns = [
-        r"guarantee[ds]?\s+(a\s+)?return",
-        r"guaranteed\s+\d+%",
-        r"will\s+earn\s+\d+%",
-        r"certain\s+to\s+(earn|grow|increase)",
-        r"risk[- ]free\s+(return|investment|growth)",
-        r"cannot\s+lose\s+(money|value|principal)",
-    ]
-
-    for pattern in prohibited_patterns:
+    for pattern in GUARANTEED_RETURN_PATTERNS:
         if re.search(pattern, response.response_text.lower()):
             return False, (
                 "BLOCKED: Response contains prohibited guaranteed return language. "
@@ -481,19 +482,20 @@ def check_no_guaranteed_returns(response: InsuranceResponseContext) -> tuple[boo
     return True, ""
 
 
+INVESTMENT_LANGUAGE_TERMS = [
+    "invest in this policy",
+    "portfolio of insurance",
+    "insurance investment",
+    "return on your insurance",
+]
+
+
 def check_no_investment_language(
     response: InsuranceResponseContext,
 ) -> tuple[bool, str]:
     """Avoid treating insurance as investment"""
-    investment_terms = [
-        "invest in this policy",
-        "portfolio of insurance",
-        "insurance investment",
-        "return on your insurance",
-    ]
-
     text_lower = response.response_text.lower()
-    for term in investment_terms:
+    for term in INVESTMENT_LANGUAGE_TERMS:
         if term in text_lower:
             return True, (
                 f"Note: Consider rephrasing '{term}'. Insurance products provide "
@@ -504,17 +506,18 @@ def check_no_investment_language(
     return True, ""
 
 
+CARRIER_RECOMMENDATION_PATTERNS = [
+    r"(you should|I recommend|best choice is)\s+[A-Z][a-z]+\s+(Life|Insurance)",
+    r"go with\s+[A-Z][a-z]+",
+    r"buy from\s+[A-Z][a-z]+",
+]
+
+
 def check_no_carrier_recommendations(
     response: InsuranceResponseContext,
 ) -> tuple[bool, str]:
     """Don't recommend specific carriers"""
-    recommendation_patterns = [
-        r"(you should|I recommend|best choice is)\s+[A-Z][a-z]+\s+(Life|Insurance)",
-        r"go with\s+[A-Z][a-z]+",
-        r"buy from\s+[A-Z][a-z]+",
-    ]
-
-    for pattern in recommendation_patterns:
+    for pattern in CARRIER_RECOMMENDATION_PATTERNS:
         if re.search(pattern, response.response_text):
             return True, (
                 "Note: Specific carrier recommendations require proper licensing "
@@ -525,15 +528,16 @@ def check_no_carrier_recommendations(
     return True, ""
 
 
+MEDICAL_ADVICE_PATTERNS = [
+    r"(don't|do not)\s+(disclose|mention|tell them about)",
+    r"hide\s+(your|the)\s+(condition|diagnosis|medication)",
+    r"(you can|should)\s+(lie|omit|leave out)",
+]
+
+
 def check_no_medical_advice(response: InsuranceResponseContext) -> tuple[bool, str]:
     """Block medical advice for underwriting"""
-    medical_advice_patterns = [
-        r"(don't|do not)\s+(disclose|mention|tell them about)",
-        r"hide\s+(your|the)\s+(condition|diagnosis|medication)",
-        r"(you can|should)\s+(lie|omit|leave out)",
-    ]
-
-    for pattern in medical_advice_patterns:
+    for pattern in MEDICAL_ADVICE_PATTERNS:
         if re.search(pattern, response.response_text.lower()):
             return False, (
                 "BLOCKED: Response may encourage non-disclosure of medical information. "
@@ -544,6 +548,15 @@ def check_no_medical_advice(response: InsuranceResponseContext) -> tuple[bool, s
     return True, ""
 
 
+PROJECTION_INDICATORS = [
+    "will grow to",
+    "projected value",
+    "at age",
+    "in 20 years",
+    "cash value of",
+]
+
+
 def check_illustration_disclaimer(
     response: InsuranceResponseContext,
 ) -> tuple[bool, str]:
@@ -551,16 +564,8 @@ def check_illustration_disclaimer(
     if not response.includes_projection:
         return True, ""
 
-    projection_indicators = [
-        "will grow to",
-        "projected value",
-        "at age",
-        "in 20 years",
-        "cash value of",
-    ]
-
     needs_disclaimer = any(
-        ind in response.response_text.lower() for ind in projection_indicators
+        ind in response.response_text.lower() for ind in PROJECTION_INDICATORS
     )
 
     if needs_disclaimer:
@@ -574,20 +579,21 @@ def check_illustration_disclaimer(
     return True, ""
 
 
+DISCLAIMER_PHRASES = [
+    "for educational purposes",
+    "not a recommendation",
+    "consult a licensed",
+    "does not constitute advice",
+]
+
+
 def check_recommendation_disclaimer(
     response: InsuranceResponseContext,
 ) -> tuple[bool, str]:
     """Ensure educational disclaimer is present"""
     if response.intent in ["recommendation", "comparison", "quote"]:
-        disclaimer_phrases = [
-            "for educational purposes",
-            "not a recommendation",
-            "consult a licensed",
-            "does not constitute advice",
-        ]
-
         has_disclaimer = any(
-            phrase in response.response_text.lower() for phrase in disclaimer_phrases
+            phrase in response.response_text.lower() for phrase in DISCLAIMER_PHRASES
         )
 
         if not has_disclaimer:
@@ -601,27 +607,28 @@ def check_recommendation_disclaimer(
     return True, ""
 
 
+TAX_RELEVANT_TERMS = [
+    "cash value",
+    "surrender",
+    "withdrawal",
+    "annuity payment",
+    "1035 exchange",
+    "death benefit",
+]
+
+TAX_PHRASES = [
+    "tax",
+    "irs",
+    "taxable",
+    "income tax",
+]
+
+
 def check_tax_disclosure(response: InsuranceResponseContext) -> tuple[bool, str]:
     """Add tax implications when relevant"""
-    tax_relevant_terms = [
-        "cash value",
-        "surrender",
-        "withdrawal",
-        "annuity payment",
-        "1035 exchange",
-        "death benefit",
-    ]
-
     text_lower = response.response_text.lower()
-    if any(term in text_lower for term in tax_relevant_terms):
-        tax_phrases = [
-            "tax",
-            "irs",
-            "taxable",
-            "income tax",
-        ]
-
-        if not any(phrase in text_lower for phrase in tax_phrases):
+    if any(term in text_lower for term in TAX_RELEVANT_TERMS):
+        if not any(phrase in text_lower for phrase in TAX_PHRASES):
             return True, (
                 "Consider adding tax note: Withdrawals, surrenders, and certain "
                 "transactions may have tax implications. Consult a tax professional."
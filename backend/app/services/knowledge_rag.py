@@ -6,10 +6,26 @@ wealth management platform using ChromaDB for vector storage and sentence-transf
 for embeddings.
 
 Supports all wealth tiers from $0 to $1B+ with domain-specific knowledge retrieval.
+
+Query embeddings are cached by text hash, several searches can share one
+embedding pass through query_batch(), and results are cached per question,
+mode and tier until the next ingestion.
+
+Ingestion is incremental: a manifest of file and chunk hashes is kept next
+to the vector store, so only new or changed chunks are embedded and upserted
+and chunks that disappeared from the knowledge base are deleted.
 """
 
+import asyncio
+import copy
+import hashlib
 import json
 import logging
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from typing import Any, Optional
@@ -25,6 +41,8 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_VERSION = 1
+
 
 class AdvisoryMode(str, Enum):
     """Advisory modes for specialized wealth management guidance."""
@@ -73,6 +91,113 @@ class DecisionAuthority(str, Enum):
     SUPPORT_ROLE = "support"  # Informational only, background context
 
 
+# =============================================================================
+# RETRIEVAL LAYER
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class RetrievalRequest:
+    """One filtered search in a retrieval batch."""
+
+    question: str
+    n_results: int = 5
+    advisory_mode: AdvisoryMode = AdvisoryMode.GENERAL
+    wealth_tier: Optional[WealthTier] = None
+    categories: Optional[tuple[str, ...]] = None  # Overrides advisory_mode
+    include_metadata: bool = True
+
+    def cache_key(self) -> tuple:
+        return (
+            self.question,
+            self.advisory_mode,
+            self.wealth_tier,
+            self.categories,
+            self.n_results,
+            self.include_metadata,
+        )
+
+
+class EmbeddingCache:
+    """LRU cache of query embeddings keyed by a hash of the text."""
+
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[Any]:
+        key = self.key(text)
+        embedding = self._entries.get(key)
+        if embedding is not None:
+            self._entries.move_to_end(key)
+        return embedding
+
+    def put(self, text: str, embedding: Any) -> None:
+        key = self.key(text)
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RetrievalMetrics:
+    """Counters and recent latency samples for retrieval calls."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.result_cache_hits = 0
+        self.embedding_cache_hits = 0
+        self.embeddings_computed = 0
+        self.searches = 0
+        self.errors = 0
+        self.embed_ms: deque = deque(maxlen=window)
+        self.search_ms: deque = deque(maxlen=window)
+        self.total_ms: deque = deque(maxlen=window)
+
+    @staticmethod
+    def _percentiles(samples: deque) -> dict:
+        if not samples:
+            return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[int(last * 0.5)], 3),
+            "p95_ms": round(ordered[int(last * 0.95)], 3),
+            "max_ms": round(ordered[-1], 3),
+        }
+
+    def snapshot(self) -> dict:
+        lookups = self.embedding_cache_hits + self.embeddings_computed
+        return {
+            "requests": self.requests,
+            "result_cache_hits": self.result_cache_hits,
+            "result_cache_hit_rate": (
+                self.result_cache_hits / self.requests if self.requests else 0.0
+            ),
+            "embedding_cache_hits": self.embedding_cache_hits,
+            "embeddings_computed": self.embeddings_computed,
+            "embedding_cache_hit_rate": (
+                self.embedding_cache_hits / lookups if lookups else 0.0
+            ),
+            "searches": self.searches,
+            "errors": self.errors,
+            "embed_latency": self._percentiles(self.embed_ms),
+            "search_latency": self._percentiles(self.search_ms),
+            "total_latency": self._percentiles(self.total_ms),
+        }
+
+
 class WealthManagementRAG:
     """
     RAG service for wealth management knowledge retrieval.
@@ -93,6 +218,8 @@ class WealthManagementRAG:
         persist_directory: str = "./chroma_db",
         collection_name: str = "wealth_management",
         embedding_model: str = "all-MiniLM-L6-v2",
+        embedding_cache_size: int = 2048,
+        result_cache_size: int = 512,
     ):
         """
         Initialize the RAG service.
@@ -101,6 +228,8 @@ class WealthManagementRAG:
             persist_directory: Directory for ChromaDB persistence
             collection_name: Name of the vector collection
             embedding_model: Sentence transformer model for embeddings
+            embedding_cache_size: Query embeddings kept in memory
+            result_cache_size: Retrieval results kept until the next ingestion
         """
         self.persist_directory = persist_directory
         self.collection_name = collection_name
@@ -109,6 +238,13 @@ class WealthManagementRAG:
         self._collection = None
         self._embedding_function = None
 
+        # Retrieval caches and metrics
+        self.embedding_cache = EmbeddingCache(embedding_cache_size)
+        self.result_cache_size = result_cache_size
+        self._result_cache: OrderedDict[tuple, list[dict]] = OrderedDict()
+        self.metrics = RetrievalMetrics()
+        self.last_ingestion: dict = {}
+
         # Knowledge base path
         self.knowledge_base_path = (
             Path(__file__).parent.parent
@@ -229,6 +365,189 @@ class WealthManagementRAG:
             )
         return self._collection
 
+    def _build_where(self, request: RetrievalRequest) -> Optional[dict]:
+        """Build the metadata filter for a retrieval request."""
+        where_filter = None
+        if request.categories:
+            where_filter = {"category": {"$in": list(request.categories)}}
+        else:
+            # Build filter based on advisory mode
+            relevant_categories = self.mode_categories.get(request.advisory_mode, [])
+            if relevant_categories and request.advisory_mode != AdvisoryMode.GENERAL:
+                where_filter = {"category": {"$in": relevant_categories}}
+
+        # Add wealth tier filter if specified
+        if request.wealth_tier:
+            tier_filter = {"wealth_tier": {"$in": [request.wealth_tier.value, "all"]}}
+            if where_filter:
+                where_filter = {"$and": [where_filter, tier_filter]}
+            else:
+                where_filter = tier_filter
+
+        return where_filter
+
+    def embed_queries(self, texts: list[str]) -> list[Any]:
+        """
+        Embed query texts, computing only those not already cached.
+
+        Args:
+            texts: Query texts (duplicates are embedded once)
+
+        Returns:
+            One embedding per input text, in order
+        """
+        embeddings = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            cached = self.embedding_cache.get(text)
+            if cached is None:
+                missing.append(text)
+            else:
+                embeddings[text] = cached
+                self.metrics.embedding_cache_hits += 1
+
+        if missing:
+            start = time.perf_counter()
+            computed = self.embedding_function(missing)
+            self.metrics.embed_ms.append((time.perf_counter() - start) * 1000)
+            self.metrics.embeddings_computed += len(missing)
+            for text, embedding in zip(missing, computed):
+                self.embedding_cache.put(text, embedding)
+                embeddings[text] = embedding
+
+        return [embeddings[text] for text in texts]
+
+    @staticmethod
+    def _format_results(results: dict, row: int, include_metadata: bool) -> list[dict]:
+        """Format one query row of a Chroma result."""
+        formatted_results = []
+        documents = (results.get("documents") or [[]])[row]
+        if not documents:
+            return formatted_results
+
+        metadatas = (
+            results.get("metadatas", [[]])[row]
+            if include_metadata
+            else [{}] * len(documents)
+        )
+        distances = (
+            results.get("distances", [[]])[row]
+            if include_metadata
+            else [0] * len(documents)
+        )
+
+        for doc, meta, dist in zip(documents, metadatas, distances):
+            formatted_results.append(
+                {
+                    "content": doc,
+                    "metadata": meta or {},
+                    "relevance_score": 1 - dist if dist else 1.0,
+                    "source": (meta.get("source", "unknown") if meta else "unknown"),
+                    "category": (
+                        meta.get("category", "general") if meta else "general"
+                    ),
+                }
+            )
+        return formatted_results
+
+    def _cache_results(self, key: tuple, results: list[dict]) -> None:
+        self._result_cache[key] = results
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > self.result_cache_size:
+            self._result_cache.popitem(last=False)
+
+    def invalidate_results(self) -> None:
+        """Drop cached retrieval results (called whenever documents change)."""
+        self._result_cache.clear()
+
+    async def query_batch(self, requests: list[RetrievalRequest]) -> list[list[dict]]:
+        """
+        Run several filtered searches with one embedding pass.
+
+        Results already cached are returned directly. The remaining
+        questions are embedded once (reusing cached embeddings), and
+        requests that share a filter, result count and field set are sent
+        to the collection as a single multi-embedding query.
+
+        Args:
+            requests: Searches to run
+
+        Returns:
+            Formatted results for each request, in order
+        """
+        start = time.perf_counter()
+        self.metrics.requests += len(requests)
+        output: list[Optional[list[dict]]] = [None] * len(requests)
+
+        pending = []
+        for position, request in enumerate(requests):
+            cached = self._result_cache.get(request.cache_key())
+            if cached is not None:
+                self._result_cache.move_to_end(request.cache_key())
+                self.metrics.result_cache_hits += 1
+                output[position] = copy.deepcopy(cached)
+            else:
+                pending.append(position)
+
+        if pending:
+            try:
+                embeddings = self.embed_queries([requests[p].question for p in pending])
+            except Exception as e:
+                logger.error(f"Error embedding RAG queries: {e}")
+                self.metrics.errors += 1
+                embeddings = None
+
+            groups: dict[tuple, list[int]] = {}
+            where_filters = {}
+            for p in pending:
+                request = requests[p]
+                where_filter = self._build_where(request)
+                group_key = (
+                    json.dumps(where_filter, sort_keys=True),
+                    request.n_results,
+                    request.include_metadata,
+                )
+                where_filters[group_key] = where_filter
+                groups.setdefault(group_key, []).append(p)
+
+            embedding_of = dict(zip(pending, embeddings or []))
+            for group_key, positions in groups.items():
+                if embeddings is None:
+                    for p in positions:
+                        output[p] = []
+                    continue
+                _, n_results, include_metadata = group_key
+                try:
+                    search_start = time.perf_counter()
+                    results = self.collection.query(
+                        query_embeddings=[embedding_of[p] for p in positions],
+                        n_results=n_results,
+                        where=where_filters[group_key],
+                        include=(
+                            ["documents", "metadatas", "distances"]
+                            if include_metadata
+                            else ["documents"]
+                        ),
+                    )
+                    self.metrics.search_ms.append(
+                        (time.perf_counter() - search_start) * 1000
+                    )
+                    self.metrics.searches += 1
+                except Exception as e:
+                    logger.error(f"Error querying RAG: {e}")
+                    self.metrics.errors += 1
+                    for p in positions:
+                        output[p] = []
+                    continue
+
+                for row, p in enumerate(positions):
+                    formatted = self._format_results(results, row, include_metadata)
+                    self._cache_results(requests[p].cache_key(), formatted)
+                    output[p] = copy.deepcopy(formatted)
+
+        self.metrics.total_ms.append((time.perf_counter() - start) * 1000)
+        return output
+
     async def query(
         self,
         question: str,
@@ -250,145 +569,329 @@ class WealthManagementRAG:
         Returns:
             List of relevant document chunks with metadata
         """
-        try:
-            # Build filter based on advisory mode
-            where_filter = None
-            relevant_categories = self.mode_categories.get(advisory_mode, [])
+        (formatted_results,) = await self.query_batch(
+            [
+                RetrievalRequest(
+                    question=question,
+                    n_results=n_results,
+                    advisory_mode=advisory_mode,
+                    wealth_tier=wealth_tier,
+                    include_metadata=include_metadata,
+                )
+            ]
+        )
 
-            if relevant_categories and advisory_mode != AdvisoryMode.GENERAL:
-                where_filter = {"category": {"$in": relevant_categories}}
+        logger.info(
+            f"RAG query returned {len(formatted_results)} results for: {question[:50]}..."
+        )
+        return formatted_results
 
-            # Add wealth tier filter if specified
-            if wealth_tier:
-                tier_filter = {"wealth_tier": {"$in": [wealth_tier.value, "all"]}}
-                if where_filter:
-                    where_filter = {"$and": [where_filter, tier_filter]}
-                else:
-                    where_filter = tier_filter
-
-            # Query the collection
-            results = self.collection.query(
-                query_texts=[question],
-                n_results=n_results,
-                where=where_filter if where_filter else None,
-                include=(
-                    ["documents", "metadatas", "distances"]
-                    if include_metadata
-                    else ["documents"]
-                ),
-            )
+    async def _embed_documents(
+        self, contents: list[str], batch_size: int, max_workers: int
+    ) -> list[Any]:
+        """
+        Embed document texts in batches across a thread pool.
 
-            # Format results
-            formatted_results = []
-            if results and results.get("documents") and results["documents"][0]:
-                documents = results["documents"][0]
-                metadatas = (
-                    results.get("metadatas", [[]])[0]
-                    if include_metadata
-                    else [{}] * len(documents)
-                )
-                distances = (
-                    results.get("distances", [[]])[0]
-                    if include_metadata
-                    else [0] * len(documents)
+        Args:
+            contents: Texts to embed
+            batch_size: Texts per embedding call
+            max_workers: Concurrent embedding calls
+
+        Returns:
+            One embedding per text, in order
+        """
+        batches = [
+            contents[i : i + batch_size] for i in range(0, len(contents), batch_size)
+        ]
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            embedded = await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, self.embedding_function, batch)
+                    for batch in batches
                 )
+            )
+        return [embedding for batch in embedded for embedding in batch]
 
-                for doc, meta, dist in zip(documents, metadatas, distances):
-                    formatted_results.append(
-                        {
-                            "content": doc,
-                            "metadata": meta or {},
-                            "relevance_score": 1 - dist if dist else 1.0,
-                            "source": (
-                                meta.get("source", "unknown") if meta else "unknown"
-                            ),
-                            "category": (
-                                meta.get("category", "general") if meta else "general"
-                            ),
-                        }
-                    )
+    async def _write_documents(
+        self,
+        documents: list[dict],
+        batch_size: int,
+        max_workers: int,
+        upsert: bool,
+    ) -> int:
+        """Embed documents in parallel and write them to the collection."""
+        if not documents:
+            return 0
 
+        embeddings = await self._embed_documents(
+            [doc["content"] for doc in documents], batch_size, max_workers
+        )
+        write = self.collection.upsert if upsert else self.collection.add
+
+        total_written = 0
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i : i + batch_size]
+            write(
+                ids=[doc["id"] for doc in batch],
+                documents=[doc["content"] for doc in batch],
+                metadatas=[doc.get("metadata", {}) for doc in batch],
+                embeddings=embeddings[i : i + batch_size],
+            )
+            total_written += len(batch)
             logger.info(
-                f"RAG query returned {len(formatted_results)} results for: {question[:50]}..."
+                f"Wrote batch of {len(batch)} documents (total: {total_written})"
             )
-            return formatted_results
-
-        except Exception as e:
-            logger.error(f"Error querying RAG: {e}")
-            return []
+        return total_written
 
-    async def add_documents(self, documents: list[dict], batch_size: int = 100) -> int:
+    async def add_documents(
+        self, documents: list[dict], batch_size: int = 100, max_workers: int = 4
+    ) -> int:
         """
         Index documents into the vector store.
 
         Args:
             documents: List of documents with 'content', 'id', and 'metadata' keys
             batch_size: Number of documents to process at once
+            max_workers: Batches embedded concurrently
 
         Returns:
             Number of documents added
         """
         try:
-            total_added = 0
+            return await self._write_documents(
+                documents, batch_size, max_workers, upsert=False
+            )
 
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i : i + batch_size]
+        except Exception as e:
+            logger.error(f"Error adding documents: {e}")
+            return 0
 
-                ids = [doc["id"] for doc in batch]
-                contents = [doc["content"] for doc in batch]
-                metadatas = [doc.get("metadata", {}) for doc in batch]
+        finally:
+            # Cached results may no longer reflect the collection
+            self.invalidate_results()
 
-                self.collection.add(ids=ids, documents=contents, metadatas=metadatas)
+    # =========================================================================
+    # INCREMENTAL INGESTION
+    # =========================================================================
 
-                total_added += len(batch)
-                logger.info(
-                    f"Added batch of {len(batch)} documents (total: {total_added})"
-                )
+    @property
+    def manifest_path(self) -> Path:
+        """Location of the ingestion manifest, next to the vector store."""
+        return Path(self.persist_directory) / f"{self.collection_name}_manifest.json"
+
+    def _empty_manifest(self, chunk_size: int, chunk_overlap: int) -> dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "embedding_model": self.embedding_model,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "files": {},
+        }
 
-            return total_added
+    def load_manifest(self, chunk_size: int, chunk_overlap: int) -> dict:
+        """
+        Load the manifest of previously ingested files and chunks.
 
-        except Exception as e:
-            logger.error(f"Error adding documents: {e}")
-            return 0
+        A missing or unreadable manifest, or one written with a different
+        embedding model or chunking, yields an empty manifest so that
+        everything is re-embedded.
+        """
+        empty = self._empty_manifest(chunk_size, chunk_overlap)
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return empty
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable ingestion manifest: {e}")
+            return empty
+
+        if any(
+            manifest.get(key) != empty[key]
+            for key in ("version", "embedding_model", "chunk_size", "chunk_overlap")
+        ):
+            logger.info("Ingestion settings changed; re-embedding all chunks")
+            return empty
+        return manifest
+
+    def save_manifest(self, manifest: dict) -> None:
+        """Write the manifest atomically."""
+        path = self.manifest_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def reset_manifest(self) -> None:
+        """Forget ingestion history (use when the collection is dropped)."""
+        self.manifest_path.unlink(missing_ok=True)
+
+    def _clear_collection(self) -> int:
+        """Delete every stored chunk; returns the number deleted."""
+        ids = self.collection.get(include=[])["ids"]
+        if ids:
+            self.collection.delete(ids=ids)
+        return len(ids)
+
+    @staticmethod
+    def _chunk_hash(chunk: dict) -> str:
+        payload = json.dumps(
+            {"content": chunk["content"], "metadata": chunk.get("metadata", {})},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     async def ingest_knowledge_base(
-        self, chunk_size: int = 500, chunk_overlap: int = 50
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        batch_size: int = 100,
+        max_workers: int = 4,
+        incremental: bool = True,
     ) -> int:
         """
         Ingest all knowledge base files into the vector store.
 
+        Files whose bytes are unchanged since the last run are skipped
+        without being parsed. For changed files, only chunks whose content
+        hash differs are embedded and upserted, and chunk IDs that no longer
+        exist are deleted. Without a valid manifest the stored chunks are
+        unknown, so the collection is cleared before everything is
+        re-embedded. Counts for the run are kept in last_ingestion.
+
         Args:
             chunk_size: Target size of each text chunk in characters
             chunk_overlap: Overlap between chunks
+            batch_size: Chunks per embedding call and write
+            max_workers: Embedding batches run concurrently
+            incremental: Skip unchanged files and chunks; False re-embeds
+                every chunk (stale chunks are still deleted)
 
         Returns:
-            Total number of chunks indexed
+            Number of chunks embedded and written in this run
         """
-        total_chunks = 0
+        manifest = self.load_manifest(chunk_size, chunk_overlap)
+        previous_files = manifest["files"]
+        stats = {
+            "files_skipped": 0,
+            "files_processed": 0,
+            "chunks_written": 0,
+            "chunks_unchanged": 0,
+            "chunks_deleted": 0,
+            "errors": 0,
+        }
+        start = time.perf_counter()
 
-        for category, filename in self.category_files.items():
-            filepath = self.knowledge_base_path / filename
+        try:
+            stored = self.collection.count()
+        except Exception as e:
+            logger.warning(f"Could not verify collection contents: {e}")
+            stored = None
+        if previous_files and stored == 0:
+            logger.info("Collection is empty; ignoring ingestion manifest")
+            previous_files = {}
+        elif not previous_files and stored:
+            # No usable manifest: stored chunk IDs are unknown and may come
+            # from other chunking, so start from an empty collection
+            logger.info("No valid ingestion manifest; clearing the collection")
+            try:
+                stats["chunks_deleted"] += self._clear_collection()
+            except Exception as e:
+                logger.error(f"Error clearing the collection: {e}")
+                stats["errors"] += 1
 
-            if not filepath.exists():
-                logger.warning(f"Knowledge file not found: {filepath}")
-                continue
+        files = {}
 
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+        try:
+            for category, filename in self.category_files.items():
+                filepath = self.knowledge_base_path / filename
+                previous = previous_files.get(category)
+
+                if not filepath.exists():
+                    logger.warning(f"Knowledge file not found: {filepath}")
+                    continue
+
+                try:
+                    raw = filepath.read_bytes()
+                    file_hash = hashlib.sha256(raw).hexdigest()
+                    if incremental and previous and previous.get("sha256") == file_hash:
+                        files[category] = previous
+                        stats["files_skipped"] += 1
+                        stats["chunks_unchanged"] += len(previous["chunks"])
+                        continue
 
-                chunks = self._extract_chunks(data, category, chunk_size, chunk_overlap)
+                    data = json.loads(raw.decode("utf-8"))
+                    chunks = self._extract_chunks(
+                        data, category, chunk_size, chunk_overlap
+                    )
+                    hashes = {chunk["id"]: self._chunk_hash(chunk) for chunk in chunks}
+                    old_hashes = previous["chunks"] if previous else {}
+
+                    changed = [
+                        chunk
+                        for chunk in chunks
+                        if not incremental
+                        or old_hashes.get(chunk["id"]) != hashes[chunk["id"]]
+                    ]
+                    removed = [cid for cid in old_hashes if cid not in hashes]
+
+                    written = await self._write_documents(
+                        changed, batch_size, max_workers, upsert=True
+                    )
+                    if removed:
+                        self.collection.delete(ids=removed)
 
-                if chunks:
-                    added = await self.add_documents(chunks)
-                    total_chunks += added
-                    logger.info(f"Ingested {added} chunks from {filename}")
+                    files[category] = {
+                        "filename": filename,
+                        "sha256": file_hash,
+                        "chunks": hashes,
+                    }
+                    stats["files_processed"] += 1
+                    stats["chunks_written"] += written
+                    stats["chunks_unchanged"] += len(chunks) - len(changed)
+                    stats["chunks_deleted"] += len(removed)
+                    logger.info(
+                        f"Ingested {filename}: {written} written, "
+                        f"{len(removed)} deleted, "
+                        f"{len(chunks) - len(changed)} unchanged"
+                    )
 
-            except Exception as e:
-                logger.error(f"Error ingesting {filename}: {e}")
+                except Exception as e:
+                    logger.error(f"Error ingesting {filename}: {e}")
+                    stats["errors"] += 1
+                    if previous:
+                        # Keep the old entry so the file is retried next run
+                        files[category] = previous
+
+            # Categories dropped from the knowledge base
+            for category, previous in previous_files.items():
+                if category in files:
+                    continue
+                removed = list(previous.get("chunks", {}))
+                try:
+                    if removed:
+                        self.collection.delete(ids=removed)
+                    stats["chunks_deleted"] += len(removed)
+                except Exception as e:
+                    logger.error(f"Error deleting chunks for {category}: {e}")
+                    stats["errors"] += 1
+                    files[category] = previous
+
+        finally:
+            self.invalidate_results()
+
+        manifest["files"] = files
+        try:
+            self.save_manifest(manifest)
+        except OSError as e:
+            logger.warning(f"Could not save ingestion manifest: {e}")
 
-        logger.info(f"Total chunks ingested: {total_chunks}")
-        return total_chunks
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        self.last_ingestion = stats
+        logger.info(f"Knowledge base ingestion complete: {stats}")
+        return stats["chunks_written"]
 
     def _extract_chunks(
         self,
@@ -603,6 +1106,13 @@ class WealthManagementRAG:
 
         return "all"
 
+    def get_retrieval_metrics(self) -> dict:
+        """Get retrieval latency and cache statistics."""
+        metrics = self.metrics.snapshot()
+        metrics["embedding_cache_size"] = len(self.embedding_cache)
+        metrics["result_cache_size"] = len(self._result_cache)
+        return metrics
+
     def get_collection_stats(self) -> dict:
         """Get statistics about the indexed collection."""
         try:
@@ -631,36 +1141,16 @@ class WealthManagementRAG:
         Returns:
             List of relevant documents
         """
-        try:
-            results = self.collection.query(
-                query_texts=[question],
-                n_results=n_results,
-                where={"category": {"$in": categories}},
-                include=["documents", "metadatas", "distances"],
-            )
-
-            formatted_results = []
-            if results and results.get("documents") and results["documents"][0]:
-                for doc, meta, dist in zip(
-                    results["documents"][0],
-                    results["metadatas"][0],
-                    results["distances"][0],
-                ):
-                    formatted_results.append(
-                        {
-                            "content": doc,
-                            "metadata": meta,
-                            "relevance_score": 1 - dist,
-                            "source": meta.get("source", "unknown"),
-                            "category": meta.get("category", "general"),
-                        }
-                    )
-
-            return formatted_results
-
-        except Exception as e:
-            logger.error(f"Error in category search: {e}")
-            return []
+        (results,) = await self.query_batch(
+            [
+                RetrievalRequest(
+                    question=question,
+                    n_results=n_results,
+                    categories=tuple(categories),
+                )
+            ]
+        )
+        return results
 
     async def get_professional_recommendations(
         self, situation: str, wealth_tier: WealthTier
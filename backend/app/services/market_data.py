@@ -8,6 +8,7 @@ from functools import wraps
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import aiohttp
+import numpy as np
 import pandas as pd
 import structlog
 import yfinance as yf
@@ -16,6 +17,13 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.models.market_data import MarketData
+from app.services.bar_serialization import bars_to_columns, downsample_columns
+from app.services.bar_warehouse import (
+    BarWarehouse,
+    get_bar_warehouse,
+    records_to_bars,
+    records_to_columns,
+)
 
 logger = structlog.get_logger()
 std_logger = logging.getLogger(__name__)
@@ -367,7 +375,7 @@ class YahooFinanceProvider(MarketDataProvider):
                         }
                     )
 
-                return historical_data[:limit]
+                return historical_data[-limit:]
 
         except Exception as e:
             logger.error(f"Error fetching historical data from Yahoo Finance: {str(e)}")
@@ -490,7 +498,7 @@ class FinnhubProvider(MarketDataProvider):
 class MarketDataService:
     """Enhanced market data service with multi-provider failover and robust error handling"""
 
-    def __init__(self, cache_ttl: int = None):
+    def __init__(self, cache_ttl: int = None, warehouse: BarWarehouse = None):
         # Initialize all available providers with priority order
         self.providers = [
             YahooFinanceProvider(),  # Most reliable, free
@@ -505,6 +513,11 @@ class MarketDataService:
             settings, "MARKET_DATA_CACHE_TTL", 60
         )  # Default 1 minute cache
 
+        # Local bar history; providers are only asked for the missing tail
+        if warehouse is None and getattr(settings, "BAR_WAREHOUSE_ENABLED", False):
+            warehouse = get_bar_warehouse()
+        self.warehouse = warehouse
+
         # Health tracking for providers with dynamic thresholds
         self.source_health = {
             provider.__class__.__name__: True for provider in self.providers
@@ -921,6 +934,37 @@ class MarketDataService:
             if cached_data:
                 return cached_data.data
 
+        if self.warehouse is not None:
+            records = await self._get_warehouse_history(
+                symbol, timeframe, limit, force_refresh
+            )
+            if len(records) > 0:
+                data = records_to_bars(records)
+                self._cache_data(cache_key, data, "warehouse")
+                return data
+        else:
+            valid_data, provider_name = await self._fetch_historical_from_providers(
+                symbol, timeframe, limit
+            )
+            if valid_data:
+                self._cache_data(cache_key, valid_data, provider_name.lower())
+                return valid_data
+
+        # Try stale data as fallback
+        stale_data = self._get_cached_data(cache_key, allow_stale=True)
+        if stale_data:
+            std_logger.warning(
+                f"Returning stale historical data for {symbol} (age: {stale_data.age_seconds():.1f}s)"
+            )
+            return stale_data.data
+
+        std_logger.error(f"All providers failed for historical data: {symbol}")
+        return []
+
+    async def _fetch_historical_from_providers(
+        self, symbol: str, timeframe: str, limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch bars from the first provider that returns valid data."""
         # Try providers in order of preference
         healthy_providers = [
             p
@@ -949,12 +993,11 @@ class MarketDataService:
                     ]
 
                     if len(valid_data) > 0:
-                        self._cache_data(cache_key, valid_data, provider_name.lower())
                         self._update_provider_health(provider_name, True)
                         std_logger.info(
                             f"Retrieved {len(valid_data)} historical data points for {symbol} from {provider_name}"
                         )
-                        return valid_data
+                        return valid_data, provider_name
 
             except Exception as e:
                 self._update_provider_health(provider_name, False)
@@ -963,16 +1006,66 @@ class MarketDataService:
                 )
                 continue
 
-        # Try stale data as fallback
-        stale_data = self._get_cached_data(cache_key, allow_stale=True)
-        if stale_data:
+        return [], None
+
+    async def _get_warehouse_history(
+        self, symbol: str, timeframe: str, limit: int, force_refresh: bool
+    ) -> np.ndarray:
+        """
+        Serve bars from the local warehouse, syncing only what it lacks.
+
+        When the warehouse already holds `limit` bars, providers are asked
+        for just the bars since the stored tail (plus the tail itself, which
+        may have been unfinished). Otherwise the full window is fetched. If
+        every provider fails, whatever is stored is returned.
+        """
+        stored = self.warehouse.count(symbol, timeframe)
+        fetch = limit
+        if stored >= limit and not force_refresh:
+            behind = self.warehouse.bars_behind(
+                symbol, timeframe, refresh_seconds=self.cache_ttl
+            )
+            if behind == 0:
+                return self.warehouse.read(symbol, timeframe, limit=limit)
+            fetch = min(limit, behind + 1)
+
+        bars, provider_name = await self._fetch_historical_from_providers(
+            symbol, timeframe, fetch
+        )
+        if bars:
+            try:
+                if self.warehouse.append(symbol, timeframe, bars) == 0:
+                    self.warehouse.mark_synced(symbol, timeframe)
+            except Exception as e:
+                std_logger.error(f"Error writing {symbol} bars to warehouse: {str(e)}")
+                return self.warehouse.read(symbol, timeframe, limit=limit)
+        elif stored:
             std_logger.warning(
-                f"Returning stale historical data for {symbol} (age: {stale_data.age_seconds():.1f}s)"
+                f"Providers failed; serving stored {timeframe} bars for {symbol}"
             )
-            return stale_data.data
+        return self.warehouse.read(symbol, timeframe, limit=limit)
 
-        std_logger.error(f"All providers failed for historical data: {symbol}")
-        return []
+    async def get_historical_columns(
+        self,
+        symbol: str,
+        timeframe: str = "1day",
+        limit: int = 100,
+        max_points: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Historical bars as parallel column arrays.
+
+        Same data as get_historical_data_enhanced, laid out for columnar or
+        binary responses and optionally LTTB-downsampled to `max_points`.
+        Warehouse-backed series are read straight from the mapped file.
+        """
+        if self.warehouse is not None:
+            records = await self._get_warehouse_history(
+                symbol.upper(), timeframe, limit, force_refresh=False
+            )
+            return downsample_columns(records_to_columns(records), max_points)
+        bars = await self.get_historical_data_enhanced(symbol, timeframe, limit)
+        return downsample_columns(bars_to_columns(bars), max_points)
 
     async def get_market_status(self) -> Dict[str, Any]:
         """Get current market status with intelligent fallback"""
@@ -20,6 +20,7 @@ from pydantic import BaseModel
 
 from app.core.config import settings
 from app.services.market_data import market_data_service
+from app.services.portfolio_valuation import get_valuation_engine
 
 logger = logging.getLogger(__name__)
 
@@ -169,8 +170,12 @@ class PersonalMarketStreaming:
         """Main streaming loop - fetches data and broadcasts to clients."""
         while self.streaming_active:
             try:
-                # Get all subscribed symbols
-                symbols = self.websocket_manager.get_subscribed_symbols()
+                # Get all subscribed symbols, plus those held by portfolios
+                # being valued live
+                symbols = sorted(
+                    set(self.websocket_manager.get_subscribed_symbols())
+                    | set(get_valuation_engine().tracked_symbols())
+                )
 
                 if symbols:
                     # Rate limiting check
@@ -218,6 +223,7 @@ class PersonalMarketStreaming:
 
                     # Cache the latest quote
                     self.latest_quotes[symbol] = streaming_quote
+                    get_valuation_engine().apply_price(symbol, streaming_quote.price)
 
                     # Broadcast to subscribers
                     await self.websocket_manager.broadcast_to_symbol(
@@ -11,7 +11,9 @@ institutional-depth (Goal B) use cases through routing, not mixing.
 import re
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.services.pattern_matcher import MultiPatternMatcher
 
 # =============================================================================
 # ENUMS
@@ -202,6 +204,20 @@ TASK_PATTERNS: Dict[TaskType, List[str]] = {
     ],
 }
 
+# Requests for live data that need a tool call
+TOOL_INDICATOR_PATTERNS = [
+    r"\bcurrent\b.*\b(price|quote|rate)\b",
+    r"\btoday\b.*\b(market|stock|fund)\b",
+    r"\b(pe|p/e|eps|dividend)\b.*\bratio\b",
+    r"\bfundamental\b.*\bdata\b",
+]
+
+# Pattern groups scanned together in one pass
+HIGH_RISK = "high_risk"
+MEDIUM_RISK = "medium_risk"
+LOW_RISK = "low_risk"
+TOOL_INDICATOR = "tool_indicator"
+
 
 # =============================================================================
 # ROUTER CONTEXT
@@ -267,13 +283,52 @@ class ModeRouter:
         for task, patterns in TASK_PATTERNS.items():
             self.task_compiled[task] = [re.compile(p, re.IGNORECASE) for p in patterns]
 
-    def classify_task(self, prompt: str) -> Tuple[TaskType, float]:
+        # Every pattern above, keyed by (group, index), in one matcher
+        self.pattern_keys: List[Tuple[Any, int]] = []
+        sources = [
+            (HIGH_RISK, HIGH_RISK_PATTERNS),
+            (MEDIUM_RISK, MEDIUM_RISK_PATTERNS),
+            (LOW_RISK, LOW_RISK_PATTERNS),
+            (TOOL_INDICATOR, TOOL_INDICATOR_PATTERNS),
+            *TASK_PATTERNS.items(),
+        ]
+        patterns = []
+        for group, group_patterns in sources:
+            for index, pattern in enumerate(group_patterns):
+                self.pattern_keys.append((group, index))
+                patterns.append(pattern)
+        # Patterns are lower-case, so scanning lower-cased text replaces
+        # IGNORECASE and keeps the matcher's first-character dispatch
+        self.matcher = MultiPatternMatcher(patterns)
+
+    def match_patterns(self, prompt: str) -> FrozenSet[Tuple[Any, int]]:
+        """
+        Find every routing pattern that matches the prompt in a single pass.
+
+        Returns:
+            Set of ``(group, index)`` keys, where group is a risk level
+            group, TOOL_INDICATOR or a TaskType
+        """
+        return frozenset(
+            self.pattern_keys[index]
+            for _, index, _ in self.matcher.scan(prompt.lower())
+        )
+
+    @staticmethod
+    def _count(hits: FrozenSet[Tuple[Any, int]], group: Any, size: int) -> int:
+        return sum(1 for index in range(size) if (group, index) in hits)
+
+    def classify_task(
+        self, prompt: str, hits: Optional[FrozenSet[Tuple[Any, int]]] = None
+    ) -> Tuple[TaskType, float]:
         """Classify the task type of a prompt"""
+        if hits is None:
+            hits = self.match_patterns(prompt)
         best_match = TaskType.GENERAL_QUESTION
         best_score = 0.0
 
         for task, patterns in self.task_compiled.items():
-            matches = sum(1 for p in patterns if p.search(prompt))
+            matches = self._count(hits, task, len(patterns))
             score = matches / len(patterns) if patterns else 0
             if score > best_score:
                 best_score = score
@@ -285,17 +340,27 @@ class ModeRouter:
 
         return best_match, min(best_score * 2, 1.0)  # Scale confidence
 
-    def assess_risk(self, prompt: str, task_type: TaskType) -> RiskLevel:
+    def assess_risk(
+        self,
+        prompt: str,
+        task_type: TaskType,
+        hits: Optional[FrozenSet[Tuple[Any, int]]] = None,
+    ) -> RiskLevel:
         """Assess the risk level of a prompt"""
+        if hits is None:
+            hits = self.match_patterns(prompt)
+
         # Check for high risk patterns
-        high_matches = sum(1 for p in self.high_risk_compiled if p.search(prompt))
+        high_matches = self._count(hits, HIGH_RISK, len(self.high_risk_compiled))
         if high_matches >= 2:
             return RiskLevel.CRITICAL
         if high_matches >= 1:
             return RiskLevel.HIGH
 
         # Check for medium risk patterns
-        medium_matches = sum(1 for p in self.medium_risk_compiled if p.search(prompt))
+        medium_matches = self._count(
+            hits, MEDIUM_RISK, len(self.medium_risk_compiled)
+        )
         if medium_matches >= 2:
             return RiskLevel.HIGH
         if medium_matches >= 1:
@@ -403,25 +468,21 @@ class ModeRouter:
 
         return disclaimers
 
-    def requires_tool_call(self, task_type: TaskType, prompt: str) -> bool:
+    def requires_tool_call(
+        self,
+        task_type: TaskType,
+        prompt: str,
+        hits: Optional[FrozenSet[Tuple[Any, int]]] = None,
+    ) -> bool:
         """Determine if the task requires calling external tools"""
         # Market data always requires tools
         if task_type == TaskType.MARKET_DATA:
             return True
 
         # Check for specific data requests
-        tool_indicators = [
-            r"\bcurrent\b.*\b(price|quote|rate)\b",
-            r"\btoday\b.*\b(market|stock|fund)\b",
-            r"\b(pe|p/e|eps|dividend)\b.*\bratio\b",
-            r"\bfundamental\b.*\bdata\b",
-        ]
-
-        for pattern in tool_indicators:
-            if re.search(pattern, prompt, re.IGNORECASE):
-                return True
-
-        return False
+        if hits is None:
+            hits = self.match_patterns(prompt)
+        return self._count(hits, TOOL_INDICATOR, len(TOOL_INDICATOR_PATTERNS)) > 0
 
     def requires_retrieval(self, task_type: TaskType, risk_level: RiskLevel) -> bool:
         """Determine if retrieval is required for grounded answers"""
@@ -441,7 +502,10 @@ class ModeRouter:
         return False
 
     def route(
-        self, prompt: str, user_context: Optional[UserContext] = None
+        self,
+        prompt: str,
+        user_context: Optional[UserContext] = None,
+        hits: Optional[FrozenSet[Tuple[Any, int]]] = None,
     ) -> RoutingDecision:
         """
         Main routing function - classifies prompt and returns routing decision.
@@ -449,15 +513,20 @@ class ModeRouter:
         Args:
             prompt: The user's input prompt
             user_context: Optional user profile for personalization
+            hits: Precomputed result of match_patterns for the prompt
 
         Returns:
             RoutingDecision with mode, task, risk, and requirements
         """
+        # 0. Match every pattern in one pass over the prompt
+        if hits is None:
+            hits = self.match_patterns(prompt)
+
         # 1. Classify task type
-        task_type, task_confidence = self.classify_task(prompt)
+        task_type, task_confidence = self.classify_task(prompt, hits)
 
         # 2. Assess risk level
-        risk_level = self.assess_risk(prompt, task_type)
+        risk_level = self.assess_risk(prompt, task_type, hits)
 
         # 3. Determine response mode
         mode = self.determine_mode(risk_level, task_type, user_context)
@@ -465,7 +534,7 @@ class ModeRouter:
         # 4. Get requirements
         required_schemas = self.get_required_schemas(task_type, mode)
         required_disclaimers = self.get_required_disclaimers(task_type, risk_level)
-        requires_tool = self.requires_tool_call(task_type, prompt)
+        requires_tool = self.requires_tool_call(task_type, prompt, hits)
         requires_retrieval = self.requires_retrieval(task_type, risk_level)
 
         # 5. Build reasoning
@@ -1,24 +1,230 @@
-"""Order aggregation service for batching and optimizing trades."""
+"""Order aggregation service for batching and optimizing trades.
 
+Pending market orders are summed per symbol and side in a single
+``GROUP BY`` query. Buys and sells of the same symbol are netted
+internally and only the residual goes to the broker, so a cycle places at
+most one broker order per symbol. Every order in a symbol fills at one
+clearing price: the broker's fill price for the residual, or a quote when
+the two sides cancel out. A symbol with no clearing price is not filled
+that cycle. Fills are written back with one bulk ``UPDATE`` per symbol
+and side, booked into holdings and cash, and committed once per cycle.
+
+Orders stay PENDING until they are completely filled. The crossed part of
+a symbol fills at once. If the broker has not finished the residual order
+when it answers, the residual side's orders are attached to it by
+``broker_order_id`` and reconciled against the broker's order status at
+the start of later cycles. Whatever the broker did not fill is detached
+again and routed with the next cycle.
+
+Quantities of dollar-based orders are estimated from their investment
+amount and reference price for netting, the same estimate used when they
+were created. Their share quantity is fixed from the clearing price when
+they first fill.
+"""
+
+import asyncio
 import logging
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query, Session
 
-from app.models.trade import OrderSide, Trade, TradeStatus
-from app.services.trading import TradingService
+from app.core.config import settings
+from app.core.metrics import record_metric
+from app.models.trade import OrderType, Trade, TradeStatus, TradeType
+from app.services.fill_booking import Fill, book_fills, publish_fills
 
 logger = logging.getLogger(__name__)
 
+# Shares per order; dollar-based orders carry no quantity until filled
+ORDER_QUANTITY = func.coalesce(Trade.quantity, Trade.investment_amount / Trade.price)
+FILLED_QUANTITY = func.coalesce(Trade.filled_quantity, 0.0)
+# Shares still to fill
+REMAINING_QUANTITY = ORDER_QUANTITY - FILLED_QUANTITY
+
+# Broker order states after which nothing more will fill
+FINAL_STATUSES = {
+    TradeStatus.FILLED,
+    TradeStatus.CANCELLED,
+    TradeStatus.CANCELED,
+    TradeStatus.REJECTED,
+    TradeStatus.EXPIRED,
+}
+
+
+def broker_order_done(result: Dict[str, Any], quantity: float) -> bool:
+    """Whether a broker order result is final, from its status or fills."""
+    if float(result.get("filled_quantity") or 0) >= quantity - 1e-9:
+        return True
+    status = result.get("status")
+    try:
+        return TradeStatus(str(getattr(status, "value", status)).lower()) in (
+            FINAL_STATUSES
+        )
+    except ValueError:
+        return False
+
+
+def quote_price(quote: Dict[str, Any]) -> Optional[float]:
+    """Last trade price of a broker quote, whichever key the broker uses."""
+    for key in ("last_price", "last", "price"):
+        value = quote.get(key)
+        if value:
+            return float(value)
+    return None
+
+
+@dataclass
+class SymbolBook:
+    """Pending buy and sell totals of one symbol."""
+
+    symbol: str
+    buy_quantity: float = 0.0
+    sell_quantity: float = 0.0
+    buy_count: int = 0
+    sell_count: int = 0
+    priced_quantity: float = 0.0
+    notional: float = 0.0
+    oldest: Optional[datetime] = None
+    side_prices: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def order_count(self) -> int:
+        return self.buy_count + self.sell_count
+
+    @property
+    def net_quantity(self) -> float:
+        """Buys minus sells; positive means the residual is a buy."""
+        return self.buy_quantity - self.sell_quantity
+
+    @property
+    def crossed_quantity(self) -> float:
+        """Quantity matched internally between the two sides."""
+        return min(self.buy_quantity, self.sell_quantity)
+
+    @property
+    def residual_side(self) -> Optional[str]:
+        if self.net_quantity > 0:
+            return "buy"
+        if self.net_quantity < 0:
+            return "sell"
+        return None
+
+    @property
+    def reference_price(self) -> Optional[float]:
+        """Quantity-weighted price of the orders that carry one."""
+        if self.priced_quantity <= 0:
+            return None
+        return self.notional / self.priced_quantity
+
+    def is_due(self, now: datetime) -> bool:
+        """Large enough to route, or waited long enough."""
+        if self.notional >= settings.AGGREGATION_THRESHOLD:
+            return True
+        max_delay = timedelta(minutes=settings.MAX_AGGREGATION_DELAY_MINUTES)
+        return self.oldest is not None and now - self.oldest >= max_delay
+
 
 class OrderAggregator:
     """Service for aggregating and optimizing trade orders."""
 
-    def __init__(self, db: Session):
-        """Initialize with database session."""
+    def __init__(self, db: Session, broker=None, max_concurrent_orders: int = 4):
+        """Initialize with database session and an optional broker.
+
+        Args:
+            db: Database session
+            broker: Broker used for residual orders; defaults to the
+                configured broker
+            max_concurrent_orders: Broker calls allowed in flight at once
+        """
         self.db = db
-        self.trading_service = TradingService(db)
+        self._broker = broker
+        self.max_concurrent_orders = max(1, max_concurrent_orders)
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            # Imported here: the broker factory pulls in every broker client
+            from app.services.broker.factory import get_broker
+
+            self._broker = get_broker(db=self.db)
+        return self._broker
+
+    def _orders(self) -> Query:
+        """Pending market orders the aggregator manages."""
+        return self.db.query(Trade).filter(
+            Trade.status == TradeStatus.PENDING,
+            Trade.order_type == OrderType.MARKET,
+            Trade.parent_order_id.is_(None),
+        )
+
+    def _pending(self, as_of: datetime, time_window: Optional[int] = None) -> Query:
+        """Filter for orders eligible for aggregation."""
+        query = self._orders().filter(
+            Trade.broker_order_id.is_(None),
+            Trade.created_at <= as_of,
+        )
+        if time_window is not None:
+            query = query.filter(
+                Trade.created_at >= as_of - timedelta(minutes=time_window)
+            )
+        return query
+
+    def pending_books(
+        self,
+        symbols: Optional[List[str]] = None,
+        time_window: Optional[int] = None,
+        as_of: Optional[datetime] = None,
+    ) -> Dict[str, SymbolBook]:
+        """Buy and sell totals still to fill for every symbol.
+
+        Args:
+            symbols: Restrict to these symbols
+            time_window: Only orders created in the last ``time_window`` minutes
+            as_of: Ignore orders created after this time
+
+        Returns:
+            Dict mapping symbol to its SymbolBook
+        """
+        as_of = as_of or datetime.utcnow()
+        priced = case((Trade.price.isnot(None), REMAINING_QUANTITY), else_=0.0)
+        query = (
+            self._pending(as_of, time_window)
+            .with_entities(
+                Trade.symbol,
+                Trade.trade_type,
+                func.sum(REMAINING_QUANTITY),
+                func.count(Trade.id),
+                func.sum(priced),
+                func.sum(REMAINING_QUANTITY * Trade.price),
+                func.min(Trade.created_at),
+            )
+            .group_by(Trade.symbol, Trade.trade_type)
+        )
+        if symbols:
+            query = query.filter(Trade.symbol.in_(symbols))
+
+        books: Dict[str, SymbolBook] = {}
+        for symbol, side, quantity, count, priced_qty, notional, oldest in query:
+            book = books.setdefault(symbol, SymbolBook(symbol))
+            if TradeType(side) == TradeType.BUY:
+                book.buy_quantity = float(quantity or 0)
+                book.buy_count = count
+            else:
+                book.sell_quantity = float(quantity or 0)
+                book.sell_count = count
+            book.priced_quantity += float(priced_qty or 0)
+            book.notional += float(notional or 0)
+            if priced_qty:
+                book.side_prices[TradeType(side).value] = float(notional) / float(
+                    priced_qty
+                )
+            if oldest is not None and (book.oldest is None or oldest < book.oldest):
+                book.oldest = oldest
+        return books
 
     def aggregate_orders(
         self, symbol: str, time_window: int = 15
@@ -33,125 +239,377 @@ class OrderAggregator:
         Returns:
             List of aggregated orders
         """
-        cutoff_time = datetime.utcnow() - timedelta(minutes=time_window)
-
-        # Get pending orders for this symbol within time window
-        pending_orders = (
-            self.db.query(Trade)
-            .filter(
-                Trade.symbol == symbol,
-                Trade.status == TradeStatus.PENDING,
-                Trade.created_at >= cutoff_time,
-            )
+        as_of = datetime.utcnow()
+        book = self.pending_books([symbol], time_window, as_of).get(symbol)
+        if book is None:
+            return []
+
+        ids = (
+            self._pending(as_of, time_window)
+            .filter(Trade.symbol == symbol)
+            .with_entities(Trade.id, Trade.trade_type)
             .all()
         )
-
-        # Group by buy/sell
-        buy_orders = [
-            order for order in pending_orders if order.order_side == OrderSide.BUY
-        ]
-        sell_orders = [
-            order for order in pending_orders if order.order_side == OrderSide.SELL
-        ]
-
-        # Calculate aggregated quantities
-        total_buy_quantity = sum(order.quantity for order in buy_orders)
-        total_sell_quantity = sum(order.quantity for order in sell_orders)
-
-        # Calculate weighted average prices
-        if buy_orders:
-            buy_price = (
-                sum(order.price * order.quantity for order in buy_orders)
-                / total_buy_quantity
-            )
-        else:
-            buy_price = 0
-
-        if sell_orders:
-            sell_price = (
-                sum(order.price * order.quantity for order in sell_orders)
-                / total_sell_quantity
-            )
-        else:
-            sell_price = 0
-
-        # Create aggregated order summaries
         aggregated_orders = []
-
-        if total_buy_quantity > 0:
+        for side, quantity, count in (
+            ("buy", book.buy_quantity, book.buy_count),
+            ("sell", book.sell_quantity, book.sell_count),
+        ):
+            if quantity <= 0:
+                continue
             aggregated_orders.append(
                 {
                     "symbol": symbol,
-                    "trade_type": "buy",
-                    "quantity": total_buy_quantity,
-                    "price": buy_price,
-                    "order_count": len(buy_orders),
-                    "order_ids": [order.id for order in buy_orders],
+                    "trade_type": side,
+                    "quantity": quantity,
+                    "price": book.side_prices.get(side, 0),
+                    "order_count": count,
+                    "order_ids": [i for i, t in ids if TradeType(t).value == side],
                 }
             )
-
-        if total_sell_quantity > 0:
-            aggregated_orders.append(
-                {
-                    "symbol": symbol,
-                    "trade_type": "sell",
-                    "quantity": total_sell_quantity,
-                    "price": sell_price,
-                    "order_count": len(sell_orders),
-                    "order_ids": [order.id for order in sell_orders],
-                }
-            )
-
         return aggregated_orders
 
-    async def execute_aggregated_orders(self) -> Dict[str, Any]:
+    async def execute_aggregated_orders(
+        self, time_window: Optional[int] = None, force: bool = False
+    ) -> Dict[str, Any]:
         """
-        Execute all pending aggregated orders.
+        Net and execute pending orders across all symbols.
+
+        Broker orders still working from earlier cycles are reconciled
+        first, so their unfilled remainder can be routed again.
+
+        Args:
+            time_window: Only orders created in the last ``time_window`` minutes
+            force: Route every symbol, ignoring the size and delay thresholds
 
         Returns:
-            Summary of executed orders
+            Summary of the cycle, including broker order count and latency
         """
-        # Get all pending orders
-        pending_orders = (
-            self.db.query(Trade).filter(Trade.status == TradeStatus.PENDING).all()
-        )
+        cycle_start = time.perf_counter()
+        fills: List[Fill] = []
+        reconciled = await self.reconcile_working_orders(fills)
+        as_of = datetime.utcnow()
+        books = self.pending_books(time_window=time_window, as_of=as_of)
+        due = [b for b in books.values() if force or b.is_due(as_of)]
 
-        # Group by symbol
-        orders_by_symbol = {}
-        for order in pending_orders:
-            if order.symbol not in orders_by_symbol:
-                orders_by_symbol[order.symbol] = []
-            orders_by_symbol[order.symbol].append(order)
+        semaphore = asyncio.Semaphore(self.max_concurrent_orders)
+        routed = await asyncio.gather(*(self._route(book, semaphore) for book in due))
 
-        # Process each symbol
         results = {
-            "total_executed": 0,
+            "total_executed": reconciled,
             "total_failed": 0,
+            "orders_working": 0,
             "symbols_processed": 0,
+            "symbols_deferred": len(books) - len(due),
+            "broker_orders": 0,
+            "crossed_quantity": 0.0,
+            "broker_latency_ms": {"total": 0.0, "max": 0.0, "mean": 0.0},
             "details": [],
         }
+        latencies = []
+        for book, fill in routed:
+            if fill.get("latency_ms") is not None:
+                latencies.append(fill["latency_ms"])
+            if fill.get("is_order"):
+                results["broker_orders"] += 1
 
-        for symbol, orders in orders_by_symbol.items():
-            # Aggregate orders
-            aggregated = self.aggregate_orders(symbol)
+            detail = self._allocate(book, fill, as_of, time_window, fills)
+            results["details"].append(detail)
+            results["total_executed"] += detail["orders_executed"]
+            results["total_failed"] += detail["orders_failed"]
+            results["orders_working"] += detail["orders_working"]
+            results["crossed_quantity"] += detail["crossed_quantity"]
+            results["symbols_processed"] += 1
 
-            symbol_results = {
-                "symbol": symbol,
-                "orders_executed": 0,
-                "orders_failed": 0,
+        book_fills(self.db, fills)
+        self.db.commit()
+        publish_fills(fills)
+
+        if latencies:
+            results["broker_latency_ms"] = {
+                "total": sum(latencies),
+                "max": max(latencies),
+                "mean": sum(latencies) / len(latencies),
             }
+        results["cycle_ms"] = (time.perf_counter() - cycle_start) * 1000
 
-            # Execute each order
-            for order in orders:
-                success, error = await self.trading_service.execute_trade(order.id)
-                if success:
-                    symbol_results["orders_executed"] += 1
-                    results["total_executed"] += 1
-                else:
-                    symbol_results["orders_failed"] += 1
-                    results["total_failed"] += 1
-
-            results["details"].append(symbol_results)
-            results["symbols_processed"] += 1
+        record_metric("order_aggregation_broker_orders", results["broker_orders"])
+        record_metric("order_aggregation_cycle_ms", results["cycle_ms"], "histogram")
+        for latency in latencies:
+            record_metric("order_aggregation_broker_latency_ms", latency, "histogram")
 
+        logger.info(
+            f"Aggregation cycle: {results['total_executed']} orders in "
+            f"{results['symbols_processed']} symbols, {results['broker_orders']} "
+            f"broker orders, {results['cycle_ms']:.0f}ms"
+        )
         return results
+
+    def run_aggregation_cycle(self, force: bool = False) -> Dict[str, Any]:
+        """Run one aggregation cycle from synchronous code."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.execute_aggregated_orders(force=force))
+        raise RuntimeError(
+            "run_aggregation_cycle cannot run inside an event loop; "
+            "await execute_aggregated_orders() instead"
+        )
+
+    async def reconcile_working_orders(self, fills: List[Fill]) -> int:
+        """
+        Apply final results of broker orders placed in earlier cycles.
+
+        Orders of a finished broker order get their share of its fills and
+        are detached from it; unfinished broker orders are left alone.
+
+        Args:
+            fills: Receives the fills to book
+
+        Returns:
+            Number of orders that received a fill
+        """
+        working = (
+            self._orders()
+            .filter(Trade.broker_order_id.isnot(None))
+            .with_entities(
+                Trade.broker_order_id,
+                Trade.symbol,
+                Trade.trade_type,
+                func.sum(REMAINING_QUANTITY),
+            )
+            .group_by(Trade.broker_order_id, Trade.symbol, Trade.trade_type)
+            .all()
+        )
+
+        executed = 0
+        for broker_order_id, symbol, side, outstanding in working:
+            try:
+                status = await asyncio.to_thread(
+                    self.broker.get_trade_status, broker_order_id
+                )
+                if not broker_order_done(status, float(outstanding or 0)):
+                    continue
+                filled = float(status.get("filled_quantity") or 0)
+                price = status.get("filled_price")
+                if filled > 0 and not price:
+                    quote = await asyncio.to_thread(self.broker.get_quote, symbol)
+                    price = quote_price(quote)
+                    if price is None:
+                        raise ValueError(f"No price in {symbol} quote")
+            except Exception as e:
+                logger.error(f"Status of broker order {broker_order_id} failed: {e}")
+                continue
+
+            ratio = min(1.0, filled / outstanding) if outstanding else 1.0
+            updated = self._fill(
+                self._orders().filter(Trade.broker_order_id == broker_order_id),
+                symbol,
+                TradeType(side),
+                ratio,
+                float(price or 0),
+                broker_order_id if ratio >= 1.0 else None,
+                fills,
+            )
+            if ratio > 0:
+                executed += updated
+        return executed
+
+    async def _route(
+        self, book: SymbolBook, semaphore: asyncio.Semaphore
+    ) -> Tuple[SymbolBook, Dict[str, Any]]:
+        """Send the residual of ``book`` to the broker, or price the cross."""
+        fill: Dict[str, Any] = {}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if book.residual_side:
+                    order = Trade(
+                        symbol=book.symbol,
+                        quantity=abs(book.net_quantity),
+                        trade_type=book.residual_side,
+                        order_type=OrderType.MARKET,
+                        status=TradeStatus.PENDING,
+                        is_fractional=True,
+                    )
+                    result = await asyncio.to_thread(self.broker.execute_trade, order)
+                    fill["is_order"] = True
+                    fill["broker_order_id"] = result.get(
+                        "broker_order_id"
+                    ) or result.get("trade_id")
+                    fill["done"] = broker_order_done(result, order.quantity)
+                    if fill["done"]:
+                        fill["filled_quantity"] = float(
+                            result.get("filled_quantity") or 0
+                        )
+                        fill["price"] = result.get("filled_price")
+                # The crossed part and any broker fill need a clearing price
+                if not fill.get("price") and (
+                    book.crossed_quantity > 0 or fill.get("filled_quantity")
+                ):
+                    quote = await asyncio.to_thread(self.broker.get_quote, book.symbol)
+                    fill["price"] = quote_price(quote)
+                    if fill["price"] is None:
+                        raise ValueError(f"No price in {book.symbol} quote")
+            except Exception as e:
+                logger.error(f"Aggregated order for {book.symbol} failed: {e}")
+                fill["error"] = str(e)
+            fill["latency_ms"] = (time.perf_counter() - started) * 1000
+        return book, fill
+
+    def _allocate(
+        self,
+        book: SymbolBook,
+        fill: Dict[str, Any],
+        as_of: datetime,
+        time_window: Optional[int],
+        fills: List[Fill],
+    ) -> Dict[str, Any]:
+        """Write the symbol's fills back to its orders in bulk.
+
+        Both sides get the crossed quantity; the residual side also gets
+        whatever the broker has filled. Orders on the residual side of an
+        unfinished broker order stay attached to it.
+        """
+        detail = {
+            "symbol": book.symbol,
+            "orders_executed": 0,
+            "orders_failed": 0,
+            "orders_working": 0,
+            "crossed_quantity": 0.0,
+            "routed_quantity": 0.0,
+            "broker_order_id": fill.get("broker_order_id"),
+        }
+        if "error" in fill and not fill.get("broker_order_id"):
+            # Nothing reached the broker: leave the orders for the next cycle
+            detail["orders_failed"] = book.order_count
+            detail["error"] = fill["error"]
+            return detail
+
+        working = fill.get("is_order") and not fill.get("done")
+        routed = min(fill.get("filled_quantity", 0.0), abs(book.net_quantity))
+        price = float(fill.get("price") or 0)
+        if price <= 0 and (book.crossed_quantity > 0 or routed > 0):
+            # Never fill at a guessed price. Orders behind a placed broker
+            # order stay attached to it and are reconciled next cycle.
+            detail["error"] = fill.get("error") or "No price available"
+            if fill.get("broker_order_id"):
+                side = TradeType(book.residual_side)
+                detail["orders_working"] = self._fill(
+                    self._pending(as_of, time_window).filter(
+                        Trade.symbol == book.symbol, Trade.trade_type == side
+                    ),
+                    book.symbol,
+                    side,
+                    0.0,
+                    price,
+                    fill["broker_order_id"],
+                    fills,
+                )
+            detail["orders_failed"] = book.order_count - detail["orders_working"]
+            return detail
+        detail["crossed_quantity"] = book.crossed_quantity
+        detail["routed_quantity"] = routed
+
+        for side, quantity in (
+            (TradeType.BUY, book.buy_quantity),
+            (TradeType.SELL, book.sell_quantity),
+        ):
+            if quantity <= 0:
+                continue
+            orders = self._pending(as_of, time_window).filter(
+                Trade.symbol == book.symbol, Trade.trade_type == side
+            )
+            if book.residual_side != side.value:
+                # Fully crossed
+                detail["orders_executed"] += self._fill(
+                    orders,
+                    book.symbol,
+                    side,
+                    1.0,
+                    price,
+                    fill.get("broker_order_id"),
+                    fills,
+                )
+                continue
+
+            ratio = min(1.0, (book.crossed_quantity + routed) / quantity)
+            if working:
+                detail["orders_working"] += self._fill(
+                    orders,
+                    book.symbol,
+                    side,
+                    ratio,
+                    price,
+                    fill.get("broker_order_id"),
+                    fills,
+                )
+            elif ratio > 0:
+                detail["orders_executed"] += self._fill(
+                    orders,
+                    book.symbol,
+                    side,
+                    ratio,
+                    price,
+                    fill.get("broker_order_id") if ratio >= 1.0 else None,
+                    fills,
+                )
+        return detail
+
+    def _fill(
+        self,
+        orders: Query,
+        symbol: str,
+        side: TradeType,
+        ratio: float,
+        price: float,
+        broker_order_id: Optional[str],
+        fills: List[Fill],
+    ) -> int:
+        """
+        Fill ``ratio`` of each order's remaining quantity at ``price``.
+
+        Orders that are now complete become FILLED; the others stay
+        PENDING with ``broker_order_id`` set to the broker order they wait
+        on, or cleared to be routed again.
+
+        Returns:
+            Number of orders updated
+        """
+        if ratio <= 0:
+            return orders.update(
+                {Trade.broker_order_id: broker_order_id}, synchronize_session=False
+            )
+        if ratio >= 1.0 - 1e-9:
+            ratio = 1.0
+
+        # Dollar-based orders are sized from the clearing price
+        size = func.coalesce(Trade.quantity, Trade.investment_amount / price)
+        new = (size - FILLED_QUANTITY) * ratio
+        filled_value = FILLED_QUANTITY * func.coalesce(Trade.filled_price, 0.0)
+
+        fills.extend(
+            Fill.of(portfolio_id, symbol, side, quantity, price)
+            for portfolio_id, quantity in orders.with_entities(
+                Trade.portfolio_id, func.sum(new)
+            ).group_by(Trade.portfolio_id)
+            if quantity
+        )
+
+        now = datetime.utcnow()
+        values = {
+            Trade.quantity: size,
+            Trade.filled_quantity: FILLED_QUANTITY + new,
+            Trade.filled_price: (filled_value + new * price) / (FILLED_QUANTITY + new),
+            Trade.total_amount: filled_value + new * price,
+            Trade.broker_order_id: broker_order_id,
+        }
+        if ratio >= 1.0:
+            values.update(
+                {
+                    Trade.status: TradeStatus.FILLED,
+                    Trade.executed_at: now,
+                    Trade.filled_at: now,
+                }
+            )
+        return orders.update(values, synchronize_session=False)
@@ -14,6 +14,11 @@ from app.models.holding import Holding
 from app.models.portfolio import Portfolio
 from app.models.trade import OrderType, Trade, TradeStatus, TradeType
 from app.services.market_data import MarketDataService
+from app.trading_engine.engine.fill_simulator import (
+    FillSimulator,
+    SquareRootImpact,
+    range_volatility,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +80,16 @@ class PaperTradingService:
         self.volatility_slippage_multiplier = 2.0
         self.volume_impact_threshold = 10000  # Shares threshold for market impact
 
+        # Shared execution model (same impact law as the backtester). Used when
+        # the quote carries volume; otherwise the heuristic slippage applies
+        self.fill_simulator = FillSimulator(
+            impact_model=SquareRootImpact(spread_bps=self.base_slippage_bps * 2),
+            participation_rate=getattr(
+                settings, "PAPER_TRADING_MAX_PARTICIPATION", 0.1
+            ),
+        )
+        self.default_daily_volatility = 0.02
+
     async def execute_paper_trade(
         self, trade: Trade, simulate_realistic_conditions: bool = True
     ) -> Dict[str, any]:
@@ -117,7 +132,7 @@ class PaperTradingService:
 
             # Calculate execution parameters
             execution_result = await self._simulate_order_execution(
-                trade, current_price, simulate_realistic_conditions
+                trade, current_price, simulate_realistic_conditions, quote
             )
 
             if execution_result["status"] == "filled":
@@ -148,24 +163,36 @@ class PaperTradingService:
             return self._create_error_result(trade, str(e))
 
     async def _simulate_order_execution(
-        self, trade: Trade, current_price: float, realistic: bool
+        self,
+        trade: Trade,
+        current_price: float,
+        realistic: bool,
+        quote: Optional[Dict] = None,
     ) -> Dict[str, any]:
         """Simulate realistic order execution."""
 
         # Market orders vs limit orders
         if trade.order_type == OrderType.MARKET:
-            return await self._execute_market_order(trade, current_price, realistic)
+            return await self._execute_market_order(
+                trade, current_price, realistic, quote
+            )
         elif trade.order_type == OrderType.LIMIT:
             return await self._execute_limit_order(trade, current_price, realistic)
         elif trade.order_type in [OrderType.STOP, OrderType.STOP_LOSS]:
-            return await self._execute_stop_order(trade, current_price, realistic)
+            return await self._execute_stop_order(
+                trade, current_price, realistic, quote
+            )
         else:
             return self._create_rejection_result(
                 trade, f"Unsupported order type: {trade.order_type}"
             )
 
     async def _execute_market_order(
-        self, trade: Trade, current_price: float, realistic: bool
+        self,
+        trade: Trade,
+        current_price: float,
+        realistic: bool,
+        quote: Optional[Dict] = None,
     ) -> Dict[str, any]:
         """Execute market order with realistic slippage."""
 
@@ -197,7 +224,7 @@ class PaperTradingService:
             )
 
         # 2. Calculate slippage
-        slippage_bps = await self._calculate_slippage(trade, current_price)
+        slippage_bps = await self._calculate_slippage(trade, current_price, quote)
         slippage_factor = 1 + (slippage_bps / 10000.0)
 
         # Apply slippage direction based on trade type
@@ -218,7 +245,14 @@ class PaperTradingService:
                 trade, "Neither quantity nor investment_amount specified"
             )
         filled_quantity = quantity_float
-        if random.random() < self.partial_fill_probability:
+        liquidity = self._quote_liquidity(quote)
+        if liquidity:
+            # Fill what the participation limit allows against traded volume
+            filled_quantity = self.fill_simulator.quote_fill(
+                self._side(trade), quantity_float, current_price, *liquidity
+            )["filled_quantity"]
+            filled_quantity = round(filled_quantity, 6)
+        elif random.random() < self.partial_fill_probability:
             # Partial fill: 60-95% of requested quantity
             fill_percentage = random.uniform(0.6, 0.95)
             filled_quantity = quantity_float * fill_percentage
@@ -325,7 +359,11 @@ class PaperTradingService:
         }
 
     async def _execute_stop_order(
-        self, trade: Trade, current_price: float, realistic: bool
+        self,
+        trade: Trade,
+        current_price: float,
+        realistic: bool,
+        quote: Optional[Dict] = None,
     ) -> Dict[str, any]:
         """Execute stop order when triggered."""
 
@@ -357,7 +395,9 @@ class PaperTradingService:
         # Stop triggered - execute as market order
         # Stop orders typically have worse slippage due to urgency
         if realistic:
-            base_slippage = await self._calculate_slippage(trade, current_price)
+            base_slippage = await self._calculate_slippage(
+                trade, current_price, quote
+            )
             stop_slippage_multiplier = 1.5  # Stop orders get worse fills
             slippage_bps = base_slippage * stop_slippage_multiplier
         else:
@@ -388,9 +428,20 @@ class PaperTradingService:
             "notes": f"Stop order triggered and filled at {execution_price:.4f}",
         }
 
-    async def _calculate_slippage(self, trade: Trade, current_price: float) -> float:
+    async def _calculate_slippage(
+        self, trade: Trade, current_price: float, quote: Optional[Dict] = None
+    ) -> float:
         """Calculate realistic slippage in basis points."""
 
+        liquidity = self._quote_liquidity(quote)
+        if liquidity:
+            # Square-root impact against the session's traded volume
+            trade_quantity = float(trade.quantity or 0)
+            impact_bps = self.fill_simulator.quote_fill(
+                self._side(trade), trade_quantity, current_price, *liquidity
+            )["impact_bps"]
+            return min(impact_bps * self._get_time_of_day_multiplier(), 50.0)
+
         # Base slippage
         base_slippage = self.base_slippage_bps
 
@@ -421,6 +472,21 @@ class PaperTradingService:
 
         return min(total_slippage, 50.0)  # Cap at 50 bps
 
+    @staticmethod
+    def _side(trade: Trade) -> int:
+        return 1 if trade.trade_type == TradeType.BUY else -1
+
+    def _quote_liquidity(self, quote: Optional[Dict]) -> Optional[Tuple[float, float]]:
+        """Traded volume and daily volatility from a quote, if it has volume."""
+        if not quote or not quote.get("volume"):
+            return None
+
+        volatility = self.default_daily_volatility
+        high, low = quote.get("high"), quote.get("low")
+        if high and low and high > low:
+            volatility = float(range_volatility(high, low))
+        return float(quote["volume"]), volatility
+
     def _calculate_commission(self, quantity: float, price: float) -> float:
         """Calculate trading commission."""
         commission = quantity * self.commission_per_share
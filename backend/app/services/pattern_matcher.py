@@ -0,0 +1,183 @@
+"""
+Multi-pattern matcher
+
+Compiles many regular expressions into one scanner so a text is walked once
+instead of once per pattern. Used by the query/mode routers and the
+streaming compliance scanner.
+
+``prefilter`` is a zero-width alternation of every pattern, so a single
+``finditer`` stops only at positions where at least one pattern can start.
+Plain literals are folded into a trie and patterns anchored on ``\\b`` share
+one anchor, so most positions are rejected after a character or two.
+
+At each candidate position a probe of optional lookaheads, one named group
+per pattern, reports every pattern matching there in one call. Probes are
+split by first character so only patterns that can start with the
+character at hand are tried.
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+_QUANTIFIERS = "?*+{"
+
+
+def _literal(pattern: str) -> Optional[str]:
+    """Return the text a pattern matches if it is an escaped literal."""
+    text = re.sub(r"\\(.)", r"\1", pattern)
+    return text if text and re.escape(text) == pattern else None
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+def _first_char(pattern: str) -> Optional[str]:
+    """First character every match must start with, if it is fixed."""
+    literal = _literal(pattern)
+    if literal is not None:
+        return literal[0]
+    if _has_top_level_alternation(pattern):
+        return None
+    body = pattern[2:] if pattern.startswith(r"\b") else pattern
+    if len(body) < 2 or not body[0].isalnum() or body[1] in _QUANTIFIERS:
+        return None
+    return body[0]
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """Regex alternation of literals factored on shared prefixes."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + emit(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return emit(trie)
+
+
+class MultiPatternMatcher:
+    """One-pass matcher over a list of regular expressions."""
+
+    def __init__(self, patterns: Sequence[Optional[str]], flags: int = 0):
+        """
+        Compile the combined scanner.
+
+        Args:
+            patterns: Regular expressions; ``None`` entries never match but
+                keep their index so callers can map hits back to rules
+            flags: ``re`` flags applied to every pattern
+        """
+        self.patterns = list(patterns)
+        self.flags = flags
+        self._fold = bool(flags & re.IGNORECASE)
+
+        literals = []
+        anchored = []
+        others = []
+        self._buckets: Dict[Optional[str], List[int]] = {}
+        for index, pattern in enumerate(self.patterns):
+            if pattern is None:
+                continue
+            literal = _literal(pattern)
+            if literal is not None:
+                literals.append(literal)
+            elif pattern.startswith(r"\b") and not _has_top_level_alternation(
+                pattern
+            ):
+                anchored.append(f"(?:{pattern[2:]})")
+            else:
+                others.append(f"(?:{pattern})")
+            first = _first_char(pattern)
+            if first is not None and self._fold:
+                first = first.lower()
+            self._buckets.setdefault(first, []).append(index)
+
+        alternatives = []
+        if literals:
+            alternatives.append(_trie_pattern(literals))
+        if anchored:
+            alternatives.append(r"\b(?:" + "|".join(anchored) + ")")
+        alternatives.extend(others)
+        self.prefilter = (
+            re.compile("(?=" + "|".join(alternatives) + ")", flags)
+            if alternatives
+            else None
+        )
+        self._probes: Dict[Optional[str], re.Pattern] = {}
+
+    def _probe(self, char: str) -> re.Pattern:
+        key = char.lower() if self._fold else char
+        probe = self._probes.get(key)
+        if probe is None:
+            indices = sorted(
+                self._buckets.get(key, []) + self._buckets.get(None, [])
+            )
+            probe = re.compile(
+                "".join(
+                    f"(?:(?=(?P<p{i}>{self.patterns[i]})))?" for i in indices
+                ),
+                self.flags,
+            )
+            self._probes[key] = probe
+        return probe
+
+    def scan(
+        self, text: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield ``(position, pattern_index, match_end)`` for every hit.
+
+        Args:
+            text: Text to scan
+            start: First candidate start position
+            end: Stop before this start position (defaults to the end)
+        """
+        if self.prefilter is None:
+            return
+        end = len(text) if end is None else end
+        for candidate in self.prefilter.finditer(text, start):
+            position = candidate.start()
+            if position >= end:
+                break
+            hit = self._probe(text[position]).match(text, position)
+            for name, value in hit.groupdict().items():
+                if value is not None:
+                    yield position, int(name[1:]), hit.end(name)
+
+    def spans(self, text: str) -> Dict[int, List[Tuple[int, int]]]:
+        """Map each matching pattern index to its ``(start, end)`` spans."""
+        found: Dict[int, List[Tuple[int, int]]] = {}
+        for position, index, match_end in self.scan(text):
+            found.setdefault(index, []).append((position, match_end))
+        return found
@@ -0,0 +1,684 @@
+"""
+Batched long-only portfolio optimization core.
+
+Solves the allocation problems behind PortfolioOptimizer and
+AIPortfolioManager with analytic gradients, a Ledoit-Wolf shrinkage
+covariance shared per symbol universe, warm starts from each portfolio's
+previous weights and a per-universe efficient frontier that every user with
+the same holdings reuses. Large batches (scheduled re-optimization for all
+users) are spread over a process pool.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from sklearn.covariance import ledoit_wolf
+
+from app.services.risk_engine import (
+    TRADING_DAYS_PER_YEAR,
+    PortfolioRiskEngine,
+    get_risk_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SHARPE = "max_sharpe"
+MIN_VARIANCE = "min_variance"
+TARGET_RETURN = "target_return"
+RISK_PARITY = "risk_parity"
+
+MIN_OBSERVATIONS = 20
+SOLVER_OPTIONS = {"ftol": 1e-10, "maxiter": 300}
+
+Bound = Union[float, Sequence[float], np.ndarray]
+
+
+# ----------------------------------------------------------------------
+# Objectives with analytic gradients
+# ----------------------------------------------------------------------
+
+
+def negative_sharpe(
+    weights: np.ndarray,
+    expected_returns: np.ndarray,
+    covariance: np.ndarray,
+    risk_free_rate: float,
+) -> Tuple[float, np.ndarray]:
+    """Negative Sharpe ratio and its gradient with respect to the weights."""
+    sigma_w = covariance @ weights
+    variance = float(weights @ sigma_w)
+    if variance <= 0:
+        return 0.0, np.zeros_like(weights)
+    risk = np.sqrt(variance)
+    excess = float(weights @ expected_returns) - risk_free_rate
+    gradient = -(expected_returns / risk - excess * sigma_w / risk**3)
+    return -excess / risk, gradient
+
+
+def portfolio_variance(
+    weights: np.ndarray, covariance: np.ndarray
+) -> Tuple[float, np.ndarray]:
+    """Portfolio variance and its gradient."""
+    sigma_w = covariance @ weights
+    return float(weights @ sigma_w), 2.0 * sigma_w
+
+
+def risk_parity_deviation(
+    weights: np.ndarray, covariance: np.ndarray
+) -> Tuple[float, np.ndarray]:
+    """
+    Squared deviation of relative risk contributions from 1/N, and gradient.
+
+    Contributions are normalized by the portfolio variance so the objective
+    is scale-free and well conditioned for SLSQP.
+    """
+    sigma_w = covariance @ weights
+    variance = float(weights @ sigma_w)
+    if variance <= 0:
+        return 0.0, np.zeros_like(weights)
+    contributions = weights * sigma_w
+    deviation = contributions / variance - 1.0 / len(weights)
+    gradient = (2.0 / variance) * (
+        deviation * sigma_w + covariance @ (deviation * weights)
+    ) - (4.0 / variance**2) * float(deviation @ contributions) * sigma_w
+    return float(deviation @ deviation), gradient
+
+
+def budget_constraint() -> Dict:
+    """Fully-invested constraint (weights sum to one) with its Jacobian."""
+    return {
+        "type": "eq",
+        "fun": lambda w: np.sum(w) - 1.0,
+        "jac": lambda w: np.ones_like(w),
+    }
+
+
+def target_return_constraint(
+    expected_returns: np.ndarray, target_return: float
+) -> Dict:
+    """Equality constraint on the portfolio's expected return."""
+    return {
+        "type": "eq",
+        "fun": lambda w: float(w @ expected_returns) - target_return,
+        "jac": lambda w: expected_returns,
+    }
+
+
+# ----------------------------------------------------------------------
+# Problems and solutions
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class OptimizationProblem:
+    """One allocation problem; picklable so it can be solved in a worker."""
+
+    objective: str
+    expected_returns: np.ndarray
+    covariance: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    risk_free_rate: float = 0.02
+    target_return: Optional[float] = None
+    initial_weights: Optional[np.ndarray] = None
+    key: Optional[Hashable] = None
+
+
+@dataclass
+class OptimizationSolution:
+    """Result of solving an OptimizationProblem."""
+
+    key: Optional[Hashable]
+    weights: np.ndarray
+    success: bool
+    objective_value: float
+    iterations: int
+    message: str = ""
+
+
+def expand_bounds(
+    n_assets: int, lower: Bound, upper: Bound
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Broadcast scalar or per-asset bounds to arrays."""
+    lower = np.broadcast_to(np.asarray(lower, dtype=float), (n_assets,)).copy()
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), (n_assets,)).copy()
+    return lower, upper
+
+
+def project_to_bounds(
+    weights: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """
+    Euclidean projection onto {lower <= w <= upper, sum(w) = 1}.
+
+    Used to turn a warm start (e.g. last week's weights, which may violate
+    new bounds) into a feasible initial point. If the bounds admit no
+    fully-invested portfolio the clipped weights are returned unchanged.
+    """
+    weights = np.asarray(weights, dtype=float)
+    if lower.sum() > 1.0 or upper.sum() < 1.0:
+        return np.clip(weights, lower, upper)
+
+    low, high = float((lower - weights).min()), float((upper - weights).max())
+    for _ in range(100):
+        shift = 0.5 * (low + high)
+        total = np.clip(weights + shift, lower, upper).sum()
+        if abs(total - 1.0) < 1e-12:
+            break
+        if total < 1.0:
+            low = shift
+        else:
+            high = shift
+    return np.clip(weights + 0.5 * (low + high), lower, upper)
+
+
+def solve_problem(problem: OptimizationProblem) -> OptimizationSolution:
+    """Solve one problem with SLSQP using analytic gradients."""
+    mu = np.asarray(problem.expected_returns, dtype=float)
+    cov = np.asarray(problem.covariance, dtype=float)
+    n_assets = len(mu)
+
+    warm = problem.initial_weights
+    if warm is not None and len(warm) == n_assets:
+        initial = np.asarray(warm, dtype=float)
+    elif problem.objective == RISK_PARITY:
+        inverse_vol = 1.0 / np.sqrt(np.maximum(np.diag(cov), 1e-12))
+        initial = inverse_vol / inverse_vol.sum()
+    else:
+        initial = np.full(n_assets, 1.0 / n_assets)
+    initial = project_to_bounds(initial, problem.lower, problem.upper)
+
+    constraints = [budget_constraint()]
+    if problem.objective == MAX_SHARPE:
+        objective, args = negative_sharpe, (mu, cov, problem.risk_free_rate)
+    elif problem.objective in (MIN_VARIANCE, TARGET_RETURN):
+        objective, args = portfolio_variance, (cov,)
+        if problem.objective == TARGET_RETURN:
+            if problem.target_return is None:
+                raise ValueError("target_return is required for TARGET_RETURN")
+            constraints.append(target_return_constraint(mu, problem.target_return))
+    elif problem.objective == RISK_PARITY:
+        objective, args = risk_parity_deviation, (cov,)
+    else:
+        raise ValueError(f"Unknown optimization objective: {problem.objective}")
+
+    try:
+        result = minimize(
+            objective,
+            initial,
+            args=args,
+            jac=True,
+            method="SLSQP",
+            bounds=list(zip(problem.lower, problem.upper)),
+            constraints=constraints,
+            options=SOLVER_OPTIONS,
+        )
+    except Exception as e:
+        return OptimizationSolution(problem.key, initial, False, np.nan, 0, str(e))
+
+    return OptimizationSolution(
+        key=problem.key,
+        weights=result.x,
+        success=bool(result.success),
+        objective_value=float(result.fun),
+        iterations=int(result.nit),
+        message=str(result.message),
+    )
+
+
+# ----------------------------------------------------------------------
+# Universe models and efficient frontier
+# ----------------------------------------------------------------------
+
+
+def shrinkage_covariance(
+    returns: np.ndarray, periods_per_year: int = TRADING_DAYS_PER_YEAR
+) -> Tuple[np.ndarray, float]:
+    """Annualized Ledoit-Wolf covariance of the complete rows of `returns`."""
+    returns = returns[~np.isnan(returns).any(axis=1)]
+    covariance, shrinkage = ledoit_wolf(returns)
+    return covariance * periods_per_year, float(shrinkage)
+
+
+@dataclass
+class EfficientFrontier:
+    """Long-only efficient frontier for one universe and set of bounds."""
+
+    returns: np.ndarray  # (K,)
+    risks: np.ndarray  # (K,)
+    weights: np.ndarray  # (K, N)
+    max_sharpe: OptimizationSolution
+
+    def nearest(self, target_return: float) -> np.ndarray:
+        """Weights of the frontier point closest to a target return."""
+        return self.weights[int(np.argmin(np.abs(self.returns - target_return)))]
+
+
+@dataclass
+class UniverseModel:
+    """Annualized return/risk estimates shared by every portfolio on a universe."""
+
+    symbols: List[str]
+    expected_returns: np.ndarray
+    covariance: np.ndarray
+    shrinkage: float
+    n_observations: int
+    frontiers: Dict[bytes, EfficientFrontier] = field(default_factory=dict)
+
+    @classmethod
+    def from_returns(
+        cls,
+        returns: pd.DataFrame,
+        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+    ) -> "UniverseModel":
+        values = returns.to_numpy(dtype=float)
+        complete = values[~np.isnan(values).any(axis=1)]
+        covariance, shrinkage = shrinkage_covariance(complete, periods_per_year)
+        return cls(
+            symbols=[str(c) for c in returns.columns],
+            expected_returns=complete.mean(axis=0) * periods_per_year,
+            covariance=covariance,
+            shrinkage=shrinkage,
+            n_observations=len(complete),
+        )
+
+    def problem(
+        self,
+        objective: str,
+        lower: Bound,
+        upper: Bound,
+        risk_free_rate: float = 0.02,
+        **kwargs,
+    ) -> OptimizationProblem:
+        lower, upper = expand_bounds(len(self.symbols), lower, upper)
+        kwargs.setdefault("expected_returns", self.expected_returns)
+        return OptimizationProblem(
+            objective=objective,
+            covariance=self.covariance,
+            lower=lower,
+            upper=upper,
+            risk_free_rate=risk_free_rate,
+            **kwargs,
+        )
+
+
+def _max_return_weights(
+    expected_returns: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """Highest-return fully-invested portfolio (greedy fill of the box)."""
+    weights = lower.copy()
+    remaining = 1.0 - weights.sum()
+    for i in np.argsort(-expected_returns):
+        add = min(upper[i] - weights[i], remaining)
+        weights[i] += add
+        remaining -= add
+        if remaining <= 0:
+            break
+    return weights
+
+
+def build_frontier(
+    model: UniverseModel,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    risk_free_rate: float,
+    points: int = 20,
+) -> EfficientFrontier:
+    """
+    Trace the efficient frontier from the minimum-variance portfolio to the
+    maximum-return portfolio, warm-starting each point from its neighbour,
+    then refine the best-Sharpe point with a direct Sharpe solve.
+    """
+    mu, cov = model.expected_returns, model.covariance
+    min_var = solve_problem(
+        model.problem(MIN_VARIANCE, lower, upper, risk_free_rate)
+    )
+    top = _max_return_weights(mu, lower, upper)
+
+    rows, previous = [], min_var.weights
+    for target in np.linspace(float(min_var.weights @ mu), float(top @ mu), points):
+        solution = solve_problem(
+            model.problem(
+                TARGET_RETURN,
+                lower,
+                upper,
+                risk_free_rate,
+                target_return=float(target),
+                initial_weights=previous,
+            )
+        )
+        if solution.success:
+            rows.append(solution.weights)
+            previous = solution.weights
+    weights = np.array(rows) if rows else min_var.weights[None, :]
+
+    returns = weights @ mu
+    risks = np.sqrt(np.einsum("ki,ij,kj->k", weights, cov, weights))
+    sharpe = np.where(
+        risks > 0, (returns - risk_free_rate) / np.maximum(risks, 1e-12), -np.inf
+    )
+    best = weights[int(np.argmax(sharpe))]
+
+    max_sharpe = solve_problem(
+        model.problem(MAX_SHARPE, lower, upper, risk_free_rate, initial_weights=best)
+    )
+    return EfficientFrontier(returns, risks, weights, max_sharpe)
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+
+
+class PortfolioOptimizationEngine:
+    """
+    Shared optimizer state across users.
+
+    Universe models (expected returns + shrinkage covariance) are cached per
+    returns snapshot for the day, frontiers per (universe, bounds), and the
+    last solution per (portfolio key, objective) seeds the next solve.
+    """
+
+    def __init__(
+        self,
+        risk_engine: Optional[PortfolioRiskEngine] = None,
+        risk_free_rate: float = 0.02,
+        frontier_points: int = 20,
+        max_workers: Optional[int] = None,
+        parallel_threshold: int = 32,
+        max_cached_models: int = 256,
+    ):
+        self._risk_engine = risk_engine
+        self.risk_free_rate = risk_free_rate
+        self.frontier_points = frontier_points
+        self.max_workers = (
+            max_workers
+            if max_workers is not None
+            else max(1, (os.cpu_count() or 1) - 1)
+        )
+        self.parallel_threshold = parallel_threshold
+        self.max_cached_models = max_cached_models
+
+        self._models: Dict[str, Tuple[date, UniverseModel]] = {}
+        self._previous_weights: Dict[Tuple[Hashable, str], Dict[str, float]] = {}
+
+    @property
+    def risk_engine(self) -> PortfolioRiskEngine:
+        if self._risk_engine is None:
+            self._risk_engine = get_risk_engine()
+        return self._risk_engine
+
+    # ------------------------------------------------------------------
+    # Universe models
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _returns_key(returns: pd.DataFrame) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("|".join(map(str, returns.columns)).encode())
+        digest.update(np.ascontiguousarray(returns.to_numpy(dtype=float)).tobytes())
+        return digest.hexdigest()
+
+    def model_from_returns(self, returns: pd.DataFrame) -> UniverseModel:
+        """Get (or build) the cached universe model for a returns snapshot."""
+        key = self._returns_key(returns)
+        today = datetime.utcnow().date()
+        cached = self._models.get(key)
+        if cached and cached[0] == today:
+            return cached[1]
+
+        model = UniverseModel.from_returns(returns)
+        if len(self._models) >= self.max_cached_models:
+            # Dicts keep insertion order: drop the oldest snapshot
+            self._models.pop(next(iter(self._models)))
+        self._models[key] = (today, model)
+        return model
+
+    async def get_universe_model(
+        self, symbols: Sequence[str], lookback_days: Optional[int] = None
+    ) -> Optional[UniverseModel]:
+        """Universe model from the shared risk engine's returns matrix."""
+        matrix = await self.risk_engine.get_returns_matrix(symbols, lookback_days)
+        returns = matrix.to_frame(dropna=False)
+        returns = returns.loc[:, returns.count() > MIN_OBSERVATIONS].dropna()
+        if returns.shape[1] < 2 or len(returns) <= MIN_OBSERVATIONS:
+            return None
+        return self.model_from_returns(returns)
+
+    def frontier(
+        self, model: UniverseModel, lower: Bound, upper: Bound
+    ) -> EfficientFrontier:
+        """Efficient frontier for the model and bounds, computed once."""
+        lower, upper = expand_bounds(len(model.symbols), lower, upper)
+        key = lower.tobytes() + upper.tobytes()
+        if key not in model.frontiers:
+            model.frontiers[key] = build_frontier(
+                model, lower, upper, self.risk_free_rate, self.frontier_points
+            )
+        return model.frontiers[key]
+
+    # ------------------------------------------------------------------
+    # Warm starts
+    # ------------------------------------------------------------------
+
+    def warm_start(
+        self, key: Optional[Hashable], objective: str, symbols: Sequence[str]
+    ) -> Optional[np.ndarray]:
+        """Previous weights for a portfolio, re-indexed onto `symbols`."""
+        if key is None:
+            return None
+        previous = self._previous_weights.get((key, objective))
+        if not previous:
+            return None
+        weights = np.array([previous.get(s, 0.0) for s in symbols], dtype=float)
+        return weights if weights.sum() > 0 else None
+
+    def remember(
+        self,
+        key: Optional[Hashable],
+        objective: str,
+        symbols: Sequence[str],
+        weights: np.ndarray,
+    ) -> None:
+        if key is not None:
+            self._previous_weights[(key, objective)] = dict(
+                zip(symbols, map(float, weights))
+            )
+
+    # ------------------------------------------------------------------
+    # Solving
+    # ------------------------------------------------------------------
+
+    def build_problem(
+        self,
+        model: UniverseModel,
+        objective: str,
+        lower: Bound,
+        upper: Bound,
+        key: Optional[Hashable] = None,
+        target_return: Optional[float] = None,
+        expected_returns: Optional[np.ndarray] = None,
+        initial_weights: Optional[np.ndarray] = None,
+    ) -> OptimizationProblem:
+        """
+        Build a problem on a universe, choosing the best available warm start:
+        explicit weights, then this key's previous solution, then the shared
+        frontier (max-Sharpe point or nearest target-return point).
+        """
+        if initial_weights is None:
+            initial_weights = self.warm_start(key, objective, model.symbols)
+        if initial_weights is None and objective in (MAX_SHARPE, TARGET_RETURN):
+            frontier = self.frontier(model, lower, upper)
+            if objective == TARGET_RETURN and target_return is not None:
+                initial_weights = frontier.nearest(target_return)
+            else:
+                initial_weights = frontier.max_sharpe.weights
+
+        kwargs = {}
+        if expected_returns is not None:
+            kwargs["expected_returns"] = np.asarray(expected_returns, dtype=float)
+        return model.problem(
+            objective,
+            lower,
+            upper,
+            self.risk_free_rate,
+            target_return=target_return,
+            initial_weights=initial_weights,
+            key=key,
+            **kwargs,
+        )
+
+    def solve(
+        self, problem: OptimizationProblem, symbols: Optional[Sequence[str]] = None
+    ) -> OptimizationSolution:
+        """Solve one problem in-process and remember the result for `key`."""
+        solution = solve_problem(problem)
+        if solution.success and symbols is not None:
+            self.remember(problem.key, problem.objective, symbols, solution.weights)
+        return solution
+
+    def solve_many(
+        self,
+        problems: Sequence[OptimizationProblem],
+        symbols: Optional[Sequence[Sequence[str]]] = None,
+    ) -> List[OptimizationSolution]:
+        """
+        Solve a batch, on a process pool once it is large enough to amortize
+        worker start-up. `symbols[i]` (if given) records warm starts.
+        """
+        if len(problems) >= self.parallel_threshold and self.max_workers > 1:
+            chunksize = max(1, len(problems) // (self.max_workers * 4))
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                solutions = list(
+                    pool.map(solve_problem, problems, chunksize=chunksize)
+                )
+        else:
+            solutions = [solve_problem(p) for p in problems]
+
+        if symbols is not None:
+            for problem, solution, names in zip(problems, solutions, symbols):
+                if solution.success:
+                    self.remember(
+                        problem.key, problem.objective, names, solution.weights
+                    )
+        return solutions
+
+    def max_sharpe(
+        self,
+        model: UniverseModel,
+        lower: Bound,
+        upper: Bound,
+        key: Optional[Hashable] = None,
+    ) -> OptimizationSolution:
+        """
+        Max-Sharpe weights for a universe. The answer depends only on the
+        universe and bounds, so it comes straight from the shared frontier.
+        """
+        shared = self.frontier(model, lower, upper).max_sharpe
+        solution = OptimizationSolution(
+            key,
+            shared.weights.copy(),
+            shared.success,
+            shared.objective_value,
+            shared.iterations,
+            shared.message,
+        )
+        if solution.success:
+            self.remember(key, MAX_SHARPE, model.symbols, solution.weights)
+        return solution
+
+
+def benchmark_optimization(
+    n_assets: int = 20,
+    n_portfolios: int = 200,
+    n_observations: int = TRADING_DAYS_PER_YEAR,
+    max_workers: Optional[int] = None,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Compare solves/second of the per-request approach (sample covariance per
+    request, finite-difference gradients, equal-weight start) with the engine
+    (shared shrinkage covariance, analytic gradients, process pool) on a cold
+    run and on a warm re-run, as a scheduled weekly pass would see.
+
+    Each portfolio gets its own position cap so the problems are distinct.
+    """
+    rng = np.random.default_rng(seed)
+    factor = rng.normal(0.0003, 0.01, size=(n_observations, 1))
+    loadings = rng.uniform(0.5, 1.5, size=(1, n_assets))
+    noise = rng.normal(0.0002, 0.01, size=(n_observations, n_assets))
+    returns = factor @ loadings + noise
+    frame = pd.DataFrame(returns, columns=[f"S{i}" for i in range(n_assets)])
+    caps = rng.uniform(max(0.1, 1.5 / n_assets), 0.5, size=n_portfolios)
+    risk_free_rate = 0.02
+
+    # Baseline: what each request did before
+    start = time.perf_counter()
+    baseline_success = 0
+    for cap in caps:
+        mu = frame.mean().to_numpy() * TRADING_DAYS_PER_YEAR
+        cov = frame.cov().to_numpy() * TRADING_DAYS_PER_YEAR
+
+        def objective(w):
+            return -(w @ mu - risk_free_rate) / np.sqrt(w @ cov @ w)
+
+        result = minimize(
+            objective,
+            np.full(n_assets, 1.0 / n_assets),
+            method="SLSQP",
+            bounds=[(0.0, cap)] * n_assets,
+            constraints=[{"type": "eq", "fun": lambda w: np.sum(w) - 1.0}],
+        )
+        baseline_success += int(result.success)
+    baseline_elapsed = time.perf_counter() - start
+
+    engine = PortfolioOptimizationEngine(
+        risk_free_rate=risk_free_rate, max_workers=max_workers, parallel_threshold=1
+    )
+
+    def run() -> Tuple[float, List[OptimizationSolution]]:
+        began = time.perf_counter()
+        model = engine.model_from_returns(frame)
+        problems = [
+            engine.build_problem(model, MAX_SHARPE, 0.0, cap, key=i)
+            for i, cap in enumerate(caps)
+        ]
+        solutions = engine.solve_many(problems, [model.symbols] * len(problems))
+        return time.perf_counter() - began, solutions
+
+    cold_elapsed, cold = run()
+    warm_elapsed, warm = run()
+
+    return {
+        "n_assets": n_assets,
+        "n_portfolios": n_portfolios,
+        "max_workers": engine.max_workers,
+        "baseline_solves_per_sec": n_portfolios / baseline_elapsed,
+        "baseline_success_rate": baseline_success / n_portfolios,
+        "engine_cold_solves_per_sec": n_portfolios / cold_elapsed,
+        "engine_warm_solves_per_sec": n_portfolios / warm_elapsed,
+        "engine_success_rate": float(np.mean([s.success for s in warm])),
+        "cold_mean_iterations": float(np.mean([s.iterations for s in cold])),
+        "warm_mean_iterations": float(np.mean([s.iterations for s in warm])),
+    }
+
+
+# Global engine instance
+_optimization_engine_instance = None
+
+
+def get_optimization_engine() -> PortfolioOptimizationEngine:
+    """Get the global portfolio optimization engine instance."""
+    global _optimization_engine_instance
+    if _optimization_engine_instance is None:
+        _optimization_engine_instance = PortfolioOptimizationEngine()
+    return _optimization_engine_instance
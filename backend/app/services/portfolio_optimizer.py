@@ -5,6 +5,7 @@ Advanced portfolio optimization using Modern Portfolio Theory,
 risk management, and personalized rebalancing strategies.
 """
 
+import asyncio
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -17,6 +18,14 @@ from sqlalchemy.orm import Session
 from app.models.holding import Holding
 from app.models.portfolio import Portfolio
 from app.services.enhanced_market_data import enhanced_market_data_service
+from app.services.portfolio_optimization_engine import (
+    budget_constraint,
+    get_optimization_engine,
+    negative_sharpe,
+    portfolio_variance,
+    target_return_constraint,
+)
+from app.services.risk_engine import get_risk_engine
 
 logger = structlog.get_logger()
 
@@ -129,12 +138,21 @@ class PortfolioOptimizer:
             symbols = [h.symbol for h in holdings]
             returns_data = await self._get_returns_data(symbols)
 
-            if not returns_data or len(returns_data.columns) < 2:
+            if returns_data is None or len(returns_data.columns) < 2:
                 return {"error": "Insufficient data for optimization"}
 
-            # Calculate expected returns and covariance matrix
-            expected_returns = returns_data.mean() * 252  # Annualized
-            cov_matrix = returns_data.cov() * 252  # Annualized
+            # Annualized expected returns and shrinkage covariance, shared by
+            # every portfolio on the same universe
+            universe = get_optimization_engine().model_from_returns(returns_data)
+            expected_returns = universe.expected_returns
+            cov_matrix = universe.covariance
+
+            # Weights come back in the model's column order: keep only the
+            # holdings with returns, in that order, so the warm start and
+            # the rebalancing rows line up with the solution
+            by_symbol = {h.symbol.upper(): h for h in holdings}
+            holdings = [by_symbol[symbol] for symbol in universe.symbols]
+            symbols = [h.symbol for h in holdings]
 
             # Current allocations
             total_value = sum(h.market_value for h in holdings)
@@ -148,14 +166,23 @@ class PortfolioOptimizer:
             # Objective function (maximize Sharpe ratio or minimize risk)
             if target_return:
                 # Minimize risk for target return
-                optimal_weights = self._minimize_risk_for_return(
-                    expected_returns, cov_matrix, target_return, constraints
+                optimal_weights = await asyncio.to_thread(
+                    self._minimize_risk_for_return,
+                    expected_returns,
+                    cov_matrix,
+                    target_return,
+                    constraints,
+                    initial_weights=current_weights,
                 )
                 optimization_type = "risk_minimization"
             else:
                 # Maximize Sharpe ratio
-                optimal_weights = self._maximize_sharpe_ratio(
-                    expected_returns, cov_matrix, constraints
+                optimal_weights = await asyncio.to_thread(
+                    self._maximize_sharpe_ratio,
+                    expected_returns,
+                    cov_matrix,
+                    constraints,
+                    initial_weights=current_weights,
                 )
                 optimization_type = "sharpe_maximization"
 
@@ -403,38 +430,21 @@ class PortfolioOptimizer:
     async def _get_returns_data(self, symbols: List[str]) -> Optional[pd.DataFrame]:
         """Get returns data for portfolio optimization."""
         try:
-            returns_data = {}
+            # Shared, cached returns matrix (one year of daily bars)
+            matrix = await get_risk_engine().get_returns_matrix(symbols)
 
-            for symbol in symbols:
-                historical_data = (
-                    await enhanced_market_data_service.get_historical_data(
-                        symbol, period="1y"
-                    )
-                )
+            # The matrix columns are upper-cased and sorted; put them back in
+            # the caller's order so weights line up with its holdings
+            order = list(dict.fromkeys(s.upper() for s in symbols))
+            returns_df = matrix.to_frame(dropna=False).reindex(columns=order)
 
-                if historical_data:
-                    prices = [
-                        float(d["close"])
-                        for d in historical_data
-                        if d["close"] is not None
-                    ]
-
-                    if len(prices) > 20:  # Need sufficient data
-                        price_series = pd.Series(prices)
-                        returns = price_series.pct_change().dropna()
-                        returns_data[symbol] = returns
-
-            if len(returns_data) < 2:
+            # Need sufficient data per symbol
+            returns_df = returns_df.loc[:, returns_df.count() > 20]
+            if returns_df.shape[1] < 2:
                 return None
 
-            # Align data (use minimum length)
-            min_length = min(len(data) for data in returns_data.values())
-            aligned_data = {
-                symbol: data.tail(min_length).reset_index(drop=True)
-                for symbol, data in returns_data.items()
-            }
-
-            return pd.DataFrame(aligned_data)
+            # Align data on dates where every symbol traded
+            return returns_df.dropna().reset_index(drop=True)
 
         except Exception as e:
             logger.error("Error getting returns data", error=str(e))
@@ -445,25 +455,22 @@ class PortfolioOptimizer:
         expected_returns: np.ndarray,
         cov_matrix: np.ndarray,
         constraints: List[Dict],
+        initial_weights: Optional[np.ndarray] = None,
     ) -> Optional[np.ndarray]:
         """Maximize Sharpe ratio optimization."""
         try:
+            expected_returns = np.asarray(expected_returns, dtype=float)
+            cov_matrix = np.asarray(cov_matrix, dtype=float)
             n_assets = len(expected_returns)
 
-            def negative_sharpe_ratio(weights):
-                portfolio_return = np.dot(weights, expected_returns)
-                portfolio_std = np.sqrt(np.dot(weights, np.dot(cov_matrix, weights)))
-                return -(portfolio_return - self.risk_free_rate) / portfolio_std
-
-            # Initial guess: equal weights
-            initial_guess = np.array([1.0 / n_assets] * n_assets)
-
             # Bounds: 0% to 50% per asset
             bounds = tuple((0, 0.5) for _ in range(n_assets))
 
             result = minimize(
-                negative_sharpe_ratio,
-                initial_guess,
+                negative_sharpe,
+                self._initial_guess(n_assets, initial_weights),
+                args=(expected_returns, cov_matrix, self.risk_free_rate),
+                jac=True,
                 method="SLSQP",
                 bounds=bounds,
                 constraints=constraints,
@@ -481,31 +488,27 @@ class PortfolioOptimizer:
         cov_matrix: np.ndarray,
         target_return: float,
         constraints: List[Dict],
+        initial_weights: Optional[np.ndarray] = None,
     ) -> Optional[np.ndarray]:
         """Minimize risk for target return optimization."""
         try:
+            expected_returns = np.asarray(expected_returns, dtype=float)
+            cov_matrix = np.asarray(cov_matrix, dtype=float)
             n_assets = len(expected_returns)
 
-            def portfolio_variance(weights):
-                return np.dot(weights, np.dot(cov_matrix, weights))
-
             # Add return constraint
-            return_constraint = {
-                "type": "eq",
-                "fun": lambda weights: np.dot(weights, expected_returns)
-                - target_return,
-            }
-            constraints.append(return_constraint)
-
-            # Initial guess: equal weights
-            initial_guess = np.array([1.0 / n_assets] * n_assets)
+            constraints = constraints + [
+                target_return_constraint(expected_returns, target_return)
+            ]
 
             # Bounds: 0% to 50% per asset
             bounds = tuple((0, 0.5) for _ in range(n_assets))
 
             result = minimize(
                 portfolio_variance,
-                initial_guess,
+                self._initial_guess(n_assets, initial_weights),
+                args=(cov_matrix,),
+                jac=True,
                 method="SLSQP",
                 bounds=bounds,
                 constraints=constraints,
@@ -517,39 +520,51 @@ class PortfolioOptimizer:
             logger.error("Error in risk minimization", error=str(e))
             return None
 
+    @staticmethod
+    def _initial_guess(
+        n_assets: int, initial_weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Warm start from the current weights, else equal weights."""
+        if initial_weights is not None and len(initial_weights) == n_assets:
+            weights = np.clip(np.asarray(initial_weights, dtype=float), 0.0, 0.5)
+            if weights.sum() > 0:
+                return weights / weights.sum()
+        return np.full(n_assets, 1.0 / n_assets)
+
     def _build_optimization_constraints(
         self, n_assets: int, user_preferences: Optional[Dict[str, Any]] = None
     ) -> List[Dict]:
-        """Build optimization constraints."""
+        """Build optimization constraints (with Jacobians for SLSQP)."""
         constraints = []
 
         # Weights must sum to 1
-        constraints.append({"type": "eq", "fun": lambda weights: np.sum(weights) - 1})
+        constraints.append(budget_constraint())
 
         # User-defined constraints
         if user_preferences:
             max_position_size = user_preferences.get("max_position_size", 0.5)
             min_position_size = user_preferences.get("min_position_size", 0.0)
+            identity = np.eye(n_assets)
 
             # Maximum position size constraint
-            for i in range(n_assets):
+            constraints.append(
+                {
+                    "type": "ineq",
+                    "fun": lambda weights: max_position_size - weights,
+                    "jac": lambda weights: -identity,
+                }
+            )
+
+            # Minimum position size constraint (if specified)
+            if min_position_size > 0:
                 constraints.append(
                     {
                         "type": "ineq",
-                        "fun": lambda weights, i=i: max_position_size - weights[i],
+                        "fun": lambda weights: weights - min_position_size,
+                        "jac": lambda weights: identity,
                     }
                 )
 
-            # Minimum position size constraint (if specified)
-            if min_position_size > 0:
-                for i in range(n_assets):
-                    constraints.append(
-                        {
-                            "type": "ineq",
-                            "fun": lambda weights, i=i: weights[i] - min_position_size,
-                        }
-                    )
-
         return constraints
 
     def _calculate_rebalancing_actions(
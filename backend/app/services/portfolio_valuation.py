@@ -0,0 +1,641 @@
+"""
+In-memory, event-driven portfolio valuation.
+
+Portfolios are loaded from the database once and then kept current by
+applying fills and price ticks as they happen. Each event updates market
+value, cost basis, unrealized/realized P&L and the running drawdown in O(1)
+per affected position; nothing walks the holdings again.
+
+Changed portfolios are pushed to listeners (the trading WebSocket manager)
+on a short interval and written back to the database on a longer one, in
+one bulk update per table.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.holding import Holding
+from app.models.portfolio import Portfolio
+
+logger = logging.getLogger(__name__)
+
+ValuationListener = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+@dataclass
+class PositionState:
+    """One holding: quantity, average cost and the last price applied."""
+
+    symbol: str
+    quantity: float = 0.0
+    average_cost: float = 0.0
+    last_price: float = 0.0
+    realized_pnl: float = 0.0
+    holding_id: Optional[int] = None
+
+    @property
+    def market_value(self) -> float:
+        return self.quantity * self.last_price
+
+    @property
+    def cost_basis(self) -> float:
+        return self.quantity * self.average_cost
+
+
+@dataclass
+class PortfolioState:
+    """
+    Running valuation of one portfolio.
+
+    `market_value` and `cost_basis` are sums over positions that are
+    adjusted by each event's delta rather than recomputed.
+    """
+
+    portfolio_id: int
+    user_id: Optional[int]
+    cash: float = 0.0
+    positions: Dict[str, PositionState] = field(default_factory=dict)
+    market_value: float = 0.0
+    cost_basis: float = 0.0
+    realized_pnl: float = 0.0
+    peak_value: float = 0.0
+    drawdown: float = 0.0
+    max_drawdown: float = 0.0
+    day: date = field(default_factory=lambda: datetime.utcnow().date())
+    day_open_value: float = 0.0
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    version: int = 0
+
+    @property
+    def total_value(self) -> float:
+        return self.cash + self.market_value
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return self.market_value - self.cost_basis
+
+    def _position(self, symbol: str) -> PositionState:
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = PositionState(symbol)
+        return position
+
+    def _touch(self, now: Optional[datetime] = None) -> None:
+        now = now or datetime.utcnow()
+        total = self.total_value
+        if now.date() != self.day:
+            self.day = now.date()
+            self.day_open_value = total
+        if total > self.peak_value:
+            self.peak_value = total
+        self.drawdown = (
+            (self.peak_value - total) / self.peak_value if self.peak_value > 0 else 0.0
+        )
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+        self.updated_at = now
+        self.version += 1
+
+    def apply_price(self, symbol: str, price: float) -> bool:
+        """Mark a position to a new price; returns False if nothing changed."""
+        position = self.positions.get(symbol)
+        if position is None or price <= 0 or price == position.last_price:
+            return False
+        if position.quantity == 0:
+            position.last_price = price
+            return False
+        self.market_value += position.quantity * (price - position.last_price)
+        position.last_price = price
+        self._touch()
+        return True
+
+    def apply_fill(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        price: float,
+        commission: float = 0.0,
+    ) -> None:
+        """
+        Apply an executed fill to cash, position and P&L.
+
+        Buys (and covers of a short) move the average cost; sells realize
+        P&L against it. Commission is charged to cash and realized P&L.
+        """
+        position = self._position(symbol)
+        signed = quantity if side.lower() == "buy" else -quantity
+
+        old_value = position.market_value
+        old_cost = position.cost_basis
+        new_quantity = position.quantity + signed
+
+        if position.quantity == 0 or (position.quantity > 0) == (signed > 0):
+            # Opening or adding: blend the average cost
+            position.average_cost = (
+                (old_cost + signed * price) / new_quantity if new_quantity else 0.0
+            )
+        else:
+            # Reducing or flipping: realize P&L on the closed part
+            closed = min(abs(signed), abs(position.quantity))
+            direction = 1.0 if position.quantity > 0 else -1.0
+            pnl = closed * (price - position.average_cost) * direction
+            position.realized_pnl += pnl
+            self.realized_pnl += pnl
+            if abs(signed) > abs(position.quantity):
+                position.average_cost = price
+            elif new_quantity == 0:
+                position.average_cost = 0.0
+
+        position.quantity = new_quantity
+        position.last_price = price
+        self.cash -= signed * price + commission
+        self.realized_pnl -= commission
+        self.market_value += position.market_value - old_value
+        self.cost_basis += position.cost_basis - old_cost
+        self._touch()
+
+    def reconcile(self, cash: float, holdings: Dict[str, Any]) -> bool:
+        """
+        Adopt quantities, costs and cash read back from the database.
+
+        `holdings` maps symbol to `(holding_id, quantity, average_cost,
+        current_price)`. Positions without a row are closed. Last prices are
+        kept, so only the price-derived figures move. Returns True if
+        anything differed from the running state.
+        """
+        changed = cash != self.cash
+        self.cash = cash
+        for symbol in set(self.positions) - set(holdings):
+            position = self.positions[symbol]
+            changed = changed or position.quantity != 0
+            position.quantity = position.average_cost = 0.0
+            position.holding_id = None
+        for symbol, (holding_id, quantity, average_cost, price) in holdings.items():
+            position = self.positions.get(symbol)
+            if position is None:
+                position = self.positions[symbol] = PositionState(
+                    symbol, last_price=price or average_cost
+                )
+            changed = changed or (position.quantity, position.average_cost) != (
+                quantity,
+                average_cost,
+            )
+            position.quantity = quantity
+            position.average_cost = average_cost
+            position.holding_id = holding_id
+
+        self.market_value = sum(p.market_value for p in self.positions.values())
+        self.cost_basis = sum(p.cost_basis for p in self.positions.values())
+        return changed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Payload for the `portfolio_update` WebSocket message."""
+        cost_basis = self.cost_basis
+        return {
+            "id": self.portfolio_id,
+            "total_value": self.total_value,
+            "cash_balance": self.cash,
+            "invested_amount": cost_basis,
+            "market_value": self.market_value,
+            "daily_return": self.total_value - self.day_open_value,
+            "total_return": self.unrealized_pnl,
+            "total_return_percent": (
+                self.unrealized_pnl / cost_basis * 100 if cost_basis > 0 else 0.0
+            ),
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized_pnl,
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "last_updated": self.updated_at.isoformat(),
+        }
+
+
+def state_from_portfolio(portfolio: Portfolio) -> PortfolioState:
+    """Build the running state from a Portfolio row and its holdings."""
+    state = PortfolioState(
+        portfolio_id=portfolio.id,
+        user_id=portfolio.user_id or portfolio.owner_id,
+        cash=float(portfolio.cash_balance or 0.0),
+    )
+    for holding in portfolio.holdings:
+        quantity = float(holding.quantity or 0.0)
+        if quantity == 0:
+            continue
+        position = PositionState(
+            symbol=holding.symbol,
+            quantity=quantity,
+            average_cost=float(holding.average_cost or 0.0),
+            last_price=float(holding.current_price or holding.average_cost or 0.0),
+            holding_id=holding.id,
+        )
+        state.positions[holding.symbol] = position
+        state.market_value += position.market_value
+        state.cost_basis += position.cost_basis
+
+    state.peak_value = state.day_open_value = state.total_value
+    return state
+
+
+class PortfolioValuationEngine:
+    """
+    Registry of running portfolio valuations.
+
+    A symbol index maps each ticker to the portfolios holding it, so a
+    price tick only touches those portfolios.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        push_interval: float = 1.0,
+        flush_interval: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.push_interval = push_interval
+        self.flush_interval = flush_interval
+
+        self.states: Dict[int, PortfolioState] = {}
+        self._by_symbol: Dict[str, Set[int]] = {}
+        self._pending_push: Set[int] = set()
+        self._pending_flush: Set[int] = set()
+        # Fill sequence, so a flush never reconciles over a newer fill
+        self._fill_seq = 0
+        self._last_fill: Dict[int, int] = {}
+        self._listeners: List[ValuationListener] = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"ticks": 0, "fills": 0, "pushes": 0, "flushes": 0}
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def add_listener(self, listener: ValuationListener) -> None:
+        """Register an async callback receiving lists of changed snapshots."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def track(self, state: PortfolioState) -> PortfolioState:
+        self.states[state.portfolio_id] = state
+        for symbol in state.positions:
+            self._by_symbol.setdefault(symbol, set()).add(state.portfolio_id)
+        return state
+
+    def load(
+        self, portfolio_id: int, db: Optional[Session] = None
+    ) -> Optional[PortfolioState]:
+        """Return the running state, loading it from the database once."""
+        state = self.states.get(portfolio_id)
+        if state is not None:
+            return state
+
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
+            if portfolio is None:
+                return None
+            return self.track(state_from_portfolio(portfolio))
+        finally:
+            if own_session:
+                db.close()
+
+    def load_for_user(
+        self, user_id: int, db: Optional[Session] = None
+    ) -> Optional[PortfolioState]:
+        """Return the running state of a user's portfolio, loading it once."""
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            portfolio = db.query(Portfolio).filter(Portfolio.user_id == user_id).first()
+            if portfolio is None:
+                return None
+            state = self.states.get(portfolio.id)
+            return (
+                state
+                if state is not None
+                else self.track(state_from_portfolio(portfolio))
+            )
+        finally:
+            if own_session:
+                db.close()
+
+    def release(self, portfolio_id: int) -> None:
+        """Stop tracking a portfolio, writing back pending changes first."""
+        if portfolio_id in self._pending_flush:
+            self.flush([portfolio_id])
+        state = self.states.pop(portfolio_id, None)
+        if state is None:
+            return
+        for symbol in state.positions:
+            holders = self._by_symbol.get(symbol)
+            if holders is not None:
+                holders.discard(portfolio_id)
+                if not holders:
+                    del self._by_symbol[symbol]
+        self._pending_push.discard(portfolio_id)
+        self._last_fill.pop(portfolio_id, None)
+
+    def tracked_symbols(self) -> List[str]:
+        """Symbols held by any tracked portfolio (for the price feed)."""
+        return list(self._by_symbol)
+
+    def snapshot(self, portfolio_id: int) -> Optional[Dict[str, Any]]:
+        state = self.states.get(portfolio_id)
+        return state.snapshot() if state is not None else None
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def _changed(self, portfolio_id: int) -> None:
+        self._pending_push.add(portfolio_id)
+        self._pending_flush.add(portfolio_id)
+
+    def apply_price(self, symbol: str, price: float) -> int:
+        """Apply a price tick; returns the number of portfolios revalued."""
+        self.stats["ticks"] += 1
+        changed = 0
+        for portfolio_id in self._by_symbol.get(symbol, ()):
+            if self.states[portfolio_id].apply_price(symbol, float(price)):
+                self._changed(portfolio_id)
+                changed += 1
+        return changed
+
+    def apply_fill(
+        self,
+        portfolio_id: int,
+        symbol: str,
+        side: str,
+        quantity: float,
+        price: float,
+        commission: float = 0.0,
+    ) -> bool:
+        """
+        Apply a fill to a tracked portfolio.
+
+        Untracked portfolios are ignored; they are read fresh from the
+        database (which already has the fill) when first loaded.
+        """
+        state = self.states.get(portfolio_id)
+        if state is None:
+            return False
+        self.stats["fills"] += 1
+        self._fill_seq += 1
+        self._last_fill[portfolio_id] = self._fill_seq
+        state.apply_fill(
+            symbol, side, float(quantity), float(price), float(commission or 0.0)
+        )
+        self._by_symbol.setdefault(symbol, set()).add(portfolio_id)
+        self._changed(portfolio_id)
+        return True
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    async def publish(self) -> int:
+        """Send snapshots of portfolios changed since the last push."""
+        if not self._pending_push:
+            return 0
+        snapshots = [
+            self.states[pid].snapshot()
+            for pid in self._pending_push
+            if pid in self.states
+        ]
+        self._pending_push.clear()
+        for listener in self._listeners:
+            try:
+                await listener(snapshots)
+            except Exception as e:
+                logger.error(f"Valuation listener failed: {str(e)}")
+        self.stats["pushes"] += len(snapshots)
+        return len(snapshots)
+
+    def flush(self, portfolio_ids: Optional[List[int]] = None) -> int:
+        """
+        Write valuations of changed portfolios back to the database.
+
+        Quantities, costs and cash are owned by the trade execution path,
+        so they are read back from the database first and the running state
+        is reconciled to them; only the price-derived columns are written.
+
+        Returns:
+            Number of portfolios written
+        """
+        ids = self._flush_ids(portfolio_ids)
+        if not ids:
+            return 0
+        seq = self._fill_seq
+        ids = self._reconcile(ids, *self._read_back(ids), seq)
+        return self._write(ids, *self._rows(ids))
+
+    async def flush_async(self, portfolio_ids: Optional[List[int]] = None) -> int:
+        """
+        Same as ``flush`` with the database reads and writes run in a worker
+        thread, on a session owned by that thread, so the event loop keeps
+        serving ticks. The running state is only touched on the loop.
+        """
+        ids = self._flush_ids(portfolio_ids)
+        if not ids:
+            return 0
+        seq = self._fill_seq
+        ids = self._reconcile(ids, *await asyncio.to_thread(self._read_back, ids), seq)
+        rows = self._rows(ids)
+        return await asyncio.to_thread(self._write, ids, *rows)
+
+    def _flush_ids(self, portfolio_ids: Optional[List[int]]) -> List[int]:
+        return [
+            pid
+            for pid in (portfolio_ids or list(self._pending_flush))
+            if pid in self.states
+        ]
+
+    def _read_back(
+        self, portfolio_ids: List[int]
+    ) -> Tuple[Dict[int, Any], Dict[int, Dict[str, Any]]]:
+        """Read quantities, costs and cash of the given portfolios."""
+        db = self.session_factory()
+        try:
+            cash = dict(
+                db.query(Portfolio.id, Portfolio.cash_balance)
+                .filter(Portfolio.id.in_(portfolio_ids))
+                .all()
+            )
+            holdings: Dict[int, Dict[str, Any]] = {pid: {} for pid in portfolio_ids}
+            rows = (
+                db.query(
+                    Holding.id,
+                    Holding.portfolio_id,
+                    Holding.symbol,
+                    Holding.quantity,
+                    Holding.average_cost,
+                    Holding.current_price,
+                )
+                .filter(Holding.portfolio_id.in_(portfolio_ids))
+                .all()
+            )
+        finally:
+            db.close()
+        for holding_id, pid, symbol, quantity, average_cost, price in rows:
+            holdings[pid][symbol] = (
+                holding_id,
+                float(quantity or 0.0),
+                float(average_cost or 0.0),
+                float(price or 0.0),
+            )
+        return cash, holdings
+
+    def _reconcile(
+        self,
+        portfolio_ids: List[int],
+        cash: Dict[int, Any],
+        holdings: Dict[int, Dict[str, Any]],
+        seq: int,
+    ) -> List[int]:
+        """
+        Apply what was read back to the running states.
+
+        Portfolios that took a fill after the read started may be ahead of
+        it, so they are left pending for the next flush instead.
+        """
+        reconciled = []
+        for pid in portfolio_ids:
+            state = self.states.get(pid)
+            if state is None or self._last_fill.get(pid, 0) > seq:
+                continue
+            if pid in cash:
+                balance = float(cash[pid] or 0.0)
+            else:
+                balance = state.cash
+            if state.reconcile(balance, holdings[pid]):
+                self._pending_push.add(pid)
+            for symbol in holdings[pid]:
+                self._by_symbol.setdefault(symbol, set()).add(pid)
+            reconciled.append(pid)
+        return reconciled
+
+    def _rows(
+        self, portfolio_ids: List[int]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Build the price-derived portfolio and holding columns to write."""
+        now = datetime.utcnow()
+        portfolio_rows, holding_rows = [], []
+        for pid in portfolio_ids:
+            snapshot = self.states[pid].snapshot()
+            portfolio_rows.append(
+                {
+                    "id": pid,
+                    "total_value": snapshot["total_value"],
+                    "invested_amount": snapshot["invested_amount"],
+                    "daily_return": snapshot["daily_return"],
+                    "total_return": snapshot["total_return"],
+                    "total_return_percent": snapshot["total_return_percent"],
+                    "total_return_percentage": snapshot["total_return_percent"],
+                    "last_valued_at": now,
+                }
+            )
+            total_value = snapshot["total_value"]
+            for position in self.states[pid].positions.values():
+                if position.holding_id is None:
+                    continue
+                cost = position.cost_basis
+                unrealized = position.market_value - cost
+                holding_rows.append(
+                    {
+                        "id": position.holding_id,
+                        "current_price": position.last_price,
+                        "market_value": position.market_value,
+                        "unrealized_gain_loss": unrealized,
+                        "unrealized_gain_loss_percentage": (
+                            unrealized / cost * 100 if cost else 0.0
+                        ),
+                        "current_allocation_percentage": (
+                            position.market_value / total_value * 100
+                            if total_value
+                            else 0.0
+                        ),
+                    }
+                )
+        # Changes made while the rows are written mark them pending again
+        self._pending_flush.difference_update(portfolio_ids)
+        return portfolio_rows, holding_rows
+
+    def _write(
+        self,
+        portfolio_ids: List[int],
+        portfolio_rows: List[Dict[str, Any]],
+        holding_rows: List[Dict[str, Any]],
+    ) -> int:
+        if not portfolio_rows:
+            return 0
+        db = self.session_factory()
+        try:
+            db.bulk_update_mappings(Portfolio, portfolio_rows)
+            if holding_rows:
+                db.bulk_update_mappings(Holding, holding_rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error flushing portfolio valuations: {str(e)}")
+            self._pending_flush.update(portfolio_ids)
+            return 0
+        finally:
+            db.close()
+
+        self.stats["flushes"] += len(portfolio_ids)
+        return len(portfolio_ids)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_flush = loop.time() + self.flush_interval
+        while True:
+            try:
+                await asyncio.sleep(self.push_interval)
+                await self.publish()
+                if loop.time() >= next_flush:
+                    await self.flush_async()
+                    next_flush = loop.time() + self.flush_interval
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in valuation loop: {str(e)}")
+
+    def start(self) -> None:
+        """Start the push/flush loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Portfolio valuation engine started")
+
+    async def stop(self) -> None:
+        """Stop the loop and write back everything pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_async()
+        logger.info("Portfolio valuation engine stopped")
+
+
+# Global engine instance
+_valuation_engine_instance = None
+
+
+def get_valuation_engine() -> PortfolioValuationEngine:
+    """Get the global portfolio valuation engine instance."""
+    global _valuation_engine_instance
+    if _valuation_engine_instance is None:
+        _valuation_engine_instance = PortfolioValuationEngine(
+            push_interval=getattr(settings, "VALUATION_PUSH_INTERVAL_SECONDS", 1.0),
+            flush_interval=getattr(settings, "VALUATION_FLUSH_INTERVAL_SECONDS", 30.0),
+        )
+    return _valuation_engine_instance
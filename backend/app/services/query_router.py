@@ -19,7 +19,9 @@ import logging
 import re
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+from app.services.pattern_matcher import MultiPatternMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +93,26 @@ class RoutingResult:
     reasoning: str
 
 
+def phrase_hits(
+    query_lower: str, spans: Dict[str, List[Tuple[int, int]]]
+) -> Dict[str, bool]:
+    """
+    Flag keywords that occur as whole space-delimited phrases.
+
+    Equivalent to ``f" {keyword} " in f" {query_lower} "`` for each keyword,
+    evaluated from the match spans instead of rescanning the text.
+    """
+    size = len(query_lower)
+    return {
+        keyword: any(
+            (start == 0 or query_lower[start - 1] == " ")
+            and (end == size or query_lower[end] == " ")
+            for start, end in found
+        )
+        for keyword, found in spans.items()
+    }
+
+
 class QueryRouter:
     """
     Intent classification and routing for wealth management queries.
@@ -311,10 +333,57 @@ class QueryRouter:
         AdvisoryMode.SUCCESSION_PLANNING: ["TAX_MANAGER", "GENERAL_COUNSEL"],
     }
 
+    # Keywords that require compliance checks in any mode
+    COMPLIANCE_KEYWORDS = [
+        "tax",
+        "irs",
+        "filing",
+        "report",
+        "compliance",
+        "aml",
+        "kyc",
+        "fiduciary",
+        "beneficiary",
+        "distribution",
+        "gift",
+        "estate",
+        "trust",
+        "form",
+        "deadline",
+    ]
+
+    # Keywords that add an international tax specialist to estate matters
+    INTERNATIONAL_KEYWORDS = ["international", "foreign"]
+
     def __init__(self):
         """Initialize the query router."""
+        self.keywords = list(
+            dict.fromkeys(
+                [kw for kws in self.MODE_KEYWORDS.values() for kw in kws]
+                + self.COMPLIANCE_KEYWORDS
+                + self.INTERNATIONAL_KEYWORDS
+            )
+        )
+        self.matcher = MultiPatternMatcher([re.escape(kw) for kw in self.keywords])
         logger.info("QueryRouter initialized")
 
+    def match_keywords(self, query: str) -> Dict[str, bool]:
+        """
+        Find every routing keyword in the query in a single pass.
+
+        Args:
+            query: User's query text
+
+        Returns:
+            Mapping of each keyword present to whether it also appears as a
+            whole space-delimited phrase
+        """
+        query_lower = query.lower()
+        spans = self.matcher.spans(query_lower)
+        return phrase_hits(
+            query_lower, {self.keywords[i]: found for i, found in spans.items()}
+        )
+
     def determine_service_tier(self, profile: UserProfile) -> ServiceTier:
         """
         Determine service tier based on user profile.
@@ -345,30 +414,31 @@ class QueryRouter:
         else:
             return ServiceTier.FOUNDATION
 
-    def classify_advisory_mode(self, query: str) -> tuple[AdvisoryMode, float]:
+    def classify_advisory_mode(
+        self, query: str, hits: Optional[Dict[str, bool]] = None
+    ) -> tuple[AdvisoryMode, float]:
         """
         Classify the query into an advisory mode.
 
         Args:
             query: User's query text
+            hits: Precomputed result of match_keywords for the query
 
         Returns:
             Tuple of (AdvisoryMode, confidence score)
         """
-        query_lower = query.lower()
+        if hits is None:
+            hits = self.match_keywords(query)
         mode_scores = {}
 
         for mode, keywords in self.MODE_KEYWORDS.items():
             score = 0
             matches = 0
             for keyword in keywords:
-                if keyword in query_lower:
+                if keyword in hits:
                     matches += 1
                     # Boost for exact phrase matches
-                    if f" {keyword} " in f" {query_lower} ":
-                        score += 2
-                    else:
-                        score += 1
+                    score += 2 if hits[keyword] else 1
 
             if matches > 0:
                 mode_scores[mode] = score / len(keywords) * min(matches, 5)
@@ -385,7 +455,11 @@ class QueryRouter:
         return best_mode, confidence
 
     def identify_required_roles(
-        self, mode: AdvisoryMode, tier: ServiceTier, query: str
+        self,
+        mode: AdvisoryMode,
+        tier: ServiceTier,
+        query: str,
+        hits: Optional[Dict[str, bool]] = None,
     ) -> list[str]:
         """
         Identify professional roles required for the query.
@@ -394,6 +468,7 @@ class QueryRouter:
             mode: Classified advisory mode
             tier: User's service tier
             query: Original query text
+            hits: Precomputed result of match_keywords for the query
 
         Returns:
             List of required professional roles
@@ -402,14 +477,15 @@ class QueryRouter:
         roles = list(self.TIER_ROLES.get(tier, []))
 
         # Add mode-specific roles
-        query_lower = query.lower()
 
         # Estate planning specific
         if mode == AdvisoryMode.ESTATE_PLANNING:
-            if "trust" in query_lower:
+            if hits is None:
+                hits = self.match_keywords(query)
+            if "trust" in hits:
                 if "Trust Administration Attorney" not in roles:
                     roles.append("Trust Administration Attorney")
-            if "international" in query_lower or "foreign" in query_lower:
+            if any(kw in hits for kw in self.INTERNATIONAL_KEYWORDS):
                 roles.append("International Tax Attorney")
 
         # Succession planning specific
@@ -429,13 +505,19 @@ class QueryRouter:
 
         return list(set(roles))  # Remove duplicates
 
-    def requires_compliance_check(self, mode: AdvisoryMode, query: str) -> bool:
+    def requires_compliance_check(
+        self,
+        mode: AdvisoryMode,
+        query: str,
+        hits: Optional[Dict[str, bool]] = None,
+    ) -> bool:
         """
         Determine if the query requires compliance rule checks.
 
         Args:
             mode: Classified advisory mode
             query: Original query text
+            hits: Precomputed result of match_keywords for the query
 
         Returns:
             True if compliance check is required
@@ -453,26 +535,9 @@ class QueryRouter:
             return True
 
         # Check for compliance-related keywords
-        compliance_keywords = [
-            "tax",
-            "irs",
-            "filing",
-            "report",
-            "compliance",
-            "aml",
-            "kyc",
-            "fiduciary",
-            "beneficiary",
-            "distribution",
-            "gift",
-            "estate",
-            "trust",
-            "form",
-            "deadline",
-        ]
-
-        query_lower = query.lower()
-        return any(kw in query_lower for kw in compliance_keywords)
+        if hits is None:
+            hits = self.match_keywords(query)
+        return any(kw in hits for kw in self.COMPLIANCE_KEYWORDS)
 
     def get_binding_authorities(self, mode: AdvisoryMode) -> list[str]:
         """
@@ -487,14 +552,21 @@ class QueryRouter:
         return self.MODE_BINDING_AUTHORITIES.get(mode, [])
 
     def route_query(
-        self, query: str, profile: Optional[UserProfile] = None
+        self,
+        query: str,
+        profile: Optional[UserProfile] = None,
+        hits: Optional[Dict[str, bool]] = None,
     ) -> RoutingResult:
         """
         Main routing method - classifies and routes a query.
 
+        The query text is scanned once; every keyword-based decision below
+        reads from the same hits.
+
         Args:
             query: User's query text
             profile: Optional user profile for tier determination
+            hits: Precomputed result of match_keywords for the query
 
         Returns:
             RoutingResult with all routing information
@@ -506,17 +578,21 @@ class QueryRouter:
         # Determine service tier
         tier = self.determine_service_tier(profile)
 
+        # Find every keyword once
+        if hits is None:
+            hits = self.match_keywords(query)
+
         # Classify advisory mode
-        mode, confidence = self.classify_advisory_mode(query)
+        mode, confidence = self.classify_advisory_mode(query, hits)
 
         # Get knowledge domains
         domains = self.MODE_DOMAINS.get(mode, self.MODE_DOMAINS[AdvisoryMode.GENERAL])
 
         # Identify required roles
-        roles = self.identify_required_roles(mode, tier, query)
+        roles = self.identify_required_roles(mode, tier, query, hits)
 
         # Check if compliance rules apply
-        needs_compliance = self.requires_compliance_check(mode, query)
+        needs_compliance = self.requires_compliance_check(mode, query, hits)
 
         # Get binding authorities
         binding = self.get_binding_authorities(mode)
@@ -0,0 +1,455 @@
+"""
+Shared portfolio risk computation core.
+
+Builds one aligned daily returns matrix per symbol universe from a shared,
+incrementally refreshed price cache, and computes risk metrics (VaR/CVaR,
+beta, correlation, volatility, Sharpe, drawdown) for many portfolios at once
+with matrix operations. RiskManager, RiskManagementService,
+PortfolioOptimizer and AIPortfolioManager all read from the same cache so a
+symbol's history is fetched at most once per day.
+"""
+
+import asyncio
+import logging
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.market_data import MarketDataService
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_BENCHMARK = "SPY"
+
+
+@dataclass
+class ReturnsMatrix:
+    """Daily simple returns aligned on a common date index."""
+
+    symbols: List[str]
+    dates: np.ndarray  # datetime64[ns], shape (T,)
+    returns: np.ndarray  # float64, shape (T, N); NaN where a symbol has no bar
+
+    @property
+    def symbol_index(self) -> Dict[str, int]:
+        return {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def select(self, symbols: Sequence[str]) -> "ReturnsMatrix":
+        """Return the sub-matrix for the given symbols (unknown ones are skipped)."""
+        index = self.symbol_index
+        present = [s for s in symbols if s in index]
+        columns = [index[s] for s in present]
+        return ReturnsMatrix(present, self.dates, self.returns[:, columns])
+
+    def weights_for(self, allocations: Dict[str, float]) -> np.ndarray:
+        """Dense weight vector over this matrix's symbols."""
+        return np.array([allocations.get(s, 0.0) for s in self.symbols], dtype=float)
+
+    def to_frame(self, dropna: bool = True) -> pd.DataFrame:
+        """Returns as a DataFrame indexed by date with one column per symbol."""
+        frame = pd.DataFrame(self.returns, index=self.dates, columns=self.symbols)
+        return frame.dropna() if dropna else frame
+
+
+# (sorted symbol universe, lookback days)
+MatrixKey = Tuple[Tuple[str, ...], int]
+
+
+class PortfolioRiskEngine:
+    """
+    Shared returns cache and batched risk metrics.
+
+    Price history per symbol is cached in memory and refreshed at most once
+    per calendar day by fetching only the missing tail. Returns matrices are
+    cached per (universe, lookback) for the day, keeping the
+    ``max_cached_matrices`` most recently used.
+    """
+
+    def __init__(
+        self,
+        market_data_service: Optional[MarketDataService] = None,
+        lookback_days: int = TRADING_DAYS_PER_YEAR,
+        max_concurrent_fetches: int = 8,
+        risk_free_rate: float = 0.02,
+        max_cached_matrices: int = 256,
+    ):
+        self.market_data_service = market_data_service or MarketDataService()
+        self.lookback_days = lookback_days
+        self.risk_free_rate = risk_free_rate
+
+        self.max_concurrent_fetches = max_concurrent_fetches
+        # Created inside the running loop; the engine is a process-wide
+        # singleton that may outlive the loop it was first used on
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prices: Dict[str, pd.DataFrame] = {}
+        self._refreshed_on: Dict[str, date] = {}
+        self.max_cached_matrices = max(1, max_cached_matrices)
+        self._matrices: "OrderedDict[MatrixKey, Tuple[date, ReturnsMatrix]]" = (
+            OrderedDict()
+        )
+
+    # ------------------------------------------------------------------
+    # Price cache
+    # ------------------------------------------------------------------
+
+    def _fetch_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit for history fetches on the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _fetch_bars(self, symbol: str, limit: int) -> pd.DataFrame:
+        """Fetch up to `limit` daily bars for one symbol as a DataFrame."""
+        async with self._fetch_semaphore():
+            try:
+                bars = await self.market_data_service.get_historical_data_enhanced(
+                    symbol, timeframe="1day", limit=limit
+                )
+            except Exception as e:
+                logger.warning(f"Failed to fetch history for {symbol}: {e}")
+                bars = []
+
+        if not bars:
+            return pd.DataFrame()
+
+        frame = pd.DataFrame(bars)
+        if "timestamp" not in frame.columns or "close" not in frame.columns:
+            return pd.DataFrame()
+
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+        frame = frame.set_index("timestamp").sort_index()
+        frame = frame[~frame.index.duplicated(keep="last")]
+        frame["close"] = frame["close"].astype(float)
+        return frame
+
+    async def _refresh_symbol(self, symbol: str, lookback_days: int) -> None:
+        """Bring one symbol's cached bars up to date, fetching only the tail."""
+        today = datetime.utcnow().date()
+        cached = self._prices.get(symbol)
+        if self._refreshed_on.get(symbol) == today and cached is not None:
+            if len(cached) >= lookback_days:
+                return
+
+        if cached is None or cached.empty or len(cached) < lookback_days:
+            # Cold start (or a longer lookback than cached): full window
+            fresh = await self._fetch_bars(symbol, lookback_days + 1)
+            merged = fresh
+        else:
+            # Incremental: only the days since the last cached bar (+ overlap)
+            missing_days = (pd.Timestamp(today) - cached.index[-1]).days
+            fresh = await self._fetch_bars(symbol, max(missing_days, 1) + 5)
+            merged = pd.concat([cached, fresh]) if not fresh.empty else cached
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        if not merged.empty:
+            # Keep a bounded window per symbol
+            keep = max(lookback_days, self.lookback_days) + 1
+            self._prices[symbol] = merged.iloc[-keep:]
+        self._refreshed_on[symbol] = today
+
+    async def get_price_frames(
+        self, symbols: Sequence[str], lookback_days: Optional[int] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Get cached daily OHLCV frames (timestamp index) for the symbols.
+
+        Symbols are refreshed concurrently; symbols without data are omitted.
+        """
+        lookback_days = lookback_days or self.lookback_days
+        unique = list(dict.fromkeys(s.upper() for s in symbols))
+        await asyncio.gather(*(self._refresh_symbol(s, lookback_days) for s in unique))
+
+        return {
+            s: self._prices[s].iloc[-(lookback_days + 1) :]
+            for s in unique
+            if s in self._prices and not self._prices[s].empty
+        }
+
+    async def get_returns_matrix(
+        self, symbols: Sequence[str], lookback_days: Optional[int] = None
+    ) -> ReturnsMatrix:
+        """
+        Get the aligned daily returns matrix for a symbol universe.
+
+        The matrix is built once per universe per day from the shared price
+        cache; missing bars are left as NaN rather than dropping whole rows.
+        """
+        lookback_days = lookback_days or self.lookback_days
+        universe = tuple(sorted(dict.fromkeys(s.upper() for s in symbols)))
+        key = (universe, lookback_days)
+        today = datetime.utcnow().date()
+
+        cached = self._matrices.get(key)
+        if cached and cached[0] == today:
+            self._matrices.move_to_end(key)
+            return cached[1]
+
+        frames = await self.get_price_frames(universe, lookback_days)
+        if not frames:
+            matrix = ReturnsMatrix(
+                [], np.array([], dtype="datetime64[ns]"), np.zeros((0, 0))
+            )
+        else:
+            closes = pd.DataFrame({s: f["close"] for s, f in frames.items()})
+            closes = closes.sort_index()
+            returns = closes.pct_change(fill_method=None).iloc[1:]
+            returns = returns.iloc[-lookback_days:]
+            matrix = ReturnsMatrix(
+                list(returns.columns),
+                returns.index.to_numpy(),
+                returns.to_numpy(dtype=float),
+            )
+
+        self._matrices[key] = (today, matrix)
+        self._matrices.move_to_end(key)
+        while len(self._matrices) > self.max_cached_matrices:
+            self._matrices.popitem(last=False)
+        return matrix
+
+    def invalidate(self, symbols: Optional[Sequence[str]] = None) -> None:
+        """Force a refresh for the given symbols (or everything)."""
+        if symbols is None:
+            self._refreshed_on.clear()
+            self._matrices.clear()
+            return
+        upper = {s.upper() for s in symbols}
+        for symbol in upper:
+            self._refreshed_on.pop(symbol, None)
+        for key in [k for k in self._matrices if upper.intersection(k[0])]:
+            del self._matrices[key]
+
+    # ------------------------------------------------------------------
+    # Batched metrics
+    # ------------------------------------------------------------------
+
+    def compute_metrics(
+        self,
+        matrix: ReturnsMatrix,
+        weights: np.ndarray,
+        benchmark_returns: Optional[np.ndarray] = None,
+        confidence: float = 0.95,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute risk metrics for many portfolios over one returns matrix.
+
+        Args:
+            matrix: Aligned asset returns (T x N)
+            weights: Portfolio weights (P x N) or a single vector (N,)
+            benchmark_returns: Benchmark returns aligned with matrix.dates (T,)
+            confidence: VaR/CVaR confidence level
+
+        Returns:
+            Dictionary of arrays of length P. VaR/CVaR and drawdown are
+            reported as positive loss fractions.
+        """
+        return compute_portfolio_metrics(
+            matrix.returns,
+            weights,
+            benchmark_returns=benchmark_returns,
+            confidence=confidence,
+            risk_free_rate=self.risk_free_rate,
+        )
+
+    async def portfolio_metrics(
+        self,
+        portfolios: Dict[Any, Dict[str, float]],
+        benchmark: Optional[str] = DEFAULT_BENCHMARK,
+        confidence: float = 0.95,
+        lookback_days: Optional[int] = None,
+    ) -> Dict[Any, Dict[str, float]]:
+        """
+        Compute risk metrics for many portfolios sharing one universe.
+
+        Args:
+            portfolios: Mapping of portfolio key to {symbol: weight}
+            benchmark: Benchmark symbol for beta (None to skip)
+            confidence: VaR/CVaR confidence level
+            lookback_days: History window
+
+        Returns:
+            Mapping of portfolio key to a metrics dictionary
+        """
+        if not portfolios:
+            return {}
+
+        symbols = {s.upper() for allocation in portfolios.values() for s in allocation}
+        if benchmark:
+            symbols.add(benchmark)
+
+        matrix = await self.get_returns_matrix(sorted(symbols), lookback_days)
+        if not matrix.symbols:
+            return {}
+
+        assets = matrix.select([s for s in matrix.symbols if s != benchmark])
+        benchmark_returns = None
+        if benchmark and benchmark in matrix.symbol_index:
+            benchmark_returns = matrix.returns[:, matrix.symbol_index[benchmark]]
+
+        keys = list(portfolios.keys())
+        weights = np.vstack(
+            [
+                assets.weights_for({s.upper(): w for s, w in portfolios[k].items()})
+                for k in keys
+            ]
+        )
+        metrics = self.compute_metrics(assets, weights, benchmark_returns, confidence)
+
+        return {
+            key: {name: float(values[i]) for name, values in metrics.items()}
+            for i, key in enumerate(keys)
+        }
+
+    @staticmethod
+    def correlation_matrix(matrix: ReturnsMatrix) -> pd.DataFrame:
+        """Pairwise correlation of the assets in the matrix."""
+        return pd.DataFrame(
+            nan_correlation(matrix.returns),
+            index=matrix.symbols,
+            columns=matrix.symbols,
+        )
+
+
+def nan_correlation(returns: np.ndarray) -> np.ndarray:
+    """Correlation matrix of (T x N) returns, treating missing values as zero."""
+    filled = np.nan_to_num(returns)
+    if filled.shape[0] < 2:
+        return np.eye(filled.shape[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.corrcoef(filled, rowvar=False)
+    return np.nan_to_num(np.atleast_2d(corr))
+
+
+def compute_portfolio_metrics(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    benchmark_returns: Optional[np.ndarray] = None,
+    confidence: float = 0.95,
+    risk_free_rate: float = 0.02,
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized risk metrics for P portfolios over T days and N assets.
+
+    Missing asset returns are treated as flat (0) days.
+
+    Args:
+        returns: Asset returns (T x N)
+        weights: Portfolio weights (P x N) or (N,)
+        benchmark_returns: Benchmark returns (T,)
+        confidence: VaR/CVaR confidence level
+        risk_free_rate: Annual risk-free rate for Sharpe
+
+    Returns:
+        Dictionary of arrays (P,) with volatility, sharpe_ratio,
+        historical_var, historical_cvar, parametric_var, parametric_cvar,
+        max_drawdown, current_drawdown and beta
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    asset_returns = np.nan_to_num(np.asarray(returns, dtype=float))
+    n_portfolios = weights.shape[0]
+
+    if asset_returns.shape[0] < 2:
+        zeros = np.zeros(n_portfolios)
+        return {
+            "volatility": zeros,
+            "sharpe_ratio": zeros,
+            "historical_var": zeros,
+            "historical_cvar": zeros,
+            "parametric_var": zeros,
+            "parametric_cvar": zeros,
+            "max_drawdown": zeros,
+            "current_drawdown": zeros,
+            "beta": np.ones(n_portfolios),
+        }
+
+    # (T x P) daily portfolio returns in one matrix product
+    portfolio_returns = asset_returns @ weights.T
+
+    mean = portfolio_returns.mean(axis=0)
+    std = portfolio_returns.std(axis=0, ddof=1)
+    daily_rf = risk_free_rate / TRADING_DAYS_PER_YEAR
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(
+            std > 0, np.sqrt(TRADING_DAYS_PER_YEAR) * (mean - daily_rf) / std, 0.0
+        )
+
+    # Historical VaR/CVaR from the empirical left tail
+    alpha = 1 - confidence
+    quantile = np.quantile(portfolio_returns, alpha, axis=0)
+    tail = portfolio_returns <= quantile
+    tail_counts = np.maximum(tail.sum(axis=0), 1)
+    tail_mean = (portfolio_returns * tail).sum(axis=0) / tail_counts
+
+    # Parametric (Gaussian) VaR/CVaR
+    normal = NormalDist()
+    z = normal.inv_cdf(alpha)
+    parametric_var = -(mean + z * std)
+    parametric_cvar = -(mean - std * normal.pdf(z) / alpha)
+
+    # Drawdowns along the time axis for every portfolio at once
+    wealth = np.cumprod(1 + portfolio_returns, axis=0)
+    peaks = np.maximum.accumulate(wealth, axis=0)
+    drawdowns = wealth / peaks - 1
+
+    # Beta against the benchmark
+    beta = np.ones(n_portfolios)
+    if benchmark_returns is not None:
+        bench = np.nan_to_num(np.asarray(benchmark_returns, dtype=float))
+        bench_centered = bench - bench.mean()
+        bench_var = (bench_centered**2).sum()
+        if bench_var > 0:
+            centered = portfolio_returns - mean
+            beta = (centered * bench_centered[:, None]).sum(axis=0) / bench_var
+
+    return {
+        "volatility": std * np.sqrt(TRADING_DAYS_PER_YEAR),
+        "sharpe_ratio": sharpe,
+        "historical_var": -quantile,
+        "historical_cvar": -tail_mean,
+        "parametric_var": parametric_var,
+        "parametric_cvar": parametric_cvar,
+        "max_drawdown": -drawdowns.min(axis=0),
+        "current_drawdown": -drawdowns[-1],
+        "beta": beta,
+    }
+
+
+# Global engine instance
+_risk_engine_instance = None
+# Engines bound to a caller's market data service, one per service
+_service_engines: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_risk_engine(
+    market_data_service: Optional[MarketDataService] = None,
+) -> PortfolioRiskEngine:
+    """Get the global portfolio risk engine instance.
+
+    With ``market_data_service``, returns the engine that fetches history
+    through that service, shared by every caller passing the same one.
+    """
+    global _risk_engine_instance
+    if market_data_service is not None:
+        if (
+            _risk_engine_instance is not None
+            and _risk_engine_instance.market_data_service is market_data_service
+        ):
+            return _risk_engine_instance
+        engine = _service_engines.get(market_data_service)
+        if engine is None:
+            engine = PortfolioRiskEngine(market_data_service)
+            _service_engines[market_data_service] = engine
+        return engine
+    if _risk_engine_instance is None:
+        _risk_engine_instance = PortfolioRiskEngine()
+    return _risk_engine_instance
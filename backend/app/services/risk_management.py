@@ -24,6 +24,7 @@ from app.models.risk import RiskLevel
 from app.models.trade import Trade, TradeStatus, TradeType
 from app.models.user import User
 from app.services.market_data import MarketDataService
+from app.services.risk_engine import get_risk_engine
 
 logger = logging.getLogger(__name__)
 
@@ -97,6 +98,7 @@ class RiskManagementService:
     def __init__(self, db: Session):
         self.db = db
         self.market_data_service = MarketDataService()
+        self.risk_engine = get_risk_engine()
 
         # Risk management configuration
         self.max_position_size_pct = getattr(
@@ -953,25 +955,91 @@ class RiskManagementService:
     ) -> Dict[str, float]:
         """Calculate risk metrics based on historical data."""
         try:
-            # This would fetch historical data and calculate:
-            # - Portfolio volatility
-            # - Beta relative to market
-            # - Value at Risk
-            # - Sharpe ratio
-            # - Maximum drawdown
+            allocation = {p["symbol"]: p["percentage"] for p in positions}
+            results = await self.risk_engine.portfolio_metrics({"portfolio": allocation})
+            metrics = results.get("portfolio")
+
+            if not metrics:
+                # No usable history: fall back to conservative defaults
+                return {
+                    "daily_var": portfolio_value * 0.02,  # 2% VaR
+                    "portfolio_beta": 1.0,
+                    "sharpe_ratio": 0.0,
+                    "max_drawdown": 0.0,
+                    "volatility": 0.20,
+                    "leverage_ratio": 1.0,
+                }
+
+            return self._format_risk_metrics(metrics, portfolio_value)
+
+        except Exception as e:
+            logger.error(f"Historical risk metrics calculation failed: {e}")
+            return {}
+
+    @staticmethod
+    def _format_risk_metrics(
+        metrics: Dict[str, float], portfolio_value: float
+    ) -> Dict[str, float]:
+        """Map risk engine output onto the RiskMetrics fields."""
+        return {
+            "daily_var": portfolio_value * metrics["historical_var"],
+            "daily_cvar": portfolio_value * metrics["historical_cvar"],
+            "parametric_var": portfolio_value * metrics["parametric_var"],
+            "portfolio_beta": metrics["beta"],
+            "sharpe_ratio": metrics["sharpe_ratio"],
+            "max_drawdown": metrics["max_drawdown"],
+            "volatility": metrics["volatility"],
+            "leverage_ratio": 1.0,
+        }
+
+    async def calculate_all_portfolio_risk_metrics(self) -> Dict[int, Dict[str, float]]:
+        """
+        Calculate historical risk metrics for every portfolio in one pass.
+
+        Holdings for all portfolios are loaded with a single query and the
+        metrics are computed as one batched matrix operation over the shared
+        returns matrix, instead of one history fetch per position per user.
+
+        Returns:
+            Mapping of portfolio id to risk metrics
+        """
+        try:
+            rows = (
+                self.db.query(
+                    Holding.portfolio_id, Holding.symbol, Holding.market_value
+                )
+                .filter(Holding.quantity > 0)
+                .all()
+            )
+
+            values: Dict[int, float] = {}
+            allocations: Dict[int, Dict[str, float]] = {}
+            for portfolio_id, symbol, market_value in rows:
+                allocations.setdefault(portfolio_id, {})[symbol] = float(
+                    market_value or 0.0
+                )
+                values[portfolio_id] = values.get(portfolio_id, 0.0) + float(
+                    market_value or 0.0
+                )
+
+            # Convert market values to weights
+            for portfolio_id, allocation in allocations.items():
+                total = values[portfolio_id]
+                if total > 0:
+                    for symbol in allocation:
+                        allocation[symbol] /= total
+
+            results = await self.risk_engine.portfolio_metrics(allocations)
 
-            # For now, return placeholder values
             return {
-                "daily_var": portfolio_value * 0.02,  # 2% VaR
-                "portfolio_beta": 1.0,
-                "sharpe_ratio": 0.8,
-                "max_drawdown": 0.15,
-                "volatility": 0.20,
-                "leverage_ratio": 1.0,
+                portfolio_id: self._format_risk_metrics(
+                    metrics, values.get(portfolio_id, 0.0)
+                )
+                for portfolio_id, metrics in results.items()
             }
 
         except Exception as e:
-            logger.error(f"Historical risk metrics calculation failed: {e}")
+            logger.error(f"Batch portfolio risk calculation failed: {e}")
             return {}
 
     async def _calculate_position_risk_metrics(
@@ -0,0 +1,353 @@
+"""
+Shared signal scheduler for automated trading
+
+Many users run the same strategy, with the same parameters, on the same
+symbol. Instead of every user's loop fetching a quote and generating that
+signal on its own, the scheduler groups subscriptions by
+``(strategy class, parameters, symbol)``. Strategies whose signals depend on
+their own position or order state (``position_dependent_signals``) get a
+group of their own per subscription. On each tick it:
+
+1. Fetches each distinct symbol's quote once
+2. Generates and validates each distinct signal once, with bounded concurrency
+3. Fans actionable signals out to the subscribed portfolios, where
+   user-specific sizing and risk checks happen
+
+Per-tick statistics report how many signals were computed versus delivered.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (strategy class, parameters, symbol, owner); owner is empty when shared
+SignalKey = Tuple[str, str, str, str]
+
+QuoteFetcher = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+SignalDelivery = Callable[
+    ["SignalSubscription", Dict[str, Any], Dict[str, Any]], Awaitable[bool]
+]
+
+
+def signal_key(strategy: Any, owner: Optional[Tuple[int, str]] = None) -> SignalKey:
+    """
+    Key under which equivalent strategy instances share one signal.
+
+    Args:
+        strategy: Strategy instance
+        owner: ``(user_id, strategy_key)`` of the subscription; used to keep
+            position-dependent strategies in a group of their own
+
+    Returns:
+        Grouping key for the strategy's signal
+    """
+    strategy_class = type(strategy)
+    parameters = json.dumps(
+        getattr(strategy, "parameters", {}), sort_keys=True, default=str
+    )
+    private = owner is not None and getattr(
+        strategy, "position_dependent_signals", False
+    )
+    return (
+        f"{strategy_class.__module__}.{strategy_class.__qualname__}",
+        parameters,
+        strategy.symbol,
+        f"{owner[0]}:{owner[1]}" if private else "",
+    )
+
+
+@dataclass
+class SignalSubscription:
+    """A user's strategy instance subscribed to a shared signal."""
+
+    user_id: int
+    portfolio_id: int
+    strategy_key: str
+    strategy: Any
+    context: Any = None  # Caller state, e.g. the user's database session
+
+
+@dataclass
+class TickStats:
+    """Work done by one scheduler tick."""
+
+    tick: int
+    started_at: datetime
+    subscriptions: int = 0
+    distinct_signals: int = 0
+    quotes_fetched: int = 0
+    signals_computed: int = 0
+    actionable_signals: int = 0
+    signals_delivered: int = 0
+    trades_executed: int = 0
+    errors: int = 0
+    duration_ms: float = 0.0
+
+    @property
+    def fan_out(self) -> float:
+        """Deliveries per computed signal."""
+        if not self.signals_computed:
+            return 0.0
+        return self.signals_delivered / self.signals_computed
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["started_at"] = self.started_at.isoformat()
+        data["fan_out"] = self.fan_out
+        return data
+
+
+@dataclass
+class _SignalGroup:
+    """Subscribers of one distinct signal and the instance that computes it."""
+
+    source: Any
+    subscribers: Dict[Tuple[int, str], SignalSubscription] = field(default_factory=dict)
+
+
+class SignalScheduler:
+    """Computes each distinct strategy signal once per tick and fans it out."""
+
+    def __init__(
+        self,
+        quote_fetcher: QuoteFetcher,
+        deliver: SignalDelivery,
+        max_concurrency: int = 32,
+        delivery_concurrency: int = 16,
+        history_size: int = 100,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            quote_fetcher: Coroutine returning the quote for a symbol
+            deliver: Coroutine sizing and executing a signal for one
+                subscription; returns True if a trade was placed
+            max_concurrency: Quote fetches and signal computations in flight
+            delivery_concurrency: Users receiving signals at the same time
+            history_size: Tick statistics kept for reporting
+        """
+        self.quote_fetcher = quote_fetcher
+        self.deliver = deliver
+        self.max_concurrency = max_concurrency
+        self.delivery_concurrency = delivery_concurrency
+
+        self._groups: Dict[SignalKey, _SignalGroup] = {}
+        self._user_keys: Dict[int, Dict[str, SignalKey]] = {}
+        self._tick = 0
+        self.history: Deque[TickStats] = deque(maxlen=history_size)
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def subscribe(self, subscription: SignalSubscription) -> SignalKey:
+        """Subscribe a user's strategy, sharing any equivalent signal."""
+        self.unsubscribe(subscription.user_id, subscription.strategy_key)
+
+        owner = (subscription.user_id, subscription.strategy_key)
+        key = signal_key(subscription.strategy, owner)
+        group = self._groups.get(key)
+        if group is None:
+            # The first instance computes the signal for all subscribers
+            group = self._groups[key] = _SignalGroup(source=subscription.strategy)
+        group.subscribers[owner] = subscription
+        self._user_keys.setdefault(subscription.user_id, {})[
+            subscription.strategy_key
+        ] = key
+        return key
+
+    def unsubscribe(self, user_id: int, strategy_key: str) -> bool:
+        """Remove one of a user's strategies."""
+        key = self._user_keys.get(user_id, {}).pop(strategy_key, None)
+        if key is None:
+            return False
+        group = self._groups[key]
+        removed = group.subscribers.pop((user_id, strategy_key), None)
+        if not group.subscribers:
+            del self._groups[key]
+        elif removed is not None and group.source is removed.strategy:
+            # Hand computation to a remaining subscriber's instance
+            group.source = next(iter(group.subscribers.values())).strategy
+        if not self._user_keys[user_id]:
+            del self._user_keys[user_id]
+        return True
+
+    def unsubscribe_user(self, user_id: int) -> int:
+        """Remove all of a user's strategies and return how many there were."""
+        strategy_keys = list(self._user_keys.get(user_id, {}))
+        for strategy_key in strategy_keys:
+            self.unsubscribe(user_id, strategy_key)
+        return len(strategy_keys)
+
+    def has_subscriptions(self, user_id: Optional[int] = None) -> bool:
+        if user_id is None:
+            return bool(self._groups)
+        return user_id in self._user_keys
+
+    @property
+    def subscription_count(self) -> int:
+        return sum(len(group.subscribers) for group in self._groups.values())
+
+    # ------------------------------------------------------------------
+    # Ticks
+    # ------------------------------------------------------------------
+
+    async def run_tick(
+        self, symbol_allowed: Optional[Callable[[str], bool]] = None
+    ) -> TickStats:
+        """
+        Compute every distinct signal once and deliver it to subscribers.
+
+        Args:
+            symbol_allowed: Optional filter, e.g. a per-symbol circuit breaker;
+                signals for rejected symbols are not computed
+
+        Returns:
+            Statistics for the tick
+        """
+        self._tick += 1
+        stats = TickStats(tick=self._tick, started_at=datetime.utcnow())
+        started = time.perf_counter()
+        groups = list(self._groups.items())
+        stats.subscriptions = sum(len(g.subscribers) for _, g in groups)
+        stats.distinct_signals = len(groups)
+
+        symbols = {key[2] for key, _ in groups}
+        if symbol_allowed is not None:
+            symbols = {symbol for symbol in symbols if symbol_allowed(symbol)}
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        quotes = await self._fetch_quotes(sorted(symbols), semaphore, stats)
+
+        computed = await asyncio.gather(
+            *(
+                self._compute(key, group, quotes[key[2]], semaphore, stats)
+                for key, group in groups
+                if quotes.get(key[2])
+            )
+        )
+
+        # Group deliveries by user so one user's session is used serially
+        deliveries: Dict[int, List[Tuple[SignalSubscription, Dict, Dict]]] = {}
+        for result in computed:
+            if result is None:
+                continue
+            group, signal, market_data = result
+            stats.actionable_signals += 1
+            for subscription in group.subscribers.values():
+                deliveries.setdefault(subscription.user_id, []).append(
+                    (subscription, signal, market_data)
+                )
+
+        delivery_semaphore = asyncio.Semaphore(self.delivery_concurrency)
+        await asyncio.gather(
+            *(
+                self._deliver_user(items, delivery_semaphore, stats)
+                for items in deliveries.values()
+            )
+        )
+
+        stats.duration_ms = (time.perf_counter() - started) * 1000
+        self.history.append(stats)
+        logger.debug(
+            f"Signal tick {stats.tick}: {stats.signals_computed} computed, "
+            f"{stats.signals_delivered} delivered, {stats.trades_executed} trades"
+        )
+        return stats
+
+    async def _fetch_quotes(
+        self, symbols: List[str], semaphore: asyncio.Semaphore, stats: TickStats
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        async def fetch(symbol: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    quote = await self.quote_fetcher(symbol)
+                except Exception as e:
+                    stats.errors += 1
+                    logger.error(f"Error fetching quote for {symbol}: {str(e)}")
+                    return None
+            if not quote:
+                logger.warning(f"No market data for {symbol}")
+                return None
+            stats.quotes_fetched += 1
+            return quote
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    async def _compute(
+        self,
+        key: SignalKey,
+        group: _SignalGroup,
+        market_data: Dict[str, Any],
+        semaphore: asyncio.Semaphore,
+        stats: TickStats,
+    ) -> Optional[Tuple[_SignalGroup, Dict[str, Any], Dict[str, Any]]]:
+        """Generate and validate one shared signal."""
+        strategy = group.source
+        async with semaphore:
+            try:
+                signal = await strategy.generate_signal(market_data)
+                stats.signals_computed += 1
+                if not signal or signal.get("action") == "hold":
+                    logger.debug(f"Strategy {strategy.name} for {key[2]}: HOLD")
+                    return None
+                if not await strategy.validate_signal(signal, market_data):
+                    logger.debug(
+                        f"Signal from {strategy.name} for {key[2]} failed validation"
+                    )
+                    return None
+            except Exception as e:
+                stats.errors += 1
+                logger.error(
+                    f"Error generating signal for {strategy.name} on {key[2]}: {str(e)}"
+                )
+                return None
+
+        logger.info(
+            f"Valid signal from {strategy.name} for {key[2]}: "
+            f"{signal['action']} (confidence: {signal['confidence']:.2f}) "
+            f"-> {len(group.subscribers)} subscribers"
+        )
+        return group, signal, market_data
+
+    async def _deliver_user(
+        self,
+        items: List[Tuple[SignalSubscription, Dict[str, Any], Dict[str, Any]]],
+        semaphore: asyncio.Semaphore,
+        stats: TickStats,
+    ) -> None:
+        async with semaphore:
+            for subscription, signal, market_data in items:
+                stats.signals_delivered += 1
+                try:
+                    if await self.deliver(subscription, dict(signal), market_data):
+                        stats.trades_executed += 1
+                except Exception as e:
+                    stats.errors += 1
+                    logger.error(
+                        f"Error delivering {subscription.strategy_key} to user "
+                        f"{subscription.user_id}: {str(e)}"
+                    )
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_stats(self, last: int = 10) -> Dict[str, Any]:
+        """Subscription counts and statistics for recent ticks."""
+        recent = list(self.history)[-last:]
+        return {
+            "subscriptions": self.subscription_count,
+            "distinct_signals": len(self._groups),
+            "users": len(self._user_keys),
+            "ticks": [stats.to_dict() for stats in recent],
+        }
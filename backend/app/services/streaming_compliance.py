@@ -0,0 +1,560 @@
+"""
+Streaming Compliance Scanner for Elson Financial AI
+
+Validates LLM output while it is being generated instead of after the full
+response has been assembled. The regex and phrase rules from the accounting
+and insurance rule engines are compiled into one multi-pattern automaton
+that is run over each chunk as it arrives:
+
+1. A single prefilter pattern finds every position where any rule can start
+2. A probe pattern reports all rules matching at that position in one step
+3. A holdback window keeps matches that straddle chunk boundaries intact
+4. Critical (blocking) rules halt or redact the stream immediately
+5. Every rule is confirmed once, at the end, with the original checks
+
+Unbounded repeats, such as runs of whitespace, are capped at
+``STREAM_REPEAT_LIMIT`` in the streamed patterns, so every match has a known
+longest length and the holdback can be checked to cover it. The final confirmation runs the
+original, uncapped checks over the full text, so the result always equals
+the batch engines.
+
+Only rules that inspect response text can be streamed. Context-based engines
+such as ComplianceRulesEngine are still evaluated before generation starts.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services import accounting_rules as acct
+from app.services import insurance_rules as ins
+from app.services.pattern_matcher import MultiPatternMatcher
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+HALT = "halt"
+REDACT = "redact"
+
+# Result buckets, mirroring the batch compliance result objects
+BLOCK = "block"
+WARNING = "warning"
+DISCLAIMER = "disclaimer"
+DISCLOSURE = "disclosure"
+REFERRAL = "referral"
+
+STREAM_REPEAT_LIMIT = 16
+HALT_NOTICE = (
+    "\n\n[Response stopped: this content cannot be provided. "
+    "Please consult a licensed professional.]"
+)
+REDACTION_MARKER = "[removed for compliance]"
+
+
+# =============================================================================
+# RULE DEFINITIONS
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class StreamRule:
+    """A text rule that can be evaluated incrementally"""
+
+    rule_id: str
+    domain: str
+    patterns: Tuple[str, ...]
+    check: Callable[[object], Tuple[bool, str]]
+    outcome: str
+    case_sensitive: bool = False
+    always: bool = False  # Fires on absence of text, so always confirm
+
+    @property
+    def blocking(self) -> bool:
+        return self.outcome == BLOCK
+
+
+def _terms(terms: Sequence[str]) -> Tuple[str, ...]:
+    """Turn plain substring terms into literal patterns."""
+    return tuple(re.escape(term) for term in terms)
+
+
+ACCOUNTING_STREAM_RULES: List[StreamRule] = [
+    StreamRule(
+        "ACCT_TAX_001",
+        "accounting",
+        tuple(acct.TAX_FILING_PATTERNS),
+        acct.check_no_tax_filing_instructions,
+        BLOCK,
+    ),
+    StreamRule(
+        "ACCT_TAX_002",
+        "accounting",
+        tuple(acct.TAX_CALCULATION_PATTERNS),
+        acct.check_no_specific_tax_calculations,
+        REFERRAL,
+    ),
+    StreamRule(
+        "ACCT_TAX_003",
+        "accounting",
+        tuple(acct.TAX_EVASION_PATTERNS),
+        acct.check_no_tax_evasion,
+        BLOCK,
+    ),
+    StreamRule(
+        "ACCT_TAX_004",
+        "accounting",
+        _terms(acct.TAX_YEAR_TERMS),
+        acct.check_tax_year_disclaimer,
+        DISCLAIMER,
+    ),
+    StreamRule(
+        "ACCT_PROF_003",
+        "accounting",
+        _terms(acct.ENTITY_ADVICE_TERMS),
+        acct.check_entity_advice_limitation,
+        WARNING,
+    ),
+    StreamRule(
+        "ACCT_DATA_001",
+        "accounting",
+        _terms(acct.CATEGORIZATION_TERMS),
+        acct.check_categorization_disclaimer,
+        DISCLAIMER,
+    ),
+    StreamRule(
+        "ACCT_DATA_002",
+        "accounting",
+        _terms(acct.PROJECTION_TERMS),
+        acct.check_projection_disclaimer,
+        DISCLAIMER,
+    ),
+    StreamRule(
+        "ACCT_SEP_001",
+        "accounting",
+        _terms(acct.SEPARATION_TERMS),
+        acct.check_separation_warning,
+        WARNING,
+    ),
+]
+
+# Text patterns behind each response-level insurance check
+_INSURANCE_TEXT_CHECKS = {
+    "check_no_guaranteed_returns": (
+        ins.check_no_guaranteed_returns,
+        tuple(ins.GUARANTEED_RETURN_PATTERNS),
+        False,
+    ),
+    "check_no_investment_language": (
+        ins.check_no_investment_language,
+        _terms(ins.INVESTMENT_LANGUAGE_TERMS),
+        False,
+    ),
+    "check_no_carrier_recommendations": (
+        ins.check_no_carrier_recommendations,
+        tuple(ins.CARRIER_RECOMMENDATION_PATTERNS),
+        True,
+    ),
+    "check_no_medical_advice": (
+        ins.check_no_medical_advice,
+        tuple(ins.MEDICAL_ADVICE_PATTERNS),
+        False,
+    ),
+    "check_illustration_disclaimer": (
+        ins.check_illustration_disclaimer,
+        _terms(ins.PROJECTION_INDICATORS),
+        False,
+    ),
+    "check_recommendation_disclaimer": (
+        ins.check_recommendation_disclaimer,
+        (),
+        False,
+    ),
+    "check_tax_disclosure": (
+        ins.check_tax_disclosure,
+        _terms(ins.TAX_RELEVANT_TERMS),
+        False,
+    ),
+}
+
+_INSURANCE_OUTCOMES = {
+    ins.RuleAction.BLOCK_RESPONSE: BLOCK,
+    ins.RuleAction.REQUIRE_DISCLOSURE: DISCLOSURE,
+    ins.RuleAction.ADD_WARNING: WARNING,
+    ins.RuleAction.MODIFY_RESPONSE: WARNING,
+}
+
+
+def _insurance_stream_rules() -> List[StreamRule]:
+    """Derive streamable rules from the insurance rule registry."""
+    rules = []
+    for rule in ins.INSURANCE_RULES:
+        spec = _INSURANCE_TEXT_CHECKS.get(rule.check_function)
+        outcome = _INSURANCE_OUTCOMES.get(rule.action)
+        if spec is None or outcome is None:
+            continue
+        check, patterns, case_sensitive = spec
+        rules.append(
+            StreamRule(
+                rule.rule_id,
+                "insurance",
+                patterns,
+                check,
+                outcome,
+                case_sensitive=case_sensitive,
+                always=not patterns,
+            )
+        )
+    return rules
+
+
+INSURANCE_STREAM_RULES: List[StreamRule] = _insurance_stream_rules()
+
+STREAM_RULES: Dict[str, List[StreamRule]] = {
+    "accounting": ACCOUNTING_STREAM_RULES,
+    "insurance": INSURANCE_STREAM_RULES,
+}
+
+# The accounting engine stops at its first blocking rule
+_STOP_ON_BLOCK = {"accounting": True, "insurance": False}
+
+
+# =============================================================================
+# MULTI-PATTERN AUTOMATON
+# =============================================================================
+
+
+_OPEN_REPEAT = re.compile(r"\{(\d*),\}")
+
+
+def _bounded(pattern: str, limit: int = STREAM_REPEAT_LIMIT) -> str:
+    """Cap the unbounded repeats of a pattern at ``limit``."""
+    out = []
+    in_class = False
+    escaped = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "*":
+            char = f"{{0,{limit}}}"
+        elif char == "+":
+            char = f"{{1,{limit}}}"
+        elif char == "{":
+            open_repeat = _OPEN_REPEAT.match(pattern, i)
+            if open_repeat:
+                char = f"{{{open_repeat.group(1) or 0},{limit}}}"
+                i = open_repeat.end() - 1
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _max_width(pattern: str) -> int:
+    """Longest text a pattern can match; ValueError if it is unbounded."""
+    width = sre_parse.parse(pattern).getwidth()[1]
+    if width >= sre_parse.MAXREPEAT:
+        raise ValueError(f"Pattern has no bounded match length: {pattern}")
+    return width
+
+
+class ComplianceAutomaton(MultiPatternMatcher):
+    """
+    All rule patterns compiled into one scanner.
+
+    Each rule contributes one alternation of its patterns, with repeats
+    capped, so a hit index maps straight back to ``rules`` and no match is
+    longer than ``max_width``.
+    """
+
+    def __init__(self, rules: Sequence[StreamRule]):
+        self.rules = list(rules)
+        self.max_width = 0
+        bodies = []
+        for rule in self.rules:
+            if not rule.patterns:
+                bodies.append(None)
+                continue
+            body = "|".join(f"(?:{_bounded(p)})" for p in rule.patterns)
+            body = f"(?:{body})" if rule.case_sensitive else f"(?i:{body})"
+            self.max_width = max(self.max_width, _max_width(body))
+            bodies.append(body)
+        super().__init__(bodies)
+
+
+@lru_cache(maxsize=8)
+def compile_rules(domains: Tuple[str, ...]) -> ComplianceAutomaton:
+    """Build (once) the automaton for a combination of rule domains."""
+    unknown = [d for d in domains if d not in STREAM_RULES]
+    if unknown:
+        raise ValueError(f"Unknown compliance domains: {unknown}")
+    return ComplianceAutomaton([r for d in domains for r in STREAM_RULES[d]])
+
+
+# =============================================================================
+# STREAMING SCANNER
+# =============================================================================
+
+
+class StreamingComplianceResult:
+    """Result of a streamed compliance check"""
+
+    def __init__(self):
+        self.passed = True
+        self.blocked = False
+        self.halted = False
+        self.warnings: List[str] = []
+        self.disclaimers: List[str] = []
+        self.required_disclosures: List[str] = []
+        self.professional_referrals: List[str] = []
+        self.triggered_rules: List[str] = []
+
+    def add(self, rule: StreamRule, message: str):
+        if rule.outcome == BLOCK:
+            self.blocked = True
+            self.passed = False
+            self.warnings.append(f"[{rule.rule_id}] BLOCKED: {message}")
+        elif rule.outcome == WARNING:
+            self.warnings.append(f"[{rule.rule_id}] {message}")
+        elif rule.outcome == DISCLAIMER:
+            self.disclaimers.append(message)
+        elif rule.outcome == DISCLOSURE:
+            self.required_disclosures.append(f"[{rule.rule_id}] {message}")
+        elif rule.outcome == REFERRAL:
+            self.professional_referrals.append(f"[{rule.rule_id}] {message}")
+        self.triggered_rules.append(rule.rule_id)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "passed": self.passed,
+            "blocked": self.blocked,
+            "halted": self.halted,
+            "warnings": self.warnings,
+            "disclaimers": self.disclaimers,
+            "required_disclosures": self.required_disclosures,
+            "professional_referrals": self.professional_referrals,
+            "triggered_rules": self.triggered_rules,
+        }
+
+
+class StreamingComplianceScanner:
+    """
+    Incremental compliance scanner for streamed LLM output.
+
+    Feed chunks in generation order; each call returns the text that is safe
+    to forward. The last ``holdback`` characters are kept back so a pattern
+    split across chunks is still seen whole before any of it is released;
+    it defaults to, and may not be shorter than, the longest possible match.
+
+    Usage:
+        scanner = StreamingComplianceScanner(("insurance",), intent="quote")
+        async for chunk in client.generate_stream(prompt):
+            send(scanner.feed(chunk))
+            if scanner.halted:
+                break
+        send(scanner.close())
+        result = scanner.result
+    """
+
+    def __init__(
+        self,
+        domains: Sequence[str] = ("accounting", "insurance"),
+        on_violation: str = HALT,
+        intent: str = "education",
+        includes_projection: bool = False,
+        holdback: Optional[int] = None,
+    ):
+        """
+        Initialize scanner.
+
+        Args:
+            domains: Rule domains to apply, in evaluation order
+            on_violation: "halt" stops the stream, "redact" masks the match
+            intent: Response intent passed to insurance disclosure checks
+            includes_projection: Whether the response may contain projections
+            holdback: Characters withheld to catch matches across chunks
+                (defaults to the longest possible match)
+        """
+        if on_violation not in (HALT, REDACT):
+            raise ValueError(f"on_violation must be '{HALT}' or '{REDACT}'")
+        self.domains = tuple(domains)
+        self.on_violation = on_violation
+        self.intent = intent
+        self.includes_projection = includes_projection
+        self.automaton = compile_rules(self.domains)
+        if holdback is None:
+            holdback = self.automaton.max_width
+        elif holdback < self.automaton.max_width:
+            raise ValueError(
+                f"holdback must be at least {self.automaton.max_width} "
+                f"characters for domains {self.domains}"
+            )
+        self.holdback = holdback
+        self.result = StreamingComplianceResult()
+
+        self._chunks: List[str] = []
+        self._buffer = ""
+        self._offset = 0  # Absolute position of _buffer[0]
+        self._released = 0  # Absolute position of the next unreleased char
+        self._redactions: List[Tuple[int, int]] = []
+        self._closed = False
+
+    @property
+    def halted(self) -> bool:
+        return self.result.halted
+
+    # -------------------------------------------------------------------------
+    # Streaming
+    # -------------------------------------------------------------------------
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the text that can be forwarded."""
+        if self.halted or self._closed or not chunk:
+            return ""
+        self._chunks.append(chunk)
+        self._buffer += chunk
+        total = self._offset + len(self._buffer)
+        return self._advance(max(self._released, total - self.holdback))
+
+    def close(self) -> str:
+        """Flush the held-back tail and finalize the result."""
+        if self._closed:
+            return ""
+        tail = ""
+        if not self.halted:
+            tail = self._advance(self._offset + len(self._buffer))
+        self._closed = True
+        self._finalize()
+        return tail
+
+    def _advance(self, release_to: int) -> str:
+        """Scan new start positions and release text up to ``release_to``."""
+        start = self._released - self._offset
+        # Halting may look at the whole buffer: any complete match is final.
+        # Redaction must wait until a match can no longer grow.
+        end = None if self.on_violation == HALT else release_to - self._offset
+        for position, index, match_end in self.automaton.scan(self._buffer, start, end):
+            rule = self.automaton.rules[index]
+            if not rule.blocking:
+                continue
+
+            absolute = self._offset + position
+            snippet = self._buffer[position:match_end]
+            passed, message = rule.check(self._context(rule.domain, snippet))
+            if passed:
+                continue
+            logger.warning(
+                "Streaming compliance violation %s at offset %d",
+                rule.rule_id,
+                absolute,
+            )
+
+            if self.on_violation == HALT:
+                text = self._release(absolute)
+                self.result.halted = True
+                return text + HALT_NOTICE
+
+            span_end = self._offset + match_end
+            self._redactions.append((absolute, span_end))
+            release_to = max(release_to, span_end)
+
+        return self._release(release_to)
+
+    def _release(self, upto: int) -> str:
+        """Return buffered text up to ``upto`` with redactions applied."""
+        if upto <= self._released:
+            return ""
+        parts = []
+        cursor = self._released
+        for span_start, span_end in sorted(self._redactions):
+            if span_end <= cursor or span_start >= upto:
+                continue
+            if span_start > cursor:
+                parts.append(self._slice(cursor, span_start))
+                parts.append(REDACTION_MARKER)
+            elif not parts:
+                parts.append(REDACTION_MARKER)
+            cursor = max(cursor, span_end)
+        if cursor < upto:
+            parts.append(self._slice(cursor, upto))
+
+        self._released = max(upto, cursor)
+        self._redactions = [s for s in self._redactions if s[1] > self._released]
+        # Keep only what a future match could still start in
+        drop = self._released - self._offset
+        self._buffer = self._buffer[drop:]
+        self._offset = self._released
+        return "".join(parts)
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._buffer[start - self._offset : end - self._offset]
+
+    # -------------------------------------------------------------------------
+    # Finalization
+    # -------------------------------------------------------------------------
+
+    def _context(self, domain: str, text: str):
+        if domain == "accounting":
+            return acct.AccountingResponseContext(response_text=text)
+        return ins.InsuranceResponseContext(
+            response_text=text,
+            intent=self.intent,
+            includes_projection=self.includes_projection,
+        )
+
+    def _finalize(self):
+        """Run every rule over the full text with the original checks."""
+        text = "".join(self._chunks)
+        stopped = set()
+        for rule in self.automaton.rules:
+            if rule.domain in stopped:
+                continue
+            try:
+                passed, message = rule.check(self._context(rule.domain, text))
+            except Exception as e:
+                self.result.add(
+                    replace(rule, outcome=WARNING), f"Rule check error: {str(e)}"
+                )
+                continue
+            if passed and not message:
+                continue
+            self.result.add(rule, message)
+            if rule.blocking and _STOP_ON_BLOCK[rule.domain]:
+                stopped.add(rule.domain)
+
+
+async def scan_stream(
+    stream: AsyncIterator[str], scanner: StreamingComplianceScanner
+) -> AsyncIterator[str]:
+    """
+    Forward a text stream through a compliance scanner.
+
+    Stops consuming ``stream`` as soon as the scanner halts; the final result
+    is available on ``scanner.result`` once iteration completes.
+    """
+    try:
+        async for chunk in stream:
+            text = scanner.feed(chunk)
+            if text:
+                yield text
+            if scanner.halted:
+                break
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if scanner.halted and aclose is not None:
+            await aclose()
+    tail = scanner.close()
+    if tail:
+        yield tail
@@ -0,0 +1,297 @@
+"""
+Shared execution layer for blocking market-data SDKs.
+
+yfinance, OpenBB and FinanceToolkit are synchronous libraries. The tool
+endpoints run their calls here instead of on the event loop:
+
+- one bounded thread pool shared by all providers
+- a concurrency cap per provider, held until the SDK call actually returns
+- a timeout per call; calls that have not started yet are cancelled
+- identical concurrent calls (same provider + key) share one SDK call
+
+Also provides column-wise conversion of OHLCV DataFrames into bar payloads.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_LIMITS = {
+    "yfinance": 8,
+    "openbb": 4,
+    "financetoolkit": 2,
+}
+DEFAULT_TIMEOUT_SECONDS = 20.0
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a blocking tool call does not finish within its timeout."""
+
+
+class BlockingToolExecutor:
+    """
+    Run blocking SDK calls off the event loop with caps and coalescing.
+
+    The provider slot is released when the worker thread finishes, not when
+    the caller gives up, so a hung SDK call keeps counting against its
+    provider's cap instead of letting more threads pile up behind it.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    ):
+        self.max_workers = max_workers
+        self.provider_limits = dict(DEFAULT_PROVIDER_LIMITS)
+        self.provider_limits.update(provider_limits or {})
+        self.default_timeout = default_timeout
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tool-sdk"
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._waiters: Dict[Tuple[str, str], int] = {}
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "timeouts": 0, "errors": 0}
+
+    def _bump(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores and tasks are bound to a loop (e.g. per test run)
+            self._loop = loop
+            self._semaphores.clear()
+            self._inflight.clear()
+            self._waiters.clear()
+        if provider not in self._semaphores:
+            limit = self.provider_limits.get(provider, self.max_workers)
+            self._semaphores[provider] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[provider]
+
+    async def _execute(
+        self, provider: str, fn: Callable[..., Any], timeout: float
+    ) -> Any:
+        semaphore = self._semaphore(provider)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._bump("timeouts")
+            raise ToolTimeoutError(
+                f"{provider} call timed out waiting for a slot after {timeout}s"
+            )
+
+        future: Future = self._pool.submit(fn)
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(semaphore.release)
+        )
+        self._bump("calls")
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), max(0.0, deadline - loop.time())
+            )
+        except asyncio.TimeoutError:
+            future.cancel()
+            self._bump("timeouts")
+            raise ToolTimeoutError(f"{provider} call timed out after {timeout}s")
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception:
+            self._bump("errors")
+            raise
+
+    async def run(
+        self,
+        provider: str,
+        key: Optional[str],
+        fn: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Run `fn(*args, **kwargs)` in the shared pool under the provider cap.
+
+        Args:
+            provider: Provider name used for the concurrency cap
+            key: Coalescing key (e.g. the endpoint cache key); concurrent
+                calls with the same provider and key share one result.
+                None disables coalescing.
+            fn: Blocking callable
+            timeout: Seconds to wait, including time queued for a slot
+
+        Returns:
+            The callable's return value
+
+        Raises:
+            ToolTimeoutError: If the call does not finish in time
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        call = partial(fn, *args, **kwargs)
+        self._semaphore(provider)  # binds per-loop state before _inflight use
+
+        if key is None:
+            return await self._execute(provider, call, timeout)
+
+        flight = (provider, key)
+        task = self._inflight.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(provider, call, timeout))
+            self._inflight[flight] = task
+            task.add_done_callback(lambda _: self._inflight.pop(flight, None))
+        else:
+            self._bump("coalesced")
+
+        self._waiters[flight] = self._waiters.get(flight, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[flight] -= 1
+            if self._waiters[flight] == 0:
+                del self._waiters[flight]
+                # Last interested caller went away: stop the shared call
+                if not task.done():
+                    task.cancel()
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ----------------------------------------------------------------------
+# Column-wise bar building
+# ----------------------------------------------------------------------
+
+
+def isoformat_index(index: pd.Index) -> np.ndarray:
+    """ISO-8601 strings for an index, matching Timestamp.isoformat()."""
+    if not isinstance(index, pd.DatetimeIndex):
+        return index.astype(str).to_numpy()
+
+    local = index.tz_localize(None) if index.tz is not None else index
+    has_fraction = bool((local.microsecond != 0).any())
+    strings = np.datetime_as_string(
+        local.to_numpy(), unit="us" if has_fraction else "s"
+    )
+    if index.tz is not None:
+        # "%z" gives "-0500"; isoformat() uses "-05:00"
+        offsets = pd.Index(index.strftime("%z"))
+        offsets = offsets.str[:3] + ":" + offsets.str[3:]
+        strings = np.char.add(strings, offsets.to_numpy(dtype=str))
+    return strings.astype(object)
+
+
+def price_strings(values: pd.Series) -> np.ndarray:
+    """Column of price strings; missing values become None."""
+    array = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    strings = array.astype(str).astype(object)
+    strings[np.isnan(array)] = None
+    return strings
+
+
+def frame_to_bar_columns(
+    frame: pd.DataFrame,
+    columns: Dict[str, str],
+    limit: Optional[int] = None,
+    optional: Sequence[str] = (),
+    as_strings: bool = True,
+) -> Dict[str, np.ndarray]:
+    """
+    Convert an OHLCV DataFrame to output column arrays in one pass per column.
+
+    Args:
+        frame: DataFrame indexed by timestamp
+        columns: Output field -> source column (e.g. {"open": "Open"})
+            "volume" is emitted as integers, every other field as strings
+        limit: Keep only the last `limit` rows
+        optional: Output fields whose missing source column yields None
+            rather than the string of zero
+        as_strings: Emit prices as strings (tool payloads) or as float
+            arrays with NaN for missing values (columnar/binary formats)
+
+    Returns:
+        Mapping of output field to a numpy array of length n_bars
+    """
+    if limit is not None:
+        frame = frame.tail(limit)
+    n_bars = len(frame)
+
+    output = {"timestamp": isoformat_index(frame.index)}
+    for field, source in columns.items():
+        if source in frame.columns:
+            values = frame[source]
+        elif field in optional:
+            output[field] = (
+                np.full(n_bars, None, dtype=object)
+                if as_strings
+                else np.full(n_bars, np.nan)
+            )
+            continue
+        else:
+            values = pd.Series(np.zeros(n_bars), index=frame.index)
+
+        if field == "volume":
+            numeric = pd.to_numeric(values, errors="coerce").fillna(0)
+            output[field] = numeric.to_numpy().astype(np.int64)
+        elif as_strings:
+            output[field] = price_strings(values)
+        else:
+            output[field] = pd.to_numeric(values, errors="coerce").to_numpy(
+                dtype=float
+            )
+    return output
+
+
+def stringify_price_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Convert float columns from `as_strings=False` back to price strings."""
+    return {
+        field: price_strings(pd.Series(values)) if values.dtype.kind == "f" else values
+        for field, values in columns.items()
+    }
+
+
+def columns_to_bars(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Zip column arrays back into the per-bar dicts the tool schemas expose."""
+    fields = list(columns)
+    # tolist() yields native Python types for JSON encoding
+    arrays = [columns[f].tolist() for f in fields]
+    return [dict(zip(fields, row)) for row in zip(*arrays)]
+
+
+# Global executor instance
+_tool_executor_instance = None
+
+
+def get_tool_executor() -> BlockingToolExecutor:
+    """Get the global blocking tool executor instance."""
+    global _tool_executor_instance
+    if _tool_executor_instance is None:
+        _tool_executor_instance = BlockingToolExecutor(
+            max_workers=getattr(settings, "TOOL_EXECUTOR_MAX_WORKERS", 16),
+            provider_limits=getattr(settings, "TOOL_PROVIDER_LIMITS", None),
+            default_timeout=getattr(
+                settings, "TOOL_CALL_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS
+            ),
+        )
+    return _tool_executor_instance
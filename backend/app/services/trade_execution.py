@@ -24,7 +24,17 @@ from app.models.trade import (
     TradeSource,
     TradeStatus,
 )
+from app.services.child_orders import (
+    ChildOrder,
+    ChildOrderPipeline,
+    OrderRateLimiter,
+    push_progress,
+)
 from app.services.market_data import MarketDataService
+from app.services.volume_profiles import (
+    get_volume_profile_store,
+    remaining_session,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +63,7 @@ class TradeExecutionService:
         """Initialize with database session and market data service."""
         self.db = db
         self.market_data = market_data_service
+        self.volume_profiles = get_volume_profile_store()
 
         # Configuration
         self.max_order_chunk_size = Decimal(
@@ -62,6 +73,13 @@ class TradeExecutionService:
             settings.MIN_TIME_BETWEEN_CHUNKS or 5
         )  # seconds
         self.max_partial_fill_attempts = int(settings.MAX_PARTIAL_FILL_ATTEMPTS or 5)
+        self.child_order_max_in_flight = int(settings.CHILD_ORDER_MAX_IN_FLIGHT or 8)
+        self.child_order_rate_per_second = float(
+            settings.CHILD_ORDER_RATE_PER_SECOND or 5.0
+        )
+        self.child_order_fill_batch_size = int(
+            settings.CHILD_ORDER_FILL_BATCH_SIZE or 50
+        )
         self.execution_quality_threshold = Decimal(
             str(settings.EXECUTION_QUALITY_THRESHOLD or "0.001")
         )  # 0.1%
@@ -475,7 +493,12 @@ class TradeExecutionService:
         """Split a large order into smaller chunks and execute them.
 
         Implements different strategies for executing large orders to minimize
-        market impact and achieve better execution prices.
+        market impact and achieve better execution prices. The chunk schedule
+        is computed up front and run through a ChildOrderPipeline, which
+        submits each child when it is due, within the configured rate
+        limits. TWAP, iceberg and even chunks are spaced
+        ``min_time_between_chunks`` apart; VWAP chunks follow the volume
+        profile's slots over the rest of the session.
 
         Args:
             trade: The trade to execute
@@ -492,109 +515,40 @@ class TradeExecutionService:
 
         try:
             # Determine chunk sizes based on strategy
+            offsets = None
             if strategy == ExecutionStrategy.TWAP:
                 chunk_sizes = self._calculate_twap_chunks(original_quantity)
             elif strategy == ExecutionStrategy.VWAP:
-                chunk_sizes = await self._calculate_vwap_chunks(
+                chunk_sizes, offsets = await self._calculate_vwap_schedule(
                     trade.symbol, original_quantity
                 )
             elif strategy == ExecutionStrategy.ICEBERG:
                 chunk_sizes = self._calculate_iceberg_chunks(original_quantity)
             else:  # Default to even chunks
                 chunk_sizes = self._calculate_even_chunks(original_quantity)
+            if offsets is None:
+                offsets = self._spaced_offsets(len(chunk_sizes))
 
             logger.info(
                 f"Executing {trade.id} in {len(chunk_sizes)} chunks using {strategy.value} strategy"
             )
 
-            # Execute each chunk
-            for i, chunk_size in enumerate(chunk_sizes):
-                logger.info(
-                    f"Executing chunk {i+1}/{len(chunk_sizes)} of size {chunk_size} for trade {trade.id}"
-                )
-
-                # Create child trade for this chunk
-                chunk_trade = Trade(
-                    user_id=trade.user_id,
-                    portfolio_id=trade.portfolio_id,
-                    symbol=trade.symbol,
-                    quantity=chunk_size,
-                    price=trade.price,
-                    trade_type=trade.trade_type,
-                    order_type=trade.order_type,
-                    status=TradeStatus.PENDING,
-                    is_fractional=trade.is_fractional,
-                    trade_source=TradeSource.USER_INITIATED,
-                    parent_order_id=trade.id,
-                    broker_status=f"chunk_{i+1}_of_{len(chunk_sizes)}",
-                    created_at=datetime.utcnow(),
-                )
-
-                self.db.add(chunk_trade)
-                self.db.flush()  # To get the ID
-
-                # Execute the chunk
-                if broker_service:
-                    # Execute with real broker
-                    chunk_result = await broker_service.execute_order(
-                        trade.symbol,
-                        trade.trade_type,
-                        float(chunk_size),
-                        order_type=trade.order_type.value,
-                        price=float(trade.price) if trade.price else None,
-                    )
-                else:
-                    # Simulate execution
-                    current_price = Decimal(
-                        str(self.market_data.get_current_price(trade.symbol))
-                    )
-                    chunk_result = {
-                        "success": True,
-                        "filled_quantity": float(chunk_size),
-                        "average_price": float(current_price),
-                        "status": "filled",
-                        "order_id": f"sim-{int(time.time())}-{i}",
-                    }
-
-                # Update chunk trade with execution results
-                if chunk_result["success"]:
-                    chunk_trade.status = TradeStatus.FILLED
-                    chunk_trade.filled_quantity = Decimal(
-                        str(chunk_result["filled_quantity"])
-                    )
-                    chunk_trade.average_price = Decimal(
-                        str(chunk_result["average_price"])
-                    )
-                    chunk_trade.executed_at = datetime.utcnow()
-                    chunk_trade.broker_order_id = chunk_result.get("order_id")
-
-                    # Update totals
-                    executed_quantity += chunk_trade.filled_quantity
-                    total_value += (
-                        chunk_trade.filled_quantity * chunk_trade.average_price
-                    )
-
-                    # Add to chunks result
-                    chunks.append(
-                        {
-                            "chunk_id": chunk_trade.id,
-                            "quantity": float(chunk_trade.filled_quantity),
-                            "price": float(chunk_trade.average_price),
-                            "broker_order_id": chunk_trade.broker_order_id,
-                        }
-                    )
-                else:
-                    chunk_trade.status = TradeStatus.REJECTED
-                    chunk_trade.broker_status = (
-                        f"Failed: {chunk_result.get('error', 'Unknown error')}"
-                    )
-                    logger.error(
-                        f"Chunk {i+1} execution failed: {chunk_result.get('error')}"
-                    )
+            pipeline = ChildOrderPipeline(
+                self.db,
+                self._child_order_submitter(trade, broker_service),
+                max_in_flight=self.child_order_max_in_flight,
+                rate_limiter=OrderRateLimiter(
+                    self.child_order_rate_per_second,
+                    burst=self.child_order_max_in_flight,
+                ),
+                fill_batch_size=self.child_order_fill_batch_size,
+                notify=push_progress,
+            )
+            chunks = await pipeline.run(trade, chunk_sizes, strategy.value, offsets)
 
-                # Pause between chunks
-                if i < len(chunk_sizes) - 1:
-                    time.sleep(self.min_time_between_chunks)
+            progress = pipeline.tracker.get(trade.id)
+            executed_quantity = progress.filled_quantity
+            total_value = progress.notional
 
             # Calculate average execution price if any chunks were executed
             average_price = (
@@ -635,6 +589,39 @@ class TradeExecutionService:
             )
             return {"success": False, "error": str(e)}
 
+    def _child_order_submitter(self, trade: Trade, broker_service=None):
+        """Build the coroutine that places one child order of ``trade``."""
+        order_type = trade.order_type.value
+        limit_price = float(trade.price) if trade.price else None
+
+        if broker_service:
+
+            async def submit(child: ChildOrder) -> Dict[str, Any]:
+                return await broker_service.execute_order(
+                    child.symbol,
+                    trade.trade_type,
+                    float(child.quantity),
+                    order_type=order_type,
+                    price=limit_price,
+                )
+
+            return submit
+
+        # Simulated children all fill at one quote taken when the schedule starts
+        current_price = float(self.market_data.get_current_price(trade.symbol))
+        run_id = int(time.time())
+
+        async def simulate(child: ChildOrder) -> Dict[str, Any]:
+            return {
+                "success": True,
+                "filled_quantity": child.quantity,
+                "average_price": current_price,
+                "status": "filled",
+                "order_id": f"sim-{run_id}-{child.index}",
+            }
+
+        return simulate
+
     def calculate_execution_metrics(
         self, trade: Trade, execution_result: Dict[str, Any], execution_time: float
     ) -> Dict[str, Any]:
@@ -919,6 +906,10 @@ class TradeExecutionService:
 
         return chunks
 
+    def _spaced_offsets(self, num_chunks: int) -> List[float]:
+        """Due times ``min_time_between_chunks`` apart, the first at once."""
+        return [float(i * self.min_time_between_chunks) for i in range(num_chunks)]
+
     def _calculate_twap_chunks(self, quantity: Decimal) -> List[Decimal]:
         """Calculate Time-Weighted Average Price chunks.
 
@@ -931,14 +922,29 @@ class TradeExecutionService:
     ) -> List[Decimal]:
         """Calculate Volume-Weighted Average Price chunks.
 
-        Distributes chunks based on historical volume profile.
+        Distributes chunks over the rest of the session by the symbol's
+        precomputed intraday volume profile. Without a profile, falls back
+        to a static opening/midday/closing split.
+        """
+        chunks, _ = await self._calculate_vwap_schedule(symbol, quantity)
+        return chunks
+
+    async def _calculate_vwap_schedule(
+        self, symbol: str, quantity: Decimal
+    ) -> Tuple[List[Decimal], Optional[List[float]]]:
+        """VWAP chunks with their due times in seconds from now.
+
+        Due times are only known for profile chunks; the static split
+        returns None for them.
         """
         try:
-            # For simplicity, just use a basic approximation with 3 chunks weighted toward middle of day
-            # In a real implementation, would use actual historical volume profiles
             chunks = []
             if quantity <= self.max_order_chunk_size:
-                return [quantity]
+                return [quantity], None
+
+            profile_schedule = self._calculate_profile_schedule(symbol, quantity)
+            if profile_schedule:
+                return profile_schedule
 
             # Simple approximation of volume profile: 25% opening, 50% midday, 25% closing
             opening_chunk = quantity * Decimal("0.25")
@@ -987,13 +993,51 @@ class TradeExecutionService:
             if total != quantity:
                 chunks[-1] += quantity - total
 
-            return chunks
+            return chunks, None
 
         except Exception as e:
             logger.error(
                 f"Error calculating VWAP chunks: {e}, falling back to even chunks"
             )
-            return self._calculate_even_chunks(quantity)
+            return self._calculate_even_chunks(quantity), None
+
+    def _calculate_profile_schedule(
+        self, symbol: str, quantity: Decimal, now: Optional[datetime] = None
+    ) -> Optional[Tuple[List[Decimal], List[float]]]:
+        """Chunks proportional to the stored volume profile, capped in size.
+
+        Each profile slice covers an equal part of the rest of the session;
+        its chunks are due spread evenly across that part.
+        """
+        num_chunks = int(
+            (quantity / self.max_order_chunk_size).to_integral_exact(
+                rounding="ROUND_UP"
+            )
+        )
+        now = now or datetime.utcnow()
+        weights = self.volume_profiles.session_weights(symbol, num_chunks, now=now)
+        if not weights:
+            return None
+
+        _, _, minutes, delay = remaining_session(now)
+        slice_seconds = minutes * 60 / len(weights)
+        chunks, offsets = [], []
+        for i, weight in enumerate(weights):
+            target = quantity * Decimal(str(weight))
+            if target <= 0:
+                continue
+            # Heavy slots (open/close) can exceed the chunk cap
+            pieces = self._calculate_even_chunks(target)
+            start = delay + i * slice_seconds
+            chunks.extend(pieces)
+            offsets.extend(
+                start + j * slice_seconds / len(pieces) for j in range(len(pieces))
+            )
+
+        total = sum(chunks)
+        if total != quantity:
+            chunks[-1] += quantity - total
+        return chunks, offsets
 
     def _calculate_iceberg_chunks(self, quantity: Decimal) -> List[Decimal]:
         """Calculate Iceberg order chunks.
@@ -39,6 +39,7 @@ from app.services.broker.factory import BrokerType, get_broker, get_resilient_br
 from app.services.education_service import EducationService
 from app.services.market_data import MarketDataService
 from app.services.notifications import NotificationService
+from app.services.portfolio_valuation import get_valuation_engine
 from app.services.risk_management import RiskManagementService
 
 logger = logging.getLogger(__name__)
@@ -320,6 +321,16 @@ class TradingService:
                 self.db.commit()
                 self.db.refresh(trade)
 
+                # Keep the live valuation in step without reloading holdings
+                get_valuation_engine().apply_fill(
+                    portfolio.id,
+                    trade.symbol,
+                    trade.trade_type,
+                    float(trade.filled_quantity or 0),
+                    float(trade.average_price or 0),
+                    float(trade.commission or 0),
+                )
+
                 # Return the updated trade info
                 return {
                     "id": trade.id,
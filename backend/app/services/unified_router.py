@@ -0,0 +1,429 @@
+"""
+Unified Router for Elson Financial AI
+
+Runs both routing layers from a single scan of the query text:
+
+1. QueryRouter - advisory mode, service tier, roles, compliance flag
+2. ModeRouter - task type, risk level, response mode, tool/retrieval needs
+
+Every keyword and regex of both routers is compiled into one
+MultiPatternMatcher, so a query is walked once instead of once per
+keyword and pattern. Scan results are kept in an LRU cache because the same
+prompts recur (suggested questions, retries, multi-turn follow-ups).
+"""
+
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.services.mode_router import (
+    TOOL_INDICATOR_PATTERNS,
+    ModeRouter,
+    RiskLevel,
+    RoutingDecision,
+    TaskType,
+    UserContext,
+    get_router,
+)
+from app.services.pattern_matcher import MultiPatternMatcher
+from app.services.query_router import (
+    AdvisoryMode,
+    QueryRouter,
+    RoutingResult,
+    ServiceTier,
+    UserProfile,
+    get_query_router,
+    phrase_hits,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4096
+
+TRAINING_PROMPTS_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "training_data"
+    / "consolidated_training_data.jsonl"
+)
+
+
+@dataclass
+class UnifiedRoutingResult:
+    """Combined output of both routing layers"""
+
+    routing: RoutingResult
+    decision: RoutingDecision
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "advisory_mode": self.routing.advisory_mode.value,
+            "advisory_confidence": self.routing.confidence,
+            "service_tier": self.routing.service_tier.value,
+            "required_roles": sorted(self.routing.required_roles),
+            "requires_compliance_check": self.routing.requires_compliance_check,
+            "response_mode": self.decision.mode.value,
+            "task_type": self.decision.task_type.value,
+            "task_confidence": self.decision.confidence,
+            "risk_level": self.decision.risk_level.value,
+            "requires_tool_call": self.decision.requires_tool_call,
+            "requires_retrieval": self.decision.requires_retrieval,
+        }
+
+
+class UnifiedRouter:
+    """
+    Single-pass router over QueryRouter and ModeRouter.
+
+    QueryRouter keywords are plain substrings of the lower-cased query and
+    ModeRouter patterns are lower-case regexes, so both are matched against
+    the lower-cased text in one scan.
+    """
+
+    def __init__(
+        self,
+        query_router: Optional[QueryRouter] = None,
+        mode_router: Optional[ModeRouter] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.query_router = query_router or get_query_router()
+        self.mode_router = mode_router or get_router()
+
+        keywords = self.query_router.keywords
+        mode_patterns = self.mode_router.matcher.patterns
+        self._keyword_count = len(keywords)
+        self.matcher = MultiPatternMatcher(
+            [re.escape(kw) for kw in keywords] + list(mode_patterns)
+        )
+        self._analyze_cached = lru_cache(maxsize=cache_size)(self._analyze)
+
+    def _analyze(
+        self, query: str
+    ) -> Tuple[Dict[str, bool], FrozenSet[Tuple[Any, int]]]:
+        """Scan once and split the hits between the two routers."""
+        query_lower = query.lower()
+        keywords = self.query_router.keywords
+        pattern_keys = self.mode_router.pattern_keys
+
+        keyword_spans: Dict[str, List[Tuple[int, int]]] = {}
+        pattern_hits = set()
+        for index, found in self.matcher.spans(query_lower).items():
+            if index < self._keyword_count:
+                keyword_spans[keywords[index]] = found
+            else:
+                pattern_hits.add(pattern_keys[index - self._keyword_count])
+
+        return phrase_hits(query_lower, keyword_spans), frozenset(pattern_hits)
+
+    def analyze(self, query: str) -> Tuple[Dict[str, bool], FrozenSet[Tuple[Any, int]]]:
+        """
+        Return cached keyword and pattern hits for a query.
+
+        The returned mapping is shared by every caller of the same query and
+        must not be modified.
+        """
+        return self._analyze_cached(query)
+
+    def route(
+        self,
+        query: str,
+        profile: Optional[UserProfile] = None,
+        user_context: Optional[UserContext] = None,
+    ) -> UnifiedRoutingResult:
+        """
+        Route a query through both layers from one scan.
+
+        Args:
+            query: User's query text
+            profile: Optional profile for service tier and roles
+            user_context: Optional context for response depth
+
+        Returns:
+            UnifiedRoutingResult with both routing decisions
+        """
+        keyword_hits, pattern_hits = self.analyze(query)
+        return UnifiedRoutingResult(
+            routing=self.query_router.route_query(query, profile, keyword_hits),
+            decision=self.mode_router.route(query, user_context, pattern_hits),
+        )
+
+    def cache_info(self):
+        return self._analyze_cached.cache_info()
+
+    def clear_cache(self):
+        self._analyze_cached.cache_clear()
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+
+def load_training_prompts(
+    path: Path = TRAINING_PROMPTS_PATH, limit: Optional[int] = None
+) -> List[str]:
+    """Load instruction prompts from the consolidated training data."""
+    prompts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            prompt = json.loads(line).get("instruction")
+            if prompt:
+                prompts.append(prompt)
+            if limit and len(prompts) >= limit:
+                break
+    return prompts
+
+
+class _ReferenceQueryRouter(QueryRouter):
+    """QueryRouter with the per-keyword substring checks it used before."""
+
+    def match_keywords(self, query: str) -> Dict[str, bool]:
+        return {}
+
+    def classify_advisory_mode(
+        self, query: str, hits: Optional[Dict[str, bool]] = None
+    ) -> Tuple[AdvisoryMode, float]:
+        query_lower = query.lower()
+        mode_scores = {}
+
+        for mode, keywords in self.MODE_KEYWORDS.items():
+            score = 0
+            matches = 0
+            for keyword in keywords:
+                if keyword in query_lower:
+                    matches += 1
+                    # Boost for exact phrase matches
+                    if f" {keyword} " in f" {query_lower} ":
+                        score += 2
+                    else:
+                        score += 1
+
+            if matches > 0:
+                mode_scores[mode] = score / len(keywords) * min(matches, 5)
+
+        if not mode_scores:
+            return AdvisoryMode.GENERAL, 0.3
+
+        best_mode = max(mode_scores, key=mode_scores.get)
+        best_score = mode_scores[best_mode]
+
+        # Normalize confidence to 0-1 range
+        confidence = min(best_score / 2.0, 1.0)
+
+        return best_mode, confidence
+
+    def identify_required_roles(
+        self,
+        mode: AdvisoryMode,
+        tier: ServiceTier,
+        query: str,
+        hits: Optional[Dict[str, bool]] = None,
+    ) -> List[str]:
+        # Base roles from tier
+        roles = list(self.TIER_ROLES.get(tier, []))
+
+        # Add mode-specific roles
+        query_lower = query.lower()
+
+        # Estate planning specific
+        if mode == AdvisoryMode.ESTATE_PLANNING:
+            if "trust" in query_lower:
+                if "Trust Administration Attorney" not in roles:
+                    roles.append("Trust Administration Attorney")
+            if "international" in query_lower or "foreign" in query_lower:
+                roles.append("International Tax Attorney")
+
+        # Succession planning specific
+        if mode == AdvisoryMode.SUCCESSION_PLANNING:
+            roles.append("Business Valuation Expert")
+            roles.append("M&A Attorney")
+
+        # Trust administration specific
+        if mode == AdvisoryMode.TRUST_ADMINISTRATION:
+            if tier in [ServiceTier.HNW_UHNW, ServiceTier.AFFLUENT]:
+                if "Trust Protector" not in roles:
+                    roles.append("Trust Protector")
+
+        # Family governance specific
+        if mode == AdvisoryMode.FAMILY_GOVERNANCE:
+            roles.append("Family Enterprise Advisor")
+
+        return list(set(roles))  # Remove duplicates
+
+    def requires_compliance_check(
+        self,
+        mode: AdvisoryMode,
+        query: str,
+        hits: Optional[Dict[str, bool]] = None,
+    ) -> bool:
+        # Always check compliance for these modes
+        compliance_modes = {
+            AdvisoryMode.TAX_OPTIMIZATION,
+            AdvisoryMode.TRUST_ADMINISTRATION,
+            AdvisoryMode.COMPLIANCE_OPERATIONS,
+            AdvisoryMode.ESTATE_PLANNING,
+            AdvisoryMode.SUCCESSION_PLANNING,
+        }
+
+        if mode in compliance_modes:
+            return True
+
+        query_lower = query.lower()
+        return any(kw in query_lower for kw in self.COMPLIANCE_KEYWORDS)
+
+
+class _ReferenceModeRouter(ModeRouter):
+    """ModeRouter with the per-pattern regex searches it used before."""
+
+    def match_patterns(self, prompt: str) -> FrozenSet[Tuple[Any, int]]:
+        return frozenset()
+
+    def classify_task(
+        self, prompt: str, hits: Optional[FrozenSet[Tuple[Any, int]]] = None
+    ) -> Tuple[TaskType, float]:
+        best_match = TaskType.GENERAL_QUESTION
+        best_score = 0.0
+
+        for task, patterns in self.task_compiled.items():
+            matches = sum(1 for p in patterns if p.search(prompt))
+            score = matches / len(patterns) if patterns else 0
+            if score > best_score:
+                best_score = score
+                best_match = task
+
+        # Minimum confidence threshold
+        if best_score < 0.1:
+            return TaskType.GENERAL_QUESTION, 0.5
+
+        return best_match, min(best_score * 2, 1.0)  # Scale confidence
+
+    def assess_risk(
+        self,
+        prompt: str,
+        task_type: TaskType,
+        hits: Optional[FrozenSet[Tuple[Any, int]]] = None,
+    ) -> RiskLevel:
+        # Check for high risk patterns
+        high_matches = sum(1 for p in self.high_risk_compiled if p.search(prompt))
+        if high_matches >= 2:
+            return RiskLevel.CRITICAL
+        if high_matches >= 1:
+            return RiskLevel.HIGH
+
+        # Check for medium risk patterns
+        medium_matches = sum(1 for p in self.medium_risk_compiled if p.search(prompt))
+        if medium_matches >= 2:
+            return RiskLevel.HIGH
+        if medium_matches >= 1:
+            return RiskLevel.MEDIUM
+
+        # Task-based risk defaults
+        high_risk_tasks = {
+            TaskType.TAX_OPTIMIZATION,
+            TaskType.ESTATE_PLANNING,
+            TaskType.COMPLIANCE_CHECK,
+            TaskType.TRADE_ANALYSIS,
+        }
+        medium_risk_tasks = {
+            TaskType.PORTFOLIO_CONSTRUCTION,
+            TaskType.RISK_ANALYSIS,
+            TaskType.SCENARIO_MODELING,
+            TaskType.RETIREMENT_BASIC,
+        }
+
+        if task_type in high_risk_tasks:
+            return RiskLevel.HIGH
+        if task_type in medium_risk_tasks:
+            return RiskLevel.MEDIUM
+
+        return RiskLevel.LOW
+
+    def requires_tool_call(
+        self,
+        task_type: TaskType,
+        prompt: str,
+        hits: Optional[FrozenSet[Tuple[Any, int]]] = None,
+    ) -> bool:
+        # Market data always requires tools
+        if task_type == TaskType.MARKET_DATA:
+            return True
+
+        for pattern in TOOL_INDICATOR_PATTERNS:
+            if re.search(pattern, prompt, re.IGNORECASE):
+                return True
+
+        return False
+
+
+def benchmark_routing(
+    prompts: Optional[List[str]] = None, repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Compare one-pass routing against per-pattern scanning.
+
+    The reference routers keep the keyword and regex checks the routers ran
+    before they shared a scan, so both timings and decisions are measured
+    against the original behaviour.
+
+    Args:
+        prompts: Queries to route (defaults to the training prompts)
+        repeat: Passes over the prompt set for the cached timing
+
+    Returns:
+        Timings in milliseconds and the number of differing decisions
+    """
+    prompts = prompts if prompts is not None else load_training_prompts()
+    router = UnifiedRouter(QueryRouter(), ModeRouter())
+
+    query_reference, mode_reference = _ReferenceQueryRouter(), _ReferenceModeRouter()
+
+    start = time.perf_counter()
+    reference = [
+        UnifiedRoutingResult(
+            routing=query_reference.route_query(query),
+            decision=mode_reference.route(query),
+        ).to_dict()
+        for query in prompts
+    ]
+    reference_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    unified = [router.route(query).to_dict() for query in prompts]
+    unified_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in prompts:
+            router.route(query)
+    cached_ms = (time.perf_counter() - start) * 1000 / max(repeat, 1)
+
+    mismatches = sum(1 for a, b in zip(reference, unified) if a != b)
+    results = {
+        "prompts": len(prompts),
+        "mismatches": mismatches,
+        "reference_ms": reference_ms,
+        "unified_ms": unified_ms,
+        "cached_ms": cached_ms,
+        "speedup": reference_ms / unified_ms if unified_ms else 0.0,
+    }
+    logger.info("Routing benchmark: %s", results)
+    return results
+
+
+# Global router instance
+_unified_router: Optional[UnifiedRouter] = None
+
+
+def get_unified_router() -> UnifiedRouter:
+    """Get or create the global unified router"""
+    global _unified_router
+    if _unified_router is None:
+        _unified_router = UnifiedRouter()
+    return _unified_router
@@ -0,0 +1,610 @@
+"""
+Precomputed intraday volume profiles for VWAP execution.
+
+A nightly build reads intraday bars from the local bar warehouse and turns
+them into one volume curve per symbol and weekday: the average fraction of
+the day's volume traded in each 5-minute slot of the regular session
+(09:30-16:00 New York time). The curves therefore carry the usual opening
+and closing volume peaks. Each day is normalized before averaging, so a
+single heavy day does not dominate. Weekday curves are shrunk toward the
+symbol's all-day curve because each weekday sees only a fifth of the
+history. Half-day sessions (13:00 close) get their own curve. It is
+observed from past half-days when there are any, and otherwise derived
+from the regular curve with the closing peak moved to 13:00.
+
+All curves live in one small ``.npz`` file, loaded once per process.
+Looking up a profile is a dict access plus an array row. Execution
+strategies no longer fetch history when a parent order starts.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.bar_warehouse import TIMEFRAME_NS, BarWarehouse, get_bar_warehouse
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "America/New_York"
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+SESSION_MINUTES = 390
+HALF_DAY_MINUTES = 210  # 09:30-13:00
+SLOT_MINUTES = 5
+NUM_SLOTS = SESSION_MINUTES // SLOT_MINUTES
+HALF_DAY_SLOTS = HALF_DAY_MINUTES // SLOT_MINUTES
+CLOSE_SLOTS = 6  # the last 30 minutes carry the closing peak
+
+# Profile rows: Monday..Friday, then half-days
+HALF_DAY_ROW = 5
+NUM_ROWS = 6
+
+# Series tried in order; finer bars give sharper curves
+SOURCE_TIMEFRAMES = ("1min", "5min", "15min", "30min", "60min")
+
+# Symbol key of the cross-symbol average, served for unknown symbols
+MARKET_KEY = "__MARKET__"
+
+_DAY_NS = 24 * 60 * 60 * 1_000_000_000
+_MINUTE_NS = 60 * 1_000_000_000
+
+
+def is_half_day(day: date) -> bool:
+    """
+    Whether NYSE closes at 13:00 on ``day``.
+
+    Covers the recurring early closes: the day after Thanksgiving, and
+    July 3 and December 24 when they fall on Monday to Thursday.
+    """
+    if day.weekday() > 3 and not (day.month == 11 and day.weekday() == 4):
+        return False
+    if day.month == 7 and day.day == 3:
+        return True
+    if day.month == 12 and day.day == 24:
+        return True
+    if day.month == 11 and day.weekday() == 4:
+        # Fourth Thursday of November plus one day
+        return 23 <= day.day <= 29
+    return False
+
+
+def session_minute(moment: datetime) -> Tuple[date, float]:
+    """
+    New York trading date and minutes since the 09:30 open for a moment.
+
+    Naive datetimes are taken as UTC, as elsewhere in the platform.
+    """
+    stamp = pd.Timestamp(moment)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    local = stamp.tz_convert(MARKET_TZ)
+    minute = local.hour * 60 + local.minute + local.second / 60
+    return local.date(), minute - SESSION_OPEN_MINUTE
+
+
+def remaining_session(moment: datetime) -> Tuple[date, float, float, float]:
+    """
+    The part of a session still ahead of a moment.
+
+    Before the open this is the whole session; after the close it is the
+    next weekday's session.
+
+    Returns:
+        (trading date, start in minutes since the open, length in minutes,
+        seconds from ``moment`` until the start)
+    """
+    day, minute = session_minute(moment)
+    close = HALF_DAY_MINUTES if is_half_day(day) else SESSION_MINUTES
+    if minute >= close:
+        day += timedelta(days=1)
+        while day.weekday() > 4:
+            day += timedelta(days=1)
+        minute = 0.0
+        close = HALF_DAY_MINUTES if is_half_day(day) else SESSION_MINUTES
+    minute = max(minute, 0.0)
+
+    stamp = pd.Timestamp(moment)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    start = pd.Timestamp(day).tz_localize(MARKET_TZ) + pd.Timedelta(
+        minutes=SESSION_OPEN_MINUTE + minute
+    )
+    delay = max((start - stamp).total_seconds(), 0.0)
+    return day, minute, close - minute, delay
+
+
+def daily_slot_volumes(
+    ts: np.ndarray, volume: np.ndarray, bar_minutes: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Volume per session slot for every day in a bar series.
+
+    Bars longer than a slot have their volume spread evenly over the slots
+    they cover. Bars outside the regular session are ignored.
+
+    Args:
+        ts: Bar open times, epoch nanoseconds (UTC)
+        volume: Bar volumes
+        bar_minutes: Bar length in minutes
+
+    Returns:
+        (day numbers in New York time, (days, NUM_SLOTS) volumes, minutes
+        from the open to the end of each day's last bar)
+    """
+    local = (
+        pd.DatetimeIndex(ts.astype("datetime64[ns]"))
+        .tz_localize("UTC")
+        .tz_convert(MARKET_TZ)
+        .tz_localize(None)
+        .asi8
+    )
+    day = local // _DAY_NS
+    minute = (local % _DAY_NS) // _MINUTE_NS - SESSION_OPEN_MINUTE
+
+    in_session = (minute >= 0) & (minute < SESSION_MINUTES)
+    day, minute = day[in_session], minute[in_session]
+    volume = np.nan_to_num(np.asarray(volume, dtype=float)[in_session])
+
+    days, day_index = np.unique(day, return_inverse=True)
+    slots = np.zeros((len(days), NUM_SLOTS))
+    first = minute // SLOT_MINUTES
+    # A bar running past the close spreads over the slots left in the session
+    span = np.minimum(max(bar_minutes // SLOT_MINUTES, 1), NUM_SLOTS - first)
+    for k in range(int(span.max(initial=0))):
+        inside = k < span
+        np.add.at(
+            slots,
+            (day_index[inside], first[inside] + k),
+            volume[inside] / span[inside],
+        )
+
+    session_end = np.zeros(len(days))
+    np.maximum.at(session_end, day_index, minute + bar_minutes)
+    return days, slots, session_end
+
+
+def synthetic_half_day(curve: np.ndarray) -> np.ndarray:
+    """Half-day curve from a regular one: the closing peak moves to 13:00"""
+    half = np.zeros(NUM_SLOTS)
+    half[: HALF_DAY_SLOTS - CLOSE_SLOTS] = curve[: HALF_DAY_SLOTS - CLOSE_SLOTS]
+    half[HALF_DAY_SLOTS - CLOSE_SLOTS : HALF_DAY_SLOTS] = curve[-CLOSE_SLOTS:]
+    return half / half.sum()
+
+
+def build_profile(
+    days: np.ndarray,
+    slots: np.ndarray,
+    session_end: np.ndarray,
+    shrinkage: float = 5.0,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Weekday and half-day curves from per-day slot volumes.
+
+    Args:
+        days: Day numbers (days since 1970-01-01)
+        slots: (days, NUM_SLOTS) volumes
+        session_end: Minutes from the open to each day's last bar close
+        shrinkage: Pseudo-days of the all-day curve mixed into each weekday
+
+    Returns:
+        ((NUM_ROWS, NUM_SLOTS) curves summing to one per row, samples per
+        row), or None if there is no complete regular session
+    """
+    totals = slots.sum(axis=1)
+    # Regular sessions run to the close; half-days stop around 13:00
+    full = (session_end >= SESSION_MINUTES - 15) & (totals > 0)
+    half = (
+        (session_end > HALF_DAY_MINUTES - 30)
+        & (session_end <= HALF_DAY_MINUTES + 15)
+        & (totals > 0)
+    )
+    if not full.any():
+        return None
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fractions = slots / totals[:, None]
+    weekday = (days + 3) % 7  # 1970-01-01 was a Thursday
+
+    overall = fractions[full].mean(axis=0)
+    profiles = np.zeros((NUM_ROWS, NUM_SLOTS))
+    samples = np.zeros(NUM_ROWS, dtype=np.int32)
+    for row in range(5):
+        chosen = full & (weekday == row)
+        count = int(chosen.sum())
+        total = fractions[chosen].sum(axis=0) if count else 0.0
+        profiles[row] = (total + shrinkage * overall) / (count + shrinkage)
+        samples[row] = count
+
+    samples[HALF_DAY_ROW] = int(half.sum())
+    if samples[HALF_DAY_ROW]:
+        profiles[HALF_DAY_ROW] = fractions[half].mean(axis=0)
+    else:
+        profiles[HALF_DAY_ROW] = synthetic_half_day(overall)
+
+    profiles /= profiles.sum(axis=1, keepdims=True)
+    return profiles, samples
+
+
+class VolumeProfileStore:
+    """
+    Per-symbol intraday volume curves, loaded once and read in O(1).
+
+    The file holds ``symbols`` (str), ``profiles`` (symbols x NUM_ROWS x
+    NUM_SLOTS, float32), ``samples`` (symbols x NUM_ROWS) and ``built_at``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index: Dict[str, int] = {}
+        self._profiles = np.zeros((0, NUM_ROWS, NUM_SLOTS), dtype=np.float32)
+        self._samples = np.zeros((0, NUM_ROWS), dtype=np.int32)
+        self.built_at: Optional[datetime] = None
+        self._loaded_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol: str) -> bool:
+        self._ensure_loaded()
+        return symbol.upper() in self._index
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._index)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load()
+
+    def load(self) -> bool:
+        """(Re)load the profile file; returns False if it does not exist."""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with np.load(self.path, allow_pickle=False) as data:
+                    symbols = [str(s) for s in data["symbols"]]
+                    profiles = data["profiles"]
+                    samples = data["samples"]
+                    built_at = float(data["built_at"])
+            except FileNotFoundError:
+                return False
+            self._index = {symbol: i for i, symbol in enumerate(symbols)}
+            self._profiles = profiles
+            self._samples = samples
+            self.built_at = datetime.utcfromtimestamp(built_at)
+            self._loaded_mtime = mtime
+        logger.info(f"Loaded volume profiles for {len(symbols)} symbols")
+        return True
+
+    def save(
+        self,
+        symbols: List[str],
+        profiles: np.ndarray,
+        samples: np.ndarray,
+    ) -> None:
+        """Write profiles atomically and make them current."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(
+                    fh,
+                    symbols=np.array(symbols, dtype=str),
+                    profiles=np.asarray(profiles, dtype=np.float32),
+                    samples=np.asarray(samples, dtype=np.int32),
+                    built_at=np.float64(time.time()),
+                )
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self.load()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_profile(
+        self, symbol: str, day: Optional[date] = None, half_day: Optional[bool] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Slot fractions of a session's volume for a symbol.
+
+        Args:
+            symbol: Ticker symbol; unknown symbols get the market curve
+            day: Trading date, picks the weekday curve (default today)
+            half_day: Force the half-day curve on or off (default: by date)
+
+        Returns:
+            Array of NUM_SLOTS fractions summing to one, or None if no
+            profiles have been built
+        """
+        self._ensure_loaded()
+        row = self._index.get(symbol.upper(), self._index.get(MARKET_KEY))
+        if row is None:
+            return None
+        day = day or datetime.utcnow().date()
+        if half_day is None:
+            half_day = is_half_day(day)
+        column = HALF_DAY_ROW if half_day else min(day.weekday(), 4)
+        return self._profiles[row, column]
+
+    def window_weights(
+        self,
+        symbol: str,
+        start: datetime,
+        minutes: float,
+        num_slices: int,
+    ) -> Optional[List[float]]:
+        """
+        Expected share of volume in each slice of an execution window.
+
+        The window is cut into ``num_slices`` equal slices from ``start``.
+        Each slice's weight is the profile volume it covers; slots are
+        treated as trading evenly within their five minutes.
+
+        Args:
+            symbol: Ticker symbol
+            start: Window start (naive datetimes are UTC)
+            minutes: Window length
+            num_slices: Number of slices
+
+        Returns:
+            Weights summing to one, or None if there is no profile or the
+            window does not overlap the session
+        """
+        day, start_minute = session_minute(start)
+        return self._weights(
+            self.get_profile(symbol, day), start_minute, minutes, num_slices
+        )
+
+    def session_weights(
+        self, symbol: str, num_slices: int, now: Optional[datetime] = None
+    ) -> Optional[List[float]]:
+        """
+        Weights for working an order over the rest of the session.
+
+        Before the open this covers the whole session; after the close it
+        covers the next weekday's session.
+
+        Args:
+            symbol: Ticker symbol
+            num_slices: Number of slices
+            now: Current time (default: now)
+
+        Returns:
+            Weights summing to one, or None if there is no profile
+        """
+        day, minute, minutes, _ = remaining_session(now or datetime.utcnow())
+        return self._weights(self.get_profile(symbol, day), minute, minutes, num_slices)
+
+    @staticmethod
+    def _weights(
+        profile: Optional[np.ndarray],
+        start_minute: float,
+        minutes: float,
+        num_slices: int,
+    ) -> Optional[List[float]]:
+        if profile is None or num_slices <= 0:
+            return None
+        cumulative = np.concatenate(([0.0], np.cumsum(profile, dtype=float)))
+        grid = np.arange(NUM_SLOTS + 1) * SLOT_MINUTES
+        edges = start_minute + np.linspace(0.0, minutes, num_slices + 1)
+        weights = np.diff(np.interp(edges, grid, cumulative))
+        total = weights.sum()
+        if total <= 0:
+            return None
+        return (weights / total).tolist()
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+
+    def build(
+        self,
+        warehouse: BarWarehouse,
+        symbols: Optional[Iterable[str]] = None,
+        lookback_days: int = 60,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """
+        Rebuild every profile from the bar warehouse.
+
+        Today's (possibly unfinished) session is excluded.
+
+        Args:
+            warehouse: Source of intraday bars
+            symbols: Symbols to build (default: every intraday symbol stored)
+            lookback_days: Calendar days of history per symbol
+            now: Build time (default: now)
+
+        Returns:
+            {"symbols": built, "skipped": without a complete session}
+        """
+        now = now or datetime.utcnow()
+        today, _ = session_minute(now)
+        today_number = (today - date(1970, 1, 1)).days
+        start = now - timedelta(days=lookback_days)
+
+        if symbols is None:
+            symbols = sorted(
+                {s for tf in SOURCE_TIMEFRAMES for s in warehouse.symbols(tf)}
+            )
+
+        built, curves, counts = [], [], []
+        skipped = 0
+        for symbol in symbols:
+            result = None
+            for timeframe in SOURCE_TIMEFRAMES:
+                records = warehouse.read(symbol, timeframe, start=start)
+                if len(records) == 0:
+                    continue
+                days, slots, session_end = daily_slot_volumes(
+                    records["ts"],
+                    records["volume"],
+                    TIMEFRAME_NS[timeframe] // _MINUTE_NS,
+                )
+                past = days < today_number
+                result = build_profile(days[past], slots[past], session_end[past])
+                break
+            if result is None:
+                skipped += 1
+                continue
+            built.append(symbol.upper())
+            curves.append(result[0])
+            counts.append(result[1])
+
+        if not built:
+            logger.warning("No intraday history to build volume profiles from")
+            return {"symbols": 0, "skipped": skipped}
+
+        curves = np.stack(curves)
+        counts = np.stack(counts)
+        market = curves.mean(axis=0)
+        market /= market.sum(axis=1, keepdims=True)
+        self.save(
+            built + [MARKET_KEY],
+            np.concatenate([curves, market[None]]),
+            np.concatenate([counts, counts.sum(axis=0)[None]]),
+        )
+        logger.info(
+            f"Built volume profiles for {len(built)} symbols ({skipped} skipped)"
+        )
+        return {"symbols": len(built), "skipped": skipped}
+
+
+class VolumeProfileJob:
+    """
+    Nightly bar warehouse maintenance on the running event loop.
+
+    Each run first compacts the warehouse (minute bars into hourly and
+    daily series, pruning minute history older than ``minute_retain_days``)
+    and then rebuilds the profile store. Both read memory-mapped files and
+    run in a worker thread so the loop keeps serving requests.
+    """
+
+    def __init__(
+        self,
+        store: VolumeProfileStore,
+        warehouse: BarWarehouse,
+        build_hour_utc: int = 6,
+        lookback_days: int = 60,
+        minute_retain_days: Optional[int] = 90,
+    ):
+        self.store = store
+        self.warehouse = warehouse
+        self.build_hour_utc = build_hour_utc
+        self.lookback_days = lookback_days
+        # Never prune minute bars the profile build still reads
+        self.minute_retain_days = (
+            None
+            if minute_retain_days is None
+            else max(minute_retain_days, lookback_days)
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def seconds_until_next_build(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.utcnow()
+        target = now.replace(
+            hour=self.build_hour_utc, minute=0, second=0, microsecond=0
+        )
+        if target <= now:
+            target += timedelta(days=1)
+        return (target - now).total_seconds()
+
+    async def compact(self) -> Dict[str, int]:
+        retain_days = (
+            {"1min": self.minute_retain_days}
+            if self.minute_retain_days is not None
+            else None
+        )
+        return await asyncio.to_thread(
+            self.warehouse.compact_all, retain_days=retain_days
+        )
+
+    async def run_once(self) -> Dict[str, int]:
+        try:
+            await self.compact()
+        except Exception as e:
+            logger.error(f"Error compacting bar warehouse: {str(e)}")
+        return await asyncio.to_thread(
+            self.store.build, self.warehouse, lookback_days=self.lookback_days
+        )
+
+    async def _run(self) -> None:
+        # Build at startup when there is nothing to serve yet
+        if not os.path.exists(self.store.path):
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error building volume profiles: {str(e)}")
+        while True:
+            try:
+                await asyncio.sleep(self.seconds_until_next_build())
+                await self.run_once()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error building volume profiles: {str(e)}")
+
+    def start(self) -> None:
+        """Schedule nightly builds on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Volume profile job started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Volume profile job stopped")
+
+
+# Global instances
+_volume_profile_store_instance = None
+_volume_profile_job_instance = None
+
+
+def get_volume_profile_store() -> VolumeProfileStore:
+    """Get the global volume profile store instance."""
+    global _volume_profile_store_instance
+    if _volume_profile_store_instance is None:
+        _volume_profile_store_instance = VolumeProfileStore(
+            getattr(settings, "VOLUME_PROFILE_PATH", "./data/volume_profiles.npz")
+        )
+    return _volume_profile_store_instance
+
+
+def get_volume_profile_job() -> VolumeProfileJob:
+    """Get the global nightly volume profile job."""
+    global _volume_profile_job_instance
+    if _volume_profile_job_instance is None:
+        _volume_profile_job_instance = VolumeProfileJob(
+            get_volume_profile_store(),
+            get_bar_warehouse(),
+            build_hour_utc=getattr(settings, "VOLUME_PROFILE_BUILD_HOUR_UTC", 6),
+            lookback_days=getattr(settings, "VOLUME_PROFILE_LOOKBACK_DAYS", 60),
+            minute_retain_days=getattr(
+                settings, "BAR_WAREHOUSE_MINUTE_RETAIN_DAYS", 90
+            ),
+        )
+    return _volume_profile_job_instance
@@ -5,11 +5,14 @@ Comprehensive backtesting system for evaluating trading strategies
 against historical data with realistic simulation of market conditions.
 """
 
+from .bar_store import BarStore
+from .batch_performance import MetricsTable, analyze_batch
 from .data_handler import DataHandler
 from .engine import BacktestConfig, BacktestEngine, BacktestResult
+from .event_backtest import EventBacktester, EventBacktestResult, EventStream
 from .order import Order, OrderStatus, OrderType
 from .performance import PerformanceAnalyzer, PerformanceMetrics
-from .portfolio import Portfolio
+from .portfolio import ArrayPortfolio, Portfolio
 
 __all__ = [
     "BacktestEngine",
@@ -17,8 +20,15 @@ __all__ = [
     "BacktestResult",
     "PerformanceAnalyzer",
     "PerformanceMetrics",
+    "MetricsTable",
+    "analyze_batch",
     "DataHandler",
     "Portfolio",
+    "ArrayPortfolio",
+    "BarStore",
+    "EventBacktester",
+    "EventBacktestResult",
+    "EventStream",
     "Order",
     "OrderType",
     "OrderStatus",
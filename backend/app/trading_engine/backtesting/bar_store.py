@@ -0,0 +1,135 @@
+"""
+Bar Store for Backtesting
+
+Stores each symbol's OHLCV history as a structured NumPy array on disk so
+large universes can be read through memory maps instead of being held in
+DataFrames. A JSON manifest maps symbols to files.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BAR_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),  # nanoseconds since the epoch
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+
+
+def frame_to_bars(df: pd.DataFrame) -> np.ndarray:
+    """
+    Convert an OHLCV DataFrame to a time-sorted structured bar array.
+
+    Args:
+        df: DataFrame with timestamp/open/high/low/close/volume columns
+
+    Returns:
+        Array with BAR_DTYPE
+    """
+    timestamps = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ns]")
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["timestamp"] = timestamps.astype(np.int64)
+    for column in ("open", "high", "low", "close", "volume"):
+        bars[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(float)
+    return bars[np.argsort(bars["timestamp"], kind="stable")]
+
+
+class BarStore:
+    """
+    Directory of per-symbol bar arrays, memory-mapped on read.
+    """
+
+    MANIFEST = "symbols.json"
+
+    def __init__(self, directory: str):
+        """
+        Open or create a store.
+
+        Args:
+            directory: Directory holding the manifest and bar files
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._files: Dict[str, str] = {}
+        manifest = os.path.join(directory, self.MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest, "r") as f:
+                self._files = json.load(f)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._files)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._files
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def write(
+        self,
+        symbol: str,
+        data: Union[pd.DataFrame, np.ndarray],
+        save_manifest: bool = True,
+    ) -> None:
+        """
+        Write (or replace) one symbol's bars.
+
+        Args:
+            symbol: Symbol identifier
+            data: OHLCV DataFrame or an array with BAR_DTYPE
+            save_manifest: Persist the manifest now (disable for bulk writes)
+        """
+        bars = data if isinstance(data, np.ndarray) else frame_to_bars(data)
+        # File names are positional so any symbol string is safe on disk
+        filename = self._files.get(symbol, f"{len(self._files):06d}.npy")
+        np.save(os.path.join(self.directory, filename), bars.astype(BAR_DTYPE))
+        self._files[symbol] = filename
+        if save_manifest:
+            self._save_manifest()
+
+    def write_frames(self, frames: Mapping[str, pd.DataFrame]) -> None:
+        """Write many symbols and save the manifest once"""
+        for symbol, df in frames.items():
+            self.write(symbol, df, save_manifest=False)
+        self._save_manifest()
+        logger.info(f"Wrote {len(frames)} symbols to bar store {self.directory}")
+
+    def load(self, symbol: str, mmap: bool = True) -> np.ndarray:
+        """
+        Read one symbol's bars.
+
+        Args:
+            symbol: Symbol identifier
+            mmap: Memory-map the file instead of reading it into memory
+
+        Returns:
+            Structured array with BAR_DTYPE
+        """
+        path = os.path.join(self.directory, self._files[symbol])
+        return np.load(path, mmap_mode="r" if mmap else None)
+
+    def load_all(
+        self, symbols: Optional[List[str]] = None, mmap: bool = True
+    ) -> List[np.ndarray]:
+        """Read several symbols in the given order"""
+        return [self.load(symbol, mmap) for symbol in (symbols or self.symbols)]
+
+    def _save_manifest(self) -> None:
+        path = os.path.join(self.directory, self.MANIFEST)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._files, f)
+        os.replace(tmp_path, path)
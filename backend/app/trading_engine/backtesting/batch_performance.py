@@ -0,0 +1,526 @@
+"""
+Batched Performance Analysis
+
+Array-native counterpart of ``PerformanceAnalyzer.analyze`` for parameter
+sweeps. Equity curves are stacked into a ``(runs, bars)`` matrix and closed
+trade P&L is passed as flat arrays, so metrics for thousands of runs are
+computed with a handful of NumPy reductions instead of one DataFrame per run.
+
+Results come back as a ``MetricsTable``: one NumPy column per metric that can
+be sorted, filtered and ranked without building ``PerformanceMetrics``
+objects until a single row is needed.
+"""
+
+import logging
+from dataclasses import fields
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .performance import PerformanceMetrics
+
+logger = logging.getLogger(__name__)
+
+# Numeric PerformanceMetrics fields, in declaration order
+METRIC_COLUMNS: Tuple[str, ...] = tuple(
+    f.name
+    for f in fields(PerformanceMetrics)
+    if f.name not in ("start_date", "end_date")
+)
+INT_COLUMNS = frozenset(
+    {
+        "max_drawdown_duration",
+        "total_trades",
+        "winning_trades",
+        "losing_trades",
+        "trading_days",
+    }
+)
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+# ============================================================================
+# Columnar results
+# ============================================================================
+
+
+class MetricsTable:
+    """
+    Columnar table of performance metrics, one row per run.
+
+    Columns are NumPy arrays keyed by ``PerformanceMetrics`` field name.
+    The first and last timestamp of each run are kept alongside them as
+    ``datetime64`` arrays (NaT when unknown). Sorting and filtering reindex
+    every column with one index array, so no per-row Python objects are
+    created.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        labels: Optional[Sequence[Any]] = None,
+        start_dates: Optional[Any] = None,
+        end_dates: Optional[Any] = None,
+    ):
+        """
+        Initialize table.
+
+        Args:
+            columns: Metric name -> 1-D array, all of equal length
+            labels: Run identifiers (defaults to the run index)
+            start_dates: First timestamp of each run
+            end_dates: Last timestamp of each run
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All metric columns must have the same length")
+        size = lengths.pop() if lengths else 0
+
+        self.columns = columns
+        self.labels = (
+            np.arange(size) if labels is None else np.asarray(labels, dtype=object)
+        )
+        if len(self.labels) != size:
+            raise ValueError("labels must have one entry per run")
+        self.start_dates = _dates(start_dates, size)
+        self.end_dates = _dates(end_dates, size)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def take(self, indices: np.ndarray) -> "MetricsTable":
+        """Return the rows at ``indices`` (an integer or boolean array)"""
+        return MetricsTable(
+            {name: values[indices] for name, values in self.columns.items()},
+            self.labels[indices],
+            self.start_dates[indices],
+            self.end_dates[indices],
+        )
+
+    def filter(self, mask: np.ndarray) -> "MetricsTable":
+        """Return the rows where ``mask`` is true"""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def sort(self, by: str, descending: bool = True) -> "MetricsTable":
+        """
+        Sort rows by a metric column.
+
+        NaN values are placed last in either direction and ties keep
+        their original order.
+        """
+        values = self.columns[by].astype(float)
+        order = np.argsort(-values if descending else values, kind="stable")
+        return self.take(order)
+
+    def top(self, n: int, by: str = "sharpe_ratio") -> "MetricsTable":
+        """Return the ``n`` best rows by a metric column"""
+        return self.sort(by, descending=True).take(np.arange(min(n, len(self))))
+
+    def row(self, index: int) -> PerformanceMetrics:
+        """Materialize one row as a PerformanceMetrics object"""
+        values = {}
+        for name, column in self.columns.items():
+            value = column[index].item()
+            values[name] = int(value) if name in INT_COLUMNS else value
+        for name, dates in (
+            ("start_date", self.start_dates),
+            ("end_date", self.end_dates),
+        ):
+            if not np.isnat(dates[index]):
+                values[name] = pd.Timestamp(dates[index])
+        return PerformanceMetrics(**values)
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Convert to a DataFrame indexed by run label"""
+        names = list(columns) if columns is not None else list(self.columns)
+        return pd.DataFrame(
+            {name: self.columns[name] for name in names},
+            index=pd.Index(self.labels, name="run"),
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["MetricsTable"]) -> "MetricsTable":
+        """Stack tables with the same columns"""
+        if not tables:
+            return cls({name: np.empty(0) for name in METRIC_COLUMNS}, [])
+        return cls(
+            {
+                name: np.concatenate([table.columns[name] for table in tables])
+                for name in tables[0].columns
+            },
+            np.concatenate([table.labels for table in tables]),
+            np.concatenate([table.start_dates for table in tables]),
+            np.concatenate([table.end_dates for table in tables]),
+        )
+
+    @classmethod
+    def from_metrics(cls, results: Dict[Any, PerformanceMetrics]) -> "MetricsTable":
+        """Build a table from already computed PerformanceMetrics"""
+        rows = list(results.values())
+        return cls(
+            {
+                name: np.array(
+                    [getattr(m, name) for m in rows],
+                    dtype=np.int64 if name in INT_COLUMNS else float,
+                )
+                for name in METRIC_COLUMNS
+            },
+            list(results.keys()),
+            [m.start_date for m in rows],
+            [m.end_date for m in rows],
+        )
+
+
+def _dates(values: Optional[Any], size: int) -> np.ndarray:
+    """Timestamps as a ``datetime64[ns]`` array, all NaT if not given"""
+    if values is None:
+        return np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+    dates = np.atleast_1d(np.asarray(pd.to_datetime(values), dtype="datetime64[ns]"))
+    if len(dates) != size:
+        raise ValueError("dates must have one entry per run")
+    return dates
+
+
+# ============================================================================
+# Array kernels
+# ============================================================================
+
+
+def longest_run(mask: np.ndarray) -> np.ndarray:
+    """
+    Length of the longest run of True values along the last axis.
+
+    Args:
+        mask: Boolean array of shape ``(bars,)`` or ``(runs, bars)``
+
+    Returns:
+        Integer array with the time axis reduced
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape[-1] == 0:
+        return np.zeros(mask.shape[:-1], dtype=np.int64)
+    index = np.arange(mask.shape[-1])
+    # Position of the most recent False at or before each bar
+    last_break = np.maximum.accumulate(np.where(mask, -1, index), axis=-1)
+    return np.where(mask, index - last_break, 0).max(axis=-1)
+
+
+def years_between(start: Any, end: Any) -> np.ndarray:
+    """Whole calendar days between timestamps, in years of 365.25 days"""
+    start = np.asarray(pd.to_datetime(start), dtype="datetime64[ns]")
+    end = np.asarray(pd.to_datetime(end), dtype="datetime64[ns]")
+    days = (end - start) // np.timedelta64(1, "D")
+    return days / 365.25
+
+
+def closed_trade_pnls(trades: Iterable[Dict[str, Any]]) -> np.ndarray:
+    """
+    Realized P&L per closed trade, selected as ``PerformanceAnalyzer`` does.
+
+    Sell fills are the closing trades; if there are none, every trade's
+    ``realized_pnl`` is used.
+    """
+    trades = list(trades)
+    pnls = [t.get("realized_pnl", 0) for t in trades if t.get("side") == "sell"]
+    if not pnls:
+        pnls = [t.get("realized_pnl", 0) for t in trades]
+    return np.asarray(pnls, dtype=float)
+
+
+def _per_run(value: Optional[ArrayLike], runs: int, default: float) -> np.ndarray:
+    if value is None:
+        return np.full(runs, default, dtype=float)
+    return np.broadcast_to(np.asarray(value, dtype=float), (runs,))
+
+
+def _trade_stats(
+    pnls: np.ndarray, run_ids: np.ndarray, runs: int
+) -> Dict[str, np.ndarray]:
+    """Grouped trade statistics via bincount and ufunc.at"""
+    wins = pnls > 0
+    losses = pnls < 0
+
+    total = np.bincount(run_ids, minlength=runs)
+    win_count = np.bincount(run_ids[wins], minlength=runs)
+    loss_count = np.bincount(run_ids[losses], minlength=runs)
+    gross_profit = np.bincount(run_ids[wins], weights=pnls[wins], minlength=runs)
+    loss_sum = np.bincount(run_ids[losses], weights=pnls[losses], minlength=runs)
+    pnl_sum = np.bincount(run_ids, weights=pnls, minlength=runs)
+
+    largest_win = np.zeros(runs)
+    np.maximum.at(largest_win, run_ids[wins], pnls[wins])
+    largest_loss = np.zeros(runs)
+    np.minimum.at(largest_loss, run_ids[losses], pnls[losses])
+
+    gross_loss = np.abs(loss_sum)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(total > 0, win_count / total, 0.0)
+        avg_win = np.where(win_count > 0, gross_profit / win_count, 0.0)
+        avg_loss = np.where(loss_count > 0, loss_sum / loss_count, 0.0)
+        avg_trade = np.where(total > 0, pnl_sum / total, 0.0)
+        profit_factor = np.where(
+            gross_loss > 0,
+            gross_profit / gross_loss,
+            np.where(gross_profit > 0, np.inf, 0.0),
+        )
+
+    return {
+        "total_trades": total.astype(np.int64),
+        "winning_trades": win_count.astype(np.int64),
+        "losing_trades": loss_count.astype(np.int64),
+        "win_rate": win_rate,
+        "profit_factor": profit_factor,
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "largest_win": largest_win,
+        "largest_loss": largest_loss,
+        "avg_trade": avg_trade,
+        "expectancy": win_rate * avg_win + (1 - win_rate) * avg_loss,
+    }
+
+
+def analyze_batch(
+    equity: np.ndarray,
+    initial_capital: ArrayLike,
+    trade_pnls: Optional[np.ndarray] = None,
+    trade_runs: Optional[np.ndarray] = None,
+    years: Optional[ArrayLike] = None,
+    positions_value: Optional[np.ndarray] = None,
+    risk_free_rate: float = 0.02,
+    periods_per_year: int = 252,
+    labels: Optional[Sequence[Any]] = None,
+    start_dates: Optional[Any] = None,
+    end_dates: Optional[Any] = None,
+) -> MetricsTable:
+    """
+    Compute performance metrics for many equity curves at once.
+
+    Definitions match ``PerformanceAnalyzer.analyze`` for chronologically
+    ordered curves of equal length.
+
+    Args:
+        equity: Total portfolio value, shape ``(runs, bars)`` or ``(bars,)``
+        initial_capital: Starting capital, scalar or one per run
+        trade_pnls: Closed-trade P&L. Either a flat array paired with
+            ``trade_runs``, or a ``(runs, max_trades)`` matrix padded with NaN
+        trade_runs: Run index of each entry in a flat ``trade_pnls``
+        years: Length of each run in years (see ``years_between``). Defaults
+            to ``(bars - 1) / periods_per_year``
+        positions_value: Invested value per bar, same shape as ``equity``,
+            used for exposure
+        risk_free_rate: Annual risk-free rate for Sharpe and Sortino
+        periods_per_year: Bars per year, used for volatility and default years
+        labels: Run identifiers carried into the table
+        start_dates: First timestamp of each run, carried into the table
+        end_dates: Last timestamp of each run, carried into the table
+
+    Returns:
+        MetricsTable with one row per run
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=float))
+    runs, bars = equity.shape
+    capital = _per_run(initial_capital, runs, 0.0)
+    years = _per_run(years, runs, max(bars - 1, 0) / periods_per_year)
+    columns: Dict[str, np.ndarray] = {}
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Returns
+        total_return = equity[:, -1] / capital - 1 if bars else np.zeros(runs)
+        exponent = 1 / np.where(years > 0, years, 1.0)
+        annualized = np.where(years > 0, (1 + total_return) ** exponent - 1, 0.0)
+        columns["total_return"] = total_return
+        columns["annualized_return"] = annualized
+        columns["monthly_return"] = np.where(
+            years > 0, (1 + annualized) ** (1 / 12) - 1, 0.0
+        )
+
+        # Risk (sample standard deviations, as pandas computes them)
+        returns = equity[:, 1:] / equity[:, :-1] - 1
+        scale = np.sqrt(periods_per_year)
+        if returns.shape[1] > 1:
+            volatility = returns.std(axis=1, ddof=1)
+            negative = returns < 0
+            count = negative.sum(axis=1)
+            mean = np.where(negative, returns, 0.0).sum(axis=1) / count
+            squares = np.where(negative, (returns - mean[:, None]) ** 2, 0.0)
+            downside = np.where(
+                count > 0, np.sqrt(squares.sum(axis=1) / (count - 1)) * scale, 0.0
+            )
+            # A single negative return has an undefined sample deviation
+            downside = np.where(count == 1, np.nan, downside)
+        else:
+            volatility = np.zeros(runs)
+            downside = np.zeros(runs)
+        annual_volatility = volatility * scale
+        columns["volatility"] = volatility
+        columns["annualized_volatility"] = annual_volatility
+        columns["downside_volatility"] = downside
+
+        excess = annualized - risk_free_rate
+        columns["sharpe_ratio"] = np.where(
+            annual_volatility == 0, 0.0, excess / annual_volatility
+        )
+        columns["sortino_ratio"] = np.where(downside == 0, 0.0, excess / downside)
+
+        # Drawdown
+        running_max = np.maximum.accumulate(equity, axis=1)
+        drawdown = (equity - running_max) / running_max
+        in_drawdown = drawdown < 0
+        depth_count = in_drawdown.sum(axis=1)
+        max_drawdown = np.abs(drawdown.min(axis=1)) if bars else np.zeros(runs)
+        columns["calmar_ratio"] = np.where(
+            max_drawdown == 0, 0.0, annualized / max_drawdown
+        )
+        columns["information_ratio"] = np.zeros(runs)
+        columns["max_drawdown"] = max_drawdown
+        columns["max_drawdown_duration"] = longest_run(in_drawdown).astype(np.int64)
+        columns["avg_drawdown"] = np.where(
+            depth_count > 0,
+            np.abs(np.where(in_drawdown, drawdown, 0.0).sum(axis=1) / depth_count),
+            0.0,
+        )
+
+    # Trades
+    pnls, run_ids = _flatten_trades(trade_pnls, trade_runs, runs)
+    columns.update(_trade_stats(pnls, run_ids, runs))
+
+    # Exposure
+    if positions_value is not None and bars:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            exposure = np.atleast_2d(np.asarray(positions_value, dtype=float)) / equity
+        columns["avg_exposure"] = exposure.mean(axis=1)
+        columns["max_exposure"] = exposure.max(axis=1)
+    else:
+        columns["avg_exposure"] = np.zeros(runs)
+        columns["max_exposure"] = np.zeros(runs)
+
+    columns["trading_days"] = np.full(runs, bars, dtype=np.int64)
+
+    return MetricsTable(
+        {name: columns[name] for name in METRIC_COLUMNS},
+        labels,
+        start_dates,
+        end_dates,
+    )
+
+
+def _flatten_trades(
+    trade_pnls: Optional[np.ndarray], trade_runs: Optional[np.ndarray], runs: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalize trade input to flat ``(pnls, run_ids)`` arrays"""
+    if trade_pnls is None:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+
+    pnls = np.asarray(trade_pnls, dtype=float)
+    if trade_runs is None:
+        if pnls.ndim != 2 or pnls.shape[0] != runs:
+            raise ValueError(
+                "trade_pnls must be a (runs, max_trades) matrix when "
+                "trade_runs is not given"
+            )
+        filled = ~np.isnan(pnls)
+        return pnls[filled], np.nonzero(filled)[0]
+
+    run_ids = np.asarray(trade_runs, dtype=np.int64)
+    if pnls.shape != run_ids.shape:
+        raise ValueError("trade_pnls and trade_runs must have the same shape")
+    return pnls, run_ids
+
+
+# ============================================================================
+# Backtest results
+# ============================================================================
+
+
+def analyze_curves(
+    equity_curves: Sequence[List[Dict[str, Any]]],
+    trades: Sequence[List[Dict[str, Any]]],
+    initial_capital: ArrayLike,
+    risk_free_rate: float = 0.02,
+    labels: Optional[Sequence[Any]] = None,
+) -> MetricsTable:
+    """
+    Analyze equity curves in the ``Portfolio.get_equity_curve`` format.
+
+    Curves are grouped by length so each group is analyzed as one matrix;
+    rows come back in input order.
+
+    Args:
+        equity_curves: One snapshot list per run, in chronological order
+        trades: One trade list per run
+        initial_capital: Starting capital, scalar or one per run
+        risk_free_rate: Annual risk-free rate
+        labels: Run identifiers (defaults to the run index)
+
+    Returns:
+        MetricsTable with one row per run
+    """
+    runs = len(equity_curves)
+    capital = _per_run(initial_capital, runs, 0.0)
+    labels = np.arange(runs) if labels is None else np.asarray(labels, dtype=object)
+
+    groups: Dict[int, List[int]] = {}
+    for run, curve in enumerate(equity_curves):
+        groups.setdefault(len(curve), []).append(run)
+
+    tables = []
+    order = []
+    for bars, members in groups.items():
+        if bars == 0:
+            # analyze() returns default metrics for an empty curve
+            empty = MetricsTable.from_metrics(
+                {run: PerformanceMetrics() for run in members}
+            )
+            tables.append(empty)
+            order.extend(members)
+            continue
+
+        curves = [equity_curves[run] for run in members]
+        equity = np.array([[s["total_value"] for s in curve] for curve in curves])
+        positions = None
+        if all("positions_value" in curve[0] for curve in curves):
+            positions = np.array(
+                [[s["positions_value"] for s in curve] for curve in curves]
+            )
+        starts = [curve[0]["timestamp"] for curve in curves]
+        ends = [curve[-1]["timestamp"] for curve in curves]
+        years = years_between(starts, ends)
+        pnl_arrays = [closed_trade_pnls(trades[run]) for run in members]
+        pnls = np.concatenate(pnl_arrays) if pnl_arrays else np.empty(0)
+        run_ids = np.repeat(np.arange(len(members)), [len(p) for p in pnl_arrays])
+
+        tables.append(
+            analyze_batch(
+                equity,
+                capital[members],
+                trade_pnls=pnls,
+                trade_runs=run_ids,
+                years=years,
+                positions_value=positions,
+                risk_free_rate=risk_free_rate,
+                start_dates=starts,
+                end_dates=ends,
+            )
+        )
+        order.extend(members)
+
+    table = MetricsTable.concat(tables)
+    restored = table.take(np.argsort(np.asarray(order, dtype=np.int64)))
+    restored.labels = labels
+    return restored
+
+
+def random_equity(
+    runs: int, bars: int, seed: int = 0, initial_capital: float = 100000.0
+) -> np.ndarray:
+    """Synthetic ``(runs, bars)`` equity curves for tests and benchmarks"""
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0.0003, 0.0004, size=(runs, 1))
+    returns = drift + rng.normal(0.0, 0.01, size=(runs, bars))
+    returns[:, 0] = 0.0
+    return initial_capital * np.cumprod(1 + returns, axis=1)
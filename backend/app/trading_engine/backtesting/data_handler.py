@@ -7,11 +7,14 @@ Manages historical data loading, preprocessing, and iteration for backtests.
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Dict, Generator, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, Generator, List, Optional, Union
 
 import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from .bar_store import BarStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -152,7 +155,7 @@ class DataHandler:
 
             # Fill missing values
             if fill_missing:
-                df = df.fillna(method="ffill").fillna(method="bfill")
+                df = df.ffill().bfill()
 
             # Remove outliers
             if remove_outliers:
@@ -208,6 +211,25 @@ class DataHandler:
 
         logger.info(f"Aligned data to {len(common_timestamps)} common timestamps")
 
+    def to_bar_store(self, directory: str) -> "BarStore":
+        """
+        Write loaded data to a memory-mappable bar store.
+
+        Unlike ``align_data`` this keeps every symbol's own calendar; use it
+        with ``EventBacktester`` for large universes.
+
+        Args:
+            directory: Store directory
+
+        Returns:
+            BarStore containing every loaded symbol
+        """
+        from .bar_store import BarStore
+
+        store = BarStore(directory)
+        store.write_frames({symbol: self.data[symbol] for symbol in self.symbols})
+        return store
+
     def get_bar(self, symbol: str, index: int) -> Optional[Bar]:
         """Get a specific bar by index"""
         if symbol not in self.data:
@@ -12,6 +12,7 @@ from typing import Any, Dict, List, Optional, Type, Union
 
 import pandas as pd
 
+from ..engine.fill_simulator import FillSimulator
 from ..strategies.base import TradingStrategy
 from .data_handler import Bar, DataHandler
 from .order import Order, OrderSide, OrderStatus, OrderType
@@ -87,17 +88,26 @@ class BacktestEngine:
     simulation of market conditions, order execution, and portfolio management.
     """
 
-    def __init__(self, config: Optional[BacktestConfig] = None):
+    def __init__(
+        self,
+        config: Optional[BacktestConfig] = None,
+        fill_simulator: Optional[FillSimulator] = None,
+    ):
         """
         Initialize backtest engine.
 
         Args:
             config: Backtest configuration
+            fill_simulator: Execution simulator for orders. When omitted,
+                market orders fill immediately at the bar close with flat
+                slippage
         """
         self.config = config or BacktestConfig()
         self.data_handler = DataHandler()
         self.portfolio: Optional[Portfolio] = None
         self.analyzer = PerformanceAnalyzer()
+        self.fill_simulator = fill_simulator
+        self._working_orders: Dict[str, Order] = {}
 
         self._strategies: List[TradingStrategy] = []
         self._signals: List[Dict[str, Any]] = []
@@ -194,14 +204,19 @@ class BacktestEngine:
 
     def _initialize(self) -> None:
         """Initialize backtest state"""
+        # Simulated fill prices already include spread and impact
+        simulated = self.fill_simulator is not None
         self.portfolio = Portfolio(
             initial_capital=self.config.initial_capital,
             commission_rate=self.config.commission_rate,
-            slippage_rate=self.config.slippage_rate,
+            slippage_rate=0.0 if simulated else self.config.slippage_rate,
             margin_requirement=self.config.margin_requirement,
         )
         self._signals = []
         self._current_bar = None
+        self._working_orders = {}
+        if simulated:
+            self.fill_simulator.reset()
 
     async def _run_simulation(self) -> int:
         """
@@ -323,8 +338,15 @@ class BacktestEngine:
             strategy_name=strategy.name,
         )
 
-        # Submit and execute immediately (market order)
-        if self.portfolio.submit_order(order):
+        if not self.portfolio.submit_order(order):
+            return
+
+        if self.fill_simulator is not None:
+            # Works from the next bar, subject to volume and impact
+            self._working_orders[order.order_id] = order
+            self.fill_simulator.submit_order(order)
+        else:
+            # Execute immediately (market order)
             fill_price = order.get_fill_price(bar.close, self.config.slippage_rate)
             self.portfolio.execute_order(order, fill_price, bar.timestamp)
 
@@ -373,6 +395,10 @@ class BacktestEngine:
 
     def _process_pending_orders(self, bars: Dict[str, Bar]) -> None:
         """Process pending limit and stop orders"""
+        if self.fill_simulator is not None:
+            self._process_simulated_fills(bars)
+            return
+
         for order in self.portfolio.get_pending_orders():
             if order.symbol not in bars:
                 continue
@@ -384,6 +410,23 @@ class BacktestEngine:
                 fill_price = order.get_fill_price(bar.close, self.config.slippage_rate)
                 self.portfolio.execute_order(order, fill_price, bar.timestamp)
 
+    def _process_simulated_fills(self, bars: Dict[str, Bar]) -> None:
+        """Apply fills from the execution simulator to the portfolio"""
+        for fill in self.fill_simulator.step(bars):
+            order = self._working_orders.get(fill.order_id)
+            if order is None:
+                continue
+
+            trade = self.portfolio.execute_order(
+                order, fill.price, bars[fill.symbol].timestamp, fill.quantity
+            )
+            if not trade:
+                # Cash or position no longer covers the rest of the order
+                self.fill_simulator.cancel(fill.order_id)
+                del self._working_orders[fill.order_id]
+            elif fill.complete:
+                del self._working_orders[fill.order_id]
+
     def _check_exit_conditions(self, bars: Dict[str, Bar]) -> None:
         """Check stop loss and take profit for open positions"""
         for symbol, position in list(self.portfolio.positions.items()):
@@ -446,6 +489,9 @@ class BacktestEngine:
         """Reset engine for new backtest"""
         if self.portfolio:
             self.portfolio.reset()
+        if self.fill_simulator is not None:
+            self.fill_simulator.reset()
+        self._working_orders = {}
         self._signals = []
         self._current_bar = None
 
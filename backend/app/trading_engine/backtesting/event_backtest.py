@@ -0,0 +1,353 @@
+"""
+Event-Driven Portfolio Backtesting
+
+Portfolio-level backtest mode for large universes. Per-symbol bar arrays
+(usually memory-mapped from a ``BarStore``) are merged into one time-ordered
+event stream with a heap, so every symbol keeps its own calendar: an event
+carries only the symbols that printed at that timestamp, and nothing is
+dropped or forward-filled to force a common calendar as
+``DataHandler.align_data`` does.
+
+Accounting uses ``ArrayPortfolio``, so marking and rebalancing thousands of
+symbols are vectorized operations.
+"""
+
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import numpy as np
+
+from .bar_store import BarStore
+from .batch_performance import analyze_batch, years_between
+from .engine import BacktestConfig
+from .performance import PerformanceMetrics
+from .portfolio import ArrayPortfolio
+
+logger = logging.getLogger(__name__)
+
+Weights = Union[np.ndarray, Mapping[str, float]]
+
+
+@dataclass
+class BarEvent:
+    """All bars sharing one timestamp; arrays are aligned with ``symbol_ids``"""
+
+    timestamp: int  # nanoseconds since the epoch
+    symbol_ids: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def datetime(self) -> np.datetime64:
+        return np.datetime64(self.timestamp, "ns")
+
+
+class EventStream:
+    """
+    Time-ordered merge of per-symbol bar arrays.
+
+    Each stream is read in chunks. A heap keyed by the last timestamp of each
+    buffered chunk gives a horizon up to which every stream's bars are
+    buffered; a second heap keyed by each stream's next unread timestamp
+    picks only the streams that have bars before that horizon. The buffered
+    rows are then ordered with one vectorized sort and split into events.
+    """
+
+    def __init__(
+        self,
+        bars: Sequence[np.ndarray],
+        chunk_size: int = 4096,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+    ):
+        """
+        Initialize stream.
+
+        Args:
+            bars: One structured bar array (BAR_DTYPE) per symbol id
+            chunk_size: Bars read from a stream at a time
+            start: First timestamp to include
+            end: Last timestamp to include
+        """
+        self.bars = list(bars)
+        self.chunk_size = chunk_size
+        self.start = None if start is None else _to_ns(start)
+        self.end = None if end is None else _to_ns(end)
+
+    def __iter__(self) -> Iterator[BarEvent]:
+        timestamps = [b["timestamp"] for b in self.bars]
+        position, stop, buffered = [], [], []
+        ends: List[tuple] = []  # (last buffered timestamp, stream)
+        heads: List[tuple] = []  # (next unread timestamp, stream)
+
+        for i, ts in enumerate(timestamps):
+            lo = 0 if self.start is None else int(np.searchsorted(ts, self.start))
+            hi = len(ts)
+            if self.end is not None:
+                hi = int(np.searchsorted(ts, self.end, side="right"))
+            position.append(lo)
+            stop.append(hi)
+            buffered.append(min(lo + self.chunk_size, hi))
+            if lo < hi:
+                ends.append((int(ts[buffered[i] - 1]), i))
+                heads.append((int(ts[lo]), i))
+        heapq.heapify(ends)
+        heapq.heapify(heads)
+
+        while heads:
+            horizon = ends[0][0]
+
+            parts = []
+            while heads and heads[0][0] <= horizon:
+                _, i = heapq.heappop(heads)
+                lo, hi = position[i], buffered[i]
+                cut = lo + int(np.searchsorted(timestamps[i][lo:hi], horizon, "right"))
+                parts.append((i, lo, cut))
+                position[i] = cut
+                if cut < hi:
+                    heapq.heappush(heads, (int(timestamps[i][cut]), i))
+
+            # Streams whose buffer ends at the horizon are drained; refill
+            while ends and ends[0][0] <= horizon:
+                _, i = heapq.heappop(ends)
+                if buffered[i] < stop[i]:
+                    buffered[i] = min(buffered[i] + self.chunk_size, stop[i])
+                    heapq.heappush(ends, (int(timestamps[i][buffered[i] - 1]), i))
+                    heapq.heappush(heads, (int(timestamps[i][position[i]]), i))
+
+            yield from self._events(parts)
+
+    def _events(self, parts: List[tuple]) -> Iterator[BarEvent]:
+        """Sort buffered rows by time and split them per timestamp"""
+        if not parts:
+            return
+        rows = np.concatenate([self.bars[i][lo:cut] for i, lo, cut in parts])
+        symbol_ids = np.concatenate(
+            [np.full(cut - lo, i, dtype=np.int64) for i, lo, cut in parts]
+        )
+        order = np.lexsort((symbol_ids, rows["timestamp"]))
+        rows, symbol_ids = rows[order], symbol_ids[order]
+
+        ts = rows["timestamp"]
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(ts)) + 1, [len(ts)]))
+        opens, highs, lows = rows["open"], rows["high"], rows["low"]
+        closes, volumes = rows["close"], rows["volume"]
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            yield BarEvent(
+                timestamp=int(ts[lo]),
+                symbol_ids=symbol_ids[lo:hi],
+                open=opens[lo:hi],
+                high=highs[lo:hi],
+                low=lows[lo:hi],
+                close=closes[lo:hi],
+                volume=volumes[lo:hi],
+            )
+
+
+def _to_ns(value: Any) -> int:
+    return int(np.datetime64(value, "ns").astype(np.int64))
+
+
+# ============================================================================
+# Backtester
+# ============================================================================
+
+
+@dataclass
+class RebalanceContext:
+    """What a rebalancing strategy sees at each decision point"""
+
+    event: BarEvent
+    portfolio: ArrayPortfolio
+    backtester: "EventBacktester"
+
+    @property
+    def timestamp(self) -> int:
+        return self.event.timestamp
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Last price per symbol id (NaN before a symbol's first bar)"""
+        return self.portfolio.last_price
+
+    def history(self, symbol_id: int, bars: int) -> np.ndarray:
+        """The last ``bars`` bars of a symbol up to this event"""
+        return self.backtester.history(symbol_id, self.event.timestamp, bars)
+
+
+@dataclass
+class EventBacktestResult:
+    """Results from an event-driven portfolio backtest"""
+
+    metrics: PerformanceMetrics
+    equity: Dict[str, np.ndarray]
+    trades: Dict[str, np.ndarray]
+    final_positions: Dict[str, float]
+    events_processed: int = 0
+    bars_processed: int = 0
+    rebalances: int = 0
+    execution_time: float = 0.0
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            "metrics": self.metrics.to_dict(),
+            "summary": {
+                "total_return_pct": self.metrics.total_return * 100,
+                "sharpe_ratio": self.metrics.sharpe_ratio,
+                "max_drawdown_pct": self.metrics.max_drawdown * 100,
+                "total_trades": int(len(self.trades["quantity"])),
+                "open_positions": len(self.final_positions),
+            },
+            "execution": {
+                "events_processed": self.events_processed,
+                "bars_processed": self.bars_processed,
+                "rebalances": self.rebalances,
+                "execution_time_seconds": self.execution_time,
+            },
+        }
+
+
+class EventBacktester:
+    """
+    Portfolio-level backtester driven by a merged bar event stream.
+
+    The strategy is a callable receiving a ``RebalanceContext`` and returning
+    target weights (array by symbol id, or symbol -> weight) or None to hold.
+    Trades execute at the event's closing prices.
+    """
+
+    def __init__(
+        self,
+        bars: Union[BarStore, Mapping[str, np.ndarray]],
+        strategy: Callable[[RebalanceContext], Optional[Weights]],
+        config: Optional[BacktestConfig] = None,
+        symbols: Optional[Sequence[str]] = None,
+        rebalance_every: Optional[str] = None,
+        start: Optional[Any] = None,
+        end: Optional[Any] = None,
+        chunk_size: int = 4096,
+    ):
+        """
+        Initialize backtester.
+
+        Args:
+            bars: BarStore (memory-mapped) or symbol -> structured bar array
+            strategy: Rebalancing callable
+            config: Capital, commission and slippage settings
+            symbols: Universe (defaults to every symbol in ``bars``)
+            rebalance_every: NumPy datetime unit ("D", "W", "M", "Y") at which
+                the strategy is consulted; None consults it on every event
+            start: First timestamp to simulate
+            end: Last timestamp to simulate
+            chunk_size: Bars read per stream at a time
+        """
+        self.config = config or BacktestConfig()
+        if isinstance(bars, BarStore):
+            self.symbols = list(symbols or bars.symbols)
+            self.bars = bars.load_all(self.symbols)
+        else:
+            self.symbols = list(symbols or bars.keys())
+            self.bars = [bars[symbol] for symbol in self.symbols]
+        self.strategy = strategy
+        self.rebalance_every = rebalance_every
+        self.stream = EventStream(self.bars, chunk_size, start, end)
+        self.portfolio = ArrayPortfolio(
+            self.symbols,
+            initial_capital=self.config.initial_capital,
+            commission_rate=self.config.commission_rate,
+            slippage_rate=self.config.slippage_rate,
+        )
+
+    def history(self, symbol_id: int, timestamp: int, bars: int) -> np.ndarray:
+        """The last ``bars`` bars of a symbol at or before ``timestamp``"""
+        data = self.bars[symbol_id]
+        end = int(np.searchsorted(data["timestamp"], timestamp, side="right"))
+        return data[max(0, end - bars) : end]
+
+    def _period(self, timestamp: int) -> Any:
+        if self.rebalance_every is None:
+            return timestamp
+        return np.datetime64(timestamp, "ns").astype(
+            f"datetime64[{self.rebalance_every}]"
+        )
+
+    def run(self) -> EventBacktestResult:
+        """
+        Run the backtest.
+
+        Returns:
+            EventBacktestResult with metrics, equity and trade arrays
+        """
+        started = time.perf_counter()
+        portfolio = self.portfolio
+        portfolio.reset()
+
+        events = bars = rebalances = 0
+        last_period = None
+        for event in self.stream:
+            portfolio.mark(event.symbol_ids, event.close)
+
+            period = self._period(event.timestamp)
+            if period != last_period:
+                last_period = period
+                weights = self.strategy(RebalanceContext(event, portfolio, self))
+                if weights is not None:
+                    portfolio.rebalance(weights, event.timestamp)
+                    rebalances += 1
+
+            portfolio.take_snapshot(event.timestamp)
+            events += 1
+            bars += len(event.symbol_ids)
+
+        result = EventBacktestResult(
+            metrics=self._metrics(),
+            equity=portfolio.equity_arrays(),
+            trades=portfolio.trade_arrays(),
+            final_positions=portfolio.get_positions(),
+            events_processed=events,
+            bars_processed=bars,
+            rebalances=rebalances,
+            execution_time=time.perf_counter() - started,
+        )
+        logger.info(
+            f"Event backtest complete: {events} events, {bars} bars, "
+            f"{rebalances} rebalances in {result.execution_time:.1f}s"
+        )
+        return result
+
+    def _metrics(self) -> PerformanceMetrics:
+        """Performance metrics via the array analyzer"""
+        equity = self.portfolio.equity_arrays()
+        if not len(equity["total_value"]):
+            return PerformanceMetrics()
+
+        pnls = self.portfolio.trade_arrays()["realized_pnl"]
+        pnls = pnls[~np.isnan(pnls)]
+        table = analyze_batch(
+            equity["total_value"],
+            self.config.initial_capital,
+            trade_pnls=pnls,
+            trade_runs=np.zeros(len(pnls), dtype=np.int64),
+            years=years_between(equity["timestamp"][0], equity["timestamp"][-1]),
+            positions_value=equity["positions_value"],
+            start_dates=equity["timestamp"][0],
+            end_dates=equity["timestamp"][-1],
+        )
+        return table.row(0)
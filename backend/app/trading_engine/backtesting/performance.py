@@ -8,11 +8,14 @@ risk-adjusted metrics, drawdowns, and trade statistics.
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Union
 
 import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from .batch_performance import MetricsTable
+
 logger = logging.getLogger(__name__)
 
 
@@ -221,6 +224,68 @@ class PerformanceAnalyzer:
 
         return metrics
 
+    def analyze_batch(
+        self,
+        equity: np.ndarray,
+        initial_capital: Union[float, np.ndarray],
+        trade_pnls: Optional[np.ndarray] = None,
+        trade_runs: Optional[np.ndarray] = None,
+        years: Optional[Union[float, np.ndarray]] = None,
+        positions_value: Optional[np.ndarray] = None,
+        labels: Optional[Sequence[Any]] = None,
+    ) -> "MetricsTable":
+        """
+        Analyze many runs from NumPy arrays in one pass.
+
+        Args:
+            equity: Total portfolio value, shape (runs, bars)
+            initial_capital: Starting capital, scalar or one per run
+            trade_pnls: Flat closed-trade P&L with ``trade_runs``, or a
+                (runs, max_trades) matrix padded with NaN
+            trade_runs: Run index of each flat trade
+            years: Length of each run in years
+            positions_value: Invested value per bar, for exposure
+            labels: Run identifiers
+
+        Returns:
+            MetricsTable with one row per run
+        """
+        from .batch_performance import analyze_batch
+
+        return analyze_batch(
+            equity,
+            initial_capital,
+            trade_pnls=trade_pnls,
+            trade_runs=trade_runs,
+            years=years,
+            positions_value=positions_value,
+            risk_free_rate=self.risk_free_rate,
+            labels=labels,
+        )
+
+    def analyze_results(
+        self, results: Sequence[Any], labels: Optional[Sequence[Any]] = None
+    ) -> "MetricsTable":
+        """
+        Analyze a batch of BacktestResults into one columnar table.
+
+        Args:
+            results: BacktestResult objects, e.g. from a parameter sweep
+            labels: Run identifiers (defaults to each strategy name)
+
+        Returns:
+            MetricsTable with one row per result, in input order
+        """
+        from .batch_performance import analyze_curves
+
+        return analyze_curves(
+            [r.equity_curve for r in results],
+            [r.trades for r in results],
+            np.array([r.config.initial_capital for r in results], dtype=float),
+            risk_free_rate=self.risk_free_rate,
+            labels=labels if labels is not None else [r.strategy_name for r in results],
+        )
+
     def _calculate_sharpe_ratio(
         self, annualized_return: float, annualized_volatility: float
     ) -> float:
@@ -247,6 +312,8 @@ class PerformanceAnalyzer:
 
     def _calculate_drawdown(self, equity: pd.Series) -> Dict[str, float]:
         """Calculate drawdown metrics"""
+        from .batch_performance import longest_run
+
         # Running maximum
         running_max = equity.expanding().max()
 
@@ -256,23 +323,8 @@ class PerformanceAnalyzer:
         # Max drawdown
         max_drawdown = drawdown.min()
 
-        # Drawdown duration
-        is_drawdown = drawdown < 0
-        drawdown_periods = []
-        current_period = 0
-
-        for in_dd in is_drawdown:
-            if in_dd:
-                current_period += 1
-            else:
-                if current_period > 0:
-                    drawdown_periods.append(current_period)
-                current_period = 0
-
-        if current_period > 0:
-            drawdown_periods.append(current_period)
-
-        max_duration = max(drawdown_periods) if drawdown_periods else 0
+        # Drawdown duration (longest run of bars below the running peak)
+        max_duration = int(longest_run(drawdown.to_numpy() < 0))
         avg_drawdown = drawdown[drawdown < 0].mean() if (drawdown < 0).any() else 0
 
         return {
@@ -408,36 +460,37 @@ class PerformanceAnalyzer:
         return "\n".join(report)
 
     def compare_strategies(
-        self, results: Dict[str, PerformanceMetrics]
+        self, results: Union[Dict[str, PerformanceMetrics], "MetricsTable"]
     ) -> pd.DataFrame:
         """
         Compare multiple strategy results.
 
         Args:
-            results: Dictionary of strategy name -> PerformanceMetrics
+            results: Dictionary of strategy name -> PerformanceMetrics, or a
+                MetricsTable from ``analyze_batch``/``analyze_results``
 
         Returns:
             DataFrame with comparison
         """
-        comparison = []
-
-        for name, metrics in results.items():
-            comparison.append(
-                {
-                    "Strategy": name,
-                    "Total Return %": metrics.total_return * 100,
-                    "Ann. Return %": metrics.annualized_return * 100,
-                    "Volatility %": metrics.annualized_volatility * 100,
-                    "Sharpe": metrics.sharpe_ratio,
-                    "Sortino": metrics.sortino_ratio,
-                    "Max DD %": metrics.max_drawdown * 100,
-                    "Win Rate %": metrics.win_rate * 100,
-                    "Profit Factor": metrics.profit_factor,
-                    "Trades": metrics.total_trades,
-                }
-            )
-
-        df = pd.DataFrame(comparison)
+        from .batch_performance import MetricsTable
+
+        if not isinstance(results, MetricsTable):
+            results = MetricsTable.from_metrics(results)
+
+        df = pd.DataFrame(
+            {
+                "Strategy": results.labels,
+                "Total Return %": results["total_return"] * 100,
+                "Ann. Return %": results["annualized_return"] * 100,
+                "Volatility %": results["annualized_volatility"] * 100,
+                "Sharpe": results["sharpe_ratio"],
+                "Sortino": results["sortino_ratio"],
+                "Max DD %": results["max_drawdown"] * 100,
+                "Win Rate %": results["win_rate"] * 100,
+                "Profit Factor": results["profit_factor"],
+                "Trades": results["total_trades"],
+            }
+        )
         df = df.set_index("Strategy")
 
         return df
@@ -7,7 +7,9 @@ Tracks positions, cash, and portfolio value throughout the backtest.
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
 
 from .order import Order, OrderSide, OrderStatus
 
@@ -220,7 +222,11 @@ class Portfolio:
         return True
 
     def execute_order(
-        self, order: Order, fill_price: float, timestamp: datetime
+        self,
+        order: Order,
+        fill_price: float,
+        timestamp: datetime,
+        quantity: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Execute a filled order.
@@ -229,12 +235,17 @@ class Portfolio:
             order: Order to execute
             fill_price: Execution price
             timestamp: Execution timestamp
+            quantity: Quantity filled (default: the order's remaining quantity)
 
         Returns:
             Trade details
         """
+        if quantity is None:
+            quantity = order.remaining_quantity
+        quantity = min(quantity, order.remaining_quantity)
+
         # Calculate costs
-        trade_value = order.quantity * fill_price
+        trade_value = quantity * fill_price
         commission = trade_value * self.commission_rate
         slippage = trade_value * self.slippage_rate
 
@@ -252,17 +263,17 @@ class Portfolio:
             if order.symbol not in self.positions:
                 self.positions[order.symbol] = Position(symbol=order.symbol)
 
-            self.positions[order.symbol].add(order.quantity, fill_price)
+            self.positions[order.symbol].add(quantity, fill_price)
             realized_pnl = 0.0
 
         else:  # SELL
             position = self.positions.get(order.symbol)
-            if not position or position.quantity < order.quantity:
+            if not position or position.quantity < quantity:
                 order.reject("Insufficient position")
                 return {}
 
             # Update position
-            realized_pnl = position.reduce(order.quantity, fill_price)
+            realized_pnl = position.reduce(quantity, fill_price)
 
             # Update cash (minus costs)
             net_proceeds = trade_value - commission - slippage
@@ -273,8 +284,10 @@ class Portfolio:
                 del self.positions[order.symbol]
 
         # Update order
-        order.fill(order.quantity, fill_price, timestamp, commission, slippage)
-        self.filled_orders.append(order)
+        first_fill = order.filled_quantity == 0
+        order.fill(quantity, fill_price, timestamp, commission, slippage)
+        if first_fill:
+            self.filled_orders.append(order)
 
         # Record trade
         trade = {
@@ -282,7 +295,7 @@ class Portfolio:
             "order_id": order.order_id,
             "symbol": order.symbol,
             "side": order.side.value,
-            "quantity": order.quantity,
+            "quantity": quantity,
             "price": fill_price,
             "value": trade_value,
             "commission": commission,
@@ -293,7 +306,7 @@ class Portfolio:
         self.trades.append(trade)
 
         logger.debug(
-            f"Trade executed: {order.side.value} {order.quantity} {order.symbol} "
+            f"Trade executed: {order.side.value} {quantity} {order.symbol} "
             f"@ {fill_price:.2f}, PnL: {realized_pnl:.2f}"
         )
 
@@ -373,3 +386,236 @@ class Portfolio:
         self.trades.clear()
         self.snapshots.clear()
         self._current_timestamp = None
+
+
+_INT_TRADE_FIELDS = ("timestamp", "symbol_id")
+
+
+class ArrayPortfolio:
+    """
+    Array-backed portfolio for universe-wide backtests.
+
+    Positions, average costs and last prices are NumPy arrays indexed by
+    symbol id, so marking, rebalancing and trade booking are vectorized and
+    cost nothing for symbols that did not change. Fills apply slippage to the
+    price once; commission is charged on traded value.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        initial_capital: float = 100000.0,
+        commission_rate: float = 0.001,  # 0.1%
+        slippage_rate: float = 0.0005,  # 0.05%
+        min_trade_value: float = 0.0,
+    ):
+        """
+        Initialize portfolio.
+
+        Args:
+            symbols: Tradable universe; a symbol's id is its position here
+            initial_capital: Starting cash
+            commission_rate: Commission as a fraction of traded value
+            slippage_rate: Price concession on every fill
+            min_trade_value: Rebalance trades smaller than this are skipped
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.initial_capital = initial_capital
+        self.commission_rate = commission_rate
+        self.slippage_rate = slippage_rate
+        self.min_trade_value = min_trade_value
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset portfolio to initial state"""
+        size = len(self.symbols)
+        self.cash = float(self.initial_capital)
+        self.quantity = np.zeros(size)
+        self.avg_cost = np.zeros(size)
+        self.last_price = np.full(size, np.nan)
+        self.realized = np.zeros(size)
+        self._positions_value = 0.0
+
+        self._trades: Dict[str, List[np.ndarray]] = {
+            name: []
+            for name in (
+                "timestamp",
+                "symbol_id",
+                "quantity",
+                "price",
+                "commission",
+                "realized_pnl",
+            )
+        }
+        self._equity: Dict[str, List[float]] = {
+            "timestamp": [],
+            "total_value": [],
+            "cash": [],
+            "positions_value": [],
+        }
+
+    @property
+    def positions_value(self) -> float:
+        """Market value of all positions at their last prices"""
+        return self._positions_value
+
+    @property
+    def total_value(self) -> float:
+        """Cash plus market value of positions"""
+        return self.cash + self._positions_value
+
+    @property
+    def realized_pnl(self) -> float:
+        return float(self.realized.sum())
+
+    def mark(self, symbol_ids: np.ndarray, prices: np.ndarray) -> None:
+        """
+        Update last prices for the symbols that printed.
+
+        Args:
+            symbol_ids: Symbol ids with a new price
+            prices: New prices, aligned with ``symbol_ids``
+        """
+        previous = np.nan_to_num(self.last_price[symbol_ids])
+        self._positions_value += float(
+            np.dot(self.quantity[symbol_ids], prices - previous)
+        )
+        self.last_price[symbol_ids] = prices
+
+    def execute(
+        self, symbol_ids: np.ndarray, quantities: np.ndarray, timestamp: int
+    ) -> None:
+        """
+        Book fills at the last price plus slippage.
+
+        Args:
+            symbol_ids: Traded symbol ids (unique)
+            quantities: Signed quantities (positive buys)
+            timestamp: Fill time (nanoseconds since the epoch)
+        """
+        if len(symbol_ids) == 0:
+            return
+        mark = self.last_price[symbol_ids]
+        side = np.sign(quantities)
+        price = mark * (1 + side * self.slippage_rate)
+        commission = np.abs(quantities) * price * self.commission_rate
+
+        old = self.quantity[symbol_ids]
+        new = old + quantities
+        avg = self.avg_cost[symbol_ids]
+
+        closing = np.where(
+            (old != 0) & (np.sign(old) != side),
+            np.minimum(np.abs(quantities), np.abs(old)),
+            0.0,
+        )
+        realized = closing * (price - avg) * np.sign(old)
+
+        opened_or_flipped = (old == 0) | (np.sign(new) != np.sign(old))
+        adding = (np.sign(old) == side) & (old != 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            added_avg = (old * avg + quantities * price) / new
+        avg = np.where(adding, added_avg, avg)
+        avg = np.where(opened_or_flipped, price, avg)
+        avg = np.where(new == 0, 0.0, avg)
+
+        self.quantity[symbol_ids] = new
+        self.avg_cost[symbol_ids] = avg
+        self.realized[symbol_ids] += realized
+        self.cash -= float(np.dot(quantities, price) + commission.sum())
+        self._positions_value += float(np.dot(quantities, mark))
+
+        log = self._trades
+        log["timestamp"].append(np.full(len(symbol_ids), timestamp, dtype=np.int64))
+        log["symbol_id"].append(np.asarray(symbol_ids, dtype=np.int64))
+        log["quantity"].append(np.asarray(quantities, dtype=float))
+        log["price"].append(price)
+        log["commission"].append(commission)
+        log["realized_pnl"].append(np.where(closing > 0, realized, np.nan))
+
+    def target_weights(
+        self, weights: Union[np.ndarray, Mapping[str, float]]
+    ) -> np.ndarray:
+        """Normalize weights to a full array; omitted symbols get zero"""
+        if isinstance(weights, Mapping):
+            full = np.zeros(len(self.symbols))
+            for symbol, weight in weights.items():
+                full[self.index[symbol]] = weight
+            return full
+        return np.asarray(weights, dtype=float)
+
+    def rebalance(
+        self, weights: Union[np.ndarray, Mapping[str, float]], timestamp: int
+    ) -> int:
+        """
+        Trade to target weights of current total value.
+
+        Symbols without a price yet keep their current position. Sells are
+        booked first; buys are scaled down if cash after sells cannot cover
+        them.
+
+        Args:
+            weights: Target weight per symbol id, or symbol -> weight
+            timestamp: Fill time (nanoseconds since the epoch)
+
+        Returns:
+            Number of symbols traded
+        """
+        weights = self.target_weights(weights)
+        priced = ~np.isnan(self.last_price)
+        total = self.total_value
+        with np.errstate(invalid="ignore"):
+            target = np.where(priced, weights * total / self.last_price, self.quantity)
+        delta = np.where(priced, target - self.quantity, 0.0)
+        trade_value = np.abs(delta) * np.nan_to_num(self.last_price)
+        delta[trade_value <= max(self.min_trade_value, 1e-9)] = 0.0
+
+        sells = np.flatnonzero(delta < 0)
+        self.execute(sells, delta[sells], timestamp)
+
+        buys = np.flatnonzero(delta > 0)
+        if len(buys):
+            unit_cost = (
+                self.last_price[buys]
+                * (1 + self.slippage_rate)
+                * (1 + self.commission_rate)
+            )
+            required = float(np.dot(delta[buys], unit_cost))
+            if required > self.cash:
+                delta[buys] *= max(self.cash, 0.0) / required
+            self.execute(buys, delta[buys], timestamp)
+
+        return len(sells) + len(buys)
+
+    def take_snapshot(self, timestamp: int) -> None:
+        """Record the equity curve point for ``timestamp``"""
+        equity = self._equity
+        equity["timestamp"].append(timestamp)
+        equity["total_value"].append(self.total_value)
+        equity["cash"].append(self.cash)
+        equity["positions_value"].append(self._positions_value)
+
+    def equity_arrays(self) -> Dict[str, np.ndarray]:
+        """Equity curve as arrays (timestamps as datetime64[ns])"""
+        arrays = {name: np.asarray(values) for name, values in self._equity.items()}
+        arrays["timestamp"] = arrays["timestamp"].astype("datetime64[ns]")
+        return arrays
+
+    def trade_arrays(self) -> Dict[str, np.ndarray]:
+        """Columnar trade log; realized_pnl is NaN for opening trades"""
+        arrays = {
+            name: (
+                np.concatenate(parts)
+                if parts
+                else np.empty(0, dtype=np.int64 if name in _INT_TRADE_FIELDS else float)
+            )
+            for name, parts in self._trades.items()
+        }
+        arrays["timestamp"] = arrays["timestamp"].astype("datetime64[ns]")
+        return arrays
+
+    def get_positions(self) -> Dict[str, float]:
+        """Open positions by symbol"""
+        held = np.flatnonzero(self.quantity != 0)
+        return {self.symbols[i]: float(self.quantity[i]) for i in held}
@@ -29,6 +29,7 @@ from Elson.services.market_data import MarketDataService
 
 # Local imports
 from Elson.trading_engine.ai_model_engine.quantum_models import (
+    KernelMatrixCache,
     QuantumKernelClassifier,
     QuantumVariationalClassifier,
 )
@@ -76,6 +77,13 @@ async def run_evaluation(
         market_data_service=data_service, results_dir=output_dir
     )
 
+    # Kernel blocks are shared by every kernel model, fold and regime, and
+    # persisted so nightly re-runs on unchanged data skip circuit simulation
+    kernel_cache = KernelMatrixCache(
+        cache_dir=os.path.join(output_dir, "kernel_cache"),
+        n_jobs=max(1, (os.cpu_count() or 1) - 1),
+    )
+
     # Define standard feature columns
     feature_columns = [
         "Close",
@@ -147,6 +155,7 @@ async def run_evaluation(
                     feature_selection="pca",
                     regularization=1.0,
                     noise_mitigation=True,
+                    kernel_cache=kernel_cache,
                 ),
                 "params": {},
             },
@@ -178,6 +187,7 @@ async def run_evaluation(
                     feature_selection="pca",
                     regularization=0.5,  # Different regularization
                     noise_mitigation=True,
+                    kernel_cache=kernel_cache,
                     hybrid_model=True,  # Enable hybrid classical-quantum processing
                     classical_optimizer="ADAM",
                 ),
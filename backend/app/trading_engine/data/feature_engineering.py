@@ -10,8 +10,12 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 import numpy as np
 import pandas as pd
 
+from .pattern_engine import detect_patterns, feature_patterns
+
 logger = logging.getLogger(__name__)
 
+OHLC_COLUMNS = ("open", "high", "low", "close")
+
 
 class FeatureEngineering:
     """Feature engineering for market data"""
@@ -268,48 +272,29 @@ class FeatureEngineering:
 
         return df
 
-    def add_candlestick_patterns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Add common candlestick pattern indicators"""
-        # Doji (open and close are very close)
-        df["doji"] = (
-            np.abs(df["close"] - df["open"]) <= 0.1 * (df["high"] - df["low"])
-        ).astype(int)
-
-        # Hammer (small body at the top, long lower wick)
-        body_size = np.abs(df["close"] - df["open"])
-        lower_wick = np.minimum(df["open"], df["close"]) - df["low"]
-        upper_wick = df["high"] - np.maximum(df["open"], df["close"])
-
-        df["hammer"] = (
-            (body_size <= 0.3 * (df["high"] - df["low"]))
-            & (lower_wick >= 2 * body_size)
-            & (upper_wick <= 0.2 * body_size)
-        ).astype(int)
+    def add_candlestick_patterns(
+        self, df: pd.DataFrame, include_strategy_patterns: bool = False
+    ) -> pd.DataFrame:
+        """
+        Add common candlestick pattern indicators
 
-        # Shooting Star (small body at the bottom, long upper wick)
-        df["shooting_star"] = (
-            (body_size <= 0.3 * (df["high"] - df["low"]))
-            & (upper_wick >= 2 * body_size)
-            & (lower_wick <= 0.2 * body_size)
-        ).astype(int)
+        Args:
+            df: DataFrame with OHLC columns
+            include_strategy_patterns: Also add a ``pattern_<name>`` column for
+                every pattern the candlestick strategy trades on
 
-        # Engulfing patterns
-        bullish_engulfing = (
-            (df["close"].shift(1) < df["open"].shift(1))
-            & (df["close"] > df["open"])
-            & (df["close"] > df["open"].shift(1))
-            & (df["open"] < df["close"].shift(1))
-        )
+        Returns:
+            DataFrame with 0/1 pattern columns
+        """
+        ohlc = [df[column].to_numpy(dtype=float) for column in OHLC_COLUMNS]
 
-        bearish_engulfing = (
-            (df["close"].shift(1) > df["open"].shift(1))
-            & (df["close"] < df["open"])
-            & (df["close"] < df["open"].shift(1))
-            & (df["open"] > df["close"].shift(1))
-        )
+        # Doji, hammer, shooting star and engulfing feature definitions
+        for name, mask in feature_patterns(*ohlc).items():
+            df[name] = mask.astype(int)
 
-        df["bullish_engulfing"] = bullish_engulfing.astype(int)
-        df["bearish_engulfing"] = bearish_engulfing.astype(int)
+        if include_strategy_patterns:
+            for name, mask in detect_patterns(*ohlc).items():
+                df[f"pattern_{name}"] = mask.astype(int)
 
         return df
 
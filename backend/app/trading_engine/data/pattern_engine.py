@@ -0,0 +1,434 @@
+"""
+Vectorized candlestick pattern engine
+
+Computes every candlestick pattern as a boolean array over whole OHLC
+histories. Inputs are arrays whose last axis is time, so one call scans a
+single symbol (shape ``(bars,)``) or thousands at once (``(symbols, bars)``).
+
+Two rule sets are provided:
+
+- ``detect_patterns`` implements the trading rules of
+  ``CandlestickPatternStrategy`` (trend-filtered hammer/shooting star,
+  engulfing, harami, star and soldier/crow patterns)
+- ``feature_patterns`` implements the simpler definitions used for ML
+  features by ``FeatureEngineering.add_candlestick_patterns``
+
+The live strategy reads the last bar of the masks; backtests and feature
+generation use the full arrays.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@dataclass(frozen=True)
+class PatternInfo:
+    """How the strategy scores a detected pattern."""
+
+    type: str  # bullish, bearish or neutral
+    strength: float
+    description: str
+
+
+# Ordered as the strategy reports them
+PATTERNS: Dict[str, PatternInfo] = {
+    "doji": PatternInfo("neutral", 0.4, "Doji - Market indecision"),
+    "hammer": PatternInfo("bullish", 0.65, "Hammer - Potential bullish reversal"),
+    "shooting_star": PatternInfo(
+        "bearish", 0.65, "Shooting Star - Potential bearish reversal"
+    ),
+    "bullish_marubozu": PatternInfo(
+        "bullish", 0.6, "Bullish Marubozu - Strong buying"
+    ),
+    "bearish_marubozu": PatternInfo(
+        "bearish", 0.6, "Bearish Marubozu - Strong selling"
+    ),
+    "bullish_engulfing": PatternInfo(
+        "bullish", 0.75, "Bullish Engulfing - Strong reversal signal"
+    ),
+    "bearish_engulfing": PatternInfo(
+        "bearish", 0.75, "Bearish Engulfing - Strong reversal signal"
+    ),
+    "piercing_line": PatternInfo(
+        "bullish", 0.65, "Piercing Line - Bullish reversal"
+    ),
+    "dark_cloud_cover": PatternInfo(
+        "bearish", 0.65, "Dark Cloud Cover - Bearish reversal"
+    ),
+    "bullish_harami": PatternInfo(
+        "bullish", 0.55, "Bullish Harami - Potential reversal"
+    ),
+    "bearish_harami": PatternInfo(
+        "bearish", 0.55, "Bearish Harami - Potential reversal"
+    ),
+    "morning_star": PatternInfo(
+        "bullish", 0.8, "Morning Star - Strong bullish reversal"
+    ),
+    "evening_star": PatternInfo(
+        "bearish", 0.8, "Evening Star - Strong bearish reversal"
+    ),
+    "three_white_soldiers": PatternInfo(
+        "bullish", 0.85, "Three White Soldiers - Strong bullish trend"
+    ),
+    "three_black_crows": PatternInfo(
+        "bearish", 0.85, "Three Black Crows - Strong bearish trend"
+    ),
+}
+
+FEATURE_PATTERNS = (
+    "doji",
+    "hammer",
+    "shooting_star",
+    "bullish_engulfing",
+    "bearish_engulfing",
+)
+
+
+@dataclass(frozen=True)
+class PatternParams:
+    """Thresholds of the strategy rule set."""
+
+    body_threshold: float = 0.001  # Minimum body size as % of price
+    doji_threshold: float = 0.1  # Body/range ratio for doji
+    shadow_ratio: float = 2.0  # Shadow to body ratio for hammer/star
+    engulfing_margin: float = 1.0  # How much larger engulfing body should be
+    trend_period: int = 20
+
+
+# ============================================================================
+# Array helpers
+# ============================================================================
+
+
+def _as_float(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """Values ``periods`` bars earlier along the last axis (NaN/False padded)."""
+    shifted = np.empty_like(values)
+    shifted[..., :periods] = False if values.dtype == bool else np.nan
+    shifted[..., periods:] = values[..., :-periods]
+    return shifted
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean along the last axis, NaN until the window is full."""
+    values = _as_float(values)
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        result[..., window - 1 :] = sliding_window_view(values, window, axis=-1).mean(
+            axis=-1
+        )
+    return result
+
+
+def candle_properties(
+    open_: Any, high: Any, low: Any, close: Any
+) -> Dict[str, np.ndarray]:
+    """Body, range and shadow arrays for OHLC arrays of any shape."""
+    o, h, l, c = (_as_float(a) for a in (open_, high, low, close))
+    body_abs = np.abs(c - o)
+    range_ = h - l
+    with np.errstate(divide="ignore", invalid="ignore"):
+        body_ratio = np.where(range_ == 0, np.nan, body_abs / range_)
+    return {
+        "open": o,
+        "high": h,
+        "low": l,
+        "close": c,
+        "body_abs": body_abs,
+        "bullish": c > o,
+        "range": range_,
+        "upper_shadow": h - np.maximum(o, c),
+        "lower_shadow": np.minimum(o, c) - l,
+        "body_ratio": body_ratio,
+    }
+
+
+# ============================================================================
+# Strategy rule set
+# ============================================================================
+
+
+def detect_patterns(
+    open_: Any,
+    high: Any,
+    low: Any,
+    close: Any,
+    params: PatternParams = PatternParams(),
+    trend_up: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Boolean mask per strategy pattern for every bar.
+
+    Args:
+        open_, high, low, close: Arrays with time on the last axis
+        params: Pattern thresholds
+        trend_up: Optional precomputed uptrend mask; defaults to close above
+            its ``trend_period`` simple moving average
+
+    Returns:
+        Mapping of pattern name (in ``PATTERNS`` order) to boolean arrays
+    """
+    p = candle_properties(open_, high, low, close)
+    o, h, l, c = p["open"], p["high"], p["low"], p["close"]
+    body, bullish, range_ = p["body_abs"], p["bullish"], p["range"]
+    upper, lower = p["upper_shadow"], p["lower_shadow"]
+    bearish = ~bullish
+
+    if trend_up is None:
+        with np.errstate(invalid="ignore"):
+            trend_up = c > rolling_mean(c, params.trend_period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        has_range = range_ != 0
+        big_body = body > c * params.body_threshold
+        marubozu = has_range & (body / range_ > 0.9)
+
+        # Previous (2) and two-back (3) candles, as in the scalar detectors
+        o2, h2, l2, c2 = (_shift(a, 1) for a in (o, h, l, c))
+        body2, bull2 = _shift(body, 1), _shift(bullish, 1)
+        bear2 = ~bull2 & ~np.isnan(c2)
+        o3, c3 = _shift(o, 2), _shift(c, 2)
+        body3, bull3 = _shift(body, 2), _shift(bullish, 2)
+        bear3 = ~bull3 & ~np.isnan(c3)
+        big2, big3 = _shift(big_body, 1), _shift(big_body, 2)
+        mid2 = (o2 + c2) / 2
+        mid3 = (o3 + c3) / 2
+
+        masks = {
+            "doji": p["body_ratio"] < params.doji_threshold,
+            "hammer": has_range
+            & (lower > body * params.shadow_ratio)
+            & (upper < body * 0.5)
+            & big_body
+            & ~trend_up,
+            "shooting_star": has_range
+            & (upper > body * params.shadow_ratio)
+            & (lower < body * 0.5)
+            & big_body
+            & trend_up,
+            "bullish_marubozu": marubozu & bullish,
+            "bearish_marubozu": marubozu & bearish,
+            "bullish_engulfing": bear2
+            & bullish
+            & (o < c2)
+            & (c > o2)
+            & (body > body2 * params.engulfing_margin),
+            "bearish_engulfing": bull2
+            & bearish
+            & (o > c2)
+            & (c < o2)
+            & (body > body2 * params.engulfing_margin),
+            "piercing_line": bear2 & bullish & (o < l2) & (c > mid2),
+            "dark_cloud_cover": bull2 & bearish & (o > h2) & (c < mid2),
+            "bullish_harami": bear2
+            & bullish
+            & (body < body2)
+            & (h < o2)
+            & (l > c2),
+            "bearish_harami": bull2
+            & bearish
+            & (body < body2)
+            & (h < c2)
+            & (l > o2),
+            "morning_star": bear3 & (body2 < body3 * 0.3) & bullish & (c > mid3),
+            "evening_star": bull3 & (body2 < body3 * 0.3) & bearish & (c < mid3),
+            "three_white_soldiers": bull3
+            & bull2
+            & bullish
+            & (o2 > o3)
+            & (c2 > c3)
+            & (o > o2)
+            & (c > c2)
+            & big3
+            & big2
+            & big_body,
+            "three_black_crows": bear3
+            & bear2
+            & bearish
+            & (o2 < o3)
+            & (c2 < c3)
+            & (o < o2)
+            & (c < c2)
+            & big3
+            & big2
+            & big_body,
+        }
+    return masks
+
+
+def pattern_dict(name: str) -> Dict[str, Any]:
+    """Pattern as reported in strategy signals."""
+    info = PATTERNS[name]
+    return {
+        "name": name,
+        "type": info.type,
+        "strength": info.strength,
+        "description": info.description,
+    }
+
+
+def patterns_at(
+    masks: Mapping[str, np.ndarray], index: Any = -1
+) -> List[Dict[str, Any]]:
+    """
+    Pattern dicts, as the strategy reports them, for one bar.
+
+    Args:
+        masks: Output of ``detect_patterns``
+        index: Bar index for 1-D masks, or ``(symbol_row, bar)`` for 2-D masks
+    """
+    return [
+        pattern_dict(name)
+        for name in PATTERNS
+        if name in masks and masks[name][index]
+    ]
+
+
+def latest_patterns(
+    open_: Any,
+    high: Any,
+    low: Any,
+    close: Any,
+    params: PatternParams = PatternParams(),
+) -> List[Dict[str, Any]]:
+    """Patterns on the last bar of one symbol, scanning only the bars needed."""
+    lookback = params.trend_period + 2
+    window = [_as_float(a)[-lookback:] for a in (open_, high, low, close)]
+    return patterns_at(detect_patterns(*window, params=params), -1)
+
+
+def stack_ohlc(
+    frames: Mapping[str, Any], bars: Optional[int] = None
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Stack per-symbol OHLC frames into ``(symbols, bars)`` arrays.
+
+    Histories are aligned on their last bar and left-padded with NaN.
+
+    Args:
+        frames: Symbol to DataFrame (or mapping) with open/high/low/close
+        bars: Keep only the most recent ``bars`` bars
+
+    Returns:
+        Tuple of (symbols, open, high, low, close)
+    """
+    symbols = list(frames)
+    length = max((len(frames[s]["close"]) for s in symbols), default=0)
+    if bars is not None:
+        length = min(length, bars)
+    arrays = [np.full((len(symbols), length), np.nan) for _ in range(4)]
+    for row, symbol in enumerate(symbols):
+        for array, column in zip(arrays, ("open", "high", "low", "close")):
+            values = _as_float(frames[symbol][column])[-length:] if length else []
+            if len(values):
+                array[row, -len(values) :] = values
+    return (symbols, *arrays)
+
+
+def scan_symbols(
+    frames: Mapping[str, Any], params: PatternParams = PatternParams()
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Last-bar patterns for many symbols in one vectorized pass."""
+    symbols, o, h, l, c = stack_ohlc(frames, bars=params.trend_period + 2)
+    masks = detect_patterns(o, h, l, c, params=params)
+    return {symbol: patterns_at(masks, (row, -1)) for row, symbol in enumerate(symbols)}
+
+
+# ============================================================================
+# ML feature rule set
+# ============================================================================
+
+
+def feature_patterns(
+    open_: Any, high: Any, low: Any, close: Any
+) -> Dict[str, np.ndarray]:
+    """Boolean masks for the ML feature pattern definitions."""
+    o, h, l, c = (_as_float(a) for a in (open_, high, low, close))
+    body = np.abs(c - o)
+    range_ = h - l
+    lower = np.minimum(o, c) - l
+    upper = h - np.maximum(o, c)
+    small_body = body <= 0.3 * range_
+    o2, c2 = _shift(o, 1), _shift(c, 1)
+
+    return {
+        "doji": body <= 0.1 * range_,
+        "hammer": small_body & (lower >= 2 * body) & (upper <= 0.2 * body),
+        "shooting_star": small_body & (upper >= 2 * body) & (lower <= 0.2 * body),
+        "bullish_engulfing": (c2 < o2) & (c > o) & (c > o2) & (o < c2),
+        "bearish_engulfing": (c2 > o2) & (c < o) & (c < o2) & (o > c2),
+    }
+
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+
+def random_ohlc(
+    symbols: int, bars: int, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Synthetic OHLC arrays of shape ``(symbols, bars)`` for tests/benchmarks."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.015, (symbols, bars)), axis=1)
+    open_ = close * (1 + rng.normal(0, 0.01, (symbols, bars)))
+    spread = np.abs(rng.normal(0, 0.01, (symbols, bars)))
+    high = np.maximum(open_, close) * (1 + spread * rng.random((symbols, bars)))
+    low = np.minimum(open_, close) * (1 - spread * rng.random((symbols, bars)))
+    return open_, high, low, close
+
+
+def benchmark_patterns(
+    symbols: int = 200, bars: int = 250, reference_bars: int = 40, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Time the engine against the strategy's per-candle detectors.
+
+    The reference walks ``reference_bars`` bars of every symbol with
+    ``CandlestickPatternStrategy._detect_patterns``; its cost is scaled to
+    the full history for comparison.
+
+    Returns:
+        Timings in milliseconds and the number of mismatched bars
+    """
+    import pandas as pd
+
+    from ..strategies.technical.candlestick_patterns import CandlestickPatternStrategy
+
+    o, h, l, c = random_ohlc(symbols, bars, seed)
+
+    started = time.perf_counter()
+    masks = detect_patterns(o, h, l, c)
+    vectorized_ms = (time.perf_counter() - started) * 1000
+
+    strategy = CandlestickPatternStrategy(symbol="BENCH")
+    first = bars - reference_bars
+    mismatches = 0
+    started = time.perf_counter()
+    for row in range(symbols):
+        df = strategy._calculate_candle_properties(
+            pd.DataFrame(
+                {"open": o[row], "high": h[row], "low": l[row], "close": c[row]}
+            )
+        )
+        for bar in range(first, bars):
+            expected = strategy._detect_patterns_scalar(df.iloc[: bar + 1])
+            found = [p["name"] for p in patterns_at(masks, (row, bar))]
+            mismatches += [p["name"] for p in expected] != found
+    reference_ms = (time.perf_counter() - started) * 1000 * bars / reference_bars
+
+    return {
+        "symbols": symbols,
+        "bars": bars,
+        "vectorized_ms": vectorized_ms,
+        "reference_ms_estimated": reference_ms,
+        "speedup": reference_ms / vectorized_ms if vectorized_ms else None,
+        "mismatches": mismatches,
+    }
@@ -0,0 +1,162 @@
+"""
+Persistence backends for circuit breaker state
+
+The circuit breaker keeps its state in memory as an immutable snapshot and
+records every change here instead of rewriting one JSON document per trip:
+
+- ``BreakerJournal`` appends each change to a JSON-lines journal and
+  periodically compacts it into the status file
+- ``RedisBreakerStore`` keeps breakers in a Redis hash with a version counter
+  so multiple API workers share one breaker state
+
+Both take changes as ``{key: record}`` mappings where a ``None`` record
+deletes the breaker.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Breakers = Dict[str, Dict[str, Any]]
+Changes = Dict[str, Optional[Dict[str, Any]]]
+
+
+def apply_changes(
+    breakers: Breakers, changes: Changes, clear: bool = False
+) -> Breakers:
+    """Return a new breaker mapping with ``changes`` applied."""
+    updated = {} if clear else dict(breakers)
+    for key, record in changes.items():
+        if record is None:
+            updated.pop(key, None)
+        else:
+            updated[key] = record
+    return updated
+
+
+class BreakerJournal:
+    """Append-only journal of breaker changes with periodic compaction."""
+
+    def __init__(
+        self,
+        status_file: str,
+        journal_file: Optional[str] = None,
+        compact_every: int = 500,
+        fsync: bool = True,
+    ):
+        """
+        Initialize the journal
+
+        Args:
+            status_file: Compacted state (plain JSON object of breakers)
+            journal_file: Change log replayed on top of the status file
+            compact_every: Journal entries written before compacting
+            fsync: Flush each entry to disk before returning
+        """
+        self.status_file = status_file
+        self.journal_file = journal_file or f"{os.path.splitext(status_file)[0]}.jsonl"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.entries = 0
+
+    def load(self) -> Breakers:
+        """Read the compacted state and replay the journal on top of it."""
+        breakers: Breakers = {}
+        if os.path.exists(self.status_file):
+            with open(self.status_file, "r") as f:
+                breakers = json.load(f)
+
+        self.entries = 0
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave a partial last line
+                        logger.warning("Skipping truncated breaker journal entry")
+                        continue
+                    breakers = apply_changes(
+                        breakers, entry.get("changes", {}), entry.get("clear", False)
+                    )
+                    self.entries += 1
+        return breakers
+
+    def append(self, changes: Changes, state: Breakers, clear: bool = False) -> None:
+        """
+        Record one change, compacting when the journal grows too long
+
+        Args:
+            changes: Changed breakers (``None`` for deleted ones)
+            state: Full state after the change, used for compaction
+            clear: Whether all breakers were removed first
+        """
+        if self.entries + 1 >= self.compact_every:
+            self.compact(state)
+            return
+
+        entry = {"changes": changes}
+        if clear:
+            entry["clear"] = True
+        with open(self.journal_file, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self.entries += 1
+
+    def compact(self, state: Breakers) -> None:
+        """Atomically write the full state and truncate the journal."""
+        tmp_path = f"{self.status_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.status_file)
+        # Replaying the old journal over the new snapshot would be harmless,
+        # so a crash before this truncation loses nothing
+        open(self.journal_file, "w").close()
+        self.entries = 0
+
+
+class RedisBreakerStore:
+    """Breaker state shared through a Redis hash."""
+
+    def __init__(self, client: Any, namespace: str = "circuit_breakers"):
+        """
+        Initialize the store
+
+        Args:
+            client: ``redis.Redis`` client
+            namespace: Hash key; ``<namespace>:version`` counts changes
+        """
+        self.client = client
+        self.namespace = namespace
+        self.version_key = f"{namespace}:version"
+
+    def version(self) -> int:
+        """Change counter, used by readers to detect remote updates."""
+        return int(self.client.get(self.version_key) or 0)
+
+    def load(self) -> Breakers:
+        return {
+            (key.decode() if isinstance(key, bytes) else key): json.loads(value)
+            for key, value in self.client.hgetall(self.namespace).items()
+        }
+
+    def append(self, changes: Changes, state: Breakers, clear: bool = False) -> int:
+        """Write changes in one transaction and return the new version."""
+        pipe = self.client.pipeline(transaction=True)
+        if clear:
+            pipe.delete(self.namespace)
+        for key, record in changes.items():
+            if record is None:
+                pipe.hdel(self.namespace, key)
+            else:
+                pipe.hset(self.namespace, key, json.dumps(record))
+        pipe.incr(self.version_key)
+        return int(pipe.execute()[-1])
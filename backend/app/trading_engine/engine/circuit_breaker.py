@@ -1,14 +1,24 @@
-import json
+import heapq
 import logging
 import os
 import random
 import threading
+import time
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import yaml
 
+from .breaker_store import BreakerJournal, RedisBreakerStore, apply_changes
+
+try:
+    import redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,6 +55,14 @@ class VolatilityLevel(str, Enum):
     EXTREME = "extreme"  # >40% annualized volatility
 
 
+class _BreakerState(NamedTuple):
+    """Immutable view of all breakers, swapped atomically on every change"""
+
+    breakers: Dict[str, Dict]
+    next_reset_at: float  # Earliest pending auto-reset (epoch seconds)
+    next_sync_at: float  # When to poll the shared backend for changes
+
+
 class CircuitBreaker:
     """
     Implements a circuit breaker pattern to halt trading when risk thresholds
@@ -57,21 +75,40 @@ class CircuitBreaker:
     - Asset-specific circuit breaker customization
     - Hysteresis to prevent rapid switching
 
+    Reads are lock-free: ``check`` works on an immutable snapshot and only
+    takes the writer lock when an auto-reset is due (kept in a heap) or the
+    shared Redis state needs refreshing. Changes are appended to a journal
+    rather than rewriting the status file.
+
     Circuit breakers can be set at various levels:
     - System-wide: Halts all trading
     - Per strategy: Halts a specific strategy
     - Per symbol: Halts trading for a specific ticker
     """
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        status_file: str = "circuit_breaker_status.json",
+        redis_client: Optional[Any] = None,
+        sync_interval: float = 1.0,
+    ):
         """Initialize the circuit breaker system
 
         Args:
             config_path: Path to the configuration file for circuit breaker thresholds
+            status_file: Compacted status file; changes go to a journal beside it
+            redis_client: Optional Redis client to share state between workers
+            sync_interval: Seconds between checks for changes made by other workers
         """
-        self.circuit_breakers: Dict[str, Dict] = {}
         self.config: Dict = {}
-        self.lock = threading.RLock()
+        self.lock = threading.RLock()  # Serializes writers; readers never take it
+        self._state = _BreakerState({}, float("inf"), float("inf"))
+        self._reset_heap: List[Tuple[float, str]] = []
+        self._reset_at: Dict[str, float] = {}
+        self.sync_interval = sync_interval
+        self.shared_store = RedisBreakerStore(redis_client) if redis_client else None
+        self._shared_version: Optional[int] = None
         self.volatility_history: Dict[str, List[VolatilityLevel]] = (
             {}
         )  # Track recent volatility levels for hysteresis
@@ -157,9 +194,15 @@ class CircuitBreaker:
             }
 
         # Initialize status store for persistence
-        self.status_file = "circuit_breaker_status.json"
+        self.status_file = status_file
+        self.journal = BreakerJournal(status_file)
         self._load_status()
 
+    @property
+    def circuit_breakers(self) -> Dict[str, Dict]:
+        """Current breakers; published snapshots are never mutated"""
+        return self._state.breakers
+
     def _load_config(self, config_path: str) -> None:
         """Load circuit breaker configuration from file"""
         try:
@@ -172,28 +215,106 @@ class CircuitBreaker:
             self.config = {}
 
     def _load_status(self) -> None:
-        """Load the status of all circuit breakers from file"""
+        """Load the status of all circuit breakers from the backend"""
+        breakers: Dict[str, Dict] = {}
         try:
-            if os.path.exists(self.status_file):
-                with open(self.status_file, "r") as f:
-                    status_data = json.load(f)
-                    self.circuit_breakers = status_data
+            if self.shared_store:
+                self._shared_version = self.shared_store.version()
+                breakers = self.shared_store.load()
+            else:
+                breakers = self.journal.load()
         except Exception as e:
             logger.error(f"Error loading circuit breaker status: {str(e)}")
+        with self.lock:
+            self._replace_state(breakers)
+
+    def _replace_state(self, breakers: Dict[str, Dict]) -> None:
+        """Publish a full state and rebuild the auto-reset schedule"""
+        self._reset_heap = []
+        self._reset_at = {}
+        for key, breaker in breakers.items():
+            self._schedule_reset(key, breaker)
+        self._publish(breakers)
+
+    def _schedule_reset(self, key: str, breaker: Optional[Dict]) -> None:
+        """Track a breaker's auto-reset time (parsed once, at write time)"""
+        self._reset_at.pop(key, None)
+        if (
+            breaker is None
+            or breaker["status"] == CircuitBreakerStatus.CLOSED.value
+            or not breaker.get("auto_reset_at")
+        ):
+            return
+        due = datetime.fromisoformat(breaker["auto_reset_at"]).timestamp()
+        self._reset_at[key] = due
+        heapq.heappush(self._reset_heap, (due, key))
+
+    def _publish(self, breakers: Dict[str, Dict]) -> None:
+        # Drop heap entries superseded by later writes
+        heap = self._reset_heap
+        while heap and self._reset_at.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        next_sync = (
+            time.time() + self.sync_interval if self.shared_store else float("inf")
+        )
+        self._state = _BreakerState(
+            breakers, heap[0][0] if heap else float("inf"), next_sync
+        )
+
+    def _commit(self, changes: Dict[str, Optional[Dict]], clear: bool = False) -> None:
+        """Apply changes as a new snapshot and persist them (lock held)"""
+        breakers = apply_changes(self._state.breakers, changes, clear)
+        if clear:
+            self._replace_state(breakers)
+        else:
+            for key, breaker in changes.items():
+                self._schedule_reset(key, breaker)
+            self._publish(breakers)
 
-    def _save_status(self) -> None:
-        """Save the current status of all circuit breakers to file"""
         try:
-            with open(self.status_file, "w") as f:
-                json.dump(self.circuit_breakers, f, indent=2)
+            if self.shared_store:
+                previous = self._shared_version
+                version = self.shared_store.append(changes, breakers, clear)
+                self._shared_version = version
+                if previous is None or version != previous + 1:
+                    # Another worker wrote since our last sync; our snapshot
+                    # lacks its changes, so take the merged shared state
+                    self._replace_state(self.shared_store.load())
+            else:
+                self.journal.append(changes, breakers, clear)
         except Exception as e:
             logger.error(f"Error saving circuit breaker status: {str(e)}")
 
+    def _sync_shared(self) -> None:
+        """Reload shared state if another worker changed it (lock held)"""
+        try:
+            version = self.shared_store.version()
+            if version != self._shared_version:
+                self._shared_version = version
+                self._replace_state(self.shared_store.load())
+                return
+        except Exception as e:
+            logger.error(f"Error syncing circuit breaker status: {str(e)}")
+        self._publish(self._state.breakers)
+
+    def _current_state(self) -> _BreakerState:
+        """Snapshot for readers, applying due resets and remote changes first"""
+        state = self._state
+        now = time.time()
+        if now < state.next_reset_at and now < state.next_sync_at:
+            return state
+
+        with self.lock:
+            if self.shared_store and now >= self._state.next_sync_at:
+                self._sync_shared()
+            if now >= self._state.next_reset_at:
+                self._process_auto_resets()
+            return self._state
+
     def reset_all(self) -> None:
         """Reset all circuit breakers to closed state"""
         with self.lock:
-            self.circuit_breakers = {}
-            self._save_status()
+            self._commit({}, clear=True)
         logger.warning("All circuit breakers have been reset")
 
     def process_volatility(
@@ -338,16 +459,20 @@ class CircuitBreaker:
                 ).isoformat()
 
             # Record the circuit breaker
-            self.circuit_breakers[key] = {
-                "type": breaker_type.value,
-                "scope": scope,
-                "status": status.value,
-                "reason": reason,
-                "tripped_at": datetime.now().isoformat(),
-                "auto_reset_at": auto_reset,
-            }
-
-            self._save_status()
+            if self.shared_store:
+                self._sync_shared()
+            self._commit(
+                {
+                    key: {
+                        "type": breaker_type.value,
+                        "scope": scope,
+                        "status": status.value,
+                        "reason": reason,
+                        "tripped_at": datetime.now().isoformat(),
+                        "auto_reset_at": auto_reset,
+                    }
+                }
+            )
 
         logger.warning(
             f"Circuit breaker triggered - Type: {breaker_type.value}, "
@@ -362,37 +487,30 @@ class CircuitBreaker:
         """
         with self.lock:
             key = self._get_key(breaker_type, scope)
+            if self.shared_store:
+                self._sync_shared()
 
             if key in self.circuit_breakers:
-                current_status = self.circuit_breakers[key]["status"]
+                breaker = dict(self.circuit_breakers[key])
+                current_status = breaker["status"]
+                breaker["reset_attempted_at"] = datetime.utcnow().isoformat()
 
                 if current_status == CircuitBreakerStatus.OPEN.value:
-                    self.circuit_breakers[key][
-                        "status"
-                    ] = CircuitBreakerStatus.RESTRICTED.value
-                    self.circuit_breakers[key][
-                        "reset_attempted_at"
-                    ] = datetime.utcnow().isoformat()
-                    self._save_status()
+                    breaker["status"] = CircuitBreakerStatus.RESTRICTED.value
+                    self._commit({key: breaker})
                     logger.info(
                         f"Circuit breaker eased from OPEN to RESTRICTED - Type: {breaker_type.value}"
                     )
                     return True
                 elif current_status == CircuitBreakerStatus.RESTRICTED.value:
-                    self.circuit_breakers[key][
-                        "status"
-                    ] = CircuitBreakerStatus.CAUTIOUS.value
-                    self.circuit_breakers[key][
-                        "reset_attempted_at"
-                    ] = datetime.utcnow().isoformat()
-                    self._save_status()
+                    breaker["status"] = CircuitBreakerStatus.CAUTIOUS.value
+                    self._commit({key: breaker})
                     logger.info(
                         f"Circuit breaker eased from RESTRICTED to CAUTIOUS - Type: {breaker_type.value}"
                     )
                     return True
                 elif current_status == CircuitBreakerStatus.CAUTIOUS.value:
-                    del self.circuit_breakers[key]
-                    self._save_status()
+                    self._commit({key: None})
                     logger.info(
                         f"Circuit breaker fully closed - Type: {breaker_type.value}"
                     )
@@ -406,45 +524,46 @@ class CircuitBreaker:
     ) -> Tuple[bool, CircuitBreakerStatus]:
         """
         Check if trading is allowed based on circuit breakers
+
+        Lock-free: evaluates the current immutable snapshot.
         """
-        with self.lock:
-            # Process any auto-resets first
-            self._process_auto_resets()
+        # Applies any due auto-resets first
+        breakers = self._current_state().breakers
 
-            # If specific type and scope provided, check only that breaker
-            if breaker_type is not None:
-                key = self._get_key(breaker_type, scope)
-                allowed, status = self._check_single_breaker(key)
-                return allowed, status
+        # If specific type and scope provided, check only that breaker
+        if breaker_type is not None:
+            key = self._get_key(breaker_type, scope)
+            allowed, status = self._check_single_breaker(key, breakers)
+            return allowed, status
 
-            # System-wide check
-            system_key = self._get_key(CircuitBreakerType.SYSTEM, None)
-            if system_key in self.circuit_breakers:
-                status = self.circuit_breakers[system_key]["status"]
-                if status == CircuitBreakerStatus.OPEN.value:
-                    return False, CircuitBreakerStatus.OPEN
+        # System-wide check
+        system_key = self._get_key(CircuitBreakerType.SYSTEM, None)
+        if system_key in breakers:
+            status = breakers[system_key]["status"]
+            if status == CircuitBreakerStatus.OPEN.value:
+                return False, CircuitBreakerStatus.OPEN
 
-            # Check if there's a scope-specific breaker for any type
-            if scope:
-                most_restrictive_status = CircuitBreakerStatus.CLOSED
+        # Check if there's a scope-specific breaker for any type
+        if scope:
+            most_restrictive_status = CircuitBreakerStatus.CLOSED
 
-                for breaker_type in CircuitBreakerType:
-                    key = self._get_key(breaker_type, scope)
-                    allowed, status = self._check_single_breaker(key)
+            for breaker_type in CircuitBreakerType:
+                key = self._get_key(breaker_type, scope)
+                allowed, status = self._check_single_breaker(key, breakers)
 
-                    # Update most restrictive status
-                    if not allowed:
-                        return False, status
+                # Update most restrictive status
+                if not allowed:
+                    return False, status
 
-                    # Track the most restrictive non-blocking status
-                    if self._is_more_restrictive(status, most_restrictive_status):
-                        most_restrictive_status = status
+                # Track the most restrictive non-blocking status
+                if self._is_more_restrictive(status, most_restrictive_status):
+                    most_restrictive_status = status
 
-                # Return the most restrictive status that still allows trading
-                return True, most_restrictive_status
+            # Return the most restrictive status that still allows trading
+            return True, most_restrictive_status
 
-            # All checks passed, trading fully allowed
-            return True, CircuitBreakerStatus.CLOSED
+        # All checks passed, trading fully allowed
+        return True, CircuitBreakerStatus.CLOSED
 
     def _is_more_restrictive(
         self, status1: CircuitBreakerStatus, status2: CircuitBreakerStatus
@@ -460,10 +579,13 @@ class CircuitBreaker:
 
         return restriction_level.get(status1, 0) > restriction_level.get(status2, 0)
 
-    def _check_single_breaker(self, key: str) -> Tuple[bool, CircuitBreakerStatus]:
+    def _check_single_breaker(
+        self, key: str, breakers: Optional[Dict[str, Dict]] = None
+    ) -> Tuple[bool, CircuitBreakerStatus]:
         """Check if a specific breaker allows trading"""
-        if key in self.circuit_breakers:
-            status_str = self.circuit_breakers[key]["status"]
+        breakers = self.circuit_breakers if breakers is None else breakers
+        if key in breakers:
+            status_str = breakers[key]["status"]
             status = CircuitBreakerStatus(status_str)
 
             if status == CircuitBreakerStatus.OPEN:
@@ -485,23 +607,27 @@ class CircuitBreaker:
         return True, CircuitBreakerStatus.CLOSED
 
     def _process_auto_resets(self) -> None:
-        """Process any circuit breakers that should be auto-reset"""
+        """Process any circuit breakers that should be auto-reset
+
+        Only breakers popped from the reset heap are examined. Callers hold
+        the writer lock.
+        """
         now = datetime.now()
+        now_ts = now.timestamp()
+        heap = self._reset_heap
         keys_to_update = []
 
-        for key, breaker in self.circuit_breakers.items():
-            if breaker["status"] != CircuitBreakerStatus.CLOSED.value and breaker.get(
-                "auto_reset_at"
-            ):
-                auto_reset_time = datetime.fromisoformat(breaker["auto_reset_at"])
-                if now >= auto_reset_time:
-                    keys_to_update.append(key)
+        while heap and heap[0][0] <= now_ts:
+            due, key = heapq.heappop(heap)
+            if self._reset_at.get(key) == due and key not in keys_to_update:
+                keys_to_update.append(key)
 
+        changes: Dict[str, Optional[Dict]] = {}
         for key in keys_to_update:
-            breaker_data = self.circuit_breakers[key]
+            breaker_data = dict(self.circuit_breakers[key])
             breaker_type = breaker_data["type"]
             current_status = breaker_data["status"]
-            scope = breaker_data.get("scope", "global")
+            scope = breaker_data.get("scope")
 
             # Implement graduated auto-reset
             if current_status == CircuitBreakerStatus.OPEN.value:
@@ -510,7 +636,7 @@ class CircuitBreaker:
                 new_status = CircuitBreakerStatus.CAUTIOUS.value
             elif current_status == CircuitBreakerStatus.CAUTIOUS.value:
                 # Remove breaker entirely if it's fully closed
-                del self.circuit_breakers[key]
+                changes[key] = None
                 logger.info(
                     f"Auto-closing circuit breaker - Type: {breaker_type}, "
                     f"Scope: {scope or 'global'}"
@@ -520,39 +646,38 @@ class CircuitBreaker:
                 # Default to half-open for other statuses
                 new_status = CircuitBreakerStatus.HALF_OPEN.value
 
-            # Update the status if the breaker still exists
-            if key in self.circuit_breakers:
-                scope = self.circuit_breakers[key].get("scope")
-                logger.info(
-                    f"Auto-easing circuit breaker from {current_status} to {new_status} - Type: {breaker_type}, "
-                    f"Scope: {scope or 'global'}"
-                )
+            logger.info(
+                f"Auto-easing circuit breaker from {current_status} to {new_status} - Type: {breaker_type}, "
+                f"Scope: {scope or 'global'}"
+            )
+
+            breaker_data["status"] = new_status
+            breaker_data["reset_attempted_at"] = now.isoformat()
+
+            # Set a new auto-reset time based on the breaker type
+            if breaker_type == CircuitBreakerType.VOLATILITY.value:
+                # Get reset time from volatility cool-down config
+                level = self._get_volatility_level_from_status(new_status)
+                minutes = self.config["volatility"]["cool_down_minutes"].get(level, 30)
+                breaker_data["auto_reset_at"] = (
+                    now + timedelta(minutes=minutes)
+                ).isoformat()
+            else:
+                # For other breaker types, use default reset time from config
+                config_key = breaker_type
+                if config_key in self.config:
+                    minutes = self.config[config_key].get("reset_after_minutes", 30)
+                    if minutes > 0:
+                        breaker_data["auto_reset_at"] = (
+                            now + timedelta(minutes=minutes)
+                        ).isoformat()
 
-                self.circuit_breakers[key]["status"] = new_status
-                self.circuit_breakers[key]["reset_attempted_at"] = now.isoformat()
+            changes[key] = breaker_data
 
-                # Set a new auto-reset time based on the breaker type
-                if breaker_type == CircuitBreakerType.VOLATILITY.value:
-                    # Get reset time from volatility cool-down config
-                    level = self._get_volatility_level_from_status(new_status)
-                    minutes = self.config["volatility"]["cool_down_minutes"].get(
-                        level, 30
-                    )
-                    self.circuit_breakers[key]["auto_reset_at"] = (
-                        now + timedelta(minutes=minutes)
-                    ).isoformat()
-                else:
-                    # For other breaker types, use default reset time from config
-                    config_key = breaker_type
-                    if config_key in self.config:
-                        minutes = self.config[config_key].get("reset_after_minutes", 30)
-                        if minutes > 0:
-                            self.circuit_breakers[key]["auto_reset_at"] = (
-                                now + timedelta(minutes=minutes)
-                            ).isoformat()
-
-        if keys_to_update:
-            self._save_status()
+        if changes:
+            self._commit(changes)
+        else:
+            self._publish(self.circuit_breakers)
 
     def _get_key(self, breaker_type: CircuitBreakerType, scope: Optional[str]) -> str:
         """Generate a unique key for a circuit breaker"""
@@ -568,34 +693,29 @@ class CircuitBreaker:
         """
         Get the status of all circuit breakers or specific ones
         """
-        with self.lock:
-            # Process any auto-resets first
-            self._process_auto_resets()
+        # Process any auto-resets first
+        breakers = self._current_state().breakers
 
-            if breaker_type and scope:
-                key = self._get_key(breaker_type, scope)
-                if key in self.circuit_breakers:
-                    return {key: self.circuit_breakers[key]}
-                return {}
-
-            if breaker_type:
-                # Return all breakers of this type
-                return {
-                    k: v
-                    for k, v in self.circuit_breakers.items()
-                    if k.startswith(breaker_type.value)
-                }
+        if breaker_type and scope:
+            key = self._get_key(breaker_type, scope)
+            if key in breakers:
+                return {key: dict(breakers[key])}
+            return {}
+
+        if breaker_type:
+            # Return all breakers of this type
+            return {
+                k: dict(v)
+                for k, v in breakers.items()
+                if k.startswith(breaker_type.value)
+            }
 
-            if scope:
-                # Return all breakers for this scope
-                return {
-                    k: v
-                    for k, v in self.circuit_breakers.items()
-                    if v.get("scope") == scope
-                }
+        if scope:
+            # Return all breakers for this scope
+            return {k: dict(v) for k, v in breakers.items() if v.get("scope") == scope}
 
-            # Return all breakers
-            return self.circuit_breakers
+        # Return all breakers
+        return {k: dict(v) for k, v in breakers.items()}
 
     def get_active_breakers_count(self) -> Dict[str, Any]:
         """
@@ -606,7 +726,7 @@ class CircuitBreaker:
         """
         counts = {"total": 0, "by_type": {}, "by_status": {}}
 
-        for key, breaker in self.circuit_breakers.items():
+        for key, breaker in self._current_state().breakers.items():
             counts["total"] = counts["total"] + 1
 
             # Count by type
@@ -706,5 +826,12 @@ def get_circuit_breaker(config_path: Optional[str] = None) -> CircuitBreaker:
     """Get the global circuit breaker instance"""
     global _circuit_breaker_instance
     if _circuit_breaker_instance is None:
-        _circuit_breaker_instance = CircuitBreaker(config_path)
+        # Share breaker state across API workers when Redis is configured
+        redis_client = None
+        redis_url = os.environ.get("CIRCUIT_BREAKER_REDIS_URL")
+        if redis_url and REDIS_AVAILABLE:
+            redis_client = redis.Redis.from_url(redis_url)
+        _circuit_breaker_instance = CircuitBreaker(
+            config_path, redis_client=redis_client
+        )
     return _circuit_breaker_instance
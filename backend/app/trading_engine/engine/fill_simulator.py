@@ -0,0 +1,561 @@
+"""
+Execution Simulation
+
+Bar-based fill simulation shared by the backtester and paper trading:
+
+- ``ImpactModel`` implementations price the concession paid by aggressive
+  fills (flat slippage, or the square-root market-impact law)
+- ``FillSimulator`` works a book of resting orders bar by bar with
+  volume-participation limits, queue-position-aware limit fills, stop
+  triggers and partial fills that carry over to later bars
+- ``simulate_schedule`` evaluates child-order schedules (TWAP/VWAP slices)
+  over whole bar histories at once
+
+State is kept in parallel NumPy arrays, so one ``step`` prices every
+working order with a few vectorized operations regardless of how many
+orders are resting.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUY = 1
+SELL = -1
+
+MARKET = 0
+LIMIT = 1
+STOP = 2
+STOP_LIMIT = 3
+
+ORDER_TYPES = {"market": MARKET, "limit": LIMIT, "stop": STOP, "stop_limit": STOP_LIMIT}
+
+# Parkinson range estimator: sigma = ln(high / low) / sqrt(4 ln 2)
+PARKINSON_SCALE = 1.0 / np.sqrt(4.0 * np.log(2.0))
+FILL_EPSILON = 1e-9
+
+
+def _side(side: Union[int, str]) -> int:
+    if isinstance(side, str):
+        return BUY if side.lower() == "buy" else SELL
+    return BUY if side > 0 else SELL
+
+
+def _or_nan(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+
+def range_volatility(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """Per-bar volatility estimated from the high-low range"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.log(high / low) * PARKINSON_SCALE
+    return np.where(np.isfinite(sigma), sigma, 0.0)
+
+
+# ============================================================================
+# Impact models
+# ============================================================================
+
+
+class ImpactModel:
+    """Fractional price concession paid by an aggressive fill."""
+
+    def cost(
+        self, quantity: np.ndarray, volume: np.ndarray, volatility: np.ndarray
+    ) -> np.ndarray:
+        """
+        Price concession as a fraction of the reference price.
+
+        Args:
+            quantity: Filled quantity
+            volume: Volume traded over the same interval
+            volatility: Return volatility over the same interval
+
+        Returns:
+            Non-negative fractions, broadcast over the inputs
+        """
+        raise NotImplementedError
+
+    def cost_bps(self, quantity: Any, volume: Any, volatility: Any) -> np.ndarray:
+        """Price concession in basis points"""
+        return self.cost(quantity, volume, volatility) * 10000.0
+
+
+class FlatSlippage(ImpactModel):
+    """Constant percentage slippage, the backtester's original model."""
+
+    def __init__(self, rate: float = 0.0005):
+        self.rate = rate
+
+    def cost(self, quantity, volume, volatility):
+        return np.full(np.broadcast(quantity, volume, volatility).shape, self.rate)
+
+
+class SquareRootImpact(ImpactModel):
+    """
+    Square-root market impact: half spread + Y * sigma * sqrt(Q / V).
+
+    The law holds across markets with Y of order one when sigma and V are
+    measured over the same interval as the fill.
+    """
+
+    def __init__(
+        self,
+        coefficient: float = 1.0,
+        spread_bps: float = 2.0,
+        max_cost: float = 0.05,
+    ):
+        """
+        Initialize model.
+
+        Args:
+            coefficient: Impact coefficient Y
+            spread_bps: Quoted spread; aggressive fills pay half of it
+            max_cost: Upper bound on the concession (fraction of price)
+        """
+        self.coefficient = coefficient
+        self.half_spread = spread_bps / 20000.0
+        self.max_cost = max_cost
+
+    def cost(self, quantity, volume, volatility):
+        quantity = np.abs(np.asarray(quantity, dtype=float))
+        volume = np.asarray(volume, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            participation = np.where(volume > 0, quantity / volume, 1.0)
+        impact = self.coefficient * np.asarray(volatility) * np.sqrt(participation)
+        return np.minimum(self.half_spread + impact, self.max_cost)
+
+
+# ============================================================================
+# Order book simulation
+# ============================================================================
+
+
+@dataclass
+class Fill:
+    """One execution produced by the simulator"""
+
+    order_id: str
+    symbol: str
+    side: int
+    quantity: float
+    price: float
+    reference_price: float
+    impact_bps: float
+    remaining: float
+
+    @property
+    def complete(self) -> bool:
+        return self.remaining <= FILL_EPSILON
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            "order_id": self.order_id,
+            "symbol": self.symbol,
+            "side": "buy" if self.side == BUY else "sell",
+            "quantity": self.quantity,
+            "price": self.price,
+            "reference_price": self.reference_price,
+            "impact_bps": self.impact_bps,
+            "remaining": self.remaining,
+        }
+
+
+class FillSimulator:
+    """
+    Works resting orders against OHLCV bars.
+
+    Per bar, for every working order:
+
+    - Market orders fill at the open on their first bar and at the typical
+      price ((high + low + close) / 3) while they carry over, plus impact
+    - Stops trigger when the bar trades through the stop and then behave as
+      market (stop) or limit (stop-limit) orders; a gap through the stop
+      fills at the open
+    - Limit orders fill completely when price trades through the limit. When
+      price only touches it, an estimated share of the bar's volume prints at
+      the level and first consumes the queue ahead of the order
+    - Fills on a symbol are capped at ``participation_rate`` of bar volume,
+      shared pro rata between orders; the rest stays working
+    """
+
+    def __init__(
+        self,
+        impact_model: Optional[ImpactModel] = None,
+        participation_rate: Optional[float] = 0.1,
+        queue_depth_fraction: float = 0.05,
+        touch_volume_fraction: float = 0.1,
+    ):
+        """
+        Initialize simulator.
+
+        Args:
+            impact_model: Impact model for aggressive fills
+                (default: SquareRootImpact)
+            participation_rate: Maximum share of bar volume filled per symbol,
+                or None for no limit
+            queue_depth_fraction: Displayed size ahead of a new limit order,
+                as a fraction of the first bar's volume
+            touch_volume_fraction: Share of bar volume assumed to print at the
+                limit price when the bar only touches it
+        """
+        self.impact_model = impact_model or SquareRootImpact()
+        self.participation_rate = participation_rate
+        self.queue_depth_fraction = queue_depth_fraction
+        self.touch_volume_fraction = touch_volume_fraction
+        self.bars_processed = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self._ids: List[str] = []
+        self._symbols: List[str] = []
+        self._side = np.empty(0, dtype=np.int8)
+        self._type = np.empty(0, dtype=np.int8)
+        self._limit = np.empty(0)
+        self._stop = np.empty(0)
+        self._remaining = np.empty(0)
+        self._queue = np.empty(0)
+        self._triggered = np.empty(0, dtype=bool)
+        self._age = np.empty(0, dtype=np.int64)
+
+    def reset(self) -> None:
+        """Drop all working orders"""
+        self._clear()
+        self.bars_processed = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def working_orders(self) -> List[str]:
+        return list(self._ids)
+
+    def submit(
+        self,
+        order_id: str,
+        symbol: str,
+        side: Union[int, str],
+        quantity: float,
+        order_type: Union[int, str] = MARKET,
+        limit_price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+        queue_ahead: Optional[float] = None,
+    ) -> None:
+        """
+        Add a working order; it is first eligible on the next ``step``.
+
+        Args:
+            order_id: Caller's order identifier
+            symbol: Symbol traded
+            side: "buy"/"sell" or +1/-1
+            quantity: Order quantity
+            order_type: "market", "limit", "stop", "stop_limit" (or constant)
+            limit_price: Limit price for limit and stop-limit orders
+            stop_price: Trigger price for stop and stop-limit orders
+            queue_ahead: Known size ahead at the limit; estimated from volume
+                when omitted
+        """
+        kind = ORDER_TYPES[order_type] if isinstance(order_type, str) else order_type
+        if kind in (LIMIT, STOP_LIMIT) and limit_price is None:
+            raise ValueError(f"Order {order_id} needs a limit price")
+        if kind in (STOP, STOP_LIMIT) and stop_price is None:
+            raise ValueError(f"Order {order_id} needs a stop price")
+
+        self._ids.append(order_id)
+        self._symbols.append(symbol)
+        self._side = np.append(self._side, np.int8(_side(side)))
+        self._type = np.append(self._type, np.int8(kind))
+        self._limit = np.append(self._limit, _or_nan(limit_price))
+        self._stop = np.append(self._stop, _or_nan(stop_price))
+        self._remaining = np.append(self._remaining, float(quantity))
+        self._queue = np.append(self._queue, _or_nan(queue_ahead))
+        self._triggered = np.append(self._triggered, False)
+        self._age = np.append(self._age, 0)
+
+    def submit_order(self, order: Any) -> None:
+        """Submit a backtesting ``Order`` for its remaining quantity"""
+        self.submit(
+            order.order_id,
+            order.symbol,
+            order.side.value,
+            order.remaining_quantity,
+            order.order_type.value,
+            order.limit_price,
+            order.stop_price,
+        )
+
+    def cancel(self, order_id: str) -> bool:
+        """Remove a working order; returns False if it is not working"""
+        if order_id not in self._ids:
+            return False
+        keep = np.array([oid != order_id for oid in self._ids], dtype=bool)
+        self._compact(keep)
+        return True
+
+    def _compact(self, keep: np.ndarray) -> None:
+        self._ids = [oid for oid, k in zip(self._ids, keep) if k]
+        self._symbols = [sym for sym, k in zip(self._symbols, keep) if k]
+        self._side = self._side[keep]
+        self._type = self._type[keep]
+        self._limit = self._limit[keep]
+        self._stop = self._stop[keep]
+        self._remaining = self._remaining[keep]
+        self._queue = self._queue[keep]
+        self._triggered = self._triggered[keep]
+        self._age = self._age[keep]
+
+    def step(self, bars: Mapping[str, Any]) -> List[Fill]:
+        """
+        Advance one bar using bar objects keyed by symbol.
+
+        Args:
+            bars: Symbol -> object with open/high/low/close/volume attributes
+
+        Returns:
+            Fills produced on this bar
+        """
+        symbols = list(bars)
+        return self.step_arrays(
+            symbols,
+            np.array([bars[s].open for s in symbols], dtype=float),
+            np.array([bars[s].high for s in symbols], dtype=float),
+            np.array([bars[s].low for s in symbols], dtype=float),
+            np.array([bars[s].close for s in symbols], dtype=float),
+            np.array([bars[s].volume for s in symbols], dtype=float),
+        )
+
+    def step_arrays(
+        self,
+        symbols: Sequence[str],
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+    ) -> List[Fill]:
+        """
+        Advance one bar given per-symbol OHLCV arrays.
+
+        Orders on symbols without a bar are left untouched.
+
+        Returns:
+            Fills produced on this bar
+        """
+        self.bars_processed += 1
+        if not self._ids:
+            return []
+
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        sym = np.array([index.get(s, -1) for s in self._symbols], dtype=np.int64)
+        live = sym >= 0
+        sym = np.where(live, sym, 0)
+
+        o, h, l, c = open_[sym], high[sym], low[sym], close[sym]
+        v = np.asarray(volume, dtype=float)[sym]
+        side = self._side.astype(float)
+        buy = self._side == BUY
+        kind = self._type
+
+        # Stop triggers
+        pending_stop = np.isin(kind, (STOP, STOP_LIMIT)) & ~self._triggered & live
+        hit = np.where(buy, h >= self._stop, l <= self._stop)
+        triggered_now = pending_stop & hit
+        self._triggered |= triggered_now
+
+        aggressive = live & (
+            (kind == MARKET) | ((kind == STOP) & self._triggered)
+        )
+        passive = live & (
+            (kind == LIMIT) | ((kind == STOP_LIMIT) & self._triggered)
+        )
+
+        # Queue position for resting limits, set on their first live bar
+        new_queue = passive & np.isnan(self._queue)
+        self._queue[new_queue] = self.queue_depth_fraction * v[new_queue]
+
+        limit = self._limit
+        through = np.where(buy, l < limit, h > limit)
+        touched = np.where(buy, l <= limit, h >= limit)
+        level_volume = np.where(touched, self.touch_volume_fraction * v, 0.0)
+        after_queue = np.maximum(level_volume - np.nan_to_num(self._queue), 0.0)
+        passive_cap = np.where(through, np.inf, after_queue)
+        queue_update = passive & touched & ~through
+        self._queue[queue_update] = np.maximum(
+            self._queue[queue_update] - level_volume[queue_update], 0.0
+        )
+        self._queue[passive & through] = 0.0
+
+        wanted = np.where(
+            aggressive,
+            self._remaining,
+            np.where(passive & touched, np.minimum(self._remaining, passive_cap), 0.0),
+        )
+
+        # Participation limit, shared pro rata between orders on a symbol
+        if self.participation_rate is not None:
+            demand = np.bincount(sym, weights=wanted, minlength=len(symbols))
+            capacity = self.participation_rate * np.asarray(volume, dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(demand > capacity, capacity / demand, 1.0)
+            wanted = wanted * scale[sym]
+
+        # Prices
+        typical = (h + l + c) / 3.0
+        first_bar = self._age == 0
+        gap_stop = np.where(buy, np.maximum(o, self._stop), np.minimum(o, self._stop))
+        reference = np.where(
+            triggered_now & (kind == STOP),
+            gap_stop,
+            np.where(first_bar & (kind == MARKET), o, typical),
+        )
+        impact = self.impact_model.cost(wanted, v, range_volatility(h, l))
+        aggressive_price = reference * (1.0 + side * impact)
+        # Limits fill at the limit, or at the open when it gaps through
+        passive_price = np.where(buy, np.minimum(o, limit), np.maximum(o, limit))
+        price = np.where(aggressive, aggressive_price, passive_price)
+        reference = np.where(aggressive, reference, passive_price)
+        impact_bps = np.where(aggressive, impact * 10000.0, 0.0)
+
+        self._remaining = self._remaining - wanted
+        self._age = self._age + live
+
+        fills = [
+            Fill(
+                order_id=self._ids[i],
+                symbol=self._symbols[i],
+                side=int(self._side[i]),
+                quantity=float(wanted[i]),
+                price=float(price[i]),
+                reference_price=float(reference[i]),
+                impact_bps=float(impact_bps[i]),
+                remaining=float(max(self._remaining[i], 0.0)),
+            )
+            for i in np.flatnonzero(wanted > FILL_EPSILON)
+        ]
+
+        done = self._remaining <= FILL_EPSILON
+        if done.any():
+            self._compact(~done)
+        return fills
+
+    def quote_fill(
+        self,
+        side: Union[int, str],
+        quantity: float,
+        price: float,
+        volume: float,
+        volatility: float,
+    ) -> Dict[str, float]:
+        """
+        Immediate aggressive fill against a quote rather than a bar.
+
+        Args:
+            side: "buy"/"sell" or +1/-1
+            quantity: Requested quantity
+            price: Reference (quote) price
+            volume: Volume available over the execution horizon
+            volatility: Return volatility over the same horizon
+
+        Returns:
+            Dict with filled_quantity, execution_price and impact_bps
+        """
+        filled = quantity
+        if self.participation_rate is not None and volume > 0:
+            filled = min(quantity, self.participation_rate * volume)
+        impact = float(self.impact_model.cost(filled, volume, volatility))
+        return {
+            "filled_quantity": filled,
+            "execution_price": price * (1.0 + _side(side) * impact),
+            "impact_bps": impact * 10000.0,
+        }
+
+
+# ============================================================================
+# Schedule evaluation
+# ============================================================================
+
+
+@dataclass
+class ScheduleResult:
+    """Per-bar fills and summary costs of child-order schedules"""
+
+    fills: np.ndarray
+    prices: np.ndarray
+    average_price: np.ndarray
+    shortfall_bps: np.ndarray
+    unfilled: np.ndarray
+
+
+def simulate_schedule(
+    side: Union[int, str],
+    schedule: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    participation_rate: Optional[float] = 0.1,
+    impact_model: Optional[ImpactModel] = None,
+) -> ScheduleResult:
+    """
+    Evaluate child-order schedules over bar histories in one pass.
+
+    Each bar releases ``schedule`` shares; whatever exceeds the participation
+    cap carries over to later bars. The carried backlog follows
+    ``F_t = min(D_t, F_{t-1} + cap_t)`` for cumulative demand ``D`` and fills
+    ``F``, which has the closed form ``C_t + min(0, min_{s<=t}(D_s - C_s))``
+    for cumulative capacity ``C``, so no Python loop over bars is needed.
+
+    Args:
+        side: "buy"/"sell" or +1/-1
+        schedule: Shares released per bar, shape ``(bars,)`` or
+            ``(schedules, bars)``
+        open_, high, low, close, volume: Bar arrays broadcastable to schedule
+        participation_rate: Maximum share of bar volume, or None for no cap
+        impact_model: Impact model (default: SquareRootImpact)
+
+    Returns:
+        ScheduleResult; shortfall is measured against the first bar's open
+    """
+    model = impact_model or SquareRootImpact()
+    sign = _side(side)
+    schedule = np.asarray(schedule, dtype=float)
+    volume = np.broadcast_to(np.asarray(volume, dtype=float), schedule.shape)
+
+    demand = np.cumsum(schedule, axis=-1)
+    if participation_rate is None:
+        filled_cum = demand
+    else:
+        capacity = np.cumsum(participation_rate * volume, axis=-1)
+        backlog = np.minimum.accumulate(demand - capacity, axis=-1)
+        filled_cum = capacity + np.minimum(backlog, 0.0)
+    fills = np.diff(filled_cum, axis=-1, prepend=0.0)
+    fills = np.maximum(fills, 0.0)
+
+    typical = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3.0
+    sigma = range_volatility(high, low)
+    prices = typical * (1.0 + sign * model.cost(fills, volume, sigma))
+    prices = np.broadcast_to(prices, schedule.shape)
+
+    total = fills.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = np.where(total > 0, (fills * prices).sum(axis=-1) / total, np.nan)
+        arrival = np.broadcast_to(np.asarray(open_, dtype=float), schedule.shape)[
+            ..., 0
+        ]
+        shortfall = sign * (average / arrival - 1.0) * 10000.0
+
+    return ScheduleResult(
+        fills=fills,
+        prices=prices,
+        average_price=average,
+        shortfall_bps=shortfall,
+        unfilled=demand[..., -1] - filled_cum[..., -1],
+    )
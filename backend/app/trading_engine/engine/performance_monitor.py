@@ -15,12 +15,90 @@ from ...models.trade import Trade
 logger = logging.getLogger(__name__)
 
 
+class TradeStatsAccumulator:
+    """
+    Running trade statistics for one user, updated one fill at a time.
+
+    Drawdown is measured on `base_value` (the portfolio value when tracking
+    started) plus cumulative trade P&L; ROI mean and deviation use Welford's
+    online update.
+    """
+
+    def __init__(self, base_value: float):
+        self.base_value = base_value
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.losing_trades = 0
+        self.largest_gain = 0.0
+        self.largest_loss = 0.0
+        self.running_pl = 0.0
+        self.peak_value = base_value
+        self.max_drawdown = 0.0
+        self.roi_mean = 0.0
+        self.roi_m2 = 0.0
+        self.last_filled_at: Optional[datetime] = None
+        # Trades sharing the latest fill time, so the next query can use >=
+        self.seen_at_last_filled: set = set()
+
+    def add(
+        self, pl: float, roi: float, filled_at: Optional[datetime], trade_id: int
+    ) -> None:
+        self.total_trades += 1
+        if pl > 0:
+            self.winning_trades += 1
+            self.largest_gain = max(self.largest_gain, pl)
+        else:
+            self.losing_trades += 1
+            self.largest_loss = min(self.largest_loss, pl)
+
+        self.running_pl += pl
+        value = self.base_value + self.running_pl
+        self.peak_value = max(self.peak_value, value)
+        if self.peak_value:
+            self.max_drawdown = max(
+                self.max_drawdown, (self.peak_value - value) / self.peak_value
+            )
+
+        delta = roi - self.roi_mean
+        self.roi_mean += delta / self.total_trades
+        self.roi_m2 += delta * (roi - self.roi_mean)
+
+        if filled_at is not None:
+            if filled_at != self.last_filled_at:
+                self.last_filled_at = filled_at
+                self.seen_at_last_filled = set()
+            self.seen_at_last_filled.add(trade_id)
+
+    def metrics(self, risk_free_rate: float) -> Dict:
+        metrics = {
+            "total_trades": self.total_trades,
+            "winning_trades": self.winning_trades,
+            "losing_trades": self.losing_trades,
+            "total_profit_loss": float(self.running_pl),
+            "largest_gain": self.largest_gain,
+            "largest_loss": self.largest_loss,
+            "average_roi": self.roi_mean if self.total_trades else 0,
+            "sharpe_ratio": 0,
+            "max_drawdown": float(self.max_drawdown),
+        }
+        if not self.total_trades:
+            return metrics
+
+        metrics["win_rate"] = self.winning_trades / self.total_trades
+        if self.total_trades > 1:
+            returns_std = (self.roi_m2 / self.total_trades) ** 0.5
+            if returns_std > 0:
+                metrics["sharpe_ratio"] = (self.roi_mean - risk_free_rate) / returns_std
+        return metrics
+
+
 class PerformanceMonitor:
     def __init__(self, db: Session):
         self.db = db
         self.metrics_cache = {}
         self.last_update = datetime.now()
         self.update_interval = timedelta(minutes=5)
+        self.trade_stats: Dict[int, "TradeStatsAccumulator"] = {}
 
     async def record_trade(self, trade: Trade):
         """Record and analyze a completed trade"""
@@ -177,76 +255,35 @@ class PerformanceMonitor:
             logger.error(f"Error updating metrics: {str(e)}")
 
     async def _calculate_portfolio_metrics(self, portfolio: Portfolio) -> Dict:
-        """Calculate comprehensive portfolio metrics"""
-        metrics = {
-            "total_trades": 0,
-            "winning_trades": 0,
-            "losing_trades": 0,
-            "total_profit_loss": 0,
-            "largest_gain": 0,
-            "largest_loss": 0,
-            "average_roi": 0,
-            "sharpe_ratio": 0,
-            "max_drawdown": 0,
-        }
-
-        # Get all trades for portfolio
-        trades = (
-            self.db.query(Trade)
-            .filter(Trade.user_id == portfolio.user_id, Trade.status == "FILLED")
-            .order_by(Trade.filled_at)
-            .all()
-        )
-
-        if not trades:
-            return metrics
+        """
+        Calculate comprehensive portfolio metrics.
+
+        Trade statistics are kept per user and only trades filled since the
+        previous call are folded in, instead of replaying the full history.
+        """
+        stats = self.trade_stats.get(portfolio.user_id)
+        if stats is None:
+            stats = self.trade_stats[portfolio.user_id] = TradeStatsAccumulator(
+                base_value=float(portfolio.total_value or 0)
+            )
 
-        # Calculate metrics
-        daily_returns = []
-        running_pl = 0
-        peak_value = portfolio.total_value
-        max_drawdown = 0
-
-        for trade in trades:
-            pl = self._calculate_trade_pl(trade)
-            running_pl += pl
-
-            # Update metrics
-            metrics["total_trades"] += 1
-            if pl > 0:
-                metrics["winning_trades"] += 1
-                metrics["largest_gain"] = max(metrics["largest_gain"], float(pl))
-            else:
-                metrics["losing_trades"] += 1
-                metrics["largest_loss"] = min(metrics["largest_loss"], float(pl))
-
-            # Calculate drawdown
-            peak_value = max(peak_value, portfolio.total_value + running_pl)
-            drawdown = (peak_value - (portfolio.total_value + running_pl)) / peak_value
-            max_drawdown = max(max_drawdown, drawdown)
-
-            # Record daily return
-            daily_returns.append(float(self._calculate_roi(trade)))
-
-        # Calculate aggregate metrics
-        metrics["total_profit_loss"] = float(running_pl)
-        metrics["win_rate"] = (
-            metrics["winning_trades"] / metrics["total_trades"]
-            if metrics["total_trades"] > 0
-            else 0
+        query = self.db.query(Trade).filter(
+            Trade.user_id == portfolio.user_id, Trade.status == "FILLED"
         )
-        metrics["average_roi"] = np.mean(daily_returns) if daily_returns else 0
-        metrics["max_drawdown"] = float(max_drawdown)
-
-        # Calculate Sharpe Ratio
-        if len(daily_returns) > 1:
-            returns_std = np.std(daily_returns)
-            if returns_std > 0:
-                metrics["sharpe_ratio"] = (
-                    np.mean(daily_returns) - settings.RISK_FREE_RATE
-                ) / returns_std
+        if stats.last_filled_at is not None:
+            query = query.filter(Trade.filled_at >= stats.last_filled_at)
+
+        for trade in query.order_by(Trade.filled_at, Trade.id).all():
+            if trade.id in stats.seen_at_last_filled:
+                continue
+            stats.add(
+                float(self._calculate_trade_pl(trade)),
+                float(self._calculate_roi(trade)),
+                trade.filled_at,
+                trade.id,
+            )
 
-        return metrics
+        return stats.metrics(settings.RISK_FREE_RATE)
 
     async def _calculate_daily_metrics(self, portfolio: Portfolio) -> Dict:
         """Calculate daily performance metrics"""
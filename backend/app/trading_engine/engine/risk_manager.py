@@ -10,6 +10,11 @@ from ...models.holding import Position
 from ...models.portfolio import Portfolio
 from ...models.trade import Trade
 from ...services.market_data import MarketDataService
+from ...services.risk_engine import (
+    PortfolioRiskEngine,
+    compute_portfolio_metrics,
+    get_risk_engine,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,8 +34,10 @@ class RiskManager:
         max_daily_drawdown: float = 0.02,  # 2% daily drawdown limit
         max_total_drawdown: float = 0.1,  # 10% total drawdown limit
         risk_free_rate: float = 0.02,  # 2% annual risk-free rate
+        risk_engine: Optional[PortfolioRiskEngine] = None,
     ):
         self.market_data_service = market_data_service
+        self.risk_engine = risk_engine or get_risk_engine(market_data_service)
         self.max_position_size = max_position_size
         self.max_correlation = max_correlation
         self.max_daily_drawdown = max_daily_drawdown
@@ -150,38 +157,52 @@ class RiskManager:
     async def _calculate_portfolio_metrics(self, portfolio: Portfolio) -> Dict:
         """Calculate comprehensive portfolio risk metrics"""
         try:
-            # Get historical data for all positions
-            position_returns = {}
-            for position in portfolio.positions_detail:
-                data = await self.market_data_service.get_historical_data(
-                    position.symbol, start_date=datetime.now() - timedelta(days=252)
-                )
-                position_returns[position.symbol] = data["Close"].pct_change().dropna()
-
-            # Calculate portfolio returns
-            portfolio_returns = self._calculate_weighted_returns(
-                position_returns, portfolio
+            # One aligned returns matrix for all positions plus the benchmark,
+            # served from the shared risk engine cache
+            weights = self._position_weights(portfolio)
+            symbols = list(weights.keys()) + ["SPY"]
+            matrix = await self.risk_engine.get_returns_matrix(
+                symbols, lookback_days=252
             )
 
-            # Calculate risk metrics
-            volatility = float(portfolio_returns.std() * np.sqrt(252))  # Annualized
-            sharpe_ratio = self._calculate_sharpe_ratio(portfolio_returns)
-            max_drawdown = self._calculate_max_drawdown(portfolio_returns)
-            var = self._calculate_value_at_risk(portfolio_returns)
+            assets = matrix.select([s for s in matrix.symbols if s in weights])
+            benchmark_returns = (
+                matrix.returns[:, matrix.symbol_index["SPY"]]
+                if "SPY" in matrix.symbol_index
+                else None
+            )
+            metrics = compute_portfolio_metrics(
+                assets.returns,
+                assets.weights_for(weights),
+                benchmark_returns=benchmark_returns,
+                risk_free_rate=self.risk_free_rate,
+            )
 
             return {
-                "volatility": volatility,
-                "sharpe_ratio": sharpe_ratio,
-                "max_drawdown": max_drawdown,
-                "value_at_risk": var,
-                "correlations": self._calculate_correlations(position_returns),
-                "beta": self._calculate_portfolio_beta(position_returns, portfolio),
+                "volatility": float(metrics["volatility"][0]),  # Annualized
+                "sharpe_ratio": float(metrics["sharpe_ratio"][0]),
+                # Drawdown as a negative fraction, VaR as a return quantile
+                "max_drawdown": -float(metrics["max_drawdown"][0]),
+                "current_drawdown": float(metrics["current_drawdown"][0]),
+                "value_at_risk": -float(metrics["historical_var"][0]),
+                "conditional_value_at_risk": -float(metrics["historical_cvar"][0]),
+                "correlations": self.risk_engine.correlation_matrix(assets).to_dict(),
+                "beta": float(metrics["beta"][0]),
             }
 
         except Exception as e:
             logger.error(f"Error calculating portfolio metrics: {str(e)}")
             return {}
 
+    def _position_weights(self, portfolio: Portfolio) -> Dict[str, float]:
+        """Current position weights keyed by upper-case symbol"""
+        weights = {}
+        for position in portfolio.positions_detail:
+            weights[position.symbol.upper()] = float(
+                position.quantity * position.current_price / portfolio.total_value
+            )
+        return weights
+
     def _calculate_weighted_returns(
         self, position_returns: Dict[str, pd.Series], portfolio: Portfolio
     ) -> pd.Series:
@@ -259,19 +280,19 @@ class RiskManager:
     ) -> bool:
         """Check if adding a new position would exceed correlation limits"""
         try:
-            # Get returns for existing positions and new symbol
-            position_returns = {}
-            for position in portfolio.positions_detail:
-                data = await self.market_data_service.get_historical_data(
-                    position.symbol, start_date=datetime.now() - timedelta(days=252)
-                )
-                position_returns[position.symbol] = data["Close"].pct_change().dropna()
-
-            # Add new symbol
-            new_data = await self.market_data_service.get_historical_data(
-                new_symbol, start_date=datetime.now() - timedelta(days=252)
+            # Get aligned returns for existing positions and the new symbol
+            symbols = [p.symbol.upper() for p in portfolio.positions_detail]
+            new_symbol = new_symbol.upper()
+            matrix = await self.risk_engine.get_returns_matrix(
+                symbols + [new_symbol], lookback_days=252
             )
-            new_returns = new_data["Close"].pct_change().dropna()
+            returns_df = matrix.to_frame(dropna=False)
+            if new_symbol not in returns_df.columns:
+                return False
+            new_returns = returns_df[new_symbol]
+            position_returns = {
+                s: returns_df[s] for s in symbols if s in returns_df.columns
+            }
 
             # Calculate correlations
             for symbol, returns in position_returns.items():
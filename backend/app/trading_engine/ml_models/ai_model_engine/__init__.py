@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 # Optional quantum models (requires qiskit)
 try:
     from .quantum_models import (  # noqa: E402
+        KernelMatrixCache,
         QuantumFeatureEncoder,
         QuantumKernelClassifier,
         QuantumVariationalClassifier,
@@ -19,6 +20,7 @@ try:
 
     _QUANTUM_AVAILABLE = True
 except ImportError:
+    KernelMatrixCache = None
     QuantumFeatureEncoder = None
     QuantumKernelClassifier = None
     QuantumVariationalClassifier = None
@@ -94,6 +96,7 @@ from .wealth_model_loader import (  # noqa: E402
 
 __all__ = [
     # Quantum models (optional - requires qiskit)
+    "KernelMatrixCache",
     "QuantumFeatureEncoder",
     "QuantumKernelClassifier",
     "QuantumVariationalClassifier",
@@ -3,17 +3,21 @@ Quantum Machine Learning models for the trading engine.
 """
 
 import datetime
+import hashlib
 import json
 import logging
 import os
 import pickle
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from qiskit import QuantumCircuit
 from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
 
 # Updated imports for newer Qiskit versions
 try:
@@ -73,13 +77,6 @@ execute = execute_circuit
 from qiskit.circuit.library import RealAmplitudes, ZZFeatureMap
 from qiskit_aer import Aer
 
-try:
-    from qiskit_machine_learning.algorithms import QSVC
-    from qiskit_machine_learning.kernels import QuantumKernel
-except ImportError:
-    print(
-        "Warning: qiskit_machine_learning not available. Some functionality may be limited."
-    )
 try:
     from qiskit.primitives import Sampler
 except ImportError:
@@ -199,7 +196,11 @@ class QuantumFeatureEncoder:
     """
 
     def __init__(
-        self, n_qubits: int = 4, reps: int = 2, feature_selection: str = "pca"
+        self,
+        n_qubits: int = 4,
+        reps: int = 2,
+        feature_selection: str = "pca",
+        entanglement: str = "full",
     ):
         """
         Initialize the quantum feature encoder
@@ -209,9 +210,12 @@ class QuantumFeatureEncoder:
             reps: Number of repetitions in the feature map circuit
             feature_selection: Method for feature selection/dimensionality reduction
                               ('pca', 'variance', 'correlation', or 'simple')
+            entanglement: Entanglement strategy of the feature map
+                          ('full', 'linear', 'circular', ...)
         """
         self.n_qubits = n_qubits
         self.reps = reps
+        self.entanglement = entanglement
         self.scaler = StandardScaler()
         self.feature_selection = feature_selection
         self.pca = None
@@ -495,11 +499,225 @@ class QuantumFeatureEncoder:
         """
         # Using ZZFeatureMap which encodes classical data into quantum states
         feature_map = ZZFeatureMap(
-            feature_dimension=self.n_qubits, reps=self.reps, entanglement="full"
+            feature_dimension=self.n_qubits,
+            reps=self.reps,
+            entanglement=self.entanglement,
         )
         return feature_map
 
 
+def _feature_map_statevectors(
+    n_qubits: int, reps: int, entanglement: str, X: np.ndarray
+) -> np.ndarray:
+    """
+    Simulate the ZZ feature map statevector for every row of X.
+
+    Module-level so it can run in a worker process: the feature map is
+    built once per block and only the parameters are rebound per sample.
+
+    Args:
+        n_qubits: Feature dimension / number of qubits
+        reps: Feature map repetitions
+        entanglement: Feature map entanglement strategy
+        X: Encoded features (samples, n_qubits)
+
+    Returns:
+        Complex array (samples, 2 ** n_qubits) of statevectors
+    """
+    feature_map = ZZFeatureMap(
+        feature_dimension=n_qubits, reps=reps, entanglement=entanglement
+    )
+    parameters = list(feature_map.parameters)
+    states = np.empty((len(X), 2**n_qubits), dtype=np.complex128)
+    for i, x in enumerate(X):
+        bound = feature_map.assign_parameters(dict(zip(parameters, x)))
+        states[i] = qi.Statevector(bound).data
+    return states
+
+
+class KernelMatrixCache:
+    """
+    Content-addressed cache for quantum kernel matrix blocks.
+
+    A block K(X_a, X_b) is keyed by the feature map configuration and a hash
+    of the encoded feature arrays, so any change to the encoder state (scaler,
+    PCA, feature selection) or the data yields a new key. Blocks are kept in
+    memory and, when a cache directory is given, persisted as .npy files so
+    they survive across processes and nightly runs.
+
+    Statevectors are simulated once per sample (optionally across a process
+    pool) and the Gram block is computed as |<psi(a)|psi(b)>|^2 with a single
+    matrix product, instead of one fidelity circuit per kernel entry.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        n_jobs: int = 1,
+        chunk_size: int = 64,
+        max_memory_blocks: int = 128,
+    ):
+        """
+        Initialize the kernel cache
+
+        Args:
+            cache_dir: Directory for persisted blocks (None for memory only)
+            n_jobs: Worker processes used to simulate statevectors
+            chunk_size: Samples per worker task
+            max_memory_blocks: Number of blocks retained in memory
+        """
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.max_memory_blocks = max_memory_blocks
+
+        self._blocks: Dict[str, np.ndarray] = {}
+        self._states: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def data_hash(X: np.ndarray) -> str:
+        """Hash the contents, dtype and shape of an array"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        digest = hashlib.sha256()
+        digest.update(str(X.shape).encode())
+        digest.update(X.tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def block_key(spec: Tuple, X_a: np.ndarray, X_b: np.ndarray) -> str:
+        """Key for the kernel block between two encoded arrays"""
+        digest = hashlib.sha256(repr(spec).encode())
+        digest.update(KernelMatrixCache.data_hash(X_a).encode())
+        digest.update(KernelMatrixCache.data_hash(X_b).encode())
+        return digest.hexdigest()
+
+    def _block_path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"kernel_{key}.npy")
+
+    def _remember(self, key: str, block: np.ndarray) -> None:
+        with self._lock:
+            if len(self._blocks) >= self.max_memory_blocks:
+                # Drop the oldest block (dicts preserve insertion order)
+                self._blocks.pop(next(iter(self._blocks)))
+            self._blocks[key] = block
+
+    def statevectors(self, spec: Tuple, X: np.ndarray) -> np.ndarray:
+        """
+        Simulate (or reuse) statevectors for every sample of X
+
+        Args:
+            spec: (n_qubits, reps, entanglement) of the feature map
+            X: Encoded features
+
+        Returns:
+            Complex statevector matrix (samples, 2 ** n_qubits)
+        """
+        key = hashlib.sha256((repr(spec) + self.data_hash(X)).encode()).hexdigest()
+        with self._lock:
+            cached = self._states.get(key)
+        if cached is not None:
+            return cached
+
+        n_qubits, reps, entanglement = spec
+        if self.n_jobs > 1 and len(X) > self.chunk_size:
+            chunks = [
+                X[i : i + self.chunk_size] for i in range(0, len(X), self.chunk_size)
+            ]
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+                parts = list(
+                    pool.map(
+                        _feature_map_statevectors,
+                        [n_qubits] * len(chunks),
+                        [reps] * len(chunks),
+                        [entanglement] * len(chunks),
+                        chunks,
+                    )
+                )
+            states = np.vstack(parts)
+        else:
+            states = _feature_map_statevectors(n_qubits, reps, entanglement, X)
+
+        with self._lock:
+            if len(self._states) >= self.max_memory_blocks:
+                self._states.pop(next(iter(self._states)))
+            self._states[key] = states
+        return states
+
+    def kernel_matrix(
+        self, spec: Tuple, X_a: np.ndarray, X_b: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Get the fidelity kernel block K(X_a, X_b), computing it on a miss
+
+        Args:
+            spec: (n_qubits, reps, entanglement) of the feature map
+            X_a: Encoded features for the rows
+            X_b: Encoded features for the columns (defaults to X_a)
+
+        Returns:
+            Kernel matrix of shape (len(X_a), len(X_b))
+        """
+        symmetric = X_b is None
+        X_b = X_a if symmetric else X_b
+        key = self.block_key(spec, X_a, X_b)
+
+        with self._lock:
+            block = self._blocks.get(key)
+        if block is not None:
+            self.hits += 1
+            return block
+
+        path = self._block_path(key)
+        if path and os.path.exists(path):
+            block = np.load(path)
+            self.hits += 1
+            self._remember(key, block)
+            return block
+
+        self.misses += 1
+        states_a = self.statevectors(spec, X_a)
+        states_b = states_a if symmetric else self.statevectors(spec, X_b)
+        block = np.abs(states_a.conj() @ states_b.T) ** 2
+
+        if path:
+            try:
+                # Write then rename so concurrent readers never see partial files
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, block)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not persist kernel block: {str(e)}")
+        self._remember(key, block)
+        return block
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks and in-memory blocks are not persisted with pickled models
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_blocks"] = {}
+        state["_states"] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        """Drop in-memory blocks (persisted blocks are kept)"""
+        with self._lock:
+            self._blocks.clear()
+            self._states.clear()
+
+
 class QuantumKernelClassifier:
     """
     Quantum Kernel-based classifier using quantum feature maps with
@@ -514,6 +732,8 @@ class QuantumKernelClassifier:
         feature_selection: str = "pca",
         regularization: float = 1.0,
         noise_mitigation: bool = True,
+        kernel_cache: Optional[KernelMatrixCache] = None,
+        entanglement: str = "full",
     ):
         """
         Initialize the quantum kernel classifier
@@ -525,9 +745,13 @@ class QuantumKernelClassifier:
             feature_selection: Feature selection method ('pca', 'variance', 'correlation')
             regularization: Regularization strength (C parameter in SVC)
             noise_mitigation: Whether to apply quantum noise mitigation techniques
+            kernel_cache: Shared kernel matrix cache (a private in-memory
+                cache is created if None)
+            entanglement: Entanglement strategy of the feature map
         """
         self.n_qubits = n_qubits
         self.feature_map_reps = feature_map_reps
+        self.entanglement = entanglement
         self.backend_name = backend_name
         self.feature_selection = feature_selection
         self.regularization = regularization
@@ -569,6 +793,7 @@ class QuantumKernelClassifier:
             n_qubits=n_qubits,
             reps=feature_map_reps,
             feature_selection=feature_selection,
+            entanglement=entanglement,
         )
         self.feature_map = None
         self.kernel = None
@@ -576,6 +801,11 @@ class QuantumKernelClassifier:
         self.training_metadata = {}
         self.validation_scores = {}
 
+        # Precomputed-kernel state: the SVC is trained on a cached Gram
+        # matrix and new samples are compared against the training set
+        self.kernel_cache = kernel_cache or KernelMatrixCache()
+        self._X_train_transformed = None
+
     def save(
         self, model_name: str = "quantum_kernel_classifier", model_dir: str = "models"
     ) -> str:
@@ -617,6 +847,7 @@ class QuantumKernelClassifier:
         metadata = {
             "n_qubits": self.n_qubits,
             "feature_map_reps": self.feature_map_reps,
+            "entanglement": self.entanglement,
             "backend_name": self.backend_name,
             "feature_selection": self.feature_selection,
             "regularization": self.regularization,
@@ -692,24 +923,22 @@ class QuantumKernelClassifier:
             except Exception as e:
                 logger.warning(f"Could not apply noise mitigation: {str(e)}")
 
-        # Create quantum kernel
+        # Train an SVM on the cached quantum Gram matrix
         try:
-            sampler = Sampler()
-            self.kernel = QuantumKernel(feature_map=self.feature_map, primitive=sampler)
-
-            # Train quantum SVM with the kernel
-            self.qsvc = QSVC(quantum_kernel=self.kernel, C=C, class_weight=class_weight)
-
-            # Fit the model
-            self.qsvc.fit(X_train_transformed, y_train)
+            K_train = self._kernel(X_train_transformed)
+            self.qsvc = SVC(kernel="precomputed", C=C, class_weight=class_weight)
+            self.qsvc.fit(K_train, y_train)
+            self._X_train_transformed = X_train_transformed
 
             # Calculate training metrics
-            y_train_pred = self.qsvc.predict(X_train_transformed)
+            y_train_pred = self.qsvc.predict(K_train)
             train_accuracy = accuracy_score(y_train, y_train_pred)
             train_f1 = f1_score(y_train, y_train_pred, average="weighted")
 
             # Calculate validation metrics
-            y_val_pred = self.qsvc.predict(X_val_transformed)
+            y_val_pred = self.qsvc.predict(
+                self._kernel(X_val_transformed, X_train_transformed)
+            )
             val_accuracy = accuracy_score(y_val, y_val_pred)
             val_f1 = f1_score(y_val, y_val_pred, average="weighted")
 
@@ -793,29 +1022,24 @@ class QuantumKernelClassifier:
         # Create feature map
         self.feature_map = self.encoder.create_feature_map()
 
-        # Create quantum kernel
-        sampler = Sampler()
-        self.kernel = QuantumKernel(feature_map=self.feature_map, primitive=sampler)
+        # One Gram matrix serves every fold and every C value
+        K = self._kernel(X_transformed)
+        folds = list(cv.split(X_transformed, y))
 
         best_score = -np.inf
         best_params = None
 
         for C in C_values:
             scores = []
-            for train_idx, test_idx in cv.split(X_transformed, y):
-                # Split data for this fold
-                X_train_fold, X_test_fold = (
-                    X_transformed[train_idx],
-                    X_transformed[test_idx],
-                )
+            for train_idx, test_idx in folds:
                 y_train_fold, y_test_fold = y[train_idx], y[test_idx]
 
                 # Create and train model with current parameters
-                qsvc = QSVC(quantum_kernel=self.kernel, C=C)
-                qsvc.fit(X_train_fold, y_train_fold)
+                svc = SVC(kernel="precomputed", C=C)
+                svc.fit(K[np.ix_(train_idx, train_idx)], y_train_fold)
 
                 # Evaluate
-                score = qsvc.score(X_test_fold, y_test_fold)
+                score = svc.score(K[np.ix_(test_idx, train_idx)], y_test_fold)
                 scores.append(score)
 
             # Calculate mean and std of scores
@@ -862,8 +1086,8 @@ class QuantumKernelClassifier:
         # Transform features
         X_transformed = self.encoder.transform(X)
 
-        # Make predictions
-        return self.qsvc.predict(X_transformed)
+        # Make predictions against the training set kernel
+        return self.qsvc.predict(self._kernel(X_transformed, self._X_train_transformed))
 
     def predict_proba(self, X: np.ndarray) -> np.ndarray:
         """
@@ -879,10 +1103,12 @@ class QuantumKernelClassifier:
             raise ValueError("Model has not been fitted yet")
 
         # Check if SVC has predict_proba (needs probability=True)
-        if not hasattr(self.qsvc, "predict_proba"):
+        X_transformed = self.encoder.transform(X)
+        K = self._kernel(X_transformed, self._X_train_transformed)
+
+        if not self.qsvc.probability:
             # Fall back to decision function
-            X_transformed = self.encoder.transform(X)
-            decision_values = self.qsvc.decision_function(X_transformed)
+            decision_values = self.qsvc.decision_function(K)
 
             # Convert decision values to probabilities using sigmoid function
             def sigmoid(x):
@@ -891,11 +1117,25 @@ class QuantumKernelClassifier:
             probs = sigmoid(decision_values)
             return np.vstack([1 - probs, probs]).T
 
-        # Transform features
-        X_transformed = self.encoder.transform(X)
-
         # Return probabilities
-        return self.qsvc.predict_proba(X_transformed)
+        return self.qsvc.predict_proba(K)
+
+    def _kernel_spec(self) -> Tuple[int, int, str]:
+        """Feature map configuration used as part of the kernel cache key"""
+        return (self.n_qubits, self.feature_map_reps, self.entanglement)
+
+    def _kernel(self, X_a: np.ndarray, X_b: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Get the quantum kernel block between encoded feature arrays
+
+        Args:
+            X_a: Encoded features for the rows
+            X_b: Encoded features for the columns (defaults to X_a)
+
+        Returns:
+            Kernel matrix from the shared cache
+        """
+        return self.kernel_cache.kernel_matrix(self._kernel_spec(), X_a, X_b)
 
     def score(self, X: np.ndarray, y: np.ndarray) -> Dict[str, float]:
         """
@@ -1008,6 +1248,7 @@ class QuantumVariationalClassifier:
         )
         self.feature_map = None
         self.variational_form = None
+        self._template = None
         self.circuit = None
         self.optimal_params = None
         self.training_metadata = {}
@@ -1077,46 +1318,76 @@ class QuantumVariationalClassifier:
 
         return metadata
 
-    def _create_circuit(
-        self, x: np.ndarray, params: np.ndarray = None
-    ) -> QuantumCircuit:
+    def _circuit_template(self) -> Tuple[QuantumCircuit, List, List]:
         """
-        Create quantum circuit with feature map and variational form
-
-        Args:
-            x: Input feature vector
-            params: Parameters for the variational form
+        Build (once) the parameterized feature map + variational circuit
 
         Returns:
-            Quantum circuit
+            Tuple of (circuit, feature parameters, variational parameters)
         """
-        # Create feature map circuit
-        self.feature_map = ZZFeatureMap(
-            feature_dimension=self.n_qubits,
-            reps=self.feature_map_reps,
-            entanglement="full",
-        )
+        if self._template is None:
+            feature_map = ZZFeatureMap(
+                feature_dimension=self.n_qubits,
+                reps=self.feature_map_reps,
+                entanglement="full",
+            )
+            variational_form = RealAmplitudes(
+                num_qubits=self.n_qubits,
+                reps=self.variational_form_reps,
+                entanglement="full",
+            )
+            circuit = QuantumCircuit(self.n_qubits)
+            circuit.compose(feature_map, inplace=True)
+            circuit.compose(variational_form, inplace=True)
+            circuit.measure_all()
+
+            self.feature_map = feature_map
+            self.variational_form = variational_form
+            self._template = (
+                circuit,
+                list(feature_map.parameters),
+                list(variational_form.parameters),
+            )
+        return self._template
 
-        # Create variational form with more expressive ansatz
-        self.variational_form = RealAmplitudes(
-            num_qubits=self.n_qubits,
-            reps=self.variational_form_reps,
-            entanglement="full",
-        )
+    def _batch_probabilities(
+        self, X: np.ndarray, params: np.ndarray, chunk_size: int = 256
+    ) -> np.ndarray:
+        """
+        Evaluate the classifier circuit for many samples in batched jobs
 
-        # Combine feature map and variational form
-        circuit = QuantumCircuit(self.n_qubits)
-        circuit.compose(self.feature_map.bind_parameters(x), inplace=True)
+        The circuit template is built once and only parameters are rebound
+        per sample; each chunk of circuits is submitted as a single job so
+        the simulator can run experiments in parallel.
 
-        if params is not None:
-            circuit.compose(self.variational_form.bind_parameters(params), inplace=True)
-        else:
-            circuit.compose(self.variational_form, inplace=True)
+        Args:
+            X: Encoded features (samples, n_qubits)
+            params: Parameters for the variational form
+            chunk_size: Circuits per submitted job
+
+        Returns:
+            Array (samples, 2) of [P(0), P(1)] for the first measured bit
+        """
+        template, feature_params, variational_params = self._circuit_template()
+        variational_binding = dict(zip(variational_params, params))
+
+        probabilities = np.zeros((len(X), 2))
+        for start in range(0, len(X), chunk_size):
+            chunk = X[start : start + chunk_size]
+            circuits = [
+                template.assign_parameters(
+                    {**dict(zip(feature_params, x)), **variational_binding}
+                )
+                for x in chunk
+            ]
+            result = execute(circuits, self.backend, shots=self.shots).result()
 
-        # Add measurement
-        circuit.measure_all()
+            for offset in range(len(circuits)):
+                counts = result.get_counts(offset)
+                prob_0 = sum(v for k, v in counts.items() if k[0] == "0") / self.shots
+                probabilities[start + offset] = [prob_0, 1 - prob_0]
 
-        return circuit
+        return probabilities
 
     def _objective_function(
         self,
@@ -1138,27 +1409,11 @@ class QuantumVariationalClassifier:
         Returns:
             Loss value
         """
-        loss = 0.0
-
-        # Calculate data loss
-        for i in range(len(X)):
-            # Create circuit for this sample
-            circuit = self._create_circuit(X[i], params)
-
-            # Execute circuit
-            counts = (
-                execute(circuit, self.backend, shots=self.shots).result().get_counts()
-            )
-
-            # Calculate probabilities
-            prob_0 = sum(v for k, v in counts.items() if k[0] == "0") / self.shots
-            prob_1 = sum(v for k, v in counts.items() if k[0] == "1") / self.shots
-
-            # Calculate loss (depends on the label)
-            if y[i] == 0:
-                loss += 1 - prob_0
-            else:
-                loss += 1 - prob_1
+        # Calculate data loss from one batched job over all samples
+        probabilities = self._batch_probabilities(X, params)
+        y = np.asarray(y)
+        label_probabilities = np.where(y == 0, probabilities[:, 0], probabilities[:, 1])
+        loss = float(np.sum(1 - label_probabilities))
 
         # Add L2 regularization to prevent overfitting
         if add_regularization:
@@ -1360,22 +1615,10 @@ class QuantumVariationalClassifier:
         Returns:
             Predicted labels
         """
-        predictions = []
-        for x in X_transformed:
-            circuit = self._create_circuit(x, self.optimal_params)
-            counts = (
-                execute(circuit, self.backend, shots=self.shots).result().get_counts()
-            )
+        probabilities = self._batch_probabilities(X_transformed, self.optimal_params)
 
-            # Calculate probabilities
-            prob_0 = sum(v for k, v in counts.items() if k[0] == "0") / self.shots
-            prob_1 = sum(v for k, v in counts.items() if k[0] == "1") / self.shots
-
-            # Predict the class with higher probability
-            pred = 1 if prob_1 > prob_0 else 0
-            predictions.append(pred)
-
-        return np.array(predictions)
+        # Predict the class with higher probability
+        return (probabilities[:, 1] > probabilities[:, 0]).astype(int)
 
     def predict(self, X: np.ndarray) -> np.ndarray:
         """
@@ -1413,20 +1656,7 @@ class QuantumVariationalClassifier:
         X_transformed = self.encoder.transform(X)
 
         # Make probabilistic predictions
-        probabilities = []
-        for x in X_transformed:
-            circuit = self._create_circuit(x, self.optimal_params)
-            counts = (
-                execute(circuit, self.backend, shots=self.shots).result().get_counts()
-            )
-
-            # Calculate probabilities
-            prob_0 = sum(v for k, v in counts.items() if k[0] == "0") / self.shots
-            prob_1 = sum(v for k, v in counts.items() if k[0] == "1") / self.shots
-
-            probabilities.append([prob_0, prob_1])
-
-        return np.array(probabilities)
+        return self._batch_probabilities(X_transformed, self.optimal_params)
 
     def score(self, X: np.ndarray, y: np.ndarray) -> Dict[str, float]:
         """
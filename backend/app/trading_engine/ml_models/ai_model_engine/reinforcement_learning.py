@@ -1,7 +1,7 @@
 """
 Reinforcement Learning models for trading strategy selection and optimization.
 
-This module implements reinforcement learning agents that can adaptively select 
+This module implements reinforcement learning agents that can adaptively select
 and optimize trading strategies based on market conditions and performance.
 """
 
@@ -9,7 +9,6 @@ import json
 import logging
 import os
 import pickle
-import random
 import time
 from collections import deque
 from datetime import datetime, timedelta
@@ -23,8 +22,8 @@ from gymnasium import spaces
 from tensorflow import keras
 from tensorflow.keras import layers, models, optimizers
 
-from ..strategies.base import TradingStrategy
-from ..timeframe_engine.market_regime_detector import MarketRegimeDetector
+from ...strategies.base import TradingStrategy
+from ...timeframe.market_regime_detector import MarketRegimeDetector
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -47,6 +46,7 @@ class TradingEnvironment(gym.Env):
         max_steps: int = 252,  # Approx. 1 trading year
         transaction_cost: float = 0.001,  # 0.1% per trade
         window_size: int = 30,  # Look back window for observations
+        market_features: Optional[np.ndarray] = None,
     ):
         """
         Initialize the trading environment.
@@ -59,6 +59,8 @@ class TradingEnvironment(gym.Env):
             max_steps: Maximum number of steps in an episode
             transaction_cost: Cost per trade as a fraction of trade value
             window_size: Number of past observations to include in state
+            market_features: Optional output of precompute_market_features for
+                market_data, so environments over the same data can share it
         """
         super(TradingEnvironment, self).__init__()
 
@@ -107,8 +109,21 @@ class TradingEnvironment(gym.Env):
         self._starting_index = window_size
         self._observation_history = deque(maxlen=window_size)
 
-    def reset(self):
-        """Reset the environment to initial state for a new episode."""
+        # Precomputed per-row features so steps index arrays instead of
+        # slicing and copying DataFrame windows
+        self._close_prices = market_data["close"].to_numpy(dtype=np.float64)
+        if market_features is None:
+            market_features = precompute_market_features(market_data, window_size)
+        self._market_features = market_features
+
+    def reset(self, start_index: Optional[int] = None):
+        """
+        Reset the environment to initial state for a new episode.
+
+        Args:
+            start_index: Optional row index to start the episode at (defaults
+                to window_size). Used to stagger parallel environments.
+        """
         self.current_step = 0
         self.account_balance = self.initial_balance
         self.current_position = 0
@@ -126,7 +141,11 @@ class TradingEnvironment(gym.Env):
 
         # Reset internal state
         self._done = False
-        self._starting_index = self.window_size
+        self._starting_index = (
+            self.window_size
+            if start_index is None
+            else max(start_index, self.window_size)
+        )
         self._observation_history = deque(maxlen=self.window_size)
 
         # Initialize observation history
@@ -151,11 +170,11 @@ class TradingEnvironment(gym.Env):
         if self._done:
             return self._get_state(), 0, True, {}
 
-        # Get current market data
-        current_data = self._get_market_data_slice(
-            self.current_step + self._starting_index
-        )
-        self._current_price = current_data.iloc[-1]["close"]
+        # Get current market price from the precomputed close array
+        current_index = self.current_step + self._starting_index
+        self._current_price = self._close_prices[
+            min(current_index, len(self._close_prices) - 1)
+        ]
 
         # Execute strategy if action is valid
         info = {}
@@ -167,7 +186,9 @@ class TradingEnvironment(gym.Env):
 
             # Get signals from the selected strategy
             strategy = self.strategies[action]
-            signals = self._execute_strategy_with_data(strategy, current_data)
+            signals = self._execute_strategy_with_data(
+                strategy, self._get_market_data_slice(current_index)
+            )
 
             # Apply the signals to update positions
             new_position, trade_pnl = self._apply_signals(signals)
@@ -233,10 +254,10 @@ class TradingEnvironment(gym.Env):
         return self._get_state(), reward, self._done, info
 
     def _get_market_data_slice(self, index: int) -> pd.DataFrame:
-        """Get a slice of market data centered at the given index."""
+        """Get a read-only view of market data ending at the given index."""
         start_idx = max(0, index - self.window_size)
         end_idx = min(len(self.market_data), index + 1)
-        return self.market_data.iloc[start_idx:end_idx].copy()
+        return self.market_data.iloc[start_idx:end_idx]
 
     def _execute_strategy_with_data(
         self, strategy: TradingStrategy, data: pd.DataFrame
@@ -352,16 +373,20 @@ class TradingEnvironment(gym.Env):
 
     def _get_observation(self, index: int) -> np.ndarray:
         """Get observation features for the given index."""
-        # Get market data
-        market_data = self._get_market_data_slice(index)
-
-        # Extract basic market features
-        market_features = self._extract_market_features(market_data)
+        # Look up precomputed market features
+        if len(self._market_features) == 0:
+            market_features = np.zeros(6)
+        else:
+            market_features = self._market_features[
+                min(index, len(self._market_features) - 1)
+            ]
 
         # Extract regime features if detector is available
         regime_features = []
         if self.market_regime_detector is not None:
-            regime = self.market_regime_detector.detect_regime(market_data)
+            regime = self.market_regime_detector.detect_regime(
+                self._get_market_data_slice(index)
+            )
             regime_features = self._extract_regime_features(regime)
         else:
             # Default regime features if detector not available
@@ -485,6 +510,258 @@ class TradingEnvironment(gym.Env):
         return state
 
 
+def precompute_market_features(data: pd.DataFrame, window_size: int) -> np.ndarray:
+    """
+    Compute the per-row market features used by TradingEnvironment in one pass.
+
+    Row i matches TradingEnvironment._extract_market_features applied to the
+    window data.iloc[max(0, i - window_size) : i + 1].
+
+    Args:
+        data: Market data with at least a close column
+        window_size: Look back window used for observations
+
+    Returns:
+        Array of shape (len(data), 6): normalized open, high, low, daily
+        return, volatility and normalized volume
+    """
+    n = len(data)
+    if n == 0:
+        return np.zeros((0, 6))
+
+    close = data["close"].astype(float)
+    features = np.zeros((n, 6))
+
+    # Normalized OHLC relative to close
+    for col, column in enumerate(["open", "high", "low"]):
+        if column in data.columns:
+            features[:, col] = (data[column].astype(float) / close - 1).to_numpy()
+
+    # Daily return (zero for the first row)
+    features[1:, 3] = (close.to_numpy()[1:] / close.to_numpy()[:-1]) - 1
+
+    # Rolling volatility of returns, only once the window holds more than 5 rows
+    volatility = close.pct_change().rolling(window_size, min_periods=1).std().to_numpy()
+    window_rows = np.minimum(np.arange(n), window_size) + 1
+    features[:, 4] = np.where(window_rows > 5, np.nan_to_num(volatility), 0.0)
+
+    # Volume relative to its window average
+    if "volume" in data.columns:
+        volume = data["volume"].astype(float)
+        avg_volume = volume.rolling(window_size + 1, min_periods=1).mean().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            normalized = np.where(avg_volume > 0, volume.to_numpy() / avg_volume, 0.0)
+        features[:, 5] = np.where(window_rows > 1, normalized, 0.0)
+
+    return features
+
+
+class VectorizedEnvironmentRunner:
+    """
+    Steps several TradingEnvironment instances in lock-step.
+
+    Actions for every live environment are chosen with one batched forward
+    pass of the agent, and the resulting transitions are written to replay
+    memory together, so training cost scales with the number of steps rather
+    than the number of environments.
+    """
+
+    def __init__(self, envs: List[TradingEnvironment]):
+        """
+        Initialize the runner.
+
+        Args:
+            envs: Environments to step together (typically over the same data
+                with staggered start indices)
+        """
+        if not envs:
+            raise ValueError("At least one environment is required")
+        self.envs = envs
+        self.num_envs = len(envs)
+
+    def _start_indices(self) -> List[int]:
+        """Spread episode start rows evenly across the available history."""
+        env = self.envs[0]
+        first = env.window_size
+        last = max(first, len(env.market_data) - env.max_steps - 1)
+        return [int(i) for i in np.linspace(first, last, self.num_envs)]
+
+    def reset(self) -> np.ndarray:
+        """Reset all environments and return stacked states."""
+        starts = self._start_indices()
+        return np.stack(
+            [env.reset(start_index=start) for env, start in zip(self.envs, starts)]
+        )
+
+    def step(
+        self, actions: np.ndarray, active: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict]]:
+        """
+        Step every active environment with its action.
+
+        Args:
+            actions: Action per environment
+            active: Boolean mask of environments still running
+
+        Returns:
+            Tuple of (next_states, rewards, dones, infos) stacked across envs
+        """
+        next_states, rewards, dones, infos = [], [], [], []
+        for env, action, is_active in zip(self.envs, actions, active):
+            if is_active:
+                next_state, reward, done, info = env.step(int(action))
+            else:
+                next_state, reward, done, info = env._get_state(), 0.0, True, {}
+            next_states.append(next_state)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+
+        return (
+            np.stack(next_states),
+            np.asarray(rewards, dtype=np.float32),
+            np.asarray(dones, dtype=bool),
+            infos,
+        )
+
+    def run_episode(
+        self, agent: "DQNAgent", training: bool = True
+    ) -> Tuple[float, List[Dict]]:
+        """
+        Run one episode on every environment.
+
+        Args:
+            agent: Agent used for batched action selection (and training)
+            training: Whether to explore, store transitions and replay
+
+        Returns:
+            Tuple of (mean total reward, final info per environment)
+        """
+        states = self.reset()
+        active = np.ones(self.num_envs, dtype=bool)
+        total_rewards = np.zeros(self.num_envs)
+        final_infos: List[Dict] = [{} for _ in range(self.num_envs)]
+
+        while active.any():
+            actions = np.zeros(self.num_envs, dtype=np.int64)
+            actions[active] = agent.act_batch(states[active], training=training)
+            next_states, rewards, dones, infos = self.step(actions, active)
+
+            if training:
+                agent.memorize_batch(
+                    states[active],
+                    actions[active],
+                    rewards[active],
+                    next_states[active],
+                    dones[active],
+                )
+                if len(agent.memory) > agent.batch_size:
+                    agent.replay()
+
+            total_rewards += np.where(active, rewards, 0.0)
+            for i in np.flatnonzero(active & dones):
+                final_infos[i] = infos[i]
+
+            active &= ~dones
+            states = next_states
+
+        return float(total_rewards.mean()), final_infos
+
+
+class ReplayBuffer:
+    """
+    Array-backed ring buffer for DQN experience replay.
+
+    Transitions are stored in preallocated NumPy arrays so sampling a
+    minibatch is a single fancy-indexing operation instead of copying
+    tuples out of a deque one at a time.
+    """
+
+    def __init__(
+        self, capacity: int, state_shape: Tuple[int, ...], seed: Optional[int] = None
+    ):
+        """
+        Initialize the replay buffer.
+
+        Args:
+            capacity: Maximum number of transitions kept
+            state_shape: Shape of a single state
+            seed: Optional random seed for sampling
+        """
+        self.capacity = capacity
+        self.state_shape = tuple(state_shape)
+
+        self.states = np.zeros((capacity,) + self.state_shape, dtype=np.float32)
+        self.next_states = np.zeros((capacity,) + self.state_shape, dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+        self._position = 0
+        self._size = 0
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, state, action, reward, next_state, done) -> None:
+        """Store a single transition, overwriting the oldest when full."""
+        i = self._position
+        self.states[i] = state
+        self.next_states[i] = next_state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.dones[i] = done
+
+        self._position = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones) -> None:
+        """Store a batch of transitions with vectorized writes."""
+        n = len(actions)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest transitions fit
+            keep = slice(-self.capacity, None)
+            states, actions, rewards = states[keep], actions[keep], rewards[keep]
+            next_states, dones = next_states[keep], dones[keep]
+            n = self.capacity
+
+        idx = (self._position + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.next_states[idx] = next_states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.dones[idx] = dones
+
+        self._position = int((self._position + n) % self.capacity)
+        self._size = min(self._size + n, self.capacity)
+
+    def sample(
+        self, batch_size: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sample a minibatch of transitions without replacement.
+
+        Returns:
+            Tuple of (states, actions, rewards, next_states, dones) arrays
+        """
+        idx = self._rng.choice(self._size, size=batch_size, replace=False)
+        return (
+            self.states[idx],
+            self.actions[idx],
+            self.rewards[idx],
+            self.next_states[idx],
+            self.dones[idx],
+        )
+
+    def clear(self) -> None:
+        """Drop all stored transitions."""
+        self._position = 0
+        self._size = 0
+
+
 class DQNAgent:
     """
     Deep Q-Network agent for reinforcement learning-based strategy selection.
@@ -533,7 +810,7 @@ class DQNAgent:
         self.update_target_freq = update_target_freq
 
         # Replay memory
-        self.memory = deque(maxlen=memory_size)
+        self.memory = ReplayBuffer(memory_size, state_size)
 
         # Models
         self.model = self._build_model()
@@ -593,17 +870,42 @@ class DQNAgent:
 
     def memorize(self, state, action, reward, next_state, done):
         """Store experience in replay memory."""
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
+
+    def memorize_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of experiences (e.g. one step of several environments)."""
+        self.memory.add_batch(states, actions, rewards, next_states, dones)
 
     def act(self, state, training=True):
         """Choose action using epsilon-greedy policy."""
-        if training and np.random.rand() < self.epsilon:
-            # Random action (exploration)
-            return random.randrange(self.action_size)
+        return int(self.act_batch(np.expand_dims(state, axis=0), training)[0])
 
-        # Use model to predict best action (exploitation)
-        q_values = self.model.predict(np.expand_dims(state, axis=0), verbose=0)
-        return np.argmax(q_values[0])
+    def act_batch(self, states: np.ndarray, training: bool = True) -> np.ndarray:
+        """
+        Choose actions for a batch of states with one forward pass.
+
+        Args:
+            states: States of shape (batch,) + state_size
+            training: Whether to apply epsilon-greedy exploration
+
+        Returns:
+            Array of action indices, one per state
+        """
+        n = len(states)
+        explore = (
+            np.random.rand(n) < self.epsilon if training else np.zeros(n, dtype=bool)
+        )
+        actions = np.random.randint(self.action_size, size=n)
+
+        if not explore.all():
+            # Use model to predict best action (exploitation). Calling the model
+            # directly avoids predict()'s per-call dataset overhead.
+            q_values = self.model(
+                np.asarray(states, dtype=np.float32), training=False
+            ).numpy()
+            actions = np.where(explore, actions, np.argmax(q_values, axis=1))
+
+        return actions
 
     def replay(self, batch_size=None):
         """Train the model with experiences from replay memory."""
@@ -615,31 +917,16 @@ class DQNAgent:
             return
 
         # Sample batch from memory
-        minibatch = random.sample(self.memory, batch_size)
-
-        # Prepare batch data
-        states = np.zeros((batch_size,) + self.state_size)
-        next_states = np.zeros((batch_size,) + self.state_size)
-        actions, rewards, dones = [], [], []
-
-        # Fill batch data
-        for i, (state, action, reward, next_state, done) in enumerate(minibatch):
-            states[i] = state
-            next_states[i] = next_state
-            actions.append(action)
-            rewards.append(reward)
-            dones.append(done)
+        states, actions, rewards, next_states, dones = self.memory.sample(batch_size)
 
         # Predict Q-values
-        target = self.model.predict(states, verbose=0)
-        target_next = self.target_model.predict(next_states, verbose=0)
+        target = self.model(states, training=False).numpy()
+        target_next = self.target_model(next_states, training=False).numpy()
 
-        # Update targets for actions taken
-        for i in range(batch_size):
-            if dones[i]:
-                target[i, actions[i]] = rewards[i]
-            else:
-                target[i, actions[i]] = rewards[i] + self.gamma * np.max(target_next[i])
+        # Update targets for actions taken (terminal transitions get the bare reward)
+        target[np.arange(batch_size), actions] = rewards + self.gamma * np.max(
+            target_next, axis=1
+        ) * (~dones)
 
         # Train the model
         history = self.model.fit(
@@ -741,6 +1028,7 @@ class StrategySelector:
         training_episodes: int = 100,
         batch_size: int = 64,
         validation_split: float = 0.2,
+        num_envs: int = 1,
     ):
         """
         Initialize the strategy selector.
@@ -753,6 +1041,8 @@ class StrategySelector:
             training_episodes: Number of episodes for training
             batch_size: Batch size for training
             validation_split: Fraction of data to use for validation
+            num_envs: Number of environments stepped in lock-step during
+                training, each starting at a different point in the history
         """
         self.strategies = strategies
         self.market_regime_detector = market_regime_detector
@@ -761,6 +1051,7 @@ class StrategySelector:
         self.training_episodes = training_episodes
         self.batch_size = batch_size
         self.validation_split = validation_split
+        self.num_envs = max(1, num_envs)
 
         # Current state and performance
         self.current_strategy = None
@@ -800,13 +1091,21 @@ class StrategySelector:
         # Feature extraction from state
         feature_size = 15  # Market features + regime features + strategy metrics
 
-        # Initialize environment with training data
-        self.env = TradingEnvironment(
-            strategies=self.strategies,
-            market_data=train_data,
-            market_regime_detector=self.market_regime_detector,
-            window_size=self.window_size,
-        )
+        # Initialize environments with training data; features are
+        # precomputed once and shared by every environment
+        train_features = precompute_market_features(train_data, self.window_size)
+        envs = [
+            TradingEnvironment(
+                strategies=self.strategies,
+                market_data=train_data,
+                market_regime_detector=self.market_regime_detector,
+                window_size=self.window_size,
+                market_features=train_features,
+            )
+            for _ in range(self.num_envs)
+        ]
+        self.env = envs[0]
+        runner = VectorizedEnvironmentRunner(envs)
 
         # Initialize agent if not already created
         if self.agent is None:
@@ -832,35 +1131,16 @@ class StrategySelector:
         for episode in range(self.training_episodes):
             episode_start = time.time()
 
-            # Reset environment
-            state = self.env.reset()
-            total_reward = 0
-            done = False
-
-            # Episode loop
-            while not done:
-                # Choose action
-                action = self.agent.act(state)
-
-                # Take action
-                next_state, reward, done, info = self.env.step(action)
-
-                # Store experience
-                self.agent.memorize(state, action, reward, next_state, done)
-
-                # Update state and reward
-                state = next_state
-                total_reward += reward
-
-                # Train agent
-                if len(self.agent.memory) > self.batch_size:
-                    self.agent.replay()
+            # Run one lock-step episode across all environments
+            total_reward, infos = runner.run_episode(self.agent, training=True)
 
             # End of episode
             episode_time = time.time() - episode_start
 
             # Get episode performance
-            episode_return = info.get("total_return", 0)
+            episode_return = float(
+                np.mean([info.get("total_return", 0) for info in infos])
+            )
             self.training_returns.append(episode_return)
 
             # Evaluate on validation data
@@ -9,7 +9,10 @@ import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, AsyncIterator, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from app.services.streaming_compliance import StreamingComplianceScanner
 
 
 class InferenceBackend(Enum):
@@ -148,6 +151,38 @@ class BaseInferenceClient(ABC):
         """
         pass
 
+    async def generate_stream_compliant(
+        self,
+        prompt: str,
+        config: Optional[GenerationConfig] = None,
+        system_prompt: Optional[str] = None,
+        scanner: Optional["StreamingComplianceScanner"] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response through the incremental compliance scanner.
+
+        Blocking violations stop (or redact) the stream as soon as they are
+        generated rather than after the full response has been produced.
+
+        Args:
+            prompt: User prompt/query
+            config: Generation configuration
+            system_prompt: Optional system prompt override
+            scanner: Scanner to use; pass one in to read its result afterwards
+
+        Yields:
+            Text chunks that passed compliance scanning
+        """
+        from app.services.streaming_compliance import (
+            StreamingComplianceScanner,
+            scan_stream,
+        )
+
+        scanner = scanner or StreamingComplianceScanner()
+        stream = self.generate_stream(prompt, config, system_prompt)
+        async for chunk in scan_stream(stream, scanner):
+            yield chunk
+
     @abstractmethod
     async def embed(self, text: str) -> List[float]:
         """
@@ -5,8 +5,13 @@ Contains market-neutral strategies based on statistical relationships
 between securities.
 """
 
+from .pair_engine import HedgeFilter, PairCandidate, PairMonitor, screen_pairs
 from .pairs_trading import PairsTradingStrategy
 
 __all__ = [
     "PairsTradingStrategy",
+    "PairCandidate",
+    "PairMonitor",
+    "HedgeFilter",
+    "screen_pairs",
 ]
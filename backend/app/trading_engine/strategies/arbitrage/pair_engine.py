@@ -0,0 +1,610 @@
+"""
+Pair discovery and monitoring engine
+
+Finds and tracks statistical-arbitrage pairs across a universe held as a
+``(symbols, bars)`` price matrix:
+
+- ``screen_pairs`` pre-filters candidates by return correlation (row
+  blocks of the correlation matrix, keeping each symbol's strongest
+  neighbours) and runs a batched Engle-Granger test on the survivors, so a
+  universe of thousands never tests all N² pairs
+- ``HedgeFilter`` tracks hedge ratios for many pairs with a Kalman filter
+  or recursive least squares; each bar is one vectorized O(1) update
+- ``PairMonitor`` combines the two into a live spread z-score table that
+  ``PairsTradingStrategy`` and ``StatisticalMeanReversion`` read instead of
+  refetching and refitting history on every signal
+
+Spreads are in price units, ``price_a - hedge_ratio * price_b``, as in
+``PairsTradingStrategy``.
+"""
+
+import logging
+import math
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# MacKinnon (2010) asymptotic critical values of the Engle-Granger test for
+# two variables with a constant
+EG_CRITICAL_VALUES = {0.01: -3.90, 0.05: -3.34, 0.10: -3.04}
+
+
+@dataclass(frozen=True)
+class PairCandidate:
+    """A screened pair; ``symbol_a`` is regressed on ``symbol_b``."""
+
+    symbol_a: str
+    symbol_b: str
+    correlation: float
+    hedge_ratio: float
+    intercept: float
+    adf_stat: float
+    half_life: float
+    cointegrated: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ============================================================================
+# Batched statistics
+# ============================================================================
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """Log returns along the last axis (one fewer column than ``prices``)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(prices), axis=-1)
+
+
+def correlation_neighbours(
+    returns: np.ndarray,
+    min_correlation: float = 0.7,
+    max_neighbours: int = 10,
+    block_size: int = 512,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Candidate pairs from the return correlation matrix.
+
+    The matrix is built one row block at a time, so memory stays at
+    ``block_size * N`` however large the universe is. Each symbol keeps at
+    most ``max_neighbours`` partners with correlation of at least
+    ``min_correlation``.
+
+    Args:
+        returns: Return matrix (symbols, periods); NaNs count as zero
+        min_correlation: Minimum correlation to keep a pair
+        max_neighbours: Partners kept per symbol
+        block_size: Rows of the correlation matrix computed at a time
+
+    Returns:
+        (first index, second index, correlation) arrays with first < second
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=float))
+    n, periods = returns.shape
+    centered = returns - returns.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(centered, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        standardized = np.where(norms[:, None] > 0, centered / norms[:, None], 0.0)
+
+    k = min(max_neighbours, n - 1)
+    firsts, seconds, values = [], [], []
+    if k <= 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+
+    for lo in range(0, n, block_size):
+        hi = min(lo + block_size, n)
+        corr = standardized[lo:hi] @ standardized.T
+        corr[np.arange(hi - lo), np.arange(lo, hi)] = -np.inf
+        top = np.argpartition(-corr, k - 1, axis=1)[:, :k]
+        top_corr = np.take_along_axis(corr, top, axis=1)
+        keep = top_corr >= min_correlation
+        rows = np.broadcast_to(np.arange(lo, hi)[:, None], top.shape)
+        firsts.append(rows[keep])
+        seconds.append(top[keep])
+        values.append(top_corr[keep])
+
+    i = np.concatenate(firsts)
+    j = np.concatenate(seconds)
+    corr = np.concatenate(values)
+    a, b = np.minimum(i, j), np.maximum(i, j)
+    # A pair found from both ends appears twice
+    _, unique = np.unique(a * n + b, return_index=True)
+    return a[unique], b[unique], corr[unique]
+
+
+def hedge_ratios(y: np.ndarray, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    OLS of ``y`` on ``x`` with a constant, row by row.
+
+    Args:
+        y: Dependent prices (pairs, periods)
+        x: Regressor prices (pairs, periods)
+
+    Returns:
+        (hedge ratio, intercept) per row
+    """
+    x_mean = x.mean(axis=-1, keepdims=True)
+    y_mean = y.mean(axis=-1, keepdims=True)
+    dx = x - x_mean
+    var = (dx * dx).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = np.where(var > 0, (dx * (y - y_mean)).sum(axis=-1) / var, 0.0)
+    alpha = y_mean[..., 0] - beta * x_mean[..., 0]
+    return beta, alpha
+
+
+def adf_statistics(residuals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dickey-Fuller t-statistics (no lags) and mean-reversion half-lives.
+
+    Args:
+        residuals: Spread series (pairs, periods)
+
+    Returns:
+        (t-statistic, half-life in bars) per row; half-life is inf when the
+        spread does not revert
+    """
+    lagged = residuals[:, :-1] - residuals[:, :-1].mean(axis=1, keepdims=True)
+    diff = np.diff(residuals, axis=1)
+    diff = diff - diff.mean(axis=1, keepdims=True)
+    sxx = (lagged * lagged).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gamma = (lagged * diff).sum(axis=1) / sxx
+        errors = diff - gamma[:, None] * lagged
+        dof = max(diff.shape[1] - 2, 1)
+        se = np.sqrt((errors * errors).sum(axis=1) / dof / sxx)
+        t_stat = gamma / se
+        half_life = np.where(
+            (gamma < 0) & (gamma > -1), -math.log(2) / np.log1p(gamma), np.inf
+        )
+    return np.nan_to_num(t_stat, nan=0.0), half_life
+
+
+def screen_pairs(
+    prices: np.ndarray,
+    symbols: Sequence[str],
+    min_correlation: float = 0.7,
+    max_neighbours: int = 10,
+    significance: float = 0.05,
+    max_half_life: Optional[float] = None,
+    batch_size: int = 1024,
+    cointegrated_only: bool = True,
+) -> List[PairCandidate]:
+    """
+    Find cointegrated pairs in a universe.
+
+    Correlation pre-filtering picks candidates; each batch of candidates is
+    then tested with one set of array operations (OLS hedge ratio and a
+    Dickey-Fuller test on the residual spread).
+
+    Args:
+        prices: Aligned close prices (symbols, bars)
+        symbols: Symbol per row of ``prices``
+        min_correlation: Return correlation a candidate needs
+        max_neighbours: Candidates kept per symbol
+        significance: Test level (0.01, 0.05 or 0.10)
+        max_half_life: Drop pairs reverting slower than this many bars
+        batch_size: Candidate pairs tested at a time
+        cointegrated_only: Drop pairs that fail the test
+
+    Returns:
+        Candidates sorted from most to least significant
+    """
+    prices = np.asarray(prices, dtype=float)
+    if prices.shape[0] != len(symbols):
+        raise ValueError("prices must have one row per symbol")
+    critical = EG_CRITICAL_VALUES[significance]
+
+    first, second, corr = correlation_neighbours(
+        log_returns(prices), min_correlation, max_neighbours
+    )
+    logger.info(
+        f"Screening {len(first)} candidate pairs out of "
+        f"{len(symbols) * (len(symbols) - 1) // 2}"
+    )
+
+    candidates = []
+    for lo in range(0, len(first), batch_size):
+        a = first[lo : lo + batch_size]
+        b = second[lo : lo + batch_size]
+        y, x = prices[a], prices[b]
+        beta, alpha = hedge_ratios(y, x)
+        t_stat, half_life = adf_statistics(y - beta[:, None] * x - alpha[:, None])
+
+        passed = t_stat < critical
+        keep = passed if cointegrated_only else np.ones(len(a), dtype=bool)
+        if max_half_life is not None:
+            keep &= half_life <= max_half_life
+        for k in np.flatnonzero(keep):
+            candidates.append(
+                PairCandidate(
+                    symbol_a=symbols[a[k]],
+                    symbol_b=symbols[b[k]],
+                    correlation=float(corr[lo + k]),
+                    hedge_ratio=float(beta[k]),
+                    intercept=float(alpha[k]),
+                    adf_stat=float(t_stat[k]),
+                    half_life=float(half_life[k]),
+                    cointegrated=bool(passed[k]),
+                )
+            )
+
+    candidates.sort(key=lambda c: c.adf_stat)
+    return candidates
+
+
+# ============================================================================
+# Online hedge ratios
+# ============================================================================
+
+
+class HedgeFilter:
+    """
+    Time-varying hedge ratios for many pairs at once.
+
+    The state per pair is ``[hedge_ratio, intercept]`` for the observation
+    ``price_a = hedge_ratio * price_b + intercept``. ``method="kalman"``
+    lets the state drift as a random walk with variance set by ``delta``;
+    ``method="rls"`` is recursive least squares with forgetting factor
+    ``forgetting``. Each ``update`` costs O(pairs), independent of history.
+    """
+
+    def __init__(
+        self,
+        beta: np.ndarray,
+        alpha: Optional[np.ndarray] = None,
+        method: str = "kalman",
+        delta: float = 1e-6,
+        observation_var: float = 1.0,
+        forgetting: float = 0.995,
+        initial_var: float = 1e-4,
+    ):
+        """
+        Initialize filter.
+
+        Args:
+            beta: Initial hedge ratio per pair
+            alpha: Initial intercept per pair (default zero)
+            method: "kalman" or "rls"
+            delta: Kalman state drift; larger adapts faster
+            observation_var: Kalman measurement noise variance (price units)
+            forgetting: RLS forgetting factor in (0, 1]
+            initial_var: Initial state variance; the small default trusts
+                fitted ratios such as those from ``screen_pairs``, use a large
+                (diffuse) value when the initial ratios are guesses
+        """
+        if method not in ("kalman", "rls"):
+            raise ValueError(f"Unknown hedge ratio method: {method}")
+        beta = np.atleast_1d(np.asarray(beta, dtype=float))
+        alpha = (
+            np.zeros_like(beta)
+            if alpha is None
+            else np.atleast_1d(np.asarray(alpha, dtype=float))
+        )
+        self.method = method
+        self.observation_var = observation_var
+        self.forgetting = forgetting
+        self.state_noise = delta / (1 - delta)
+        self.theta = np.stack([beta, alpha], axis=1)
+        self.cov = np.broadcast_to(np.eye(2) * initial_var, (len(beta), 2, 2)).copy()
+
+    def __len__(self) -> int:
+        return len(self.theta)
+
+    @property
+    def beta(self) -> np.ndarray:
+        return self.theta[:, 0]
+
+    @property
+    def alpha(self) -> np.ndarray:
+        return self.theta[:, 1]
+
+    def update(
+        self,
+        price_a: np.ndarray,
+        price_b: np.ndarray,
+        mask: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Fold one bar into every pair's estimate.
+
+        Args:
+            price_a: Dependent leg price per pair
+            price_b: Hedge leg price per pair
+            mask: Pairs to update (default all); others keep their state
+
+        Returns:
+            Prediction error per pair (NaN where masked out)
+        """
+        rows = np.arange(len(self.theta)) if mask is None else np.flatnonzero(mask)
+        x = np.stack([price_b[rows], np.ones(len(rows))], axis=1)
+        y = price_a[rows]
+
+        if self.method == "kalman":
+            prior = self.cov[rows] + self.state_noise * np.eye(2)
+            noise = self.observation_var
+        else:
+            prior = self.cov[rows] / self.forgetting
+            noise = 1.0
+
+        theta = self.theta[rows]
+        error = y - np.einsum("pi,pi->p", x, theta)
+        prior_x = np.einsum("pij,pj->pi", prior, x)
+        variance = np.einsum("pi,pi->p", x, prior_x) + noise
+        gain = prior_x / variance[:, None]
+
+        self.theta[rows] = theta + gain * error[:, None]
+        self.cov[rows] = prior - gain[:, :, None] * prior_x[:, None, :]
+
+        errors = np.full(len(self.theta), np.nan)
+        errors[rows] = error
+        return errors
+
+
+# ============================================================================
+# Live monitoring
+# ============================================================================
+
+
+class PairMonitor:
+    """
+    Live spread z-scores for a set of pairs.
+
+    Feed one price per symbol per bar with ``update``. Hedge ratios follow a
+    ``HedgeFilter``; spread mean, variance and the AR(1) reversion speed are
+    exponentially weighted, so every statistic is maintained in O(1) per
+    pair per bar.
+    """
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        pairs: Sequence[Tuple[str, str]],
+        beta: Optional[np.ndarray] = None,
+        alpha: Optional[np.ndarray] = None,
+        lookback_period: int = 60,
+        method: str = "kalman",
+        **filter_kwargs,
+    ):
+        """
+        Initialize monitor.
+
+        Args:
+            symbols: Universe; ``update`` arrays are aligned with it
+            pairs: (symbol_a, symbol_b) pairs to track
+            beta: Initial hedge ratio per pair (default 1 with a diffuse
+                prior)
+            alpha: Initial intercept per pair (default 0)
+            lookback_period: Span of the spread mean/variance averages
+            method: Hedge ratio filter, "kalman" or "rls"
+            **filter_kwargs: Passed to ``HedgeFilter``
+        """
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.pair_index = {pair: k for k, pair in enumerate(self.pairs)}
+        self.leg_a = np.array([self.index[a] for a, _ in self.pairs], dtype=np.int64)
+        self.leg_b = np.array([self.index[b] for _, b in self.pairs], dtype=np.int64)
+        self.lookback_period = lookback_period
+        self.decay = 2.0 / (lookback_period + 1)
+
+        size = len(self.pairs)
+        if beta is None:
+            filter_kwargs.setdefault("initial_var", 1e4)
+        self.filter = HedgeFilter(
+            np.ones(size) if beta is None else beta,
+            alpha,
+            method=method,
+            **filter_kwargs,
+        )
+        self.prices = np.full(len(self.symbols), np.nan)
+        self.spread = np.full(size, np.nan)
+        self.spread_mean = np.full(size, np.nan)
+        self.spread_var = np.zeros(size)
+        self.z_score = np.full(size, np.nan)
+        self.prev_z_score = np.full(size, np.nan)
+        self._ar_xy = np.zeros(size)
+        self._ar_xx = np.zeros(size)
+        self.bars = np.zeros(size, dtype=np.int64)
+
+    @classmethod
+    def from_candidates(
+        cls,
+        candidates: Sequence[PairCandidate],
+        symbols: Sequence[str],
+        history: Optional[np.ndarray] = None,
+        **kwargs,
+    ) -> "PairMonitor":
+        """
+        Track screened pairs, starting from their OLS hedge ratios.
+
+        Args:
+            candidates: Output of ``screen_pairs``
+            symbols: Universe
+            history: Optional price matrix (symbols, bars) to warm up on
+            **kwargs: Passed to the constructor
+
+        Returns:
+            PairMonitor
+        """
+        monitor = cls(
+            symbols,
+            [(c.symbol_a, c.symbol_b) for c in candidates],
+            beta=np.array([c.hedge_ratio for c in candidates]),
+            alpha=np.array([c.intercept for c in candidates]),
+            **kwargs,
+        )
+        if history is not None:
+            monitor.warm_up(history)
+        return monitor
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        return tuple(pair) in self.pair_index
+
+    def warm_up(self, history: np.ndarray) -> None:
+        """Replay a price matrix (symbols, bars) one bar at a time"""
+        for column in np.asarray(history, dtype=float).T:
+            self.update(column)
+
+    def update(self, prices: Union[np.ndarray, Mapping[str, float]]) -> None:
+        """
+        Fold one bar into every pair.
+
+        Args:
+            prices: Price per symbol (aligned array with NaN for no print, or
+                symbol -> price); pairs with a missing leg are left unchanged
+        """
+        if isinstance(prices, Mapping):
+            for symbol, price in prices.items():
+                if symbol in self.index:
+                    self.prices[self.index[symbol]] = price
+            current = self.prices
+            printed = np.zeros(len(self.symbols), dtype=bool)
+            printed[[self.index[s] for s in prices if s in self.index]] = True
+        else:
+            current = np.asarray(prices, dtype=float)
+            printed = ~np.isnan(current)
+            self.prices = np.where(printed, current, self.prices)
+
+        price_a, price_b = current[self.leg_a], current[self.leg_b]
+        mask = printed[self.leg_a] & printed[self.leg_b]
+        mask &= ~(np.isnan(price_a) | np.isnan(price_b))
+        if not mask.any():
+            return
+        rows = np.flatnonzero(mask)
+        # Spread under the hedge ratio known before this bar, so the filter
+        # cannot absorb the deviation it is meant to measure
+        spread = price_a[rows] - self.filter.beta[rows] * price_b[rows]
+        self.filter.update(price_a, price_b, mask)
+
+        previous = self.spread[rows]
+        mean = self.spread_mean[rows]
+        first = np.isnan(mean)
+        mean = np.where(first, spread, mean)
+
+        # Exponentially weighted mean/variance and AR(1) moments of the spread
+        a = self.decay
+        deviation = spread - mean
+        new_mean = mean + a * deviation
+        new_var = (1 - a) * (self.spread_var[rows] + a * deviation * deviation)
+        lagged = np.where(first, 0.0, previous - mean)
+        change = np.where(first, 0.0, spread - previous)
+        self._ar_xy[rows] = (1 - a) * self._ar_xy[rows] + a * lagged * change
+        self._ar_xx[rows] = (1 - a) * self._ar_xx[rows] + a * lagged * lagged
+
+        std = np.sqrt(new_var)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.where(std > 0, (spread - new_mean) / std, np.nan)
+
+        self.prev_z_score[rows] = self.z_score[rows]
+        self.z_score[rows] = z
+        self.spread[rows] = spread
+        self.spread_mean[rows] = new_mean
+        self.spread_var[rows] = new_var
+        self.bars[rows] += 1
+
+    @property
+    def hedge_ratio(self) -> np.ndarray:
+        return self.filter.beta
+
+    @property
+    def spread_std(self) -> np.ndarray:
+        return np.sqrt(self.spread_var)
+
+    @property
+    def half_life(self) -> np.ndarray:
+        """Bars for a spread deviation to halve (inf if not reverting)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gamma = self._ar_xy / self._ar_xx
+            return np.where(
+                (gamma < 0) & (gamma > -1), -math.log(2) / np.log1p(gamma), np.inf
+            )
+
+    def state(self, symbol_a: str, symbol_b: str) -> Optional[Dict[str, Any]]:
+        """
+        Current statistics for one pair.
+
+        Returns:
+            Dict of spread statistics, or None if the pair is not tracked or
+            has not seen enough bars
+        """
+        k = self.pair_index.get((symbol_a, symbol_b))
+        if k is None or self.bars[k] < 2 or np.isnan(self.z_score[k]):
+            return None
+        return {
+            "symbol_a": symbol_a,
+            "symbol_b": symbol_b,
+            "price_a": float(self.prices[self.leg_a[k]]),
+            "price_b": float(self.prices[self.leg_b[k]]),
+            "hedge_ratio": float(self.filter.beta[k]),
+            "spread": float(self.spread[k]),
+            "spread_mean": float(self.spread_mean[k]),
+            "spread_std": float(np.sqrt(self.spread_var[k])),
+            "z_score": float(self.z_score[k]),
+            "prev_z_score": float(self.prev_z_score[k]),
+            "half_life": float(self.half_life[k]),
+            "bars": int(self.bars[k]),
+        }
+
+    def zscore_table(
+        self, min_abs_z: float = 0.0, limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Spread statistics for every pair, most stretched first.
+
+        Args:
+            min_abs_z: Only pairs with at least this absolute z-score
+            limit: Maximum number of rows
+
+        Returns:
+            DataFrame with one row per pair
+        """
+        table = pd.DataFrame(
+            {
+                "symbol_a": [a for a, _ in self.pairs],
+                "symbol_b": [b for _, b in self.pairs],
+                "hedge_ratio": self.filter.beta.copy(),
+                "spread": self.spread,
+                "spread_mean": self.spread_mean,
+                "spread_std": self.spread_std,
+                "z_score": self.z_score,
+                "half_life": self.half_life,
+                "bars": self.bars,
+            }
+        )
+        abs_z = table["z_score"].abs()
+        table = table[abs_z >= min_abs_z]
+        table = table.iloc[
+            np.argsort(-table["z_score"].abs().to_numpy(), kind="stable")
+        ]
+        if limit is not None:
+            table = table.head(limit)
+        return table.reset_index(drop=True)
+
+
+def random_prices(
+    symbols: int = 50, bars: int = 500, pairs: int = 5, seed: int = 0
+) -> np.ndarray:
+    """
+    Synthetic price matrix with ``pairs`` cointegrated pairs planted.
+
+    Row ``2k + 1`` follows ``hedge * row 2k`` plus a mean-reverting spread
+    for ``k < pairs``; every other row is an independent random walk.
+    """
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, bars)), axis=1))
+    for k in range(min(pairs, symbols // 2)):
+        spread = np.zeros(bars)
+        for t in range(1, bars):
+            spread[t] = 0.8 * spread[t - 1] + rng.normal(0, 0.5)
+        prices[2 * k + 1] = (1 + 0.25 * k) * prices[2 * k] + 10 + spread
+    return prices
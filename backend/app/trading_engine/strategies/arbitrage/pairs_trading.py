@@ -14,6 +14,7 @@ import pandas as pd
 
 from ..base import TradingStrategy
 from ..registry import StrategyCategory, StrategyRegistry
+from .pair_engine import HedgeFilter, PairMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +54,8 @@ class PairsTradingStrategy(TradingStrategy):
     - Z-score based entry/exit
     - Dynamic hedge ratio adjustment
     - Correlation monitoring
+    - Reads a shared PairMonitor, when given one, instead of refetching
+      both legs and refitting the hedge ratio on every signal
     """
 
     def __init__(
@@ -68,6 +71,7 @@ class PairsTradingStrategy(TradingStrategy):
         rolling_window: int = 20,
         min_correlation: float = 0.7,
         rebalance_threshold: float = 0.1,
+        pair_monitor: Optional[PairMonitor] = None,
         **kwargs,
     ):
         super().__init__(
@@ -90,6 +94,7 @@ class PairsTradingStrategy(TradingStrategy):
             },
         )
         self.market_data_service = market_data_service
+        self.pair_monitor = pair_monitor
         self.pair_symbol = pair_symbol
         self.lookback_period = lookback_period
         self.z_score_entry = z_score_entry
@@ -116,6 +121,19 @@ class PairsTradingStrategy(TradingStrategy):
                     market_data.get("price", 0.0), "No pair symbol configured"
                 )
 
+            # A monitored pair already has live spread statistics
+            state = self._monitored_state()
+            if state is not None:
+                signal = self._decide(
+                    z_score=state["z_score"],
+                    prev_z_score=state["prev_z_score"],
+                    current_spread=state["spread"],
+                    symbol_1_price=state["price_a"],
+                    symbol_2_price=state["price_b"],
+                )
+                self.last_signal_time = datetime.utcnow()
+                return signal
+
             # Get data for both symbols
             df = await self._get_pair_data()
 
@@ -159,6 +177,19 @@ class PairsTradingStrategy(TradingStrategy):
         except Exception:
             return False
 
+    def _monitored_state(self) -> Optional[Dict[str, Any]]:
+        """Spread statistics for this pair from the shared monitor"""
+        if self.pair_monitor is None:
+            return None
+        state = self.pair_monitor.state(self.symbol, self.pair_symbol)
+        if state is None or state["bars"] < self.lookback_period:
+            return None
+
+        self.hedge_ratio = state["hedge_ratio"]
+        self.spread_mean = state["spread_mean"]
+        self.spread_std = state["spread_std"]
+        return state
+
     async def _get_pair_data(self) -> Optional[pd.DataFrame]:
         """Get historical data for both symbols"""
         try:
@@ -263,6 +294,15 @@ class PairsTradingStrategy(TradingStrategy):
 
             return cov / var if var != 0 else 1.0
 
+        elif self.hedge_ratio_method == "kalman":
+            # Diffuse prior around the price ratio, then one update per bar
+            x = df["symbol_2"].values.astype(float)
+            y = df["symbol_1"].values.astype(float)
+            hedge = HedgeFilter([y[0] / x[0]], [0.0], initial_var=1e4)
+            for price_1, price_2 in zip(y, x):
+                hedge.update(np.array([price_1]), np.array([price_2]))
+            return float(hedge.beta[0])
+
         else:  # Default to simple ratio
             return df["symbol_1"].iloc[-1] / df["symbol_2"].iloc[-1]
 
@@ -271,12 +311,23 @@ class PairsTradingStrategy(TradingStrategy):
         last_row = df.iloc[-1]
         prev_row = df.iloc[-2]
 
-        z_score = float(last_row["z_score"])
-        prev_z_score = float(prev_row["z_score"])
-        current_spread = float(last_row["spread"])
-        symbol_1_price = float(last_row["symbol_1"])
-        symbol_2_price = float(last_row["symbol_2"])
+        return self._decide(
+            z_score=float(last_row["z_score"]),
+            prev_z_score=float(prev_row["z_score"]),
+            current_spread=float(last_row["spread"]),
+            symbol_1_price=float(last_row["symbol_1"]),
+            symbol_2_price=float(last_row["symbol_2"]),
+        )
 
+    def _decide(
+        self,
+        z_score: float,
+        prev_z_score: float,
+        current_spread: float,
+        symbol_1_price: float,
+        symbol_2_price: float,
+    ) -> Dict[str, Any]:
+        """Entry/exit/stop decision for the current spread Z-score"""
         self.current_z_score = z_score
 
         action = "hold"
@@ -14,6 +14,11 @@ class TradingStrategy(ABC):
     position sizing, risk management, and performance tracking.
     """
 
+    # Set by strategies whose generate_signal reads or changes their own
+    # position or order state (e.g. current_position); schedulers then
+    # compute their signals per subscriber instead of sharing one instance
+    position_dependent_signals = False
+
     def __init__(
         self,
         symbol: str,
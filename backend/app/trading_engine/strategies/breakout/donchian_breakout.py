@@ -55,6 +55,8 @@ class DonchianBreakout(TradingStrategy):
     - System 2: 55-day entry, 20-day exit (take all signals)
     """
 
+    position_dependent_signals = True
+
     def __init__(
         self,
         symbol: str,
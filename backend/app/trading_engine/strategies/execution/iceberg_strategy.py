@@ -50,6 +50,8 @@ class IcebergExecutionStrategy(TradingStrategy):
     - Limit order placement
     """
 
+    position_dependent_signals = True
+
     def __init__(
         self,
         symbol: str,
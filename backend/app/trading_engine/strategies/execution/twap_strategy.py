@@ -51,6 +51,8 @@ class TWAPExecutionStrategy(TradingStrategy):
     - Price limit support
     """
 
+    position_dependent_signals = True
+
     def __init__(
         self,
         symbol: str,
@@ -45,13 +45,16 @@ class VWAPExecutionStrategy(TradingStrategy):
     volume patterns to minimize market impact.
 
     Features:
-    - Historical volume profile matching
+    - Historical volume profile matching (precomputed nightly profiles,
+      falling back to fetching recent intraday bars)
     - Participation rate limiting
     - Dynamic slice sizing
     - Price limit support
     - Urgency adjustment
     """
 
+    position_dependent_signals = True
+
     def __init__(
         self,
         symbol: str,
@@ -65,6 +68,7 @@ class VWAPExecutionStrategy(TradingStrategy):
         price_limit: Optional[float] = None,
         allow_crossing: bool = True,
         side: str = "buy",  # buy or sell
+        volume_profile_store: Any = None,
         **kwargs,
     ):
         super().__init__(
@@ -86,6 +90,7 @@ class VWAPExecutionStrategy(TradingStrategy):
             },
         )
         self.market_data_service = market_data_service
+        self.volume_profile_store = volume_profile_store
         self.total_quantity = total_quantity
         self.execution_window_minutes = execution_window_minutes
         self.num_slices = num_slices
@@ -189,6 +194,10 @@ class VWAPExecutionStrategy(TradingStrategy):
 
     async def _get_volume_profile(self) -> List[float]:
         """Get historical intraday volume profile"""
+        profile = self._get_stored_profile()
+        if profile:
+            return profile
+
         try:
             if self.market_data_service is None:
                 return []
@@ -243,6 +252,24 @@ class VWAPExecutionStrategy(TradingStrategy):
             logger.warning(f"Could not get volume profile: {str(e)}")
             return []
 
+    def _get_stored_profile(self) -> Optional[List[float]]:
+        """Slice weights from the precomputed volume profile store"""
+        try:
+            store = self.volume_profile_store
+            if store is None:
+                from app.services.volume_profiles import get_volume_profile_store
+
+                store = get_volume_profile_store()
+            return store.window_weights(
+                self.symbol,
+                self.start_time or datetime.utcnow(),
+                self.execution_window_minutes,
+                self.num_slices,
+            )
+        except Exception as e:
+            logger.warning(f"Could not read stored volume profile: {str(e)}")
+            return None
+
     def _create_slice_schedule(self, start_time: datetime) -> None:
         """Create execution schedule based on volume profile"""
         slice_duration = timedelta(
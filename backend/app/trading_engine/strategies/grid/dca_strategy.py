@@ -49,6 +49,8 @@ class DCAStrategy(TradingStrategy):
     - Configurable frequency
     """
 
+    position_dependent_signals = True
+
     def __init__(
         self,
         symbol: str,
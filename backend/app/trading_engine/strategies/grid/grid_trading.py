@@ -52,6 +52,8 @@ class GridTradingStrategy(TradingStrategy):
     - Position tracking at each level
     """
 
+    position_dependent_signals = True
+
     def __init__(
         self,
         symbol: str,
@@ -12,6 +12,7 @@ from typing import Any, Dict, Optional
 import numpy as np
 import pandas as pd
 
+from ..arbitrage.pair_engine import PairMonitor
 from ..base import TradingStrategy
 from ..registry import StrategyCategory, StrategyRegistry
 
@@ -51,6 +52,8 @@ class StatisticalMeanReversion(TradingStrategy):
     - Half-life estimation for mean reversion speed
     - Bollinger Band integration
     - Extreme level detection
+    - Optional pair mode: with a PairMonitor and pair_symbol, the Z-score is
+      that of the monitored spread against pair_symbol
     """
 
     def __init__(
@@ -66,6 +69,8 @@ class StatisticalMeanReversion(TradingStrategy):
         half_life_check: bool = True,
         min_half_life: int = 5,
         max_half_life: int = 50,
+        pair_monitor: Optional[PairMonitor] = None,
+        pair_symbol: Optional[str] = None,
         **kwargs,
     ):
         super().__init__(
@@ -88,6 +93,8 @@ class StatisticalMeanReversion(TradingStrategy):
             },
         )
         self.market_data_service = market_data_service
+        self.pair_monitor = pair_monitor
+        self.pair_symbol = pair_symbol
         self.lookback_period = lookback_period
         self.z_score_entry = z_score_entry
         self.z_score_exit = z_score_exit
@@ -105,6 +112,11 @@ class StatisticalMeanReversion(TradingStrategy):
     async def generate_signal(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate trading signal based on mean reversion"""
         try:
+            signal = self._generate_pair_signal()
+            if signal is not None:
+                self.last_signal_time = datetime.utcnow()
+                return signal
+
             df = await self._get_historical_data()
 
             if df is None or len(df) < self.lookback_period * 2:
@@ -151,6 +163,52 @@ class StatisticalMeanReversion(TradingStrategy):
             logger.error(f"Error updating parameters: {str(e)}")
             return False
 
+    def _generate_pair_signal(self) -> Optional[Dict[str, Any]]:
+        """
+        Signal from the monitored spread against pair_symbol.
+
+        The spread is expressed in this symbol's price: holding the hedge leg
+        fixed, the spread mean corresponds to price - (spread - mean).
+
+        Returns:
+            Signal dict, or None when the pair is not monitored (yet)
+        """
+        if self.pair_monitor is None or self.pair_symbol is None:
+            return None
+        state = self.pair_monitor.state(self.symbol, self.pair_symbol)
+        if state is None or state["bars"] < self.lookback_period * 2:
+            return None
+
+        price = state["price_a"]
+        z_score = state["z_score"]
+        std = state["spread_std"]
+        mean = price - (state["spread"] - state["spread_mean"])
+
+        if self.half_life_check:
+            self.estimated_half_life = state["half_life"]
+            if not (
+                self.min_half_life <= self.estimated_half_life <= self.max_half_life
+            ):
+                return self._create_hold_signal(
+                    price,
+                    f"Half-life ({self.estimated_half_life:.1f}) "
+                    "outside acceptable range",
+                )
+
+        return self._decide(
+            current_price=price,
+            z_score=z_score,
+            prev_z_score=state["prev_z_score"],
+            mean=mean,
+            std=std,
+            distance_pct=(price - mean) / mean if mean else 0.0,
+            percent_b=(
+                (z_score + self.bollinger_std) / (2 * self.bollinger_std)
+                if self.use_bollinger
+                else None
+            ),
+        )
+
     async def _get_historical_data(self) -> Optional[pd.DataFrame]:
         """Get historical market data"""
         try:
@@ -244,12 +302,29 @@ class StatisticalMeanReversion(TradingStrategy):
         last_row = df.iloc[-1]
         prev_row = df.iloc[-2]
 
-        current_price = float(last_row["close"])
-        z_score = float(last_row["z_score"])
-        prev_z_score = float(prev_row["z_score"])
-        mean = float(last_row["mean"])
-        std = float(last_row["std"])
+        return self._decide(
+            current_price=float(last_row["close"]),
+            z_score=float(last_row["z_score"]),
+            prev_z_score=float(prev_row["z_score"]),
+            mean=float(last_row["mean"]),
+            std=float(last_row["std"]),
+            distance_pct=float(last_row.get("distance_pct", 0)),
+            percent_b=(
+                float(last_row.get("percent_b", 0.5)) if self.use_bollinger else None
+            ),
+        )
 
+    def _decide(
+        self,
+        current_price: float,
+        z_score: float,
+        prev_z_score: float,
+        mean: float,
+        std: float,
+        distance_pct: float,
+        percent_b: Optional[float],
+    ) -> Dict[str, Any]:
+        """Trading decision for the current Z-score"""
         self.current_z_score = z_score
 
         action = "hold"
@@ -317,13 +392,9 @@ class StatisticalMeanReversion(TradingStrategy):
                 "z_score": z_score,
                 "mean": mean,
                 "std": std,
-                "distance_pct": float(last_row.get("distance_pct", 0)),
+                "distance_pct": distance_pct,
                 "half_life": self.estimated_half_life,
-                "percent_b": (
-                    float(last_row.get("percent_b", 0.5))
-                    if self.use_bollinger
-                    else None
-                ),
+                "percent_b": percent_b,
             },
         }
 
@@ -7,6 +7,9 @@ Detects and trades Japanese candlestick patterns including:
 - Morning/Evening Star
 - Three White Soldiers/Black Crows
 - And more...
+
+Detection runs on the vectorized pattern engine in
+``trading_engine.data.pattern_engine``.
 """
 
 import logging
@@ -16,6 +19,13 @@ from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 
+from ...data.pattern_engine import (
+    PATTERNS,
+    PatternParams,
+    detect_patterns,
+    pattern_dict,
+    patterns_at,
+)
 from ..base import TradingStrategy
 from ..registry import StrategyCategory, StrategyRegistry
 
@@ -184,187 +194,85 @@ class CandlestickPatternStrategy(TradingStrategy):
 
         return df
 
-    def _detect_patterns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Detect all candlestick patterns in recent data"""
-        patterns = []
+    @property
+    def pattern_params(self) -> PatternParams:
+        """Current thresholds for the vectorized pattern engine"""
+        return PatternParams(
+            body_threshold=self.body_threshold,
+            doji_threshold=self.doji_threshold,
+            shadow_ratio=self.shadow_ratio,
+            engulfing_margin=self.engulfing_margin,
+            trend_period=self.trend_period,
+        )
 
+    def _detect_patterns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Detect all candlestick patterns on the latest candle"""
         # Check last 3 candles for patterns
         if len(df) < 3:
-            return patterns
+            return []
+
+        # Evaluate only the bars the patterns look at, reusing the trend column
+        tail = df.iloc[-3:]
+        masks = detect_patterns(
+            tail["open"].to_numpy(dtype=float),
+            tail["high"].to_numpy(dtype=float),
+            tail["low"].to_numpy(dtype=float),
+            tail["close"].to_numpy(dtype=float),
+            params=self.pattern_params,
+            trend_up=(tail["trend"] == "up").to_numpy(),
+        )
+        return patterns_at(masks, -1)
+
+    def _detect_patterns_scalar(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Per-candle reference detection with the ``_is_*`` helpers.
+
+        Kept for parity tests and benchmarks of the vectorized engine.
+        """
+        if len(df) < 3:
+            return []
 
         c1 = df.iloc[-1]  # Current candle
         c2 = df.iloc[-2]  # Previous candle
         c3 = df.iloc[-3]  # Two candles ago
 
-        price = float(c1["close"])
-
-        # Single candle patterns
-        # Doji
-        if self._is_doji(c1):
-            patterns.append(
-                {
-                    "name": "doji",
-                    "type": "neutral",
-                    "strength": 0.4,
-                    "description": "Doji - Market indecision",
-                }
-            )
-
-        # Hammer (bullish reversal)
-        if self._is_hammer(c1) and c1["trend"] == "down":
-            patterns.append(
-                {
-                    "name": "hammer",
-                    "type": "bullish",
-                    "strength": 0.65,
-                    "description": "Hammer - Potential bullish reversal",
-                }
-            )
-
-        # Shooting Star (bearish reversal)
-        if self._is_shooting_star(c1) and c1["trend"] == "up":
-            patterns.append(
-                {
-                    "name": "shooting_star",
-                    "type": "bearish",
-                    "strength": 0.65,
-                    "description": "Shooting Star - Potential bearish reversal",
-                }
-            )
-
-        # Marubozu (strong candle)
-        if self._is_marubozu(c1):
-            if c1["bullish"]:
-                patterns.append(
-                    {
-                        "name": "bullish_marubozu",
-                        "type": "bullish",
-                        "strength": 0.6,
-                        "description": "Bullish Marubozu - Strong buying",
-                    }
-                )
-            else:
-                patterns.append(
-                    {
-                        "name": "bearish_marubozu",
-                        "type": "bearish",
-                        "strength": 0.6,
-                        "description": "Bearish Marubozu - Strong selling",
-                    }
-                )
-
-        # Two candle patterns
-        # Bullish Engulfing
-        if self._is_bullish_engulfing(c1, c2):
-            patterns.append(
-                {
-                    "name": "bullish_engulfing",
-                    "type": "bullish",
-                    "strength": 0.75,
-                    "description": "Bullish Engulfing - Strong reversal signal",
-                }
-            )
-
-        # Bearish Engulfing
-        if self._is_bearish_engulfing(c1, c2):
-            patterns.append(
-                {
-                    "name": "bearish_engulfing",
-                    "type": "bearish",
-                    "strength": 0.75,
-                    "description": "Bearish Engulfing - Strong reversal signal",
-                }
-            )
-
-        # Piercing Line
-        if self._is_piercing_line(c1, c2):
-            patterns.append(
-                {
-                    "name": "piercing_line",
-                    "type": "bullish",
-                    "strength": 0.65,
-                    "description": "Piercing Line - Bullish reversal",
-                }
-            )
-
-        # Dark Cloud Cover
-        if self._is_dark_cloud_cover(c1, c2):
-            patterns.append(
-                {
-                    "name": "dark_cloud_cover",
-                    "type": "bearish",
-                    "strength": 0.65,
-                    "description": "Dark Cloud Cover - Bearish reversal",
-                }
-            )
-
-        # Harami patterns
-        if self._is_bullish_harami(c1, c2):
-            patterns.append(
-                {
-                    "name": "bullish_harami",
-                    "type": "bullish",
-                    "strength": 0.55,
-                    "description": "Bullish Harami - Potential reversal",
-                }
-            )
-
-        if self._is_bearish_harami(c1, c2):
-            patterns.append(
-                {
-                    "name": "bearish_harami",
-                    "type": "bearish",
-                    "strength": 0.55,
-                    "description": "Bearish Harami - Potential reversal",
-                }
-            )
-
-        # Three candle patterns
-        # Morning Star
-        if self._is_morning_star(c1, c2, c3):
-            patterns.append(
-                {
-                    "name": "morning_star",
-                    "type": "bullish",
-                    "strength": 0.8,
-                    "description": "Morning Star - Strong bullish reversal",
-                }
-            )
-
-        # Evening Star
-        if self._is_evening_star(c1, c2, c3):
-            patterns.append(
-                {
-                    "name": "evening_star",
-                    "type": "bearish",
-                    "strength": 0.8,
-                    "description": "Evening Star - Strong bearish reversal",
-                }
-            )
-
-        # Three White Soldiers
-        if self._is_three_white_soldiers(c1, c2, c3):
-            patterns.append(
-                {
-                    "name": "three_white_soldiers",
-                    "type": "bullish",
-                    "strength": 0.85,
-                    "description": "Three White Soldiers - Strong bullish trend",
-                }
-            )
-
-        # Three Black Crows
-        if self._is_three_black_crows(c1, c2, c3):
-            patterns.append(
-                {
-                    "name": "three_black_crows",
-                    "type": "bearish",
-                    "strength": 0.85,
-                    "description": "Three Black Crows - Strong bearish trend",
-                }
-            )
-
-        return patterns
+        found = {
+            "doji": self._is_doji(c1),
+            "hammer": self._is_hammer(c1) and c1["trend"] == "down",
+            "shooting_star": self._is_shooting_star(c1) and c1["trend"] == "up",
+            "bullish_marubozu": self._is_marubozu(c1) and c1["bullish"],
+            "bearish_marubozu": self._is_marubozu(c1) and not c1["bullish"],
+            "bullish_engulfing": self._is_bullish_engulfing(c1, c2),
+            "bearish_engulfing": self._is_bearish_engulfing(c1, c2),
+            "piercing_line": self._is_piercing_line(c1, c2),
+            "dark_cloud_cover": self._is_dark_cloud_cover(c1, c2),
+            "bullish_harami": self._is_bullish_harami(c1, c2),
+            "bearish_harami": self._is_bearish_harami(c1, c2),
+            "morning_star": self._is_morning_star(c1, c2, c3),
+            "evening_star": self._is_evening_star(c1, c2, c3),
+            "three_white_soldiers": self._is_three_white_soldiers(c1, c2, c3),
+            "three_black_crows": self._is_three_black_crows(c1, c2, c3),
+        }
+        return [pattern_dict(name) for name in PATTERNS if found[name]]
+
+    def detect_pattern_history(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pattern masks for every bar of a history, e.g. for backtests.
+
+        Args:
+            df: OHLC data
+
+        Returns:
+            Boolean DataFrame with one column per pattern, indexed like ``df``
+        """
+        masks = detect_patterns(
+            pd.to_numeric(df["open"], errors="coerce").to_numpy(dtype=float),
+            pd.to_numeric(df["high"], errors="coerce").to_numpy(dtype=float),
+            pd.to_numeric(df["low"], errors="coerce").to_numpy(dtype=float),
+            pd.to_numeric(df["close"], errors="coerce").to_numpy(dtype=float),
+            params=self.pattern_params,
+        )
+        return pd.DataFrame(masks, index=df.index)
 
     # Pattern detection methods
     def _is_doji(self, candle: pd.Series) -> bool:
@@ -16,6 +16,7 @@ anomalies detected by the anomaly detection system, triggering preemptive failov
 or degraded operations when anomalous conditions are detected.
 """
 
+import asyncio
 import json
 import logging
 import os
@@ -36,6 +37,7 @@ from app.core.alerts_manager import alert_manager
 from app.core.config import settings
 from prometheus_client import Counter, Gauge
 from app.services.anomaly_detector import AnomalySeverity, AnomalyType, anomaly_detector
+from risk_management.health_scheduler import HealthCheckScheduler
 
 # Configure logging
 logger = logging.getLogger("failover")
@@ -57,6 +59,26 @@ time_since_last_healthy = Gauge(
     ["service"],
 )
 
+# Shared HTTP session so health checks reuse pooled keep-alive connections
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    """Return the pooled session used by HTTP health checks."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=10, pool_maxsize=20
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
 
 # Service states
 class ServiceState:
@@ -166,7 +188,7 @@ class HttpHealthCheck(HealthCheck):
         start_time = time.time()
 
         try:
-            response = requests.request(
+            response = _get_http_session().request(
                 method=self.method,
                 url=self.endpoint,
                 headers=self.headers,
@@ -247,34 +269,50 @@ class PostgreSQLHealthCheck(HealthCheck):
         self.user = user
         self.password = password
         self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
 
-    def check(self) -> HealthCheckResult:
-        """Perform PostgreSQL health check."""
-        start_time = time.time()
-
-        try:
-            import psycopg2
+    def _connection(self):
+        """Return the persistent connection, reconnecting if it was closed."""
+        import psycopg2
 
-            # Set environment variable for password if provided
-            env = os.environ.copy()
-            if self.password:
-                env["PGPASSWORD"] = self.password
-
-            # Use psycopg2 to connect and run a simple query
-            conn = psycopg2.connect(
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(
                 host=self.host,
                 port=self.port,
                 dbname=self.database,
                 user=self.user,
                 password=self.password or "",
-                connect_timeout=self.timeout,
+                connect_timeout=max(1, int(self.timeout)),
+                options=f"-c statement_timeout={int(self.timeout * 1000)}",
             )
+            self._conn.autocommit = True
+        return self._conn
+
+    def _reset_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
 
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                result = cursor.fetchone()
+    def check(self) -> HealthCheckResult:
+        """Perform PostgreSQL health check."""
+        start_time = time.time()
+
+        try:
+            import psycopg2
 
-            conn.close()
+            # Reuse one connection across checks; a failed check drops it
+            with self._lock:
+                try:
+                    with self._connection().cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                        result = cursor.fetchone()
+                except Exception:
+                    self._reset_connection()
+                    raise
 
             response_time = time.time() - start_time
 
@@ -326,20 +364,26 @@ class RedisHealthCheck(HealthCheck):
         self.port = port
         self.password = password
         self.timeout = timeout
+        self._client: Optional[redis.Redis] = None
 
-    def check(self) -> HealthCheckResult:
-        """Perform Redis health check."""
-        start_time = time.time()
-
-        try:
-            # Connect to Redis
-            r = redis.Redis(
+    def _redis(self) -> redis.Redis:
+        """Return a client whose connection pool is kept between checks."""
+        if self._client is None:
+            self._client = redis.Redis(
                 host=self.host,
                 port=self.port,
                 password=self.password,
                 socket_timeout=self.timeout,
                 socket_connect_timeout=self.timeout,
             )
+        return self._client
+
+    def check(self) -> HealthCheckResult:
+        """Perform Redis health check."""
+        start_time = time.time()
+
+        try:
+            r = self._redis()
 
             # Set a test key
             test_key = f"health_check:{self.service_id}:{datetime.now().isoformat()}"
@@ -450,6 +494,46 @@ class TCPHealthCheck(HealthCheck):
                 response_time=time.time() - start_time,
             )
 
+    async def async_check(self) -> HealthCheckResult:
+        """Perform the TCP health check without occupying a worker thread."""
+        start_time = time.time()
+
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout=self.timeout
+            )
+            writer.close()
+            await writer.wait_closed()
+
+            return HealthCheckResult(
+                self.service_id,
+                ServiceState.HEALTHY,
+                f"TCP connection successful to {self.host}:{self.port}",
+                response_time=time.time() - start_time,
+            )
+
+        except asyncio.TimeoutError:
+            return HealthCheckResult(
+                self.service_id,
+                ServiceState.FAILED,
+                f"TCP connection timed out after {self.timeout}s",
+                response_time=time.time() - start_time,
+            )
+        except ConnectionRefusedError:
+            return HealthCheckResult(
+                self.service_id,
+                ServiceState.FAILED,
+                f"TCP connection refused to {self.host}:{self.port}",
+                response_time=time.time() - start_time,
+            )
+        except Exception as e:
+            return HealthCheckResult(
+                self.service_id,
+                ServiceState.FAILED,
+                f"Health check failed: {str(e)}",
+                response_time=time.time() - start_time,
+            )
+
 
 class KubernetesHealthCheck(HealthCheck):
     """Kubernetes pod/service health check."""
@@ -1106,8 +1190,10 @@ class FailoverPolicy:
 
     def check_and_failover(self) -> Tuple[bool, str]:
         """Check service health and perform failover if needed."""
-        # Perform health check
-        result = self.health_check.check()
+        return self.handle_result(self.health_check.check())
+
+    def handle_result(self, result: HealthCheckResult) -> Tuple[bool, str]:
+        """Apply a health check result and perform failover or recovery."""
         self.health_check.update_status(result)
 
         # If service is healthy, check if we need to recover
@@ -1169,10 +1255,37 @@ class FailoverManager:
         self.running = False
         self.check_thread = None
         self.executor = ThreadPoolExecutor(max_workers=10)
+        self.scheduler = HealthCheckScheduler(
+            executor=self.executor,
+            max_concurrency=10,
+            default_interval=check_interval,
+            healthy_status=ServiceState.HEALTHY,
+            failure_result=self._failure_result,
+        )
 
-    def register_policy(self, policy: FailoverPolicy) -> None:
-        """Register a failover policy."""
+    @staticmethod
+    def _failure_result(
+        service_id: str, message: str, elapsed: float
+    ) -> HealthCheckResult:
+        return HealthCheckResult(
+            service_id, ServiceState.FAILED, message, response_time=elapsed
+        )
+
+    def register_policy(
+        self,
+        policy: FailoverPolicy,
+        interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """Register a failover policy.
+
+        Args:
+            policy: Policy to register
+            interval: Base check interval (defaults to the manager's interval)
+            timeout: Check deadline (defaults to the health check's timeout)
+        """
         self.policies[policy.service_id] = policy
+        self.scheduler.register(policy, interval=interval, timeout=timeout)
         logger.info(f"Registered failover policy for {policy.service_id}")
 
     def start(self) -> None:
@@ -1196,36 +1309,23 @@ class FailoverManager:
             return
 
         self.running = False
+        self.scheduler.stop()
         if self.check_thread:
             self.check_thread.join(timeout=5.0)
 
         logger.info("Failover manager stopped")
 
     def _check_loop(self) -> None:
-        """Main check loop."""
-        while self.running:
-            try:
-                # Check all services in parallel
-                futures = {}
-                for service_id, policy in self.policies.items():
-                    future = self.executor.submit(policy.check_and_failover)
-                    futures[future] = service_id
-
-                # Process results as they complete
-                for future in futures:
-                    service_id = futures[future]
-                    try:
-                        success, message = future.result()
-                        if not success:
-                            logger.warning(f"Service check for {service_id}: {message}")
-                    except Exception as e:
-                        logger.error(f"Error checking service {service_id}: {str(e)}")
-
-            except Exception as e:
-                logger.error(f"Error in failover check loop: {str(e)}")
-
-            # Wait for next check interval
-            time.sleep(self.check_interval)
+        """Main check loop.
+
+        Runs the asynchronous scheduler on this thread's own event loop; each
+        service is then checked on its own adaptive interval.
+        """
+        try:
+            asyncio.run(self.scheduler.run())
+        except Exception as e:
+            logger.error(f"Error in failover check loop: {str(e)}")
+            self.running = False
 
     def check_service(self, service_id: str) -> Tuple[bool, str]:
         """Check a specific service immediately."""
@@ -1257,6 +1357,10 @@ class FailoverManager:
                 else None,
                 "service_type": health_check.service_type,
             }
+            if service_id in self.scheduler.schedules:
+                status[service_id]["checks"] = self.scheduler.get_metrics(service_id)[
+                    service_id
+                ]
 
         return status
 
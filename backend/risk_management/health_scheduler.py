@@ -0,0 +1,450 @@
+"""
+Asynchronous health-check scheduler for failover policies.
+
+Each registered policy is probed on its own cadence instead of every policy
+being checked together and then sleeping a fixed interval:
+
+- Healthy services back off geometrically from their base interval towards
+  a maximum, so stable dependencies are probed less often.
+- Degraded, failed or unknown services drop to the minimum interval until
+  they recover, which shortens both time-to-detect and time-to-recover.
+- Every interval is jittered so checks do not synchronise into bursts.
+
+Checks run concurrently (bounded by a semaphore) and each one has a
+deadline; a check that misses it counts as a failure and never holds up
+other services. Health checks may provide a native ``async_check()``;
+otherwise their blocking ``check()`` runs on the executor.
+
+Check latency and time-to-detect failure (from the last healthy probe to the
+probe that reaches the policy's failure threshold) are recorded as
+histograms, exported to Prometheus when it is installed.
+"""
+
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import random
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from prometheus_client import Histogram
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger("failover")
+
+DEFAULT_TIMEOUT = 5.0
+DEADLINE_GRACE = 1.0  # Lets a check's own socket timeout fire first
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DETECTION_BUCKETS = (1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+if PROMETHEUS_AVAILABLE:
+    check_latency_seconds = Histogram(
+        "health_check_latency_seconds",
+        "Duration of service health checks",
+        ["service"],
+        buckets=LATENCY_BUCKETS,
+    )
+    failure_detection_seconds = Histogram(
+        "failure_detection_seconds",
+        "Time from the last healthy check to a confirmed failure",
+        ["service"],
+        buckets=DETECTION_BUCKETS,
+    )
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram kept in process for status reporting."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = list(itertools.accumulate(self.counts))
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": {
+                **{str(b): c for b, c in zip(self.buckets, cumulative)},
+                "+Inf": cumulative[-1],
+            },
+        }
+
+
+@dataclass
+class CheckSchedule:
+    """Probing cadence for one service."""
+
+    base_interval: float
+    min_interval: float
+    max_interval: float
+    timeout: float
+    backoff: float = 1.5
+    jitter: float = 0.1
+    current_interval: float = field(init=False)
+    next_run: float = 0.0
+
+    def __post_init__(self):
+        self.current_interval = self.base_interval
+
+    def reschedule(self, healthy: bool, now: float, rng: random.Random) -> float:
+        """Pick the next run time after a check and return the delay."""
+        if healthy:
+            self.current_interval = min(
+                max(self.current_interval, self.base_interval) * self.backoff,
+                self.max_interval,
+            )
+        else:
+            self.current_interval = self.min_interval
+        delay = self.current_interval * (1 + rng.uniform(-self.jitter, self.jitter))
+        self.next_run = now + delay
+        return delay
+
+
+@dataclass
+class ProbeFailure:
+    """Result used for checks that raise or miss their deadline."""
+
+    service_id: str
+    message: str
+    response_time: float
+    status: str = "failed"
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _ServiceTracking:
+    latency: LatencyHistogram = field(
+        default_factory=lambda: LatencyHistogram(LATENCY_BUCKETS)
+    )
+    detection: LatencyHistogram = field(
+        default_factory=lambda: LatencyHistogram(DETECTION_BUCKETS)
+    )
+    last_healthy_at: Optional[float] = None
+    unhealthy_since: Optional[float] = None
+    failure_detected: bool = False
+    last_time_to_detect: Optional[float] = None
+    checks: int = 0
+    deadline_misses: int = 0
+
+
+class HealthCheckScheduler:
+    """Runs failover policy health checks on adaptive, independent timers.
+
+    Policies are duck-typed: they need ``service_id``, ``health_check`` (with
+    ``check()`` or ``async_check()``, and optionally ``timeout`` and
+    ``consecutive_failures``), ``failure_threshold`` and
+    ``handle_result(result) -> (success, message)``.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 10,
+        default_interval: float = 30.0,
+        healthy_status: str = "healthy",
+        failure_result: Optional[Callable[[str, str, float], Any]] = None,
+        seed: Optional[int] = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            executor: Executor for blocking checks and failover actions
+            max_concurrency: Checks allowed to run at the same time
+            default_interval: Base interval for policies registered without one
+            healthy_status: Result status that counts as healthy
+            failure_result: Builds a result from (service_id, message, elapsed)
+                for checks that raise or time out
+            seed: Seed for interval jitter
+        """
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.default_interval = default_interval
+        self.healthy_status = healthy_status
+        self.failure_result = failure_result or ProbeFailure
+        self._rng = random.Random(seed)
+
+        self.policies: Dict[str, Any] = {}
+        self.schedules: Dict[str, CheckSchedule] = {}
+        self._tracking: Dict[str, _ServiceTracking] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._entry: Dict[str, int] = {}  # Live heap entry per service
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.running = False
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(
+        self,
+        policy: Any,
+        interval: Optional[float] = None,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        backoff: float = 1.5,
+        jitter: float = 0.1,
+    ) -> CheckSchedule:
+        """Add or replace a policy's schedule.
+
+        Args:
+            policy: Failover policy to check
+            interval: Base interval in seconds
+            min_interval: Interval while the service is unhealthy
+                (default: a quarter of the base interval)
+            max_interval: Longest interval after healthy back-off
+                (default: four times the base interval)
+            timeout: Check deadline (default: the health check's timeout)
+            backoff: Interval growth factor after each healthy check
+            jitter: Random spread applied to every interval (fraction)
+
+        Returns:
+            The schedule created for the policy
+        """
+        interval = interval or self.default_interval
+        schedule = CheckSchedule(
+            base_interval=interval,
+            min_interval=min_interval or interval / 4,
+            max_interval=max_interval or interval * 4,
+            timeout=timeout
+            or getattr(policy.health_check, "timeout", None)
+            or DEFAULT_TIMEOUT,
+            backoff=backoff,
+            jitter=jitter,
+        )
+        service_id = policy.service_id
+        self.policies[service_id] = policy
+        self.schedules[service_id] = schedule
+        self._tracking.setdefault(service_id, _ServiceTracking())
+
+        if self._loop and self.running:
+            self._loop.call_soon_threadsafe(
+                self._push, service_id, self._first_delay(schedule)
+            )
+        return schedule
+
+    def _first_delay(self, schedule: CheckSchedule) -> float:
+        # Spread first checks over a fraction of the interval
+        return self._rng.uniform(0, schedule.base_interval * schedule.jitter)
+
+    def _push(self, service_id: str, delay: float) -> None:
+        """Schedule a service, superseding any entry already queued."""
+        when = self._loop.time() + delay
+        sequence = next(self._sequence)
+        self.schedules[service_id].next_run = when
+        self._entry[service_id] = sequence
+        heapq.heappush(self._heap, (when, sequence, service_id))
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Run loop
+    # ------------------------------------------------------------------
+
+    async def run(self) -> None:
+        """Run checks until stop() is called."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.running = True
+
+        self._heap = []
+        for service_id, schedule in self.schedules.items():
+            self._push(service_id, self._first_delay(schedule))
+
+        try:
+            while self.running:
+                now = self._loop.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, sequence, service_id = heapq.heappop(self._heap)
+                    if self._entry.get(service_id) != sequence:
+                        continue
+                    if service_id not in self._in_flight:
+                        self._in_flight[service_id] = asyncio.create_task(
+                            self._run_scheduled(service_id)
+                        )
+
+                wait = self._heap[0][0] - now if self._heap else None
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in list(self._in_flight.values()):
+                task.cancel()
+            if self._in_flight:
+                await asyncio.gather(
+                    *self._in_flight.values(), return_exceptions=True
+                )
+            self._in_flight.clear()
+            self.running = False
+
+    def stop(self) -> None:
+        """Stop the run loop (safe to call from any thread)."""
+        self.running = False
+        if self._loop and self._wake and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run_scheduled(self, service_id: str) -> None:
+        healthy = False
+        try:
+            result, success, message = await self.run_check(service_id)
+            healthy = result.status == self.healthy_status
+            if not success:
+                logger.warning(f"Service check for {service_id}: {message}")
+        except Exception as e:
+            logger.error(f"Error checking service {service_id}: {str(e)}")
+        finally:
+            self._in_flight.pop(service_id, None)
+            if service_id in self.schedules and self.running:
+                delay = self.schedules[service_id].reschedule(
+                    healthy, self._loop.time(), self._rng
+                )
+                self._push(service_id, delay)
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+
+    async def run_check(self, service_id: str) -> Tuple[Any, bool, str]:
+        """Run one deadline-bounded check and apply its policy.
+
+        Returns:
+            Tuple of (health check result, policy success flag, message)
+        """
+        policy = self.policies[service_id]
+        schedule = self.schedules[service_id]
+        tracking = self._tracking[service_id]
+        health_check = policy.health_check
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore or asyncio.Semaphore(self.max_concurrency)
+
+        async with semaphore:
+            started = loop.time()
+            deadline = started + schedule.timeout + DEADLINE_GRACE
+            if hasattr(health_check, "async_check"):
+                probe = health_check.async_check()
+            else:
+                probe = loop.run_in_executor(self.executor, health_check.check)
+            try:
+                result = await asyncio.wait_for(probe, timeout=deadline - loop.time())
+            except asyncio.TimeoutError:
+                tracking.deadline_misses += 1
+                result = self.failure_result(
+                    service_id,
+                    f"Health check missed its {schedule.timeout:.1f}s deadline",
+                    loop.time() - started,
+                )
+            except Exception as e:
+                result = self.failure_result(
+                    service_id, f"Health check failed: {str(e)}", loop.time() - started
+                )
+            latency = loop.time() - started
+
+        tracking.checks += 1
+        tracking.latency.observe(latency)
+        if PROMETHEUS_AVAILABLE:
+            check_latency_seconds.labels(service=service_id).observe(latency)
+
+        # Failover actions may block (subprocesses, config swaps)
+        success, message = await loop.run_in_executor(
+            self.executor, policy.handle_result, result
+        )
+        self._track_detection(service_id, result, started, loop.time())
+        return result, success, message
+
+    def _track_detection(
+        self, service_id: str, result: Any, started: float, now: float
+    ) -> None:
+        """Record time-to-detect when a failure is first confirmed."""
+        tracking = self._tracking[service_id]
+        policy = self.policies[service_id]
+
+        if result.status == self.healthy_status:
+            tracking.last_healthy_at = now
+            tracking.unhealthy_since = None
+            tracking.failure_detected = False
+            return
+
+        if tracking.unhealthy_since is None:
+            tracking.unhealthy_since = started
+        failures = getattr(policy.health_check, "consecutive_failures", 0)
+        if tracking.failure_detected or failures < getattr(
+            policy, "failure_threshold", 1
+        ):
+            return
+
+        tracking.failure_detected = True
+        reference = (
+            tracking.last_healthy_at
+            if tracking.last_healthy_at is not None
+            else tracking.unhealthy_since
+        )
+        time_to_detect = now - reference
+        tracking.last_time_to_detect = time_to_detect
+        tracking.detection.observe(time_to_detect)
+        if PROMETHEUS_AVAILABLE:
+            failure_detection_seconds.labels(service=service_id).observe(
+                time_to_detect
+            )
+        logger.warning(
+            f"Failure of {service_id} confirmed {time_to_detect:.1f}s after "
+            "its last healthy check"
+        )
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_metrics(self, service_id: Optional[str] = None) -> Dict[str, Any]:
+        """Scheduling state, latency and time-to-detect histograms."""
+        service_ids = [service_id] if service_id else list(self.schedules)
+        metrics = {}
+        for sid in service_ids:
+            schedule = self.schedules[sid]
+            tracking = self._tracking[sid]
+            metrics[sid] = {
+                "current_interval": schedule.current_interval,
+                "timeout": schedule.timeout,
+                "checks": tracking.checks,
+                "deadline_misses": tracking.deadline_misses,
+                "latency": tracking.latency.to_dict(),
+                "time_to_detect": tracking.detection.to_dict(),
+                "last_time_to_detect": tracking.last_time_to_detect,
+            }
+        return metrics
@@ -5,11 +5,16 @@ Knowledge Base Ingestion Script
 Ingests all wealth management knowledge base files into ChromaDB
 for RAG-based retrieval in the Elson Financial AI system.
 
+Only files and chunks that changed since the previous run are embedded;
+a manifest of content hashes is stored next to the ChromaDB data.
+
 Usage:
-    python backend/scripts/ingest_knowledge.py [--reset]
+    python backend/scripts/ingest_knowledge.py [--reset] [--full] [--workers N]
 
 Options:
     --reset    Clear existing collection before ingesting
+    --full     Re-embed every chunk even if unchanged
+    --workers  Embedding batches to run concurrently (default: 4)
 """
 
 import argparse
@@ -31,7 +36,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main(reset: bool = False):
+async def main(reset: bool = False, full: bool = False, workers: int = 4):
     """Main ingestion function."""
     logger.info("=" * 60)
     logger.info("Elson Financial AI - Knowledge Base Ingestion")
@@ -58,6 +63,7 @@ async def main(reset: bool = False):
         try:
             rag.client.delete_collection(rag.collection_name)
             rag._collection = None  # Reset cached collection
+            rag.reset_manifest()
             logger.info("Collection reset successfully")
         except Exception as e:
             logger.warning(f"Could not reset collection: {e}")
@@ -70,13 +76,23 @@ async def main(reset: bool = False):
     logger.info("\nStarting knowledge ingestion...")
     total_chunks = await rag.ingest_knowledge_base(
         chunk_size=500,
-        chunk_overlap=50
+        chunk_overlap=50,
+        max_workers=workers,
+        incremental=not full
     )
 
     # Get stats after
     stats_after = rag.get_collection_stats()
     logger.info(f"\nDocuments after ingestion: {stats_after.get('total_documents', 0)}")
-    logger.info(f"New chunks added: {total_chunks}")
+    logger.info(f"Chunks embedded and written: {total_chunks}")
+    run = rag.last_ingestion
+    logger.info(
+        f"Files skipped: {run.get('files_skipped', 0)}, "
+        f"processed: {run.get('files_processed', 0)}; "
+        f"chunks unchanged: {run.get('chunks_unchanged', 0)}, "
+        f"deleted: {run.get('chunks_deleted', 0)} "
+        f"({run.get('seconds', 0)}s)"
+    )
 
     # Test retrieval
     logger.info("\n" + "=" * 60)
@@ -165,10 +181,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Ingest wealth management knowledge base")
     parser.add_argument("--reset", action="store_true", help="Reset collection before ingesting")
     parser.add_argument("--validate", action="store_true", help="Only validate files, don't ingest")
+    parser.add_argument("--full", action="store_true", help="Re-embed all chunks, ignoring the manifest")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent embedding batches")
     args = parser.parse_args()
 
     if args.validate:
         success = validate_knowledge_files()
         sys.exit(0 if success else 1)
 
-    asyncio.run(main(reset=args.reset))
+    asyncio.run(main(reset=args.reset, full=args.full, workers=args.workers))
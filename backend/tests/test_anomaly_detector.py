@@ -0,0 +1,207 @@
+"""
+Tests for batch and streaming anomaly detection in the anomaly detector
+
+This test suite validates:
+1. Batch price, volume and volatility detection equal the per-symbol detectors
+2. Market-tick scans score each symbol independently of the others
+3. Large tick moves are reported like the per-symbol price detector does
+"""
+
+import importlib
+import sys
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="module")
+def detector_module():
+    """The detector imported against a stand-in for the Redis service."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setitem(sys.modules, "app.core.redis_service", MagicMock())
+        patch.delitem(sys.modules, "app.services.anomaly_detector", raising=False)
+        yield importlib.import_module("app.services.anomaly_detector")
+        sys.modules.pop("app.services.anomaly_detector", None)
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch, detector_module):
+    redis = MagicMock()
+    redis.get.return_value = None
+    monkeypatch.setattr(detector_module, "redis_service", redis)
+    monkeypatch.setattr(detector_module, "alert_manager", MagicMock())
+
+
+def _series(n=60, seed=0, shocks=()):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, n)
+    for index, size in shocks:
+        returns[index] = size
+    return (100 * np.cumprod(1 + returns)).tolist()
+
+
+def _volumes(n=60, seed=0, spikes=()):
+    volumes = np.random.default_rng(seed).uniform(1_000, 1_500, n)
+    for index in spikes:
+        volumes[index] *= 8
+    return volumes.tolist()
+
+
+def _strip(anomalies):
+    """Anomaly fields that do not depend on when detection ran."""
+    return [
+        {k: v for k, v in anomaly.items() if k != "timestamp"} for anomaly in anomalies
+    ]
+
+
+def _scalar(detector_module, method, series, **kwargs):
+    """Run a per-symbol detector on a fresh instance for each symbol."""
+    results = {}
+    for symbol, values in series.items():
+        anomalies = getattr(detector_module.AnomalyDetector(), method)(
+            symbol, values, **kwargs
+        )
+        if anomalies:
+            results[symbol] = anomalies
+    return results
+
+
+def _assert_same(batch, scalar):
+    assert sorted(batch) == sorted(scalar)
+    for symbol in scalar:
+        assert _strip(batch[symbol]) == _strip(scalar[symbol]), symbol
+
+
+class TestBatchDetection:
+    """Test batch detectors against the per-symbol detectors."""
+
+    def test_price_batch(self, detector_module):
+        """Stacked price series give the per-symbol anomalies."""
+        prices = {
+            "AAPL": _series(seed=1, shocks=[(30, 0.12)]),
+            "MSFT": _series(seed=2, shocks=[(45, -0.15)]),
+            "QUIET": _series(seed=3),
+            "SHORT": _series(n=40, seed=4, shocks=[(20, 0.2)]),
+            "TINY": _series(n=5, seed=5, shocks=[(3, 0.3)]),
+        }
+
+        batch = detector_module.AnomalyDetector().detect_price_anomalies_batch(prices)
+
+        _assert_same(batch, _scalar(detector_module, "detect_price_anomalies", prices))
+        assert {"AAPL", "MSFT", "SHORT"} <= set(batch)
+        assert "TINY" not in batch
+
+    def test_volume_batch(self, detector_module):
+        """Stacked volume series give the per-symbol anomalies."""
+        volumes = {
+            "AAPL": _volumes(seed=1, spikes=[30]),
+            "MSFT": _volumes(seed=2, spikes=[10, 50]),
+            "QUIET": _volumes(seed=3),
+            "SHORT": _volumes(n=35, seed=4, spikes=[25]),
+        }
+
+        batch = detector_module.AnomalyDetector().detect_volume_anomalies_batch(volumes)
+
+        _assert_same(
+            batch, _scalar(detector_module, "detect_volume_anomalies", volumes)
+        )
+        assert "AAPL" in batch
+
+    def test_volatility_batch(self, detector_module):
+        """Stacked price series give the per-symbol volatility anomalies."""
+        calm = list(np.random.default_rng(9).normal(0, 0.002, 40))
+        wild = list(np.random.default_rng(10).normal(0, 0.05, 30))
+        prices = {
+            "AAPL": (100 * np.cumprod(1 + np.array(calm + wild))).tolist(),
+            "MSFT": _series(n=70, seed=2),
+            "SHORT": _series(n=45, seed=4),
+        }
+
+        batch = detector_module.AnomalyDetector().detect_volatility_anomalies_batch(
+            prices
+        )
+
+        _assert_same(
+            batch, _scalar(detector_module, "detect_volatility_anomalies", prices)
+        )
+        assert "AAPL" in batch
+
+
+class TestMarketTickScan:
+    """Test streaming scans of many symbols per tick."""
+
+    def _ticks(self):
+        return {
+            "AAPL": _series(n=40, seed=1, shocks=[(30, 0.12)]),
+            "MSFT": _series(n=40, seed=2, shocks=[(35, -0.15)]),
+            "QUIET": _series(n=40, seed=3),
+        }
+
+    def test_symbols_are_independent(self, detector_module):
+        """A shared scan equals one scan per symbol."""
+        series = self._ticks()
+        shared = detector_module.AnomalyDetector()
+        alone = {symbol: detector_module.AnomalyDetector() for symbol in series}
+
+        for t in range(40):
+            found = shared.scan_market_tick(
+                {symbol: values[t] for symbol, values in series.items()},
+                timestamp=str(t),
+            )
+            expected = [
+                anomaly
+                for symbol, values in series.items()
+                for anomaly in alone[symbol].scan_market_tick(
+                    {symbol: values[t]}, timestamp=str(t)
+                )
+            ]
+            assert _strip(found) == _strip(expected)
+
+    def test_large_moves_match_price_detector(self, detector_module):
+        """Moves beyond the change threshold match the scalar detector."""
+        series = self._ticks()
+        config = {"anomaly_cooldown_minutes": 0}
+        threshold = (
+            detector_module.AnomalyDetector().config["price_change_threshold"] * 1.2
+        )
+        detector = detector_module.AnomalyDetector(config)
+
+        streamed = {}
+        for t in range(40):
+            ticks = {symbol: values[t] for symbol, values in series.items()}
+            for anomaly in detector.scan_market_tick(ticks, timestamp=str(t)):
+                streamed[(anomaly["entity_id"], anomaly["timestamp"])] = anomaly
+
+        stamps = [str(t) for t in range(40)]
+        scalar = {
+            (symbol, anomaly["timestamp"]): anomaly
+            for symbol, values in series.items()
+            for anomaly in detector_module.AnomalyDetector(
+                config
+            ).detect_price_anomalies(symbol, values, timestamps=stamps)
+        }
+        large = {key for key, a in scalar.items() if abs(a["change"]) > threshold}
+        assert large == {
+            key for key, a in streamed.items() if abs(a["change"]) > threshold
+        }
+        assert sorted(large) == [("AAPL", "30"), ("MSFT", "35")]
+        for key in large:
+            assert streamed[key]["type"] == scalar[key]["type"]
+            assert streamed[key]["value"] == scalar[key]["value"]
+            assert streamed[key]["change"] == pytest.approx(scalar[key]["change"])
+        assert (
+            streamed[("MSFT", "35")]["type"] == detector_module.AnomalyType.PRICE_DROP
+        )
+
+    def test_symbols_joining_later(self, detector_module):
+        """Symbols first seen mid-stream start warming up on their own."""
+        detector = detector_module.AnomalyDetector()
+        series = self._ticks()
+
+        for t in range(25):
+            detector.scan_market_tick({"AAPL": series["AAPL"][t]})
+        late = detector.scan_market_tick({"AAPL": series["AAPL"][25], "NEW": 50.0})
+
+        assert late == []
+        assert detector._stream_symbols == ["AAPL", "NEW"]
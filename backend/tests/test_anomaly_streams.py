@@ -0,0 +1,164 @@
+"""
+Tests for array and streaming anomaly-detection primitives
+
+This test suite validates:
+1. Row-wise returns, z-scores and rolling volatility equal per-point loops
+2. The EWMA detector gives exact running statistics while warming up
+3. The robust detector tracks the median and shrugs off outliers
+4. The bucketed history expires, queries and persists by bucket
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.anomaly_streams import (
+    AnomalyHistoryStore,
+    EWMADetector,
+    RobustDetector,
+    ratio_to_previous,
+    rolling_std,
+    row_zscores,
+    simple_returns,
+    stack_series,
+    to_epoch,
+)
+
+
+def _loop_returns(prices):
+    returns = [0.0]
+    for i in range(1, len(prices)):
+        if prices[i - 1] > 0:
+            returns.append((prices[i] - prices[i - 1]) / prices[i - 1])
+        else:
+            returns.append(0.0)
+    return returns
+
+
+@pytest.fixture
+def price_rows():
+    rng = np.random.default_rng(7)
+    rows = 100 * np.cumprod(1 + rng.normal(0, 0.02, (6, 50)), axis=1)
+    rows[2, 10] = 0.0
+    return rows
+
+
+class TestRowStatistics:
+    """Test array statistics against the scalar loops they replace."""
+
+    def test_returns_and_zscores(self, price_rows):
+        """Each row matches the list-based return and z-score computation."""
+        returns = simple_returns(price_rows)
+        zscores, means = row_zscores(returns)
+
+        for row, prices in enumerate(price_rows.tolist()):
+            expected = _loop_returns(prices)
+            std = np.std(expected) or 0.001
+            assert returns[row] == pytest.approx(expected)
+            assert means[row] == pytest.approx(np.mean(expected))
+            assert zscores[row] == pytest.approx(
+                [(r - np.mean(expected)) / std for r in expected]
+            )
+
+    def test_ratio_to_previous(self):
+        """Ratios fall back where the previous value is not positive."""
+        ratios = ratio_to_previous(
+            stack_series([[0.0, 2.0, 4.0, 0.0, 3.0]]), first=0.0, fallback=1.0
+        )
+
+        assert ratios.tolist() == [[0.0, 1.0, 2.0, 0.0, 1.0]]
+
+    def test_rolling_std(self, price_rows):
+        """Rolling volatility equals np.std over each trailing window."""
+        returns = simple_returns(price_rows)
+        window = 14
+
+        volatility = rolling_std(returns, window)
+
+        for row, values in enumerate(returns.tolist()):
+            expected = [0.0] * window + [
+                np.std(values[i - window : i]) for i in range(window, len(values))
+            ]
+            assert volatility[row] == pytest.approx(expected)
+
+
+class TestStreamingDetectors:
+    """Test O(1) streaming detectors."""
+
+    def test_ewma_warmup_is_exact(self):
+        """Before 1/n falls below alpha the state is the running mean/var."""
+        rng = np.random.default_rng(1)
+        data = rng.normal(5, 2, (10, 3))
+        detector = EWMADetector(size=3, alpha=0.05, warmup=5)
+
+        for step, point in enumerate(data):
+            scores = detector.update(point)
+            if step < 5:
+                assert np.isnan(scores).all()
+
+        assert detector.mean == pytest.approx(data.mean(axis=0))
+        assert detector.var == pytest.approx(data.var(axis=0))
+
+    def test_ewma_mask_leaves_other_series(self):
+        """Series without a new point keep their state."""
+        detector = EWMADetector(size=2, warmup=0)
+        detector.update(np.array([1.0, 10.0]))
+        detector.update(np.array([3.0, np.nan]), mask=np.array([True, False]))
+
+        assert detector.mean.tolist() == [2.0, 10.0]
+        assert detector.count.tolist() == [2, 1]
+
+    def test_robust_detector_resists_outliers(self):
+        """Outliers barely move the median estimate but score highly."""
+        rng = np.random.default_rng(2)
+        detector = RobustDetector(size=1, warmup=20)
+        for value in rng.normal(0, 1, 500):
+            detector.update(np.array([value]))
+        median = detector.median[0]
+
+        score = detector.update(np.array([50.0]))[0]
+
+        assert abs(median) < 0.3
+        assert 0.4 < detector.mad[0] < 1.0
+        assert score > 20
+        assert abs(detector.median[0] - median) < 0.1
+
+
+class TestAnomalyHistoryStore:
+    """Test the time-bucketed anomaly history."""
+
+    def test_cooldown_query_and_expiry(self):
+        """Last-seen times, newest-first queries and bucket expiry."""
+        store = AnomalyHistoryStore(bucket_seconds=60, retention_seconds=3600)
+        base = datetime(2024, 1, 1, 12, 0)
+        for minute in (0, 30, 90, 91):
+            store.append(
+                "AAPL:PRICE_SPIKE",
+                {"timestamp": (base + timedelta(minutes=minute)).isoformat()},
+            )
+
+        now = to_epoch(base + timedelta(minutes=95))
+        newest = [e for e, _, _ in store.query(start=to_epoch(base) + 1800)]
+
+        assert store.last_seen("AAPL:PRICE_SPIKE") == to_epoch(
+            base + timedelta(minutes=91)
+        )
+        assert newest == sorted(newest, reverse=True)
+        assert len(newest) == 3
+        assert store.expire(now=now) == 2
+        assert len(store) == 2
+
+    def test_only_changed_buckets_are_dirty(self):
+        """Persisting after an append writes just the touched bucket."""
+        store = AnomalyHistoryStore(bucket_seconds=300)
+        store.load_bucket(
+            [{"entity_id": "MSFT", "type": "VOLUME_SPIKE", "timestamp": "2024-01-01"}]
+        )
+        store.append("TSLA:PRICE_DROP", {"timestamp": "2024-01-01T00:07:00"})
+
+        dirty = store.take_dirty()
+
+        assert list(dirty) == [store.bucket_of(to_epoch("2024-01-01T00:07:00"))]
+        assert store.take_dirty() == {}
+        assert store.last_seen("MSFT:VOLUME_SPIKE") == to_epoch("2024-01-01")
@@ -0,0 +1,184 @@
+"""
+Tests for compact OHLCV response encodings
+
+This test suite validates:
+1. LTTB downsampling keeps endpoints and extremes
+2. Columnar conversion and format negotiation
+3. The serialization benchmark reports smaller columnar payloads
+4. The history endpoint serves both formats from the same source
+"""
+
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.bar_serialization import (
+    ARROW,
+    ARROW_MEDIA_TYPE,
+    COLUMNAR,
+    ROWS,
+    bars_to_columns,
+    benchmark_serialization,
+    columns_to_lists,
+    downsample_columns,
+    lttb_indices,
+    negotiate_format,
+    pa,
+)
+
+
+class TestLTTB:
+    """Test Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_keeps_endpoints_and_spike(self):
+        """First, last and an isolated spike survive downsampling."""
+        y = np.zeros(1000)
+        y[500] = 10.0
+
+        index = lttb_indices(y, 50)
+
+        assert len(index) == 50
+        assert index[0] == 0 and index[-1] == 999
+        assert 500 in index
+        assert np.all(np.diff(index) > 0)
+
+    def test_short_series_unchanged(self):
+        """Series shorter than the threshold are returned whole."""
+        index = lttb_indices(np.arange(10.0), 20)
+        np.testing.assert_array_equal(index, np.arange(10))
+
+    def test_downsample_columns_applies_to_every_field(self):
+        """All columns are reduced with the same indices."""
+        columns = {
+            "timestamp": np.array([str(i) for i in range(200)], dtype=object),
+            "close": np.sin(np.linspace(0, 10, 200)),
+            "volume": np.arange(200),
+        }
+
+        reduced = downsample_columns(columns, 20)
+
+        assert all(len(v) == 20 for v in reduced.values())
+        assert reduced["volume"].tolist() == [int(t) for t in reduced["timestamp"]]
+
+
+class TestColumnarEncoding:
+    """Test column conversion and negotiation."""
+
+    def test_bars_to_columns_roundtrip(self):
+        """Provider bars become arrays and NaN becomes null in JSON lists."""
+        bars = [
+            {
+                "timestamp": "2024-01-01",
+                "open": 1,
+                "high": 2,
+                "low": 0.5,
+                "close": 1.5,
+                "volume": 10,
+            },
+            {
+                "timestamp": "2024-01-02",
+                "open": None,
+                "high": 3,
+                "low": 1,
+                "close": 2.5,
+                "volume": 20,
+            },
+        ]
+
+        lists = columns_to_lists(bars_to_columns(bars))
+
+        assert lists["timestamp"] == ["2024-01-01", "2024-01-02"]
+        assert lists["open"] == [1.0, None]
+        assert lists["close"] == [1.5, 2.5]
+
+    def test_negotiate_format(self):
+        """Query parameter chooses JSON shape; Accept chooses binary."""
+        assert negotiate_format(None) == ROWS
+        assert negotiate_format(COLUMNAR, "application/json") == COLUMNAR
+        expected = ARROW if pa is not None else ROWS
+        assert negotiate_format(ROWS, ARROW_MEDIA_TYPE) == expected
+
+
+class TestSerializationBenchmark:
+    """Test the serialization benchmark."""
+
+    def test_columnar_is_smaller_than_rows(self):
+        """Columnar JSON and LTTB output are smaller than per-bar rows."""
+        results = benchmark_serialization(n_bars=5_000, max_points=500)
+
+        rows = results["rows_json"]["bytes"]
+        assert results["columnar_json"]["bytes"] < rows
+        assert results["lttb_500_columnar_json"]["bytes"] < rows / 5
+        assert all(r["milliseconds"] >= 0 for r in results.values())
+
+
+class TestHistoryEndpoint:
+    """Rows and columnar history agree on where bars come from."""
+
+    @pytest.fixture
+    def db(self):
+        from app.models.market_data import MarketData
+
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        MarketData.__table__.create(bind=engine)
+        session = sessionmaker(bind=engine)()
+        try:
+            yield session
+        finally:
+            session.close()
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_formats_fall_back_to_providers_alike(self, db, monkeypatch):
+        """With nothing stored, both formats return the provider bars."""
+        pytest.importorskip("passlib")
+        from app.api.api_v1.endpoints import market_data as endpoint
+
+        async def get_historical_columns(symbol, timeframe, limit=100):
+            return bars_to_columns(
+                [
+                    {
+                        "timestamp": f"2024-01-0{i + 1}T00:00:00",
+                        "open": 10.0 + i,
+                        "high": 11.0 + i,
+                        "low": 9.0 + i,
+                        "close": 10.5 + i,
+                        "volume": 1000.0,
+                    }
+                    for i in range(3)
+                ]
+            )
+
+        monkeypatch.setattr(
+            endpoint.market_data_service,
+            "get_historical_columns",
+            get_historical_columns,
+        )
+
+        async def history(fmt):
+            return await endpoint.get_historical_data(
+                "aapl",
+                timeframe="1day",
+                limit=3,
+                format=fmt,
+                max_points=None,
+                accept=None,
+                current_user=None,
+                db=db,
+            )
+
+        rows = await history(ROWS)
+        columnar = json.loads((await history(COLUMNAR)).body)
+
+        # Newest first in both formats
+        assert [r.close_price for r in rows] == [12.5, 11.5, 10.5]
+        assert columnar["columns"]["close"] == [12.5, 11.5, 10.5]
+        assert rows[0].symbol == "AAPL"
@@ -0,0 +1,203 @@
+"""
+Tests for the local bar warehouse
+
+This test suite validates:
+1. Append-only ingestion, tail overwrite and backfill merging
+2. Zero-copy range queries
+3. Minute-to-hour-to-day compaction and pruning
+4. MarketDataService only fetches the missing tail from providers
+"""
+
+import os
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+from app.services.bar_warehouse import (
+    BAR_DTYPE,
+    BarWarehouse,
+    aggregate_records,
+    records_to_bars,
+    to_nanoseconds,
+    to_records,
+)
+
+
+def _daily_bars(start: str, days: int, base: float = 100.0):
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + days)
+    return [
+        {
+            "timestamp": f"{d} 00:00:00",
+            "open": base + i,
+            "high": base + i + 1,
+            "low": base + i - 1,
+            "close": base + i + 0.5,
+            "volume": 1000 + i,
+        }
+        for i, d in enumerate(dates)
+    ]
+
+
+class TestIngestion:
+    """Test append-only writes."""
+
+    def test_append_and_overlap(self, tmp_path):
+        """New bars append; a re-fetched tail is overwritten in place."""
+        warehouse = BarWarehouse(str(tmp_path))
+        warehouse.append("aapl", "1day", _daily_bars("2024-01-01", 5))
+        inode = os.stat(warehouse._path("AAPL", "1day")).st_ino
+
+        refreshed = _daily_bars("2024-01-05", 3, base=200.0)
+        warehouse.append("AAPL", "1day", refreshed)
+        records = warehouse.read("AAPL", "1day")
+
+        assert len(records) == 7
+        assert os.stat(warehouse._path("AAPL", "1day")).st_ino == inode
+        assert records["close"][4] == 200.5
+        assert np.all(np.diff(records["ts"]) > 0)
+
+    def test_backfill_rewrites_sorted(self, tmp_path):
+        """Bars older than the stored range are merged in order."""
+        warehouse = BarWarehouse(str(tmp_path))
+        warehouse.append("MSFT", "1day", _daily_bars("2024-02-01", 3))
+        warehouse.append("MSFT", "1day", _daily_bars("2024-01-30", 3, base=50.0))
+
+        records = warehouse.read("MSFT", "1day")
+
+        assert len(records) == 5
+        assert np.all(np.diff(records["ts"]) > 0)
+        # Re-fetched bars win over stored ones
+        assert records["close"][2] == 52.5
+
+    def test_provider_order_and_bad_rows(self):
+        """Newest-first provider output is sorted; rows without close dropped."""
+        bars = _daily_bars("2024-01-01", 3)[::-1]
+        bars.append({"timestamp": "2024-01-09", "close": None})
+
+        records = to_records(bars)
+
+        assert len(records) == 3
+        assert records["ts"][0] == to_nanoseconds("2024-01-01")
+        # Epoch nanoseconds whatever unit pandas infers for the strings
+        assert records["ts"][0] == 1_704_067_200 * 10**9
+
+
+class TestRangeQueries:
+    """Test reads from the mapped file."""
+
+    def test_range_is_a_view(self, tmp_path):
+        """Range reads slice the memory map and honour bounds and limit."""
+        warehouse = BarWarehouse(str(tmp_path))
+        warehouse.append("SPY", "1day", _daily_bars("2024-01-01", 30))
+
+        window = warehouse.read("SPY", "1day", start="2024-01-10", end="2024-01-19")
+        tail = warehouse.read("SPY", "1day", limit=5)
+
+        assert len(window) == 10
+        assert isinstance(window, np.memmap)
+        assert window["ts"][0] == to_nanoseconds("2024-01-10")
+        assert len(tail) == 5
+        assert records_to_bars(tail)[-1]["timestamp"] == "2024-01-30 00:00:00"
+
+    def test_missing_series_is_empty(self, tmp_path):
+        """Unknown series read as empty arrays."""
+        warehouse = BarWarehouse(str(tmp_path))
+        assert len(warehouse.read("NONE", "1min")) == 0
+        assert warehouse.bars_behind("NONE", "1min") is None
+
+
+class TestCompaction:
+    """Test minute-to-hour-to-day roll-ups."""
+
+    def test_aggregate_ohlcv(self):
+        """Buckets take first open, last close, extremes and summed volume."""
+        records = np.empty(120, dtype=BAR_DTYPE)
+        start = to_nanoseconds("2024-01-02 09:30")
+        records["ts"] = start + np.arange(120) * 60 * 10**9
+        records["open"] = np.arange(120.0)
+        records["high"] = np.arange(120.0) + 1
+        records["low"] = np.arange(120.0) - 1
+        records["close"] = np.arange(120.0) + 0.5
+        records["volume"] = 1.0
+
+        hourly = aggregate_records(records, 3600 * 10**9, offset_ns=1800 * 10**9)
+
+        assert len(hourly) == 2
+        assert hourly["ts"][0] == to_nanoseconds("2024-01-02 09:30")
+        assert hourly["open"][0] == 0 and hourly["close"][0] == 59.5
+        assert hourly["high"][1] == 120 and hourly["low"][1] == 59
+        assert hourly["volume"].tolist() == [60.0, 60.0]
+
+    def test_compact_all_chain_and_prune(self, tmp_path):
+        """Minute bars roll up to hours and days; compacted minutes are pruned."""
+        warehouse = BarWarehouse(str(tmp_path))
+        minutes = np.empty(390 * 2, dtype=BAR_DTYPE)
+        day_one = to_nanoseconds("2024-01-02 09:30") + np.arange(390) * 60 * 10**9
+        day_two = day_one + 24 * 3600 * 10**9
+        minutes["ts"] = np.concatenate([day_one, day_two])
+        minutes["open"] = minutes["high"] = minutes["low"] = 10.0
+        minutes["close"] = 10.0
+        minutes["volume"] = 1.0
+        warehouse.append("QQQ", "1min", minutes)
+
+        written = warehouse.compact_all(retain_days={"1min": 0})
+
+        assert written["1min->60min"] == 14
+        days = warehouse.read("QQQ", "1day")
+        assert days["volume"].tolist() == [390.0, 390.0]
+        # Only the last, still re-aggregatable hour of minutes is kept
+        assert warehouse.count("QQQ", "1min") == 30
+        assert warehouse.compact("QQQ", "1min", "60min", 1800 * 10**9) == 1
+
+
+class TestMarketDataServiceWarehouse:
+    """Test warehouse-first historical data."""
+
+    @pytest.mark.asyncio
+    async def test_fetches_only_missing_tail(self, tmp_path):
+        """A stored series asks providers for the new bars only."""
+        from app.services.market_data import MarketDataService
+
+        # Stored history ends three business days ago
+        today = np.datetime64(datetime.now(timezone.utc).date())
+        last = np.busday_offset(today, -3, roll="backward")
+        warehouse = BarWarehouse(str(tmp_path))
+        warehouse.append("AAPL", "1day", _daily_bars(str(last - 9), 10))
+        os.utime(warehouse._path("AAPL", "1day"), (0, 0))  # synced long ago
+
+        service = MarketDataService(warehouse=warehouse)
+        provider = service.providers[0]
+        provider.get_historical_data = AsyncMock(
+            return_value=_daily_bars(str(last), 4, base=300.0)
+        )
+
+        bars = await service.get_historical_data_enhanced("AAPL", "1day", limit=5)
+
+        # Three new bars plus the stored tail, not the full window
+        assert provider.get_historical_data.await_args.args == ("AAPL", "1day", 4)
+        assert warehouse.count("AAPL", "1day") == 13
+        assert len(bars) == 5
+        assert bars[-1]["timestamp"] == f"{last + 3} 00:00:00"
+        assert bars[-1]["source"] == "warehouse"
+
+    @pytest.mark.asyncio
+    async def test_fresh_series_skips_providers(self, tmp_path):
+        """A series synced within the refresh window is served locally."""
+        from app.services.market_data import MarketDataService
+
+        warehouse = BarWarehouse(str(tmp_path))
+        warehouse.append("MSFT", "1day", _daily_bars("2024-01-01", 10))
+
+        service = MarketDataService(warehouse=warehouse)
+        for provider in service.providers:
+            provider.get_historical_data = AsyncMock(return_value=[])
+
+        columns = await service.get_historical_columns("MSFT", "1day", limit=4)
+
+        assert all(
+            not p.get_historical_data.await_count for p in service.providers
+        )
+        assert len(columns["close"]) == 4
+        assert columns["timestamp"][-1] == "2024-01-10T00:00:00"
@@ -0,0 +1,228 @@
+"""
+Tests for batched, array-native performance analysis
+
+This test suite validates:
+1. Batch metrics equal PerformanceAnalyzer.analyze run by run
+2. Flat and NaN-padded trade inputs give the same statistics
+3. MetricsTable sorting, filtering and row materialization
+4. analyze_results handles curves of different lengths in input order
+5. compare_strategies accepts both dicts and tables
+"""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.trading_engine.backtesting.batch_performance import (
+    METRIC_COLUMNS,
+    MetricsTable,
+    analyze_batch,
+    longest_run,
+    random_equity,
+    years_between,
+)
+from app.trading_engine.backtesting.performance import PerformanceAnalyzer
+
+CAPITAL = 100000.0
+
+
+@dataclass
+class _Config:
+    initial_capital: float = CAPITAL
+
+
+@dataclass
+class _Result:
+    """The BacktestResult attributes analyze_results reads."""
+
+    strategy_name: str
+    equity_curve: List[Dict[str, Any]]
+    trades: List[Dict[str, Any]]
+    config: _Config = field(default_factory=_Config)
+
+
+def _curve(equity, positions=None):
+    timestamps = pd.date_range(datetime(2021, 1, 4), periods=len(equity))
+    curve = []
+    for i, (ts, value) in enumerate(zip(timestamps, equity)):
+        snapshot = {"timestamp": ts, "total_value": float(value)}
+        if positions is not None:
+            snapshot["positions_value"] = float(positions[i])
+        curve.append(snapshot)
+    return curve
+
+
+def _trades(pnls):
+    return [{"side": "sell", "realized_pnl": float(p)} for p in pnls]
+
+
+def _assert_metrics_equal(actual, expected):
+    for name in METRIC_COLUMNS:
+        a, e = getattr(actual, name), getattr(expected, name)
+        if isinstance(e, float) and math.isnan(e):
+            assert math.isnan(a), name
+        else:
+            assert a == pytest.approx(e, rel=1e-9, abs=1e-12), name
+
+
+@pytest.fixture
+def sweep():
+    rng = np.random.default_rng(11)
+    equity = random_equity(40, 300, seed=4)
+    positions = equity * rng.uniform(0.0, 0.9, size=equity.shape)
+    trade_lists = [
+        rng.normal(50, 400, size=rng.integers(0, 30)).round(2) for _ in range(40)
+    ]
+    trade_lists[0] = np.array([120.0, 80.0])  # No losses: infinite profit factor
+    trade_lists[1] = np.array([-20.0])  # Single loss
+    return equity, positions, trade_lists
+
+
+class TestParity:
+    """Test batch results against the per-run analyzer."""
+
+    def test_matches_analyze(self, sweep):
+        """Every metric equals PerformanceAnalyzer.analyze for each run."""
+        equity, positions, trade_lists = sweep
+        equity[2] = CAPITAL  # Flat curve: zero volatility and drawdown
+        analyzer = PerformanceAnalyzer()
+        curves = [_curve(equity[i], positions[i]) for i in range(len(equity))]
+
+        table = analyzer.analyze_batch(
+            equity,
+            CAPITAL,
+            trade_pnls=np.concatenate(trade_lists),
+            trade_runs=np.repeat(
+                np.arange(len(trade_lists)), [len(t) for t in trade_lists]
+            ),
+            years=years_between(curves[0][0]["timestamp"], curves[0][-1]["timestamp"]),
+            positions_value=positions,
+        )
+
+        for run, curve in enumerate(curves):
+            expected = analyzer.analyze(curve, _trades(trade_lists[run]), CAPITAL)
+            _assert_metrics_equal(table.row(run), expected)
+        assert table["profit_factor"][0] == np.inf
+
+    def test_padded_trade_matrix(self, sweep):
+        """A NaN-padded (runs, trades) matrix equals the flat form."""
+        equity, _, trade_lists = sweep
+        width = max(len(t) for t in trade_lists)
+        padded = np.full((len(trade_lists), width), np.nan)
+        for run, pnls in enumerate(trade_lists):
+            padded[run, : len(pnls)] = pnls
+
+        flat = analyze_batch(
+            equity,
+            CAPITAL,
+            trade_pnls=np.concatenate(trade_lists),
+            trade_runs=np.repeat(
+                np.arange(len(trade_lists)), [len(t) for t in trade_lists]
+            ),
+        )
+        matrix = analyze_batch(equity, CAPITAL, trade_pnls=padded)
+
+        for name in ("total_trades", "profit_factor", "expectancy", "largest_loss"):
+            np.testing.assert_array_equal(flat[name], matrix[name])
+
+    def test_longest_run(self):
+        """Drawdown duration counts the longest stretch below the peak."""
+        mask = np.array(
+            [[True, True, False, True, True, True], [False] * 6],
+        )
+        np.testing.assert_array_equal(longest_run(mask), [3, 0])
+
+
+class TestMetricsTable:
+    """Test columnar sorting and filtering."""
+
+    def test_sort_filter_top(self):
+        """Rows are reindexed together and NaN sorts last."""
+        table = MetricsTable(
+            {
+                "sharpe_ratio": np.array([0.5, np.nan, 2.0, 1.0]),
+                "total_trades": np.array([10, 3, 0, 7]),
+            },
+            labels=["a", "b", "c", "d"],
+        )
+
+        ranked = table.sort("sharpe_ratio")
+        active = table.filter(table["total_trades"] > 5)
+
+        assert list(ranked.labels) == ["c", "d", "a", "b"]
+        assert list(ranked["total_trades"]) == [0, 7, 10, 3]
+        assert list(table.sort("sharpe_ratio", descending=False).labels) == [
+            "a",
+            "d",
+            "c",
+            "b",
+        ]
+        assert list(active.labels) == ["a", "d"]
+        assert list(table.top(2).labels) == ["c", "d"]
+
+    def test_row_round_trip(self):
+        """from_metrics and row() preserve PerformanceMetrics values."""
+        analyzer = PerformanceAnalyzer()
+        metrics = analyzer.analyze(
+            _curve(random_equity(1, 50, seed=2)[0]), _trades([10, -5]), CAPITAL
+        )
+
+        table = MetricsTable.from_metrics({"only": metrics})
+
+        _assert_metrics_equal(table.row(0), metrics)
+        assert isinstance(table.row(0).total_trades, int)
+        assert table.row(0).start_date == metrics.start_date
+        assert table.row(0).end_date == metrics.end_date
+
+
+class TestBacktestResults:
+    """Test analysis of BacktestResult batches and comparisons."""
+
+    def test_analyze_results_mixed_lengths(self):
+        """Runs are grouped by curve length and returned in input order."""
+        analyzer = PerformanceAnalyzer()
+        short = random_equity(2, 60, seed=6)
+        long = random_equity(2, 90, seed=7)
+        results = [
+            _Result("s0", _curve(short[0]), _trades([5, -3])),
+            _Result("l0", _curve(long[0]), []),
+            _Result("empty", [], []),
+            _Result("s1", _curve(short[1]), _trades([-1])),
+            _Result("l1", _curve(long[1]), _trades([2])),
+        ]
+
+        table = analyzer.analyze_results(results)
+
+        assert list(table.labels) == ["s0", "l0", "empty", "s1", "l1"]
+        for run, result in enumerate(results):
+            expected = analyzer.analyze(result.equity_curve, result.trades, CAPITAL)
+            _assert_metrics_equal(table.row(run), expected)
+            assert table.row(run).start_date == expected.start_date
+            assert table.row(run).end_date == expected.end_date
+
+    def test_compare_strategies_with_table(self):
+        """Dict and table inputs produce the same comparison frame."""
+        analyzer = PerformanceAnalyzer()
+        equity = random_equity(3, 120, seed=8)
+        names = ["fast", "slow", "mid"]
+        metrics = {
+            name: analyzer.analyze(_curve(equity[i]), _trades([i + 1.0]), CAPITAL)
+            for i, name in enumerate(names)
+        }
+        table = analyzer.analyze_results(
+            [
+                _Result(name, _curve(equity[i]), _trades([i + 1.0]))
+                for i, name in enumerate(names)
+            ]
+        )
+
+        from_dict = analyzer.compare_strategies(metrics)
+        from_table = analyzer.compare_strategies(table)
+
+        pd.testing.assert_frame_equal(from_dict, from_table)
+        assert list(from_dict.index) == names
@@ -0,0 +1,415 @@
+"""
+Tests for the child-order pipeline
+
+This test suite validates:
+1. Child trades are created up front and committed before submission
+2. Broker calls run concurrently but never exceed the in-flight limit
+3. The token bucket bounds the submission rate
+4. Fills are written back in batches with one commit per batch
+5. Children wait until they are due before taking a rate-limit token
+6. Fills are booked into holdings, cash and the live valuation
+7. Progress is tracked in memory and pushed after each batch
+8. chunk_and_execute_large_order keeps its result shape and spacing
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.holding import Holding
+from app.models.portfolio import Portfolio
+from app.models.trade import OrderType, Trade, TradeStatus
+from app.services.child_orders import (
+    ChildOrderPipeline,
+    ChildOrderProgress,
+    ChildOrderTracker,
+    OrderRateLimiter,
+)
+from app.services.portfolio_valuation import PortfolioValuationEngine
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _parent(db, quantity=1000.0):
+    trade = Trade(
+        user_id=1,
+        portfolio_id=1,
+        symbol="AAPL",
+        quantity=quantity,
+        trade_type="buy",
+        order_type=OrderType.MARKET,
+        status=TradeStatus.PENDING,
+    )
+    db.add(trade)
+    db.commit()
+    return trade
+
+
+def _commit_counter(db):
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+    return commits
+
+
+class _Broker:
+    """Fake broker recording concurrency; rejects listed child indexes."""
+
+    def __init__(self, delay=0.01, reject=()):
+        self.delay = delay
+        self.reject = set(reject)
+        self.in_flight = 0
+        self.max_seen = 0
+        self.calls = []
+
+    async def submit(self, child):
+        self.calls.append(child.index)
+        self.in_flight += 1
+        self.max_seen = max(self.max_seen, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if child.index in self.reject:
+                return {"success": False, "error": "insufficient liquidity"}
+            return {
+                "success": True,
+                "filled_quantity": float(child.quantity),
+                "average_price": 100.0 + child.index,
+                "status": "filled",
+                "order_id": f"B{child.index}",
+            }
+        finally:
+            self.in_flight -= 1
+
+
+class TestPipeline:
+    """Schedule, submission and batched fills"""
+
+    @pytest.mark.asyncio
+    async def test_children_fill_and_persist(self, db):
+        parent = _parent(db)
+        broker = _Broker()
+        pipeline = ChildOrderPipeline(db, broker.submit, tracker=ChildOrderTracker())
+
+        fills = await pipeline.run(parent, [Decimal("100")] * 10)
+
+        assert [f["broker_order_id"] for f in fills] == [f"B{i}" for i in range(10)]
+        children = db.query(Trade).filter(Trade.parent_order_id == parent.id).all()
+        assert len(children) == 10
+        assert all(c.status == TradeStatus.FILLED for c in children)
+        assert sum(c.filled_quantity for c in children) == pytest.approx(1000.0)
+        assert {c.filled_price for c in children} == {100.0 + i for i in range(10)}
+
+    @pytest.mark.asyncio
+    async def test_in_flight_limit(self, db):
+        parent = _parent(db)
+        broker = _Broker(delay=0.02)
+        pipeline = ChildOrderPipeline(
+            db, broker.submit, max_in_flight=4, tracker=ChildOrderTracker()
+        )
+
+        await pipeline.run(parent, [Decimal("10")] * 20)
+
+        assert broker.max_seen == 4
+        assert sorted(broker.calls) == list(range(20))
+
+    @pytest.mark.asyncio
+    async def test_fills_are_committed_in_batches(self, db):
+        parent = _parent(db)
+        commits = _commit_counter(db)
+        pipeline = ChildOrderPipeline(
+            db,
+            _Broker(delay=0).submit,
+            fill_batch_size=25,
+            tracker=ChildOrderTracker(),
+        )
+
+        await pipeline.run(parent, [Decimal("1")] * 100)
+
+        # One commit for the schedule, then one per batch of 25 fills
+        assert len(commits) == 1 + 4
+
+    @pytest.mark.asyncio
+    async def test_rejections_and_broker_errors(self, db):
+        parent = _parent(db)
+        broker = _Broker(reject={1})
+
+        async def submit(child):
+            if child.index == 2:
+                raise ConnectionError("broker unavailable")
+            return await broker.submit(child)
+
+        tracker = ChildOrderTracker()
+        pipeline = ChildOrderPipeline(db, submit, tracker=tracker)
+
+        fills = await pipeline.run(parent, [Decimal("100")] * 4)
+
+        assert [f["broker_order_id"] for f in fills] == ["B0", "B3"]
+        progress = tracker.get(parent.id)
+        assert (progress.filled, progress.rejected) == (2, 2)
+        rejected = (
+            db.query(Trade)
+            .filter(Trade.parent_order_id == parent.id)
+            .filter(Trade.status == TradeStatus.REJECTED)
+            .all()
+        )
+        assert {r.notes for r in rejected} == {
+            "Failed: insufficient liquidity",
+            "Failed: broker unavailable",
+        }
+
+
+class TestSchedule:
+    """Due times and booking"""
+
+    @pytest.mark.asyncio
+    async def test_children_wait_until_due(self, db):
+        parent = _parent(db)
+        loop = asyncio.get_running_loop()
+        taken = []
+
+        class _Limiter:
+            async def acquire(self):
+                taken.append(loop.time())
+                return 0.0
+
+        pipeline = ChildOrderPipeline(
+            db,
+            _Broker(delay=0).submit,
+            max_in_flight=4,
+            rate_limiter=_Limiter(),
+            tracker=ChildOrderTracker(),
+        )
+
+        start = loop.time()
+        await pipeline.run(parent, [Decimal("10")] * 4, offsets=[0, 0.1, 0.2, 0.3])
+
+        # Tokens are only taken once each child is due
+        for due, at in zip([0, 0.1, 0.2, 0.3], sorted(taken)):
+            assert at - start >= due - 0.01
+        assert sorted(taken)[-1] - start < 0.3 + 0.1
+
+    def test_offsets_must_match_chunks(self, db):
+        pipeline = ChildOrderPipeline(db, _Broker().submit, tracker=ChildOrderTracker())
+
+        with pytest.raises(ValueError):
+            pipeline.build_schedule(_parent(db), [Decimal("1")] * 2, offsets=[0])
+
+    @pytest.mark.asyncio
+    async def test_fills_are_booked(self, db):
+        db.add(
+            Portfolio(id=1, name="Main", owner_id=1, user_id=1, cash_balance=5_000.0)
+        )
+        db.commit()
+        parent = _parent(db, quantity=30.0)
+        valuation = PortfolioValuationEngine(session_factory=lambda: db)
+        state = valuation.load(1, db=db)
+        pipeline = ChildOrderPipeline(
+            db,
+            _Broker(delay=0, reject={2}).submit,
+            fill_batch_size=2,
+            tracker=ChildOrderTracker(),
+            valuation=valuation,
+        )
+
+        await pipeline.run(parent, [Decimal("10")] * 3)
+
+        # Children 0 and 1 fill at 100 and 101; child 2 is rejected
+        db.expire_all()
+        holding = db.query(Holding).filter(Holding.portfolio_id == 1).one()
+        assert holding.quantity == pytest.approx(20.0)
+        assert holding.average_cost == pytest.approx(100.5)
+        assert db.get(Portfolio, 1).cash_balance == pytest.approx(5_000.0 - 2_010.0)
+        assert state.positions["AAPL"].quantity == pytest.approx(20.0)
+        assert state.cash == pytest.approx(5_000.0 - 2_010.0)
+
+
+class TestProgress:
+    """In-memory progress and WebSocket pushes"""
+
+    @pytest.mark.asyncio
+    async def test_progress_is_pushed_per_batch(self, db):
+        parent = _parent(db)
+        pushed = []
+
+        async def notify(user_id, payload):
+            pushed.append((user_id, payload))
+
+        tracker = ChildOrderTracker()
+        pipeline = ChildOrderPipeline(
+            db,
+            _Broker(delay=0).submit,
+            fill_batch_size=5,
+            notify=notify,
+            tracker=tracker,
+        )
+
+        await pipeline.run(parent, [Decimal("10")] * 12, strategy="vwap")
+
+        assert len(pushed) == 3
+        assert all(user_id == 1 for user_id, _ in pushed)
+        assert [p["filled"] for _, p in pushed] == [5, 10, 12]
+        final = pushed[-1][1]
+        assert final["status"] == "completed"
+        assert final["percent_complete"] == 100.0
+        assert final["order_id"] == parent.id
+        assert final["average_price"] == pytest.approx(105.5)
+        assert tracker.get(parent.id).finished_at is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_push_does_not_stop_execution(self, db):
+        parent = _parent(db)
+
+        async def notify(user_id, payload):
+            raise RuntimeError("socket closed")
+
+        pipeline = ChildOrderPipeline(
+            db, _Broker(delay=0).submit, notify=notify, tracker=ChildOrderTracker()
+        )
+
+        fills = await pipeline.run(parent, [Decimal("10")] * 3)
+
+        assert len(fills) == 3
+
+    def test_tracker_keeps_running_and_recent_orders(self):
+        tracker = ChildOrderTracker(max_finished=2)
+        for i in range(5):
+            progress = ChildOrderProgress(f"P{i}", 1, "AAPL", "twap", 1, Decimal("1"))
+            progress.status = "completed" if i < 4 else "running"
+            tracker.register(progress)
+
+        assert len(tracker) == 3
+        assert tracker.get("P0") is None
+        assert [p.parent_id for p in tracker.active()] == ["P4"]
+        assert tracker.active(user_id=2) == []
+
+
+class TestRateLimiter:
+    """Token bucket"""
+
+    @pytest.mark.asyncio
+    async def test_rate_is_bounded(self):
+        limiter = OrderRateLimiter(rate_per_second=50, burst=5)
+
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(15)))
+        elapsed = time.monotonic() - start
+
+        # Five tokens up front, ten more at 50 per second
+        assert elapsed >= 0.18
+
+    def test_rate_must_be_positive(self):
+        with pytest.raises(ValueError):
+            OrderRateLimiter(0)
+
+
+class TestLargeOrderExecution:
+    """TradeExecutionService runs chunks through the pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_chunk_and_execute_large_order(self, db, monkeypatch):
+        from app.services import child_orders, trade_execution
+        from app.services.trade_execution import (
+            ExecutionStrategy,
+            TradeExecutionService,
+        )
+
+        monkeypatch.setattr(child_orders, "_child_order_tracker_instance", None)
+        pushed = []
+
+        async def record(user_id, payload):
+            pushed.append(payload)
+
+        monkeypatch.setattr(trade_execution, "push_progress", record)
+
+        class _MarketData:
+            def get_current_price(self, symbol):
+                return 250.0
+
+        service = TradeExecutionService(db, _MarketData())
+        service.max_order_chunk_size = Decimal("100")
+        service.child_order_rate_per_second = 1000.0
+        service.min_time_between_chunks = 0
+        parent = _parent(db, quantity=1050.0)
+
+        result = await service.chunk_and_execute_large_order(
+            parent, strategy=ExecutionStrategy.TWAP
+        )
+
+        assert result["success"] is True
+        assert result["status"] == TradeStatus.FILLED.value
+        assert result["executed_quantity"] == pytest.approx(1050.0)
+        assert result["average_price"] == pytest.approx(250.0)
+        assert len(result["chunks"]) == 11
+        assert pushed[-1]["status"] == "completed"
+        assert child_orders.get_child_order_tracker().get(parent.id).filled == 11
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_spaced(self, db, monkeypatch):
+        from app.services import trade_execution
+        from app.services.trade_execution import (
+            ExecutionStrategy,
+            TradeExecutionService,
+        )
+
+        class _MarketData:
+            def get_current_price(self, symbol):
+                return 250.0
+
+        service = TradeExecutionService(db, _MarketData())
+        service.max_order_chunk_size = Decimal("100")
+        service.min_time_between_chunks = 7
+        runs = []
+
+        async def run(pipeline, parent, chunk_sizes, strategy, offsets):
+            runs.append(offsets)
+            return []
+
+        monkeypatch.setattr(trade_execution.ChildOrderPipeline, "run", run)
+
+        for strategy in (ExecutionStrategy.TWAP, ExecutionStrategy.ICEBERG):
+            await service.chunk_and_execute_large_order(
+                _parent(db, quantity=300.0), strategy=strategy
+            )
+
+        assert runs[0] == [0.0, 7.0, 14.0]
+        assert runs[1] == [0.0, 7.0, 14.0, 21.0]
+
+    def test_vwap_chunks_follow_profile_slices(self):
+        from datetime import datetime
+
+        from app.services.trade_execution import TradeExecutionService
+
+        class _Profiles:
+            def session_weights(self, symbol, num_slices, now=None):
+                return [0.5, 0.25, 0.25]
+
+        service = TradeExecutionService.__new__(TradeExecutionService)
+        service.volume_profiles = _Profiles()
+        service.max_order_chunk_size = Decimal("100")
+
+        # 12:30 New York on a Monday, 210 minutes before the close
+        chunks, offsets = service._calculate_profile_schedule(
+            "AAPL", Decimal("300"), now=datetime(2024, 11, 25, 17, 30)
+        )
+
+        assert chunks == [Decimal("75"), Decimal("75"), Decimal("75"), Decimal("75")]
+        assert offsets == pytest.approx([0.0, 2_100.0, 4_200.0, 8_400.0])
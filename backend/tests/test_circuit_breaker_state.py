@@ -0,0 +1,191 @@
+"""
+Tests for circuit breaker snapshots, scheduled auto-resets and persistence
+
+This test suite validates:
+1. Trips and graduated resets behave as before on the snapshot state
+2. Readers do not block while a writer holds the lock
+3. Due auto-resets are applied from the reset heap one step per check
+4. The journal replays on restart and compacts into the status file
+5. A shared Redis store propagates trips between instances
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.trading_engine.engine.breaker_store import BreakerJournal
+from app.trading_engine.engine.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerStatus,
+    CircuitBreakerType,
+)
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the Redis commands the store uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def delete(self, key):
+        self.ops.append(lambda: self.redis.hashes.pop(key, None))
+
+    def hset(self, key, field, value):
+        self.ops.append(
+            lambda: self.redis.hashes.setdefault(key, {}).__setitem__(field, value)
+        )
+
+    def hdel(self, key, field):
+        self.ops.append(lambda: self.redis.hashes.get(key, {}).pop(field, None))
+
+    def incr(self, key):
+        def op():
+            self.redis.values[key] = int(self.redis.values.get(key, 0)) + 1
+            return self.redis.values[key]
+
+        self.ops.append(op)
+
+    def execute(self):
+        return [op() for op in self.ops]
+
+
+@pytest.fixture
+def status_file(tmp_path):
+    return str(tmp_path / "circuit_breaker_status.json")
+
+
+class TestSnapshotState:
+    """Test breaker behaviour on immutable snapshots."""
+
+    def test_trip_and_graduated_reset(self, status_file):
+        """Manual resets ease OPEN to RESTRICTED to CAUTIOUS to closed."""
+        breaker = CircuitBreaker(status_file=status_file)
+        breaker.trip(CircuitBreakerType.SYSTEM, "maintenance")
+        before = breaker.circuit_breakers
+
+        assert breaker.check() == (False, CircuitBreakerStatus.OPEN)
+        assert breaker.reset(CircuitBreakerType.SYSTEM)
+        assert before["system"]["status"] == "open"  # Old snapshot untouched
+        assert breaker.check(CircuitBreakerType.SYSTEM)[1] == (
+            CircuitBreakerStatus.RESTRICTED
+        )
+        assert breaker.reset(CircuitBreakerType.SYSTEM)
+        assert breaker.reset(CircuitBreakerType.SYSTEM)
+        assert breaker.get_status() == {}
+        assert breaker.check() == (True, CircuitBreakerStatus.CLOSED)
+
+    def test_readers_do_not_take_the_lock(self, status_file):
+        """check() completes while another thread holds the writer lock."""
+        breaker = CircuitBreaker(status_file=status_file)
+        breaker.trip(CircuitBreakerType.VOLATILITY, "spike", scope="AAPL")
+        result = {}
+
+        with breaker.lock:
+            reader = threading.Thread(
+                target=lambda: result.update(check=breaker.check(scope="AAPL"))
+            )
+            reader.start()
+            reader.join(timeout=1.0)
+
+        assert result["check"] == (False, CircuitBreakerStatus.OPEN)
+
+    def test_due_auto_reset_eases_one_step(self, status_file):
+        """An expired breaker eases on the next check and is rescheduled."""
+        breaker = CircuitBreaker(status_file=status_file)
+        breaker.trip(CircuitBreakerType.API_FAILURE, "timeouts", reset_after=5)
+        assert breaker.check(CircuitBreakerType.API_FAILURE)[0] is False
+
+        past = (datetime.now() - timedelta(seconds=1)).isoformat()
+        expired = {**breaker.circuit_breakers["api_failure"], "auto_reset_at": past}
+        with breaker.lock:
+            breaker._commit({"api_failure": expired})
+
+        assert breaker.check(CircuitBreakerType.API_FAILURE) == (
+            True,
+            CircuitBreakerStatus.RESTRICTED,
+        )
+        assert breaker.check(CircuitBreakerType.API_FAILURE)[1] == (
+            CircuitBreakerStatus.RESTRICTED
+        )
+        assert breaker._state.next_reset_at > datetime.now().timestamp()
+
+
+class TestPersistence:
+    """Test the journal and the shared Redis store."""
+
+    def test_journal_replays_on_restart(self, status_file):
+        """A new instance sees trips and resets from the journal."""
+        breaker = CircuitBreaker(status_file=status_file)
+        breaker.trip(CircuitBreakerType.MANUAL, "halt", scope="TSLA")
+        breaker.trip(CircuitBreakerType.SYSTEM, "outage")
+        breaker.reset(CircuitBreakerType.SYSTEM)
+
+        restarted = CircuitBreaker(status_file=status_file)
+
+        assert restarted.get_status() == breaker.get_status()
+        assert restarted.check(scope="TSLA")[0] is False
+        assert restarted.journal.entries == 3
+
+    def test_compaction(self, status_file):
+        """Compaction writes the status file and empties the journal."""
+        journal = BreakerJournal(status_file, compact_every=3)
+        state = {}
+        for i in range(4):
+            state = {**state, f"manual:{i}": {"status": "open"}}
+            journal.append({f"manual:{i}": {"status": "open"}}, state)
+
+        with open(status_file) as f:
+            compacted = json.load(f)
+
+        assert set(compacted) == {"manual:0", "manual:1", "manual:2"}
+        assert journal.entries == 1
+        assert set(BreakerJournal(status_file).load()) == set(state)
+
+    def test_redis_shares_state(self, status_file):
+        """Trips made by one worker are seen by another after a sync."""
+        client = FakeRedis()
+        first = CircuitBreaker(status_file=status_file, redis_client=client)
+        second = CircuitBreaker(
+            status_file=status_file, redis_client=client, sync_interval=0
+        )
+
+        first.trip(CircuitBreakerType.SYSTEM, "shared halt")
+
+        assert second.check() == (False, CircuitBreakerStatus.OPEN)
+        second.reset_all()
+        first._state = first._state._replace(next_sync_at=0)  # Sync is due
+        assert first.check() == (True, CircuitBreakerStatus.CLOSED)
+
+    def test_interleaved_writes_reload_shared_state(self, status_file):
+        """A commit racing another worker's write picks that write up."""
+        client = FakeRedis()
+        first = CircuitBreaker(status_file=status_file, redis_client=client)
+        second = CircuitBreaker(status_file=status_file, redis_client=client)
+        first.trip(CircuitBreakerType.MANUAL, "maintenance", scope="AAPL")
+
+        # Second worker writes after first's last sync
+        second.trip(CircuitBreakerType.SYSTEM, "halt from second")
+        with first.lock:
+            first._commit({"manual:AAPL": None})
+
+        assert set(first._state.breakers) == {"system"}
+        assert first._shared_version == 3
+        assert first.check() == (False, CircuitBreakerStatus.OPEN)
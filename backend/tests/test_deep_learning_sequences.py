@@ -0,0 +1,141 @@
+"""
+Tests for windowed sequences and batched rollouts in the deep-learning models
+
+This test suite validates:
+1. create_sequences matches explicitly copied windows without copying
+2. iter_batches and make_dataset yield the same windows and targets
+3. predict_future_batch matches per-series rollouts
+4. The sequence benchmark reports every input path
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from app.trading_engine.ml_models.ai_model_engine.deep_learning_models import (  # noqa: E402
+    LSTMPricePredictor,
+    TimeSeriesGenerator,
+    benchmark_sequence_generation,
+)
+
+
+def _data(n=120, features=3, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, features)).astype(np.float32)
+    y = X[:, 0] * 2 + 1
+    return X, y
+
+
+def _copied_windows(X, y, seq_length):
+    n = len(X) - seq_length
+    X_seq = np.array([X[i : i + seq_length] for i in range(n)])
+    return X_seq, y[seq_length:]
+
+
+class _LastValueModel:
+    """Keras stand-in predicting the mean of each window's first feature."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        self.calls += 1
+        return inputs[:, :, 0].mean(axis=1, keepdims=True)
+
+
+class TestSequences:
+    """Sliding-window sequences"""
+
+    def test_matches_copied_windows(self):
+        X, y = _data()
+        generator = TimeSeriesGenerator(seq_length=10, normalization=False)
+
+        X_seq, y_seq = generator.create_sequences(X, y)
+        expected_X, expected_y = _copied_windows(X, y, 10)
+
+        np.testing.assert_array_equal(X_seq, expected_X)
+        np.testing.assert_array_equal(y_seq, expected_y)
+        assert np.shares_memory(X_seq, X)
+
+    def test_too_few_samples(self):
+        generator = TimeSeriesGenerator(seq_length=10)
+        with pytest.raises(ValueError):
+            generator.create_sequences(np.zeros((10, 2)))
+
+    def test_iter_batches_cover_all_windows(self):
+        X, y = _data()
+        generator = TimeSeriesGenerator(seq_length=10, normalization=False)
+
+        batches = list(generator.iter_batches(X, y, batch_size=16))
+
+        expected_X, expected_y = _copied_windows(X, y, 10)
+        np.testing.assert_allclose(np.concatenate([b[0] for b in batches]), expected_X)
+        np.testing.assert_allclose(np.concatenate([b[1] for b in batches]), expected_y)
+        assert all(len(b[0]) <= 16 for b in batches)
+
+    def test_make_dataset_matches_sequences(self):
+        X, y = _data()
+        generator = TimeSeriesGenerator(seq_length=10, normalization=False)
+
+        dataset = generator.make_dataset(X, y, batch_size=32, start=5, end=60)
+        windows = [(bx.numpy(), by.numpy()) for bx, by in dataset]
+
+        expected_X, expected_y = _copied_windows(X, y, 10)
+        np.testing.assert_allclose(
+            np.concatenate([w[0] for w in windows]), expected_X[5:60]
+        )
+        np.testing.assert_allclose(
+            np.concatenate([w[1] for w in windows]), expected_y[5:60]
+        )
+
+
+class TestBatchedRollouts:
+    """Autoregressive forecasts for many series"""
+
+    def _predictor(self):
+        X, y = _data()
+        predictor = LSTMPricePredictor(seq_length=10)
+        predictor.generator.fit(X, y)
+        predictor.model = _LastValueModel()
+        return predictor
+
+    def test_batch_matches_single_series(self):
+        predictor = self._predictor()
+        series = [_data(seed=s)[0] for s in range(1, 4)]
+
+        batched = predictor.predict_future_batch(series, steps=5)
+        calls = predictor.model.calls
+        single = [predictor.predict_future(X, steps=5) for X in series]
+
+        # One forward pass per step for all series together
+        assert calls == 5
+        for got, expected in zip(batched, single):
+            np.testing.assert_allclose(got["mean"], expected["mean"], rtol=1e-5)
+            assert got["lower"] is None
+
+    def test_monte_carlo_bounds(self):
+        predictor = self._predictor()
+        np.random.seed(0)
+
+        (result,) = predictor.predict_future_batch(
+            [_data(seed=1)[0]], steps=4, use_monte_carlo=True, n_simulations=50
+        )
+
+        assert result["mean"].shape == (4,)
+        assert np.all(result["lower"] <= result["mean"])
+        assert np.all(result["mean"] <= result["upper"])
+
+    def test_short_series_rejected(self):
+        predictor = self._predictor()
+        with pytest.raises(ValueError):
+            predictor.predict_future_batch([np.zeros((5, 3))])
+
+
+def test_benchmark_reports_each_path():
+    results = benchmark_sequence_generation(
+        n_samples=2000, n_features=4, seq_length=20, batch_size=64
+    )
+
+    assert set(results) == {"materialized", "view", "streaming"}
+    assert results["view"]["peak_memory_mb"] < results["materialized"]["peak_memory_mb"]
@@ -0,0 +1,224 @@
+"""
+Tests for the event-driven portfolio backtester
+
+This test suite validates:
+1. The merged event stream keeps each symbol's own calendar
+2. Chunked merging yields the same events regardless of chunk size
+3. ArrayPortfolio books fills, realized P&L and marks like a ledger
+4. Rebalancing scales buys down to the available cash
+5. EventBacktester runs from a BarStore written by DataHandler
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.trading_engine.backtesting.bar_store import BarStore, frame_to_bars
+from app.trading_engine.backtesting.data_handler import DataHandler
+from app.trading_engine.backtesting.engine import BacktestConfig
+from app.trading_engine.backtesting.event_backtest import (
+    EventBacktester,
+    EventStream,
+)
+from app.trading_engine.backtesting.portfolio import ArrayPortfolio
+
+
+def _frame(dates, prices):
+    prices = np.asarray(prices, dtype=float)
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(dates),
+            "open": prices,
+            "high": prices * 1.01,
+            "low": prices * 0.99,
+            "close": prices,
+            "volume": 1000.0,
+        }
+    )
+
+
+def _random_universe(symbols=20, days=300, seed=7):
+    rng = np.random.default_rng(seed)
+    calendar = pd.bdate_range(datetime(2020, 1, 1), periods=days)
+    frames = {}
+    for s in range(symbols):
+        # Each symbol misses a different tenth of the calendar
+        dates = calendar[rng.random(days) > 0.1]
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        frames[f"SYM{s}"] = _frame(dates, prices)
+    return frames
+
+
+class TestEventStream:
+    """Heap merge of per-symbol bar arrays"""
+
+    def test_ragged_calendars_are_not_aligned(self):
+        a = frame_to_bars(_frame(["2021-01-04", "2021-01-05", "2021-01-07"], [1, 2, 3]))
+        b = frame_to_bars(_frame(["2021-01-05", "2021-01-06"], [10, 20]))
+
+        events = list(EventStream([a, b]))
+
+        assert [e.symbol_ids.tolist() for e in events] == [[0], [0, 1], [1], [0]]
+        assert events[1].close.tolist() == [2.0, 10.0]
+        assert events[2].datetime == np.datetime64("2021-01-06", "ns")
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 50, 10000])
+    def test_chunk_size_does_not_change_events(self, chunk_size):
+        bars = [frame_to_bars(df) for df in _random_universe(8, 120).values()]
+
+        reference = list(EventStream(bars, chunk_size=100000))
+        chunked = list(EventStream(bars, chunk_size=chunk_size))
+
+        assert [e.timestamp for e in chunked] == [e.timestamp for e in reference]
+        for got, expected in zip(chunked, reference):
+            np.testing.assert_array_equal(got.symbol_ids, expected.symbol_ids)
+            np.testing.assert_array_equal(got.close, expected.close)
+        assert sum(len(e.symbol_ids) for e in chunked) == sum(len(b) for b in bars)
+
+    def test_timestamps_strictly_increase(self):
+        bars = [frame_to_bars(df) for df in _random_universe(5, 60).values()]
+        timestamps = [e.timestamp for e in EventStream(bars, chunk_size=4)]
+        assert all(a < b for a, b in zip(timestamps, timestamps[1:]))
+
+    def test_start_and_end_bound_the_stream(self):
+        bars = frame_to_bars(_frame(pd.bdate_range("2021-01-04", periods=10), range(10)))
+
+        events = list(EventStream([bars], start="2021-01-06", end="2021-01-08"))
+
+        assert [e.close[0] for e in events] == [2.0, 3.0, 4.0]
+
+    def test_empty_streams_are_skipped(self):
+        empty = frame_to_bars(_frame([], []))
+        bars = frame_to_bars(_frame(["2021-01-04"], [5]))
+
+        events = list(EventStream([empty, bars]))
+
+        assert len(events) == 1
+        assert events[0].symbol_ids.tolist() == [1]
+
+
+class TestArrayPortfolio:
+    """Vectorized accounting"""
+
+    def _portfolio(self, **kwargs):
+        defaults = dict(initial_capital=10000.0, commission_rate=0.0, slippage_rate=0.0)
+        defaults.update(kwargs)
+        return ArrayPortfolio(["A", "B"], **defaults)
+
+    def test_buy_mark_and_sell_realizes_pnl(self):
+        portfolio = self._portfolio()
+        portfolio.mark(np.array([0, 1]), np.array([100.0, 50.0]))
+        portfolio.execute(np.array([0, 1]), np.array([10.0, 20.0]), timestamp=1)
+
+        assert portfolio.cash == pytest.approx(8000.0)
+        assert portfolio.total_value == pytest.approx(10000.0)
+
+        portfolio.mark(np.array([0]), np.array([110.0]))
+        assert portfolio.positions_value == pytest.approx(2100.0)
+
+        portfolio.execute(np.array([0]), np.array([-4.0]), timestamp=2)
+        assert portfolio.realized_pnl == pytest.approx(40.0)
+        assert portfolio.get_positions() == {"A": 6.0, "B": 20.0}
+
+        trades = portfolio.trade_arrays()
+        assert trades["quantity"].tolist() == [10.0, 20.0, -4.0]
+        assert np.isnan(trades["realized_pnl"][:2]).all()
+        assert trades["realized_pnl"][2] == pytest.approx(40.0)
+
+    def test_costs_reduce_cash(self):
+        portfolio = self._portfolio(commission_rate=0.001, slippage_rate=0.01)
+        portfolio.mark(np.array([0]), np.array([100.0]))
+        portfolio.execute(np.array([0]), np.array([10.0]), timestamp=1)
+
+        fill = 101.0
+        assert portfolio.avg_cost[0] == pytest.approx(fill)
+        assert portfolio.cash == pytest.approx(10000.0 - 10 * fill * 1.001)
+        # Positions are valued at the mark, not the fill
+        assert portfolio.positions_value == pytest.approx(1000.0)
+
+    def test_rebalance_reaches_target_weights(self):
+        portfolio = self._portfolio()
+        portfolio.mark(np.array([0, 1]), np.array([100.0, 50.0]))
+
+        traded = portfolio.rebalance({"A": 0.5, "B": 0.25}, timestamp=1)
+
+        assert traded == 2
+        assert portfolio.quantity.tolist() == pytest.approx([50.0, 50.0])
+        assert portfolio.cash == pytest.approx(2500.0)
+
+        portfolio.rebalance(np.array([0.0, 0.25]), timestamp=2)
+        assert portfolio.get_positions() == {"B": 50.0}
+
+    def test_rebalance_skips_unpriced_symbols(self):
+        portfolio = self._portfolio()
+        portfolio.mark(np.array([0]), np.array([100.0]))
+
+        assert portfolio.rebalance(np.array([0.5, 0.5]), timestamp=1) == 1
+        assert portfolio.quantity[1] == 0.0
+
+    def test_rebalance_scales_buys_to_cash(self):
+        portfolio = self._portfolio(commission_rate=0.01)
+        portfolio.mark(np.array([0, 1]), np.array([100.0, 50.0]))
+
+        portfolio.rebalance(np.array([0.5, 0.5]), timestamp=1)
+
+        assert portfolio.cash >= -1e-6
+        assert portfolio.quantity[0] * 100 == pytest.approx(portfolio.quantity[1] * 50)
+
+
+class TestEventBacktester:
+    """End-to-end runs over a bar store"""
+
+    def test_equal_weight_run_from_data_handler(self, tmp_path):
+        frames = _random_universe()
+        handler = DataHandler()
+        for symbol, df in frames.items():
+            handler.load_dataframe(symbol, df)
+        store = handler.to_bar_store(str(tmp_path / "bars"))
+
+        def equal_weight(ctx):
+            return np.where(np.isnan(ctx.prices), 0.0, 1.0 / len(ctx.prices))
+
+        result = EventBacktester(
+            BarStore(str(tmp_path / "bars")),
+            equal_weight,
+            config=BacktestConfig(initial_capital=100000.0),
+            rebalance_every="M",
+            chunk_size=17,
+        ).run()
+
+        calendar = set()
+        for df in frames.values():
+            calendar.update(df["timestamp"])
+        assert result.events_processed == len(calendar)
+        assert result.bars_processed == sum(len(df) for df in frames.values())
+        assert result.rebalances == len({ts.to_period("M") for ts in calendar})
+        assert len(result.equity["total_value"]) == result.events_processed
+        assert set(result.final_positions) <= set(store.symbols)
+        assert result.metrics.total_trades > 0
+        assert result.to_dict()["execution"]["events_processed"] == len(calendar)
+
+    def test_hold_strategy_keeps_cash(self):
+        bars = {"A": frame_to_bars(_frame(pd.bdate_range("2021-01-04", periods=5), range(1, 6)))}
+
+        result = EventBacktester(bars, lambda ctx: None).run()
+
+        assert result.rebalances == 0
+        assert len(result.trades["quantity"]) == 0
+        assert result.equity["total_value"].tolist() == [100000.0] * 5
+
+    def test_history_is_point_in_time(self):
+        dates = pd.bdate_range("2021-01-04", periods=6)
+        bars = {"A": frame_to_bars(_frame(dates, range(6)))}
+        seen = []
+
+        def record(ctx):
+            seen.append(ctx.history(0, 3)["close"].tolist())
+            return None
+
+        EventBacktester(bars, record).run()
+
+        assert seen[0] == [0.0]
+        assert seen[-1] == [3.0, 4.0, 5.0]
@@ -0,0 +1,217 @@
+"""
+Tests for the shared execution simulator
+
+This test suite validates:
+1. Market orders are capped by volume participation and fill partially across bars
+2. Limit orders wait behind their queue when price only touches the limit
+3. Stops trigger on the bar's range and gaps fill at the open
+4. Square-root impact grows with participation
+5. Schedule evaluation matches the bar-by-bar carry-over recursion
+6. The backtest engine routes orders through the simulator
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.trading_engine.backtesting.engine import BacktestConfig, BacktestEngine
+from app.trading_engine.engine.fill_simulator import (
+    BUY,
+    FillSimulator,
+    FlatSlippage,
+    SquareRootImpact,
+    simulate_schedule,
+)
+from app.trading_engine.strategies.base import TradingStrategy
+
+
+@dataclass
+class _Bar:
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+def _flat_bar(price=100.0, volume=1000.0, high=None, low=None):
+    return _Bar(price, high or price, low or price, price, volume)
+
+
+class _BuyOnce(TradingStrategy):
+    """Buys on the first bar it sees and then holds."""
+
+    def __init__(self):
+        super().__init__(symbol="TEST", name="buy_once")
+        self.bought = False
+
+    async def generate_signal(self, market_data):
+        if self.bought:
+            return {"action": "hold"}
+        self.bought = True
+        return {"action": "buy", "confidence": 1.0}
+
+    async def update_parameters(self, new_parameters):
+        return True
+
+
+class TestFillSimulator:
+    """Test per-bar order simulation."""
+
+    def test_participation_carries_over(self):
+        """A large market order fills 10% of volume per bar until done."""
+        sim = FillSimulator(impact_model=FlatSlippage(0.0), participation_rate=0.1)
+        sim.submit("m1", "AAA", "buy", 250)
+
+        fills = [sim.step({"AAA": _flat_bar()}) for _ in range(3)]
+
+        assert [f[0].quantity for f in fills] == [100, 100, 50]
+        assert fills[0][0].price == 100.0
+        assert fills[2][0].complete
+        assert len(sim) == 0
+
+    def test_participation_shared_between_orders(self):
+        """Orders on one symbol split the volume cap pro rata."""
+        sim = FillSimulator(impact_model=FlatSlippage(0.0), participation_rate=0.1)
+        sim.submit("a", "AAA", "buy", 150)
+        sim.submit("b", "AAA", "sell", 50)
+
+        fills = {f.order_id: f.quantity for f in sim.step({"AAA": _flat_bar()})}
+
+        assert fills == pytest.approx({"a": 75, "b": 25})
+
+    def test_limit_queue_on_touch(self):
+        """Touching the limit consumes the queue ahead before filling."""
+        sim = FillSimulator(
+            participation_rate=None,
+            queue_depth_fraction=0.15,
+            touch_volume_fraction=0.1,
+        )
+        sim.submit("l1", "AAA", "buy", 500, "limit", limit_price=99.0)
+        touch = _Bar(100.0, 101.0, 99.0, 100.0, 1000.0)
+
+        first = sim.step({"AAA": touch})  # 100 prints vs 150 ahead
+        second = sim.step({"AAA": touch})  # 50 ahead, then 50 for us
+        through = sim.step({"AAA": _Bar(99.5, 100.0, 98.0, 98.5, 1000.0)})
+
+        assert first == []
+        assert second[0].quantity == pytest.approx(50)
+        assert second[0].price == 99.0
+        assert through[0].quantity == pytest.approx(450)
+        assert through[0].impact_bps == 0.0
+
+    def test_limit_gap_fills_at_open(self):
+        """A limit buy fills at a lower open."""
+        sim = FillSimulator(participation_rate=None)
+        sim.submit("l1", "AAA", "buy", 10, "limit", limit_price=99.0)
+
+        fill = sim.step({"AAA": _Bar(97.0, 98.0, 96.0, 97.5, 1000.0)})[0]
+
+        assert fill.price == 97.0
+
+    def test_stop_trigger_and_gap(self):
+        """Stops wait for the range to reach them; gaps fill at the open."""
+        sim = FillSimulator(impact_model=FlatSlippage(0.0), participation_rate=None)
+        sim.submit("s1", "AAA", "sell", 10, "stop", stop_price=95.0)
+
+        untouched = sim.step({"AAA": _Bar(100.0, 101.0, 96.0, 97.0, 1000.0)})
+        gapped = sim.step({"AAA": _Bar(93.0, 94.0, 92.0, 93.5, 1000.0)})
+
+        assert untouched == []
+        assert gapped[0].price == 93.0
+        assert gapped[0].quantity == 10
+
+    def test_orders_without_bars_wait(self):
+        """Orders on symbols missing from the bar set are untouched."""
+        sim = FillSimulator()
+        sim.submit("m1", "BBB", "buy", 10)
+
+        assert sim.step({"AAA": _flat_bar()}) == []
+        assert sim.working_orders == ["m1"]
+        assert sim.cancel("m1")
+        assert len(sim) == 0
+
+
+class TestImpact:
+    """Test impact models."""
+
+    def test_square_root_scaling(self):
+        """Quadrupling participation doubles the impact above half spread."""
+        model = SquareRootImpact(coefficient=1.0, spread_bps=2.0)
+
+        small, large = model.cost_bps([100, 400], 10000, 0.02)
+
+        assert small - 1.0 == pytest.approx(20.0)
+        assert large - 1.0 == pytest.approx(40.0)
+
+    def test_quote_fill(self):
+        """Quote fills respect the participation cap and pay impact."""
+        sim = FillSimulator(participation_rate=0.1)
+
+        result = sim.quote_fill("sell", 5000, 50.0, volume=20000, volatility=0.02)
+
+        assert result["filled_quantity"] == 2000
+        assert result["execution_price"] < 50.0
+
+
+class TestScheduleEvaluation:
+    """Test vectorized evaluation of child-order schedules."""
+
+    def test_matches_recursion(self):
+        """Closed-form carry-over equals the bar-by-bar recursion."""
+        rng = np.random.default_rng(1)
+        bars = 200
+        volume = rng.uniform(500, 5000, size=bars)
+        close = 100 + np.cumsum(rng.normal(0, 0.2, size=bars))
+        high, low = close + 0.3, close - 0.3
+        schedules = np.stack(
+            [np.full(bars, 150.0), rng.uniform(0, 400, size=bars)]
+        )
+
+        result = simulate_schedule(
+            BUY, schedules, close, high, low, close, volume, participation_rate=0.1
+        )
+
+        for row, schedule in enumerate(schedules):
+            filled, backlog = [], 0.0
+            for t in range(bars):
+                backlog += schedule[t]
+                take = min(backlog, 0.1 * volume[t])
+                backlog -= take
+                filled.append(take)
+            np.testing.assert_allclose(result.fills[row], filled, atol=1e-8)
+            assert result.unfilled[row] == pytest.approx(backlog)
+        assert (result.shortfall_bps > -1000).all()
+
+
+class TestBacktestIntegration:
+    """Test the simulator inside the backtest engine."""
+
+    def test_engine_fills_over_following_bars(self):
+        """A buy fills from the next bar, limited by bar volume."""
+        bars = 10
+        data = pd.DataFrame(
+            {
+                "timestamp": pd.date_range(datetime(2024, 1, 1), periods=bars),
+                "open": np.full(bars, 100.0),
+                "high": np.full(bars, 101.0),
+                "low": np.full(bars, 99.0),
+                "close": np.full(bars, 100.0),
+                "volume": np.full(bars, 100.0),
+            }
+        )
+        config = BacktestConfig(warmup_bars=0, position_size=0.5)
+        engine = BacktestEngine(config, fill_simulator=FillSimulator())
+        engine.add_data("TEST", data)
+        engine.add_strategy(_BuyOnce())
+
+        result = engine.run()
+
+        buys = [t for t in result.trades if t["side"] == "buy"]
+        assert len(buys) == bars - 1  # 10 shares per bar of 500 requested
+        assert all(t["quantity"] == pytest.approx(10) for t in buys)
+        assert all(t["price"] > 100.0 for t in buys)
+        assert len(engine.fill_simulator) == 1
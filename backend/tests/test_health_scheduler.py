@@ -0,0 +1,184 @@
+"""
+Tests for the asynchronous health-check scheduler
+
+This test suite validates:
+1. Healthy services back off and unhealthy ones are probed at the fast rate
+2. Checks that miss their deadline fail without blocking other services
+3. Concurrency is bounded by the scheduler's semaphore
+4. Time-to-detect runs from the last healthy check to the confirmed failure
+5. The run loop probes each service on its own cadence
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from risk_management.health_scheduler import (
+    CheckSchedule,
+    HealthCheckScheduler,
+    LatencyHistogram,
+    ProbeFailure,
+)
+
+
+class FakeCheck:
+    """Health check returning scripted statuses."""
+
+    def __init__(self, statuses=None, delay=0.0, timeout=1.0):
+        self.statuses = list(statuses or [])
+        self.delay = delay
+        self.timeout = timeout
+        self.consecutive_failures = 0
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        status = self.statuses.pop(0) if self.statuses else "healthy"
+        return ProbeFailure("svc", "scripted", self.delay, status=status)
+
+
+class FakePolicy:
+    """Policy that counts failures like FailoverPolicy.handle_result."""
+
+    def __init__(self, service_id, health_check, failure_threshold=2):
+        self.service_id = service_id
+        self.health_check = health_check
+        self.failure_threshold = failure_threshold
+        self.results = []
+
+    def handle_result(self, result):
+        self.results.append(result)
+        if result.status == "healthy":
+            self.health_check.consecutive_failures = 0
+            return True, "healthy"
+        self.health_check.consecutive_failures += 1
+        return False, result.message
+
+
+class TestCheckSchedule:
+    """Test adaptive intervals."""
+
+    def test_backoff_and_fast_probe(self):
+        """Healthy checks grow the interval; a failure drops to the minimum."""
+        schedule = CheckSchedule(
+            base_interval=10, min_interval=2, max_interval=30, timeout=1, jitter=0
+        )
+        rng = random.Random(0)
+
+        delays = [schedule.reschedule(True, 0.0, rng) for _ in range(4)]
+        failed = schedule.reschedule(False, 100.0, rng)
+        next_run = schedule.next_run
+        recovered = schedule.reschedule(True, 100.0, rng)
+
+        assert delays == [15.0, 22.5, 30.0, 30.0]
+        assert failed == 2.0
+        assert next_run == 102.0
+        assert recovered == 15.0
+
+    def test_jitter_bounds(self):
+        """Jittered delays stay within the configured fraction."""
+        schedule = CheckSchedule(
+            base_interval=10, min_interval=10, max_interval=10, timeout=1, jitter=0.2
+        )
+        rng = random.Random(1)
+
+        delays = {schedule.reschedule(True, 0.0, rng) for _ in range(50)}
+
+        assert len(delays) > 1
+        assert all(8.0 <= delay <= 12.0 for delay in delays)
+
+    def test_histogram_quantiles(self):
+        """Quantiles report the upper bound of the matching bucket."""
+        histogram = LatencyHistogram((0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.75) == 1.0
+        assert histogram.quantile(1.0) == float("inf")
+        assert histogram.to_dict()["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+
+
+class TestRunCheck:
+    """Test single deadline-bounded checks."""
+
+    @pytest.mark.asyncio
+    async def test_deadline_miss_counts_as_failure(self, monkeypatch):
+        """A check slower than its deadline yields a failed result."""
+        monkeypatch.setattr("risk_management.health_scheduler.DEADLINE_GRACE", 0.0)
+        check = FakeCheck(delay=0.3, timeout=0.05)
+        policy = FakePolicy("slow", check)
+        scheduler = HealthCheckScheduler(executor=ThreadPoolExecutor(2))
+        scheduler.register(policy)
+
+        started = time.perf_counter()
+        result, success, _ = await scheduler.run_check("slow")
+
+        assert time.perf_counter() - started < 0.25
+        assert result.status == "failed"
+        assert "deadline" in result.message
+        assert not success
+        assert scheduler.get_metrics("slow")["slow"]["deadline_misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """No more checks run at once than max_concurrency."""
+        scheduler = HealthCheckScheduler(
+            executor=ThreadPoolExecutor(8), max_concurrency=2
+        )
+        checks = [FakeCheck(delay=0.05) for _ in range(6)]
+        for i, check in enumerate(checks):
+            scheduler.register(FakePolicy(f"svc{i}", check))
+        scheduler._semaphore = asyncio.Semaphore(2)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(scheduler.run_check(f"svc{i}") for i in range(6)))
+        elapsed = time.perf_counter() - started
+
+        assert elapsed >= 0.15
+        assert all(check.calls == 1 for check in checks)
+
+    @pytest.mark.asyncio
+    async def test_time_to_detect(self):
+        """Detection is recorded once, when the failure threshold is reached."""
+        check = FakeCheck(["healthy", "failed", "failed", "failed", "healthy"])
+        policy = FakePolicy("db", check, failure_threshold=2)
+        scheduler = HealthCheckScheduler()
+        scheduler.register(policy)
+
+        for _ in range(5):
+            await scheduler.run_check("db")
+            await asyncio.sleep(0.01)
+        metrics = scheduler.get_metrics("db")["db"]
+
+        assert metrics["time_to_detect"]["count"] == 1
+        assert 0.015 <= metrics["last_time_to_detect"] < 1.0
+        assert metrics["checks"] == 5
+        assert metrics["latency"]["count"] == 5
+
+
+class TestRunLoop:
+    """Test the scheduler's run loop."""
+
+    @pytest.mark.asyncio
+    async def test_failing_service_probed_faster(self):
+        """A failing service is checked more often than a healthy one."""
+        healthy = FakeCheck()
+        failing = FakeCheck(["failed"] * 100)
+        scheduler = HealthCheckScheduler(default_interval=0.08, seed=3)
+        scheduler.register(FakePolicy("healthy", healthy))
+        scheduler.register(FakePolicy("failing", failing))
+
+        runner = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.5)
+        scheduler.stop()
+        await runner
+
+        assert failing.calls > 2 * healthy.calls
+        assert scheduler.schedules["healthy"].current_interval > 0.08
+        assert scheduler.schedules["failing"].current_interval == 0.02
+        assert not scheduler.running
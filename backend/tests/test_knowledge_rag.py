@@ -0,0 +1,229 @@
+"""
+Tests for the knowledge RAG retrieval layer
+
+This test suite validates:
+1. Query embeddings are computed once per distinct text and reused
+2. Batched requests with the same filter share one collection query
+3. Cached results are served until documents are added
+4. Retrieval metrics count requests, cache hits and searches
+5. Re-ingestion embeds only new or changed chunks and deletes removed ones
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.knowledge_rag import (
+    AdvisoryMode,
+    RetrievalRequest,
+    WealthManagementRAG,
+    WealthTier,
+)
+
+
+def _embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+def _chroma_result(query_embeddings, n_results, where, include):
+    rows = len(query_embeddings)
+    return {
+        "documents": [[f"doc-{i}-{j}" for j in range(n_results)] for i in range(rows)],
+        "metadatas": [
+            [{"source": "kb.json", "category": "estate_planning"}] * n_results
+            for _ in range(rows)
+        ],
+        "distances": [[0.25] * n_results for _ in range(rows)],
+    }
+
+
+@pytest.fixture
+def rag():
+    service = WealthManagementRAG()
+    service._embedding_function = MagicMock(side_effect=_embed)
+    service._collection = MagicMock()
+    service._collection.query.side_effect = _chroma_result
+    return service
+
+
+class TestQueryEmbedding:
+    """Test embedding reuse."""
+
+    def test_embeds_each_text_once(self, rag):
+        """Duplicates and previously seen texts are not re-embedded."""
+        first = rag.embed_queries(["trust basics", "roth ira", "trust basics"])
+        second = rag.embed_queries(["roth ira", "529 plan"])
+
+        assert first[0] == first[2]
+        assert second[0] == first[1]
+        assert rag.embedding_function.call_count == 2
+        assert rag.embedding_function.call_args_list[0].args[0] == [
+            "trust basics",
+            "roth ira",
+        ]
+        assert rag.embedding_function.call_args_list[1].args[0] == ["529 plan"]
+
+
+class TestQueryBatch:
+    """Test batched retrieval."""
+
+    @pytest.mark.asyncio
+    async def test_groups_requests_by_filter(self, rag):
+        """Requests sharing a filter go to the collection together."""
+        requests = [
+            RetrievalRequest("What is a trust?", n_results=2),
+            RetrievalRequest("How do I fund a 529?", n_results=2),
+            RetrievalRequest(
+                "What is a trust?",
+                n_results=2,
+                advisory_mode=AdvisoryMode.ESTATE_PLANNING,
+                wealth_tier=WealthTier.GROWTH,
+            ),
+        ]
+
+        results = await rag.query_batch(requests)
+
+        assert [len(r) for r in results] == [2, 2, 2]
+        assert results[0][0]["relevance_score"] == 0.75
+        assert results[0][0]["source"] == "kb.json"
+        assert rag.embedding_function.call_count == 1
+        assert rag.collection.query.call_count == 2
+        first_call = rag.collection.query.call_args_list[0].kwargs
+        assert len(first_call["query_embeddings"]) == 2
+        assert first_call["where"] is None
+
+    @pytest.mark.asyncio
+    async def test_query_and_search_by_category_use_batch_path(self, rag):
+        """Single queries return formatted results through the same layer."""
+        results = await rag.query("Estate tax exemption", n_results=3)
+        categorized = await rag.search_by_category(
+            "Estate tax exemption", ["estate_planning"], n_results=3
+        )
+
+        assert len(results) == 3
+        assert len(categorized) == 3
+        assert rag.embedding_function.call_count == 1
+        where = rag.collection.query.call_args_list[1].kwargs["where"]
+        assert where == {"category": {"$in": ["estate_planning"]}}
+
+    @pytest.mark.asyncio
+    async def test_errors_return_empty_results(self, rag):
+        """A failing search yields empty results rather than raising."""
+        rag._collection.query.side_effect = RuntimeError("store offline")
+
+        results = await rag.query_batch([RetrievalRequest("What is a trust?")])
+
+        assert results == [[]]
+        assert rag.metrics.errors == 1
+
+
+class TestResultCache:
+    """Test result caching and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_until_ingestion(self, rag):
+        """Repeated questions are cached and cleared by add_documents."""
+        await rag.query("What is a trust?")
+        cached = await rag.query("What is a trust?")
+        cached[0]["content"] = "mutated by caller"
+        cached[0]["metadata"]["source"] = "mutated by caller"
+
+        assert rag.collection.query.call_count == 1
+        fresh = await rag.query("What is a trust?")
+        assert fresh[0]["content"] == "doc-0-0"
+        assert fresh[0]["metadata"]["source"] != "mutated by caller"
+
+        await rag.add_documents([{"id": "a", "content": "new", "metadata": {}}])
+        await rag.query("What is a trust?")
+
+        assert rag.collection.query.call_count == 2
+        assert rag.metrics.embeddings_computed == 1
+
+    @pytest.mark.asyncio
+    async def test_metrics(self, rag):
+        """Metrics report requests, hit rates and latencies."""
+        await rag.query("What is a trust?")
+        await rag.query("What is a trust?")
+
+        metrics = rag.get_retrieval_metrics()
+
+        assert metrics["requests"] == 2
+        assert metrics["result_cache_hits"] == 1
+        assert metrics["result_cache_hit_rate"] == 0.5
+        assert metrics["embeddings_computed"] == 1
+        assert metrics["searches"] == 1
+        assert metrics["search_latency"]["count"] == 1
+        assert metrics["total_latency"]["count"] == 2
+
+
+@pytest.fixture
+def kb_rag(rag, tmp_path):
+    kb = tmp_path / "kb"
+    kb.mkdir()
+    (kb / "goals.json").write_text(
+        json.dumps({"goals": [f"Goal {i}: " + "save " * 20 for i in range(6)]})
+    )
+    (kb / "basics.json").write_text(json.dumps({"budget": "Track spending monthly"}))
+    rag.persist_directory = str(tmp_path / "db")
+    rag.knowledge_base_path = kb
+    rag.category_files = {"goals": "goals.json", "basics": "basics.json"}
+    rag._collection.count.return_value = 10
+    rag._collection.get.return_value = {"ids": []}
+    return rag
+
+
+class TestIncrementalIngestion:
+    """Test manifest-based re-ingestion."""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_knowledge_base_is_skipped(self, kb_rag):
+        """A second run over identical files embeds and writes nothing."""
+        first = await kb_rag.ingest_knowledge_base(chunk_size=120, batch_size=2)
+        calls = kb_rag.embedding_function.call_count
+
+        second = await kb_rag.ingest_knowledge_base(chunk_size=120, batch_size=2)
+
+        assert first > 2
+        assert calls == -(-first // 2)
+        assert second == 0
+        assert kb_rag.embedding_function.call_count == calls
+        assert kb_rag.last_ingestion["files_skipped"] == 2
+        assert kb_rag.last_ingestion["chunks_unchanged"] == first
+        assert kb_rag.manifest_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_changed_chunks_upserted_and_removed_deleted(self, kb_rag):
+        """Only edited chunks are rewritten and dropped chunks are deleted."""
+        await kb_rag.ingest_knowledge_base(chunk_size=120)
+        upserts = kb_rag.collection.upsert.call_count
+        goals = [f"Goal {i}: " + "save " * 20 for i in range(6)]
+        goals[-1] = "Goal 5: invest"
+        (kb_rag.knowledge_base_path / "goals.json").write_text(
+            json.dumps({"goals": goals})
+        )
+        kb_rag.category_files.pop("basics")
+
+        written = await kb_rag.ingest_knowledge_base(chunk_size=120)
+
+        assert written == 1
+        assert kb_rag.last_ingestion["chunks_unchanged"] == 5
+        upserted = kb_rag.collection.upsert.call_args_list[upserts].kwargs["ids"]
+        assert all(cid.startswith("goals_") for cid in upserted)
+        kb_rag.collection.delete.assert_called_once_with(ids=["basics_0"])
+        assert kb_rag.last_ingestion["chunks_deleted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_settings_reembed_everything(self, kb_rag):
+        """A different embedding model invalidates the manifest."""
+        first = await kb_rag.ingest_knowledge_base(chunk_size=120)
+        kb_rag.collection.delete.assert_not_called()
+        stored = ["goals_0", "goals_1", "basics_0"]
+        kb_rag.collection.get.return_value = {"ids": stored}
+        kb_rag.embedding_model = "another-model"
+
+        second = await kb_rag.ingest_knowledge_base(chunk_size=120)
+
+        assert second == first
+        kb_rag.collection.delete.assert_called_once_with(ids=stored)
+        assert kb_rag.last_ingestion["chunks_deleted"] == 3
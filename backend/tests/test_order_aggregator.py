@@ -0,0 +1,464 @@
+"""
+Tests for the netting order aggregator
+
+This test suite validates:
+1. Buy/sell totals for all symbols come from one GROUP BY query
+2. Buys are netted against sells and only the residual reaches the broker
+3. Fully crossed symbols fill at a quote without a broker order
+4. Fills are allocated back to orders in bulk, pro rata on partial fills
+5. Unfilled remainders stay pending; unfinished broker orders are reconciled
+6. Fills are booked into holdings and cash
+7. Size and delay thresholds defer small recent symbols
+8. Broker order count and latency are reported per cycle
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.holding import Holding
+from app.models.portfolio import Portfolio
+from app.models.trade import OrderType, Trade, TradeStatus
+from app.services.order_aggregator import OrderAggregator
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _statements(db):
+    """Record the SQL statements issued on the session's connection."""
+    seen = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: seen.append(statement),
+    )
+    return seen
+
+
+def _order(db, symbol, side, quantity=None, price=100.0, amount=None, age=30):
+    trade = Trade(
+        user_id=1,
+        portfolio_id=1,
+        symbol=symbol,
+        quantity=quantity,
+        price=price,
+        investment_amount=amount,
+        trade_type=side,
+        order_type=OrderType.MARKET,
+        status=TradeStatus.PENDING,
+        is_fractional=True,
+        created_at=datetime.utcnow() - timedelta(minutes=age),
+    )
+    db.add(trade)
+    return trade
+
+
+class _Broker:
+    """Synchronous broker double following the BaseBroker interface.
+
+    With ``accept_only`` orders are acknowledged without fills, like
+    Alpaca's order response; ``get_trade_status`` then reports them filled.
+    """
+
+    def __init__(
+        self, price=101.0, fill_ratio=1.0, fail=(), accept_only=False, quote=99.5
+    ):
+        self.price = price
+        self.quote = quote
+        self.fill_ratio = fill_ratio
+        self.fail = set(fail)
+        self.accept_only = accept_only
+        self.orders = []
+        self.quotes = []
+        self.placed = {}
+
+    def execute_trade(self, trade):
+        if trade.symbol in self.fail:
+            raise ConnectionError("broker unavailable")
+        self.orders.append((trade.symbol, trade.trade_type, trade.quantity))
+        order_id = f"AGG-{trade.symbol}"
+        self.placed[order_id] = trade.quantity
+        if self.accept_only:
+            return {"broker_order_id": order_id, "status": TradeStatus.PENDING}
+        return {
+            "trade_id": order_id,
+            "filled_quantity": trade.quantity * self.fill_ratio,
+            "filled_price": self.price,
+            "status": "filled",
+        }
+
+    def get_trade_status(self, broker_order_id):
+        return {
+            "broker_order_id": broker_order_id,
+            "status": TradeStatus.FILLED,
+            "filled_quantity": self.placed[broker_order_id] * self.fill_ratio,
+            "filled_price": self.price,
+        }
+
+    def get_quote(self, symbol):
+        self.quotes.append(symbol)
+        if self.quote is None:
+            return {"symbol": symbol}
+        return {"symbol": symbol, "last_price": self.quote}
+
+
+def _filled(db, symbol):
+    db.expire_all()
+    return db.query(Trade).filter(Trade.symbol == symbol).all()
+
+
+class TestPendingBooks:
+    """SQL-side totals"""
+
+    def test_one_query_for_all_symbols(self, db):
+        for i in range(5):
+            _order(db, f"S{i}", "buy", quantity=2.0, price=10.0 + i)
+            _order(db, f"S{i}", "sell", quantity=1.0, price=12.0 + i)
+        db.commit()
+        statements = _statements(db)
+
+        books = OrderAggregator(db, broker=_Broker()).pending_books()
+
+        assert len(statements) == 1 and "GROUP BY" in statements[0]
+        assert sorted(books) == [f"S{i}" for i in range(5)]
+        book = books["S2"]
+        assert (book.buy_quantity, book.sell_quantity) == (2.0, 1.0)
+        assert (book.buy_count, book.sell_count) == (1, 1)
+        assert book.reference_price == pytest.approx((2 * 12 + 14) / 3)
+
+    def test_dollar_orders_use_estimated_quantity(self, db):
+        _order(db, "AAPL", "buy", amount=50.0, price=200.0)
+        _order(db, "AAPL", "buy", quantity=1.0, price=200.0)
+        db.commit()
+
+        book = OrderAggregator(db, broker=_Broker()).pending_books()["AAPL"]
+
+        assert book.buy_quantity == pytest.approx(1.25)
+        assert book.notional == pytest.approx(250.0)
+
+    def test_ineligible_orders_are_ignored(self, db):
+        _order(db, "AAPL", "buy", quantity=1.0)
+        limit = _order(db, "AAPL", "buy", quantity=5.0)
+        limit.order_type = OrderType.LIMIT
+        child = _order(db, "AAPL", "buy", quantity=5.0)
+        child.parent_order_id = "parent"
+        _order(db, "AAPL", "buy", quantity=5.0, age=60).status = TradeStatus.FILLED
+        db.commit()
+
+        book = OrderAggregator(db, broker=_Broker()).pending_books()["AAPL"]
+
+        assert book.buy_quantity == 1.0
+
+    def test_aggregate_orders_by_side(self, db):
+        buys = [
+            _order(db, "MSFT", "buy", quantity=q, price=p, age=5)
+            for q, p in [(1, 10), (3, 20)]
+        ]
+        _order(db, "MSFT", "sell", quantity=2.0, price=30.0, age=5)
+        _order(db, "MSFT", "buy", quantity=9.0, age=20)  # outside the window
+        db.commit()
+
+        aggregated = OrderAggregator(db, broker=_Broker()).aggregate_orders("MSFT")
+
+        buy = next(a for a in aggregated if a["trade_type"] == "buy")
+        assert buy["quantity"] == 4.0
+        assert buy["price"] == pytest.approx(17.5)
+        assert sorted(buy["order_ids"]) == sorted(b.id for b in buys)
+        assert [a["trade_type"] for a in aggregated] == ["buy", "sell"]
+
+
+class TestNetting:
+    """Residual routing and bulk allocation"""
+
+    @pytest.mark.asyncio
+    async def test_only_residual_is_routed(self, db):
+        for _ in range(4):
+            _order(db, "AAPL", "buy", quantity=2.5)
+        _order(db, "AAPL", "sell", quantity=4.0)
+        db.commit()
+        broker = _Broker(price=101.0)
+
+        result = await OrderAggregator(db, broker=broker).execute_aggregated_orders()
+
+        assert broker.orders == [("AAPL", "buy", pytest.approx(6.0))]
+        assert result["broker_orders"] == 1
+        assert result["total_executed"] == 5
+        assert result["crossed_quantity"] == pytest.approx(4.0)
+        orders = _filled(db, "AAPL")
+        assert all(o.status == TradeStatus.FILLED for o in orders)
+        assert {o.filled_price for o in orders} == {101.0}
+        assert {o.broker_order_id for o in orders} == {"AGG-AAPL"}
+
+    @pytest.mark.asyncio
+    async def test_fully_crossed_symbol_uses_quote(self, db):
+        _order(db, "MSFT", "buy", quantity=3.0)
+        _order(db, "MSFT", "sell", quantity=3.0)
+        db.commit()
+        broker = _Broker()
+
+        result = await OrderAggregator(db, broker=broker).execute_aggregated_orders()
+
+        assert broker.orders == [] and broker.quotes == ["MSFT"]
+        assert result["broker_orders"] == 0
+        assert {o.filled_price for o in _filled(db, "MSFT")} == {99.5}
+
+    @pytest.mark.asyncio
+    async def test_symbol_without_quote_price_fails(self, db):
+        _order(db, "MSFT", "buy", quantity=3.0, price=100.0)
+        _order(db, "MSFT", "sell", quantity=3.0, price=100.0)
+        db.commit()
+
+        result = await OrderAggregator(
+            db, broker=_Broker(quote=None)
+        ).execute_aggregated_orders()
+
+        assert result["total_failed"] == 2 and result["total_executed"] == 0
+        assert {o.status for o in _filled(db, "MSFT")} == {TradeStatus.PENDING}
+
+    @pytest.mark.asyncio
+    async def test_missing_quote_keeps_orders_on_broker_order(self, db):
+        _order(db, "AAPL", "buy", quantity=6.0, price=100.0)
+        _order(db, "AAPL", "sell", quantity=2.0, price=100.0)
+        db.commit()
+        broker = _Broker(accept_only=True, quote=None)
+        aggregator = OrderAggregator(db, broker=broker)
+
+        result = await aggregator.execute_aggregated_orders()
+
+        assert result["orders_working"] == 1 and result["total_failed"] == 1
+        buy, sell = sorted(_filled(db, "AAPL"), key=lambda o: o.trade_type.value)
+        assert buy.broker_order_id == "AGG-AAPL" and not buy.filled_quantity
+        assert sell.status == TradeStatus.PENDING and not sell.filled_quantity
+
+        # The broker fill is booked at its own price; the cross waits
+        await aggregator.execute_aggregated_orders(force=True)
+
+        assert len(broker.orders) == 1
+        buy, sell = sorted(_filled(db, "AAPL"), key=lambda o: o.trade_type.value)
+        assert buy.filled_quantity == pytest.approx(4.0)
+        assert buy.filled_price == 101.0 and buy.broker_order_id is None
+        assert sell.status == TradeStatus.PENDING
+
+    @pytest.mark.asyncio
+    async def test_partial_residual_fill_is_pro_rata(self, db):
+        _order(db, "AAPL", "buy", quantity=6.0)
+        _order(db, "AAPL", "buy", quantity=4.0)
+        _order(db, "AAPL", "sell", quantity=2.0)
+        db.commit()
+
+        await OrderAggregator(
+            db, broker=_Broker(fill_ratio=0.5)
+        ).execute_aggregated_orders()
+
+        orders = {(o.trade_type.value, o.quantity): o for o in _filled(db, "AAPL")}
+        # 2 crossed + 4 of the 8 residual = 6 of 10 bought
+        assert orders[("buy", 6.0)].filled_quantity == pytest.approx(3.6)
+        assert orders[("buy", 4.0)].filled_quantity == pytest.approx(2.4)
+        assert orders[("buy", 6.0)].status == TradeStatus.PENDING
+        assert orders[("buy", 6.0)].broker_order_id is None
+        assert orders[("sell", 2.0)].status == TradeStatus.FILLED
+
+    @pytest.mark.asyncio
+    async def test_remainder_is_routed_next_cycle(self, db):
+        _order(db, "AAPL", "buy", quantity=6.0)
+        _order(db, "AAPL", "buy", quantity=4.0)
+        _order(db, "AAPL", "sell", quantity=2.0)
+        db.commit()
+        broker = _Broker(price=100.0, fill_ratio=0.5)
+        aggregator = OrderAggregator(db, broker=broker)
+        await aggregator.execute_aggregated_orders()
+
+        broker.price, broker.fill_ratio = 110.0, 1.0
+        await aggregator.execute_aggregated_orders(force=True)
+
+        assert broker.orders[1] == ("AAPL", "buy", pytest.approx(4.0))
+        orders = {(o.trade_type.value, o.quantity): o for o in _filled(db, "AAPL")}
+        buy = orders[("buy", 6.0)]
+        assert buy.status == TradeStatus.FILLED
+        assert buy.filled_quantity == pytest.approx(6.0)
+        # 3.6 at 100, then 2.4 at 110
+        assert buy.filled_price == pytest.approx((3.6 * 100 + 2.4 * 110) / 6)
+        assert buy.total_amount == pytest.approx(3.6 * 100 + 2.4 * 110)
+
+    @pytest.mark.asyncio
+    async def test_unfinished_broker_order_is_reconciled(self, db):
+        _order(db, "AAPL", "buy", quantity=6.0)
+        _order(db, "AAPL", "sell", quantity=2.0)
+        db.commit()
+        broker = _Broker(price=101.0, accept_only=True)
+        aggregator = OrderAggregator(db, broker=broker)
+
+        result = await aggregator.execute_aggregated_orders()
+
+        # The crossed part fills at the quote; the buy waits on the broker
+        assert result["orders_working"] == 1
+        buy, sell = sorted(_filled(db, "AAPL"), key=lambda o: o.trade_type.value)
+        assert sell.status == TradeStatus.FILLED and sell.filled_price == 99.5
+        assert buy.status == TradeStatus.PENDING
+        assert buy.filled_quantity == pytest.approx(2.0)
+        assert buy.broker_order_id == "AGG-AAPL"
+
+        # Not routed again while the broker order is working
+        assert aggregator.pending_books() == {}
+
+        result = await aggregator.execute_aggregated_orders(force=True)
+
+        assert len(broker.orders) == 1
+        assert result["total_executed"] == 1
+        (buy,) = [o for o in _filled(db, "AAPL") if o.trade_type.value == "buy"]
+        assert buy.status == TradeStatus.FILLED
+        assert buy.filled_quantity == pytest.approx(6.0)
+        assert buy.filled_price == pytest.approx((2 * 99.5 + 4 * 101.0) / 6)
+
+    @pytest.mark.asyncio
+    async def test_dollar_orders_are_sized_at_clearing_price(self, db):
+        _order(db, "AAPL", "buy", amount=50.0, price=200.0)
+        db.commit()
+
+        await OrderAggregator(
+            db, broker=_Broker(price=250.0)
+        ).execute_aggregated_orders(force=True)
+
+        (order,) = _filled(db, "AAPL")
+        assert order.quantity == pytest.approx(0.2)
+        assert order.filled_quantity == pytest.approx(0.2)
+        assert order.total_amount == pytest.approx(50.0)
+
+    @pytest.mark.asyncio
+    async def test_allocation_is_bulk(self, db):
+        for i in range(40):
+            _order(db, f"S{i % 4}", "buy" if i % 3 else "sell", quantity=1.0)
+        db.commit()
+        statements = _statements(db)
+
+        result = await OrderAggregator(db, broker=_Broker()).execute_aggregated_orders()
+
+        updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE")]
+        assert result["total_executed"] == 40
+        assert len(updates) == 8  # one per symbol and side
+
+    @pytest.mark.asyncio
+    async def test_broker_failure_leaves_orders_pending(self, db):
+        _order(db, "AAPL", "buy", quantity=2.0)
+        _order(db, "MSFT", "buy", quantity=2.0)
+        db.commit()
+
+        result = await OrderAggregator(
+            db, broker=_Broker(fail={"AAPL"})
+        ).execute_aggregated_orders()
+
+        assert result["total_failed"] == 1 and result["total_executed"] == 1
+        assert _filled(db, "AAPL")[0].status == TradeStatus.PENDING
+        assert _filled(db, "MSFT")[0].status == TradeStatus.FILLED
+
+
+class TestBooking:
+    """Holdings and cash"""
+
+    @pytest.mark.asyncio
+    async def test_fills_update_holdings_and_cash(self, db):
+        db.add(Portfolio(id=1, name="A", owner_id=1, user_id=1, cash_balance=1_000.0))
+        db.add(Portfolio(id=2, name="B", owner_id=2, user_id=2, cash_balance=0.0))
+        db.add(
+            Holding(
+                portfolio_id=2,
+                symbol="AAPL",
+                asset_type="stock",
+                quantity=5.0,
+                average_cost=90.0,
+                current_price=90.0,
+                market_value=450.0,
+            )
+        )
+        _order(db, "AAPL", "buy", quantity=3.0)
+        sell = _order(db, "AAPL", "sell", quantity=5.0)
+        sell.portfolio_id = 2
+        db.commit()
+
+        await OrderAggregator(
+            db, broker=_Broker(price=100.0)
+        ).execute_aggregated_orders()
+
+        db.expire_all()
+        assert db.get(Portfolio, 1).cash_balance == pytest.approx(700.0)
+        assert db.get(Portfolio, 2).cash_balance == pytest.approx(500.0)
+        (holding,) = db.query(Holding).all()
+        assert (holding.portfolio_id, holding.quantity) == (1, pytest.approx(3.0))
+        assert holding.average_cost == pytest.approx(100.0)
+
+    @pytest.mark.asyncio
+    async def test_working_orders_book_only_the_cross(self, db):
+        db.add(Portfolio(id=1, name="A", owner_id=1, user_id=1, cash_balance=1_000.0))
+        _order(db, "AAPL", "buy", quantity=6.0)
+        _order(db, "AAPL", "sell", quantity=2.0)
+        db.commit()
+
+        await OrderAggregator(
+            db, broker=_Broker(accept_only=True)
+        ).execute_aggregated_orders()
+
+        db.expire_all()
+        # Buy 2 and sell 2 at the quote; the routed 4 are not booked yet
+        assert db.get(Portfolio, 1).cash_balance == pytest.approx(1_000.0)
+        assert db.query(Holding).count() == 0
+
+
+class TestCycle:
+    """Thresholds and reporting"""
+
+    @pytest.mark.asyncio
+    async def test_small_recent_symbols_are_deferred(self, db):
+        _order(db, "TINY", "buy", quantity=0.1, price=10.0, age=1)
+        _order(db, "OLD", "buy", quantity=0.1, price=10.0, age=30)
+        _order(db, "BIG", "buy", quantity=50.0, price=10.0, age=1)
+        db.commit()
+        broker = _Broker()
+        aggregator = OrderAggregator(db, broker=broker)
+
+        result = await aggregator.execute_aggregated_orders()
+
+        assert sorted(s for s, _, _ in broker.orders) == ["BIG", "OLD"]
+        assert result["symbols_deferred"] == 1
+
+        await aggregator.execute_aggregated_orders(force=True)
+        assert _filled(db, "TINY")[0].status == TradeStatus.FILLED
+
+    @pytest.mark.asyncio
+    async def test_report_includes_broker_latency(self, db):
+        for symbol in ("A", "B", "C"):
+            _order(db, symbol, "sell", quantity=1.0)
+        db.commit()
+
+        result = await OrderAggregator(db, broker=_Broker()).execute_aggregated_orders()
+
+        assert result["broker_orders"] == 3
+        latency = result["broker_latency_ms"]
+        assert latency["max"] >= latency["mean"] > 0
+        assert latency["total"] == pytest.approx(3 * latency["mean"])
+        assert result["cycle_ms"] >= latency["max"]
+
+    def test_run_aggregation_cycle_from_sync_code(self, db):
+        _order(db, "AAPL", "buy", quantity=1.0)
+        db.commit()
+
+        result = OrderAggregator(db, broker=_Broker()).run_aggregation_cycle()
+
+        assert result["total_executed"] == 1
@@ -0,0 +1,239 @@
+"""
+Tests for the pair discovery and monitoring engine
+
+This test suite validates:
+1. Correlation pre-filtering bounds candidates and matches the dense matrix
+2. Batched hedge ratios and Dickey-Fuller statistics match per-pair fits
+3. Screening finds planted cointegrated pairs and rejects random walks
+4. Kalman and RLS hedge filters converge to the true ratio
+5. The monitor's z-score table and pair state
+6. PairsTradingStrategy and StatisticalMeanReversion read a monitor
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.trading_engine.strategies.arbitrage.pair_engine import (
+    HedgeFilter,
+    PairMonitor,
+    adf_statistics,
+    correlation_neighbours,
+    hedge_ratios,
+    log_returns,
+    random_prices,
+    screen_pairs,
+)
+from app.trading_engine.strategies.arbitrage.pairs_trading import (
+    PairsTradingStrategy,
+)
+from app.trading_engine.strategies.mean_reversion.statistical_reversion import (
+    StatisticalMeanReversion,
+)
+
+SYMBOLS = [f"S{i}" for i in range(40)]
+
+
+class _NoData:
+    """Market data service that fails the test if it is called."""
+
+    async def get_historical_data(self, *args, **kwargs):
+        raise AssertionError("monitored pairs must not refetch history")
+
+
+def _monitor(prices=None, **kwargs):
+    prices = (
+        random_prices(len(SYMBOLS), 400, pairs=3, seed=3) if prices is None else prices
+    )
+    candidates = screen_pairs(prices, SYMBOLS)
+    return PairMonitor.from_candidates(candidates, SYMBOLS, history=prices, **kwargs)
+
+
+class TestScreening:
+    """Batched correlation and cointegration screening"""
+
+    def test_neighbours_match_dense_correlation(self):
+        returns = log_returns(random_prices(30, 200, pairs=4, seed=1))
+        dense = np.corrcoef(returns)
+
+        first, second, corr = correlation_neighbours(
+            returns, min_correlation=0.5, max_neighbours=29, block_size=7
+        )
+
+        expected = {
+            (i, j) for i in range(30) for j in range(i + 1, 30) if dense[i, j] >= 0.5
+        }
+        assert set(zip(first.tolist(), second.tolist())) == expected
+        np.testing.assert_allclose(corr, dense[first, second])
+
+    def test_neighbours_are_capped_per_symbol(self):
+        rng = np.random.default_rng(0)
+        common = rng.normal(size=300)
+        returns = common + 0.1 * rng.normal(size=(50, 300))
+
+        first, second, _ = correlation_neighbours(returns, 0.0, max_neighbours=3)
+
+        assert len(first) <= 50 * 3
+        assert (first < second).all()
+
+    def test_hedge_ratios_match_lstsq(self):
+        prices = random_prices(6, 150, pairs=3, seed=2)
+        beta, alpha = hedge_ratios(prices[[0, 2, 4]], prices[[1, 3, 5]])
+
+        for k, (a, b) in enumerate([(0, 1), (2, 3), (4, 5)]):
+            X = np.vstack([prices[b], np.ones(150)]).T
+            expected = np.linalg.lstsq(X, prices[a], rcond=None)[0]
+            assert beta[k] == pytest.approx(expected[0])
+            assert alpha[k] == pytest.approx(expected[1])
+
+    def test_adf_flags_stationary_spread(self):
+        rng = np.random.default_rng(4)
+        stationary = np.zeros(500)
+        for t in range(1, 500):
+            stationary[t] = 0.5 * stationary[t - 1] + rng.normal()
+        walk = np.cumsum(rng.normal(size=500))
+
+        t_stat, half_life = adf_statistics(np.vstack([stationary, walk]))
+
+        assert t_stat[0] < -3.9
+        assert t_stat[1] > -3.34
+        assert half_life[0] == pytest.approx(1.0, abs=0.3)
+
+    def test_screen_finds_planted_pairs(self):
+        prices = random_prices(len(SYMBOLS), 500, pairs=4, seed=5)
+
+        candidates = screen_pairs(prices, SYMBOLS)
+
+        found = {(c.symbol_a, c.symbol_b) for c in candidates}
+        assert found == {(f"S{2 * k}", f"S{2 * k + 1}") for k in range(4)}
+        assert all(c.cointegrated for c in candidates)
+        stats = [c.adf_stat for c in candidates]
+        assert stats == sorted(stats)
+
+    def test_screen_rejects_mismatched_symbols(self):
+        with pytest.raises(ValueError):
+            screen_pairs(np.ones((3, 10)), ["A", "B"])
+
+
+class TestHedgeFilter:
+    """O(1) hedge ratio updates"""
+
+    @pytest.mark.parametrize("method", ["kalman", "rls"])
+    def test_converges_to_true_ratio(self, method):
+        rng = np.random.default_rng(6)
+        x = 50 + np.cumsum(rng.normal(0, 1, (2, 2000)), axis=1)
+        y = np.array([[1.5], [0.4]]) * x + 3 + rng.normal(0, 0.5, x.shape)
+
+        hedge = HedgeFilter(np.ones(2), method=method, initial_var=1.0)
+        for t in range(x.shape[1]):
+            hedge.update(y[:, t], x[:, t])
+
+        np.testing.assert_allclose(hedge.beta, [1.5, 0.4], atol=0.05)
+
+    def test_mask_leaves_other_pairs_unchanged(self):
+        hedge = HedgeFilter(np.array([1.0, 2.0]))
+        errors = hedge.update(
+            np.array([10.0, 10.0]), np.array([5.0, 5.0]), np.array([True, False])
+        )
+
+        assert hedge.beta[1] == 2.0
+        assert np.isnan(errors[1])
+        assert errors[0] == pytest.approx(5.0)
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            HedgeFilter([1.0], method="ols")
+
+
+class TestPairMonitor:
+    """Live spread z-scores"""
+
+    def test_table_is_sorted_by_stretch(self):
+        monitor = _monitor()
+
+        table = monitor.zscore_table()
+
+        assert len(table) == len(monitor) == 3
+        assert table["z_score"].abs().is_monotonic_decreasing
+        assert monitor.zscore_table(limit=1).shape[0] == 1
+        assert (monitor.zscore_table(min_abs_z=10.0)).empty
+
+    def test_state_matches_table(self):
+        monitor = _monitor()
+        row = monitor.zscore_table().iloc[0]
+
+        state = monitor.state(row["symbol_a"], row["symbol_b"])
+
+        assert state["z_score"] == pytest.approx(row["z_score"])
+        assert state["spread"] == pytest.approx(
+            state["price_a"] - state["hedge_ratio"] * state["price_b"], rel=0.05
+        )
+        assert monitor.state("S0", "S39") is None
+
+    def test_mapping_updates_skip_missing_legs(self):
+        monitor = PairMonitor(["A", "B", "C"], [("A", "B"), ("A", "C")])
+        monitor.update({"A": 10.0, "B": 5.0, "C": 2.0})
+        monitor.update({"A": 11.0, "B": 5.5})
+
+        assert monitor.bars.tolist() == [2, 1]
+
+    def test_nan_prices_skip_pairs(self):
+        monitor = PairMonitor(["A", "B"], [("A", "B")])
+        monitor.update(np.array([10.0, np.nan]))
+
+        assert monitor.bars[0] == 0
+
+
+class TestStrategyIntegration:
+    """Strategies consume monitored spreads"""
+
+    def _stretched(self):
+        monitor = _monitor()
+        row = monitor.zscore_table().iloc[0]
+        return monitor, row["symbol_a"], row["symbol_b"], row["z_score"]
+
+    @pytest.mark.asyncio
+    async def test_pairs_strategy_uses_monitor(self):
+        monitor, a, b, z = self._stretched()
+        strategy = PairsTradingStrategy(
+            a,
+            market_data_service=_NoData(),
+            pair_symbol=b,
+            pair_monitor=monitor,
+            z_score_entry=abs(z) / 2,
+        )
+
+        signal = await strategy.generate_signal({"price": 1.0})
+
+        assert signal["action"] == ("buy" if z < 0 else "sell")
+        assert signal["indicators"]["z_score"] == pytest.approx(z)
+        assert strategy.hedge_ratio == pytest.approx(monitor.state(a, b)["hedge_ratio"])
+
+    @pytest.mark.asyncio
+    async def test_mean_reversion_uses_monitor(self):
+        monitor, a, b, z = self._stretched()
+        strategy = StatisticalMeanReversion(
+            a,
+            market_data_service=_NoData(),
+            pair_monitor=monitor,
+            pair_symbol=b,
+            z_score_entry=abs(z) / 2,
+            z_score_extreme=abs(z) * 2,
+            half_life_check=False,
+        )
+
+        signal = await strategy.generate_signal({"price": 1.0})
+
+        assert signal["action"] == ("buy" if z < 0 else "sell")
+        state = monitor.state(a, b)
+        mean = state["price_a"] - (state["spread"] - state["spread_mean"])
+        assert signal["take_profit"] == pytest.approx(mean)
+
+    def test_kalman_hedge_ratio_method(self):
+        prices = random_prices(2, 300, pairs=1, seed=8)
+        df = pd.DataFrame({"symbol_1": prices[1], "symbol_2": prices[0]})
+        strategy = PairsTradingStrategy(
+            "S1", pair_symbol="S0", hedge_ratio_method="kalman"
+        )
+
+        assert strategy._calculate_hedge_ratio(df) == pytest.approx(1.0, abs=0.1)
@@ -0,0 +1,183 @@
+"""
+Tests for the vectorized candlestick pattern engine
+
+This test suite validates:
+1. Every bar's masks equal the strategy's per-candle detectors
+2. The live strategy's last-bar lookup equals the per-candle detectors
+3. ML feature columns equal the previous row-wise pandas definitions
+4. Multi-symbol scans equal per-symbol scans
+5. The benchmark reports no mismatches
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.trading_engine.data.feature_engineering import FeatureEngineering
+from app.trading_engine.data.pattern_engine import (
+    PATTERNS,
+    PatternParams,
+    benchmark_patterns,
+    detect_patterns,
+    latest_patterns,
+    patterns_at,
+    random_ohlc,
+    scan_symbols,
+)
+from app.trading_engine.strategies.technical.candlestick_patterns import (
+    CandlestickPatternStrategy,
+)
+
+
+def _frame(o, h, l, c):
+    return pd.DataFrame({"open": o, "high": h, "low": l, "close": c})
+
+
+def _reference_features(df):
+    """Row-wise definitions previously in add_candlestick_patterns."""
+    body_size = np.abs(df["close"] - df["open"])
+    lower_wick = np.minimum(df["open"], df["close"]) - df["low"]
+    upper_wick = df["high"] - np.maximum(df["open"], df["close"])
+    range_ = df["high"] - df["low"]
+    return pd.DataFrame(
+        {
+            "doji": (body_size <= 0.1 * range_).astype(int),
+            "hammer": (
+                (body_size <= 0.3 * range_)
+                & (lower_wick >= 2 * body_size)
+                & (upper_wick <= 0.2 * body_size)
+            ).astype(int),
+            "shooting_star": (
+                (body_size <= 0.3 * range_)
+                & (upper_wick >= 2 * body_size)
+                & (lower_wick <= 0.2 * body_size)
+            ).astype(int),
+            "bullish_engulfing": (
+                (df["close"].shift(1) < df["open"].shift(1))
+                & (df["close"] > df["open"])
+                & (df["close"] > df["open"].shift(1))
+                & (df["open"] < df["close"].shift(1))
+            ).astype(int),
+            "bearish_engulfing": (
+                (df["close"].shift(1) > df["open"].shift(1))
+                & (df["close"] < df["open"])
+                & (df["close"] < df["open"].shift(1))
+                & (df["open"] > df["close"].shift(1))
+            ).astype(int),
+        }
+    )
+
+
+@pytest.fixture
+def ohlc():
+    o, h, l, c = random_ohlc(1, 600, seed=5)
+    return o[0], h[0], l[0], c[0]
+
+
+class TestStrategyParity:
+    """Test the strategy rule set against the per-candle detectors."""
+
+    @pytest.mark.parametrize(
+        "params",
+        [PatternParams(), PatternParams(shadow_ratio=1.5, engulfing_margin=1.2)],
+    )
+    def test_full_history_matches_scalar(self, ohlc, params):
+        """Masks at every bar equal the helpers run on that bar."""
+        strategy = CandlestickPatternStrategy(
+            symbol="TEST",
+            shadow_ratio=params.shadow_ratio,
+            engulfing_margin=params.engulfing_margin,
+        )
+        df = strategy._calculate_candle_properties(_frame(*ohlc))
+        masks = detect_patterns(*ohlc, params=strategy.pattern_params)
+
+        for bar in range(2, len(df)):
+            expected = strategy._detect_patterns_scalar(df.iloc[: bar + 1])
+            assert patterns_at(masks, bar) == expected, bar
+
+        assert all(masks[name].any() for name in PATTERNS)
+
+    def test_live_lookup_matches_scalar(self, ohlc):
+        """The strategy's last-bar detection equals the helpers."""
+        strategy = CandlestickPatternStrategy(symbol="TEST")
+        df = strategy._calculate_candle_properties(_frame(*ohlc))
+
+        for end in range(30, len(df), 7):
+            window = df.iloc[:end]
+            assert strategy._detect_patterns(window) == (
+                strategy._detect_patterns_scalar(window)
+            )
+            assert latest_patterns(*(a[:end] for a in ohlc)) == (
+                strategy._detect_patterns(window)
+            )
+
+    def test_pattern_history_frame(self, ohlc):
+        """Backtests get one boolean column per pattern."""
+        strategy = CandlestickPatternStrategy(symbol="TEST")
+
+        history = strategy.detect_pattern_history(_frame(*ohlc))
+
+        assert list(history.columns) == list(PATTERNS)
+        assert len(history) == len(ohlc[0])
+        assert history.dtypes.eq(bool).all()
+
+
+class TestFeaturePatterns:
+    """Test ML feature generation."""
+
+    def test_matches_previous_definitions(self, ohlc):
+        """Feature columns equal the pandas shift-based definitions."""
+        df = _frame(*ohlc)
+        df.iloc[10, 0] = np.nan
+
+        result = FeatureEngineering().add_candlestick_patterns(df.copy())
+
+        expected = _reference_features(df)
+        pd.testing.assert_frame_equal(result[expected.columns], expected)
+
+    def test_strategy_patterns_as_features(self, ohlc):
+        """Optional strategy pattern columns mirror the engine masks."""
+        df = FeatureEngineering().add_candlestick_patterns(
+            _frame(*ohlc), include_strategy_patterns=True
+        )
+
+        masks = detect_patterns(*ohlc)
+        for name in PATTERNS:
+            assert (df[f"pattern_{name}"].to_numpy() == masks[name]).all()
+
+
+class TestMultiSymbol:
+    """Test scanning many symbols at once."""
+
+    def test_matrix_equals_rows(self):
+        """A (symbols, bars) scan equals scanning each row alone."""
+        o, h, l, c = random_ohlc(8, 120, seed=3)
+
+        matrix = detect_patterns(o, h, l, c)
+
+        for row in range(8):
+            single = detect_patterns(o[row], h[row], l[row], c[row])
+            for name in PATTERNS:
+                assert (matrix[name][row] == single[name]).all()
+
+    def test_scan_symbols_with_ragged_histories(self):
+        """Histories of different lengths align on their last bar."""
+        o, h, l, c = random_ohlc(3, 80, seed=9)
+        frames = {
+            f"SYM{row}": _frame(o[row], h[row], l[row], c[row]).iloc[row * 20 :]
+            for row in range(3)
+        }
+
+        scanned = scan_symbols(frames)
+
+        for symbol, df in frames.items():
+            assert scanned[symbol] == latest_patterns(
+                df["open"], df["high"], df["low"], df["close"]
+            )
+
+    def test_benchmark(self):
+        """The benchmark finds no mismatches against the strategy."""
+        results = benchmark_patterns(symbols=3, bars=60, reference_bars=10)
+
+        assert results["mismatches"] == 0
+        assert results["vectorized_ms"] >= 0
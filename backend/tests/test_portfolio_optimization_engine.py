@@ -0,0 +1,154 @@
+"""
+Tests for the batched portfolio optimization engine
+
+This test suite validates:
+1. Analytic gradients match finite differences
+2. Warm starts are projected onto the feasible set
+3. Shared frontier and batch solves agree with direct solves
+4. PortfolioOptimizer warm-starts in the model's column order
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import approx_fprime
+
+from app.services.portfolio_optimization_engine import (
+    MAX_SHARPE,
+    RISK_PARITY,
+    PortfolioOptimizationEngine,
+    negative_sharpe,
+    portfolio_variance,
+    project_to_bounds,
+    risk_parity_deviation,
+    solve_problem,
+)
+from app.services.portfolio_optimizer import PortfolioOptimizer
+
+
+def _returns(n_assets=5, n_obs=300, seed=3):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.0005, 0.01, size=(n_obs, n_assets))
+    return pd.DataFrame(values, columns=[f"S{i}" for i in range(n_assets)])
+
+
+class TestObjectives:
+    """Test analytic gradients."""
+
+    @pytest.mark.parametrize(
+        "objective,args",
+        [
+            (negative_sharpe, "sharpe"),
+            (portfolio_variance, "cov"),
+            (risk_parity_deviation, "cov"),
+        ],
+    )
+    def test_gradient_matches_finite_differences(self, objective, args):
+        """Gradients agree with a numerical approximation."""
+        rng = np.random.default_rng(0)
+        a = rng.normal(size=(4, 4))
+        cov = a @ a.T / 4 + np.eye(4) * 0.01
+        mu = rng.normal(0.08, 0.05, size=4)
+        extra = (mu, cov, 0.02) if args == "sharpe" else (cov,)
+        weights = np.array([0.1, 0.2, 0.3, 0.4])
+
+        _, gradient = objective(weights, *extra)
+        numeric = approx_fprime(weights, lambda w: objective(w, *extra)[0], 1e-7)
+
+        np.testing.assert_allclose(gradient, numeric, rtol=1e-4, atol=1e-6)
+
+
+class TestProjection:
+    """Test warm-start projection."""
+
+    def test_projection_is_feasible(self):
+        """Projected weights respect bounds and sum to one."""
+        lower, upper = np.full(4, 0.05), np.full(4, 0.4)
+        projected = project_to_bounds(np.array([0.9, 0.0, 0.0, 0.6]), lower, upper)
+
+        assert projected.sum() == pytest.approx(1.0)
+        assert np.all(projected >= lower - 1e-12)
+        assert np.all(projected <= upper + 1e-12)
+
+
+class TestPortfolioOptimizationEngine:
+    """Test shared models, frontier and batch solves."""
+
+    def test_universe_model_is_shared(self):
+        """Identical returns snapshots reuse one model and frontier."""
+        engine = PortfolioOptimizationEngine(max_workers=1)
+        returns = _returns()
+
+        model = engine.model_from_returns(returns)
+        assert engine.model_from_returns(returns.copy()) is model
+        assert 0.0 <= model.shrinkage <= 1.0
+
+        first = engine.max_sharpe(model, 0.0, 0.5, key=1)
+        second = engine.max_sharpe(model, 0.0, 0.5, key=2)
+        assert len(model.frontiers) == 1
+        np.testing.assert_allclose(first.weights, second.weights)
+
+    def test_frontier_max_sharpe_matches_cold_solve(self):
+        """The frontier-seeded answer equals a solve from equal weights."""
+        engine = PortfolioOptimizationEngine(max_workers=1)
+        model = engine.model_from_returns(_returns())
+
+        shared = engine.max_sharpe(model, 0.0, 0.5)
+        cold = solve_problem(model.problem(MAX_SHARPE, 0.0, 0.5))
+
+        assert shared.success and cold.success
+        assert shared.objective_value == pytest.approx(cold.objective_value, abs=1e-6)
+
+    def test_batch_solves_record_warm_starts(self):
+        """Batch results are remembered and seed the next solve."""
+        engine = PortfolioOptimizationEngine(max_workers=1)
+        model = engine.model_from_returns(_returns())
+        problems = [
+            engine.build_problem(model, RISK_PARITY, 0.0, 1.0, key=user)
+            for user in (10, 11)
+        ]
+
+        solutions = engine.solve_many(problems, [model.symbols] * 2)
+        warm = engine.warm_start(10, RISK_PARITY, model.symbols)
+
+        assert all(s.success for s in solutions)
+        np.testing.assert_allclose(warm, solutions[0].weights)
+        contributions = warm * (model.covariance @ warm)
+        np.testing.assert_allclose(contributions / contributions.sum(), 0.2, atol=1e-3)
+
+
+class TestPortfolioOptimizer:
+    """Test allocation optimization on the shared universe model."""
+
+    @pytest.mark.asyncio
+    async def test_warm_start_follows_model_columns(self, monkeypatch):
+        """Holdings are matched to the model's columns, not list position."""
+        holdings = [
+            SimpleNamespace(symbol=symbol, market_value=value, current_price=10.0)
+            for symbol, value in [("S3", 400.0), ("S0", 100.0), ("S2", 300.0)]
+        ]
+        returns = _returns(n_assets=4)  # S1 has no holding
+        optimizer = PortfolioOptimizer()
+
+        async def returns_data(symbols):
+            return returns[["S0", "S2", "S3"]]
+
+        seen = {}
+        solve = optimizer._maximize_sharpe_ratio
+
+        def record(expected_returns, cov_matrix, constraints, initial_weights=None):
+            seen["initial_weights"] = initial_weights
+            return solve(expected_returns, cov_matrix, constraints, initial_weights)
+
+        monkeypatch.setattr(optimizer, "_get_returns_data", returns_data)
+        monkeypatch.setattr(optimizer, "_maximize_sharpe_ratio", record)
+
+        result = await optimizer.optimize_allocation(SimpleNamespace(holdings=holdings))
+
+        np.testing.assert_allclose(seen["initial_weights"], [0.125, 0.375, 0.5])
+        assert result["current_allocation"] == {"S0": 12.5, "S2": 37.5, "S3": 50.0}
+        assert sum(result["optimal_allocation"].values()) == pytest.approx(
+            100.0, abs=0.1
+        )
@@ -0,0 +1,249 @@
+"""
+Tests for event-driven portfolio valuation
+
+This test suite validates:
+1. Fills and price ticks keep value and P&L equal to a full recomputation
+2. Running drawdown tracking
+3. Ticks only touch portfolios holding the symbol
+4. Changed portfolios are published once and flushed in bulk
+5. Flushes take quantities and cash from the database, not the running state
+6. Flushes from the loop do their database work in a worker thread
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.holding import Holding
+from app.models.portfolio import Portfolio
+from app.services.portfolio_valuation import (
+    PortfolioState,
+    PortfolioValuationEngine,
+)
+
+
+def _recompute(state: PortfolioState):
+    market_value = sum(p.quantity * p.last_price for p in state.positions.values())
+    cost_basis = sum(p.quantity * p.average_cost for p in state.positions.values())
+    return state.cash + market_value, market_value - cost_basis
+
+
+class TestPortfolioState:
+    """Test incremental valuation arithmetic."""
+
+    def test_incremental_matches_recomputation(self):
+        """Running totals equal a walk over every position."""
+        state = PortfolioState(portfolio_id=1, user_id=1, cash=10_000.0)
+        state.apply_fill("AAPL", "buy", 10, 100.0, commission=1.0)
+        state.apply_fill("MSFT", "buy", 5, 300.0)
+        state.apply_price("AAPL", 110.0)
+        state.apply_fill("AAPL", "buy", 10, 120.0)
+        state.apply_price("MSFT", 290.0)
+        state.apply_fill("AAPL", "sell", 15, 125.0, commission=1.0)
+
+        total, unrealized = _recompute(state)
+
+        assert state.total_value == pytest.approx(total)
+        assert state.unrealized_pnl == pytest.approx(unrealized)
+        # 15 shares sold at 125 against a 110 average, less two commissions
+        assert state.realized_pnl == pytest.approx(15 * 15.0 - 2.0)
+        assert state.positions["AAPL"].quantity == 5
+
+    def test_drawdown_tracks_peak(self):
+        """Drawdown is measured from the running peak value."""
+        state = PortfolioState(portfolio_id=1, user_id=1, cash=0.0)
+        state.apply_fill("SPY", "buy", 10, 100.0)
+        state.cash = 0.0
+        state.apply_price("SPY", 120.0)
+        state.apply_price("SPY", 90.0)
+        state.apply_price("SPY", 110.0)
+
+        assert state.peak_value == pytest.approx(1200.0)
+        assert state.max_drawdown == pytest.approx(0.25)
+        assert state.drawdown == pytest.approx(100 / 1200)
+
+
+class TestPortfolioValuationEngine:
+    """Test event fan-out, publishing and flushing."""
+
+    def _engine(self):
+        engine = PortfolioValuationEngine(session_factory=MagicMock())
+        for pid, symbol in ((1, "AAPL"), (2, "MSFT")):
+            state = PortfolioState(portfolio_id=pid, user_id=pid, cash=1_000.0)
+            state.apply_fill(symbol, "buy", 1, 100.0)
+            engine.track(state)
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_tick_revalues_only_holders(self):
+        """A tick reaches only portfolios holding the symbol."""
+        engine = self._engine()
+        received = []
+
+        async def listener(snapshots):
+            received.extend(snapshots)
+
+        engine.add_listener(listener)
+        await engine.publish()
+        received.clear()
+
+        assert engine.apply_price("AAPL", 105.0) == 1
+        assert engine.apply_price("AAPL", 106.0) == 1
+        assert await engine.publish() == 1
+        assert [s["id"] for s in received] == [1]
+        assert received[0]["unrealized_pnl"] == pytest.approx(6.0)
+        assert await engine.publish() == 0
+
+    def test_flush_writes_changed_portfolios_in_bulk(self):
+        """One bulk update per table covers every changed portfolio."""
+        engine = self._engine()
+        engine.apply_price("AAPL", 101.0)
+        engine.apply_price("MSFT", 99.0)
+        session = engine.session_factory.return_value
+        session.query.return_value.filter.return_value.all.side_effect = [
+            [(1, 1_000.0), (2, 1_000.0)],
+            [(11, 1, "AAPL", 1.0, 100.0, 100.0), (12, 2, "MSFT", 1.0, 100.0, 100.0)],
+        ]
+
+        assert engine.flush() == 2
+
+        calls = session.bulk_update_mappings.call_args_list
+        assert len(calls) == 2
+        assert {row["id"] for row in calls[0].args[1]} == {1, 2}
+        assert {row["id"] for row in calls[1].args[1]} == {11, 12}
+        session.commit.assert_called_once()
+        assert engine.flush() == 0
+
+    def test_fill_for_untracked_portfolio_is_ignored(self):
+        """Untracked portfolios are loaded from the database later instead."""
+        engine = self._engine()
+        assert engine.apply_fill(99, "AAPL", "buy", 1, 100.0) is False
+        assert engine.apply_fill(1, "TSLA", "buy", 1, 200.0) is True
+        assert "TSLA" in engine.tracked_symbols()
+
+
+class TestFlushReconciliation:
+    """Test that flushes never write back stale quantities or cash."""
+
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        engine.dispose()
+
+    def _seed(self, session_factory):
+        db = session_factory()
+        db.add(
+            Portfolio(id=1, name="Main", owner_id=1, user_id=1, cash_balance=1_000.0)
+        )
+        for holding_id, symbol, quantity in ((11, "AAPL", 10.0), (12, "MSFT", 5.0)):
+            db.add(
+                Holding(
+                    id=holding_id,
+                    portfolio_id=1,
+                    symbol=symbol,
+                    asset_type="stock",
+                    quantity=quantity,
+                    average_cost=100.0,
+                    current_price=100.0,
+                    market_value=quantity * 100.0,
+                )
+            )
+        db.commit()
+        db.close()
+
+    def test_flush_uses_database_quantities_and_cash(self, session_factory):
+        """Fills booked outside the engine are picked up before writing."""
+        self._seed(session_factory)
+        engine = PortfolioValuationEngine(session_factory=session_factory)
+        assert engine.load_for_user(1).portfolio_id == 1
+
+        # Sell all MSFT, add AAPL and open TSLA without telling the engine
+        db = session_factory()
+        db.query(Holding).filter(Holding.id == 11).update({"quantity": 20.0})
+        db.query(Holding).filter(Holding.id == 12).delete()
+        db.add(
+            Holding(
+                id=13,
+                portfolio_id=1,
+                symbol="TSLA",
+                asset_type="stock",
+                quantity=2.0,
+                average_cost=200.0,
+                current_price=200.0,
+                market_value=400.0,
+            )
+        )
+        db.query(Portfolio).update({"cash_balance": 250.0})
+        db.commit()
+        db.close()
+
+        engine.apply_price("AAPL", 110.0)
+        assert engine.flush() == 1
+
+        db = session_factory()
+        portfolio = db.get(Portfolio, 1)
+        aapl, tsla = db.get(Holding, 11), db.get(Holding, 13)
+        assert portfolio.cash_balance == 250.0
+        assert portfolio.total_value == pytest.approx(250.0 + 20 * 110.0 + 400.0)
+        assert portfolio.invested_amount == pytest.approx(20 * 100.0 + 400.0)
+        assert (aapl.quantity, aapl.market_value) == (20.0, pytest.approx(2_200.0))
+        assert aapl.unrealized_gain_loss == pytest.approx(200.0)
+        assert tsla.quantity == 2.0
+        db.close()
+
+        state = engine.states[1]
+        assert state.positions["MSFT"].quantity == 0
+        assert "TSLA" in engine.tracked_symbols()
+        assert state.total_value == pytest.approx(portfolio.total_value)
+
+    @pytest.mark.asyncio
+    async def test_async_flush_uses_a_worker_thread_session(self, session_factory):
+        """The loop never opens the flush session itself."""
+        self._seed(session_factory)
+        threads = []
+
+        def factory():
+            threads.append(threading.get_ident())
+            return session_factory()
+
+        engine = PortfolioValuationEngine(session_factory=session_factory)
+        engine.load_for_user(1)
+        engine.session_factory = factory
+        engine.apply_price("AAPL", 110.0)
+
+        assert await engine.flush_async() == 1
+        assert len(threads) == 2
+        assert threading.get_ident() not in threads
+        db = session_factory()
+        assert db.get(Holding, 11).market_value == pytest.approx(1_100.0)
+        db.close()
+
+    def test_fill_during_read_back_is_not_reverted(self, session_factory):
+        """A fill published after the read stays pending instead."""
+        self._seed(session_factory)
+        engine = PortfolioValuationEngine(session_factory=session_factory)
+        engine.load_for_user(1)
+        engine.apply_price("AAPL", 110.0)
+
+        read_back = engine._read_back
+
+        def read_then_fill(ids):
+            result = read_back(ids)
+            engine.apply_fill(1, "AAPL", "buy", 5, 110.0)
+            return result
+
+        engine._read_back = read_then_fill
+        assert engine.flush() == 0
+        assert engine.states[1].positions["AAPL"].quantity == 15.0
+        assert 1 in engine._pending_flush
@@ -0,0 +1,135 @@
+"""
+Tests for the cached quantum kernel in the quantum ML models
+
+This test suite validates:
+1. Kernel blocks equal the statevector fidelity of the feature map
+2. Blocks are reused from memory and from the cache directory
+3. The cache key follows the configured feature map entanglement
+4. The classifier trains and predicts on the precomputed kernel
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("qiskit")
+pytest.importorskip("qiskit_aer")
+
+import qiskit.quantum_info as qi  # noqa: E402
+from qiskit.circuit.library import ZZFeatureMap  # noqa: E402
+
+from app.trading_engine.ml_models.ai_model_engine.quantum_models import (  # noqa: E402
+    KernelMatrixCache,
+    QuantumFeatureEncoder,
+    QuantumKernelClassifier,
+)
+
+SPEC = (2, 1, "linear")
+
+
+def _encoded(n=6, n_qubits=2, seed=0):
+    return np.random.default_rng(seed).uniform(0, np.pi, size=(n, n_qubits))
+
+
+def _fidelity(spec, a, b):
+    n_qubits, reps, entanglement = spec
+    feature_map = ZZFeatureMap(
+        feature_dimension=n_qubits, reps=reps, entanglement=entanglement
+    )
+    parameters = list(feature_map.parameters)
+    psi_a = qi.Statevector(feature_map.assign_parameters(dict(zip(parameters, a))))
+    psi_b = qi.Statevector(feature_map.assign_parameters(dict(zip(parameters, b))))
+    return abs(np.vdot(psi_a.data, psi_b.data)) ** 2
+
+
+class TestKernelMatrixCache:
+    """Statevector Gram blocks"""
+
+    def test_matches_pairwise_fidelity(self):
+        X_a, X_b = _encoded(4), _encoded(3, seed=1)
+
+        block = KernelMatrixCache().kernel_matrix(SPEC, X_a, X_b)
+
+        expected = [[_fidelity(SPEC, a, b) for b in X_b] for a in X_a]
+        np.testing.assert_allclose(block, expected, atol=1e-10)
+
+    def test_symmetric_block(self):
+        K = KernelMatrixCache().kernel_matrix(SPEC, _encoded())
+
+        np.testing.assert_allclose(K, K.T, atol=1e-12)
+        np.testing.assert_allclose(np.diag(K), 1.0, atol=1e-10)
+
+    def test_memory_hits(self):
+        cache = KernelMatrixCache()
+        X = _encoded()
+
+        first = cache.kernel_matrix(SPEC, X)
+        second = cache.kernel_matrix(SPEC, X.copy())
+
+        assert second is first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_persisted_blocks_survive_new_cache(self, tmp_path):
+        X = _encoded()
+        block = KernelMatrixCache(cache_dir=str(tmp_path)).kernel_matrix(SPEC, X)
+
+        reloaded = KernelMatrixCache(cache_dir=str(tmp_path))
+        np.testing.assert_array_equal(reloaded.kernel_matrix(SPEC, X), block)
+        assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+    def test_key_depends_on_spec_and_data(self):
+        X = _encoded()
+        key = KernelMatrixCache.block_key(SPEC, X, X)
+
+        assert key != KernelMatrixCache.block_key((2, 1, "full"), X, X)
+        assert key != KernelMatrixCache.block_key(SPEC, X + 1e-9, X)
+
+
+class TestConfiguredEntanglement:
+    """Feature map settings reach the kernel"""
+
+    def test_encoder_feature_map(self):
+        encoder = QuantumFeatureEncoder(n_qubits=3, reps=1, entanglement="linear")
+        assert encoder.create_feature_map().entanglement == "linear"
+
+    def test_kernel_spec(self):
+        model = QuantumKernelClassifier(
+            n_qubits=2, feature_map_reps=1, entanglement="circular"
+        )
+
+        assert model._kernel_spec() == (2, 1, "circular")
+        assert model.encoder.entanglement == "circular"
+        assert model.get_metadata()["entanglement"] == "circular"
+
+
+class TestQuantumKernelClassifier:
+    """Precomputed-kernel SVC"""
+
+    def _data(self, n=40, seed=0):
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(n, 4))
+        y = (X[:, 0] + X[:, 1] > 0).astype(int)
+        return X, y
+
+    def test_fit_and_predict(self):
+        X, y = self._data()
+        model = QuantumKernelClassifier(
+            n_qubits=2, feature_map_reps=1, noise_mitigation=False
+        )
+
+        model.fit(X, y)
+        predictions = model.predict(X[:5])
+
+        assert predictions.shape == (5,)
+        assert set(predictions) <= {0, 1}
+        assert model.predict_proba(X[:5]).shape == (5, 2)
+
+    def test_cross_validation_reuses_one_gram_matrix(self):
+        X, y = self._data()
+        cache = KernelMatrixCache()
+        model = QuantumKernelClassifier(
+            n_qubits=2, feature_map_reps=1, kernel_cache=cache
+        )
+
+        model.cross_validate(X, y, C_values=[0.1, 1.0, 10.0])
+
+        assert cache.misses == 1
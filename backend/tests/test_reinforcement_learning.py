@@ -0,0 +1,178 @@
+"""
+Tests for vectorized environments and replay memory in the RL strategy selector
+
+This test suite validates:
+1. precompute_market_features matches the per-window feature extraction
+2. Environments over the same data can share one feature array
+3. The replay buffer stores, wraps around and samples transitions
+4. The vectorized runner steps every environment until it finishes
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("gymnasium")
+pytest.importorskip("tensorflow")
+
+from app.trading_engine.ml_models.ai_model_engine.reinforcement_learning import (  # noqa: E402
+    ReplayBuffer,
+    TradingEnvironment,
+    VectorizedEnvironmentRunner,
+    precompute_market_features,
+)
+
+
+def _market_data(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {
+            "open": close * (1 + rng.normal(0, 0.002, n)),
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.integers(1_000, 5_000, n).astype(float),
+        }
+    )
+
+
+def _env(data, window_size=10, max_steps=20, **kwargs):
+    return TradingEnvironment(
+        strategies=[object(), object()],
+        market_data=data,
+        window_size=window_size,
+        max_steps=max_steps,
+        **kwargs,
+    )
+
+
+class _HoldAgent:
+    """Agent stand-in that always picks the hold action."""
+
+    def __init__(self, action_size):
+        self.action_size = action_size
+        self.batches = []
+
+    def act_batch(self, states, training=True):
+        self.batches.append(len(states))
+        return np.full(len(states), self.action_size - 1)
+
+
+class TestMarketFeatures:
+    """Per-row features computed in one pass"""
+
+    def test_matches_window_extraction(self):
+        data = _market_data()
+        env = _env(data)
+
+        features = precompute_market_features(data, 10)
+
+        assert features.shape == (len(data), 6)
+        for i in range(len(data)):
+            window = data.iloc[max(0, i - 10) : i + 1]
+            np.testing.assert_allclose(
+                features[i], env._extract_market_features(window), atol=1e-12
+            )
+
+    def test_empty_data(self):
+        features = precompute_market_features(_market_data().iloc[:0], 10)
+        assert features.shape == (0, 6)
+
+    def test_environments_share_features(self):
+        data = _market_data()
+        shared = precompute_market_features(data, 10)
+
+        envs = [_env(data, market_features=shared) for _ in range(3)]
+
+        assert all(env._market_features is shared for env in envs)
+        np.testing.assert_array_equal(_env(data)._market_features, shared)
+
+
+class TestReplayBuffer:
+    """Array-backed experience replay"""
+
+    def _transitions(self, n, offset=0):
+        states = np.arange(offset, offset + n, dtype=np.float32)[:, None, None]
+        states = np.broadcast_to(states, (n, 2, 3)).copy()
+        return (
+            states,
+            np.arange(offset, offset + n),
+            np.arange(offset, offset + n, dtype=np.float32),
+            states + 1,
+            np.zeros(n, dtype=bool),
+        )
+
+    def test_add_and_add_batch_agree(self):
+        single = ReplayBuffer(8, (2, 3))
+        batched = ReplayBuffer(8, (2, 3))
+        transitions = self._transitions(5)
+
+        for row in zip(*transitions):
+            single.add(*row)
+        batched.add_batch(*transitions)
+
+        assert len(single) == len(batched) == 5
+        np.testing.assert_array_equal(single.states, batched.states)
+        np.testing.assert_array_equal(single.actions, batched.actions)
+
+    def test_ring_keeps_newest(self):
+        buffer = ReplayBuffer(4, (2, 3))
+        buffer.add_batch(*self._transitions(3))
+        buffer.add_batch(*self._transitions(3, offset=3))
+
+        assert len(buffer) == 4
+        assert sorted(buffer.actions) == [2, 3, 4, 5]
+
+        buffer.add_batch(*self._transitions(10, offset=10))
+        assert sorted(buffer.actions) == [16, 17, 18, 19]
+
+    def test_sample_returns_consistent_rows(self):
+        buffer = ReplayBuffer(16, (2, 3), seed=0)
+        buffer.add_batch(*self._transitions(10))
+
+        states, actions, rewards, next_states, dones = buffer.sample(6)
+
+        assert len(set(actions.tolist())) == 6
+        np.testing.assert_array_equal(states[:, 0, 0], actions)
+        np.testing.assert_array_equal(rewards, actions)
+        np.testing.assert_array_equal(next_states, states + 1)
+        assert not dones.any()
+
+    def test_clear(self):
+        buffer = ReplayBuffer(4, (2, 3))
+        buffer.add_batch(*self._transitions(3))
+        buffer.clear()
+        assert len(buffer) == 0
+
+
+class TestVectorizedRunner:
+    """Lock-step environments"""
+
+    def test_reset_staggers_start_rows(self):
+        data = _market_data()
+        runner = VectorizedEnvironmentRunner([_env(data) for _ in range(3)])
+
+        states = runner.reset()
+
+        assert states.shape == (3, 10, 15)
+        starts = [env._starting_index for env in runner.envs]
+        assert starts == sorted(set(starts)) and starts[0] == 10
+
+    def test_run_episode_finishes_every_env(self):
+        data = _market_data()
+        runner = VectorizedEnvironmentRunner(
+            [_env(data, max_steps=15) for _ in range(4)]
+        )
+        agent = _HoldAgent(action_size=3)
+
+        mean_reward, infos = runner.run_episode(agent, training=False)
+
+        # One batched action per step for all environments
+        assert agent.batches == [4] * 15
+        assert all(info["strategy_usage"] == {0: 0, 1: 0} for info in infos)
+        assert np.isfinite(mean_reward)
+
+    def test_requires_an_environment(self):
+        with pytest.raises(ValueError):
+            VectorizedEnvironmentRunner([])
@@ -0,0 +1,214 @@
+"""
+Tests for the shared portfolio risk engine
+
+This test suite validates:
+1. Batched metrics match per-portfolio pandas calculations
+2. Returns matrix alignment and caching across a universe
+3. The matrix cache is bounded and least recently used matrices go first
+4. The shared engine keeps working across event loops
+5. RiskManager fetches through its own market data service
+6. Optimizers see returns in their own symbol order
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import ai_portfolio_manager, portfolio_optimizer
+from app.services.risk_engine import (
+    PortfolioRiskEngine,
+    compute_portfolio_metrics,
+    get_risk_engine,
+)
+
+
+def _bars(prices, start=datetime(2024, 1, 1)):
+    return [
+        {"timestamp": (start + timedelta(days=i)).isoformat(), "close": p}
+        for i, p in enumerate(prices)
+    ]
+
+
+class TestComputePortfolioMetrics:
+    """Test vectorized portfolio metrics."""
+
+    def test_matches_single_portfolio_reference(self):
+        """Batched metrics equal a straightforward per-portfolio computation."""
+        rng = np.random.default_rng(7)
+        returns = rng.normal(0.0005, 0.01, size=(250, 4))
+        weights = np.array([[0.4, 0.3, 0.2, 0.1], [0.0, 0.0, 0.5, 0.5]])
+        benchmark = returns.mean(axis=1)
+
+        metrics = compute_portfolio_metrics(
+            returns, weights, benchmark_returns=benchmark, risk_free_rate=0.0
+        )
+
+        for i, w in enumerate(weights):
+            series = pd.Series(returns @ w)
+            wealth = (1 + series).cumprod()
+            drawdown = (wealth / wealth.cummax() - 1).min()
+
+            assert metrics["volatility"][i] == pytest.approx(
+                series.std() * np.sqrt(252)
+            )
+            assert metrics["historical_var"][i] == pytest.approx(
+                -np.quantile(series, 0.05)
+            )
+            assert metrics["max_drawdown"][i] == pytest.approx(-drawdown)
+            assert metrics["beta"][i] == pytest.approx(
+                np.cov(series, benchmark)[0, 1] / np.var(benchmark, ddof=1)
+            )
+            assert metrics["historical_cvar"][i] >= metrics["historical_var"][i]
+
+    def test_short_history_returns_neutral_metrics(self):
+        """Fewer than two observations yields zeros and unit beta."""
+        metrics = compute_portfolio_metrics(np.zeros((1, 2)), np.array([0.5, 0.5]))
+        assert metrics["volatility"][0] == 0
+        assert metrics["beta"][0] == 1
+
+
+class TestPortfolioRiskEngine:
+    """Test the shared returns cache."""
+
+    @pytest.mark.asyncio
+    async def test_returns_matrix_is_cached_per_universe(self):
+        """Each symbol is fetched once and the matrix is reused."""
+        service = Mock()
+        service.get_historical_data_enhanced = AsyncMock(
+            side_effect=lambda symbol, **kwargs: _bars(
+                [100, 101, 102, 101, 103] if symbol == "AAA" else [50, 50, 51, 52, 52]
+            )
+        )
+        engine = PortfolioRiskEngine(market_data_service=service, lookback_days=4)
+
+        matrix = await engine.get_returns_matrix(["aaa", "BBB"])
+        again = await engine.get_returns_matrix(["BBB", "AAA"])
+
+        assert matrix is again
+        assert matrix.symbols == ["AAA", "BBB"]
+        assert matrix.returns.shape == (4, 2)
+        assert matrix.returns[0, 0] == pytest.approx(0.01)
+        assert service.get_historical_data_enhanced.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_matrix_cache_is_bounded(self):
+        """The least recently used universe is evicted first."""
+        service = Mock()
+        service.get_historical_data_enhanced = AsyncMock(
+            side_effect=lambda symbol, **kwargs: _bars([100, 101, 102])
+        )
+        engine = PortfolioRiskEngine(
+            market_data_service=service, lookback_days=2, max_cached_matrices=2
+        )
+
+        first = await engine.get_returns_matrix(["AAA"])
+        await engine.get_returns_matrix(["BBB"])
+        assert await engine.get_returns_matrix(["AAA"]) is first
+        await engine.get_returns_matrix(["CCC"])
+
+        assert [k[0] for k in engine._matrices] == [("AAA",), ("CCC",)]
+
+    def test_risk_manager_uses_its_market_data_service(self):
+        """RiskManager gets an engine bound to the service it was given."""
+        from app.trading_engine.engine.risk_manager import RiskManager
+
+        service = Mock()
+        manager = RiskManager(service)
+
+        assert manager.risk_engine.market_data_service is service
+        assert RiskManager(service).risk_engine is manager.risk_engine
+        assert get_risk_engine(service) is manager.risk_engine
+
+    @pytest.mark.asyncio
+    async def test_portfolio_metrics_for_many_portfolios(self):
+        """Metrics are returned for each requested portfolio key."""
+        service = Mock()
+        service.get_historical_data_enhanced = AsyncMock(
+            side_effect=lambda symbol, **kwargs: _bars(
+                100 + np.cumsum(np.random.default_rng(len(symbol)).normal(0, 1, 30))
+            )
+        )
+        engine = PortfolioRiskEngine(market_data_service=service, lookback_days=20)
+
+        results = await engine.portfolio_metrics(
+            {1: {"AAA": 1.0}, 2: {"AAA": 0.5, "BB": 0.5}}
+        )
+
+        assert set(results) == {1, 2}
+        assert "historical_var" in results[1]
+        assert "beta" in results[2]
+
+    def test_engine_is_reusable_across_event_loops(self):
+        """The fetch limit is not tied to the first loop that used it."""
+
+        async def fetch(symbol, **kwargs):
+            await asyncio.sleep(0)
+            return _bars([100, 101, 102, 103, 104])
+
+        service = Mock()
+        service.get_historical_data_enhanced = AsyncMock(side_effect=fetch)
+        engine = PortfolioRiskEngine(
+            market_data_service=service, lookback_days=4, max_concurrent_fetches=1
+        )
+
+        first = asyncio.run(engine.get_price_frames(["AAA", "BBB", "CCC"]))
+        engine.invalidate()
+        second = asyncio.run(engine.get_price_frames(["AAA", "BBB", "CCC"]))
+
+        assert sorted(first) == sorted(second) == ["AAA", "BBB", "CCC"]
+        assert service.get_historical_data_enhanced.await_count == 6
+
+
+def _engine_with_history(seed=5):
+    rng = np.random.default_rng(seed)
+    history = {
+        symbol: _bars(100 + np.cumsum(rng.normal(0.1 * i, 1, 60)))
+        for i, symbol in enumerate(["MSFT", "AAPL", "GOOG"])
+    }
+    service = Mock()
+    service.get_historical_data_enhanced = AsyncMock(
+        side_effect=lambda symbol, **kwargs: history[symbol]
+    )
+    return PortfolioRiskEngine(market_data_service=service, lookback_days=50)
+
+
+class TestOptimizerReturns:
+    """Returns handed to the optimizers line up with their symbols."""
+
+    @pytest.mark.asyncio
+    async def test_portfolio_optimizer_keeps_holdings_order(self, monkeypatch):
+        """Columns follow the requested symbols, not the sorted universe."""
+        engine = _engine_with_history()
+        monkeypatch.setattr(portfolio_optimizer, "get_risk_engine", lambda: engine)
+        matrix = await engine.get_returns_matrix(["MSFT", "AAPL", "GOOG"])
+
+        returns = await portfolio_optimizer.PortfolioOptimizer()._get_returns_data(
+            ["msft", "AAPL", "goog"]
+        )
+
+        assert list(returns.columns) == ["MSFT", "AAPL", "GOOG"]
+        expected = matrix.to_frame()[["MSFT", "AAPL", "GOOG"]].to_numpy()
+        np.testing.assert_allclose(returns.to_numpy(), expected)
+
+    @pytest.mark.asyncio
+    async def test_ml_enhanced_holds_cash_like_efficient_frontier(self, monkeypatch):
+        """Low risk tolerance adds the same cash slice on both methods."""
+        monkeypatch.setattr(ai_portfolio_manager, "NeuralNetworkService", Mock)
+        manager = ai_portfolio_manager.AIPortfolioManager(db=None)
+        manager.neural_network_service.predict_volatility = AsyncMock(return_value=None)
+        engine = _engine_with_history()
+        frames = await engine.get_price_frames(["MSFT", "AAPL", "GOOG"])
+        returns = manager._calculate_returns(frames)
+
+        frontier = await manager._optimize_efficient_frontier(returns, 0.25)
+        blended = await manager._optimize_ml_enhanced(
+            returns, ["MSFT", "AAPL", "GOOG"], 0.25
+        )
+
+        assert frontier["CASH"] == pytest.approx(0.1)
+        assert blended["CASH"] == pytest.approx(0.1)
+        assert sum(blended.values()) == pytest.approx(1.0)
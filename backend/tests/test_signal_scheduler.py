@@ -0,0 +1,226 @@
+"""
+Tests for the shared signal scheduler
+
+This test suite validates:
+1. Equivalent strategies share one signal; different parameters do not
+2. Each distinct symbol and signal is fetched and computed once per tick
+3. Actionable signals fan out to every subscribed portfolio
+4. Unsubscribing removes users and empty signal groups
+5. Failures in one delivery do not affect other subscribers
+6. Position-dependent strategies are never shared between users
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.signal_scheduler import (
+    SignalScheduler,
+    SignalSubscription,
+    signal_key,
+)
+
+
+class FakeStrategy:
+    """Strategy with scripted signals and call counters."""
+
+    def __init__(self, symbol, action="buy", **parameters):
+        self.symbol = symbol
+        self.name = "fake"
+        self.parameters = {"min_confidence": 0.6, **parameters}
+        self.action = action
+        self.is_active = True
+        self.generated = 0
+
+    async def generate_signal(self, market_data):
+        self.generated += 1
+        return {"action": self.action, "confidence": 0.9, "price": market_data["price"]}
+
+    async def validate_signal(self, signal, market_data):
+        return signal["confidence"] >= self.parameters["min_confidence"]
+
+
+class OtherStrategy(FakeStrategy):
+    pass
+
+
+class PositionStrategy(FakeStrategy):
+    position_dependent_signals = True
+
+
+@pytest.fixture
+def quotes():
+    calls = []
+
+    async def fetch(symbol):
+        calls.append(symbol)
+        await asyncio.sleep(0)
+        return {"symbol": symbol, "price": 100.0}
+
+    fetch.calls = calls
+    return fetch
+
+
+@pytest.fixture
+def deliveries():
+    received = []
+
+    async def deliver(subscription, signal, market_data):
+        received.append((subscription.user_id, subscription.strategy_key, signal))
+        return signal["action"] == "buy"
+
+    deliver.received = received
+    return deliver
+
+
+def _subscribe(scheduler, user_id, strategy, key=None):
+    return scheduler.subscribe(
+        SignalSubscription(user_id, user_id * 10, key or strategy.symbol, strategy)
+    )
+
+
+class TestSignalKey:
+    """Test deduplication keys."""
+
+    def test_key_components(self):
+        """Class, parameters and symbol all distinguish signals."""
+        base = signal_key(FakeStrategy("AAPL", lookback=14))
+
+        assert signal_key(FakeStrategy("AAPL", lookback=14)) == base
+        assert signal_key(FakeStrategy("AAPL", lookback=20)) != base
+        assert signal_key(FakeStrategy("MSFT", lookback=14)) != base
+        assert signal_key(OtherStrategy("AAPL", lookback=14)) != base
+
+    def test_position_dependent_keys_are_per_owner(self):
+        """Stateful strategies only share a key with their own subscription."""
+        strategy = PositionStrategy("AAPL")
+
+        assert signal_key(strategy, (1, "grid")) == signal_key(strategy, (1, "grid"))
+        assert signal_key(strategy, (1, "grid")) != signal_key(strategy, (2, "grid"))
+        assert signal_key(FakeStrategy("AAPL"), (1, "a")) == signal_key(
+            FakeStrategy("AAPL"), (2, "b")
+        )
+
+
+class TestSignalScheduler:
+    """Test ticks, fan-out and subscriptions."""
+
+    @pytest.mark.asyncio
+    async def test_signal_computed_once_and_fanned_out(self, quotes, deliveries):
+        """Many users on one strategy cost one quote and one signal."""
+        scheduler = SignalScheduler(quotes, deliveries)
+        strategies = [FakeStrategy("AAPL") for _ in range(50)]
+        for user_id, strategy in enumerate(strategies, start=1):
+            _subscribe(scheduler, user_id, strategy)
+
+        stats = await scheduler.run_tick()
+
+        assert quotes.calls == ["AAPL"]
+        assert sum(s.generated for s in strategies) == 1
+        assert stats.signals_computed == 1
+        assert stats.signals_delivered == 50
+        assert stats.trades_executed == 50
+        assert stats.fan_out == 50
+        assert {user for user, _, _ in deliveries.received} == set(range(1, 51))
+
+    @pytest.mark.asyncio
+    async def test_distinct_signals(self, quotes, deliveries):
+        """Different parameters compute separately but share the quote."""
+        scheduler = SignalScheduler(quotes, deliveries, max_concurrency=2)
+        _subscribe(scheduler, 1, FakeStrategy("AAPL", lookback=14))
+        _subscribe(scheduler, 2, FakeStrategy("AAPL", lookback=20))
+        _subscribe(scheduler, 3, FakeStrategy("MSFT", action="hold"))
+
+        stats = await scheduler.run_tick()
+
+        assert sorted(quotes.calls) == ["AAPL", "MSFT"]
+        assert stats.distinct_signals == 3
+        assert stats.signals_computed == 3
+        assert stats.actionable_signals == 2
+        assert stats.signals_delivered == 2
+
+    @pytest.mark.asyncio
+    async def test_symbol_filter_and_missing_quotes(self, deliveries):
+        """Blocked symbols and empty quotes skip signal generation."""
+
+        async def fetch(symbol):
+            return None if symbol == "MSFT" else {"price": 10.0}
+
+        scheduler = SignalScheduler(fetch, deliveries)
+        blocked = FakeStrategy("TSLA")
+        missing = FakeStrategy("MSFT")
+        _subscribe(scheduler, 1, blocked)
+        _subscribe(scheduler, 2, missing)
+        _subscribe(scheduler, 3, FakeStrategy("AAPL"))
+
+        stats = await scheduler.run_tick(symbol_allowed=lambda s: s != "TSLA")
+
+        assert blocked.generated == missing.generated == 0
+        assert stats.quotes_fetched == 1
+        assert stats.signals_delivered == 1
+
+    @pytest.mark.asyncio
+    async def test_delivery_errors_are_isolated(self, quotes):
+        """One failing delivery is counted and the rest still run."""
+
+        async def deliver(subscription, signal, market_data):
+            if subscription.user_id == 2:
+                raise RuntimeError("insufficient funds")
+            return True
+
+        scheduler = SignalScheduler(quotes, deliver)
+        for user_id in (1, 2, 3):
+            _subscribe(scheduler, user_id, FakeStrategy("AAPL"))
+
+        stats = await scheduler.run_tick()
+
+        assert stats.errors == 1
+        assert stats.trades_executed == 2
+
+    def test_unsubscribe(self, quotes, deliveries):
+        """Groups disappear with their last subscriber."""
+        scheduler = SignalScheduler(quotes, deliveries)
+        _subscribe(scheduler, 1, FakeStrategy("AAPL"), key="rsi_AAPL")
+        _subscribe(scheduler, 1, FakeStrategy("MSFT"), key="rsi_MSFT")
+        _subscribe(scheduler, 2, FakeStrategy("AAPL"), key="rsi_AAPL")
+
+        assert scheduler.unsubscribe(2, "rsi_AAPL")
+        assert not scheduler.unsubscribe(2, "rsi_AAPL")
+        assert scheduler.get_stats()["distinct_signals"] == 2
+        assert scheduler.unsubscribe_user(1) == 2
+        assert not scheduler.has_subscriptions()
+        assert scheduler.subscription_count == 0
+
+    @pytest.mark.asyncio
+    async def test_unsubscribing_source_hands_over_computation(
+        self, quotes, deliveries
+    ):
+        """A group keeps computing on a remaining subscriber's instance."""
+        scheduler = SignalScheduler(quotes, deliveries)
+        first, second = FakeStrategy("AAPL"), FakeStrategy("AAPL")
+        _subscribe(scheduler, 1, first)
+        _subscribe(scheduler, 2, second)
+
+        first.is_active = False
+        scheduler.unsubscribe(1, "AAPL")
+        await scheduler.run_tick()
+
+        assert (first.generated, second.generated) == (0, 1)
+        assert [user for user, _, _ in deliveries.received] == [2]
+
+    @pytest.mark.asyncio
+    async def test_position_dependent_strategies_are_not_shared(
+        self, quotes, deliveries
+    ):
+        """Each user's stateful strategy computes its own signal."""
+        scheduler = SignalScheduler(quotes, deliveries)
+        strategies = [PositionStrategy("AAPL") for _ in range(3)]
+        for user_id, strategy in enumerate(strategies, start=1):
+            _subscribe(scheduler, user_id, strategy)
+
+        stats = await scheduler.run_tick()
+
+        assert [s.generated for s in strategies] == [1, 1, 1]
+        assert quotes.calls == ["AAPL"]
+        assert stats.distinct_signals == 3
+        assert stats.signals_delivered == 3
@@ -0,0 +1,212 @@
+"""
+Tests for streaming compliance validation
+
+This test suite validates:
+1. Matches split across chunk boundaries are detected
+2. Critical violations halt or redact the stream before release
+3. Streamed results match the batch accounting and insurance checks
+   even for matches longer than the holdback
+4. The async wrapper stops consuming the model stream on halt
+"""
+
+import pytest
+
+from app.services.accounting_rules import (
+    AccountingResponseContext,
+    check_accounting_compliance,
+)
+from app.services.insurance_rules import (
+    InsuranceResponseContext,
+    check_insurance_compliance,
+)
+from app.services.streaming_compliance import (
+    HALT_NOTICE,
+    REDACT,
+    REDACTION_MARKER,
+    StreamingComplianceScanner,
+    compile_rules,
+    scan_stream,
+)
+
+
+def _chunks(text: str, size: int):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _stream(scanner: StreamingComplianceScanner, text: str, size: int = 3) -> str:
+    output = []
+    for chunk in _chunks(text, size):
+        output.append(scanner.feed(chunk))
+        if scanner.halted:
+            break
+    output.append(scanner.close())
+    return "".join(output)
+
+
+class TestAutomaton:
+    """Test the compiled multi-pattern automaton."""
+
+    def test_reports_every_rule_at_a_position(self):
+        """Overlapping rules starting at one position are all reported."""
+        automaton = compile_rules(("accounting",))
+        text = "Put the business expense in the right category."
+
+        rule_ids = {automaton.rules[i].rule_id for _, i, _ in automaton.scan(text)}
+
+        assert rule_ids == {"ACCT_SEP_001", "ACCT_DATA_001"}
+        assert compile_rules(("accounting",)) is automaton
+
+
+class TestStreamingScanner:
+    """Test incremental scanning of chunked output."""
+
+    def test_halts_on_match_split_across_chunks(self):
+        """A blocking phrase split over many chunks stops the stream."""
+        scanner = StreamingComplianceScanner(("insurance",))
+        text = "Index annuities are popular. This one is guaranteed 7% a year forever."
+
+        output = _stream(scanner, text, size=2)
+
+        assert scanner.halted
+        assert output == "Index annuities are popular. This one is " + HALT_NOTICE
+        assert scanner.result.triggered_rules == ["INS_PROH_001"]
+
+    def test_redacts_and_continues(self):
+        """Redaction masks the violation and keeps streaming the rest."""
+        scanner = StreamingComplianceScanner(("accounting",), on_violation=REDACT)
+        text = "Keep receipts. You could hide income from the IRS. Budget monthly."
+
+        output = _stream(scanner, text, size=4)
+
+        assert not scanner.halted
+        assert output == (
+            f"Keep receipts. You could {REDACTION_MARKER} from the IRS. "
+            "Budget monthly."
+        )
+        assert scanner.result.blocked
+
+    def test_clean_text_passes_through_unchanged(self):
+        """Text without violations is released intact, only delayed."""
+        scanner = StreamingComplianceScanner()
+        text = "Diversification spreads risk across asset classes. " * 5
+
+        first = scanner.feed(text[:10])
+        output = _stream(scanner, text[10:], size=7)
+
+        assert first == ""
+        assert first + output == text
+        assert scanner.result.passed
+        assert scanner.result.triggered_rules == []
+
+    def test_holdback_must_cover_the_longest_match(self):
+        """A holdback shorter than a capped pattern is rejected."""
+        width = compile_rules(("accounting",)).max_width
+
+        with pytest.raises(ValueError):
+            StreamingComplianceScanner(("accounting",), holdback=width - 1)
+        assert StreamingComplianceScanner(("accounting",)).holdback == width
+
+
+class TestBatchParity:
+    """Test that streamed results equal the batch rule engines."""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Your projected cash flow forecast shows a business expense spike.",
+            "Your tax liability is $4200. Check the standard deduction too.",
+            "We estimate growth. You should be a sole proprietor for now.",
+            "Mixed use vehicles need a separate log for the business account.",
+        ],
+    )
+    def test_accounting_parity(self, text):
+        """Triggered rules and messages match check_accounting_compliance."""
+        scanner = StreamingComplianceScanner(("accounting",), on_violation=REDACT)
+        _stream(scanner, text, size=5)
+        batch = check_accounting_compliance(
+            response=AccountingResponseContext(response_text=text)
+        )
+
+        assert scanner.result.triggered_rules == batch.triggered_rules
+        assert scanner.result.warnings == batch.warnings
+        assert scanner.result.disclaimers == batch.disclaimers
+        assert scanner.result.professional_referrals == batch.professional_referrals
+
+    def test_match_longer_than_the_cap_is_confirmed_on_close(self):
+        """Closing re-runs blocking rules over the full, uncapped text."""
+        text = "Step one: file" + " " * 140 + "your tax return."
+        scanner = StreamingComplianceScanner(("accounting",), on_violation=REDACT)
+        _stream(scanner, text, size=8)
+        batch = check_accounting_compliance(
+            response=AccountingResponseContext(response_text=text)
+        )
+
+        assert batch.triggered_rules == ["ACCT_TAX_001"]
+        assert scanner.result.triggered_rules == batch.triggered_rules
+        assert not scanner.result.passed
+
+    @pytest.mark.parametrize(
+        "text,intent,projection",
+        [
+            (
+                "The cash value of this policy will grow to $50k at age 65.",
+                "quote",
+                True,
+            ),
+            (
+                "You should go with Acme because of the death benefit.",
+                "comparison",
+                False,
+            ),
+            (
+                "Never guaranteed 5%; surrender charges and income tax apply.",
+                "education",
+                False,
+            ),
+            (
+                "Consider the insurance investment angle. Not a recommendation.",
+                "recommendation",
+                False,
+            ),
+        ],
+    )
+    def test_insurance_parity(self, text, intent, projection):
+        """Triggered rules and messages match check_insurance_compliance."""
+        scanner = StreamingComplianceScanner(
+            ("insurance",),
+            on_violation=REDACT,
+            intent=intent,
+            includes_projection=projection,
+        )
+        _stream(scanner, text, size=6)
+        batch = check_insurance_compliance(
+            response=InsuranceResponseContext(
+                response_text=text, intent=intent, includes_projection=projection
+            )
+        )
+
+        assert scanner.result.triggered_rules == batch.triggered_rules
+        assert scanner.result.warnings == batch.warnings
+        assert scanner.result.required_disclosures == batch.required_disclosures
+
+
+class TestScanStream:
+    """Test the async stream wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_stops_consuming_after_halt(self):
+        """No further model chunks are pulled once the scanner halts."""
+        pulled = []
+
+        async def model_stream():
+            for chunk in _chunks("Sure. First, file your 1040 online. More text.", 4):
+                pulled.append(chunk)
+                yield chunk
+
+        scanner = StreamingComplianceScanner(("accounting",))
+        output = "".join([c async for c in scan_stream(model_stream(), scanner)])
+
+        assert output.endswith(HALT_NOTICE)
+        assert "file your" not in output
+        assert "".join(pulled) != "Sure. First, file your 1040 online. More text."
+        assert scanner.result.triggered_rules == ["ACCT_TAX_001"]
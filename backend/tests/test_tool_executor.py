@@ -0,0 +1,238 @@
+"""
+Tests for the blocking tool executor
+
+This test suite validates:
+1. Blocking SDK calls do not stall the event loop
+2. Duplicate concurrent calls are coalesced
+3. Per-provider caps and timeouts are enforced
+4. Column-wise bar building matches the previous per-row output
+5. Concurrent endpoint latency with a stubbed yfinance SDK
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.tool_executor import (
+    BlockingToolExecutor,
+    ToolTimeoutError,
+    columns_to_bars,
+    frame_to_bar_columns,
+)
+
+
+class _ConcurrencyProbe:
+    """Blocking callable that records how many copies run at once."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return value
+
+
+class TestBlockingToolExecutor:
+    """Test executor scheduling behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self):
+        """Heartbeats keep ticking while blocking calls run."""
+        executor = BlockingToolExecutor(max_workers=8)
+        probe = _ConcurrencyProbe(0.2)
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            for _ in range(15):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            heartbeat(), *(executor.run("yfinance", None, probe) for _ in range(8))
+        )
+        elapsed = time.perf_counter() - start
+
+        assert ticks == 15
+        assert elapsed < 0.8  # 8 x 0.2s would be 1.6s if serialized
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_calls_are_coalesced(self):
+        """Concurrent calls with one key share a single SDK call."""
+        executor = BlockingToolExecutor()
+        probe = _ConcurrencyProbe(0.05)
+
+        results = await asyncio.gather(
+            *(executor.run("yfinance", "AAPL", probe, "bars") for _ in range(10))
+        )
+
+        assert results == ["bars"] * 10
+        assert probe.calls == 1
+        assert executor.stats["coalesced"] == 9
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_provider_cap_is_enforced(self):
+        """No more than the provider limit run at the same time."""
+        executor = BlockingToolExecutor(max_workers=8, provider_limits={"openbb": 2})
+        probe = _ConcurrencyProbe(0.05)
+
+        await asyncio.gather(*(executor.run("openbb", None, probe) for _ in range(6)))
+
+        assert probe.calls == 6
+        assert probe.peak == 2
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises(self):
+        """Slow calls raise ToolTimeoutError."""
+        executor = BlockingToolExecutor()
+
+        with pytest.raises(ToolTimeoutError):
+            await executor.run(
+                "financetoolkit", "slow", time.sleep, 0.5, timeout=0.05
+            )
+        assert executor.stats["timeouts"] == 1
+        executor.shutdown()
+
+
+class TestBarColumns:
+    """Test column-wise bar conversion."""
+
+    def test_matches_per_row_conversion(self):
+        """Output equals the previous iterrows-based payload."""
+        index = pd.date_range(
+            "2024-03-08", periods=4, freq="D", tz="America/New_York"
+        )
+        frame = pd.DataFrame(
+            {
+                "Open": [1.5, 2.25, np.nan, 4.0],
+                "High": [2.0, 3.0, 4.0, 5.0],
+                "Low": [1.0, 2.0, 3.0, 3.5],
+                "Close": [1.75, 2.5, 3.5, 4.25],
+                "Volume": [100, 200, np.nan, 400],
+            },
+            index=index,
+        )
+
+        bars = columns_to_bars(
+            frame_to_bar_columns(
+                frame,
+                {
+                    "open": "Open",
+                    "high": "High",
+                    "low": "Low",
+                    "close": "Close",
+                    "volume": "Volume",
+                },
+            )
+        )
+
+        assert [b["timestamp"] for b in bars] == [ts.isoformat() for ts in index]
+        assert bars[0]["open"] == "1.5"
+        assert bars[2]["open"] is None
+        assert bars[2]["volume"] == 0
+        assert bars[3]["volume"] == 400 and isinstance(bars[3]["volume"], int)
+
+    def test_optional_missing_column_is_none(self):
+        """Missing optional fields are None and limit keeps the tail."""
+        frame = pd.DataFrame(
+            {"close": [1.0, 2.0, 3.0]},
+            index=pd.date_range("2024-01-01", periods=3, freq="D"),
+        )
+
+        columns = frame_to_bar_columns(
+            frame, {"close": "close", "vwap": "vwap"}, limit=2, optional=("vwap",)
+        )
+
+        assert columns["timestamp"].tolist() == [
+            "2024-01-02T00:00:00",
+            "2024-01-03T00:00:00",
+        ]
+        assert columns["vwap"].tolist() == [None, None]
+
+
+class _StubTicker:
+    """yfinance.Ticker stand-in with a slow, blocking history call."""
+
+    calls = 0
+    lock = threading.Lock()
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def history(self, period: str, interval: str) -> pd.DataFrame:
+        with self.lock:
+            _StubTicker.calls += 1
+        time.sleep(0.1)
+        index = pd.date_range("2024-01-01", periods=30, freq="D")
+        prices = np.linspace(100, 130, 30)
+        return pd.DataFrame(
+            {
+                "Open": prices,
+                "High": prices + 1,
+                "Low": prices - 1,
+                "Close": prices + 0.5,
+                "Volume": np.full(30, 1_000_000),
+            },
+            index=index,
+        )
+
+
+class TestToolEndpointLoad:
+    """Concurrent request latency with the yfinance SDK stubbed."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_history_requests(self):
+        """Twenty concurrent requests over five tickers overlap and coalesce."""
+        from app.api.api_v1.endpoints import tools_yfinance
+
+        executor = BlockingToolExecutor(max_workers=8)
+        _StubTicker.calls = 0
+        tools_yfinance._cache.clear()
+
+        with patch.object(
+            tools_yfinance, "_get_yfinance_ticker", side_effect=_StubTicker
+        ), patch.object(
+            tools_yfinance, "get_tool_executor", return_value=executor
+        ):
+            tickers = ["AAA", "BBB", "CCC", "DDD", "EEE"] * 4
+            start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(
+                    tools_yfinance.get_history(
+                        t,
+                        period="1mo",
+                        interval="1d",
+                        format="rows",
+                        max_points=None,
+                        accept=None,
+                    )
+                    for t in tickers
+                )
+            )
+            elapsed = time.perf_counter() - start
+
+        assert _StubTicker.calls == 5
+        assert elapsed < 0.5  # 20 x 0.1s would be 2s on the event loop
+        assert all(r.response["total_bars"] == 30 for r in responses)
+        assert responses[0].response["bars"][0]["close"] == "100.5"
+        tools_yfinance._cache.clear()
+        executor.shutdown()
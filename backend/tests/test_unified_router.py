@@ -0,0 +1,177 @@
+"""
+Tests for single-pass query and mode routing
+
+This test suite validates:
+1. The multi-pattern matcher finds overlapping and nested hits
+2. Keyword and pattern hits equal per-pattern scanning
+3. Unified routing decisions equal the original routers on training prompts
+4. Repeated queries are served from the LRU cache
+"""
+
+import re
+
+import pytest
+
+from app.services.mode_router import ModeRouter, RiskLevel, TaskType
+from app.services.pattern_matcher import MultiPatternMatcher
+from app.services.query_router import AdvisoryMode, QueryRouter
+from app.services.unified_router import (
+    TRAINING_PROMPTS_PATH,
+    UnifiedRouter,
+    UnifiedRoutingResult,
+    _ReferenceModeRouter,
+    _ReferenceQueryRouter,
+    benchmark_routing,
+    load_training_prompts,
+)
+
+SAMPLE_PROMPTS = [
+    "What is a living will and do I need a trust?",
+    "Should I invest my bonus in a tax-efficient ETF or pay off my mortgage?",
+    "How does a Roth conversion work with foreign income?",
+    "Explain the k-1 my trustee sent for form 1041",
+    "What's the current price and p/e ratio of AAPL today in the market?",
+    "Plan a strategy to retire early and save 50/30/20",
+    "Our family council wants a family constitution for the next generation",
+    "Is it safe to buy options on margin for guaranteed return?",
+    "",
+]
+
+
+def _reference_hits(router, query):
+    """Per-keyword and per-pattern scans of the query."""
+    query_lower = query.lower()
+    keyword_hits = {
+        kw: f" {kw} " in f" {query_lower} "
+        for kw in router.query_router.keywords
+        if kw in query_lower
+    }
+    pattern_hits = frozenset(
+        key
+        for key, pattern in zip(
+            router.mode_router.pattern_keys, router.mode_router.matcher.patterns
+        )
+        if re.search(pattern, query, re.IGNORECASE)
+    )
+    return keyword_hits, pattern_hits
+
+
+class TestMultiPatternMatcher:
+    """Test the combined pattern scanner."""
+
+    def test_overlapping_literals_and_regexes(self):
+        """Nested keywords at one position and regex hits are all reported."""
+        patterns = ["tax", "tax loss harvesting", "loss", r"\bharvest\w*\b", None]
+        matcher = MultiPatternMatcher(patterns)
+
+        spans = matcher.spans("try tax loss harvesting; tax again")
+
+        assert spans[0] == [(4, 7), (25, 28)]
+        assert spans[1] == [(4, 23)]
+        assert spans[2] == [(8, 12)]
+        assert spans[3] == [(13, 23)]
+        assert 4 not in spans
+
+    def test_matches_per_pattern_search(self):
+        """A pattern is hit exactly when re.search finds it."""
+        patterns = ModeRouter().matcher.patterns
+        matcher = MultiPatternMatcher(patterns)
+
+        for prompt in SAMPLE_PROMPTS:
+            found = set(matcher.spans(prompt.lower()))
+            expected = {i for i, p in enumerate(patterns) if re.search(p, prompt, re.I)}
+            assert found == expected, prompt
+
+
+class TestRouterHits:
+    """Test the routers' single-pass helpers."""
+
+    def test_keyword_hits_match_substring_scan(self):
+        """Keyword presence and phrase flags equal the substring checks."""
+        router = UnifiedRouter(QueryRouter(), ModeRouter())
+
+        for prompt in SAMPLE_PROMPTS:
+            expected_keywords, expected_patterns = _reference_hits(router, prompt)
+            assert router.query_router.match_keywords(prompt) == expected_keywords
+            assert router.mode_router.match_patterns(prompt) == expected_patterns
+            assert router.analyze(prompt) == (expected_keywords, expected_patterns)
+
+    def test_phrase_boost(self):
+        """Only space-delimited occurrences count as exact phrases."""
+        hits = QueryRouter().match_keywords("A willing heir, or a will")
+
+        assert hits["will"] is True
+        assert hits["heir"] is False
+
+    def test_router_methods_accept_precomputed_hits(self):
+        """Standalone calls and calls with shared hits agree."""
+        query_router = QueryRouter()
+        mode_router = ModeRouter()
+        prompt = "Should I set up a trust for my estate with foreign assets?"
+
+        mode, _ = query_router.classify_advisory_mode(prompt)
+        hits = mode_router.match_patterns(prompt)
+
+        assert mode == AdvisoryMode.ESTATE_PLANNING
+        assert query_router.requires_compliance_check(mode, prompt)
+        assert mode_router.classify_task(prompt, hits)[0] == TaskType.ESTATE_PLANNING
+        assert mode_router.assess_risk(prompt, TaskType.ESTATE_PLANNING, hits) == (
+            RiskLevel.HIGH
+        )
+
+
+class TestUnifiedRouter:
+    """Test combined routing and caching."""
+
+    def test_repeated_queries_hit_cache(self):
+        """The second routing of a query reuses the cached scan."""
+        router = UnifiedRouter(QueryRouter(), ModeRouter(), cache_size=8)
+
+        first = router.route(SAMPLE_PROMPTS[1]).to_dict()
+        second = router.route(SAMPLE_PROMPTS[1]).to_dict()
+
+        assert first == second
+        assert router.cache_info().hits == 1
+        assert router.cache_info().misses == 1
+
+    def test_matches_original_routers(self):
+        """Unified decisions equal separate route_query and route calls."""
+        router = UnifiedRouter(QueryRouter(), ModeRouter())
+
+        for prompt in SAMPLE_PROMPTS:
+            routing = QueryRouter().route_query(prompt)
+            decision = ModeRouter().route(prompt)
+            unified = router.route(prompt)
+
+            assert unified.routing.advisory_mode == routing.advisory_mode
+            assert unified.routing.confidence == routing.confidence
+            assert set(unified.routing.required_roles) == set(routing.required_roles)
+            assert unified.decision.task_type == decision.task_type
+            assert unified.decision.risk_level == decision.risk_level
+            assert unified.decision.requires_tool_call == decision.requires_tool_call
+
+    def test_matches_reference_routers(self):
+        """Unified decisions equal the pre-scan keyword and regex checks."""
+        router = UnifiedRouter(QueryRouter(), ModeRouter())
+        query_reference, mode_reference = (
+            _ReferenceQueryRouter(),
+            _ReferenceModeRouter(),
+        )
+
+        for prompt in SAMPLE_PROMPTS + [p.upper() for p in SAMPLE_PROMPTS]:
+            expected = UnifiedRoutingResult(
+                routing=query_reference.route_query(prompt),
+                decision=mode_reference.route(prompt),
+            ).to_dict()
+            assert router.route(prompt).to_dict() == expected, prompt
+
+    @pytest.mark.skipif(
+        not TRAINING_PROMPTS_PATH.exists(), reason="training data not present"
+    )
+    def test_benchmark_on_training_prompts(self):
+        """The benchmark finds no differing decisions on training prompts."""
+        results = benchmark_routing(load_training_prompts(limit=200), repeat=1)
+
+        assert results["prompts"] == 200
+        assert results["mismatches"] == 0
+        assert results["cached_ms"] >= 0
@@ -0,0 +1,273 @@
+"""
+Tests for precomputed intraday volume profiles
+
+This test suite validates:
+1. The half-day calendar and session clock
+2. Slot volumes are the same whatever the source bar size
+3. Weekday, half-day and market curves built from the bar warehouse
+4. Execution-window weights and their fallbacks
+5. VWAP execution and order chunking read the store without fetching data
+6. The nightly job compacts the warehouse before rebuilding profiles
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.bar_warehouse import BAR_DTYPE, BarWarehouse
+from app.services.volume_profiles import (
+    HALF_DAY_ROW,
+    HALF_DAY_SLOTS,
+    MARKET_KEY,
+    NUM_SLOTS,
+    VolumeProfileJob,
+    VolumeProfileStore,
+    daily_slot_volumes,
+    is_half_day,
+    session_minute,
+)
+from app.trading_engine.strategies.execution.vwap_strategy import (
+    VWAPExecutionStrategy,
+)
+
+# Minute-by-minute U shape: heavy open and close, quiet midday
+_U_SHAPE = 1.0 + 4.0 * np.linspace(-1, 1, 390) ** 2
+
+
+def _session_records(day: str, minutes: int = 390, scale: float = 1.0):
+    """One session of 1-minute bars, timestamps in UTC."""
+    local = pd.date_range(f"{day} 09:30", periods=minutes, freq="1min")
+    stamps = local.tz_localize("America/New_York").tz_convert("UTC")
+    records = np.zeros(minutes, dtype=BAR_DTYPE)
+    records["ts"] = stamps.as_unit("ns").asi8
+    records["close"] = 100.0
+    records["volume"] = 1000 * scale * _U_SHAPE[:minutes]
+    return records
+
+
+def _warehouse(tmp_path, days=None, half_days=()):
+    warehouse = BarWarehouse(str(tmp_path / "bars"))
+    days = days if days is not None else pd.bdate_range("2024-10-01", "2024-11-22")
+    sessions = [_session_records(str(d.date())) for d in days]
+    sessions += [_session_records(d, minutes=210) for d in half_days]
+    records = np.concatenate(sessions)
+    warehouse.append("AAPL", "1min", records[np.argsort(records["ts"])])
+    return warehouse
+
+
+class TestCalendar:
+    """Half-days and the session clock"""
+
+    @pytest.mark.parametrize(
+        "day,expected",
+        [
+            (date(2024, 11, 29), True),  # day after Thanksgiving
+            (date(2024, 12, 24), True),
+            (date(2024, 7, 3), True),
+            (date(2026, 7, 3), False),  # Friday: observed Independence Day
+            (date(2021, 12, 24), False),  # Friday: observed Christmas
+            (date(2024, 11, 22), False),
+            (date(2024, 10, 15), False),
+        ],
+    )
+    def test_half_days(self, day, expected):
+        assert is_half_day(day) is expected
+
+    def test_session_minute_handles_dst(self):
+        # 14:30 UTC is the open in winter, 13:30 UTC in summer
+        assert session_minute(datetime(2024, 1, 10, 14, 30)) == (date(2024, 1, 10), 0)
+        assert session_minute(datetime(2024, 7, 10, 13, 30)) == (date(2024, 7, 10), 0)
+
+
+class TestSlotVolumes:
+    """Per-day slot aggregation"""
+
+    def test_bar_size_does_not_change_slots(self):
+        minute = _session_records("2024-10-01")
+        five = minute.reshape(-1, 5)
+        coarse = np.zeros(len(five), dtype=BAR_DTYPE)
+        coarse["ts"] = five["ts"][:, 0]
+        coarse["volume"] = five["volume"].sum(axis=1)
+
+        days_1, slots_1, end_1 = daily_slot_volumes(minute["ts"], minute["volume"], 1)
+        days_5, slots_5, end_5 = daily_slot_volumes(coarse["ts"], coarse["volume"], 5)
+
+        np.testing.assert_array_equal(days_1, days_5)
+        np.testing.assert_allclose(slots_1, slots_5)
+        assert end_1[0] == end_5[0] == 390
+
+    def test_long_bars_spread_within_session(self):
+        local = pd.DatetimeIndex(["2024-10-01 15:30"]).tz_localize("America/New_York")
+        _, slots, _ = daily_slot_volumes(
+            local.tz_convert("UTC").as_unit("ns").asi8, np.array([600.0]), 60
+        )
+
+        assert slots.sum() == pytest.approx(600.0)
+        np.testing.assert_allclose(slots[0, -6:], 100.0)
+
+    def test_extended_hours_are_ignored(self):
+        local = pd.DatetimeIndex(["2024-10-01 08:00", "2024-10-01 16:30"])
+        ts = local.tz_localize("America/New_York").tz_convert("UTC").as_unit("ns").asi8
+        days, slots, _ = daily_slot_volumes(ts, np.array([5.0, 5.0]), 1)
+
+        assert len(days) == 0 and slots.shape == (0, NUM_SLOTS)
+
+
+class TestBuild:
+    """Profiles built from the warehouse"""
+
+    def test_curves_follow_history(self, tmp_path):
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+        result = store.build(
+            _warehouse(tmp_path), lookback_days=90, now=datetime(2024, 11, 25, 12)
+        )
+
+        assert result == {"symbols": 1, "skipped": 0}
+        profile = store.get_profile("aapl", date(2024, 11, 25))
+        assert profile.sum() == pytest.approx(1.0, abs=1e-5)
+        assert profile[0] > 3 * profile[NUM_SLOTS // 2]
+        assert profile[-1] > 3 * profile[NUM_SLOTS // 2]
+        assert "AAPL" in store and len(store) == 2
+
+    def test_half_day_curve(self, tmp_path):
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+        store.build(_warehouse(tmp_path), now=datetime(2024, 11, 25, 12))
+
+        # No half-day history: the closing peak is moved to 13:00
+        half = store.get_profile("AAPL", date(2024, 11, 29))
+        assert half[HALF_DAY_SLOTS:].sum() == 0
+        assert half[HALF_DAY_SLOTS - 1] > 3 * half[HALF_DAY_SLOTS - 7]
+
+        store.build(
+            _warehouse(tmp_path, half_days=["2024-07-03"]),
+            lookback_days=200,
+            now=datetime(2024, 11, 25, 12),
+        )
+        assert store._samples[store._index["AAPL"], HALF_DAY_ROW] == 1
+
+    def test_unfinished_session_is_excluded(self, tmp_path):
+        warehouse = _warehouse(
+            tmp_path, days=pd.bdate_range("2024-11-18", "2024-11-22")
+        )
+        warehouse.append("AAPL", "1min", _session_records("2024-11-25", minutes=30))
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+
+        store.build(warehouse, now=datetime(2024, 11, 25, 16))
+
+        assert store._samples[store._index["AAPL"], :5].sum() == 5
+
+    def test_unknown_symbol_gets_market_curve(self, tmp_path):
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+        store.build(_warehouse(tmp_path), now=datetime(2024, 11, 25, 12))
+
+        np.testing.assert_allclose(
+            store.get_profile("ZZZZ", date(2024, 11, 25)),
+            store.get_profile(MARKET_KEY, date(2024, 11, 25)),
+        )
+
+    def test_missing_file(self, tmp_path):
+        store = VolumeProfileStore(str(tmp_path / "missing.npz"))
+
+        assert store.get_profile("AAPL") is None
+        assert store.window_weights("AAPL", datetime(2024, 11, 25, 15), 60, 4) is None
+
+
+class TestWeights:
+    """Execution window weights"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+        store.build(_warehouse(tmp_path), now=datetime(2024, 11, 25, 12))
+        return store
+
+    def test_full_session_matches_profile(self, store):
+        open_utc = datetime(2024, 11, 25, 14, 30)
+        weights = store.window_weights("AAPL", open_utc, 390, NUM_SLOTS)
+
+        np.testing.assert_allclose(
+            weights, store.get_profile("AAPL", date(2024, 11, 25)), rtol=1e-5
+        )
+
+    def test_window_outside_session(self, store):
+        evening = datetime(2024, 11, 25, 23, 0)
+        assert store.window_weights("AAPL", evening, 60, 4) is None
+
+    def test_session_weights_roll_to_next_session(self, store):
+        evening = datetime(2024, 11, 25, 23, 0)
+        weights = store.session_weights("AAPL", 3, now=evening)
+
+        assert sum(weights) == pytest.approx(1.0)
+        assert weights[1] < weights[0] and weights[1] < weights[2]
+
+
+class TestConsumers:
+    """Execution code reads the store"""
+
+    @pytest.mark.asyncio
+    async def test_vwap_strategy_uses_store(self, tmp_path):
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+        store.build(_warehouse(tmp_path), now=datetime(2024, 11, 25, 12))
+        market_data = MagicMock()
+        strategy = VWAPExecutionStrategy(
+            "AAPL",
+            market_data_service=market_data,
+            execution_window_minutes=390,
+            num_slices=6,
+            volume_profile_store=store,
+        )
+        strategy.start_time = datetime(2024, 11, 25, 14, 30)
+
+        profile = await strategy._get_volume_profile()
+
+        assert len(profile) == 6
+        assert profile[0] > profile[2] and profile[-1] > profile[3]
+        market_data.get_historical_data.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_vwap_chunks_follow_profile(self, tmp_path):
+        from app.services.trade_execution import TradeExecutionService
+
+        store = VolumeProfileStore(str(tmp_path / "profiles.npz"))
+        store.build(_warehouse(tmp_path), now=datetime(2024, 11, 25, 12))
+        # Bypass __init__, which reads unrelated execution settings
+        service = TradeExecutionService.__new__(TradeExecutionService)
+        service.volume_profiles = store
+        service.max_order_chunk_size = Decimal("100")
+
+        chunks = await service._calculate_vwap_chunks("AAPL", Decimal("1000"))
+
+        assert sum(chunks) == Decimal("1000")
+        assert all(0 < c <= Decimal("100") for c in chunks)
+        assert len(chunks) >= 10
+
+
+class TestNightlyJob:
+    """Compaction and profile build"""
+
+    @pytest.mark.asyncio
+    async def test_run_once_compacts_then_builds(self, tmp_path):
+        warehouse = _warehouse(
+            tmp_path, days=pd.bdate_range("2024-11-18", "2024-11-22")
+        )
+        store = MagicMock()
+        store.build.side_effect = lambda w, lookback_days: {
+            "hourly_bars": w.count("AAPL", "60min")
+        }
+        job = VolumeProfileJob(store, warehouse, minute_retain_days=None)
+
+        result = await job.run_once()
+
+        assert result["hourly_bars"] == warehouse.count("AAPL", "60min") > 0
+        assert warehouse.count("AAPL", "1day") == 5
+
+    def test_minute_retention_covers_lookback(self, tmp_path):
+        job = VolumeProfileJob(
+            MagicMock(), MagicMock(), lookback_days=60, minute_retain_days=30
+        )
+
+        assert job.minute_retain_days == 60